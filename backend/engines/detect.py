@@ -36,6 +36,17 @@ from .base import (
 
 logger = logging.getLogger(__name__)
 
+# Column sketches give outlier checks their mean / std / quartiles without a scan
+SKETCHES_AVAILABLE = False
+SketchStore = None
+
+try:
+    from utils.column_sketches import ENABLED as _SKETCHES_ENABLED, SketchStore as _SketchStore
+    SketchStore = _SketchStore
+    SKETCHES_AVAILABLE = _SKETCHES_ENABLED
+except ImportError as e:
+    logger.warning(f"[DETECT] Column sketches not available: {e}")
+
 
 class DetectionType(str, Enum):
     """Types of detection patterns."""
@@ -129,7 +140,7 @@ class DetectEngine(BaseEngine):
                     message=result["message"],
                     affected_records=result["match_count"],
                     evidence=result["matches"][:sample_limit],
-                    details={"pattern": pattern}
+                    details={"pattern": pattern, **({"stats": result["stats"]} if result.get("stats") else {})}
                 ))
                 all_detections.extend(result["matches"][:sample_limit])
         
@@ -249,12 +260,44 @@ class DetectEngine(BaseEngine):
             logger.error(f"[DETECT] Orphan error: {e}")
             return {"matches": [], "match_count": 0, "message": str(e), "sql": [sql]}
     
+    def _column_sketch(self, table: str, column: str):
+        """
+        The column's sketch when it still matches the table and the column is
+        numeric - or text that profiling would call numeric - else None.
+        """
+        if not SKETCHES_AVAILABLE:
+            return None
+        sketch = (SketchStore(self.conn).load(table, [column]) or {}).get(column)
+        if sketch is None or not sketch.numeric_count:
+            return None
+        if sketch.kind == 'number' or (sketch.kind == 'text' and
+                                       sketch.numeric_count > (sketch.count - sketch.null_count) * 0.8):
+            return sketch
+        return None
+    
     def _detect_outliers(self, table: str, pattern: Dict, limit: int) -> Dict:
         column = pattern["column"]
         method = pattern.get("method", "zscore")
         threshold = pattern.get("threshold", 3)
+        sketch = self._column_sketch(table, column)
+        stats = None
+        value = f't."{column}"'
+        if sketch is not None and sketch.kind == 'text':
+            # Same parse as profiling, so the sketch's stats describe these values
+            value = f"""TRY_CAST(REPLACE(REPLACE(CAST(t."{column}" AS VARCHAR), ',', ''), '$', '') AS DOUBLE)"""
         
-        if method == "zscore":
+        if method == "zscore" and sketch is not None:
+            mean, std = sketch.mean, sketch.std or 0.0
+            stats = {"source": "sketch", "mean": mean, "std": std}
+            sql = f'''
+                SELECT t.*, ABS(({value} - ({mean!r})) / NULLIF({std!r}, 0)) as zscore
+                FROM "{table}" t
+                WHERE {value} IS NOT NULL
+                AND ABS(({value} - ({mean!r})) / NULLIF({std!r}, 0)) > {threshold}
+                ORDER BY zscore DESC
+                LIMIT {limit}
+            '''
+        elif method == "zscore":
             sql = f'''
                 WITH stats AS (
                     SELECT AVG("{column}") as mean_val, STDDEV("{column}") as std_val
@@ -267,6 +310,17 @@ class DetectEngine(BaseEngine):
                 ORDER BY zscore DESC
                 LIMIT {limit}
             '''
+        elif sketch is not None:  # IQR from sketch quantiles (rank error in stats)
+            q1, q3 = sketch.quantile(0.25), sketch.quantile(0.75)
+            stats = {"source": "sketch", "q1": q1, "q3": q3,
+                     "quantile_rank_error": sketch.error_bounds()["quantile_rank"]}
+            sql = f'''
+                SELECT t.* FROM "{table}" t
+                WHERE {value} IS NOT NULL
+                AND ({value} < ({q1!r}) - {threshold}*({q3!r} - ({q1!r}))
+                     OR {value} > ({q3!r}) + {threshold}*({q3!r} - ({q1!r})))
+                LIMIT {limit}
+            '''
         else:  # IQR
             sql = f'''
                 WITH q AS (
@@ -286,7 +340,8 @@ class DetectEngine(BaseEngine):
                 "matches": matches,
                 "match_count": len(matches),
                 "message": f"{len(matches)} outliers in {column} ({method})",
-                "sql": [sql]
+                "sql": [sql],
+                "stats": stats
             }
         except Exception as e:
             logger.error(f"[DETECT] Outlier error: {e}")
@@ -29,7 +29,10 @@ import logging
 import json
 import csv
 import io
-from typing import Dict, List, Optional, Any
+import os
+import tempfile
+import importlib.util
+from typing import Dict, Iterator, List, Optional, Any
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
@@ -83,6 +86,18 @@ class ExportResult:
     content_type: str  # MIME type
     metadata: Dict[str, Any] = field(default_factory=dict)
     error: Optional[str] = None
+    chunks: Optional[Iterator[bytes]] = field(default=None, repr=False)  # set instead of content when streamed
+    
+    def iter_content(self) -> Iterator[bytes]:
+        """File bytes in chunks (streamed exports) or as one chunk."""
+        if self.chunks is not None:
+            return self.chunks
+        return iter([self.content])
+
+
+# Rows per CSV chunk / file read size for streamed exports
+STREAM_CSV_ROWS = 5000
+STREAM_FILE_CHUNK_BYTES = 256 * 1024
 
 
 # =============================================================================
@@ -314,7 +329,8 @@ class ExportEngine:
         playbook_results: Dict,
         template: TemplateType,
         format: ExportFormat = None,
-        context: Dict = None
+        context: Dict = None,
+        stream: bool = False
     ) -> ExportResult:
         """
         Generate export from playbook results.
@@ -324,6 +340,8 @@ class ExportEngine:
             template: Which template to use
             format: Output format (defaults to template's default)
             context: Additional context (project_name, client_name, etc.)
+            stream: CSV/XLSX only - return result.chunks (rendered batch by
+                batch / from a write-only workbook file) instead of content
             
         Returns:
             ExportResult with file content
@@ -364,11 +382,11 @@ class ExportEngine:
             if format == ExportFormat.JSON:
                 return self._export_json(template_def, export_context)
             elif format == ExportFormat.CSV:
-                return self._export_csv(template_def, export_context)
+                return self._export_csv(template_def, export_context, stream)
             elif format == ExportFormat.HTML:
                 return self._export_html(template_def, export_context)
             elif format == ExportFormat.XLSX:
-                return self._export_xlsx(template_def, export_context)
+                return self._export_xlsx(template_def, export_context, stream)
             elif format == ExportFormat.DOCX:
                 return self._export_docx(template_def, export_context)
             elif format == ExportFormat.PDF:
@@ -481,15 +499,31 @@ class ExportEngine:
             metadata={"record_count": len(context.get("all_findings", []))}
         )
     
-    def _export_csv(self, template: ExportTemplate, context: Dict) -> ExportResult:
+    def _export_csv(self, template: ExportTemplate, context: Dict, stream: bool = False) -> ExportResult:
         """Export as CSV."""
         filename = f"{template.id}_{context.get('project_name', 'export')}_{datetime.now().strftime('%Y%m%d')}.csv"
         
-        output = io.StringIO()
-        
         # For findings-based templates, export findings
         findings = context.get("all_findings", [])
         
+        chunks = self._iter_csv(context)
+        content = b"" if stream else b"".join(chunks)
+        
+        return ExportResult(
+            success=True,
+            template=template.id,
+            format="csv",
+            filename=filename,
+            content=content,
+            content_type="text/csv",
+            metadata={"record_count": len(findings) or len(context.get("results", []))},
+            chunks=chunks if stream else None
+        )
+    
+    def _iter_csv(self, context: Dict) -> Iterator[bytes]:
+        """CSV rows encoded STREAM_CSV_ROWS at a time."""
+        findings = context.get("all_findings", [])
+        
         if findings:
             # Get all unique keys from findings
             all_keys = set()
@@ -497,38 +531,34 @@ class ExportEngine:
                 all_keys.update(f.keys())
             
             fieldnames = sorted(all_keys)
-            writer = csv.DictWriter(output, fieldnames=fieldnames, extrasaction='ignore')
-            writer.writeheader()
-            writer.writerows(findings)
+            rows = iter(findings)
         else:
             # Export results summary
             results = context.get("results", [])
-            if results:
-                fieldnames = ["id", "engine", "success", "status", "row_count", "summary", "findings_count"]
-                writer = csv.DictWriter(output, fieldnames=fieldnames)
-                writer.writeheader()
-                for r in results:
-                    writer.writerow({
-                        "id": r.get("id"),
-                        "engine": r.get("engine"),
-                        "success": r.get("success"),
-                        "status": r.get("status"),
-                        "row_count": r.get("row_count"),
-                        "summary": r.get("summary"),
-                        "findings_count": len(r.get("findings", []))
-                    })
+            if not results:
+                return
+            fieldnames = ["id", "engine", "success", "status", "row_count", "summary", "findings_count"]
+            rows = ({
+                "id": r.get("id"),
+                "engine": r.get("engine"),
+                "success": r.get("success"),
+                "status": r.get("status"),
+                "row_count": r.get("row_count"),
+                "summary": r.get("summary"),
+                "findings_count": len(r.get("findings", []))
+            } for r in results)
         
-        content = output.getvalue()
-        
-        return ExportResult(
-            success=True,
-            template=template.id,
-            format="csv",
-            filename=filename,
-            content=content.encode("utf-8"),
-            content_type="text/csv",
-            metadata={"record_count": len(findings) or len(context.get("results", []))}
-        )
+        output = io.StringIO()
+        writer = csv.DictWriter(output, fieldnames=fieldnames, extrasaction='ignore')
+        writer.writeheader()
+        for i, row in enumerate(rows, 1):
+            writer.writerow(row)
+            if i % STREAM_CSV_ROWS == 0:
+                yield output.getvalue().encode("utf-8")
+                output.seek(0)
+                output.truncate()
+        if output.tell():
+            yield output.getvalue().encode("utf-8")
     
     def _export_html(self, template: ExportTemplate, context: Dict) -> ExportResult:
         """Export as HTML."""
@@ -652,12 +682,9 @@ class ExportEngine:
         
         return html
     
-    def _export_xlsx(self, template: ExportTemplate, context: Dict) -> ExportResult:
-        """Export as XLSX."""
-        try:
-            import openpyxl
-            from openpyxl.styles import Font, PatternFill, Alignment
-        except ImportError:
+    def _export_xlsx(self, template: ExportTemplate, context: Dict, stream: bool = False) -> ExportResult:
+        """Export as XLSX (write-only workbook: rows are not held as a cell tree)."""
+        if importlib.util.find_spec("openpyxl") is None:
             return ExportResult(
                 success=False,
                 template=template.id,
@@ -670,21 +697,58 @@ class ExportEngine:
         
         filename = f"{template.id}_{context.get('project_name', 'export')}_{datetime.now().strftime('%Y%m%d')}.xlsx"
         
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = "Summary"
+        chunks = None
+        if stream:
+            # Save to a temp file and stream it back in chunks
+            fd, path = tempfile.mkstemp(suffix=".xlsx", prefix="xlr8_export_")
+            os.close(fd)
+            try:
+                self._write_xlsx(context, path)
+            except Exception:
+                os.remove(path)
+                raise
+            content, chunks = b"", self._iter_file(path)
+        else:
+            # Save to bytes
+            output = io.BytesIO()
+            self._write_xlsx(context, output)
+            content = output.getvalue()
+        
+        return ExportResult(
+            success=True,
+            template=template.id,
+            format="xlsx",
+            filename=filename,
+            content=content,
+            content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            metadata={"sheets": ["Summary", "Findings", "Results"]},
+            chunks=chunks
+        )
+    
+    def _write_xlsx(self, context: Dict, target) -> None:
+        """Write the Summary/Findings/Results workbook to a path or file object."""
+        import openpyxl
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import Font, PatternFill
+        
+        wb = openpyxl.Workbook(write_only=True)
         
         # Header styling
         header_font = Font(bold=True, color="FFFFFF")
         header_fill = PatternFill(start_color="83b16d", end_color="83b16d", fill_type="solid")
         
+        def header_row(ws, headers):
+            cells = []
+            for header in headers:
+                cell = WriteOnlyCell(ws, value=header)
+                cell.font = header_font
+                cell.fill = header_fill
+                cells.append(cell)
+            return cells
+        
         # Summary sheet
-        ws["A1"] = "Metric"
-        ws["B1"] = "Value"
-        ws["A1"].font = header_font
-        ws["A1"].fill = header_fill
-        ws["B1"].font = header_font
-        ws["B1"].fill = header_fill
+        ws = wb.create_sheet("Summary")
+        ws.append(header_row(ws, ["Metric", "Value"]))
         
         metrics = [
             ("Project", context.get("project_name", "N/A")),
@@ -696,62 +760,58 @@ class ExportEngine:
             ("Quality Score", f"{context.get('quality_score', 0)}%")
         ]
         
-        for i, (label, value) in enumerate(metrics, start=2):
-            ws[f"A{i}"] = label
-            ws[f"B{i}"] = value
+        for label, value in metrics:
+            ws.append([label, value])
         
         # Findings sheet
         ws_findings = wb.create_sheet("Findings")
         findings = context.get("all_findings", [])
         
         if findings:
-            headers = ["Severity", "Type", "Message", "Engine", "Feature"]
-            for col, header in enumerate(headers, start=1):
-                cell = ws_findings.cell(row=1, column=col, value=header)
-                cell.font = header_font
-                cell.fill = header_fill
-            
-            for row, f in enumerate(findings, start=2):
-                ws_findings.cell(row=row, column=1, value=f.get("severity", ""))
-                ws_findings.cell(row=row, column=2, value=f.get("finding_type", ""))
-                ws_findings.cell(row=row, column=3, value=f.get("message", ""))
-                ws_findings.cell(row=row, column=4, value=f.get("source_engine", ""))
-                ws_findings.cell(row=row, column=5, value=f.get("source_feature", ""))
+            ws_findings.append(header_row(ws_findings, ["Severity", "Type", "Message", "Engine", "Feature"]))
+            for f in findings:
+                ws_findings.append([
+                    f.get("severity", ""),
+                    f.get("finding_type", ""),
+                    f.get("message", ""),
+                    f.get("source_engine", ""),
+                    f.get("source_feature", "")
+                ])
         
         # Results sheet
         ws_results = wb.create_sheet("Results")
         results = context.get("results", [])
         
         if results:
-            headers = ["Feature ID", "Engine", "Success", "Status", "Rows", "Findings", "Summary"]
-            for col, header in enumerate(headers, start=1):
-                cell = ws_results.cell(row=1, column=col, value=header)
-                cell.font = header_font
-                cell.fill = header_fill
-            
-            for row, r in enumerate(results, start=2):
-                ws_results.cell(row=row, column=1, value=r.get("id", ""))
-                ws_results.cell(row=row, column=2, value=r.get("engine", ""))
-                ws_results.cell(row=row, column=3, value="Yes" if r.get("success") else "No")
-                ws_results.cell(row=row, column=4, value=r.get("status", ""))
-                ws_results.cell(row=row, column=5, value=r.get("row_count", 0))
-                ws_results.cell(row=row, column=6, value=len(r.get("findings", [])))
-                ws_results.cell(row=row, column=7, value=r.get("summary", ""))
-        
-        # Save to bytes
-        output = io.BytesIO()
-        wb.save(output)
-        content = output.getvalue()
-        
-        return ExportResult(
-            success=True,
-            template=template.id,
-            format="xlsx",
-            filename=filename,
-            content=content,
-            content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            metadata={"sheets": ["Summary", "Findings", "Results"]}
-        )
+            ws_results.append(header_row(ws_results, ["Feature ID", "Engine", "Success", "Status", "Rows", "Findings", "Summary"]))
+            for r in results:
+                ws_results.append([
+                    r.get("id", ""),
+                    r.get("engine", ""),
+                    "Yes" if r.get("success") else "No",
+                    r.get("status", ""),
+                    r.get("row_count", 0),
+                    len(r.get("findings", [])),
+                    r.get("summary", "")
+                ])
+        
+        wb.save(target)
+    
+    @staticmethod
+    def _iter_file(path: str) -> Iterator[bytes]:
+        """Read a temp file in chunks, removing it afterwards."""
+        try:
+            with open(path, "rb") as f:
+                while True:
+                    chunk = f.read(STREAM_FILE_CHUNK_BYTES)
+                    if not chunk:
+                        break
+                    yield chunk
+        finally:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
     
     def _export_docx(self, template: ExportTemplate, context: Dict) -> ExportResult:
         """Export as DOCX."""
@@ -884,7 +944,8 @@ def export_playbook_results(
     playbook_results: Dict,
     template: str,
     format: str = None,
-    context: Dict = None
+    context: Dict = None,
+    stream: bool = False
 ) -> ExportResult:
     """
     Convenience function to export playbook results.
@@ -894,6 +955,7 @@ def export_playbook_results(
         template: Template name (executive_summary, findings_report, etc.)
         format: Output format (pdf, docx, xlsx, csv, json, html)
         context: Additional context (project_name, client_name, etc.)
+        stream: Return CSV/XLSX as result.chunks (see ExportEngine.export)
     """
     engine = ExportEngine()
     
@@ -926,4 +988,4 @@ def export_playbook_results(
                 error=f"Unknown format: {format}. Available: {[f.value for f in ExportFormat]}"
             )
     
-    return engine.export(playbook_results, template_enum, format_enum, context)
+    return engine.export(playbook_results, template_enum, format_enum, context, stream)
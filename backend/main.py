@@ -10,379 +10,37 @@ Updated: December 17, 2025 - Replaced vacuum with register_extractor (local LLM
 Updated: December 23, 2025 - Added smart_router (unified upload endpoint)
 Updated: December 23, 2025 - Added metrics_router (platform analytics)
 Updated: December 27, 2025 - Added classification_router (FIVE TRUTHS transparency layer)
+Updated: October 18, 2026 - Routers registered via RouterLoader (XLR8_FAST_START lazy loading, /api/debug/startup)
+Updated: October 19, 2026 - Per-request tracing (TracingMiddleware, /api/admin/traces)
 """
 
-from fastapi import FastAPI
+from fastapi import FastAPI, APIRouter
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 from pathlib import Path
 import sys
+import time
 import logging
 
+_STARTED_AT = time.perf_counter()
+
 sys.path.insert(0, '/app')
 sys.path.insert(0, '/data')
 
-from backend.routers import upload, jobs
-
-# Import customers router (replaces projects - customers is the primary, projects is backward compat)
-try:
-    from backend.routers import customers
-    CUSTOMERS_AVAILABLE = True
-except ImportError as e:
-    CUSTOMERS_AVAILABLE = False
-    logging.warning(f"Customers router import failed: {e}")
-
-# Import playbooks router
-try:
-    from backend.routers import playbooks
-    PLAYBOOKS_AVAILABLE = True
-except ImportError as e:
-    PLAYBOOKS_AVAILABLE = False
-    logging.error(f"Playbooks router import failed: {e}")
-
-# Import playbook_builder router
-try:
-    from backend.routers import playbook_builder
-    PLAYBOOK_BUILDER_AVAILABLE = True
-except ImportError as e:
-    PLAYBOOK_BUILDER_AVAILABLE = False
-    logging.warning(f"Playbook builder router import failed: {e}")
-
-# Import advisor router (Work Advisor - conversational guide)
-try:
-    from backend.routers import advisor_router
-    ADVISOR_AVAILABLE = True
-except ImportError as e:
-    ADVISOR_AVAILABLE = False
-    logging.warning(f"Advisor router import failed: {e}")
-
-# Import register_extractor router (formerly vacuum - includes backward compat routes)
-try:
-    from backend.routers import register_extractor
-    REGISTER_EXTRACTOR_AVAILABLE = True
-except ImportError:
-    REGISTER_EXTRACTOR_AVAILABLE = False
-    logging.warning("Register extractor router import failed")
-
-# Import progress router (SSE streaming)
-try:
-    from backend.routers import progress
-    PROGRESS_AVAILABLE = True
-except ImportError:
-    PROGRESS_AVAILABLE = False
-
-# Import security router (threat monitoring)
-try:
-    from backend.routers import security
-    SECURITY_AVAILABLE = True
-except ImportError as e:
-    SECURITY_AVAILABLE = False
-    logging.warning(f"Security router import failed: {e}")
-
-# Import auth router (user management, RBAC)
-try:
-    from backend.routers import auth
-    AUTH_AVAILABLE = True
-except ImportError as e:
-    AUTH_AVAILABLE = False
-    logging.warning(f"Auth router import failed: {e}")
-
-# Import data_model router (relationship detection)
-try:
-    from backend.routers import data_model
-    DATA_MODEL_AVAILABLE = True
-except ImportError as e:
-    DATA_MODEL_AVAILABLE = False
-    logging.warning(f"Data model router import failed: {e}")
-
-# Import admin router (learning system management)
-try:
-    from backend.routers import admin
-    ADMIN_AVAILABLE = True
-except ImportError as e:
-    ADMIN_AVAILABLE = False
-    logging.warning(f"Admin router import failed: {e}")
-
-# Import api_connections router (UKG Pro/WFM/Ready integration)
-try:
-    from backend.routers import api_connections
-    API_CONNECTIONS_AVAILABLE = True
-except ImportError as e:
-    API_CONNECTIONS_AVAILABLE = False
-    logging.warning(f"API connections router import failed: {e}")
-
-# Import intelligence router (Phase 3 Universal Analysis Engine)
-try:
-    from backend.routers import intelligence
-    INTELLIGENCE_AVAILABLE = True
-except ImportError as e:
-    INTELLIGENCE_AVAILABLE = False
-    logging.warning(f"Intelligence router import failed: {e}")
-
-# Import unified_chat router (Phase 3.5 Intelligence Consumer)
-try:
-    from backend.routers import unified_chat
-    UNIFIED_CHAT_AVAILABLE = True
-except ImportError as e:
-    UNIFIED_CHAT_AVAILABLE = False
-    logging.warning(f"Unified chat router import failed: {e}")
-
-# Import bi_router (Phase 5 BI Builder)
-try:
-    from backend.routers import bi_router
-    BI_ROUTER_AVAILABLE = True
-except ImportError as e:
-    BI_ROUTER_AVAILABLE = False
-    logging.warning(f"BI router import failed: {e}")
-
-# Import cleanup router (data deletion endpoints)
-try:
-    from backend.routers import cleanup
-    CLEANUP_AVAILABLE = True
-except ImportError as e:
-    CLEANUP_AVAILABLE = False
-    logging.warning(f"Cleanup router import failed: {e}")
-
-# Import deep_clean router (unified orphan cleanup across all storage systems)
-try:
-    from backend.routers import deep_clean
-    DEEP_CLEAN_AVAILABLE = True
-except ImportError as e:
-    DEEP_CLEAN_AVAILABLE = False
-    logging.warning(f"Deep clean router import failed: {e}")
-
-# Import health router (comprehensive system diagnostics)
-try:
-    from backend.routers import health
-    HEALTH_AVAILABLE = True
-except ImportError as e:
-    HEALTH_AVAILABLE = False
-    logging.warning(f"Health router import failed: {e}")
-
-# Import smart_router (unified upload endpoint - replaces fragmented upload paths)
-try:
-    from backend.routers import smart_router
-    SMART_ROUTER_AVAILABLE = True
-except ImportError as e:
-    SMART_ROUTER_AVAILABLE = False
-    logging.warning(f"Smart router import failed: {e}")
-
-# Import metrics router (platform analytics for dashboards)
-try:
-    from backend.routers import metrics_router
-    METRICS_AVAILABLE = True
-except ImportError as e:
-    METRICS_AVAILABLE = False
-    logging.warning(f"Metrics router import failed: {e}")
-
-# Import classification router (FIVE TRUTHS transparency layer)
-try:
-    from backend.routers import classification_router
-    CLASSIFICATION_AVAILABLE = True
-except ImportError as e:
-    CLASSIFICATION_AVAILABLE = False
-    logging.warning(f"Classification router import failed: {e}")
-
-# Import platform router (COMPREHENSIVE status endpoint - replaces 50+ scattered endpoints)
-try:
-    from backend.routers import platform
-    PLATFORM_AVAILABLE = True
-except ImportError as e:
-    PLATFORM_AVAILABLE = False
-    logging.warning(f"Platform router import failed: {e}")
-
-# Import features router (comparison and export engines)
-try:
-    from backend.routers import features
-    FEATURES_AVAILABLE = True
-except ImportError as e:
-    FEATURES_AVAILABLE = False
-    logging.warning(f"Features router import failed: {e}")
-
-# Import domain decoder router (consultant knowledge)
-try:
-    from backend.routers import decoder_router
-    DECODER_AVAILABLE = True
-except ImportError as e:
-    DECODER_AVAILABLE = False
-    logging.warning(f"Decoder router import failed: {e}")
-
-# Import reference truth router (systems, domains, detection)
-try:
-    from backend.routers import reference
-    REFERENCE_AVAILABLE = True
-except ImportError as e:
-    REFERENCE_AVAILABLE = False
-    logging.warning(f"Reference router import failed: {e}")
-
-# Import engines router (5 Universal Engines - Phase 5 Playbook Builder)
-try:
-    from backend.routers import engines_router
-    ENGINES_ROUTER_AVAILABLE = True
-except ImportError as e:
-    ENGINES_ROUTER_AVAILABLE = False
-    logging.warning(f"Engines router import failed: {e}")
-
-# Import integrations router (API connections - UKG Pro, Workday, etc.)
-try:
-    from backend.routers import integrations_router
-    INTEGRATIONS_AVAILABLE = True
-except ImportError as e:
-    INTEGRATIONS_AVAILABLE = False
-    logging.warning(f"Integrations router import failed: {e}")
-
-# Import UKG connector router (direct UKG Pro API access)
-try:
-    from backend.routers.ukg_connector import router as ukg_connector_router
-    UKG_CONNECTOR_AVAILABLE = True
-except ImportError as e:
-    UKG_CONNECTOR_AVAILABLE = False
-    logging.warning(f"UKG connector router import failed: {e}")
-
-# Import playbook framework router (unified playbook system - January 2026)
-try:
-    from backend.routers import playbook_framework_router
-    PLAYBOOK_FRAMEWORK_AVAILABLE = True
-except ImportError as e:
-    PLAYBOOK_FRAMEWORK_AVAILABLE = False
-    logging.warning(f"Playbook framework router import failed: {e}")
-
-try:
-    from backend.routers import dashboard
-    DASHBOARD_AVAILABLE = True
-except ImportError as e:
-    DASHBOARD_AVAILABLE = False
-    logging.warning(f"Dashboard router import failed: {e}")
-
-# Standards endpoints are now in upload.py (no separate router needed)
+from backend.utils.router_loader import RouterLoader, RouterSpec, LazyRouterMiddleware
+from utils.tracing import TracingMiddleware
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="XLR8", version="2.0")
-
-# CORS Configuration - Allow all origins for now
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=False,  # Must be False when using wildcard
-    allow_methods=["*"],
-    allow_headers=["*"],
-    expose_headers=["*"],
-)
 
 # =============================================================================
-# STARTUP: Load playbooks from Supabase
+# FALLBACK ROUTERS (used when the real router fails to import)
 # =============================================================================
 
-@app.on_event("startup")
-async def startup_event():
-    """Startup tasks: cleanup stuck jobs, load playbooks."""
-    
-    # CRITICAL: Clean up any jobs stuck from previous runs/crashes
-    try:
-        from models.processing_job import ProcessingJobModel
-        cancelled = ProcessingJobModel.cancel_stuck(max_age_minutes=15)
-        if cancelled > 0:
-            logger.warning(f"[STARTUP] Cancelled {cancelled} stuck jobs from previous run")
-        else:
-            logger.info("[STARTUP] No stuck jobs to clean up")
-    except ImportError:
-        try:
-            from utils.database.models import ProcessingJobModel
-            cancelled = ProcessingJobModel.cancel_stuck(max_age_minutes=15)
-            if cancelled > 0:
-                logger.warning(f"[STARTUP] Cancelled {cancelled} stuck jobs from previous run")
-            else:
-                logger.info("[STARTUP] No stuck jobs to clean up")
-        except Exception as e:
-            logger.warning(f"[STARTUP] Could not clean stuck jobs: {e}")
-    except Exception as e:
-        logger.warning(f"[STARTUP] Could not clean stuck jobs: {e}")
-    
-    # Load playbooks from Supabase
-    try:
-        from utils.playbook_loader import load_playbooks_from_supabase
-        results = load_playbooks_from_supabase()
-        logger.info(f"Loaded {sum(results.values())}/{len(results)} playbooks from Supabase")
-    except ImportError:
-        try:
-            from backend.utils.playbook_loader import load_playbooks_from_supabase
-            results = load_playbooks_from_supabase()
-            logger.info(f"Loaded {sum(results.values())}/{len(results)} playbooks from Supabase")
-        except ImportError:
-            logger.warning("Playbook loader not available - using code-defined playbooks only")
-
-
-# Register core routers
-app.include_router(upload.router, prefix="/api")
-
-# Customers router - PRIMARY (replaces projects)
-if CUSTOMERS_AVAILABLE:
-    app.include_router(customers.router, prefix="/api/customers")
-    logger.info("Customers router registered at /api/customers")
-
-# Projects router removed - use /api/customers
-
-app.include_router(jobs.router, prefix="/api")
-
-# Register cleanup router if available (data deletion endpoints)
-if CLEANUP_AVAILABLE:
-    app.include_router(cleanup.router, prefix="/api", tags=["cleanup"])
-    logger.info("Cleanup router registered at /api (jobs, structured, documents deletion)")
-else:
-    logger.warning("Cleanup router not available")
-
-# Register deep_clean router if available (unified orphan cleanup)
-if DEEP_CLEAN_AVAILABLE:
-    app.include_router(deep_clean.router, prefix="/api", tags=["deep-clean"])
-    logger.info("Deep clean router registered at /api/deep-clean")
-else:
-    logger.warning("Deep clean router not available")
-
-# Register register_extractor router if available (pay register extraction + DuckDB storage)
-if REGISTER_EXTRACTOR_AVAILABLE:
-    app.include_router(register_extractor.router, prefix="/api", tags=["register-extractor"])
-    logger.info("Register extractor router registered (includes /vacuum backward compat)")
-else:
-    logger.warning("Register extractor router not available")
-
-# Register playbooks router if available
-if PLAYBOOKS_AVAILABLE:
-    app.include_router(playbooks.router, prefix="/api/playbooks")
-    logger.info("Playbooks router registered at /api/playbooks")
-else:
-    logger.warning("Playbooks router not available")
-
-# Register playbook_builder router if available
-if PLAYBOOK_BUILDER_AVAILABLE:
-    app.include_router(playbook_builder.router, prefix="/api", tags=["playbook-builder"])
-    logger.info("Playbook builder router registered at /api/playbook-builder")
-else:
-    logger.warning("Playbook builder router not available")
-
-# Register advisor router if available (Work Advisor - conversational guide)
-if ADVISOR_AVAILABLE:
-    app.include_router(advisor_router.router, prefix="/api/advisor", tags=["advisor"])
-    logger.info("Advisor router registered at /api/advisor")
-else:
-    logger.warning("Advisor router not available")
-
-# Register progress router if available (SSE streaming)
-if PROGRESS_AVAILABLE:
-    app.include_router(progress.router, prefix="/api", tags=["progress"])
-    logger.info("Progress router registered (SSE streaming enabled)")
-else:
-    logger.warning("Progress router not available")
-
-# Register security router if available (threat monitoring)
-if SECURITY_AVAILABLE:
-    app.include_router(security.router, prefix="/api/security", tags=["security"])
-    logger.info("Security router registered at /api/security")
-else:
-    # Create inline fallback security endpoints
-    from fastapi import APIRouter
+def _security_fallback_router() -> APIRouter:
+    """Inline security endpoints when the full security module is not available."""
     security_fallback = APIRouter(tags=["security"])
     
     @security_fallback.get("/threats")
@@ -433,179 +91,207 @@ else:
                     "total_components": 7,
                     "last_scan": None,
                 }
+    return security_fallback
+
+
+def _health_fallback_router() -> APIRouter:
+    """Minimal health endpoint when the full health router is not available."""
+    health_fallback = APIRouter(tags=["health"])
     
-    app.include_router(security_fallback, prefix="/api/security")
-    logger.info("Security fallback endpoints registered (using threat_assessor directly)")
-
-# Register auth router if available (user management, RBAC)
-if AUTH_AVAILABLE:
-    app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
-    logger.info("Auth router registered at /api/auth")
-else:
-    logger.warning("Auth router not available")
-
-# Register data_model router if available (relationship detection)
-if DATA_MODEL_AVAILABLE:
-    app.include_router(data_model.router, prefix="/api", tags=["data-model"])
-    logger.info("Data model router registered at /api/data-model")
-else:
-    logger.warning("Data model router not available")
-
-# Register admin router if available (learning system management)
-if ADMIN_AVAILABLE:
-    app.include_router(admin.router, prefix="/api/admin", tags=["admin"])
-    logger.info("Admin router registered at /api/admin")
-else:
-    logger.warning("Admin router not available")
-
-# Register api_connections router if available (UKG Pro/WFM/Ready integration)
-if API_CONNECTIONS_AVAILABLE:
-    app.include_router(api_connections.router, prefix="/api", tags=["connections"])
-    logger.info("API connections router registered at /api/connections")
-else:
-    logger.warning("API connections router not available")
-
-# Register intelligence router if available (Phase 3 Universal Analysis Engine)
-if INTELLIGENCE_AVAILABLE:
-    app.include_router(intelligence.router, prefix="/api/intelligence", tags=["intelligence"])
-    logger.info("Intelligence router registered at /api/intelligence")
-else:
-    logger.warning("Intelligence router not available")
-
-# Register unified_chat router if available (Phase 3.5 Intelligence Consumer)
-if UNIFIED_CHAT_AVAILABLE:
-    app.include_router(unified_chat.router, prefix="/api", tags=["unified-chat"])
-    logger.info("Unified chat router registered at /api/chat/unified")
-else:
-    logger.warning("Unified chat router not available")
-
-# Register bi_router if available (Phase 5 BI Builder)
-if BI_ROUTER_AVAILABLE:
-    app.include_router(bi_router.router, prefix="/api", tags=["bi"])
-    logger.info("BI router registered at /api/bi")
-else:
-    logger.warning("BI router not available")
-
-# Register health router if available (comprehensive system diagnostics)
-if HEALTH_AVAILABLE:
-    app.include_router(health.router, prefix="/api", tags=["health"])
-    logger.info("Health router registered at /api/health")
-else:
-    logger.warning("Health router not available - using fallback")
-    
-    # Fallback minimal health endpoint if router not available
-    @app.get("/api/health")
-    async def health_fallback():
+    @health_fallback.get("/health")
+    async def health_fallback_endpoint():
         """Minimal health check fallback."""
         return {"status": "healthy", "note": "Full health router not loaded"}
+    
+    return health_fallback
+
 
-# Register smart_router if available (unified upload endpoint)
-if SMART_ROUTER_AVAILABLE:
-    app.include_router(smart_router.router, prefix="/api", tags=["smart-router"])
-    logger.info("Smart router registered at /api/upload (unified endpoint)")
-else:
-    logger.warning("Smart router not available - using legacy upload.py")
-
-# Register metrics router if available (platform analytics)
-if METRICS_AVAILABLE:
-    app.include_router(metrics_router.router, prefix="/api/metrics", tags=["metrics"])
-    logger.info("Metrics router registered at /api/metrics")
-else:
-    logger.warning("Metrics router not available")
-
-# Register classification router if available (FIVE TRUTHS transparency)
-if CLASSIFICATION_AVAILABLE:
-    app.include_router(classification_router.router, prefix="/api", tags=["classification"])
-    logger.info("Classification router registered at /api/classification")
-else:
-    logger.warning("Classification router not available")
-
-# Register platform router if available (COMPREHENSIVE status - ONE endpoint for everything)
-if PLATFORM_AVAILABLE:
-    app.include_router(platform.router, prefix="/api", tags=["platform"])
-    logger.info("Platform router registered at /api/platform - USE THIS INSTEAD OF 50+ STATUS ENDPOINTS")
-else:
-    logger.warning("Platform router not available")
-
-# Register features router if available (comparison and export engines)
-if FEATURES_AVAILABLE:
-    app.include_router(features.router, prefix="/api", tags=["features"])
-    logger.info("Features router registered at /api (compare, export)")
-else:
-    logger.warning("Features router not available")
-
-# Register domain decoder router if available (consultant knowledge)
-if DECODER_AVAILABLE:
-    app.include_router(decoder_router.router, prefix="/api/decoder", tags=["domain-decoder"])
-    logger.info("Domain Decoder router registered at /api/decoder")
-else:
-    logger.warning("Domain Decoder router not available")
-
-# Register reference truth router if available (systems, domains, detection)
-if REFERENCE_AVAILABLE:
-    app.include_router(reference.router, prefix="/api/reference", tags=["reference"])
-    logger.info("Reference Truth router registered at /api/reference")
-else:
-    logger.warning("Reference Truth router not available")
-
-# Register engines router if available (5 Universal Engines)
-if ENGINES_ROUTER_AVAILABLE:
-    app.include_router(engines_router.router, prefix="/api/engines", tags=["engines"])
-    logger.info("Engines router registered at /api/engines")
-else:
-    logger.warning("Engines router not available")
-
-# Register integrations router if available (API connections)
-if INTEGRATIONS_AVAILABLE:
-    app.include_router(integrations_router.router, prefix="/api/integrations", tags=["integrations"])
-    logger.info("Integrations router registered at /api/integrations")
-else:
-    logger.warning("Integrations router not available")
-
-# Register UKG connector router if available (direct UKG Pro API access)
-if UKG_CONNECTOR_AVAILABLE:
-    app.include_router(ukg_connector_router, prefix="/api", tags=["ukg-connector"])
-    logger.info("UKG connector router registered at /api/ukg")
-else:
-    logger.warning("UKG connector router not available")
-
-# Register playbook framework router if available (unified playbook system)
-if PLAYBOOK_FRAMEWORK_AVAILABLE:
-    app.include_router(playbook_framework_router.router, tags=["playbook-framework"])
-    logger.info("Playbook framework router registered at /api/playbooks")
-else:
-    logger.warning("Playbook framework router not available")
-
-# Register dashboard router if available (real metrics, lineage, relationships)
-if DASHBOARD_AVAILABLE:
-    app.include_router(dashboard.router, tags=["dashboard"])
-    logger.info("Dashboard router registered at /api/dashboard")
-else:
-    logger.warning("Dashboard router not available")
-
-# Register findings router (Phase 4A.4 - Findings Dashboard)
-try:
-    from backend.routers import findings
-    app.include_router(findings.router, prefix="/api/findings", tags=["findings"])
-    logger.info("Findings router registered at /api/findings")
-except ImportError as e:
-    logger.warning(f"Findings router import failed: {e}")
-
-# Register remediation router (Phase 4A.6/4A.7 - Playbook Wire-up & Progress Tracker)
-try:
-    from backend.routers import remediation
-    app.include_router(remediation.router, prefix="/api/remediation", tags=["remediation"])
-    logger.info("Remediation router registered at /api/remediation")
-except ImportError as e:
-    logger.warning(f"Remediation router import failed: {e}")
-
-# Register ChromaDB repair router (fix customer_id metadata)
-try:
-    from backend.routers import repair_chromadb
-    app.include_router(repair_chromadb.router, tags=["repair"])
-    logger.info("ChromaDB repair router registered at /api/repair")
-except ImportError as e:
-    logger.warning(f"ChromaDB repair router import failed: {e}")
+# =============================================================================
+# ROUTERS
+# =============================================================================
+# Registration order is route precedence (upload before smart_router for
+# /api/upload, playbooks before playbook_framework for /api/playbooks).
+# paths = request prefixes each router serves; with XLR8_FAST_START=true a
+# router is imported on the first request under one of them (or by the
+# warm-up thread) instead of at module load. See utils/router_loader.py.
+# Standards endpoints are now in upload.py (no separate router needed).
+# Projects router removed - use /api/customers.
+
+ROUTER_SPECS = [
+    # Core upload + standards endpoints
+    RouterSpec("upload", "backend.routers.upload", ["/api/upload", "/api/standards"], prefix="/api", description="Upload", required=True),
+    # Customers - PRIMARY (replaces projects)
+    RouterSpec("customers", "backend.routers.customers", ["/api/customers"], prefix="/api/customers", description="Customers"),
+    RouterSpec("jobs", "backend.routers.jobs", ["/api/jobs"], prefix="/api", description="Jobs", required=True),
+    # Data deletion endpoints
+    RouterSpec("cleanup", "backend.routers.cleanup", ["/api/jobs", "/api/status"], prefix="/api", tags=["cleanup"], description="Cleanup"),
+    # Unified orphan cleanup across all storage systems
+    RouterSpec("deep_clean", "backend.routers.deep_clean", ["/api/deep-clean"], prefix="/api", tags=["deep-clean"], description="Deep clean"),
+    # Pay register extraction + DuckDB storage (includes /vacuum backward compat)
+    RouterSpec("register_extractor", "backend.routers.register_extractor", ["/api/register", "/api/vacuum"], prefix="/api", tags=["register-extractor"], description="Register extractor"),
+    RouterSpec("playbooks", "backend.routers.playbooks", ["/api/playbooks"], prefix="/api/playbooks", description="Playbooks"),
+    # P3.6 P3
+    RouterSpec("playbook_builder", "backend.routers.playbook_builder", ["/api/playbook-builder"], prefix="/api", tags=["playbook-builder"], description="Playbook builder"),
+    # Work Advisor - conversational guide
+    RouterSpec("advisor", "backend.routers.advisor_router", ["/api/advisor"], prefix="/api/advisor", tags=["advisor"], description="Advisor"),
+    # SSE streaming
+    RouterSpec("progress", "backend.routers.progress", ["/api/progress"], prefix="/api", tags=["progress"], description="Progress"),
+    # Threat monitoring (inline fallback uses threat_assessor directly)
+    RouterSpec("security", "backend.routers.security", ["/api/security"], prefix="/api/security", tags=["security"], description="Security", fallback=_security_fallback_router),
+    # User management, RBAC
+    RouterSpec("auth", "backend.routers.auth", ["/api/auth"], prefix="/api/auth", tags=["auth"], description="Auth"),
+    # Relationship detection
+    RouterSpec("data_model", "backend.routers.data_model", ["/api/data-model"], prefix="/api", tags=["data-model"], description="Data model"),
+    # Learning system management
+    RouterSpec("admin", "backend.routers.admin", ["/api/admin"], prefix="/api/admin", tags=["admin"], description="Admin"),
+    # UKG Pro/WFM/Ready integration
+    RouterSpec("api_connections", "backend.routers.api_connections", ["/api/connections"], prefix="/api", tags=["connections"], description="API connections"),
+    # Phase 3 Universal Analysis Engine
+    RouterSpec("intelligence", "backend.routers.intelligence", ["/api/intelligence"], prefix="/api/intelligence", tags=["intelligence"], description="Intelligence"),
+    # Phase 3.5 Intelligence Consumer
+    RouterSpec("unified_chat", "backend.routers.unified_chat", ["/api/chat"], prefix="/api", tags=["unified-chat"], description="Unified chat"),
+    # Phase 5 BI Builder
+    RouterSpec("bi", "backend.routers.bi_router", ["/api/bi"], prefix="/api", tags=["bi"], description="BI"),
+    # Comprehensive system diagnostics
+    RouterSpec("health", "backend.routers.health", ["/api/health"], prefix="/api", tags=["health"], description="Health", fallback=_health_fallback_router),
+    # Unified upload endpoint - replaces fragmented upload paths
+    RouterSpec("smart_router", "backend.routers.smart_router", ["/api/upload", "/api/standards", "/api/register", "/api/vacuum"], prefix="/api", tags=["smart-router"], description="Smart router"),
+    # Platform analytics for dashboards
+    RouterSpec("metrics", "backend.routers.metrics_router", ["/api/metrics"], prefix="/api/metrics", tags=["metrics"], description="Metrics"),
+    # FIVE TRUTHS transparency layer
+    RouterSpec("classification", "backend.routers.classification_router", ["/api/classification", "/api/custom-domains"], prefix="/api", tags=["classification"], description="Classification"),
+    # COMPREHENSIVE status endpoint - replaces 50+ scattered endpoints
+    RouterSpec("platform", "backend.routers.platform", ["/api/platform", "/api/status"], prefix="/api", tags=["platform"], description="Platform"),
+    # Comparison and export engines
+    RouterSpec("features", "backend.routers.features", ["/api/compare", "/api/export"], prefix="/api", tags=["features"], description="Features"),
+    # Consultant knowledge
+    RouterSpec("decoder", "backend.routers.decoder_router", ["/api/decoder"], prefix="/api/decoder", tags=["domain-decoder"], description="Domain Decoder"),
+    # Systems, domains, detection
+    RouterSpec("reference", "backend.routers.reference", ["/api/reference"], prefix="/api/reference", tags=["reference"], description="Reference Truth"),
+    # 5 Universal Engines - Phase 5 Playbook Builder
+    RouterSpec("engines", "backend.routers.engines_router", ["/api/engines"], prefix="/api/engines", tags=["engines"], description="Engines"),
+    # API connections - UKG Pro, Workday, etc.
+    RouterSpec("integrations", "backend.routers.integrations_router", ["/api/integrations"], prefix="/api/integrations", tags=["integrations"], description="Integrations"),
+    # Direct UKG Pro API access
+    RouterSpec("ukg_connector", "backend.routers.ukg_connector", ["/api/ukg"], prefix="/api", tags=["ukg-connector"], description="UKG connector"),
+    # Unified playbook system - January 2026
+    RouterSpec("playbook_framework", "backend.routers.playbook_framework_router", ["/api/playbooks"], tags=["playbook-framework"], description="Playbook framework"),
+    # Real metrics, lineage, relationships
+    RouterSpec("dashboard", "backend.routers.dashboard", ["/api/dashboard"], tags=["dashboard"], description="Dashboard"),
+    # Phase 4A.4 - Findings Dashboard
+    RouterSpec("findings", "backend.routers.findings", ["/api/findings"], prefix="/api/findings", tags=["findings"], description="Findings"),
+    # Phase 4A.6/4A.7 - Playbook Wire-up & Progress Tracker
+    RouterSpec("remediation", "backend.routers.remediation", ["/api/remediation"], prefix="/api/remediation", tags=["remediation"], description="Remediation"),
+    # Fix customer_id metadata
+    RouterSpec("repair_chromadb", "backend.routers.repair_chromadb", ["/api/repair"], tags=["repair"], description="ChromaDB repair"),
+]
+
+app = FastAPI(title="XLR8", version="2.0")
+
+# CORS Configuration - Allow all origins for now
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_credentials=False,  # Must be False when using wildcard
+    allow_methods=["*"],
+    allow_headers=["*"],
+    expose_headers=["*"],
+)
+
+router_loader = RouterLoader(app, ROUTER_SPECS, started_at=_STARTED_AT)
+if router_loader.fast_start:
+    app.add_middleware(LazyRouterMiddleware, loader=router_loader)
+router_loader.register_all()
+
+# One trace per /api request (X-Trace-Id header, GET /api/admin/traces). Added
+# last so it is outermost and lazy router imports count toward the request.
+app.add_middleware(TracingMiddleware)
+
+# =============================================================================
+# STARTUP: Load playbooks from Supabase
+# =============================================================================
+
+def _run_startup_tasks():
+    """Startup tasks: cleanup stuck jobs, load playbooks, replay spilled metrics."""
+    
+    # CRITICAL: Clean up any jobs stuck from previous runs/crashes
+    try:
+        from models.processing_job import ProcessingJobModel
+        cancelled = ProcessingJobModel.cancel_stuck(max_age_minutes=15)
+        if cancelled > 0:
+            logger.warning(f"[STARTUP] Cancelled {cancelled} stuck jobs from previous run")
+        else:
+            logger.info("[STARTUP] No stuck jobs to clean up")
+    except ImportError:
+        try:
+            from utils.database.models import ProcessingJobModel
+            cancelled = ProcessingJobModel.cancel_stuck(max_age_minutes=15)
+            if cancelled > 0:
+                logger.warning(f"[STARTUP] Cancelled {cancelled} stuck jobs from previous run")
+            else:
+                logger.info("[STARTUP] No stuck jobs to clean up")
+        except Exception as e:
+            logger.warning(f"[STARTUP] Could not clean stuck jobs: {e}")
+    except Exception as e:
+        logger.warning(f"[STARTUP] Could not clean stuck jobs: {e}")
+    
+    # Load playbooks from Supabase
+    try:
+        from utils.playbook_loader import load_playbooks_from_supabase
+        results = load_playbooks_from_supabase()
+        logger.info(f"Loaded {sum(results.values())}/{len(results)} playbooks from Supabase")
+    except ImportError:
+        try:
+            from backend.utils.playbook_loader import load_playbooks_from_supabase
+            results = load_playbooks_from_supabase()
+            logger.info(f"Loaded {sum(results.values())}/{len(results)} playbooks from Supabase")
+        except ImportError:
+            logger.warning("Playbook loader not available - using code-defined playbooks only")
+    
+    # Replay platform metrics spilled by the previous run
+    try:
+        from backend.utils.metrics_service import MetricsService
+        if MetricsService.start():
+            logger.info("[STARTUP] Metrics writer started")
+    except Exception as e:
+        logger.warning(f"[STARTUP] Metrics writer not started: {e}")
+    
+    # DuckDB checkpoints, statistics, orphan cleanup and compaction in idle windows
+    try:
+        from utils.duckdb_maintenance import ENABLED as MAINTENANCE_ENABLED, get_maintenance
+        from utils.structured_data_handler import get_structured_handler
+        if MAINTENANCE_ENABLED:
+            get_maintenance(get_structured_handler()).start()
+    except Exception as e:
+        logger.warning(f"[STARTUP] DuckDB maintenance not started: {e}")
+
+
+@app.on_event("startup")
+async def startup_event():
+    """Run startup tasks - in fast-start mode, in the background warm-up after the server is up."""
+    if router_loader.fast_start:
+        router_loader.start_warmup(before=_run_startup_tasks)
+    else:
+        _run_startup_tasks()
+    router_loader.mark_ready()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Shutdown tasks: flush buffered platform metrics, serve pending DuckDB checkpoints."""
+    try:
+        from backend.utils.metrics_service import MetricsService
+        stats = MetricsService.flush()
+        if stats:
+            logger.info(f"[SHUTDOWN] Metrics flushed: {stats}")
+    except Exception as e:
+        logger.warning(f"[SHUTDOWN] Could not flush metrics: {e}")
+    
+    try:
+        from utils.duckdb_maintenance import stop_all
+        stop_all()
+    except Exception as e:
+        logger.warning(f"[SHUTDOWN] Could not stop DuckDB maintenance: {e}")
 
 
 @app.get("/api/debug/imports")
@@ -658,7 +344,14 @@ async def debug_imports():
     return results
 
 
+@app.get("/api/debug/startup")
+async def debug_startup():
+    """Startup report: mode, time to ready, per-router import time and RSS growth."""
+    return router_loader.report()
+
+
 # Serve static files in production
+_tail_start = len(app.router.routes)
 static_path = Path("/app/static")
 if static_path.exists():
     app.mount("/assets", StaticFiles(directory=static_path / "assets"), name="assets")
@@ -675,6 +368,9 @@ if static_path.exists():
             return FileResponse(index_path)
         return {"error": "Frontend not built"}
 
+# Lazily loaded API routes must still match before the SPA catch-all
+router_loader.mark_tail(app.router.routes[_tail_start:])
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -8,6 +8,7 @@ Endpoints for viewing and managing:
 - Clarification patterns
 - Feedback history
 - Global column mappings
+- Request traces (span timings per request)
 
 Deploy to: backend/routers/admin.py
 
@@ -484,12 +485,8 @@ async def delete_reference(filename: str, confirm: bool = False, user: User = De
         
         # 3. Delete lineage edges
         try:
-            result = supabase.table('lineage_edges') \
-                .delete() \
-                .eq('source_id', filename) \
-                .eq('source_type', 'file') \
-                .execute()
-            deleted['lineage'] = len(result.data or [])
+            from utils.database.models import LineageModel
+            deleted['lineage'] = LineageModel.delete_for_source('file', filename)
         except Exception as e:
             logger.warning(f"[ADMIN] Lineage delete failed: {e}")
         
@@ -579,13 +576,9 @@ async def clear_all_references(confirm: bool = False, user: User = Depends(requi
         
         # 4. Delete lineage for these files
         try:
+            from utils.database.models import LineageModel
             for filename in filenames:
-                result = supabase.table('lineage_edges') \
-                    .delete() \
-                    .eq('source_id', filename) \
-                    .eq('source_type', 'file') \
-                    .execute()
-                deleted['lineage'] += len(result.data or [])
+                deleted['lineage'] += LineageModel.delete_for_source('file', filename)
         except Exception as e:
             logger.warning(f"[ADMIN] Lineage clear failed: {e}")
         
@@ -1361,3 +1354,50 @@ async def add_lookup_mapping(
     learning.sync_term_mappings_to_duckdb(handler.conn, project_id)
     
     return {"success": True, "mapping": mapping}
+
+
+# =============================================================================
+# REQUEST TRACES
+# =============================================================================
+# Spans recorded per request by utils/tracing.py (in-memory ring buffer).
+
+@router.get("/traces")
+async def list_traces(limit: int = 50, name: Optional[str] = None, min_ms: Optional[float] = None,
+                      errors_only: bool = False, user: User = Depends(require_permission(Permissions.OPS_CENTER))):
+    """Recent traces, newest first, each with its five costliest span names by self time."""
+    from utils.tracing import get_tracer
+    
+    tracer = get_tracer()
+    return {
+        "stats": tracer.stats(),
+        "traces": tracer.traces(limit=limit, name=name, min_duration_ms=min_ms, errors_only=errors_only),
+    }
+
+
+@router.get("/traces/summary")
+async def get_trace_summary(name: Optional[str] = None, user: User = Depends(require_permission(Permissions.OPS_CENTER))):
+    """Per span name count, total/self time and p50/p95/max over the buffered traces."""
+    from utils.tracing import get_tracer
+    
+    tracer = get_tracer()
+    return {"stats": tracer.stats(), "spans": tracer.span_summary(name=name)}
+
+
+@router.get("/traces/{trace_id}")
+async def get_trace(trace_id: str, user: User = Depends(require_permission(Permissions.OPS_CENTER))):
+    """One trace with its full span tree (X-Trace-Id response header of the request)."""
+    from utils.tracing import get_tracer
+    
+    found = get_tracer().get(trace_id)
+    if found is None:
+        raise HTTPException(404, f"Trace {trace_id} not in the buffer (expired or not sampled)")
+    return found
+
+
+@router.delete("/traces")
+async def clear_traces(user: User = Depends(require_permission(Permissions.OPS_CENTER))):
+    """Empty the trace buffer."""
+    from utils.tracing import get_tracer
+    
+    get_tracer().clear()
+    return {"success": True}
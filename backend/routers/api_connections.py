@@ -9,7 +9,7 @@ Endpoints:
 - DELETE /api/connections/{id} - Delete a connection
 - GET /api/connections/{id}/reports - List available reports
 - GET /api/connections/{id}/reports/{path}/parameters - Get report parameters
-- POST /api/connections/{id}/reports/execute - Execute a report
+- POST /api/connections/{id}/reports/execute - Execute a report (stream=true writes straight to DuckDB)
 
 Deploy to: backend/routers/api_connections.py
 
@@ -72,6 +72,7 @@ class ReportExecuteRequest(BaseModel):
     report_path: str
     parameters: Dict[str, Any] = {}
     target_table: Optional[str] = None  # Table name to save results
+    stream: bool = False  # Stream rows straight into target_table (large reports)
 
 
 # =============================================================================
@@ -449,6 +450,9 @@ async def execute_report(connection_id: str, request: ReportExecuteRequest):
         
         execution_id = exec_record.data[0]['id'] if exec_record.data else None
         
+        if request.stream:
+            return await _execute_report_streaming(connection_id, conn_data, request, execution_id)
+        
         # Execute the report
         client = get_raas_client(conn_data)
         try:
@@ -502,22 +506,94 @@ async def execute_report(connection_id: str, request: ReportExecuteRequest):
         raise HTTPException(500, str(e))
 
 
-async def save_to_duckdb(customer_id: str, table_name: str, columns: List[str], data: List[Dict]) -> str:
+async def _execute_report_streaming(connection_id: str, conn_data: Dict,
+                                    request: ReportExecuteRequest, execution_id: Optional[str]) -> Dict:
     """
-    Save report data to DuckDB.
+    Execute a report streaming its rows straight into DuckDB.
     
-    Creates a new table with the report data, prefixed with 'pro_'.
+    For large reports (full history, multi-year pay) that would not fit in
+    memory as a parsed response. Progress is written to the execution record.
     """
     from utils.structured_data_handler import get_structured_handler
     
+    if not request.target_table:
+        raise HTTPException(400, "target_table is required for streaming execution")
+    
+    supabase = get_supabase()
     handler = get_structured_handler()
+    full_table_name = _report_table_name(conn_data['customer_id'], request.target_table)
+    last_update = [datetime.now()]
+    
+    def on_progress(rows_written: int, bytes_received: int):
+        # Throttled - one execution record update every 10s at most
+        if execution_id and (datetime.now() - last_update[0]).total_seconds() >= 10:
+            last_update[0] = datetime.now()
+            logger.info(f"[CONNECTIONS] {request.report_path}: {rows_written} rows, "
+                        f"{bytes_received / 1024 / 1024:.1f} MB")
+            supabase.table('raas_executions').update({'row_count': rows_written}).eq('id', execution_id).execute()
+    
+    client = get_raas_client(conn_data)
+    try:
+        result = await client.execute_report_to_duckdb(
+            request.report_path,
+            handler.conn,
+            full_table_name,
+            request.parameters,
+            progress_callback=on_progress,
+            lock=handler._db_lock,
+            project=conn_data['customer_id']
+        )
+    finally:
+        await client.close()
+    
+    if execution_id:
+        supabase.table('raas_executions').update({
+            'completed_at': datetime.now().isoformat(),
+            'status': 'completed' if result.success else 'failed',
+            'row_count': result.row_count,
+            'error_message': result.error
+        }).eq('id', execution_id).execute()
+    
+    if not result.success:
+        raise HTTPException(500, f"Report execution failed: {result.error}")
+    
+    with handler._db_lock:
+        preview_df = handler.conn.execute(f'SELECT * FROM "{full_table_name}" LIMIT 10').fetchdf()
     
+    return {
+        "success": True,
+        "connection_id": connection_id,
+        "report_path": request.report_path,
+        "row_count": result.row_count,
+        "columns": result.columns,
+        "execution_time_ms": result.execution_time_ms,
+        "saved_to_table": full_table_name,
+        "bytes_received": result.bytes_received,
+        "peak_buffer_bytes": result.peak_buffer_bytes,
+        "preview": preview_df.to_dict(orient='records')
+    }
+
+
+def _report_table_name(customer_id: str, table_name: str) -> str:
+    """DuckDB table name for report output: '{customer_id}_pro_{name}', sanitized."""
     # Ensure table name is prefixed and sanitized
     if not table_name.startswith('pro_'):
         table_name = f"pro_{table_name}"
     
     table_name = table_name.lower().replace(' ', '_').replace('-', '_')
-    full_table_name = f"{customer_id}_{table_name}"
+    return f"{customer_id}_{table_name}"
+
+
+async def save_to_duckdb(customer_id: str, table_name: str, columns: List[str], data: List[Dict]) -> str:
+    """
+    Save report data to DuckDB.
+    
+    Creates a new table with the report data, prefixed with 'pro_'.
+    """
+    from utils.structured_data_handler import get_structured_handler
+    
+    handler = get_structured_handler()
+    full_table_name = _report_table_name(customer_id, table_name)
     
     # Build CREATE TABLE statement
     col_defs = []
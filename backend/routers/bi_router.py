@@ -14,23 +14,25 @@ FEATURES:
 ENDPOINTS:
 - POST /api/bi/query - NL query → SQL → results + chart
 - GET /api/bi/suggestions/{project} - Smart query suggestions
-- POST /api/bi/export - Export with transforms
-- GET /api/bi/schema/{project} - Schema for project
+- POST /api/bi/export - Export with transforms (streamed; large exports as background jobs)
+- GET /api/bi/export/{export_id}[/download] - Export progress / background export file
+- GET /api/bi/schema/{project} - Schema for project (ETag / If-None-Match)
 - GET /api/bi/saved/{project} - Saved queries/reports
 
 Author: XLR8 Team
 Version: 1.0.0
 """
 
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
 from typing import Dict, List, Optional, Any
 import logging
+import hashlib
 import json
 import re
 import time
-import io
 
 logger = logging.getLogger(__name__)
 
@@ -115,6 +117,20 @@ RAG_AVAILABLE = True
 from utils.database.supabase_client import get_supabase
 SUPABASE_AVAILABLE = True
 
+from backend.utils.bi_transforms import (
+    apply_python_transforms, get_lookup_dictionaries, load_lookup_dictionaries,
+    project_table_prefixes,
+)
+from backend.utils.keyed_cache import get_keyed_cache
+from backend.utils.streaming_export import (
+    BACKGROUND_ROWS, CONTENT_TYPES, get_export, iter_csv, iter_xlsx, open_query_stream,
+    run_background_export, track_export, tracked_stream,
+)
+from utils.schema_catalog import get_schema_catalog
+
+# Customer name + document registry per project; dropped when uploads/jobs complete
+_schema_context_cache = get_keyed_cache('bi_schema_context', ttl=60, stale_ttl=300)
+
 
 # =============================================================================
 # REQUEST/RESPONSE MODELS
@@ -143,6 +159,7 @@ class BIExportRequest(BaseModel):
     transforms: Optional[List[TransformOperation]] = []
     format: str = "xlsx"  # xlsx, csv
     include_metadata: bool = True
+    background: Optional[bool] = None  # None: background job above XLR8_EXPORT_BACKGROUND_ROWS
 
 
 class SavedQueryRequest(BaseModel):
@@ -240,203 +257,72 @@ def recommend_chart_type(columns: List[str], data: List[Dict], sql: str) -> Dict
 # TRANSFORM ENGINE
 # =============================================================================
 
-# US State code → name mapping (for state_names transform)
-STATE_NAMES = {
-    'AL': 'Alabama', 'AK': 'Alaska', 'AZ': 'Arizona', 'AR': 'Arkansas',
-    'CA': 'California', 'CO': 'Colorado', 'CT': 'Connecticut', 'DE': 'Delaware',
-    'FL': 'Florida', 'GA': 'Georgia', 'HI': 'Hawaii', 'ID': 'Idaho',
-    'IL': 'Illinois', 'IN': 'Indiana', 'IA': 'Iowa', 'KS': 'Kansas',
-    'KY': 'Kentucky', 'LA': 'Louisiana', 'ME': 'Maine', 'MD': 'Maryland',
-    'MA': 'Massachusetts', 'MI': 'Michigan', 'MN': 'Minnesota', 'MS': 'Mississippi',
-    'MO': 'Missouri', 'MT': 'Montana', 'NE': 'Nebraska', 'NV': 'Nevada',
-    'NH': 'New Hampshire', 'NJ': 'New Jersey', 'NM': 'New Mexico', 'NY': 'New York',
-    'NC': 'North Carolina', 'ND': 'North Dakota', 'OH': 'Ohio', 'OK': 'Oklahoma',
-    'OR': 'Oregon', 'PA': 'Pennsylvania', 'RI': 'Rhode Island', 'SC': 'South Carolina',
-    'SD': 'South Dakota', 'TN': 'Tennessee', 'TX': 'Texas', 'UT': 'Utah',
-    'VT': 'Vermont', 'VA': 'Virginia', 'WA': 'Washington', 'WV': 'West Virginia',
-    'WI': 'Wisconsin', 'WY': 'Wyoming', 'DC': 'District of Columbia'
-}
-
-
-def apply_transforms(data: List[Dict], columns: List[str], transforms: List[TransformOperation], handler=None, project: str = None) -> tuple:
+def apply_transforms(data: List[Dict], columns: List[str], transforms: List[TransformOperation], handler=None,
+                     project: str = None, lookups: Dict[str, Dict[str, str]] = None) -> tuple:
     """
-    Apply user-defined transforms to data.
+    Apply user-defined transforms to data (in Python).
+    
+    Lookup dictionaries are loaded from the project's lookup tables unless
+    passed in. Exports go through open_query_stream, which pushes what it
+    can into SQL first and transforms the rest per batch.
     
     Returns: (transformed_data, new_columns, column_renames)
     """
     if not transforms:
         return data, columns, {}
-    
-    result = [row.copy() for row in data]
-    new_columns = list(columns)
-    column_renames = {}  # original -> display name
-    
-    # Load lookups if needed
-    lookups = {}
-    if handler and project:
-        try:
-            # Get lookup tables from schema
-            schema = _build_bi_schema(handler, project) if handler else {'tables': []}
-            for table in schema.get('tables', []):
-                table_name = table.get('table_name', '').lower()
-                if any(p in table_name for p in ['lookup', 'code', 'ref', '_lkp']):
-                    # Load as lookup
-                    cols = table.get('columns', [])
-                    if len(cols) >= 2:
-                        code_col = cols[0]
-                        desc_col = cols[1] if len(cols) > 1 else cols[0]
-                        try:
-                            sql = f'SELECT "{code_col}", "{desc_col}" FROM "{table.get("table_name")}"'
-                            rows = handler.query(sql)
-                            lookups[table_name] = {str(r[code_col]): str(r[desc_col]) for r in rows}
-                        except Exception:
-                            pass
-        except Exception as e:
-            logger.warning(f"[BI] Could not load lookups: {e}")
-    
-    for transform in transforms:
-        t_type = transform.type
-        col = transform.column
-        params = transform.params or {}
-        
-        if t_type == 'rename':
-            # Rename column header
-            new_name = params.get('new_name', col)
-            column_renames[col] = new_name
-        
-        elif t_type == 'state_names':
-            # Convert state codes to full names
-            for row in result:
-                if col in row and row[col]:
-                    code = str(row[col]).upper().strip()
-                    row[col] = STATE_NAMES.get(code, row[col])
-        
-        elif t_type == 'format_currency':
-            # Format as $X,XXX.XX
-            for row in result:
-                if col in row and row[col] is not None:
-                    try:
-                        val = float(row[col])
-                        row[col] = f"${val:,.2f}"
-                    except (ValueError, TypeError):
-                        pass
-        
-        elif t_type == 'format_percent':
-            # Format as XX.X%
-            for row in result:
-                if col in row and row[col] is not None:
-                    try:
-                        val = float(row[col])
-                        row[col] = f"{val * 100:.1f}%"
-                    except (ValueError, TypeError):
-                        pass
-        
-        elif t_type == 'uppercase':
-            for row in result:
-                if col in row and row[col]:
-                    row[col] = str(row[col]).upper()
-        
-        elif t_type == 'titlecase':
-            for row in result:
-                if col in row and row[col]:
-                    row[col] = str(row[col]).title()
-        
-        elif t_type == 'map_lookup':
-            # Map codes to descriptions using lookup table
-            lookup_table = params.get('lookup_table', '').lower()
-            if lookup_table in lookups:
-                lookup = lookups[lookup_table]
-                for row in result:
-                    if col in row and row[col]:
-                        code = str(row[col])
-                        row[col] = lookup.get(code, code)
-        
-        elif t_type == 'combine':
-            # Combine multiple columns
-            source_cols = params.get('columns', [])
-            separator = params.get('separator', ' ')
-            new_col = params.get('new_column', f"{col}_combined")
-            
-            for row in result:
-                parts = [str(row.get(c, '')) for c in source_cols if row.get(c)]
-                row[new_col] = separator.join(parts)
-            
-            if new_col not in new_columns:
-                new_columns.append(new_col)
-        
-        elif t_type == 'split':
-            # Split column by delimiter
-            delimiter = params.get('delimiter', ',')
-            new_col_names = params.get('new_columns', [f"{col}_1", f"{col}_2"])
-            
-            for row in result:
-                if col in row and row[col]:
-                    parts = str(row[col]).split(delimiter)
-                    for i, new_col in enumerate(new_col_names):
-                        row[new_col] = parts[i].strip() if i < len(parts) else ''
-            
-            for nc in new_col_names:
-                if nc not in new_columns:
-                    new_columns.append(nc)
-        
-        elif t_type == 'calculated':
-            # Add calculated column
-            formula = params.get('formula', '')
-            new_col = params.get('new_column', 'calculated')
-            
-            # Simple formula parsing (col1 + col2, col1 * 100, etc.)
-            for row in result:
-                try:
-                    # Replace column names with values
-                    expr = formula
-                    for c in columns:
-                        if c in expr:
-                            val = row.get(c, 0)
-                            if val is None:
-                                val = 0
-                            expr = expr.replace(c, str(float(val)))
-                    row[new_col] = eval(expr)  # Safe because we control the formula
-                except Exception:
-                    row[new_col] = None
-            
-            if new_col not in new_columns:
-                new_columns.append(new_col)
-        
-        elif t_type == 'filter':
-            # Filter rows
-            filter_col = params.get('column', col)
-            operator = params.get('operator', '=')
-            value = params.get('value')
-            
-            def matches(row_val):
-                if operator == '=':
-                    return str(row_val) == str(value)
-                elif operator == '!=':
-                    return str(row_val) != str(value)
-                elif operator == '>':
-                    return float(row_val) > float(value)
-                elif operator == '<':
-                    return float(row_val) < float(value)
-                elif operator == 'contains':
-                    return str(value).lower() in str(row_val).lower()
-                return True
-            
-            result = [row for row in result if filter_col in row and matches(row[filter_col])]
-    
-    return result, new_columns, column_renames
+    if lookups is None:
+        lookups = load_lookup_dictionaries(handler, project) if handler and project else {}
+    return apply_python_transforms(data, columns, transforms, lookups)
 
 
 # =============================================================================
 # SCHEMA HELPER (mirrors unified_chat pattern)
 # =============================================================================
 
-def _build_bi_schema(handler, customer_id: str) -> Dict[str, Any]:
+def _load_schema_context(customer_id: str) -> Dict[str, Any]:
+    """
+    Display context for a project's schema from Supabase: the customer name
+    and truth_type/domain per file from document_registry.
+    """
+    # Get customer name for display
+    customer_name = customer_id  # Default to customer_id
+    try:
+        from utils.database.models import ProjectModel
+        proj_record = ProjectModel.get_by_name(customer_id) if customer_id else None
+        if proj_record:
+            customer_name = proj_record.get('customer') or customer_id
+    except Exception as e:
+        logger.debug(f"[BI] Could not look up customer name: {e}")
+    
+    # Build lookup of truth_type and domain from document_registry
+    file_metadata_lookup = {}  # filename.lower() -> {truth_type, domain}
+    try:
+        supabase = get_supabase()
+        if supabase:
+            registry = supabase.table('document_registry').select('filename, truth_type, content_domain').execute()
+            for entry in (registry.data or []):
+                fname = (entry.get('filename') or '').lower()
+                if fname:
+                    file_metadata_lookup[fname] = {
+                        'truth_type': entry.get('truth_type') or 'reality',
+                        'domain': entry.get('content_domain') or ''
+                    }
+    except Exception as e:
+        logger.debug(f"[BI] Could not load file metadata from registry: {e}")
+    
+    return {'customer_name': customer_name, 'file_metadata': file_metadata_lookup}
+
+
+def _build_bi_schema(handler, customer_id: str, context: Dict[str, Any] = None) -> Dict[str, Any]:
     """
     Get schema for BI queries - compatible with IntelligenceEngine.
     Returns {'tables': [...], 'filter_candidates': {...}}
     
-    IMPORTANT: Uses stored display_name from _schema_metadata when available,
-    only generates on the fly as fallback.
+    Tables, columns and row counts come from the maintained schema catalog
+    (no per-table scans). Uses stored display_name from _schema_metadata
+    when available, only generates on the fly as fallback.
+    
+    context: result of _load_schema_context (loaded if not given).
     """
     tables = []
     filter_candidates = {}
@@ -445,145 +331,48 @@ def _build_bi_schema(handler, customer_id: str) -> Dict[str, Any]:
         return {'tables': [], 'filter_candidates': {}}
     
     try:
-        # Get customer name for display
-        customer_name = customer_id  # Default to customer_id
-        try:
-            from utils.database.models import ProjectModel
-            proj_record = ProjectModel.get_by_name(customer_id) if customer_id else None
-            if proj_record:
-                customer_name = proj_record.get('customer') or customer_id
-        except Exception as e:
-            logger.debug(f"[BI] Could not look up customer name: {e}")
-        
-        # STEP 0: Build lookup of truth_type and domain from document_registry
-        file_metadata_lookup = {}  # filename.lower() -> {truth_type, domain}
-        try:
-            from utils.database.supabase_client import get_supabase
-            supabase = get_supabase()
-            if supabase:
-                registry = supabase.table('document_registry').select('filename, truth_type, content_domain').execute()
-                for entry in (registry.data or []):
-                    fname = (entry.get('filename') or '').lower()
-                    if fname:
-                        file_metadata_lookup[fname] = {
-                            'truth_type': entry.get('truth_type') or 'reality',
-                            'domain': entry.get('content_domain') or ''
-                        }
-        except Exception as e:
-            logger.debug(f"[BI] Could not load file metadata from registry: {e}")
-        
-        # STEP 1: Build lookup of display_names, file_names, entity_type from _schema_metadata (source of truth)
-        display_name_lookup = {}
-        file_name_lookup = {}  # table_name -> file_name
-        entity_type_lookup = {}  # table_name -> entity_type
-        category_lookup = {}  # table_name -> category
-        try:
-            meta_results = handler.conn.execute("""
-                SELECT table_name, display_name, file_name, sheet_name, entity_type, category
-                FROM _schema_metadata
-                WHERE is_current = TRUE
-            """).fetchall()
-            for row in meta_results:
-                if row[0]:  # table_name
-                    if row[1]:  # display_name
-                        display_name_lookup[row[0]] = row[1]
-                    if row[2]:  # file_name
-                        file_name_lookup[row[0]] = row[2]
-                    if row[4]:  # entity_type
-                        entity_type_lookup[row[0]] = row[4]
-                    if row[5]:  # category
-                        category_lookup[row[0]] = row[5]
-        except Exception as e:
-            logger.debug(f"[BI] Could not load display names from metadata: {e}")
-        
-        # Get all tables from DuckDB
-        all_tables = handler.conn.execute("SHOW TABLES").fetchall()
+        if context is None:
+            context = _load_schema_context(customer_id)
+        customer_name = context['customer_name']
+        file_metadata_lookup = context['file_metadata']
         
         # Build project prefix for filtering
         # Tables use first 8 chars of UUID (no hyphens) as prefix
-        project_clean = (customer_id or '').strip()
-        project_prefixes = [
-            project_clean.lower(),
-            project_clean.lower().replace(' ', '_'),
-            project_clean.lower().replace('-', '_'),
-            # Handle UUID-based customer IDs: extract first 8 chars without hyphens
-            project_clean.replace('-', '')[:8].lower() if '-' in project_clean else None,
-        ]
-        # Remove None values
-        project_prefixes = [p for p in project_prefixes if p]
-        
-        # Track seen tables to prevent duplicates
-        seen_table_names = set()
+        project_prefixes = project_table_prefixes(customer_id)
         
-        for (table_name,) in all_tables:
-            if table_name.startswith('_'):
+        for entry in get_schema_catalog(handler).read():
+            table_name = entry['table_name']
+            table_lower = table_name.lower()
+            matches_project = any(table_lower.startswith(prefix) for prefix in project_prefixes)
+            if not matches_project and customer_id:
                 continue
             
-            # Skip if already processed
-            if table_name in seen_table_names:
+            columns = entry['columns']
+            if not columns:
                 continue
-            seen_table_names.add(table_name)
             
-            table_lower = table_name.lower()
-            matches_project = any(
-                table_lower.startswith(prefix.lower()) 
-                for prefix in project_prefixes if prefix
-            )
+            # Use stored display_name if available, otherwise generate
+            display_name = entry['display_name']
+            if not display_name:
+                display_name = generate_display_name(table_name, project=customer_name)
             
-            if not matches_project and customer_id:
-                continue
+            # Get truth_type and domain from file metadata
+            file_name = entry['file_name'] or ''
+            file_meta = file_metadata_lookup.get(file_name.lower(), {})
             
-            try:
-                # Get columns
-                columns = []
-                try:
-                    col_result = handler.conn.execute(f'PRAGMA table_info("{table_name}")').fetchall()
-                    columns = [row[1] for row in col_result]
-                except Exception:
-                    result = handler.conn.execute(f'SELECT * FROM "{table_name}" LIMIT 0')
-                    columns = [desc[0] for desc in result.description]
-                
-                if not columns:
-                    continue
-                
-                # Get row count
-                try:
-                    count_result = handler.conn.execute(f'SELECT COUNT(*) FROM "{table_name}"').fetchone()
-                    row_count = count_result[0] if count_result else 0
-                except Exception:
-                    row_count = 0
-                
-                # Use stored display_name if available, otherwise generate
-                display_name = display_name_lookup.get(table_name)
-                if not display_name:
-                    display_name = generate_display_name(table_name, project=customer_name)
-                
-                # Get truth_type and domain from file metadata
-                file_name = file_name_lookup.get(table_name, '')
-                file_meta = file_metadata_lookup.get(file_name.lower(), {})
-                truth_type = file_meta.get('truth_type', 'reality')
-                domain = file_meta.get('domain', '')
-                
-                # Get entity_type and category from schema metadata
-                entity_type = entity_type_lookup.get(table_name)
-                category = category_lookup.get(table_name)
-                
-                tables.append({
-                    'table_name': table_name,
-                    'display_name': display_name,
-                    'project': customer_id,
-                    'customer': customer_name,
-                    'columns': columns,
-                    'row_count': row_count,
-                    'truth_type': truth_type,
-                    'domain': domain,
-                    'entity_type': entity_type,
-                    'category': category,
-                    'file': file_name
-                })
-                
-            except Exception as e:
-                logger.warning(f"[BI] Error processing table {table_name}: {e}")
+            tables.append({
+                'table_name': table_name,
+                'display_name': display_name,
+                'project': customer_id,
+                'customer': customer_name,
+                'columns': columns,
+                'row_count': entry['row_count'],
+                'truth_type': file_meta.get('truth_type', 'reality'),
+                'domain': file_meta.get('domain', ''),
+                'entity_type': entry['entity_type'],
+                'category': entry['category'],
+                'file': file_name
+            })
         
         # Get filter candidates
         try:
@@ -597,6 +386,12 @@ def _build_bi_schema(handler, customer_id: str) -> Dict[str, Any]:
     return {'tables': tables, 'filter_candidates': filter_candidates}
 
 
+async def _get_bi_schema(handler, customer_id: str) -> Dict[str, Any]:
+    """_build_bi_schema with the Supabase display context cached per project."""
+    context, _ = await _schema_context_cache.get((customer_id,), lambda: _load_schema_context(customer_id))
+    return _build_bi_schema(handler, customer_id, context)
+
+
 # =============================================================================
 # MAIN QUERY ENDPOINT
 # =============================================================================
@@ -624,7 +419,7 @@ async def execute_bi_query(request: BIQueryRequest):
         handler = get_structured_handler()
         
         # Get schema for project
-        schema = _build_bi_schema(handler, request.project)
+        schema = await _get_bi_schema(handler, request.project)
         if not schema or not schema.get('tables'):
             raise HTTPException(404, f"No data found for project: {request.project}")
         
@@ -890,7 +685,7 @@ async def get_suggestions(customer_id: str):
     
     try:
         handler = get_structured_handler()
-        schema = _build_bi_schema(handler, customer_id)
+        schema = await _get_bi_schema(handler, customer_id)
         
         if not schema or not schema.get('tables'):
             return {"suggestions": [], "categories": []}
@@ -1040,14 +835,19 @@ async def get_suggestions(customer_id: str):
 # =============================================================================
 
 @router.get("/bi/schema/{customer_id}")
-async def get_bi_schema(customer_id: str):
-    """Get schema info for BI builder."""
+async def get_bi_schema(customer_id: str, request: Request):
+    """
+    Get schema info for BI builder.
+    
+    Served from the schema catalog with an ETag; clients sending it back in
+    If-None-Match get 304 Not Modified while the schema is unchanged.
+    """
     if not STRUCTURED_AVAILABLE:
         raise HTTPException(503, "Not available")
     
     try:
         handler = get_structured_handler()
-        schema = _build_bi_schema(handler, customer_id)
+        schema = await _get_bi_schema(handler, customer_id)
         
         # Simplify for frontend - deduplicate by table_name
         seen_tables = set()
@@ -1070,15 +870,22 @@ async def get_bi_schema(customer_id: str):
                 'domain': t.get('domain', '')
             })
         
-        logger.info(f"[BI] Schema for {customer_id}: {len(tables)} unique tables")
-        
-        return {
+        body = {
             "project": customer_id,
             "tables": tables,
             "filter_candidates": schema.get('filter_candidates', {}),
             "relationships": schema.get('relationships', [])
         }
         
+        etag = '"' + hashlib.sha256(json.dumps(body, sort_keys=True, default=str).encode()).hexdigest()[:32] + '"'
+        headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+        if etag in [t.strip() for t in request.headers.get('if-none-match', '').split(',')]:
+            logger.debug(f"[BI] Schema for {customer_id}: not modified")
+            return Response(status_code=304, headers=headers)
+        
+        logger.info(f"[BI] Schema for {customer_id}: {len(tables)} unique tables")
+        return JSONResponse(body, headers=headers)
+        
     except Exception as e:
         raise HTTPException(500, str(e))
 
@@ -1154,8 +961,31 @@ async def execute_raw_sql(request: BIExecuteRequest):
 # EXPORT ENDPOINT
 # =============================================================================
 
+def _export_job_progress(project: str, filename: str):
+    """Mirror a background export's progress to processing_jobs (when Supabase is up)."""
+    try:
+        from utils.database.models import ProcessingJobModel
+        job = ProcessingJobModel.create('bi_export', project_id=None,
+                                        input_data={'filename': filename, 'project': project})
+    except Exception as e:
+        logger.debug(f"[BI] Export job record skipped: {e}")
+        job = None
+    if not job:
+        return None
+    
+    def report(progress):
+        if progress.status == 'completed':
+            ProcessingJobModel.complete(job['id'], progress.to_dict())
+        elif progress.status == 'failed':
+            ProcessingJobModel.fail(job['id'], progress.error or 'Export failed')
+        else:
+            ProcessingJobModel.update_progress(job['id'], progress.percent,
+                                              f"Exported {progress.rows_written:,} rows")
+    return report
+
+
 @router.post("/bi/export")
-async def export_bi_data(request: BIExportRequest):
+async def export_bi_data(request: BIExportRequest, background_tasks: BackgroundTasks):
     """
     Export query results with transforms.
     
@@ -1163,7 +993,10 @@ async def export_bi_data(request: BIExportRequest):
     - Use provided SQL directly
     - Generate SQL from natural language query
     
-    Applies transforms before export.
+    Applies transforms before export. The file is streamed in row batches
+    (X-Export-Id header for GET /bi/export/{export_id} progress); exports
+    above XLR8_EXPORT_BACKGROUND_ROWS (or with background=true) run as a
+    background job and return 202 with status and download URLs.
     """
     if not STRUCTURED_AVAILABLE:
         raise HTTPException(503, "Export not available")
@@ -1175,7 +1008,7 @@ async def export_bi_data(request: BIExportRequest):
         sql = request.sql
         if not sql:
             # Generate from NL query
-            schema = _build_bi_schema(handler, request.project)
+            schema = await _get_bi_schema(handler, request.project)
             engine = IntelligenceEngine(request.project)
             rag = RAGHandler() if RAG_AVAILABLE else None
             engine.load_context(structured_handler=handler, schema=schema, rag_handler=rag)
@@ -1189,114 +1022,69 @@ async def export_bi_data(request: BIExportRequest):
         if not sql:
             raise HTTPException(400, "Could not generate SQL for query")
         
-        # Execute query
-        rows = handler.query(sql)
-        columns = list(rows[0].keys()) if rows else []
+        # Open the query as a batch stream (transforms pushed into SQL where possible)
+        transforms = [TransformOperation(**t) if isinstance(t, dict) else t for t in request.transforms or []]
+        lookups = await get_lookup_dictionaries(handler, request.project) if transforms else {}
+        stream = await run_in_threadpool(open_query_stream, handler, sql, transforms, lookups,
+                                         count_limit=BACKGROUND_ROWS)
         
-        if not rows:
+        if stream.source_empty:
             raise HTTPException(404, "No data returned")
         
-        # Apply transforms
-        transformed_data, new_columns, renames = apply_transforms(
-            rows, columns, 
-            [TransformOperation(**t) if isinstance(t, dict) else t for t in request.transforms or []],
-            handler, request.project
-        )
-        
-        # Apply column renames
-        final_columns = [renames.get(c, c) for c in new_columns]
+        if transforms:
+            logger.info(f"[BI] Export transforms: {len(stream.pushed)} in SQL, {len(stream.python)} in Python")
         
-        if request.format == 'csv':
-            # CSV export
-            output = io.StringIO()
-            output.write(','.join(final_columns) + '\n')
-            for row in transformed_data:
-                values = [str(row.get(c, '')) for c in new_columns]
-                output.write(','.join(values) + '\n')
-            
-            output.seek(0)
+        fmt = 'csv' if request.format == 'csv' else 'xlsx'
+        if fmt == 'csv':
             filename = f"xlr8_export_{int(time.time())}.csv"
-            
-            return StreamingResponse(
-                iter([output.getvalue()]),
-                media_type="text/csv",
-                headers={"Content-Disposition": f"attachment; filename={filename}"}
-            )
-        
         else:
-            # Excel export
-            from openpyxl import Workbook
-            from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-            from openpyxl.utils import get_column_letter
-            
-            wb = Workbook()
-            ws = wb.active
-            ws.title = "Data"
-            
-            # Styling
-            header_font = Font(bold=True, color="FFFFFF")
-            header_fill = PatternFill(start_color="4A7C59", end_color="4A7C59", fill_type="solid")  # Brand green
-            thin_border = Border(
-                left=Side(style='thin'),
-                right=Side(style='thin'),
-                top=Side(style='thin'),
-                bottom=Side(style='thin')
-            )
-            
-            # Headers
-            for col_idx, col_name in enumerate(final_columns, 1):
-                cell = ws.cell(row=1, column=col_idx, value=col_name)
-                cell.font = header_font
-                cell.fill = header_fill
-                cell.border = thin_border
-                cell.alignment = Alignment(horizontal='center')
-            
-            # Data
-            for row_idx, row_data in enumerate(transformed_data, 2):
-                for col_idx, col_name in enumerate(new_columns, 1):
-                    cell = ws.cell(row=row_idx, column=col_idx, value=row_data.get(col_name, ''))
-                    cell.border = thin_border
-            
-            # Auto-width
-            for col_idx, col_name in enumerate(final_columns, 1):
-                max_len = len(str(col_name))
-                for row in transformed_data[:100]:
-                    val = row.get(new_columns[col_idx-1], '')
-                    if val:
-                        max_len = max(max_len, len(str(val)))
-                ws.column_dimensions[get_column_letter(col_idx)].width = min(max_len + 2, 50)
-            
-            # Metadata sheet
-            if request.include_metadata:
-                ws_meta = wb.create_sheet(title="Metadata")
-                ws_meta['A1'] = "XLR8 BI Export"
-                ws_meta['A1'].font = Font(bold=True, size=14)
-                ws_meta['A2'] = f"Query: {request.query}"
-                ws_meta['A3'] = f"Project: {request.project}"
-                ws_meta['A4'] = f"Rows: {len(transformed_data)}"
-                ws_meta['A5'] = f"Generated: {time.strftime('%Y-%m-%d %H:%M:%S')}"
-                
-                if request.transforms:
-                    ws_meta['A7'] = "Transforms Applied:"
-                    ws_meta['A7'].font = Font(bold=True)
-                    for i, t in enumerate(request.transforms, 8):
-                        t_dict = t if isinstance(t, dict) else t.dict()
-                        ws_meta[f'A{i}'] = f"• {t_dict.get('type', '')} on {t_dict.get('column', '')}"
-            
-            # Save to buffer
-            output = io.BytesIO()
-            wb.save(output)
-            output.seek(0)
-            
             timestamp = time.strftime("%Y%m%d_%H%M%S")
             safe_query = re.sub(r'[^\w\s]', '', request.query[:20]).strip().replace(' ', '_')
             filename = f"xlr8_{safe_query}_{timestamp}.xlsx"
-            
-            return StreamingResponse(
-                output,
-                media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                headers={"Content-Disposition": f"attachment; filename={filename}"}
-            )
+        
+        generated = time.strftime('%Y-%m-%d %H:%M:%S')
+        
+        def metadata_lines(rows_written: int) -> List[str]:
+            lines = [
+                "XLR8 BI Export",
+                f"Query: {request.query}",
+                f"Project: {request.project}",
+                f"Rows: {rows_written}",
+                f"Generated: {generated}",
+            ]
+            if request.transforms:
+                lines += ["", "Transforms Applied:"]
+                for t in request.transforms:
+                    t_dict = t if isinstance(t, dict) else t.dict()
+                    lines.append(f"• {t_dict.get('type', '')} on {t_dict.get('column', '')}")
+            return lines
+        
+        metadata = metadata_lines if fmt == 'xlsx' and request.include_metadata else None
+        
+        background = request.background if request.background is not None else stream.total_rows > BACKGROUND_ROWS
+        if background:
+            # Large export: write the file as a job; the client polls and downloads it
+            progress = track_export(fmt, filename, stream.total_rows, background=True,
+                                    on_progress=_export_job_progress(request.project, filename))
+            background_tasks.add_task(run_background_export, stream, progress, metadata)
+            logger.info(f"[BI] Export {progress.export_id}: ~{stream.total_rows} rows queued as background job")
+            return JSONResponse(status_code=202, content={
+                **progress.to_dict(),
+                'status_url': f"/api/bi/export/{progress.export_id}",
+                'download_url': f"/api/bi/export/{progress.export_id}/download",
+            })
+        
+        progress = track_export(fmt, filename, stream.total_rows)
+        chunks = iter_csv(stream, progress) if fmt == 'csv' else iter_xlsx(stream, progress, metadata)
+        return StreamingResponse(
+            tracked_stream(chunks, progress),
+            media_type=CONTENT_TYPES[fmt],
+            headers={
+                "Content-Disposition": f"attachment; filename={filename}",
+                "X-Export-Id": progress.export_id,
+                "X-Export-Rows-Estimate": str(stream.total_rows),
+            }
+        )
         
     except HTTPException:
         raise
@@ -1307,6 +1095,28 @@ async def export_bi_data(request: BIExportRequest):
         raise HTTPException(500, f"Export failed: {str(e)}")
 
 
+@router.get("/bi/export/{export_id}")
+async def get_export_status(export_id: str):
+    """Progress of a streamed or background export."""
+    progress = get_export(export_id)
+    if not progress:
+        raise HTTPException(404, "Export not found")
+    return progress.to_dict()
+
+
+@router.get("/bi/export/{export_id}/download")
+async def download_export(export_id: str):
+    """Download a finished background export."""
+    progress = get_export(export_id)
+    if not progress or not progress.background:
+        raise HTTPException(404, "Export not found")
+    if progress.status == 'failed':
+        raise HTTPException(500, f"Export failed: {progress.error}")
+    if progress.status != 'completed' or not progress.path:
+        raise HTTPException(409, f"Export still running ({progress.percent}%)")
+    return FileResponse(progress.path, media_type=progress.content_type, filename=progress.filename)
+
+
 # =============================================================================
 # SAVED QUERIES ENDPOINTS
 # =============================================================================
@@ -644,6 +644,16 @@ async def delete_all_project_data(customer_id: str):
     # 1. DuckDB tables
     conn = _get_duckdb(customer_id)
     if conn:
+        # Sharded storage: the project's tables go with its file
+        try:
+            from utils.structured_data_handler import get_structured_handler
+        except ImportError:
+            from backend.utils.structured_data_handler import get_structured_handler
+        try:
+            deleted["tables"] += len(get_structured_handler().drop_project_shard(customer_id))
+        except Exception as shard_e:
+            logger.warning(f"[CLEANUP] Shard removal failed: {shard_e}")
+        
         try:
             # FIRST: Find tables registered in _schema_metadata for this project
             # This catches tables regardless of naming convention
@@ -797,6 +797,91 @@ async def get_term_index_contents(customer_id: str, term: str = None, limit: int
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# =============================================================================
+# SNAPSHOTS (utils/project_snapshots.py)
+# Parquet export of a customer's tables and metadata; restore without re-ingest
+# =============================================================================
+
+class SnapshotRequest(BaseModel):
+    """Schema for creating a snapshot"""
+    note: Optional[str] = None
+
+
+def _get_snapshots():
+    try:
+        from utils.project_snapshots import get_project_snapshots
+        from utils.structured_data_handler import get_structured_handler
+    except ImportError:
+        from backend.utils.project_snapshots import get_project_snapshots
+        from backend.utils.structured_data_handler import get_structured_handler
+    return get_project_snapshots(get_structured_handler())
+
+
+@router.get("/{customer_id}/snapshots")
+async def list_customer_snapshots(customer_id: str):
+    """Snapshots of a customer's data, newest first."""
+    try:
+        return {"customer_id": customer_id, "snapshots": _get_snapshots().list(customer_id)}
+    except Exception as e:
+        logger.error(f"Error listing snapshots: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/{customer_id}/snapshots")
+async def create_customer_snapshot(customer_id: str, request: SnapshotRequest = None):
+    """
+    Snapshot a customer's DuckDB tables and metadata to Parquet.
+
+    Tables unchanged since an earlier snapshot are referenced, not rewritten.
+    """
+    import asyncio
+
+    try:
+        note = request.note if request else None
+        # Runs for as long as the export takes - keep it off the event loop
+        manifest = await asyncio.to_thread(_get_snapshots().create, customer_id, note)
+        return {"success": True, "customer_id": customer_id, "snapshot_id": manifest['snapshot_id'],
+                "totals": manifest['totals'], "elapsed_ms": manifest['elapsed_ms']}
+    except Exception as e:
+        logger.error(f"Error creating snapshot: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/{customer_id}/snapshots/{snapshot_id}/restore")
+async def restore_customer_snapshot(customer_id: str, snapshot_id: str, verify: bool = True):
+    """
+    Replace a customer's tables and metadata with a snapshot's.
+
+    Every file is checked against the manifest first (verify=false skips
+    the checksums); a snapshot that fails is rejected with 409 and the
+    customer's data is left as it was.
+    """
+    import asyncio
+
+    try:
+        result = await asyncio.to_thread(_get_snapshots().restore, customer_id, snapshot_id, verify)
+        return {"success": True, **result}
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error restoring snapshot: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.delete("/{customer_id}/snapshots/{snapshot_id}")
+async def delete_customer_snapshot(customer_id: str, snapshot_id: str):
+    """Delete a snapshot and the table files no other snapshot uses."""
+    try:
+        return {"success": True, **_get_snapshots().delete(customer_id, snapshot_id)}
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error deleting snapshot: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 # =============================================================================
 # PRODUCT REGISTRY ENDPOINTS
 # These don't change - they're about products, not customers
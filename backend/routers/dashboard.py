@@ -24,13 +24,12 @@ from fastapi import APIRouter, Query
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/dashboard", tags=["dashboard"])
 
-# Cache for expensive operations
-_dashboard_cache = {
-    'data': None,
-    'timestamp': 0,
-    'lock': __import__('threading').Lock()
-}
+# Keyed stale-while-revalidate cache for expensive operations (one entry per parameter set)
+from backend.utils.keyed_cache import get_keyed_cache
+
 _CACHE_TTL_SECONDS = 15  # Short TTL - dashboard should be fresh
+_CACHE_STALE_SECONDS = 60  # Serve stale up to 1 more minute while refreshing in background
+_dashboard_cache = get_keyed_cache('dashboard', ttl=_CACHE_TTL_SECONDS, stale_ttl=_CACHE_STALE_SECONDS)
 
 
 def _get_supabase():
@@ -627,18 +626,25 @@ async def get_dashboard(
         - attention: Items that need action
         - activity: Historical graphs (uploads, queries)
     """
-    now = time.time()
-    
-    # Check cache
-    if not force:
-        with _dashboard_cache['lock']:
-            if (_dashboard_cache['data'] is not None 
-                and (now - _dashboard_cache['timestamp']) < _CACHE_TTL_SECONDS):
-                cached = _dashboard_cache['data'].copy()
-                cached['_cached'] = True
-                cached['_cache_age_ms'] = int((now - _dashboard_cache['timestamp']) * 1000)
-                return cached
+    # Dashboard is platform-wide: scope None, so any project invalidation clears it
+    response, info = await _dashboard_cache.get(
+        (None, days),
+        lambda: _build_dashboard(days),
+        force=force
+    )
+    
+    if info['state'] == 'miss':
+        return response
     
+    cached = response.copy()
+    cached['_cached'] = True
+    cached['_cache_age_ms'] = info['age_ms']
+    cached['_stale'] = info['state'] == 'stale'
+    return cached
+
+
+async def _build_dashboard(days: int) -> Dict[str, Any]:
+    """Build the full dashboard response (uncached)."""
     start_time = time.time()
     
     # Run pipeline tests SEQUENTIALLY (DuckDB is NOT thread-safe)
@@ -715,11 +721,6 @@ async def get_dashboard(
         }
     }
     
-    # Cache the response
-    with _dashboard_cache['lock']:
-        _dashboard_cache['data'] = response.copy()
-        _dashboard_cache['timestamp'] = now
-    
     return response
 
 
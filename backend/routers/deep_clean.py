@@ -127,6 +127,14 @@ async def deep_clean(customer_id: Optional[str] = None, confirm: bool = False, f
             # FORCE: Delete ALL user tables and metadata
             logger.warning("[DEEP-CLEAN] Wiping ALL DuckDB tables...")
             
+            # Sharded storage: project tables go with their files
+            if getattr(handler, 'shards', None) is not None:
+                with handler._db_lock:
+                    dropped = handler.shards.drop_all()
+                handler.query_cache.invalidate(handler.db_path)
+                results["duckdb_tables"]["cleaned"] += len(dropped)
+                logger.info(f"[DEEP-CLEAN] Removed project shard files ({len(dropped)} tables)")
+            
             # Get all tables except system tables
             all_tables = conn.execute("""
                 SELECT table_name FROM information_schema.tables 
@@ -420,6 +428,15 @@ async def deep_clean(customer_id: Optional[str] = None, confirm: bool = False, f
                         if "does not exist" not in str(e).lower():
                             logger.debug(f"[DEEP-CLEAN] {table}: {e}")
                 
+                # Local lineage closure index mirrors lineage_edges
+                try:
+                    from utils.database.lineage_store import get_lineage_store
+                    store = get_lineage_store()
+                    if store:
+                        store.clear()
+                except Exception as e:
+                    logger.debug(f"[DEEP-CLEAN] local lineage store: {e}")
+                
                 # Clear platform_metrics (event log table - DELETE not UPDATE)
                 try:
                     result = supabase.table("platform_metrics").delete().neq(
@@ -793,8 +793,10 @@ async def export_results(customer_id: str, request: ExportRequest):
 async def export_download(customer_id: str, request: ExportRequest):
     """
     Export and return as downloadable file (streaming response).
+    
+    CSV and XLSX are streamed in chunks; other formats are rendered whole.
     """
-    from fastapi.responses import Response
+    from fastapi.responses import StreamingResponse
     
     try:
         try:
@@ -809,14 +811,15 @@ async def export_download(customer_id: str, request: ExportRequest):
             playbook_results=request.playbook_results,
             template=request.template,
             format=request.format,
-            context=context
+            context=context,
+            stream=True
         )
         
         if not result.success:
             raise HTTPException(status_code=400, detail=result.error)
         
-        return Response(
-            content=result.content,
+        return StreamingResponse(
+            result.iter_content(),
             media_type=result.content_type,
             headers={
                 'Content-Disposition': f'attachment; filename="{result.filename}"'
@@ -645,6 +645,10 @@ async def _store_in_duckdb(project_name: str, endpoint_id: str, truth_bucket: st
         conn.register("temp_df", df)
         conn.execute(f'CREATE TABLE "{table_name}" AS SELECT * FROM temp_df')
         
+        # Written outside the handler's connection - drop cached reads of it
+        from utils.query_cache import get_query_cache
+        get_query_cache().invalidate(db_path, [table_name])
+        
         row_count = len(df)
         
         logger.info(f"[INTEGRATIONS] Stored {row_count} rows in {table_name} (bucket: {truth_bucket})")
@@ -11,10 +11,18 @@ Endpoints:
     GET /metrics/trends       - Time-series data for charts
     GET /metrics/processors   - Per-processor breakdown
     GET /metrics/llm          - LLM usage and costs
+    GET /metrics/writer       - Background metrics writer counters
+    GET /metrics/gatherers    - Truth gatherer latency histograms
+    GET /metrics/query-cache  - DuckDB query result cache hit rate and bytes saved
+    GET /metrics/column-sketches - Per-table column sketch size, build cost and accuracy bounds
+    GET /metrics/duckdb-maintenance      - Space reclaimed, time spent and pending checkpoint hints
+    POST /metrics/duckdb-maintenance/run - Run whatever maintenance is due now
 """
 
 from fastapi import APIRouter, Query
+from fastapi.responses import PlainTextResponse
 from typing import Optional
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
@@ -140,6 +148,151 @@ async def get_metrics_health():
         return {"healthy": False, "reason": str(e)}
 
 
+@router.get("/writer")
+async def get_metrics_writer_stats(format: str = Query(default="json", pattern="^(json|prometheus)$")):
+    """
+    Counters for the buffered metrics writer.
+    
+    Returns buffered, flushed, dropped, spilled and replayed event counts.
+    Use format=prometheus for a scrapeable text exposition.
+    """
+    if not METRICS_AVAILABLE:
+        return {"error": "Metrics service not available", "available": False}
+    
+    stats = MetricsService.get_writer_stats()
+    if format == "prometheus":
+        lines = []
+        for key, value in stats.items():
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            lines.append(f"xlr8_metrics_writer_{key} {value}")
+        lines.append(f"xlr8_metrics_writer_running {1 if stats.get('running') else 0}")
+        return PlainTextResponse("\n".join(lines) + "\n")
+    
+    return {"available": True, **stats}
+
+
+@router.get("/gatherers")
+async def get_gatherer_stats(format: str = Query(default="json", pattern="^(json|prometheus)$")):
+    """
+    Latency histograms for the intelligence engine's truth gatherers.
+    
+    Per gatherer: count, p50/p95 (bucket bounds), bucket counts and
+    ok/timeout/error outcomes. Use format=prometheus for a scrapeable text exposition.
+    """
+    try:
+        from utils.intelligence.gather_scheduler import get_gather_stats, get_gather_stats_prometheus
+    except ImportError:
+        try:
+            from backend.utils.intelligence.gather_scheduler import get_gather_stats, get_gather_stats_prometheus
+        except ImportError:
+            return {"error": "Gather scheduler not available", "available": False}
+    
+    if format == "prometheus":
+        return PlainTextResponse(get_gather_stats_prometheus())
+    
+    return {"available": True, "gatherers": get_gather_stats()}
+
+
+@router.get("/query-cache")
+async def get_query_cache_stats(format: str = Query(default="json", pattern="^(json|prometheus)$")):
+    """
+    Counters for the version-keyed DuckDB query result cache.
+    
+    Returns hits, misses, hit_rate, bytes_saved, time_saved_ms, bypasses by
+    reason, memory/disk usage and evictions. Use format=prometheus for a
+    scrapeable text exposition.
+    """
+    try:
+        from utils.query_cache import get_query_cache_stats as _stats
+    except ImportError:
+        return {"error": "Query cache not available", "available": False}
+    
+    stats = _stats()
+    if format == "prometheus":
+        lines = []
+        for key, value in stats.items():
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            lines.append(f"xlr8_query_cache_{key} {value}")
+        for reason, count in stats['bypassed'].items():
+            lines.append(f'xlr8_query_cache_bypassed{{reason="{reason}"}} {count}')
+        lines.append(f"xlr8_query_cache_enabled {1 if stats.get('enabled') else 0}")
+        return PlainTextResponse("\n".join(lines) + "\n")
+    
+    return {"available": True, **stats}
+
+
+@router.get("/column-sketches")
+async def get_column_sketch_report(project: Optional[str] = None):
+    """
+    Column sketches per table (utils/column_sketches.py).
+    
+    Returns columns (exact vs sketched), rows covered, bytes stored, build
+    time, batch merges, whether the sketches still match the table, and the
+    loosest accuracy bounds over its columns: distinct-count relative error,
+    frequency overcount in rows, and quantile rank error.
+    """
+    try:
+        from utils.column_sketches import get_sketch_store
+        from utils.structured_data_handler import get_structured_handler
+    except ImportError:
+        return {"error": "Column sketches not available", "available": False}
+    
+    try:
+        tables = get_sketch_store(get_structured_handler()).report(project)
+    except Exception as e:
+        logger.error(f"[METRICS-API] Column sketch report failed: {e}")
+        return {"error": str(e), "available": False}
+    return {"available": True, "tables": tables}
+
+
+def _get_maintenance():
+    from utils.duckdb_maintenance import get_maintenance
+    from utils.structured_data_handler import get_structured_handler
+    return get_maintenance(get_structured_handler())
+
+
+@router.get("/duckdb-maintenance")
+async def get_duckdb_maintenance_report():
+    """
+    Background DuckDB maintenance (utils/duckdb_maintenance.py).
+    
+    Returns the policies, pending checkpoint hints by requester, the main
+    file and attached shards with their dead ratio and growth, time and
+    lock time per task, totals (bytes reclaimed, checkpoints, tables
+    analyzed, orphan rows deleted, compactions and why any were abandoned)
+    and the recent runs.
+    """
+    try:
+        maintenance = _get_maintenance()
+        report = await asyncio.to_thread(maintenance.report)
+    except ImportError:
+        return {"error": "DuckDB maintenance not available", "available": False}
+    except Exception as e:
+        logger.error(f"[METRICS-API] Maintenance report failed: {e}")
+        return {"error": str(e), "available": False}
+    return {"available": True, **report}
+
+
+@router.post("/duckdb-maintenance/run")
+async def run_duckdb_maintenance():
+    """
+    Run what's due now without waiting for an idle window: the pending
+    checkpoint, statistics, orphan cleanup and at most one compaction.
+    The policies (dead ratio, growth, minimum size, grace period) still apply.
+    """
+    try:
+        maintenance = _get_maintenance()
+        done = await asyncio.to_thread(maintenance.run_once, True)
+    except ImportError:
+        return {"error": "DuckDB maintenance not available", "available": False}
+    except Exception as e:
+        logger.error(f"[METRICS-API] Maintenance run failed: {e}")
+        return {"error": str(e), "available": False}
+    return {"available": True, "done": done}
+
+
 # =============================================================================
 # COST TRACKING ENDPOINTS
 # =============================================================================
@@ -29,7 +29,6 @@ from typing import Optional, Dict, Any, List
 import logging
 from datetime import datetime, timedelta
 import time
-import threading
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
 logger = logging.getLogger(__name__)
@@ -53,14 +52,12 @@ def _get_read_handler():
         return None
 
 
-# Simple time-based cache for platform status
-_platform_cache = {
-    'data': None,
-    'timestamp': 0,
-    'project': None,
-    'lock': threading.Lock()
-}
+# Keyed stale-while-revalidate cache for platform status (one entry per project/include)
+from backend.utils.keyed_cache import get_keyed_cache, get_keyed_cache_stats, invalidate_keyed_caches
+
 _CACHE_TTL_SECONDS = 30  # Cache for 30 seconds - most data doesn't change that fast
+_CACHE_STALE_SECONDS = 120  # Serve stale up to 2 more minutes while refreshing in background
+_platform_cache = get_keyed_cache('platform', ttl=_CACHE_TTL_SECONDS, stale_ttl=_CACHE_STALE_SECONDS)
 
 
 @router.get("/platform")
@@ -96,22 +93,32 @@ async def get_platform_status(
         include_files = 'files' in parts
         include_relationships = 'relationships' in parts
     
-    # Build cache key that includes the include parameter
-    cache_key = f"{project}:{include or 'none'}"
+    # Cache key: project scope first (for invalidation), then the include set
+    include_key = ','.join(sorted(p for p, on in (('files', include_files), ('relationships', include_relationships)) if on))
+    cache_key = (project, include_key or 'none')
+    
+    response, info = await _platform_cache.get(
+        cache_key,
+        lambda: _build_platform_status(project, include_files, include_relationships),
+        force=force
+    )
     
-    # Check cache first - return cached data if fresh enough
-    now = time.time()
-    if not force:
-        with _platform_cache['lock']:
-            if (_platform_cache['data'] is not None 
-                and _platform_cache['project'] == cache_key
-                and (now - _platform_cache['timestamp']) < _CACHE_TTL_SECONDS):
-                # Return cached data with updated timestamp
-                cached = _platform_cache['data'].copy()
-                cached['_cached'] = True
-                cached['_cache_age_ms'] = int((now - _platform_cache['timestamp']) * 1000)
-                return cached
+    if info['state'] == 'miss':
+        return response
     
+    cached = response.copy()
+    cached['_cached'] = True
+    cached['_cache_age_ms'] = info['age_ms']
+    cached['_stale'] = info['state'] == 'stale'
+    return cached
+
+
+async def _build_platform_status(
+    project: Optional[str],
+    include_files: bool,
+    include_relationships: bool
+) -> Dict[str, Any]:
+    """Build the full platform status response (uncached)."""
     project_filter = project  # Rename for clarity in code below
     
     start_time = time.time()
@@ -752,15 +759,30 @@ async def get_platform_status(
     # =========================================================================
     response["_meta"]["response_time_ms"] = int((time.time() - start_time) * 1000)
     
-    # Cache the response
-    with _platform_cache['lock']:
-        _platform_cache['data'] = response.copy()
-        _platform_cache['timestamp'] = time.time()
-        _platform_cache['project'] = cache_key
-    
     return response
 
 
+@router.get("/platform/cache-stats")
+async def get_platform_cache_stats() -> Dict[str, Any]:
+    """
+    Hit, miss and stale-serve rates for the keyed response caches
+    (platform, dashboard).
+    """
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        "caches": get_keyed_cache_stats()
+    }
+
+
+@router.post("/platform/cache/invalidate")
+async def invalidate_platform_caches(project: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Drop cached platform/dashboard responses for a project (plus global ones),
+    or everything when no project is given.
+    """
+    return {"invalidated": invalidate_keyed_caches(project)}
+
+
 @router.get("/platform/health")
 async def get_platform_health_only() -> Dict[str, Any]:
     """
@@ -3,6 +3,11 @@ Smart Router - Unified Upload Endpoint
 ======================================
 Consolidates all upload paths into a single intelligent router.
 
+v1.5:
+- Uploads stream to disk in chunks with incremental SHA-256 (constant memory)
+- Identical re-uploads (same hash, project, route) reuse the completed job's
+  tables/chunks/result; force_reprocess=true processes again
+
 v1.4 (January 2026):
 - FIXED: Reference docs → SEMANTIC (RAG chunking only, no rule extraction)
 - Regulatory/Compliance docs → STANDARDS (RAG + rule extraction)
@@ -45,16 +50,14 @@ Then update main.py to use this instead of separate routers.
 """
 
 from fastapi import APIRouter, UploadFile, File, Form, HTTPException, BackgroundTasks, Request
+from fastapi.concurrency import run_in_threadpool
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 from enum import Enum
-import os
 import re
 import json
 import logging
-import tempfile
 import shutil
-import hashlib
 import time
 
 logger = logging.getLogger(__name__)
@@ -116,6 +119,9 @@ MODELS_AVAILABLE = True
 from utils.text_extraction import extract_text
 TEXT_EXTRACTION_AVAILABLE = True
 
+# Upload spooling + content-hash dedup
+from backend.utils.upload_spool import spool_upload, find_prior_ingest
+
 # Job Queue - SEQUENTIAL processing to prevent Ollama/LLM overload
 from backend.routers.upload import job_queue
 JOB_QUEUE_AVAILABLE = True
@@ -258,6 +264,8 @@ async def smart_upload(
     title: Optional[str] = Form(None),
     # Async control
     async_mode: bool = Form(default=True),
+    # Dedup control - process again even if identical content was already ingested
+    force_reprocess: bool = Form(default=False),
 ):
     """
     Smart Upload Router - Single entry point for all file uploads.
@@ -271,6 +279,10 @@ async def smart_upload(
     
     The router analyzes the file and routes to the appropriate processor,
     ensuring consistent registration and lineage tracking regardless of path.
+    
+    Structured/semantic uploads whose content (SHA-256) was already ingested
+    for the project return the prior job instead of re-parsing, unless
+    force_reprocess is set.
     """
     
     # =================================================================
@@ -323,19 +335,16 @@ async def smart_upload(
         logger.warning(f"[SMART-ROUTER] Could not extract user info: {e}")
     
     # =================================================================
-    # SAVE FILE TEMPORARILY
+    # SAVE FILE TEMPORARILY (streamed to disk, hashed as it is copied)
     # =================================================================
-    content = await file.read()
-    file_size = len(content)
-    file_hash = hashlib.sha256(content).hexdigest()
-    
-    temp_dir = tempfile.mkdtemp()
-    file_path = os.path.join(temp_dir, filename)
-    
-    with open(file_path, 'wb') as f:
-        f.write(content)
+    upload = await spool_upload(file, filename)
+    file_size = upload.size
+    file_hash = upload.sha256
+    temp_dir = upload.temp_dir
+    file_path = upload.path
     
-    logger.warning(f"[SMART-ROUTER] Saved {file_size} bytes to {file_path}")
+    logger.warning(f"[SMART-ROUTER] Saved {file_size} bytes to {file_path} "
+                   f"({upload.bytes_per_second / 1e6:.0f} MB/s)")
     
     # =================================================================
     # DETECT ROUTING
@@ -381,6 +390,22 @@ async def smart_upload(
         except Exception as e:
             logger.warning(f"[SMART-ROUTER] Could not resolve project: {e}")
     
+    # =================================================================
+    # DEDUP - identical content already ingested for this project/route
+    # =================================================================
+    if proc_type == ProcessingType.STRUCTURED:
+        dedup_route = 'structured'
+    elif proc_type in (ProcessingType.REGISTER, ProcessingType.STANDARDS):
+        dedup_route = None
+    else:
+        dedup_route = 'semantic'
+    
+    if dedup_route and not force_reprocess:
+        prior = await run_in_threadpool(find_prior_ingest, file_hash, project, dedup_route)
+        if prior:
+            upload.cleanup()
+            return prior.to_response(filename)
+    
     # =================================================================
     # ROUTE TO PROCESSOR (with metrics)
     # =================================================================
@@ -410,7 +435,6 @@ async def smart_upload(
             result = await _route_to_standards(
                 file_path=file_path,
                 filename=filename,
-                content=content,
                 file_size=file_size,
                 extension=extension,
                 domain=domain,
@@ -628,7 +652,6 @@ def _extract_text_from_excel(file_path: str) -> str:
 async def _route_to_standards(
     file_path: str,
     filename: str,
-    content: bytes,
     file_size: int,
     extension: str,
     domain: str,
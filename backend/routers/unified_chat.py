@@ -162,6 +162,9 @@ DOMAIN_INFERENCE_AVAILABLE = True
 from utils.database.supabase_client import get_supabase
 SUPABASE_AVAILABLE = True
 
+# Request tracing (spans around the lookups below; see utils/tracing.py)
+from utils.tracing import current_span, span
+
 # CustomerResolver - Single source of truth for customer identification
 from backend.utils.customer_resolver import CustomerResolver
 CUSTOMER_RESOLVER_AVAILABLE = True
@@ -640,7 +643,8 @@ def _get_project_domains(project: str, handler=None) -> Tuple[Optional[str], Lis
         if SUPABASE_AVAILABLE:
             try:
                 supabase = get_supabase()
-                result = supabase.table('customers').select('id, metadata').eq('name', project).execute()
+                with span('supabase.select', table='customers'):
+                    result = supabase.table('customers').select('id, metadata').eq('name', project).execute()
                 if result.data:
                     customer_id = result.data[0].get('id')
                     # Check if domains already computed
@@ -799,7 +803,8 @@ async def unified_chat(request: UnifiedChatRequest):
     if identifier and CUSTOMER_RESOLVER_AVAILABLE:
         try:
             resolver = CustomerResolver()
-            customer = resolver.resolve(identifier)
+            with span('supabase.resolve_customer'):
+                customer = resolver.resolve(identifier)
             if customer:
                 customer_id = customer.get('id')
                 customer_name = customer.get('name')
@@ -811,6 +816,7 @@ async def unified_chat(request: UnifiedChatRequest):
     # For backward compatibility, fall back to identifier as project name
     project = customer_name or identifier
     session_id, session = get_or_create_session(request.session_id, project)
+    current_span().set_attributes(project=project, session_id=session_id)
     
     logger.warning(f"[UNIFIED] ===== NEW REQUEST =====")
     logger.warning(f"[UNIFIED] Message: {message[:100]}...")
@@ -831,7 +837,8 @@ async def unified_chat(request: UnifiedChatRequest):
         if customer_id and SUPABASE_AVAILABLE:
             try:
                 supabase = get_supabase()
-                result = supabase.table('customers').select('metadata').eq('id', customer_id).limit(1).execute()
+                with span('supabase.select', table='customers'):
+                    result = supabase.table('customers').select('metadata').eq('id', customer_id).limit(1).execute()
                 if result.data:
                     metadata = result.data[0].get('metadata', {}) or {}
                     product_id = metadata.get('product')
@@ -912,10 +919,12 @@ async def unified_chat(request: UnifiedChatRequest):
             try:
                 handler = get_structured_handler()
                 if handler and handler.conn:
-                    schema = await get_project_schema(project, request.scope, handler)
+                    with span('chat.project_schema'):
+                        schema = await get_project_schema(project, request.scope, handler)
                     
                     # Always initialize engine - ChromaDB works even without DuckDB tables
-                    engine.load_context(structured_handler=handler, schema=schema, rag_handler=rag)
+                    with span('chat.load_context'):
+                        engine.load_context(structured_handler=handler, schema=schema, rag_handler=rag)
                     
                     if schema['tables']:
                         logger.info(f"[UNIFIED] Loaded {len(schema['tables'])} tables")
@@ -937,9 +946,10 @@ async def unified_chat(request: UnifiedChatRequest):
         if SUPABASE_AVAILABLE:
             try:
                 supabase = get_supabase()
-                result = supabase.table('project_relationships').select('*').eq(
-                    'customer_id', project
-                ).in_('status', ['confirmed', 'auto_confirmed']).execute()
+                with span('supabase.select', table='project_relationships'):
+                    result = supabase.table('project_relationships').select('*').eq(
+                        'customer_id', project
+                    ).in_('status', ['confirmed', 'auto_confirmed']).execute()
                 
                 if result.data:
                     engine.relationships = result.data
@@ -1237,6 +1247,9 @@ async def unified_chat(request: UnifiedChatRequest):
                 "methodology": None         # Human-readable explanation
             },
             
+            # Concurrent gathering: per-gatherer status/latency, which timed out
+            "gather": getattr(answer, 'gather_metadata', None),
+            
             # Learning
             "used_learning": learned_sql is not None,
             
@@ -320,19 +320,22 @@ def extract_text(file_path: str) -> str:
             # ENHANCED PDF EXTRACTION - try multiple methods
             text = ""
             pages_extracted = 0
+            text_pages = {}  # page number -> section, from the text-layer method whose text was kept
+            page_count = 0
             
             # Method 1: Try pdfplumber first (best for tables and structured PDFs)
             try:
                 import pdfplumber
                 logger.info("[PDF] Trying pdfplumber extraction...")
                 with pdfplumber.open(file_path) as pdf:
-                    page_texts = []
+                    page_texts = {}
                     for i, page in enumerate(pdf.pages):
                         page_text = page.extract_text() or ''
                         if page_text.strip():
-                            page_texts.append(f"--- Page {i+1} ---\n{page_text}")
+                            page_texts[i + 1] = f"--- Page {i+1} ---\n{page_text}"
                             pages_extracted += 1
-                    text = "\n\n".join(page_texts)
+                    text = "\n\n".join(page_texts.values())
+                    text_pages, page_count = page_texts, len(pdf.pages)
                     logger.info(f"[PDF] pdfplumber extracted {pages_extracted} pages, {len(text)} chars")
             except Exception as e:
                 logger.warning(f"[PDF] pdfplumber failed: {e}")
@@ -343,16 +346,18 @@ def extract_text(file_path: str) -> str:
                     import fitz  # PyMuPDF
                     logger.info("[PDF] Trying PyMuPDF extraction...")
                     doc = fitz.open(file_path)
-                    page_texts = []
+                    page_texts = {}
                     for i, page in enumerate(doc):
                         page_text = page.get_text()
                         if page_text.strip():
-                            page_texts.append(f"--- Page {i+1} ---\n{page_text}")
+                            page_texts[i + 1] = f"--- Page {i+1} ---\n{page_text}"
                             pages_extracted += 1
+                    fitz_pages = doc.page_count
                     doc.close()
-                    fitz_text = "\n\n".join(page_texts)
+                    fitz_text = "\n\n".join(page_texts.values())
                     if len(fitz_text) > len(text):
                         text = fitz_text
+                        text_pages, page_count = page_texts, fitz_pages
                         logger.info(f"[PDF] PyMuPDF extracted {pages_extracted} pages, {len(text)} chars")
                 except Exception as e:
                     logger.warning(f"[PDF] PyMuPDF failed: {e}")
@@ -363,20 +368,46 @@ def extract_text(file_path: str) -> str:
                     logger.info("[PDF] Trying PyPDF2 extraction...")
                     with open(file_path, 'rb') as f:
                         pdf = PyPDF2.PdfReader(f)
-                        page_texts = []
+                        page_texts = {}
                         for i, page in enumerate(pdf.pages):
                             page_text = page.extract_text() or ''
                             if page_text.strip():
-                                page_texts.append(f"--- Page {i+1} ---\n{page_text}")
+                                page_texts[i + 1] = f"--- Page {i+1} ---\n{page_text}"
                                 pages_extracted += 1
-                        pypdf_text = "\n\n".join(page_texts)
+                        pypdf_text = "\n\n".join(page_texts.values())
                         if len(pypdf_text) > len(text):
                             text = pypdf_text
+                            text_pages, page_count = page_texts, len(pdf.pages)
                             logger.info(f"[PDF] PyPDF2 extracted {pages_extracted} pages, {len(text)} chars")
                 except Exception as e:
                     logger.warning(f"[PDF] PyPDF2 failed: {e}")
             
             # Method 4: OCR fallback for image-based PDFs (print-to-PDF, scanned docs)
+            # Page pipeline: every page, OCR in parallel with adaptive DPI and a page cache.
+            # Mixed PDFs (text pages plus scans) keep their text pages and gain the scans.
+            if len(text) < 100 or len(text_pages) < page_count:
+                try:
+                    from utils.pdf_ocr import extract_pdf_pages, is_available as pdf_pages_available
+                    if pdf_pages_available():
+                        extraction = extract_pdf_pages(file_path)
+                        if len(text) >= 100:
+                            logger.info(f"[PDF] {page_count - len(text_pages)} of {page_count} pages have no text layer")
+                            merged = dict(text_pages)
+                            merged.update({p.page: f"--- PAGE {p.page} ---\n{p.text}" for p in extraction.pages
+                                           if p.page not in text_pages and p.text.strip()})
+                            page_texts = [merged[n] for n in sorted(merged)]
+                        else:
+                            page_texts = [f"--- PAGE {p.page} ---\n{p.text}" for p in extraction.pages if p.text.strip()]
+                        ocr_text = "\n\n".join(page_texts)
+                        if len(ocr_text) > len(text):
+                            text = ocr_text
+                            pages_extracted = len(page_texts)
+                            logger.info(f"[PDF] Page pipeline extracted {pages_extracted} pages, {len(text)} chars "
+                                        f"{extraction.report()['methods']}")
+                except Exception as e:
+                    logger.warning(f"[PDF] Page pipeline failed: {e}")
+            
+            # Legacy serial OCR (first 20 pages at 100 dpi) when the page pipeline is unavailable
             if len(text) < 100:
                 try:
                     from pdf2image import convert_from_path
@@ -728,6 +759,22 @@ def run_intelligence_analysis(project: str, handler, job_id: str) -> dict:
         except Exception as cg_e:
             logger.warning(f"[INTELLIGENCE] Context graph compute failed: {cg_e}")
         
+        # =====================================================
+        # WORKFORCE CUBE - Precompute headcount aggregates
+        # Rebuilt only when the employee table's version changed
+        # =====================================================
+        try:
+            from backend.utils.intelligence.workforce_cube import refresh_workforce_cube
+            cube_result = refresh_workforce_cube(handler, project)
+            if cube_result.get('built'):
+                logger.info(f"[INTELLIGENCE] Workforce cube built: {cube_result.get('cube_rows')} rows "
+                            f"in {cube_result.get('build_ms')}ms")
+                ProcessingJobModel.update_progress(job_id, 87, "✅ Workforce metrics precomputed")
+            else:
+                logger.info(f"[INTELLIGENCE] Workforce cube skipped: {cube_result.get('reason')}")
+        except Exception as cube_e:
+            logger.warning(f"[INTELLIGENCE] Workforce cube refresh failed: {cube_e}")
+        
         return intelligence_summary
         
     except Exception as e:
@@ -2036,12 +2083,15 @@ COMPLIANCE_ENGINE_AVAILABLE = True
 @router.post("/standards/compliance/check/{customer_id}")
 async def run_compliance_check(
     customer_id: str,
-    domain: Optional[str] = None
+    domain: Optional[str] = None,
+    force_full: bool = False
 ):
     """
     Run compliance check against a project's data.
     
     Uses extracted rules to check for violations in the project's data.
+    Rules whose definition and input tables are unchanged since the last scan
+    are reused; pass force_full=true to re-evaluate everything.
     Returns findings in Five C's format (Condition, Criteria, Cause, Consequence, Corrective Action).
     """
     try:
@@ -2075,7 +2125,7 @@ async def run_compliance_check(
         
         # Run compliance scan via engine
         engine = get_compliance_engine()
-        result = engine.run_compliance_scan(customer_id)
+        result = engine.run_compliance_scan(customer_id, force_full=force_full)
         
         findings = result.get('findings', [])
         check_results = result.get('check_results', [])
@@ -2098,6 +2148,7 @@ async def run_compliance_check(
             "findings_count": len(findings),
             "findings": findings,
             "check_results": check_results,
+            "scan_plan": result.get('scan_plan', {}),
             # Legacy fields for backwards compatibility
             "compliant_count": passed
         }
@@ -0,0 +1,675 @@
+"""
+BI Transforms - SQL Push-Down and Cached Lookup Dictionaries
+=============================================================
+
+Export transforms (state names, lookups, currency/percent formatting,
+combine, split, filters) used to run in Python over every row of the query
+result, after reloading every lookup table of the project on each export.
+Large exports spent most of their time in those per-row loops.
+
+This module:
+
+- compiles the transform list into SQL wrapped around the user's query, so
+  DuckDB does the per-row work: lookup joins, concat_ws, string_split,
+  format(). Only transforms it can express with *identical* results are
+  pushed down; from the first one it cannot (titlecase, uppercase,
+  calculated formulas, type combinations where DuckDB and Python render
+  values differently) the rest run in Python on the SQL result.
+- caches each project's lookup dictionaries, keyed by a version of the
+  lookup tables, and dropped whenever an upload/job completes (keyed cache
+  invalidation) - exports no longer rescan every lookup table.
+
+apply_python_transforms() is the reference implementation; the push-down
+path must return the same rows, columns and renames (tests compare the two
+on a fixture set).
+
+Settings:
+    XLR8_BI_TRANSFORM_PUSHDOWN   - compile transforms to SQL (default true)
+    XLR8_BI_LOOKUP_CACHE_TTL     - lookup dictionary cache TTL seconds (default 300)
+
+Deploy to: backend/utils/bi_transforms.py
+"""
+
+import os
+import re
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+from backend.utils.keyed_cache import get_keyed_cache
+
+PUSHDOWN_ENABLED = os.getenv('XLR8_BI_TRANSFORM_PUSHDOWN', 'true').lower() in ('1', 'true', 'yes')
+LOOKUP_CACHE_TTL = float(os.getenv('XLR8_BI_LOOKUP_CACHE_TTL', '300'))
+
+_lookup_cache = get_keyed_cache('bi_lookups', ttl=LOOKUP_CACHE_TTL, stale_ttl=LOOKUP_CACHE_TTL)
+
+# Table name fragments that mark a table as a code -> description lookup
+LOOKUP_TABLE_PATTERNS = ['lookup', 'code', 'ref', '_lkp']
+
+
+# =============================================================================
+# PYTHON TRANSFORMS (reference implementation)
+# =============================================================================
+
+# US State code → name mapping (for state_names transform)
+STATE_NAMES = {
+    'AL': 'Alabama', 'AK': 'Alaska', 'AZ': 'Arizona', 'AR': 'Arkansas',
+    'CA': 'California', 'CO': 'Colorado', 'CT': 'Connecticut', 'DE': 'Delaware',
+    'FL': 'Florida', 'GA': 'Georgia', 'HI': 'Hawaii', 'ID': 'Idaho',
+    'IL': 'Illinois', 'IN': 'Indiana', 'IA': 'Iowa', 'KS': 'Kansas',
+    'KY': 'Kentucky', 'LA': 'Louisiana', 'ME': 'Maine', 'MD': 'Maryland',
+    'MA': 'Massachusetts', 'MI': 'Michigan', 'MN': 'Minnesota', 'MS': 'Mississippi',
+    'MO': 'Missouri', 'MT': 'Montana', 'NE': 'Nebraska', 'NV': 'Nevada',
+    'NH': 'New Hampshire', 'NJ': 'New Jersey', 'NM': 'New Mexico', 'NY': 'New York',
+    'NC': 'North Carolina', 'ND': 'North Dakota', 'OH': 'Ohio', 'OK': 'Oklahoma',
+    'OR': 'Oregon', 'PA': 'Pennsylvania', 'RI': 'Rhode Island', 'SC': 'South Carolina',
+    'SD': 'South Dakota', 'TN': 'Tennessee', 'TX': 'Texas', 'UT': 'Utah',
+    'VT': 'Vermont', 'VA': 'Virginia', 'WA': 'Washington', 'WV': 'West Virginia',
+    'WI': 'Wisconsin', 'WY': 'Wyoming', 'DC': 'District of Columbia'
+}
+
+
+def apply_python_transforms(data: List[Dict], columns: List[str], transforms: List[Any],
+                            lookups: Dict[str, Dict[str, str]],
+                            formula_columns: Optional[List[str]] = None) -> tuple:
+    """
+    Apply transforms row by row in Python.
+
+    formula_columns: columns substituted into 'calculated' formulas (default:
+        columns) - the original query columns when this runs after push-down.
+
+    Returns: (transformed_data, new_columns, column_renames)
+    """
+    if not transforms:
+        return data, columns, {}
+
+    result = [row.copy() for row in data]
+    new_columns = list(columns)
+    column_renames = {}  # original -> display name
+    formula_columns = columns if formula_columns is None else formula_columns
+
+    for transform in transforms:
+        t_type = transform.type
+        col = transform.column
+        params = transform.params or {}
+
+        if t_type == 'rename':
+            # Rename column header
+            new_name = params.get('new_name', col)
+            column_renames[col] = new_name
+
+        elif t_type == 'state_names':
+            # Convert state codes to full names
+            for row in result:
+                if col in row and row[col]:
+                    code = str(row[col]).upper().strip()
+                    row[col] = STATE_NAMES.get(code, row[col])
+
+        elif t_type == 'format_currency':
+            # Format as $X,XXX.XX
+            for row in result:
+                if col in row and row[col] is not None:
+                    try:
+                        val = float(row[col])
+                        row[col] = f"${val:,.2f}"
+                    except (ValueError, TypeError):
+                        pass
+
+        elif t_type == 'format_percent':
+            # Format as XX.X%
+            for row in result:
+                if col in row and row[col] is not None:
+                    try:
+                        val = float(row[col])
+                        row[col] = f"{val * 100:.1f}%"
+                    except (ValueError, TypeError):
+                        pass
+
+        elif t_type == 'uppercase':
+            for row in result:
+                if col in row and row[col]:
+                    row[col] = str(row[col]).upper()
+
+        elif t_type == 'titlecase':
+            for row in result:
+                if col in row and row[col]:
+                    row[col] = str(row[col]).title()
+
+        elif t_type == 'map_lookup':
+            # Map codes to descriptions using lookup table
+            lookup_table = params.get('lookup_table', '').lower()
+            if lookup_table in lookups:
+                lookup = lookups[lookup_table]
+                for row in result:
+                    if col in row and row[col]:
+                        code = str(row[col])
+                        row[col] = lookup.get(code, code)
+
+        elif t_type == 'combine':
+            # Combine multiple columns
+            source_cols = params.get('columns', [])
+            separator = params.get('separator', ' ')
+            new_col = params.get('new_column', f"{col}_combined")
+
+            for row in result:
+                parts = [str(row.get(c, '')) for c in source_cols if row.get(c)]
+                row[new_col] = separator.join(parts)
+
+            if new_col not in new_columns:
+                new_columns.append(new_col)
+
+        elif t_type == 'split':
+            # Split column by delimiter
+            delimiter = params.get('delimiter', ',')
+            new_col_names = params.get('new_columns', [f"{col}_1", f"{col}_2"])
+
+            for row in result:
+                if col in row and row[col]:
+                    parts = str(row[col]).split(delimiter)
+                    for i, new_col in enumerate(new_col_names):
+                        row[new_col] = parts[i].strip() if i < len(parts) else ''
+
+            for nc in new_col_names:
+                if nc not in new_columns:
+                    new_columns.append(nc)
+
+        elif t_type == 'calculated':
+            # Add calculated column
+            formula = params.get('formula', '')
+            new_col = params.get('new_column', 'calculated')
+
+            # Simple formula parsing (col1 + col2, col1 * 100, etc.)
+            for row in result:
+                try:
+                    # Replace column names with values
+                    expr = formula
+                    for c in formula_columns:
+                        if c in expr:
+                            val = row.get(c, 0)
+                            if val is None:
+                                val = 0
+                            expr = expr.replace(c, str(float(val)))
+                    row[new_col] = eval(expr)  # Safe because we control the formula
+                except Exception:
+                    row[new_col] = None
+
+            if new_col not in new_columns:
+                new_columns.append(new_col)
+
+        elif t_type == 'filter':
+            # Filter rows
+            filter_col = params.get('column', col)
+            operator = params.get('operator', '=')
+            value = params.get('value')
+
+            def matches(row_val):
+                if operator == '=':
+                    return str(row_val) == str(value)
+                elif operator == '!=':
+                    return str(row_val) != str(value)
+                elif operator == '>':
+                    return float(row_val) > float(value)
+                elif operator == '<':
+                    return float(row_val) < float(value)
+                elif operator == 'contains':
+                    return str(value).lower() in str(row_val).lower()
+                return True
+
+            result = [row for row in result if filter_col in row and matches(row[filter_col])]
+
+    return result, new_columns, column_renames
+
+
+# =============================================================================
+# LOOKUP DICTIONARIES
+# =============================================================================
+
+def _quote(identifier: str) -> str:
+    return '"' + str(identifier).replace('"', '""') + '"'
+
+
+def project_table_prefixes(project: str) -> List[str]:
+    """Table name prefixes of a project (tables use the first 8 UUID chars without hyphens)."""
+    project_clean = (project or '').strip()
+    prefixes = [
+        project_clean.lower(),
+        project_clean.lower().replace(' ', '_'),
+        project_clean.lower().replace('-', '_'),
+        # Handle UUID-based customer IDs: extract first 8 chars without hyphens
+        project_clean.replace('-', '')[:8].lower() if '-' in project_clean else None,
+    ]
+    return [p for p in prefixes if p]
+
+
+def find_lookup_tables(handler, project: str) -> List[Tuple[str, str, str]]:
+    """(table_name, code_column, description_column) for each lookup table of a project."""
+    prefixes = project_table_prefixes(project)
+    found = []
+    with handler._db_lock:
+        all_tables = handler.conn.execute("SHOW TABLES").fetchall()
+        for (table_name,) in all_tables:
+            table_lower = table_name.lower()
+            if table_name.startswith('_') or not any(table_lower.startswith(p) for p in prefixes):
+                continue
+            if not any(p in table_lower for p in LOOKUP_TABLE_PATTERNS):
+                continue
+            try:
+                columns = [r[1] for r in handler.conn.execute(f'PRAGMA table_info({_quote(table_name)})').fetchall()]
+            except Exception:
+                continue
+            if len(columns) >= 2:
+                found.append((table_name, columns[0], columns[1]))
+    return found
+
+
+def load_lookup_dictionaries(handler, project: str) -> Dict[str, Dict[str, str]]:
+    """Load {table_name_lower: {code: description}} for a project's lookup tables (uncached)."""
+    lookups = {}
+    if not handler or not getattr(handler, 'conn', None) or not project:
+        return lookups
+    try:
+        for table_name, code_col, desc_col in find_lookup_tables(handler, project):
+            try:
+                rows = handler.query(f'SELECT {_quote(code_col)}, {_quote(desc_col)} FROM {_quote(table_name)}')
+                lookups[table_name.lower()] = {str(r[code_col]): str(r[desc_col]) for r in rows}
+            except Exception:
+                pass
+    except Exception as e:
+        logger.warning(f"[BI] Could not load lookups: {e}")
+    return lookups
+
+
+def lookup_tables_version(handler, project: str) -> str:
+    """
+    Cheap fingerprint of a project's lookup tables: names, sizes and their
+    _schema_metadata entries. Changes when a lookup table is (re)loaded.
+    """
+    tables = find_lookup_tables(handler, project)
+    if not tables:
+        return 'none'
+    names = [t[0] for t in tables]
+    placeholders = ', '.join('?' for _ in names)
+    parts = []
+    with handler._db_lock:
+        sizes = handler.conn.execute(f"""
+            SELECT table_name, estimated_size, column_count FROM duckdb_tables()
+            WHERE table_name IN ({placeholders}) ORDER BY table_name
+        """, names).fetchall()
+        parts.extend(f"{n}:{s}:{c}" for n, s, c in sizes)
+        try:
+            meta = handler.conn.execute(f"""
+                SELECT COUNT(*), MAX(created_at) FROM _schema_metadata
+                WHERE LOWER(table_name) IN ({placeholders})
+            """, [n.lower() for n in names]).fetchone()
+            parts.append(f"{meta[0]}:{meta[1]}")
+        except Exception:
+            pass  # no metadata table (tests, fresh databases)
+    return '|'.join(parts)
+
+
+async def get_lookup_dictionaries(handler, project: str) -> Dict[str, Dict[str, str]]:
+    """Lookup dictionaries for a project, cached until the lookup tables change."""
+    if not handler or not getattr(handler, 'conn', None) or not project:
+        return {}
+    try:
+        version = lookup_tables_version(handler, project)
+    except Exception as e:
+        logger.warning(f"[BI] Could not version lookups, loading uncached: {e}")
+        return load_lookup_dictionaries(handler, project)
+    lookups, info = await _lookup_cache.get((project, version), lambda: load_lookup_dictionaries(handler, project))
+    logger.debug(f"[BI] Lookups for {project}: {len(lookups)} tables ({info['state']})")
+    return lookups
+
+
+def invalidate_lookup_dictionaries(project: Optional[str] = None) -> int:
+    """Drop cached lookup dictionaries (all projects when project is None)."""
+    return _lookup_cache.invalidate(project)
+
+
+# =============================================================================
+# SQL COMPILER
+# =============================================================================
+
+# Characters str.strip() removes (str.isspace()); DuckDB's trim() defaults to spaces only
+PY_WHITESPACE = ('\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f \x85\xa0\u1680\u2000\u2001\u2002\u2003\u2004\u2005'
+                 '\u2006\u2007\u2008\u2009\u200a\u2028\u2029\u202f\u205f\u3000')
+_WS_CLASS = '[' + ''.join(f'\\x{{{ord(c):x}}}' for c in PY_WHITESPACE) + ']'
+
+
+def _py_strip(expr: str) -> str:
+    """SQL for str.strip() (a regex is several times faster than trim() with a character set)."""
+    return f"regexp_replace({expr}, '^{_WS_CLASS}+|{_WS_CLASS}+$', '', 'g')"
+
+ROW_NUMBER_COLUMN = '__xlr8_row'
+
+# Column kinds, by DuckDB type, whose values DuckDB renders exactly like Python's str()
+_STR_EXACT = {'text', 'int', 'decimal', 'date'}
+_NUMERIC = {'int', 'decimal', 'float'}
+_INT_TYPES = {'TINYINT', 'SMALLINT', 'INTEGER', 'BIGINT', 'HUGEINT',
+              'UTINYINT', 'USMALLINT', 'UINTEGER', 'UBIGINT', 'UHUGEINT'}
+
+
+def column_kind(duckdb_type: str) -> str:
+    """Classify a DuckDB column type for push-down decisions."""
+    t = (duckdb_type or '').upper()
+    if t == 'VARCHAR':
+        return 'text'
+    if t in _INT_TYPES:
+        return 'int'
+    if t in ('DOUBLE', 'FLOAT'):
+        return 'float'
+    if t == 'DATE':
+        return 'date'
+    m = re.match(r'DECIMAL\((\d+),\s*\d+\)', t)
+    # Wider decimals don't convert to DOUBLE with a single rounding like float(Decimal) does
+    if m and int(m.group(1)) <= 15:
+        return 'decimal'
+    return 'other'
+
+
+@dataclass
+class CompiledTransforms:
+    """SQL for the pushed-down transform prefix and what is left for Python."""
+    sql: str
+    params: Dict[str, Any]
+    columns: List[str]
+    renames: Dict[str, str]
+    pushed: List[str] = field(default_factory=list)
+    remaining: List[Any] = field(default_factory=list)
+    filtered: bool = False
+
+
+class _Builder:
+    """Stacks one SELECT per transform around the source query."""
+
+    def __init__(self, sql: str, column_kinds: Dict[str, str]):
+        self.sql = sql
+        self.kinds = dict(column_kinds)
+        self.params: Dict[str, Any] = {}
+        self.stage = 0
+        self.ordered = False
+        self.filtered = False
+
+    def param(self, value: Any) -> str:
+        name = f"p{len(self.params)}"
+        self.params[name] = value
+        return f"${name}"
+
+    @property
+    def alias(self) -> str:
+        return f"_s{self.stage}"
+
+    def ref(self, column: str) -> str:
+        return f"{self.alias}.{_quote(column)}"
+
+    def truthy(self, column: str) -> Optional[str]:
+        """SQL for Python truthiness of a column value, None if not expressible."""
+        kind, ref = self.kinds.get(column), self.ref(column)
+        if kind == 'text':
+            return f"({ref} IS NOT NULL AND {ref} <> '')"
+        if kind in _NUMERIC:
+            return f"({ref} IS NOT NULL AND {ref} <> 0)"
+        if kind == 'date':
+            return f"({ref} IS NOT NULL)"
+        return None
+
+    def _row_column(self) -> List[str]:
+        return [f"{self.alias}.{ROW_NUMBER_COLUMN}"] if self.ordered else []
+
+    def project(self, exprs: Dict[str, str], kinds: Dict[str, str], join: str = ''):
+        """New stage selecting exprs (column -> SQL expression over the current stage)."""
+        select = [f"{expr} AS {_quote(col)}" for col, expr in exprs.items()] + self._row_column()
+        self.sql = f"SELECT {', '.join(select)}\nFROM ({self.sql}) AS {self.alias}{join}"
+        self.kinds = kinds
+        self.stage += 1
+
+    def where(self, condition: str):
+        self.sql = f"SELECT * FROM ({self.sql}) AS {self.alias}\nWHERE {condition}"
+        self.stage += 1
+        self.filtered = True
+
+    def number_rows(self):
+        """Join stages don't keep row order; number the rows once and sort at the end."""
+        if not self.ordered:
+            cols = ', '.join(self.ref(c) for c in self.kinds)
+            self.sql = (f"SELECT {cols}, row_number() OVER () AS {ROW_NUMBER_COLUMN}\n"
+                        f"FROM ({self.sql}) AS {self.alias}")
+            self.stage += 1
+            self.ordered = True
+
+    def final_sql(self) -> str:
+        cols = ', '.join(self.ref(c) for c in self.kinds)
+        order = f"\nORDER BY {self.alias}.{ROW_NUMBER_COLUMN}" if self.ordered else ''
+        return f"SELECT {cols}\nFROM ({self.sql}) AS {self.alias}{order}"
+
+
+def _is_str_list(value: Any) -> bool:
+    return isinstance(value, (list, tuple)) and all(isinstance(v, str) for v in value)
+
+
+def _push_dictionary(b: _Builder, col: str, key: Callable[[str], str], mapping: Dict[str, str]):
+    """Replace truthy values of col found in mapping (looked up by key(column_sql)), keep the rest."""
+    b.number_rows()
+    lk = f"_l{b.stage}"
+    keys, values = b.param(list(mapping.keys())), b.param(list(mapping.values()))
+    exprs = {c: b.ref(c) for c in b.kinds}
+    exprs[col] = f"CASE WHEN {b.truthy(col)} THEN COALESCE({lk}.v, {b.ref(col)}) ELSE {b.ref(col)} END"
+    join = (f"\nLEFT JOIN (SELECT unnest({keys}::VARCHAR[]) AS k, unnest({values}::VARCHAR[]) AS v) AS {lk}"
+            f" ON {key(b.ref(col))} = {lk}.k")
+    b.project(exprs, dict(b.kinds), join)
+
+
+def _push_transform(b: _Builder, transform: Any, later: List[Any],
+                    lookups: Dict[str, Dict[str, str]], renames: Dict[str, str]) -> bool:
+    """Add one transform to the builder. False if it can't be pushed exactly."""
+    t_type = transform.type
+    col = transform.column
+    params = transform.params or {}
+    kinds = b.kinds
+
+    if t_type == 'rename':
+        renames[col] = params.get('new_name', col)
+        return True
+
+    if t_type == 'state_names':
+        if kinds.get(col) != 'text':
+            return False
+        # str.upper() uses full case mapping; of its multi-letter results only the
+        # 'ﬂ' ligature spells a state code, DuckDB's upper() leaves it as is
+        _push_dictionary(b, col, lambda ref: f"upper(replace({_py_strip(ref)}, '\ufb02', 'FL'))", STATE_NAMES)
+        return True
+
+    if t_type in ('format_currency', 'format_percent'):
+        if col not in kinds:
+            return True  # no-op: column absent from every row
+        if kinds[col] not in _NUMERIC:
+            return False
+        value = f"CAST({b.ref(col)} AS DOUBLE)"
+        formatted = (f"format('${{:,.2f}}', {value})" if t_type == 'format_currency'
+                     else f"format('{{:.1f}}%', {value} * 100)")
+        exprs = {c: b.ref(c) for c in kinds}
+        exprs[col] = f"CASE WHEN {b.ref(col)} IS NULL THEN NULL ELSE {formatted} END"
+        b.project(exprs, {**kinds, col: 'text'})
+        return True
+
+    if t_type == 'map_lookup':
+        lookup_table = params.get('lookup_table', '')
+        if not isinstance(lookup_table, str):
+            return False
+        if lookup_table.lower() not in lookups or col not in kinds:
+            return True  # no-op
+        if kinds[col] != 'text':
+            return False
+        _push_dictionary(b, col, lambda ref: ref, lookups[lookup_table.lower()])
+        return True
+
+    if t_type == 'combine':
+        source_cols = params.get('columns', [])
+        separator = params.get('separator', ' ')
+        new_col = params.get('new_column', f"{col}_combined")
+        if not _is_str_list(source_cols) or not isinstance(separator, str) or not isinstance(new_col, str):
+            return False
+        present = [c for c in source_cols if c in kinds]  # missing columns are skipped
+        if any(kinds[c] not in _STR_EXACT for c in present):
+            return False
+        parts = [f"CASE WHEN {b.truthy(c)} THEN CAST({b.ref(c)} AS VARCHAR) END" for c in present]
+        exprs = {c: b.ref(c) for c in kinds}
+        exprs[new_col] = f"concat_ws({', '.join([b.param(separator)] + parts)})" if parts else "''"
+        b.project(exprs, {**kinds, new_col: 'text'})
+        return True
+
+    if t_type == 'split':
+        delimiter = params.get('delimiter', ',')
+        new_col_names = params.get('new_columns', [f"{col}_1", f"{col}_2"])
+        if not isinstance(delimiter, str) or not delimiter or not _is_str_list(new_col_names):
+            return False
+        if kinds.get(col) != 'text' or any(kinds.get(nc, 'text') != 'text' for nc in new_col_names):
+            return False
+        # Rows with an empty value get no new keys in Python; SQL yields ''. Both export
+        # as '', but a later filter on a new column would tell them apart.
+        created = set(new_col_names) - set(kinds)
+        if any(t.type == 'filter' and (t.params or {}).get('column', t.column) in created for t in later):
+            return False
+        parts = f"string_split({b.ref(col)}, {b.param(delimiter)})"
+        exprs = {c: b.ref(c) for c in kinds}
+        for i, nc in enumerate(new_col_names):
+            otherwise = b.ref(nc) if nc in kinds else "''"
+            exprs[nc] = (f"CASE WHEN {b.truthy(col)} THEN COALESCE({_py_strip(f'{parts}[{i + 1}]')}, '') "
+                         f"ELSE {otherwise} END")
+        b.project(exprs, {**kinds, **{nc: 'text' for nc in new_col_names}})
+        return True
+
+    if t_type == 'filter':
+        filter_col = params.get('column', col)
+        operator = params.get('operator', '=')
+        value = params.get('value')
+        if not isinstance(filter_col, str) or filter_col not in kinds:
+            return False
+        kind, ref = kinds[filter_col], b.ref(filter_col)
+        if operator in ('=', '!='):
+            if kind not in _STR_EXACT:
+                return False
+            sql_op = '=' if operator == '=' else '<>'
+            b.where(f"COALESCE(CAST({ref} AS VARCHAR), 'None') {sql_op} {b.param(str(value))}")
+        elif operator in ('>', '<'):
+            if kind not in _NUMERIC:
+                return False
+            try:
+                bound = float(value)
+            except (TypeError, ValueError):
+                return False
+            # float(None) raises in Python; fail the query so the Python path raises the same error
+            b.where(f"CASE WHEN {ref} IS NULL THEN error('NULL in numeric filter') "
+                    f"ELSE CAST({ref} AS DOUBLE) {operator} {b.param(bound)} END")
+        elif operator == 'contains':
+            needle = str(value).lower()
+            if kind not in _STR_EXACT or not needle.isascii():
+                return False
+            # 'İ' is the one character whose str.lower() differs from DuckDB's lower()
+            # in a way an ASCII needle can see ('i̇' vs 'i')
+            haystack = f"lower(replace(COALESCE(CAST({ref} AS VARCHAR), 'None'), '\u0130', 'i\u0307'))"
+            b.where(f"contains({haystack}, {b.param(needle)})")
+        else:
+            b.where("TRUE")
+        return True
+
+    # uppercase/titlecase (Unicode case rules differ), calculated (Python eval), unknown types
+    return False
+
+
+def compile_transforms(sql: str, column_types: Dict[str, str], transforms: List[Any],
+                       lookups: Dict[str, Dict[str, str]]) -> CompiledTransforms:
+    """
+    Compile the longest prefix of transforms that SQL reproduces exactly.
+
+    column_types: source query column -> DuckDB type, in query order.
+    The remaining transforms must be applied in Python to the compiled query's rows.
+    """
+    b = _Builder(sql, {c: column_kind(t) for c, t in column_types.items()})
+    renames: Dict[str, str] = {}
+    pushed = []
+    remaining = list(transforms)
+    while remaining:
+        if not _push_transform(b, remaining[0], remaining[1:], lookups, renames):
+            break
+        pushed.append(remaining.pop(0).type)
+    return CompiledTransforms(
+        sql=b.final_sql(), params=b.params, columns=list(b.kinds), renames=renames,
+        pushed=pushed, remaining=remaining, filtered=b.filtered,
+    )
+
+
+# =============================================================================
+# EXECUTION
+# =============================================================================
+
+@dataclass
+class TransformResult:
+    rows: List[Dict]
+    columns: List[str]
+    renames: Dict[str, str]
+    source_empty: bool = False
+    pushed: List[str] = field(default_factory=list)
+    python: List[str] = field(default_factory=list)
+
+
+def _fetch(handler, sql: str, params: Optional[Dict[str, Any]] = None) -> Tuple[List[str], List[tuple]]:
+    with handler._db_lock:
+        result = handler.conn.execute(sql, params) if params else handler.conn.execute(sql)
+        columns = [desc[0] for desc in result.description]
+        return columns, result.fetchall()
+
+
+def _run_pushdown(handler, sql: str, transforms: List[Any],
+                  lookups: Dict[str, Dict[str, str]]) -> Optional[TransformResult]:
+    source = f"SELECT * FROM (\n{sql.strip().rstrip(';')}\n) AS _src"
+    described = _fetch(handler, f"DESCRIBE {source}")[1]
+    column_types = {row[0]: row[1] for row in described}
+    if len(column_types) != len(described):
+        return None  # duplicate names collapse in row dicts; leave that to Python
+
+    compiled = compile_transforms(source, column_types, transforms, lookups)
+    if not compiled.pushed:
+        return None
+
+    columns, rows = _fetch(handler, compiled.sql, compiled.params)
+    data = [dict(zip(columns, row)) for row in rows]
+    source_empty = False
+    if not data:
+        source_empty = not compiled.filtered or not _fetch(handler, f"{source} LIMIT 1")[1]
+        if source_empty:
+            return TransformResult([], [], {}, source_empty=True, pushed=compiled.pushed)
+
+    data, new_columns, renames = apply_python_transforms(
+        data, compiled.columns, compiled.remaining, lookups, formula_columns=list(column_types))
+    return TransformResult(
+        rows=data, columns=new_columns, renames={**compiled.renames, **renames},
+        pushed=compiled.pushed, python=[t.type for t in compiled.remaining],
+    )
+
+
+def run_transforms(handler, sql: str, transforms: List[Any], lookups: Dict[str, Dict[str, str]],
+                   pushdown: bool = PUSHDOWN_ENABLED) -> TransformResult:
+    """
+    Execute a query and apply transforms, pushing what SQL can do exactly into DuckDB.
+
+    Falls back to running the query as-is and transforming in Python when
+    nothing can be pushed down or the compiled SQL fails.
+    """
+    if pushdown and transforms:
+        try:
+            result = _run_pushdown(handler, sql, transforms, lookups)
+            if result is not None:
+                return result
+        except Exception as e:
+            logger.warning(f"[BI] Transform push-down failed, transforming in Python: {e}")
+
+    rows = handler.query(sql)
+    if not rows:
+        return TransformResult([], [], {}, source_empty=True)
+    columns = list(rows[0].keys())
+    data, new_columns, renames = apply_python_transforms(rows, columns, transforms, lookups)
+    return TransformResult(rows=data, columns=new_columns, renames=renames,
+                           python=[t.type for t in transforms])
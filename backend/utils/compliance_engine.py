@@ -8,19 +8,146 @@ THE RIGHT WAY:
 - NO hardcoded field mappings
 - Handles derived fields via vocabulary (age from birth_date)
 
+SCAN PLANNER:
+- Rules grouped by target tables into one combined query per group
+- Single-table filter rules on the same table share one scan of it
+- Groups run in parallel, each on its own DuckDB cursor
+- Rule results memoized with rule fingerprint + input table versions;
+  re-scans only recompute rules whose definition or tables changed
+- check_results report source (recomputed/reused) and duration_ms per rule
+
 Deploy to: backend/utils/compliance_engine.py
 """
 
 import os
 import re
+import copy
 import json
+import time
+import hashlib
+import contextlib
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Dict, List, Any, Optional, Tuple, Set
 from dataclasses import dataclass, field
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# Scan planner settings
+COMPLIANCE_SCAN_WORKERS = 4        # Parallel query groups
+COMPLIANCE_GROUP_MAX_RULES = 20    # Max rules combined into one query
+HITS_CTE = '_compliance_hits'      # Shared scan: table rows violating any rule of the group
+COUNT_COLUMN = '_violation_count'  # Window count carried alongside the sample rows
+
+
+# =============================================================================
+# RULE RESULT MEMO
+# =============================================================================
+# Last result per (project, rule), keyed by rule fingerprint and input table
+# versions. Module-level so it survives get_compliance_engine() re-creating
+# the engine when a new db_handler is passed.
+
+_rule_memo: Dict[Tuple[str, str], Dict] = {}
+_memo_lock = threading.Lock()
+
+
+def _fingerprint(obj: Any) -> str:
+    """Stable hash of a JSON-serializable object."""
+    return hashlib.sha256(json.dumps(obj, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+def _get_memo(project_id: str, rule_id: str) -> Optional[Dict]:
+    with _memo_lock:
+        return _rule_memo.get((project_id.lower(), rule_id))
+
+
+def _parse_sample(sample_json) -> List[Dict]:
+    if not sample_json:
+        return []
+    try:
+        return json.loads(sample_json) if isinstance(sample_json, str) else list(sample_json)
+    except Exception:
+        return []
+
+
+def _summary_sample(sample_json) -> List[Dict]:
+    """Sample rows from a violation summary, without the window count column."""
+    return [{k: v for k, v in row.items() if k != COUNT_COLUMN} if isinstance(row, dict) else row
+            for row in _parse_sample(sample_json)]
+
+
+# =============================================================================
+# SHARED TABLE SCANS
+# =============================================================================
+# Generated checks are mostly "SELECT ... FROM <table> WHERE <violation>".
+# Rules of that shape on the same table are answered from one scan: the table
+# is filtered once by the OR of their WHERE clauses into a materialized CTE,
+# and each rule's query runs unchanged over those rows. A rule only sees rows
+# its own WHERE accepts, so counts, samples, DISTINCT and aggregates match
+# running it on the table. DuckDB's parser (json_serialize_sql) decides the
+# shape; a private in-memory connection does the parsing.
+
+_sql_parser = None
+_sql_parser_lock = threading.Lock()
+
+
+def _sql_ast(call: str, arg: str):
+    global _sql_parser
+    with _sql_parser_lock:
+        if _sql_parser is None:
+            import duckdb
+            _sql_parser = duckdb.connect()
+        return _sql_parser.execute(call, [arg]).fetchone()[0]
+
+
+def _filter_scan(sql: str) -> Optional[Tuple[str, Dict]]:
+    """(scan key, parsed statement) for a single-table SELECT with a WHERE clause, else None."""
+    try:
+        parsed = json.loads(_sql_ast("SELECT json_serialize_sql(?)", sql.strip().rstrip(';')))
+    except Exception:
+        return None
+    if parsed.get('error') or len(parsed.get('statements', [])) != 1:
+        return None
+    node = parsed['statements'][0]['node']
+    source = node.get('from_table') or {}
+    if (node.get('type') != 'SELECT_NODE' or node['cte_map']['map'] or not node.get('where_clause')
+            or source.get('type') != 'BASE_TABLE' or source.get('sample') or source.get('at_clause')):
+        return None
+    key = json.dumps({k: v for k, v in source.items() if k != 'query_location'}, sort_keys=True)
+    return key, parsed
+
+
+def _shared_scan_sql(scans: List[Dict]) -> Tuple[str, List[str]]:
+    """(WITH clause scanning the table once, each rule's query reading from it instead)."""
+    star = json.loads(_sql_ast("SELECT json_serialize_sql(?)", "SELECT *"))['statements'][0]['node']['select_list']
+    hits = copy.deepcopy(scans[0])
+    node = hits['statements'][0]['node']
+    node.update(select_list=star, modifiers=[], group_expressions=[], group_sets=[], having=None, qualify=None,
+                aggregate_handling='STANDARD_HANDLING',
+                where_clause={'class': 'CONJUNCTION', 'type': 'CONJUNCTION_OR', 'alias': '',
+                              'children': [scan['statements'][0]['node']['where_clause'] for scan in scans]})
+    rules = []
+    for scan in scans:
+        rewritten = copy.deepcopy(scan)
+        source = rewritten['statements'][0]['node']['from_table']
+        source.update(table_name=HITS_CTE, schema_name='', catalog_name='',
+                      alias=source['alias'] or source['table_name'])
+        rules.append(_sql_ast("SELECT json_deserialize_sql(?::JSON)", json.dumps(rewritten)))
+    with_clause = f"WITH {HITS_CTE} AS MATERIALIZED ({_sql_ast('SELECT json_deserialize_sql(?::JSON)', json.dumps(hits))})"
+    return with_clause, rules
+
+
+def clear_compliance_memo(project_id: str = None):
+    """Forget memoized rule results (for one project, or all)."""
+    with _memo_lock:
+        if project_id is None:
+            _rule_memo.clear()
+        else:
+            for key in [k for k in _rule_memo if k[0] == project_id.lower()]:
+                del _rule_memo[key]
+
 
 # =============================================================================
 # DATA STRUCTURES
@@ -275,9 +402,24 @@ class ComplianceEngine:
         
         return self._rules_cache
     
-    def run_compliance_scan(self, project_id: str) -> Dict:
-        """Run all compliance rules against a project."""
-        logger.warning(f"[COMPLIANCE] Starting scan for {project_id}")
+    def run_compliance_scan(self, project_id: str, force_full: bool = False) -> Dict:
+        """
+        Run all compliance rules against a project.
+        
+        Rules are planned in three phases:
+        1. Prepare - map fields, fingerprint the rule and its input tables,
+           reuse the memoized result when neither changed
+        2. Execute - group the remaining checks by target tables into one
+           combined query per group, groups run in parallel
+        3. Assemble - results in original rule order, with per-rule timing
+           and whether the rule was recomputed or reused
+        
+        Args:
+            project_id: Project to scan
+            force_full: Ignore memoized results and re-evaluate every rule
+        """
+        logger.warning(f"[COMPLIANCE] Starting scan for {project_id} (force_full={force_full})")
+        scan_start = time.time()
         
         result = {
             'project_id': project_id,
@@ -289,7 +431,14 @@ class ComplianceEngine:
             'findings_count': 0,
             'findings': [],
             'check_results': [],
-            'semantic_types_found': list(self.column_mapper._columns_by_type.keys()) if self.column_mapper._columns_by_type else []
+            'semantic_types_found': list(self.column_mapper._columns_by_type.keys()) if self.column_mapper._columns_by_type else [],
+            'scan_plan': {
+                'recomputed': 0,
+                'reused': 0,
+                'query_groups': 0,
+                'parallel_workers': 0,
+                'duration_ms': 0
+            }
         }
         
         # Load mappings for this project
@@ -318,114 +467,373 @@ class ComplianceEngine:
         
         logger.warning(f"[COMPLIANCE] Checking {len(rules)} rules against {len(schema['tables'])} tables")
         
-        # Check each rule
+        # Phase 1: prepare each rule (mapping, fingerprint, memo lookup, SQL)
+        table_versions = self._get_table_versions(project_id)
+        outcomes: List[Dict] = []
+        pending: List[Dict] = []
+        
         for rule in rules:
-            rule_id = rule.get('rule_id', 'unknown')
-            rule_title = rule.get('title', 'Unknown Rule')
-            
-            rule_result = {
-                'rule_id': rule_id,
-                'rule_title': rule_title,
-                'status': 'pending',
-                'message': '',
-                'field_mappings': {},
-                'sql': None,
-                'row_count': None
-            }
+            outcome = self._prepare_rule(rule, project_id, schema, table_versions, force_full)
+            outcomes.append(outcome)
+            if outcome.get('check'):
+                pending.append(outcome)
+        
+        # Phase 2: execute pending checks, grouped by target tables
+        if pending:
+            groups = self._plan_query_groups(pending)
+            result['scan_plan']['query_groups'] = len(groups)
+            result['scan_plan']['parallel_workers'] = self._execute_query_groups(groups)
+        
+        # Phase 3: assemble in rule order
+        for outcome in outcomes:
+            rule_result = outcome['rule_result']
+            rule_result['duration_ms'] = round(outcome.get('duration_ms', 0), 1)
+            status = rule_result['status']
             
-            try:
-                # Extract fields from rule
-                fields = self._extract_rule_fields(rule)
-                
-                if not fields:
-                    rule_result['status'] = 'skipped'
-                    rule_result['message'] = 'No fields defined in rule'
-                    result['skipped'] += 1
-                    result['check_results'].append(rule_result)
-                    continue
-                
-                # Map fields to columns using vocabulary
-                field_mappings = {}
-                unmapped_fields = []
-                
-                for field_name in fields:
-                    mapping = self.column_mapper.find_column_for_field(field_name, project_id)
-                    if mapping:
-                        field_mappings[field_name] = mapping
-                    else:
-                        unmapped_fields.append(field_name)
-                
-                rule_result['field_mappings'] = {
-                    k: f"{v['table_name']}.{v['column_name']}" + 
-                       (f" (calc: {v.get('calculation', '')[:30]}...)" if v.get('is_derived') else "")
-                    for k, v in field_mappings.items()
-                }
-                
-                if not field_mappings:
-                    rule_result['status'] = 'skipped'
-                    rule_result['message'] = f'No matching columns for fields: {", ".join(fields)}'
-                    result['skipped'] += 1
-                    result['check_results'].append(rule_result)
-                    continue
-                
-                if unmapped_fields:
-                    logger.warning(f"[COMPLIANCE] Rule {rule_id}: unmapped fields: {unmapped_fields}")
-                
-                # Generate SQL
-                check = self._generate_check_sql(rule, field_mappings, schema)
-                
-                if not check or not check.sql_query:
-                    rule_result['status'] = 'skipped'
-                    rule_result['message'] = 'Could not generate SQL for rule'
-                    result['skipped'] += 1
-                    result['check_results'].append(rule_result)
-                    continue
-                
-                rule_result['sql'] = check.sql_query
-                
-                # Execute SQL
-                try:
-                    query_result = self.db_handler.query(check.sql_query)
-                    rows = query_result.get('rows', [])
-                    rule_result['row_count'] = len(rows)
-                    
-                    if len(rows) == 0:
-                        rule_result['status'] = 'passed'
-                        rule_result['message'] = 'No violations found'
-                        result['passed'] += 1
-                    else:
-                        rule_result['status'] = 'failed'
-                        rule_result['message'] = f'{len(rows)} potential violations found'
-                        result['failed'] += 1
-                        
-                        # Create finding
-                        finding = self._create_finding(rule, rows, field_mappings)
-                        if finding:
-                            result['findings'].append(finding.to_dict())
-                            result['findings_count'] += 1
-                    
-                except Exception as sql_e:
-                    rule_result['status'] = 'error'
-                    rule_result['message'] = f'SQL execution failed: {str(sql_e)}'
-                    result['errors'] += 1
-                    logger.error(f"[COMPLIANCE] SQL error for {rule_id}: {sql_e}")
-                
-            except Exception as e:
-                rule_result['status'] = 'error'
-                rule_result['message'] = f'Check failed: {str(e)}'
+            if status == 'passed':
+                result['passed'] += 1
+            elif status == 'failed':
+                result['failed'] += 1
+            elif status == 'skipped':
+                result['skipped'] += 1
+            elif status == 'error':
                 result['errors'] += 1
-                logger.error(f"[COMPLIANCE] Error checking rule {rule_id}: {e}")
+            
+            finding = outcome.get('finding')
+            if finding:
+                result['findings'].append(finding)
+                result['findings_count'] += 1
+            
+            if rule_result.get('source') == 'reused':
+                result['scan_plan']['reused'] += 1
+            else:
+                result['scan_plan']['recomputed'] += 1
+                self._remember_outcome(project_id, outcome)
             
             result['check_results'].append(rule_result)
         
         result['rules_checked'] = len(rules)
+        result['scan_plan']['duration_ms'] = round((time.time() - scan_start) * 1000, 1)
         
         logger.warning(f"[COMPLIANCE] Scan complete: {result['passed']} passed, "
                        f"{result['failed']} failed, {result['skipped']} skipped, "
-                       f"{result['errors']} errors")
+                       f"{result['errors']} errors "
+                       f"({result['scan_plan']['recomputed']} recomputed, "
+                       f"{result['scan_plan']['reused']} reused, "
+                       f"{result['scan_plan']['duration_ms']}ms)")
         
         return result
     
+    # =========================================================================
+    # SCAN PLANNER
+    # =========================================================================
+    
+    def _prepare_rule(self, rule: Dict, project_id: str, schema: Dict,
+                      table_versions: Dict[str, str], force_full: bool) -> Dict:
+        """
+        Prepare a single rule for execution.
+        
+        Returns an outcome dict. If the rule still needs to run, the outcome
+        carries a 'check' (ComplianceCheck) and its target 'tables'; otherwise
+        'rule_result' is already final (skipped, error, or reused from memo).
+        """
+        started = time.time()
+        rule_id = rule.get('rule_id', 'unknown')
+        rule_title = rule.get('title', 'Unknown Rule')
+        
+        rule_result = {
+            'rule_id': rule_id,
+            'rule_title': rule_title,
+            'status': 'pending',
+            'message': '',
+            'field_mappings': {},
+            'sql': None,
+            'row_count': None,
+            'source': 'recomputed'
+        }
+        outcome = {'rule': rule, 'rule_result': rule_result, 'finding': None, 'check': None}
+        
+        try:
+            # Extract fields from rule
+            fields = self._extract_rule_fields(rule)
+            
+            if not fields:
+                rule_result['status'] = 'skipped'
+                rule_result['message'] = 'No fields defined in rule'
+                return self._finish_prepare(outcome, started)
+            
+            # Map fields to columns using vocabulary
+            field_mappings = {}
+            unmapped_fields = []
+            
+            for field_name in fields:
+                mapping = self.column_mapper.find_column_for_field(field_name, project_id)
+                if mapping:
+                    field_mappings[field_name] = mapping
+                else:
+                    unmapped_fields.append(field_name)
+            
+            rule_result['field_mappings'] = {
+                k: f"{v['table_name']}.{v['column_name']}" + 
+                   (f" (calc: {v.get('calculation', '')[:30]}...)" if v.get('is_derived') else "")
+                for k, v in field_mappings.items()
+            }
+            
+            if not field_mappings:
+                rule_result['status'] = 'skipped'
+                rule_result['message'] = f'No matching columns for fields: {", ".join(fields)}'
+                return self._finish_prepare(outcome, started)
+            
+            if unmapped_fields:
+                logger.warning(f"[COMPLIANCE] Rule {rule_id}: unmapped fields: {unmapped_fields}")
+            
+            # Fingerprint: rule definition + mapping + versions of input tables
+            tables = sorted(set(info['table_name'] for info in field_mappings.values()))
+            rule_hash = _fingerprint({'rule': rule, 'mappings': rule_result['field_mappings']})
+            input_versions = {t: table_versions.get(t, 'unversioned') for t in tables}
+            outcome.update({
+                'field_mappings': field_mappings,
+                'tables': tables,
+                'rule_hash': rule_hash,
+                'input_versions': input_versions
+            })
+            
+            if not force_full:
+                memo = _get_memo(project_id, rule_id)
+                if memo and memo['rule_hash'] == rule_hash and memo['input_versions'] == input_versions:
+                    rule_result.update(memo['rule_result'])
+                    rule_result['source'] = 'reused'
+                    rule_result['computed_at'] = memo['computed_at']
+                    outcome['finding'] = memo['finding']
+                    return self._finish_prepare(outcome, started)
+            
+            # Generate SQL (reuse previously generated SQL for an unchanged rule)
+            memo = _get_memo(project_id, rule_id)
+            if memo and memo['rule_hash'] == rule_hash and memo.get('sql'):
+                check = self._check_from_sql(rule, field_mappings, memo['sql'])
+            else:
+                check = self._generate_check_sql(rule, field_mappings, schema)
+            
+            if not check or not check.sql_query:
+                rule_result['status'] = 'skipped'
+                rule_result['message'] = 'Could not generate SQL for rule'
+                return self._finish_prepare(outcome, started)
+            
+            rule_result['sql'] = check.sql_query
+            outcome['check'] = check
+            
+        except Exception as e:
+            rule_result['status'] = 'error'
+            rule_result['message'] = f'Check failed: {str(e)}'
+            logger.error(f"[COMPLIANCE] Error checking rule {rule_id}: {e}")
+        
+        return self._finish_prepare(outcome, started)
+    
+    def _finish_prepare(self, outcome: Dict, started: float) -> Dict:
+        outcome['duration_ms'] = (time.time() - started) * 1000
+        return outcome
+    
+    def _plan_query_groups(self, pending: List[Dict]) -> List[List[Dict]]:
+        """
+        Group pending checks: single-table filters by the table they scan,
+        the rest by the set of tables they read.
+        """
+        groups: Dict[Tuple[str, ...], List[Dict]] = {}
+        for outcome in pending:
+            scan = _filter_scan(outcome['check'].sql_query)
+            if scan:
+                outcome['scan'] = scan[1]
+                groups.setdefault(('scan', scan[0]), []).append(outcome)
+            else:
+                groups.setdefault(('tables',) + tuple(outcome['tables']), []).append(outcome)
+        
+        planned = []
+        for tables, members in groups.items():
+            for i in range(0, len(members), COMPLIANCE_GROUP_MAX_RULES):
+                planned.append(members[i:i + COMPLIANCE_GROUP_MAX_RULES])
+        
+        logger.info(f"[COMPLIANCE] Planned {len(pending)} checks into {len(planned)} query groups")
+        return planned
+    
+    def _execute_query_groups(self, groups: List[List[Dict]]) -> int:
+        """
+        Execute query groups, in parallel when the handler supports cursors.
+        
+        Each worker gets its own DuckDB cursor (a separate connection to the
+        same database), so groups don't serialize on the handler's global lock.
+        Cursors are created under _db_lock, as duckdb_maintenance does, so they
+        never race a writer re-wrapping or closing the connection; queries then
+        run without it on the cursor's own snapshot of committed data.
+        Returns the number of workers used.
+        """
+        conn = getattr(self.db_handler, 'conn', None)
+        
+        if conn is None or not hasattr(conn, 'cursor'):
+            for group in groups:
+                self._execute_group(group, cursor=None)
+            return 1
+        
+        workers = min(COMPLIANCE_SCAN_WORKERS, len(groups))
+        db_lock = getattr(self.db_handler, '_db_lock', None) or contextlib.nullcontext()
+        
+        def run(group):
+            with db_lock:
+                cursor = conn.cursor()
+            try:
+                self._execute_group(group, cursor=cursor)
+            finally:
+                try:
+                    cursor.close()
+                except Exception:
+                    pass
+        
+        if workers == 1:
+            for group in groups:
+                run(group)
+            return 1
+        
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(run, group) for group in groups]
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    logger.error(f"[COMPLIANCE] Query group worker failed: {e}")
+        
+        return workers
+    
+    def _execute_group(self, group: List[Dict], cursor=None):
+        """
+        Run all checks of a group in one combined query.
+        
+        Each rule contributes one row: violation count plus up to 5 sample
+        violations as JSON. Filter rules on one table read it through a shared
+        scan (see _shared_scan_sql). If the combined query fails (one bad rule
+        SQL poisons the UNION), fall back to running each rule on its own so
+        the error is attributed to the right rule.
+        """
+        started = time.time()
+        
+        if cursor is not None and len(group) > 1:
+            try:
+                if all(o.get('scan') for o in group):
+                    with_clause, queries = _shared_scan_sql([o['scan'] for o in group])
+                else:
+                    with_clause, queries = '', [o['check'].sql_query for o in group]
+                parts = [self._violation_summary_sql(i, sql) for i, sql in enumerate(queries)]
+                rows = cursor.execute(f"{with_clause}\n" + "\nUNION ALL\n".join(parts)).fetchall()
+                elapsed = (time.time() - started) * 1000
+                by_idx = {row[0]: row for row in rows}
+                for i, outcome in enumerate(group):
+                    _, count, sample_json = by_idx[i]
+                    self._apply_violations(outcome, int(count or 0), _summary_sample(sample_json))
+                    outcome['duration_ms'] += elapsed
+                    outcome['rule_result']['query_group_size'] = len(group)
+                return
+            except Exception as e:
+                logger.warning(f"[COMPLIANCE] Combined query for {len(group)} rules failed, "
+                               f"running individually: {e}")
+        
+        for outcome in group:
+            rule_started = time.time()
+            try:
+                if cursor is not None:
+                    row = cursor.execute(self._violation_summary_sql(0, outcome['check'].sql_query)).fetchone()
+                    count, sample = int(row[1] or 0), _summary_sample(row[2])
+                else:
+                    query_result = self.db_handler.query(outcome['check'].sql_query)
+                    rows = query_result.get('rows', []) if isinstance(query_result, dict) else (query_result or [])
+                    count, sample = len(rows), rows[:5]
+                self._apply_violations(outcome, count, sample)
+            except Exception as sql_e:
+                outcome['rule_result']['status'] = 'error'
+                outcome['rule_result']['message'] = f'SQL execution failed: {str(sql_e)}'
+                logger.error(f"[COMPLIANCE] SQL error for {outcome['rule_result']['rule_id']}: {sql_e}")
+            outcome['duration_ms'] += (time.time() - rule_started) * 1000
+    
+    def _violation_summary_sql(self, idx: int, sql: str) -> str:
+        """
+        Wrap a violation query so it returns (idx, count, sample_json).
+        
+        The query runs once: the count comes from a window over it, carried on
+        the (at most 5) sample rows.
+        """
+        inner = sql.strip().rstrip(';')
+        return (
+            f"SELECT {idx} AS idx, COALESCE(MAX(_s.{COUNT_COLUMN}), 0) AS violation_count, "
+            f"to_json(list(_s)) AS sample_json "
+            f"FROM (SELECT *, COUNT(*) OVER () AS {COUNT_COLUMN} FROM ({inner}) AS _v LIMIT 5) AS _s"
+        )
+    
+    def _apply_violations(self, outcome: Dict, count: int, sample: List):
+        """Set rule status and finding from a violation count and sample."""
+        rule_result = outcome['rule_result']
+        rule_result['row_count'] = count
+        
+        if count == 0:
+            rule_result['status'] = 'passed'
+            rule_result['message'] = 'No violations found'
+        else:
+            rule_result['status'] = 'failed'
+            rule_result['message'] = f'{count} potential violations found'
+            finding = self._create_finding(outcome['rule'], sample, outcome['field_mappings'],
+                                           total_count=count)
+            if finding:
+                outcome['finding'] = finding.to_dict()
+    
+    def _check_from_sql(self, rule: Dict, field_mappings: Dict, sql: str) -> ComplianceCheck:
+        """Rebuild a ComplianceCheck around previously generated SQL."""
+        return ComplianceCheck(
+            check_id=f"CHK_{rule.get('rule_id', 'unknown')}",
+            rule_id=rule.get('rule_id', ''),
+            rule_title=rule.get('title', ''),
+            sql_query=sql,
+            description=f"Check for: {rule.get('title', '')}",
+            expected_result="No rows = compliant",
+            field_mappings={k: f"{v['table_name']}.{v['column_name']}" for k, v in field_mappings.items()},
+            severity=rule.get('severity', 'medium'),
+            category=rule.get('category', 'general')
+        )
+    
+    def _get_table_versions(self, project_id: str) -> Dict[str, str]:
+        """
+        Version of each current table in the project.
+        
+        Derived from the current _schema_metadata row: a re-upload creates a
+        new row (new id, created_at), so any change produces a new version.
+        """
+        if not self.db_handler or not hasattr(self.db_handler, 'conn'):
+            return {}
+        
+        try:
+            rows = self.db_handler.safe_fetchall("""
+                SELECT table_name, MAX(id), MAX(row_count), CAST(MAX(created_at) AS VARCHAR)
+                FROM _schema_metadata
+                WHERE LOWER(project) = LOWER(?) AND is_current = TRUE
+                GROUP BY table_name
+            """, [project_id]) if hasattr(self.db_handler, 'safe_fetchall') else []
+            return {row[0]: f"{row[1]}:{row[2]}:{row[3]}" for row in rows}
+        except Exception as e:
+            logger.warning(f"[COMPLIANCE] Could not read table versions: {e}")
+            return {}
+    
+    def _remember_outcome(self, project_id: str, outcome: Dict):
+        """Memoize a recomputed rule outcome (only definitive results)."""
+        rule_result = outcome['rule_result']
+        if not outcome.get('rule_hash') or rule_result['status'] not in ('passed', 'failed'):
+            return
+        
+        with _memo_lock:
+            _rule_memo[(project_id.lower(), rule_result['rule_id'])] = {
+                'rule_hash': outcome['rule_hash'],
+                'input_versions': outcome['input_versions'],
+                'sql': rule_result.get('sql'),
+                'rule_result': {k: v for k, v in rule_result.items()
+                                if k not in ('source', 'duration_ms', 'computed_at')},
+                'finding': outcome.get('finding'),
+                'computed_at': datetime.now().isoformat()
+            }
+    
     def _get_schema(self, project_id: str) -> Dict:
         """Get schema for a project."""
         if not self.db_handler:
@@ -574,8 +982,11 @@ SQL:"""
             logger.error(f"[COMPLIANCE] SQL generation failed: {e}")
             return None
     
-    def _create_finding(self, rule: Dict, violations: List, field_mappings: Dict) -> Optional[Finding]:
-        """Create a finding from rule violations."""
+    def _create_finding(self, rule: Dict, violations: List, field_mappings: Dict,
+                        total_count: Optional[int] = None) -> Optional[Finding]:
+        """Create a finding from rule violations (violations may be a sample of total_count)."""
+        if total_count is None:
+            total_count = len(violations)
         try:
             return Finding(
                 finding_id=f"FND_{rule.get('rule_id', 'unknown')}_{datetime.now().strftime('%Y%m%d%H%M%S')}",
@@ -583,9 +994,9 @@ SQL:"""
                 severity=rule.get('severity', 'medium'),
                 category=rule.get('category', 'general'),
                 condition={
-                    'description': f"{len(violations)} records do not meet the requirement",
+                    'description': f"{total_count} records do not meet the requirement",
                     'sample_count': min(5, len(violations)),
-                    'total_count': len(violations)
+                    'total_count': total_count
                 },
                 criteria={
                     'rule': rule.get('title', ''),
@@ -604,7 +1015,7 @@ SQL:"""
                 },
                 evidence={
                     'sample_violations': violations[:5],
-                    'total_violations': len(violations),
+                    'total_violations': total_count,
                     'query_used': 'See check_results for SQL'
                 },
                 rule_id=rule.get('rule_id', ''),
@@ -632,7 +1043,8 @@ def get_compliance_engine(db_handler=None, chroma_client=None) -> ComplianceEngi
     return _engine_instance
 
 
-def run_compliance_check(project_id: str, db_handler=None, chroma_client=None) -> Dict:
+def run_compliance_check(project_id: str, db_handler=None, chroma_client=None,
+                         force_full: bool = False) -> Dict:
     """Run compliance check for a project."""
     engine = get_compliance_engine(db_handler, chroma_client)
-    return engine.run_compliance_scan(project_id)
+    return engine.run_compliance_scan(project_id, force_full=force_full)
@@ -425,7 +425,7 @@ class DomainInferenceEngine:
         try:
             # Get columns with categorical values
             result = self.handler.conn.execute("""
-                SELECT column_name, distinct_values, filter_category
+                SELECT table_name, column_name, distinct_values, filter_category
                 FROM _column_profiles
                 WHERE project = ? 
                   AND distinct_values IS NOT NULL
@@ -435,7 +435,15 @@ class DomainInferenceEngine:
             
             import json
             
-            for col_name, distinct_json, filter_cat in result:
+            # Column sketches know which values are most frequent - check those
+            # instead of the first 20 alphabetically
+            try:
+                from utils.column_sketches import get_sketch_store
+                sketches = get_sketch_store(self.handler).load_project(project)
+            except Exception:
+                sketches = {}
+            
+            for table_name, col_name, distinct_json, filter_cat in result:
                 if not distinct_json:
                     continue
                 
@@ -444,6 +452,11 @@ class DomainInferenceEngine:
                     if not isinstance(values, list):
                         continue
                     
+                    sketch = sketches.get((table_name, col_name))
+                    if sketch is not None:
+                        present = set(values)
+                        values = [v for v, _ in sketch.value_counts() if v in present]
+                    
                     # Check value patterns for each domain
                     for domain, patterns in DOMAIN_EVIDENCE_PATTERNS.items():
                         for pattern, expected_cat, weight in patterns.get('value_patterns', []):
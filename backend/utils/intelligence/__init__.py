@@ -21,6 +21,7 @@ Module Structure:
     ├── synthesizer.py       # Response synthesis
     ├── truth_enricher.py    # LLM Lookups - extracts structured data from truths
     ├── relationship_resolver.py  # Evolution 10: Multi-hop relationship queries
+    ├── workforce_cube.py    # Precomputed headcount aggregates (GROUPING SETS)
     └── gatherers/           # One file per Truth type
         ├── base.py          # Abstract gatherer
         ├── reality.py       # DuckDB queries
@@ -74,6 +75,12 @@ from .term_index import (
     recalc_term_index,
 )
 
+# Workforce Cube (Load-time headcount aggregates for snapshot queries)
+from .workforce_cube import (
+    WorkforceCube,
+    refresh_workforce_cube,
+)
+
 # SQL Assembler (Deterministic SQL generation from term matches)
 from .sql_assembler import (
     SQLAssembler,
@@ -229,6 +236,13 @@ from .gatherers import (
     ComplianceGatherer,
 )
 
+# Concurrent gathering with per-gatherer time budgets
+from .gather_scheduler import (
+    GatherTask,
+    run_gather_tasks,
+    get_gather_stats,
+)
+
 # Modular engine (V2) - THE engine going forward
 from .engine import IntelligenceEngineV2
 
@@ -279,6 +293,10 @@ __all__ = [
     'VendorSchemaLoader',
     'recalc_term_index',
     
+    # Workforce Cube
+    'WorkforceCube',
+    'refresh_workforce_cube',
+    
     # SQL Assembler
     'SQLAssembler',
     'AssembledQuery',
@@ -400,6 +418,9 @@ __all__ = [
     'ReferenceGatherer',
     'RegulatoryGatherer',
     'ComplianceGatherer',
+    'GatherTask',
+    'run_gather_tasks',
+    'get_gather_stats',
     
     # Main engine
     'IntelligenceEngine',
@@ -14,6 +14,8 @@ Version: 2.0.0
 import logging
 from typing import Dict, Any, Optional
 
+from utils.duckdb_maintenance import request_checkpoint
+
 logger = logging.getLogger(__name__)
 
 
@@ -97,7 +99,9 @@ def build_context_graph(conn, project: str, system: str = None) -> Dict[str, Any
             )
             spoke_count += 1
         
-        conn.execute("CHECKPOINT")
+        # Not the build's persistence point (Step 5 ends with its own CHECKPOINT):
+        # an idle-window hint while the maintenance scheduler runs
+        request_checkpoint(conn, 'context_graph.spokes')
         
         # Step 5: Store hubs and relationships in dedicated tables for faster queries
         _store_context_graph_tables(conn, project, hubs, relationships)
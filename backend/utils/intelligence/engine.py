@@ -39,7 +39,7 @@ from typing import Dict, List, Optional, Any, Tuple
 
 from .types import (
     Truth, Conflict, Insight, SynthesizedAnswer, IntelligenceMode,
-    TruthType
+    TruthType, StorageType
 )
 from .table_selector import TableSelector
 # OLD PATH DISABLED - Import kept for backward compatibility but not used for fallback
@@ -71,6 +71,14 @@ from .gatherers import (
     RegulatoryGatherer,
     ComplianceGatherer
 )
+from .gather_scheduler import (
+    CONCURRENT_GATHER_ENABLED,
+    GatherTask,
+    submit_gather_tasks,
+    wait_gather_task,
+    cancel_gather_tasks
+)
+from utils.tracing import current_span, traced
 
 logger = logging.getLogger(__name__)
 
@@ -829,6 +837,7 @@ class IntelligenceEngineV2:
     # MAIN ENTRY POINT
     # =========================================================================
     
+    @traced('engine.ask', root=True)
     def ask(self, question: str, mode: IntelligenceMode = None,
             context: Dict = None) -> SynthesizedAnswer:
         """
@@ -854,6 +863,7 @@ class IntelligenceEngineV2:
         """
         context = context or {}
         q_lower = question.lower()
+        current_span().set_attributes(project=self.project, question_chars=len(question))
         
         logger.warning(f"[ENGINE-V2] Question: {question[:80]}...")
         logger.warning(f"[ENGINE-V2] confirmed_facts: {self.confirmed_facts}")
@@ -1142,17 +1152,26 @@ class IntelligenceEngineV2:
         # CRITICAL: Every question needs all truths for proper triangulation.
         # Validation questions ESPECIALLY need Regulatory + Reference to verify
         # whether Reality matches what SHOULD be configured.
+        # Gatherers run concurrently, each within its time budget (see
+        # gather_scheduler). Whichever truths miss their budget are left
+        # empty and recorded in gather_metadata - the answer is partial.
         # =====================================================================
         
-        # Truth 1: REALITY - What the data shows
-        try:
-            reality = self._gather_reality(question, analysis)
+        gather_metadata = None
+        if CONCURRENT_GATHER_ENABLED:
+            gathered, gather_metadata = self._gather_truths_concurrently(question, analysis)
+            reality = gathered['reality']
             logger.warning(f"[ENGINE-V2] REALITY gathered: {len(reality)} truths")
-        except Exception as e:
-            logger.error(f"[ENGINE-V2] Error in gather_reality: {e}")
-            import traceback
-            logger.error(f"[ENGINE-V2] Reality traceback: {traceback.format_exc()}")
-            reality = []
+        else:
+            # Truth 1: REALITY - What the data shows
+            try:
+                reality = self._gather_reality(question, analysis)
+                logger.warning(f"[ENGINE-V2] REALITY gathered: {len(reality)} truths")
+            except Exception as e:
+                logger.error(f"[ENGINE-V2] Error in gather_reality: {e}")
+                import traceback
+                logger.error(f"[ENGINE-V2] Reality traceback: {traceback.format_exc()}")
+                reality = []
         
         # Check for pending clarification from reality gathering
         if context.get('pending_clarification') or self._pending_clarification:
@@ -1160,31 +1179,41 @@ class IntelligenceEngineV2:
             self._pending_clarification = None
             return clarification
         
-        # Truth 2: INTENT - What customer wants (SOWs, requirements)
-        try:
-            intent = self._gather_intent(question, analysis)
-            logger.warning(f"[ENGINE-V2] INTENT gathered: {len(intent)} truths")
-        except Exception as e:
-            logger.error(f"[ENGINE-V2] Error in gather_intent: {e}")
-            intent = []
-        
-        # Truth 3: CONFIGURATION - How system is configured (code tables)
-        try:
-            configuration = self._gather_configuration(question, analysis)
-            logger.warning(f"[ENGINE-V2] CONFIGURATION gathered: {len(configuration)} truths")
-        except Exception as e:
-            logger.error(f"[ENGINE-V2] Error in gather_configuration: {e}")
-            configuration = []
-        
-        # Truths 4, 5, 6: REFERENCE, REGULATORY, COMPLIANCE (global library)
-        try:
-            reference, regulatory, compliance = self._gather_reference_library(question, analysis)
-            logger.warning(f"[ENGINE-V2] REFERENCE gathered: {len(reference)} truths")
-            logger.warning(f"[ENGINE-V2] REGULATORY gathered: {len(regulatory)} truths")
-            logger.warning(f"[ENGINE-V2] COMPLIANCE gathered: {len(compliance)} truths")
-        except Exception as e:
-            logger.error(f"[ENGINE-V2] Error in gather_reference_library: {e}")
-            reference, regulatory, compliance = [], [], []
+        if gather_metadata is not None:
+            intent = gathered['intent']
+            configuration = gathered['configuration']
+            reference, regulatory, compliance = gathered['reference'], gathered['regulatory'], gathered['compliance']
+            for truth_type in ('intent', 'configuration', 'reference', 'regulatory', 'compliance'):
+                logger.warning(f"[ENGINE-V2] {truth_type.upper()} gathered: {len(gathered[truth_type])} truths")
+            if gather_metadata['partial']:
+                logger.warning(f"[ENGINE-V2] Partial gather - timed out: {gather_metadata['timed_out']}, "
+                               f"failed: {gather_metadata['failed']}")
+        else:
+            # Truth 2: INTENT - What customer wants (SOWs, requirements)
+            try:
+                intent = self._gather_intent(question, analysis)
+                logger.warning(f"[ENGINE-V2] INTENT gathered: {len(intent)} truths")
+            except Exception as e:
+                logger.error(f"[ENGINE-V2] Error in gather_intent: {e}")
+                intent = []
+            
+            # Truth 3: CONFIGURATION - How system is configured (code tables)
+            try:
+                configuration = self._gather_configuration(question, analysis)
+                logger.warning(f"[ENGINE-V2] CONFIGURATION gathered: {len(configuration)} truths")
+            except Exception as e:
+                logger.error(f"[ENGINE-V2] Error in gather_configuration: {e}")
+                configuration = []
+            
+            # Truths 4, 5, 6: REFERENCE, REGULATORY, COMPLIANCE (global library)
+            try:
+                reference, regulatory, compliance = self._gather_reference_library(question, analysis)
+                logger.warning(f"[ENGINE-V2] REFERENCE gathered: {len(reference)} truths")
+                logger.warning(f"[ENGINE-V2] REGULATORY gathered: {len(regulatory)} truths")
+                logger.warning(f"[ENGINE-V2] COMPLIANCE gathered: {len(compliance)} truths")
+            except Exception as e:
+                logger.error(f"[ENGINE-V2] Error in gather_reference_library: {e}")
+                reference, regulatory, compliance = [], [], []
         
         # Log total truths gathered
         total_truths = len(reality) + len(intent) + len(configuration) + len(reference) + len(regulatory) + len(compliance)
@@ -1276,11 +1305,14 @@ class IntelligenceEngineV2:
             logger.error(f"[ENGINE-V2] Synthesize traceback: {traceback.format_exc()}")
             raise
         
-        # Track SQL
-        if self.reality_gatherer:
+        # Track SQL (a timed-out reality gather may still be running - don't report its SQL)
+        reality_timed_out = gather_metadata is not None and 'reality' in gather_metadata['timed_out']
+        if self.reality_gatherer and not reality_timed_out:
             self.last_executed_sql = self.reality_gatherer.last_executed_sql
             answer.executed_sql = self.last_executed_sql
         
+        answer.gather_metadata = gather_metadata
+        
         # v3.2: Attach consultative metadata (excel_spec, proactive_offers, etc.)
         if self.synthesizer and hasattr(self.synthesizer, 'get_consultative_metadata'):
             consultative_meta = self.synthesizer.get_consultative_metadata()
@@ -1302,7 +1334,8 @@ class IntelligenceEngineV2:
                 'reference': len(reference),
                 'regulatory': len(regulatory),
                 'compliance': len(compliance)
-            }
+            },
+            'gather_timed_out': gather_metadata['timed_out'] if gather_metadata else []
         })
         
         total_truths = len(reality) + len(intent) + len(configuration) + len(reference) + len(regulatory) + len(compliance)
@@ -1476,6 +1509,7 @@ class IntelligenceEngineV2:
     # QUERY RESOLVER - Deterministic fast path for common queries
     # =========================================================================
     
+    @traced('engine.query_resolver')
     def _try_query_resolver(self, question: str) -> Optional[Dict]:
         """
         Try to resolve the query deterministically using QueryResolver.
@@ -1531,6 +1565,7 @@ class IntelligenceEngineV2:
         
         return None
     
+    @traced('engine.consultative_synthesis')
     def _synthesize_with_resolver_context(
         self, 
         question: str, 
@@ -1709,6 +1744,7 @@ Bad: "Based on the data, I found 3,976 active records and 36 LOA records totalin
             logger.error(f"[CONSULTATIVE] Traceback: {traceback.format_exc()}")
             return None
     
+    @traced('engine.pure_chat')
     def _handle_pure_chat(self, question: str, q_lower: str) -> Optional[SynthesizedAnswer]:
         """
         Handle Pure Chat questions - definitional/conceptual questions
@@ -1885,6 +1921,7 @@ DO NOT:
         
         return None
     
+    @traced('engine.deterministic_path')
     def _try_deterministic_path(self, question: str) -> Optional[SynthesizedAnswer]:
         """
         PRIMARY PATH: Try to answer using Term Index + SQL Assembler.
@@ -2757,6 +2794,7 @@ DO NOT:
                 context={'traceback': tb[:500]}
             )
     
+    @traced('engine.multi_hop')
     def _try_multi_hop_query(self, question: str, multi_hop_info: Dict) -> Optional[SynthesizedAnswer]:
         """
         Evolution 10: Handle multi-hop relationship queries.
@@ -3489,6 +3527,100 @@ DO NOT:
     # TRUTH GATHERING
     # =========================================================================
     
+    @traced('engine.gather')
+    def _gather_truths_concurrently(self, question: str,
+                                    analysis: Dict) -> Tuple[Dict[str, List[Truth]], Dict[str, Any]]:
+        """
+        Gather all truths concurrently, each within its time budget.
+        
+        Returns:
+            ({truth_type: truths}, gather_metadata). Truth types whose gatherer
+            timed out or failed are empty; gather_metadata records which.
+        
+        Each gatherer gets its own copy of analysis (with a '_cancel_event');
+        keys it adds are merged back once its result is accepted. DuckDB
+        gatherers share one lane since they share the handler's connection.
+        Reality is awaited first so a pending clarification can cancel the
+        rest without waiting on them.
+        """
+        routing, weights = self._route_reference_library(question, analysis)
+        
+        gatherers = {
+            'reality': self.reality_gatherer,
+            'intent': self.intent_gatherer,
+            'configuration': self.configuration_gatherer,
+        }
+        gatherers.update({t: g for t, g in self._library_gatherers().items() if t in weights})
+        
+        base_analysis = dict(analysis)
+        tasks = []
+        for truth_type, gatherer in gatherers.items():
+            if not gatherer:
+                continue
+            lane = 'duckdb' if gatherer.storage_type == StorageType.DUCKDB else truth_type
+            tasks.append(GatherTask(truth_type, self._make_gather_fn(gatherer, question, base_analysis), lane=lane))
+        submit_gather_tasks(tasks)
+        
+        gathered = {t: [] for t in ('reality', 'intent', 'configuration', 'reference', 'regulatory', 'compliance')}
+        outcomes = {}
+        clarifying = False
+        for i, task in enumerate(tasks):
+            outcome = wait_gather_task(task)
+            outcomes[task.name] = outcome
+            
+            if outcome['status'] == 'ok':
+                truths, task_analysis = outcome['result']
+                gathered[task.name] = truths
+                for key, value in task_analysis.items():
+                    if key != '_cancel_event' and (key not in base_analysis or base_analysis[key] is not value):
+                        analysis[key] = value
+            elif outcome['status'] == 'timeout':
+                logger.warning(f"[ENGINE-V2] {task.name} gather exceeded {task.budget_ms}ms budget")
+            else:
+                logger.error(f"[ENGINE-V2] Error in gather_{task.name}: {outcome['error']}")
+            
+            if task.name == 'reality' and analysis.get('pending_clarification'):
+                self._pending_clarification = analysis['pending_clarification']
+                cancel_gather_tasks(tasks[i + 1:])
+                clarifying = True
+                break
+        
+        if not clarifying:
+            gathered['reference'], gathered['regulatory'], gathered['compliance'] = self._finish_reference_library(
+                question, analysis, routing, weights,
+                gathered['reference'], gathered['regulatory'], gathered['compliance']
+            )
+        
+        per_gatherer = {}
+        for task in tasks:
+            outcome = outcomes.get(task.name)
+            per_gatherer[task.name] = {
+                'status': outcome['status'] if outcome else 'cancelled',
+                'elapsed_ms': outcome['elapsed_ms'] if outcome else None,
+                'budget_ms': task.budget_ms,
+                'truths': len(gathered[task.name]),
+            }
+        timed_out = [name for name, g in per_gatherer.items() if g['status'] == 'timeout']
+        failed = [name for name, g in per_gatherer.items() if g['status'] == 'error']
+        
+        return gathered, {
+            'mode': 'concurrent',
+            'gatherers': per_gatherer,
+            'timed_out': timed_out,
+            'failed': failed,
+            'partial': bool(timed_out or failed),
+        }
+    
+    @staticmethod
+    def _make_gather_fn(gatherer, question: str, base_analysis: Dict):
+        """Gather task body: runs the gatherer on its own copy of analysis."""
+        def run(cancel_event):
+            task_analysis = dict(base_analysis)
+            task_analysis['_cancel_event'] = cancel_event
+            return gatherer.gather(question, task_analysis), task_analysis
+        return run
+    
+    @traced('gather.reality')
     def _gather_reality(self, question: str, analysis: Dict) -> List[Truth]:
         """Gather Reality truths from DuckDB."""
         if not self.reality_gatherer:
@@ -3502,12 +3634,14 @@ DO NOT:
         
         return truths
     
+    @traced('gather.intent')
     def _gather_intent(self, question: str, analysis: Dict) -> List[Truth]:
         """Gather Intent truths from customer documents."""
         if self.intent_gatherer:
             return self.intent_gatherer.gather(question, analysis)
         return []
     
+    @traced('gather.configuration')
     def _gather_configuration(self, question: str, analysis: Dict) -> List[Truth]:
         """
         Gather Configuration truths from config tables.
@@ -3519,6 +3653,7 @@ DO NOT:
             return self.configuration_gatherer.gather(question, analysis)
         return []
     
+    @traced('gather.reference_library')
     def _gather_reference_library(self, question: str, 
                                   analysis: Dict) -> Tuple[List[Truth], List[Truth], List[Truth]]:
         """
@@ -3532,50 +3667,80 @@ DO NOT:
         Phase 2B.2: Now uses TruthRouter to determine which truth types to gather
         based on query patterns. This improves relevance and reduces noise.
         """
-        reference = []
-        regulatory = []
-        compliance = []
-        
-        # Phase 2B.2: Use TruthRouter to determine which truths to gather
-        if TRUTH_ROUTER_AVAILABLE and truth_router_instance:
-            routing = truth_router_instance.route_query(question, analysis)
-            
-            # Log routing decision
-            truth_types = [tq.truth_type for tq in routing.queries]
-            logger.warning(f"[GATHER-LIBRARY] TruthRouter: {routing.query_category} → {truth_types}")
-            
-            # Only gather truths that the router recommends
-            # Use weight threshold of 0.3 to include moderately relevant truths
-            should_ref, ref_weight = truth_router_instance.should_gather('reference', routing, 0.3)
-            should_reg, reg_weight = truth_router_instance.should_gather('regulatory', routing, 0.3)
-            should_comp, comp_weight = truth_router_instance.should_gather('compliance', routing, 0.3)
-            
-            if should_ref and self.reference_gatherer:
-                reference = self.reference_gatherer.gather(question, analysis)
-                # Tag results with routing weight for later prioritization
-                for t in reference:
-                    t.metadata = t.metadata or {}
-                    t.metadata['routing_weight'] = ref_weight
-                    
-            if should_reg and self.regulatory_gatherer:
-                regulatory = self.regulatory_gatherer.gather(question, analysis)
-                for t in regulatory:
-                    t.metadata = t.metadata or {}
-                    t.metadata['routing_weight'] = reg_weight
-                    
-            if should_comp and self.compliance_gatherer:
-                compliance = self.compliance_gatherer.gather(question, analysis)
-                for t in compliance:
+        routing, weights = self._route_reference_library(question, analysis)
+        
+        gathered = {'reference': [], 'regulatory': [], 'compliance': []}
+        for truth_type, gatherer in self._library_gatherers().items():
+            if truth_type in weights:
+                gathered[truth_type] = gatherer.gather(question, analysis)
+        
+        return self._finish_reference_library(
+            question, analysis, routing, weights,
+            gathered['reference'], gathered['regulatory'], gathered['compliance']
+        )
+    
+    def _library_gatherers(self) -> Dict[str, Any]:
+        """Available Reference Library gatherers by truth type."""
+        gatherers = {
+            'reference': self.reference_gatherer,
+            'regulatory': self.regulatory_gatherer,
+            'compliance': self.compliance_gatherer,
+        }
+        return {truth_type: g for truth_type, g in gatherers.items() if g}
+    
+    def _route_reference_library(self, question: str, analysis: Dict) -> Tuple[Any, Dict[str, Optional[float]]]:
+        """
+        Decide which Reference Library truth types to gather.
+        
+        Returns:
+            (routing, {truth_type: routing_weight}) - routing is None when
+            TruthRouter is unavailable, in which case all types are gathered
+            with no weight (original behavior).
+        """
+        if not (TRUTH_ROUTER_AVAILABLE and truth_router_instance):
+            return None, {'reference': None, 'regulatory': None, 'compliance': None}
+        
+        routing = truth_router_instance.route_query(question, analysis)
+        
+        # Log routing decision
+        truth_types = [tq.truth_type for tq in routing.queries]
+        logger.warning(f"[GATHER-LIBRARY] TruthRouter: {routing.query_category} → {truth_types}")
+        
+        # Only gather truths that the router recommends
+        # Use weight threshold of 0.3 to include moderately relevant truths
+        weights = {}
+        for truth_type in ('reference', 'regulatory', 'compliance'):
+            should_gather, weight = truth_router_instance.should_gather(truth_type, routing, 0.3)
+            if should_gather:
+                weights[truth_type] = weight
+        
+        # Store routing info in analysis for downstream use
+        analysis['truth_routing'] = {
+            'category': routing.query_category,
+            'domain': routing.domain_detected,
+            'confidence': routing.confidence,
+            'reasoning': routing.reasoning
+        }
+        
+        return routing, weights
+    
+    def _finish_reference_library(self, question: str, analysis: Dict, routing: Any,
+                                  weights: Dict[str, Optional[float]],
+                                  reference: List[Truth], regulatory: List[Truth],
+                                  compliance: List[Truth]) -> Tuple[List[Truth], List[Truth], List[Truth]]:
+        """
+        Rank, cite and gap-check gathered Reference Library truths.
+        
+        Split from gathering so the concurrent path can run it on whichever
+        library truths arrived within their time budget.
+        """
+        if routing is not None:
+            # Tag results with routing weight for later prioritization
+            for truth_type, truths in (('reference', reference), ('regulatory', regulatory),
+                                       ('compliance', compliance)):
+                for t in truths:
                     t.metadata = t.metadata or {}
-                    t.metadata['routing_weight'] = comp_weight
-            
-            # Store routing info in analysis for downstream use
-            analysis['truth_routing'] = {
-                'category': routing.query_category,
-                'domain': routing.domain_detected,
-                'confidence': routing.confidence,
-                'reasoning': routing.reasoning
-            }
+                    t.metadata['routing_weight'] = weights.get(truth_type)
             
             # Phase 2B.4: Multi-factor relevance scoring and filtering
             # (Supersedes 2B.3 SourcePrioritizer - includes authority + recency + jurisdiction)
@@ -3619,16 +3784,6 @@ DO NOT:
                     )
                     
                 logger.warning(f"[GATHER-LIBRARY] Re-ranked results by source authority")
-        else:
-            # Fallback: gather from all truth types (original behavior)
-            if self.reference_gatherer:
-                reference = self.reference_gatherer.gather(question, analysis)
-                
-            if self.regulatory_gatherer:
-                regulatory = self.regulatory_gatherer.gather(question, analysis)
-                
-            if self.compliance_gatherer:
-                compliance = self.compliance_gatherer.gather(question, analysis)
         
         # Phase 2B.5: Collect citations from all gathered truths
         if CITATION_TRACKER_AVAILABLE and CitationCollector:
@@ -0,0 +1,279 @@
+"""
+XLR8 Intelligence Engine - Concurrent Gather Scheduler
+=======================================================
+
+Runs the Five Truths gatherers concurrently, each with its own time budget.
+
+The gatherers are independent (a DuckDB query, several ChromaDB searches
+and their embeddings), so running them one after another made chat latency
+the SUM of all of them. With the scheduler it is roughly the slowest one,
+capped by its budget.
+
+- Lanes: tasks in the same lane run serially in one worker. DuckDB
+  gatherers share a lane because they share one connection; each ChromaDB
+  gatherer gets its own.
+- Budgets: each task has a deadline measured from submission. A task that
+  misses it is reported as 'timeout' and its late result is discarded.
+- Cancellation: queued tasks past their deadline never start; running ones
+  get their cancel event set (gatherers can check BaseGatherer.is_cancelled).
+- Histograms: per-gatherer latency buckets, timeouts and errors for the
+  metrics endpoint.
+- Tracing: lanes run in the submitter's trace context, one gather.<name>
+  span per task (queue wait as an attribute).
+
+Budgets can be overridden per truth type with
+INTELLIGENCE_GATHER_BUDGET_<TRUTH>_MS (e.g. INTELLIGENCE_GATHER_BUDGET_REALITY_MS).
+INTELLIGENCE_CONCURRENT_GATHER=false restores sequential gathering.
+
+Deploy to: backend/utils/intelligence/gather_scheduler.py
+"""
+
+import os
+import time
+import logging
+import threading
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, List, Optional
+
+from utils.tracing import in_context, span
+
+logger = logging.getLogger(__name__)
+
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+CONCURRENT_GATHER_ENABLED = os.getenv('INTELLIGENCE_CONCURRENT_GATHER', 'true').lower() not in ('0', 'false', 'no')
+
+# Reality may generate SQL with an LLM, so it gets the longest budget
+DEFAULT_GATHER_BUDGETS_MS = {
+    'reality': 30000,
+    'intent': 8000,
+    'configuration': 10000,
+    'reference': 8000,
+    'regulatory': 8000,
+    'compliance': 8000,
+}
+
+GATHER_POOL_WORKERS = int(os.getenv('INTELLIGENCE_GATHER_WORKERS', '12'))
+
+LATENCY_BUCKETS_MS = [50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000]
+
+
+def get_gather_budget_ms(name: str) -> int:
+    """Budget for a gatherer, honoring the env override."""
+    override = os.getenv(f'INTELLIGENCE_GATHER_BUDGET_{name.upper()}_MS')
+    if override:
+        try:
+            return int(override)
+        except ValueError:
+            logger.warning(f"[GATHER] Ignoring invalid budget override for {name}: {override}")
+    return DEFAULT_GATHER_BUDGETS_MS.get(name, 10000)
+
+
+# =============================================================================
+# LATENCY HISTOGRAMS
+# =============================================================================
+
+class GatherLatencyHistogram:
+    """Cumulative latency histogram and outcome counters for one gatherer."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.bucket_counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)  # last = +Inf
+        self.count = 0
+        self.sum_ms = 0.0
+        self.outcomes = {'ok': 0, 'timeout': 0, 'error': 0}
+
+    def observe(self, elapsed_ms: float, status: str):
+        for i, bound in enumerate(LATENCY_BUCKETS_MS):
+            if elapsed_ms <= bound:
+                self.bucket_counts[i] += 1
+                break
+        else:
+            self.bucket_counts[-1] += 1
+        self.count += 1
+        self.sum_ms += elapsed_ms
+        self.outcomes[status] = self.outcomes.get(status, 0) + 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bucket bound containing the q-quantile (None if unbounded/empty)."""
+        if not self.count:
+            return None
+        target = q * self.count
+        running = 0
+        for i, bound in enumerate(LATENCY_BUCKETS_MS):
+            running += self.bucket_counts[i]
+            if running >= target:
+                return float(bound)
+        return None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'sum_ms': round(self.sum_ms, 1),
+            'avg_ms': round(self.sum_ms / self.count, 1) if self.count else 0.0,
+            'p50_ms': self.quantile(0.5),
+            'p95_ms': self.quantile(0.95),
+            'buckets': {
+                **{str(b): c for b, c in zip(LATENCY_BUCKETS_MS, self.bucket_counts)},
+                '+Inf': self.bucket_counts[-1],
+            },
+            **self.outcomes,
+        }
+
+
+_histograms: Dict[str, GatherLatencyHistogram] = {}
+_histograms_lock = threading.Lock()
+
+
+def _observe(name: str, elapsed_ms: float, status: str):
+    with _histograms_lock:
+        hist = _histograms.get(name)
+        if hist is None:
+            hist = _histograms[name] = GatherLatencyHistogram(name)
+        hist.observe(elapsed_ms, status)
+
+
+def get_gather_stats() -> Dict[str, Dict[str, Any]]:
+    """Per-gatherer latency histograms and outcome counts."""
+    with _histograms_lock:
+        return {name: hist.to_dict() for name, hist in sorted(_histograms.items())}
+
+
+def get_gather_stats_prometheus() -> str:
+    """Histograms in Prometheus text exposition format."""
+    lines = [
+        '# HELP xlr8_gather_latency_ms Truth gatherer latency in milliseconds',
+        '# TYPE xlr8_gather_latency_ms histogram',
+    ]
+    with _histograms_lock:
+        for name, hist in sorted(_histograms.items()):
+            running = 0
+            for bound, count in zip(LATENCY_BUCKETS_MS, hist.bucket_counts):
+                running += count
+                lines.append(f'xlr8_gather_latency_ms_bucket{{gatherer="{name}",le="{bound}"}} {running}')
+            lines.append(f'xlr8_gather_latency_ms_bucket{{gatherer="{name}",le="+Inf"}} {hist.count}')
+            lines.append(f'xlr8_gather_latency_ms_sum{{gatherer="{name}"}} {round(hist.sum_ms, 1)}')
+            lines.append(f'xlr8_gather_latency_ms_count{{gatherer="{name}"}} {hist.count}')
+            for status, value in hist.outcomes.items():
+                lines.append(f'xlr8_gather_outcomes_total{{gatherer="{name}",status="{status}"}} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+def reset_gather_stats():
+    with _histograms_lock:
+        _histograms.clear()
+
+
+# =============================================================================
+# SCHEDULER
+# =============================================================================
+
+class GatherTask:
+    """One gatherer call: fn(cancel_event) -> result."""
+
+    def __init__(self, name: str, fn: Callable[[threading.Event], Any],
+                 budget_ms: Optional[int] = None, lane: Optional[str] = None):
+        self.name = name
+        self.fn = fn
+        self.budget_ms = budget_ms if budget_ms is not None else get_gather_budget_ms(name)
+        self.lane = lane or name
+        self.cancel_event = threading.Event()
+        self.future: Future = Future()
+        self.submitted = 0.0
+        self.deadline = 0.0
+        self.finished_at: Optional[float] = None
+        self.outcome: Optional[Dict[str, Any]] = None
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=GATHER_POOL_WORKERS, thread_name_prefix='gather')
+        return _executor
+
+
+def _run_lane(tasks: List[GatherTask]):
+    """Run a lane's tasks in order, skipping ones already past their deadline."""
+    for task in tasks:
+        if task.cancel_event.is_set() or time.monotonic() >= task.deadline:
+            task.future.cancel()
+            continue
+        if not task.future.set_running_or_notify_cancel():
+            continue
+        try:
+            with span(f'gather.{task.name}', lane=task.lane, budget_ms=task.budget_ms,
+                      queued_ms=round((time.monotonic() - task.submitted) * 1000, 1)):
+                result = task.fn(task.cancel_event)
+        except BaseException as e:
+            task.finished_at = time.monotonic()
+            task.future.set_exception(e)
+        else:
+            task.finished_at = time.monotonic()
+            task.future.set_result(result)
+
+
+def submit_gather_tasks(tasks: List[GatherTask]) -> float:
+    """Start tasks (one worker per lane); returns the submission time."""
+    submitted = time.monotonic()
+    lanes: Dict[str, List[GatherTask]] = {}
+    for task in tasks:
+        task.submitted = submitted
+        task.deadline = submitted + task.budget_ms / 1000.0
+        lanes.setdefault(task.lane, []).append(task)
+
+    executor = _get_executor()
+    for lane_tasks in lanes.values():
+        executor.submit(in_context(_run_lane), lane_tasks)
+    return submitted
+
+
+def run_gather_tasks(tasks: List[GatherTask]) -> Dict[str, Dict[str, Any]]:
+    """
+    Run gather tasks concurrently and wait for each up to its budget.
+
+    Returns {name: {'status': ok|timeout|error, 'result', 'error', 'elapsed_ms', 'budget_ms'}}.
+    """
+    submit_gather_tasks(tasks)
+    return {task.name: wait_gather_task(task) for task in tasks}
+
+
+def wait_gather_task(task: GatherTask) -> Dict[str, Any]:
+    """Wait for one task until its deadline; record its outcome once."""
+    if task.outcome is not None:
+        return task.outcome
+
+    remaining = max(0.0, task.deadline - time.monotonic())
+    outcome: Dict[str, Any] = {'status': 'ok', 'result': None, 'error': None}
+    try:
+        outcome['result'] = task.future.result(timeout=remaining)
+    except (FutureTimeoutError, CancelledError):
+        # Still running at the deadline, or skipped in its lane after it
+        outcome['status'] = 'timeout'
+        cancel_gather_tasks([task])
+    except Exception as e:
+        outcome['status'] = 'error'
+        outcome['error'] = str(e)
+
+    # Latency as the caller saw it: submission to completion (or to giving up)
+    ended = task.finished_at if outcome['status'] != 'timeout' and task.finished_at else time.monotonic()
+    outcome['elapsed_ms'] = round((ended - task.submitted) * 1000, 1)
+    outcome['budget_ms'] = task.budget_ms
+    _observe(task.name, outcome['elapsed_ms'], outcome['status'])
+    task.outcome = outcome
+    return outcome
+
+
+def cancel_gather_tasks(tasks: List[GatherTask]):
+    """Cancel queued tasks and signal running ones; their results are discarded."""
+    for task in tasks:
+        task.cancel_event.set()
+        task.future.cancel()
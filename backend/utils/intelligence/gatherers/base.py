@@ -101,6 +101,16 @@ class BaseGatherer(ABC):
             }
         )
     
+    def is_cancelled(self, context: Dict[str, Any]) -> bool:
+        """
+        True if the engine gave up on this gather (time budget exceeded).
+        
+        Gatherers run concurrently with a budget each; long-running ones
+        should check this between expensive steps and return early.
+        """
+        cancel_event = context.get('_cancel_event') if context else None
+        return bool(cancel_event and cancel_event.is_set())
+    
     def log_gather_start(self, question: str):
         """Log the start of a gather operation."""
         logger.info(f"[GATHER-{self.truth_type.value.upper()}] "
@@ -101,6 +101,11 @@ class RealityGatherer(DuckDBGatherer):
             if not sql:
                 return truths
             
+            # SQL generation may have used the whole budget - don't run it for nobody
+            if self.is_cancelled(context):
+                logger.warning("[GATHER-REALITY] Cancelled after SQL generation (time budget exceeded)")
+                return truths
+            
             # Store smart assumption if present
             if sql_result.get('smart_assumption'):
                 self.last_smart_assumption = sql_result['smart_assumption']
@@ -39,6 +39,8 @@ from dataclasses import dataclass, field
 from enum import Enum
 import traceback
 
+from utils.tracing import current_span, traced
+
 logger = logging.getLogger(__name__)
 
 
@@ -283,6 +285,7 @@ class BusinessRuleInterpreter:
         except Exception as e:
             logger.warning(f"[BUSINESS_RULES] Could not load schema: {e}")
     
+    @traced('query_engine.interpret_rules')
     def interpret(self, question: str) -> Tuple[List[BusinessRule], Optional[ClarificationRequest]]:
         """
         Interpret a question using learned rules.
@@ -700,6 +703,7 @@ class ContextAssembler:
         except Exception as e:
             logger.warning(f"[CONTEXT] Could not load term mappings: {e}")
         
+    @traced('query_engine.assemble_context')
     def assemble(self, question: str) -> QueryContext:
         """
         Main entry point. Analyzes question and assembles context.
@@ -1227,6 +1231,7 @@ class SQLGenerator:
         """
         self.llm = llm_orchestrator
         
+    @traced('query_engine.generate_sql')
     def generate(self, context: QueryContext, intent_context: str = "") -> Tuple[str, Optional[str]]:
         """
         Generate SQL for the given context.
@@ -1895,6 +1900,7 @@ class QueryExecutor:
         """
         self.conn = conn
         
+    @traced('query_engine.execute')
     def execute(self, sql: str) -> QueryResult:
         """
         Execute SQL and return results.
@@ -1994,6 +2000,7 @@ class ResponseSynthesizer:
         """
         self.llm = llm_orchestrator
         
+    @traced('query_engine.synthesize')
     def synthesize(self, context: QueryContext, result: QueryResult, intent: 'ResolvedIntent' = None) -> SynthesizedResponse:
         """
         Create a natural language response from query results.
@@ -2338,6 +2345,7 @@ class QueryEngine:
             self._init_components()
             logger.info("[ENGINE] Loaded context from structured handler")
     
+    @traced('query_engine.ask', root=True)
     def ask(self, question: str, mode=None, context: Dict = None, skip_confirmation: bool = False, session_id: str = None) -> SynthesizedResponse:
         """
         Answer a question.
@@ -2354,6 +2362,7 @@ class QueryEngine:
         Returns:
             SynthesizedResponse (compatible with old SynthesizedAnswer)
         """
+        current_span().set_attributes(project=self.project, question_chars=len(question))
         logger.warning(f"[ENGINE] ==========================================")
         logger.warning(f"[ENGINE] NEW QUESTION: {question}")
         logger.warning(f"[ENGINE] Project: {self.project}")
@@ -32,6 +32,7 @@ Version: 1.0.0
 import logging
 import json
 import re
+import time
 from typing import Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass, field
 from enum import Enum
@@ -46,6 +47,14 @@ except ImportError:
     TERM_INDEX_AVAILABLE = False
     logger.debug("TermIndex not available - using fallback resolution")
 
+# Import WorkforceCube for precomputed headcount aggregates
+try:
+    from .workforce_cube import WorkforceCube
+    WORKFORCE_CUBE_AVAILABLE = True
+except ImportError:
+    WORKFORCE_CUBE_AVAILABLE = False
+    logger.debug("WorkforceCube not available - snapshots will scan")
+
 
 # =============================================================================
 # INTENT TYPES - What is the user trying to do?
@@ -471,6 +480,65 @@ class ResolvedQuery:
     total_count: Optional[int] = None
     
 
+class _ScanWorkforceCounts:
+    """
+    Snapshot counts computed by scanning the employee table.
+    
+    Same interface as workforce_cube.WorkforceCounts; used when the cube
+    is missing or stale.
+    """
+    
+    def __init__(self, conn, table_name: str, status_col: str,
+                 hire_date_col: Optional[str], term_date_col: Optional[str]):
+        self.conn = conn
+        self.table_name = table_name
+        self.status_col = status_col
+        self.hire_date_col = hire_date_col
+        self.term_date_col = term_date_col
+        self.total = self._count(f'SELECT COUNT(*) FROM "{table_name}"')
+    
+    def _count(self, sql: str) -> int:
+        try:
+            result = self.conn.execute(sql).fetchone()
+            return result[0] if result else 0
+        except Exception as e:
+            logger.warning(f"[SNAPSHOT] Query failed: {e}")
+            return 0
+    
+    def _in(self, values: List) -> str:
+        return f'"{self.status_col}" IN ({",".join(repr(v) for v in values)})'
+    
+    def status_count(self, values: List) -> int:
+        return self._count(f'SELECT COUNT(*) FROM "{self.table_name}" WHERE {self._in(values)}')
+    
+    def termed_since(self, year: int, term_values: List) -> int:
+        return self._count(f'''
+            SELECT COUNT(*) FROM "{self.table_name}" 
+            WHERE {self._in(term_values)}
+            AND TRY_CAST("{self.term_date_col}" AS DATE) >= '{year}-01-01'
+        ''')
+    
+    def termed_in_year(self, year: int, term_values: Optional[List] = None) -> int:
+        status_clause = f'{self._in(term_values)} AND ' if term_values is not None else ''
+        return self._count(f'''
+            SELECT COUNT(*) FROM "{self.table_name}" 
+            WHERE {status_clause}TRY_CAST("{self.term_date_col}" AS DATE) >= '{year}-01-01'
+            AND TRY_CAST("{self.term_date_col}" AS DATE) < '{year + 1}-01-01'
+        ''')
+    
+    def active_at_year_end(self, year: int) -> int:
+        # Use TRY_CAST to handle various date formats (MM/DD/YYYY, YYYY-MM-DD, etc.)
+        return self._count(f'''
+            SELECT COUNT(*) FROM "{self.table_name}" 
+            WHERE TRY_CAST("{self.hire_date_col}" AS DATE) <= '{year}-12-31'
+            AND (
+                "{self.term_date_col}" IS NULL 
+                OR TRIM(CAST("{self.term_date_col}" AS VARCHAR)) = ''
+                OR TRY_CAST("{self.term_date_col}" AS DATE) > '{year}-12-31'
+            )
+        ''')
+
+
 class QueryResolver:
     """
     Resolves queries using LOOKUPS against pre-computed intelligence.
@@ -977,20 +1045,37 @@ WHERE {where_sql}'''
             dimensional_columns = self._lookup_dimensional_columns(project, table_name)
             logger.warning(f"[RESOLVER] Found {len(dimensional_columns)} dimensional columns for breakdowns")
             
-            # Query 1: Get the answer (active count or total)
-            if status_column and active_values:
-                values_sql = ', '.join(f"'{v}'" for v in active_values)
-                answer_sql = f'SELECT COUNT(*) as cnt FROM "{table_name}" WHERE "{status_column}" IN ({values_sql})'
+            # Query 1+2: Answer (active count or total) and total in table.
+            # Read from the workforce cube when it is fresh for this status column.
+            cube_status_counts = None
+            if WORKFORCE_CUBE_AVAILABLE:
+                try:
+                    cube_status_counts = WorkforceCube(self.conn, project).status_counts(table_name, status_column)
+                except Exception as e:
+                    logger.debug(f"[RESOLVER] Cube unavailable for context: {e}")
+            
+            if cube_status_counts is not None:
+                wanted = {str(v) for v in active_values} if status_column and active_values else None
+                context['total_in_table'] = sum(cube_status_counts.values())
+                context['answer'] = (
+                    sum(cnt for status, cnt in cube_status_counts.items() if status in wanted)
+                    if wanted is not None else context['total_in_table']
+                )
+                context['source'] = 'cube'
             else:
-                answer_sql = f'SELECT COUNT(*) as cnt FROM "{table_name}"'
-            
-            result = self.conn.execute(answer_sql).fetchone()
-            context['answer'] = result[0] if result else 0
-            
-            # Query 2: Get total in table (for context)
-            total_sql = f'SELECT COUNT(*) as cnt FROM "{table_name}"'
-            result = self.conn.execute(total_sql).fetchone()
-            context['total_in_table'] = result[0] if result else 0
+                if status_column and active_values:
+                    values_sql = ', '.join(f"'{v}'" for v in active_values)
+                    answer_sql = f'SELECT COUNT(*) as cnt FROM "{table_name}" WHERE "{status_column}" IN ({values_sql})'
+                else:
+                    answer_sql = f'SELECT COUNT(*) as cnt FROM "{table_name}"'
+                
+                result = self.conn.execute(answer_sql).fetchone()
+                context['answer'] = result[0] if result else 0
+                
+                total_sql = f'SELECT COUNT(*) as cnt FROM "{table_name}"'
+                result = self.conn.execute(total_sql).fetchone()
+                context['total_in_table'] = result[0] if result else 0
+                context['source'] = 'scan'
             
             # Query 3: Status breakdown (ALL statuses, not just active)
             if status_column:
@@ -2620,14 +2705,11 @@ WHERE {where_sql}'''
             
             logger.warning(f"[SNAPSHOT] Status mapping: active={active_vals}, term={term_vals}, loa={loa_vals}")
             
-            # Find term date column for filtering recent terms
-            # Try multiple column hints
-            term_date_col = None
-            for hint in ['termination_date', 'term_date', 'end_date', 'separation_date']:
-                term_date_col = self._find_date_column(project, table_name, hint)
-                if term_date_col:
-                    break
-            logger.warning(f"[SNAPSHOT] Term date column: {term_date_col}")
+            # Find hire/term date columns for point-in-time calculations
+            columns = self._resolve_workforce_columns(project, table_name)
+            term_date_col = columns['term_date']
+            hire_date_col = columns['hire_date']
+            logger.warning(f"[SNAPSHOT] Term date column: {term_date_col}, hire date column: {hire_date_col}")
             
             # Build the snapshot
             snapshot = {
@@ -2638,28 +2720,24 @@ WHERE {where_sql}'''
                 'table': table_name
             }
             
-            # Helper to safely count
-            def safe_count(sql):
+            # Counts come from the precomputed cube when it is fresh, else from scans
+            started = time.time()
+            counts = None
+            if WORKFORCE_CUBE_AVAILABLE:
                 try:
-                    result = self.conn.execute(sql).fetchone()
-                    return result[0] if result else 0
+                    counts = WorkforceCube(self.conn, project).counts(
+                        table_name, status_col, hire_date_col, term_date_col
+                    )
                 except Exception as e:
-                    logger.warning(f"[SNAPSHOT] Query failed: {e}")
-                    return 0
-            
-            # Find hire date column for point-in-time calculations
-            hire_date_col = None
-            for hint in ['hire_date', 'last_hire_date', 'original_hire_date', 'start_date', 'employment_date']:
-                hire_date_col = self._find_date_column(project, table_name, hint)
-                if hire_date_col:
-                    break
-            logger.warning(f"[SNAPSHOT] Hire date column: {hire_date_col}")
+                    logger.warning(f"[SNAPSHOT] Cube unavailable: {e}")
+            source = 'cube' if counts else 'scan'
+            if counts is None:
+                counts = _ScanWorkforceCounts(self.conn, table_name, status_col, hire_date_col, term_date_col)
             
             # Current state counts (for reference)
-            active_sql = f'SELECT COUNT(*) FROM "{table_name}" WHERE "{status_col}" IN ({",".join(repr(v) for v in active_vals)})'
-            current_active = safe_count(active_sql) if active_vals else 0
-            current_loa = safe_count(f'SELECT COUNT(*) FROM "{table_name}" WHERE "{status_col}" IN ({",".join(repr(v) for v in loa_vals)})') if loa_vals else 0
-            total_records = safe_count(f'SELECT COUNT(*) FROM "{table_name}"')
+            current_active = counts.status_count(active_vals) if active_vals else 0
+            current_loa = counts.status_count(loa_vals) if loa_vals else 0
+            total_records = counts.total
             
             # =====================================================================
             # POINT-IN-TIME HEADCOUNT CALCULATION
@@ -2669,10 +2747,6 @@ WHERE {where_sql}'''
             logger.warning(f"[SNAPSHOT] Point-in-time capable: {can_do_point_in_time}")
             
             for year in years:
-                year_end = f'{year}-12-31'
-                next_year_start = f'{year + 1}-01-01'
-                year_start = f'{year}-01-01'
-                
                 year_data = {
                     'active': 0,
                     'termed': 0,
@@ -2683,7 +2757,6 @@ WHERE {where_sql}'''
                 if can_do_point_in_time:
                     # POINT-IN-TIME: Who was active as of Dec 31 of this year?
                     # Criteria: hired <= year_end AND (term_date IS NULL OR term_date > year_end)
-                    # Note: We check status='A' to exclude people who were never active
                     
                     if year == current_year:
                         # Current year = current state (today's snapshot)
@@ -2692,26 +2765,11 @@ WHERE {where_sql}'''
                         
                         # Terms YTD in current year
                         if term_vals:
-                            year_data['termed'] = safe_count(f'''
-                                SELECT COUNT(*) FROM "{table_name}" 
-                                WHERE "{status_col}" IN ({",".join(repr(v) for v in term_vals)})
-                                AND TRY_CAST("{term_date_col}" AS DATE) >= '{year_start}'
-                            ''')
+                            year_data['termed'] = counts.termed_since(year, term_vals)
                     else:
                         # Historical year - calculate point-in-time
-                        # Active as of year-end: hired by year-end AND not termed by year-end
                         # This includes people who are CURRENTLY termed but weren't termed yet at year-end
-                        # Use TRY_CAST to handle various date formats (MM/DD/YYYY, YYYY-MM-DD, etc.)
-                        active_at_year_end = safe_count(f'''
-                            SELECT COUNT(*) FROM "{table_name}" 
-                            WHERE TRY_CAST("{hire_date_col}" AS DATE) <= '{year_end}'
-                            AND (
-                                "{term_date_col}" IS NULL 
-                                OR TRIM("{term_date_col}") = ''
-                                OR TRY_CAST("{term_date_col}" AS DATE) > '{year_end}'
-                            )
-                        ''')
-                        year_data['active'] = active_at_year_end
+                        year_data['active'] = counts.active_at_year_end(year)
                         
                         # LOA at year-end (approximation - use current LOA if no LOA date column)
                         # TODO: Add LOA date handling if column exists
@@ -2719,11 +2777,7 @@ WHERE {where_sql}'''
                         
                         # Termed during this calendar year
                         if term_vals:
-                            year_data['termed'] = safe_count(f'''
-                                SELECT COUNT(*) FROM "{table_name}" 
-                                WHERE TRY_CAST("{term_date_col}" AS DATE) >= '{year_start}'
-                                AND TRY_CAST("{term_date_col}" AS DATE) <= '{year_end}'
-                            ''')
+                            year_data['termed'] = counts.termed_in_year(year)
                 else:
                     # NO POINT-IN-TIME: Fall back to current state with term breakdowns
                     year_data['active'] = current_active
@@ -2731,12 +2785,7 @@ WHERE {where_sql}'''
                     
                     if term_vals and term_date_col:
                         # At least show terms per year
-                        year_data['termed'] = safe_count(f'''
-                            SELECT COUNT(*) FROM "{table_name}" 
-                            WHERE "{status_col}" IN ({",".join(repr(v) for v in term_vals)})
-                            AND TRY_CAST("{term_date_col}" AS DATE) >= '{year_start}'
-                            AND TRY_CAST("{term_date_col}" AS DATE) < '{next_year_start}'
-                        ''')
+                        year_data['termed'] = counts.termed_in_year(year, term_vals)
                     else:
                         year_data['termed'] = 0
                 
@@ -2758,10 +2807,12 @@ GROUP BY "{status_col}"'''
                 'total_records': total_records,
                 'term_date_available': term_date_col is not None,
                 'hire_date_available': hire_date_col is not None,
-                'point_in_time': can_do_point_in_time
+                'point_in_time': can_do_point_in_time,
+                'source': source,
+                'latency_ms': round((time.time() - started) * 1000, 1)
             }
             
-            logger.warning(f"[SNAPSHOT] Generated: {snapshot['years']}")
+            logger.warning(f"[SNAPSHOT] Generated from {source}: {snapshot['years']}")
             return snapshot
             
         except Exception as e:
@@ -2770,6 +2821,42 @@ GROUP BY "{status_col}"'''
             traceback.print_exc()
             return None
     
+    def _resolve_workforce_columns(self, project: str, table_name: str) -> Dict[str, Optional[str]]:
+        """
+        LOOKUP the columns the workforce snapshot and cube are built from.
+        
+        Date columns come from name hints; company/location from
+        _column_profiles filter_category.
+        """
+        columns = {'hire_date': None, 'term_date': None, 'company': None, 'location': None}
+        
+        for hint in ['termination_date', 'term_date', 'end_date', 'separation_date']:
+            columns['term_date'] = self._find_date_column(project, table_name, hint)
+            if columns['term_date']:
+                break
+        
+        for hint in ['hire_date', 'last_hire_date', 'original_hire_date', 'start_date', 'employment_date']:
+            columns['hire_date'] = self._find_date_column(project, table_name, hint)
+            if columns['hire_date']:
+                break
+        
+        for category in ('company', 'location'):
+            try:
+                row = self.conn.execute("""
+                    SELECT column_name
+                    FROM _column_profiles
+                    WHERE LOWER(project) = LOWER(?)
+                      AND LOWER(table_name) = LOWER(?)
+                      AND filter_category = ?
+                    ORDER BY filter_priority DESC
+                    LIMIT 1
+                """, [project, table_name, category]).fetchone()
+                columns[category] = row[0] if row else None
+            except Exception as e:
+                logger.debug(f"[RESOLVER] No {category} column for {table_name}: {e}")
+        
+        return columns
+    
     def _resolve_generic_count(self, project: str, parsed: ParsedIntent,
                                 result: ResolvedQuery) -> ResolvedQuery:
         """
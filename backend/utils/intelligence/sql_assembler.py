@@ -41,6 +41,8 @@ from dataclasses import dataclass, field
 from enum import Enum
 import duckdb
 
+from utils.tracing import traced
+
 logger = logging.getLogger(__name__)
 
 
@@ -284,6 +286,7 @@ class SQLAssembler:
             logger.warning(f"[SQL_ASSEMBLER] Could not find tables with column '{column_name}': {e}")
             return set()
     
+    @traced('sql_assembler.assemble')
     def assemble(self, 
                  intent: QueryIntent,
                  term_matches: List[TermMatch],
@@ -47,6 +47,8 @@ from .response_patterns import (
     get_formatter, format_response, render_response
 )
 
+from utils.tracing import traced
+
 logger = logging.getLogger(__name__)
 
 # Log version on import
@@ -121,6 +123,7 @@ class SynthesisPipeline:
         
         logger.info(f"[SYNTHESIS] Pipeline initialized (llm={'available' if llm_synthesizer else 'template-only'})")
     
+    @traced('engine.synthesize')
     def synthesize(
         self,
         question: str,
@@ -32,6 +32,8 @@ from dataclasses import dataclass
 from typing import Dict, List, Optional, Set, Tuple, Any
 import duckdb
 
+from utils.tracing import traced
+
 logger = logging.getLogger(__name__)
 
 # Evolution 3: Import value parser for numeric expressions
@@ -863,6 +865,7 @@ class TermIndex:
     # QUERY-TIME METHODS
     # =========================================================================
     
+    @traced('term_index.resolve_terms')
     def resolve_terms(self, terms: List[str]) -> List[TermMatch]:
         """
         Resolve a list of terms to SQL filter information.
@@ -1461,6 +1464,7 @@ class TermIndex:
         
         return negated_matches
     
+    @traced('term_index.resolve_terms_enhanced')
     def resolve_terms_enhanced(self, terms: List[str], detect_numeric: bool = True, detect_dates: bool = True, detect_or: bool = True, detect_negation: bool = True, full_question: str = None) -> List[TermMatch]:
         """
         Enhanced term resolution with numeric, date, OR, and negation expression support.
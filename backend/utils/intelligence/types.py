@@ -128,6 +128,9 @@ class SynthesizedAnswer:
     
     # Phase 2B.5: Citations for source attribution
     citations: Optional[List[Dict]] = None  # List of Citation.to_dict() results
+    
+    # Concurrent gathering: per-gatherer status/latency, timed_out list, partial flag
+    gather_metadata: Optional[Dict] = None
 
 
 # =============================================================================
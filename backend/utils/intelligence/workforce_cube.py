@@ -0,0 +1,467 @@
+"""
+Workforce Cube - Precomputed Headcount Aggregates
+
+Built once at upload time so headcount-style questions never rescan the
+employee table. The workforce snapshot used to run 8-12 separate COUNT
+queries per question (per year, per status); with the cube it reads a few
+hundred pre-aggregated rows and does the arithmetic in Python.
+
+ARCHITECTURE:
+- _workforce_cube: one DuckDB GROUP BY GROUPING SETS over the employee
+  table, keyed by (project, source_table, grouping_id)
+- _workforce_cube_meta: which columns the cube was built from and the
+  _schema_metadata version of the source table at build time
+
+GROUPING SETS (grouping_id = DuckDB GROUPING() bitmask):
+- (status, hire_year, term_year, term_missing)  → snapshot detail
+- (status, company), (status, location), (status, company, location)
+- (status), ()                                  → status counts, total
+
+Year granularity is exact for the snapshot: every comparison it makes
+(hired by Dec 31, termed after Dec 31, termed since Jan 1) falls on a
+year boundary.
+
+REFRESH:
+refresh_workforce_cube() rebuilds a project's cube only when the source
+table's _schema_metadata version changed (re-upload → new row). Readers
+check the same version and fall back to scanning when the cube is stale.
+The cube tables are created by the first build, so readers never issue
+DDL, and a build runs its transaction on its own cursor so statements
+other threads send on the shared connection can't join (or be rolled
+back with) it.
+
+Usage:
+    from backend.utils.intelligence.workforce_cube import WorkforceCube
+
+    cube = WorkforceCube(conn, project)
+    counts = cube.counts(table_name, status_column, hire_col, term_col)
+    if counts:
+        active = counts.status_count(['A'])
+"""
+
+import logging
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+# Dimensions in GROUPING() order - bit (len - 1 - i) is set when dimension i
+# is rolled up in a grouping set
+CUBE_DIMENSIONS = ['status', 'hire_year', 'term_year', 'term_missing', 'company', 'location']
+
+GROUPING_SETS = {
+    'detail': ('status', 'hire_year', 'term_year', 'term_missing'),
+    'status_company': ('status', 'company'),
+    'status_location': ('status', 'location'),
+    'status_company_location': ('status', 'company', 'location'),
+    'status': ('status',),
+    'total': (),
+}
+
+
+def grouping_id(dimensions: Iterable[str]) -> int:
+    """GROUPING() value DuckDB assigns to a grouping set."""
+    kept = set(dimensions)
+    value = 0
+    for dim in CUBE_DIMENSIONS:
+        value = (value << 1) | (0 if dim in kept else 1)
+    return value
+
+
+def _quote(column: Optional[str]) -> Optional[str]:
+    return '"' + column.replace('"', '""') + '"' if column else None
+
+
+class WorkforceCounts:
+    """
+    Snapshot arithmetic over the cube's detail rows.
+
+    Mirrors the predicates _generate_workforce_snapshot used to run as SQL,
+    evaluated against (status, hire_year, term_year, term_missing, count).
+    """
+
+    def __init__(self, detail_rows: List[tuple], status_counts: Dict[str, int], total: int):
+        self.rows = detail_rows
+        self.status_counts = status_counts
+        self.total = total
+
+    def status_count(self, values: List[Any]) -> int:
+        wanted = {str(v) for v in values}
+        return sum(cnt for status, cnt in self.status_counts.items() if status in wanted)
+
+    def termed_since(self, year: int, term_values: List[Any]) -> int:
+        """Status in term_values AND term date >= Jan 1 of year."""
+        wanted = {str(v) for v in term_values}
+        return sum(
+            cnt for status, _, term_year, _, cnt in self.rows
+            if status in wanted and term_year is not None and term_year >= year
+        )
+
+    def termed_in_year(self, year: int, term_values: Optional[List[Any]] = None) -> int:
+        """Term date within the calendar year (optionally restricted to term statuses)."""
+        wanted = {str(v) for v in term_values} if term_values is not None else None
+        return sum(
+            cnt for status, _, term_year, _, cnt in self.rows
+            if term_year == year and (wanted is None or status in wanted)
+        )
+
+    def active_at_year_end(self, year: int) -> int:
+        """Hired by Dec 31 AND (no term date OR termed after Dec 31)."""
+        return sum(
+            cnt for _, hire_year, term_year, term_missing, cnt in self.rows
+            if hire_year is not None and hire_year <= year
+            and (term_missing or (term_year is not None and term_year > year))
+        )
+
+
+class WorkforceCube:
+    """
+    Build and read the per-project workforce cube.
+    """
+
+    def __init__(self, conn, project: str):
+        self.conn = conn
+        self.project = project
+
+    @staticmethod
+    def _ensure_tables(conn):
+        """Create the cube tables (write paths only - readers treat missing tables as no cube)."""
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS _workforce_cube (
+                project VARCHAR NOT NULL,
+                source_table VARCHAR NOT NULL,
+                grouping_id INTEGER NOT NULL,
+                status VARCHAR,
+                hire_year INTEGER,
+                term_year INTEGER,
+                term_missing BOOLEAN,
+                company VARCHAR,
+                location VARCHAR,
+                headcount BIGINT
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS _workforce_cube_meta (
+                project VARCHAR NOT NULL,
+                source_table VARCHAR NOT NULL,
+                source_version VARCHAR,
+                status_column VARCHAR,
+                hire_column VARCHAR,
+                term_column VARCHAR,
+                company_column VARCHAR,
+                location_column VARCHAR,
+                row_count BIGINT,
+                cube_rows INTEGER,
+                build_ms DOUBLE,
+                built_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+
+    # =========================================================================
+    # VERSIONING
+    # =========================================================================
+
+    def source_version(self, table_name: str) -> Optional[str]:
+        """Version of the source table from its current _schema_metadata row."""
+        try:
+            row = self.conn.execute("""
+                SELECT MAX(id), MAX(row_count), CAST(MAX(created_at) AS VARCHAR)
+                FROM _schema_metadata
+                WHERE LOWER(project) = LOWER(?)
+                  AND LOWER(table_name) = LOWER(?)
+                  AND is_current = TRUE
+            """, [self.project, table_name]).fetchone()
+        except Exception as e:
+            logger.debug(f"[CUBE] Could not read version for {table_name}: {e}")
+            return None
+        if not row or row[0] is None:
+            return None
+        return f"{row[0]}:{row[1]}:{row[2]}"
+
+    def get_meta(self, table_name: str) -> Optional[Dict]:
+        try:
+            row = self.conn.execute("""
+                SELECT source_version, status_column, hire_column, term_column,
+                       company_column, location_column, row_count, cube_rows, build_ms
+                FROM _workforce_cube_meta
+                WHERE LOWER(project) = LOWER(?) AND LOWER(source_table) = LOWER(?)
+            """, [self.project, table_name]).fetchone()
+        except Exception as e:
+            logger.debug(f"[CUBE] No cube meta for {table_name}: {e}")  # Never built
+            return None
+        if not row:
+            return None
+        keys = ['source_version', 'status_column', 'hire_column', 'term_column',
+                'company_column', 'location_column', 'row_count', 'cube_rows', 'build_ms']
+        return dict(zip(keys, row))
+
+    def is_fresh(self, table_name: str, meta: Optional[Dict] = None) -> bool:
+        meta = meta if meta is not None else self.get_meta(table_name)
+        if not meta:
+            return False
+        version = self.source_version(table_name)
+        return version is not None and version == meta['source_version']
+
+    # =========================================================================
+    # BUILD
+    # =========================================================================
+
+    def build(
+        self,
+        table_name: str,
+        status_column: Optional[str],
+        hire_column: Optional[str] = None,
+        term_column: Optional[str] = None,
+        company_column: Optional[str] = None,
+        location_column: Optional[str] = None,
+    ) -> Dict:
+        """
+        (Re)build the cube for one source table in a single scan.
+
+        Replaces this project/table's rows atomically; other tables and
+        projects are untouched.
+        """
+        start = time.time()
+        version = self.source_version(table_name)
+
+        def as_text(column):
+            return f'CAST({_quote(column)} AS VARCHAR)' if column else 'CAST(NULL AS VARCHAR)'
+
+        def year_of(column):
+            return (f'CAST(EXTRACT(YEAR FROM TRY_CAST({_quote(column)} AS DATE)) AS INTEGER)'
+                    if column else 'CAST(NULL AS INTEGER)')
+
+        # CAST to VARCHAR before TRIM so DATE-typed term columns work too
+        term_missing = (f'({_quote(term_column)} IS NULL OR TRIM(CAST({_quote(term_column)} AS VARCHAR)) = \'\')'
+                        if term_column else 'TRUE')
+
+        grouping_sets = ', '.join(
+            '(' + ', '.join(dims) + ')' for dims in GROUPING_SETS.values()
+        )
+
+        cursor = self.conn.cursor()
+        try:
+            self._ensure_tables(cursor)
+            cursor.execute("BEGIN TRANSACTION")
+            cursor.execute("""
+                DELETE FROM _workforce_cube
+                WHERE LOWER(project) = LOWER(?) AND LOWER(source_table) = LOWER(?)
+            """, [self.project, table_name])
+            cursor.execute(f"""
+                INSERT INTO _workforce_cube
+                SELECT ?, ?, GROUPING({', '.join(CUBE_DIMENSIONS)}),
+                       status, hire_year, term_year, term_missing, company, location,
+                       COUNT(*)
+                FROM (
+                    SELECT {as_text(status_column)} AS status,
+                           {year_of(hire_column)} AS hire_year,
+                           {year_of(term_column)} AS term_year,
+                           {term_missing} AS term_missing,
+                           {as_text(company_column)} AS company,
+                           {as_text(location_column)} AS location
+                    FROM {_quote(table_name)}
+                ) src
+                GROUP BY GROUPING SETS ({grouping_sets})
+            """, [self.project, table_name])
+
+            cube_rows, row_count = cursor.execute(f"""
+                SELECT COUNT(*), MAX(CASE WHEN grouping_id = {grouping_id(())} THEN headcount END)
+                FROM _workforce_cube
+                WHERE LOWER(project) = LOWER(?) AND LOWER(source_table) = LOWER(?)
+            """, [self.project, table_name]).fetchone()
+
+            build_ms = round((time.time() - start) * 1000, 1)
+            cursor.execute("""
+                DELETE FROM _workforce_cube_meta
+                WHERE LOWER(project) = LOWER(?) AND LOWER(source_table) = LOWER(?)
+            """, [self.project, table_name])
+            cursor.execute("""
+                INSERT INTO _workforce_cube_meta
+                    (project, source_table, source_version, status_column, hire_column, term_column,
+                     company_column, location_column, row_count, cube_rows, build_ms)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, [self.project, table_name, version, status_column, hire_column, term_column,
+                  company_column, location_column, row_count or 0, cube_rows, build_ms])
+            cursor.execute("COMMIT")
+        except Exception:
+            try:
+                cursor.execute("ROLLBACK")
+            except Exception:
+                pass  # Failed before BEGIN, or the transaction is already aborted
+            raise
+        finally:
+            cursor.close()
+
+        logger.info(f"[CUBE] Built {cube_rows} cube rows for {table_name} "
+                    f"({row_count} source rows) in {build_ms}ms")
+        return {
+            'table': table_name,
+            'source_version': version,
+            'row_count': row_count or 0,
+            'cube_rows': cube_rows,
+            'build_ms': build_ms,
+        }
+
+    def drop(self, table_name: Optional[str] = None):
+        """Remove cube rows for one table, or for the whole project."""
+        self._ensure_tables(self.conn)
+        for cube_table in ('_workforce_cube', '_workforce_cube_meta'):
+            if table_name:
+                self.conn.execute(f"""
+                    DELETE FROM {cube_table}
+                    WHERE LOWER(project) = LOWER(?) AND LOWER(source_table) = LOWER(?)
+                """, [self.project, table_name])
+            else:
+                self.conn.execute(f"DELETE FROM {cube_table} WHERE LOWER(project) = LOWER(?)",
+                                  [self.project])
+
+    # =========================================================================
+    # READ
+    # =========================================================================
+
+    def _fresh_meta(self, table_name: str, status_column: Optional[str],
+                    hire_column: Optional[str] = None, term_column: Optional[str] = None,
+                    check_dates: bool = False) -> Optional[Dict]:
+        """Meta for a cube that is fresh and was built from the same columns."""
+        meta = self.get_meta(table_name)
+        if not meta or not self.is_fresh(table_name, meta):
+            return None
+        if meta['status_column'] != status_column:
+            return None
+        if check_dates and (meta['hire_column'] != hire_column or meta['term_column'] != term_column):
+            return None
+        return meta
+
+    def _rows(self, table_name: str, set_name: str, columns: str) -> List[tuple]:
+        return self.conn.execute(f"""
+            SELECT {columns}
+            FROM _workforce_cube
+            WHERE LOWER(project) = LOWER(?) AND LOWER(source_table) = LOWER(?)
+              AND grouping_id = ?
+        """, [self.project, table_name, grouping_id(GROUPING_SETS[set_name])]).fetchall()
+
+    def counts(self, table_name: str, status_column: Optional[str],
+               hire_column: Optional[str], term_column: Optional[str]) -> Optional[WorkforceCounts]:
+        """Snapshot counts from the cube, or None if it can't answer exactly."""
+        try:
+            if not self._fresh_meta(table_name, status_column, hire_column, term_column, check_dates=True):
+                return None
+            detail = self._rows(table_name, 'detail',
+                                'status, hire_year, term_year, term_missing, headcount')
+            status_counts = self.status_counts(table_name, status_column, verified=True)
+            total = self.total(table_name, verified=True)
+            return WorkforceCounts(detail, status_counts or {}, total or 0)
+        except Exception as e:
+            logger.warning(f"[CUBE] Read failed for {table_name}: {e}")
+            return None
+
+    def status_counts(self, table_name: str, status_column: Optional[str],
+                      verified: bool = False) -> Optional[Dict[str, int]]:
+        """{status value: headcount}, or None if the cube is stale."""
+        if not verified and not self._fresh_meta(table_name, status_column):
+            return None
+        return {status: cnt for status, cnt in self._rows(table_name, 'status', 'status, headcount')}
+
+    def total(self, table_name: str, verified: bool = False) -> Optional[int]:
+        if not verified:
+            meta = self.get_meta(table_name)
+            if not meta or not self.is_fresh(table_name, meta):
+                return None
+        rows = self._rows(table_name, 'total', 'headcount')
+        return rows[0][0] if rows else 0
+
+    def breakdown(self, table_name: str, dimension: str, status_column: Optional[str],
+                  status_values: Optional[List[Any]] = None) -> Optional[Dict[str, int]]:
+        """Headcount by company or location, optionally restricted to statuses."""
+        set_name = {'company': 'status_company', 'location': 'status_location'}.get(dimension)
+        meta = self._fresh_meta(table_name, status_column) if set_name else None
+        if not meta or not meta.get(f'{dimension}_column'):
+            return None
+        wanted = {str(v) for v in status_values} if status_values else None
+        result: Dict[str, int] = {}
+        for status, value, cnt in self._rows(table_name, set_name, f'status, {dimension}, headcount'):
+            if wanted is not None and status not in wanted:
+                continue
+            key = value if value is not None else '(null)'
+            result[key] = result.get(key, 0) + cnt
+        return dict(sorted(result.items(), key=lambda kv: -kv[1]))
+
+    def get_stats(self) -> List[Dict]:
+        try:
+            rows = self.conn.execute("""
+                SELECT source_table, source_version, row_count, cube_rows, build_ms,
+                       CAST(built_at AS VARCHAR)
+                FROM _workforce_cube_meta
+                WHERE LOWER(project) = LOWER(?)
+            """, [self.project]).fetchall()
+        except Exception as e:
+            logger.debug(f"[CUBE] No cube meta: {e}")
+            return []
+        return [
+            {'table': r[0], 'source_version': r[1], 'row_count': r[2],
+             'cube_rows': r[3], 'build_ms': r[4], 'built_at': r[5]}
+            for r in rows
+        ]
+
+
+# =============================================================================
+# UPLOAD-TIME REFRESH
+# =============================================================================
+
+def refresh_workforce_cube(handler, project: str, force: bool = False) -> Dict:
+    """
+    Build or refresh the project's workforce cube after an upload.
+
+    Resolves the employee table and its status/date/company/location
+    columns the same way QueryResolver does, then rebuilds only if the
+    table's version changed since the last build (or force=True).
+    """
+    from .query_resolver import QueryResolver
+
+    resolver = QueryResolver(handler)
+    stats = {'project': project, 'built': False, 'reason': None}
+
+    employee_table = (
+        resolver._lookup_table(project, 'demographics', 'master')
+        or resolver._lookup_table_by_name(project, ['employee', 'employees', 'worker'])
+    )
+    if not employee_table:
+        stats['reason'] = 'no employee table'
+        return stats
+
+    table_name = employee_table['table_name']
+    stats['table'] = table_name
+
+    status_info = resolver._lookup_status_column(project, table_name)
+    if not status_info:
+        stats['reason'] = 'no status column'
+        return stats
+
+    columns = resolver._resolve_workforce_columns(project, table_name)
+    cube = WorkforceCube(handler.conn, project)
+
+    meta = cube.get_meta(table_name)
+    unchanged = (
+        meta is not None
+        and cube.is_fresh(table_name, meta)
+        and meta['status_column'] == status_info['column_name']
+        and meta['hire_column'] == columns['hire_date']
+        and meta['term_column'] == columns['term_date']
+        and meta['company_column'] == columns['company']
+        and meta['location_column'] == columns['location']
+    )
+    if unchanged and not force:
+        stats['reason'] = 'up to date'
+        return stats
+
+    stats.update(cube.build(
+        table_name,
+        status_column=status_info['column_name'],
+        hire_column=columns['hire_date'],
+        term_column=columns['term_date'],
+        company_column=columns['company'],
+        location_column=columns['location'],
+    ))
+    stats['built'] = True
+    return stats
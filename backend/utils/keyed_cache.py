@@ -0,0 +1,274 @@
+"""
+Keyed Cache - Stale-While-Revalidate Response Cache
+====================================================
+
+Multi-key replacement for the single-slot caches that platform.py and
+dashboard.py used to keep. One slot meant any request for a different
+project (or different parameters) evicted everyone else's entry.
+
+Features:
+- Per-key TTL (default set per cache, overridable per get())
+- Stale-while-revalidate: after TTL, the stale value is served immediately
+  while a background task on the same event loop refreshes it (until
+  stale_ttl expires)
+- Single-flight: concurrent misses for the same key share one load
+- Explicit invalidation (by project scope or everything) when uploads or
+  jobs complete
+- Hit / miss / stale-serve counters for the stats endpoint
+
+Keys are tuples whose first element is the project scope (None = global),
+so invalidate(project) drops that project's entries and all global ones.
+
+Deploy to: backend/utils/keyed_cache.py
+
+Usage:
+    from backend.utils.keyed_cache import get_keyed_cache
+
+    _cache = get_keyed_cache('platform', ttl=30, stale_ttl=120)
+
+    value, info = await _cache.get((project, include), lambda: build(project))
+    # info = {'state': 'hit' | 'miss' | 'stale', 'age_ms': 1234}
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class _Entry:
+    __slots__ = ('value', 'stored_at', 'ttl', 'stale_ttl')
+
+    def __init__(self, value: Any, ttl: float, stale_ttl: float):
+        self.value = value
+        self.stored_at = time.time()
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+
+    def age(self, now: float) -> float:
+        return now - self.stored_at
+
+
+class KeyedCache:
+    """
+    Thread-safe keyed cache with stale-while-revalidate and single-flight loads.
+
+    Loaders are zero-argument callables returning a value or an awaitable.
+    Foreground loads and background refreshes both run on the caller's
+    event loop, so DuckDB-heavy builders stay serialized with the requests
+    instead of racing them from another thread.
+    """
+
+    def __init__(self, name: str, ttl: float = 30, stale_ttl: float = 120, max_entries: int = 256):
+        self.name = name
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+
+        self._entries: 'OrderedDict[Hashable, _Entry]' = OrderedDict()
+        self._inflight: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._refresh_tasks: set = set()
+
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'stale_served': 0,
+            'coalesced': 0,
+            'refreshes': 0,
+            'refresh_failures': 0,
+            'invalidations': 0,
+            'evictions': 0,
+        }
+
+    # -------------------------------------------------------------------------
+    # Read path
+    # -------------------------------------------------------------------------
+
+    async def get(
+        self,
+        key: Hashable,
+        loader: Callable[[], Any],
+        ttl: Optional[float] = None,
+        force: bool = False
+    ) -> Tuple[Any, Dict[str, Any]]:
+        """
+        Get a value, loading it on miss.
+
+        Returns (value, info) where info['state'] is 'hit', 'stale' or 'miss'.
+        """
+        ttl = self.ttl if ttl is None else ttl
+        now = time.time()
+
+        with self._lock:
+            entry = None if force else self._entries.get(key)
+            if entry is not None:
+                age = entry.age(now)
+                if age < entry.ttl:
+                    self._entries.move_to_end(key)
+                    self._stats['hits'] += 1
+                    return entry.value, {'state': 'hit', 'age_ms': int(age * 1000)}
+                if age < entry.ttl + entry.stale_ttl:
+                    self._entries.move_to_end(key)
+                    self._stats['stale_served'] += 1
+                    if key not in self._inflight:
+                        self._start_background_refresh(key, loader, ttl)
+                    return entry.value, {'state': 'stale', 'age_ms': int(age * 1000)}
+
+            self._stats['misses'] += 1
+            pending = self._inflight.get(key)
+            if pending is not None and not force:
+                self._stats['coalesced'] += 1
+            else:
+                pending = None
+                future: Future = Future()
+                self._inflight[key] = future
+                generation = self._generation
+
+        if pending is not None:
+            value = await asyncio.wrap_future(pending)
+            return value, {'state': 'miss', 'age_ms': 0, 'coalesced': True}
+
+        try:
+            value = loader()
+            if asyncio.iscoroutine(value) or isinstance(value, asyncio.Future):
+                value = await value
+        except BaseException as e:
+            self._finish_load(key, future, error=e)
+            raise
+
+        self._finish_load(key, future, value=value, ttl=ttl, generation=generation)
+        return value, {'state': 'miss', 'age_ms': 0}
+
+    def _finish_load(self, key, future: Future, value: Any = None, ttl: float = None,
+                     generation: int = None, error: BaseException = None):
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+            # Don't store a value whose load started before an invalidation
+            if error is None and generation == self._generation:
+                self._store(key, value, ttl)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(value)
+
+    def _store(self, key, value, ttl):
+        """Store under lock, evicting least recently used entries."""
+        self._entries[key] = _Entry(value, ttl, self.stale_ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats['evictions'] += 1
+
+    def _start_background_refresh(self, key, loader, ttl):
+        """Refresh a stale key off the request path (called under lock, on the caller's loop)."""
+        future: Future = Future()
+        self._inflight[key] = future
+        generation = self._generation
+        task = asyncio.get_running_loop().create_task(self._refresh(key, loader, ttl, future, generation))
+        self._refresh_tasks.add(task)  # Keep a reference until it finishes
+        task.add_done_callback(self._refresh_tasks.discard)
+
+    async def _refresh(self, key, loader, ttl, future: Future, generation: int):
+        try:
+            value = loader()
+            if asyncio.iscoroutine(value) or isinstance(value, asyncio.Future):
+                value = await value
+        except BaseException as e:
+            with self._lock:
+                self._stats['refresh_failures'] += 1
+            logger.warning(f"[CACHE:{self.name}] Background refresh of {key} failed: {e!r}")
+            self._finish_load(key, future, error=e)
+            if not isinstance(e, Exception):
+                raise
+            return
+        with self._lock:
+            self._stats['refreshes'] += 1
+        self._finish_load(key, future, value=value, ttl=ttl, generation=generation)
+
+    # -------------------------------------------------------------------------
+    # Invalidation
+    # -------------------------------------------------------------------------
+
+    def invalidate(self, project: Optional[str] = None) -> int:
+        """
+        Drop entries for a project (plus global entries), or everything.
+
+        In-flight loads that started before the invalidation finish for their
+        waiters but are not stored.
+        """
+        with self._lock:
+            self._generation += 1
+            if project is None:
+                removed = len(self._entries)
+                self._entries.clear()
+            else:
+                project_lower = str(project).lower()
+                doomed = [
+                    k for k in self._entries
+                    if not isinstance(k, tuple) or k[0] is None or str(k[0]).lower() == project_lower
+                ]
+                for k in doomed:
+                    del self._entries[k]
+                removed = len(doomed)
+            self._stats['invalidations'] += 1
+        if removed:
+            logger.info(f"[CACHE:{self.name}] Invalidated {removed} entries (project={project})")
+        return removed
+
+    # -------------------------------------------------------------------------
+    # Stats
+    # -------------------------------------------------------------------------
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+            stats['inflight'] = len(self._inflight)
+        lookups = stats['hits'] + stats['misses'] + stats['stale_served']
+        stats['lookups'] = lookups
+        stats['hit_rate'] = round(stats['hits'] / lookups, 3) if lookups else 0.0
+        stats['miss_rate'] = round(stats['misses'] / lookups, 3) if lookups else 0.0
+        stats['stale_rate'] = round(stats['stale_served'] / lookups, 3) if lookups else 0.0
+        stats['ttl_seconds'] = self.ttl
+        stats['stale_ttl_seconds'] = self.stale_ttl
+        return stats
+
+
+# =============================================================================
+# REGISTRY
+# =============================================================================
+
+_caches: Dict[str, KeyedCache] = {}
+_registry_lock = threading.Lock()
+
+
+def get_keyed_cache(name: str, ttl: float = 30, stale_ttl: float = 120, max_entries: int = 256) -> KeyedCache:
+    """Get or create a named cache (settings apply on first creation)."""
+    with _registry_lock:
+        cache = _caches.get(name)
+        if cache is None:
+            cache = KeyedCache(name, ttl=ttl, stale_ttl=stale_ttl, max_entries=max_entries)
+            _caches[name] = cache
+        return cache
+
+
+def invalidate_keyed_caches(project: Optional[str] = None) -> Dict[str, int]:
+    """Invalidate every registered cache (e.g. after an upload or job completes)."""
+    with _registry_lock:
+        caches = list(_caches.values())
+    return {cache.name: cache.invalidate(project) for cache in caches}
+
+
+def get_keyed_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Stats for every registered cache."""
+    with _registry_lock:
+        caches = list(_caches.values())
+    return {cache.name: cache.stats() for cache in caches}
@@ -32,15 +32,35 @@ Usage:
         duration_ms=1200,
         cost_usd=0.0
     )
+
+Writes are buffered: record_* methods enqueue the event and return
+immediately. A background MetricsWriter flushes in bulk (by size or time),
+spills to a local append-only JSONL file when Supabase rejects the insert,
+and replays the spill file on startup. Set METRICS_SYNC_WRITES=true to
+restore the old synchronous insert.
 """
 
+import os
+import json
+import time
+import atexit
 import logging
+import threading
+from collections import deque
 from datetime import datetime
-from typing import Optional
+from typing import Optional, List, Dict, Any
 from decimal import Decimal
 
 logger = logging.getLogger(__name__)
 
+# Writer settings
+METRICS_SYNC_WRITES = os.getenv("METRICS_SYNC_WRITES", "false").lower() == "true"
+METRICS_BATCH_SIZE = 200                 # Flush when this many events are buffered
+METRICS_FLUSH_INTERVAL_S = 5.0           # ...or after this many seconds
+METRICS_MAX_BUFFER = 10000               # Back-pressure: drop events beyond this
+METRICS_MAX_SPILL_BYTES = 50 * 1024 * 1024
+METRICS_SPILL_PATH = os.path.join(os.getenv("XLR8_DATA_DIR", "/data"), "metrics_spill.jsonl")
+
 # Try to import Supabase
 try:
     from utils.database.supabase_client import get_supabase
@@ -50,6 +70,278 @@ except ImportError:
     logger.warning("[METRICS] Supabase not available - metrics will not be persisted")
 
 
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+class MetricsWriter:
+    """
+    Background bulk writer for platform_metrics.
+    
+    - enqueue() never blocks and never does I/O; beyond max_buffer events
+      are dropped (and counted) instead of stalling the caller
+    - a daemon thread flushes when batch_size events are buffered or
+      flush_interval seconds have passed
+    - failed inserts are appended to a local JSONL spill file, which is
+      replayed on the next start()
+    - flush() drains the buffer synchronously (used on shutdown)
+    """
+    
+    def __init__(
+        self,
+        table_name: str,
+        client_factory,
+        batch_size: int = METRICS_BATCH_SIZE,
+        flush_interval: float = METRICS_FLUSH_INTERVAL_S,
+        max_buffer: int = METRICS_MAX_BUFFER,
+        spill_path: str = METRICS_SPILL_PATH,
+        max_spill_bytes: int = METRICS_MAX_SPILL_BYTES
+    ):
+        self.table_name = table_name
+        self.client_factory = client_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.spill_path = spill_path
+        self.max_spill_bytes = max_spill_bytes
+        
+        self._buffer: deque = deque()
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._spill_lock = threading.Lock()
+        self._replay_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        
+        self._counters = {
+            'enqueued': 0,
+            'flushed': 0,
+            'dropped': 0,
+            'spilled': 0,
+            'replayed': 0,
+            'flush_batches': 0,
+            'flush_failures': 0,
+        }
+        self._last_flush_ms = 0.0
+        self._last_error: Optional[str] = None
+    
+    # -------------------------------------------------------------------------
+    # Lifecycle
+    # -------------------------------------------------------------------------
+    
+    def start(self):
+        """Start the flush thread (idempotent) and replay any spilled events."""
+        with self._cond:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="metrics-writer", daemon=True)
+            self._thread.start()
+        
+        threading.Thread(target=self.replay_spill, name="metrics-replay", daemon=True).start()
+        logger.info(f"[METRICS] Writer started (batch={self.batch_size}, interval={self.flush_interval}s)")
+    
+    def stop(self, timeout: float = 10.0):
+        """Flush everything buffered and stop the flush thread."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout=timeout)
+        self.flush()
+        logger.info(f"[METRICS] Writer stopped: {self.stats()}")
+    
+    # -------------------------------------------------------------------------
+    # Producer side
+    # -------------------------------------------------------------------------
+    
+    def enqueue(self, record: Dict[str, Any]) -> bool:
+        """Buffer one event. Returns False if dropped by back-pressure."""
+        with self._cond:
+            if len(self._buffer) >= self.max_buffer:
+                self._counters['dropped'] += 1
+                return False
+            if 'created_at' not in record:
+                record['created_at'] = datetime.utcnow().isoformat()
+            self._buffer.append(record)
+            self._counters['enqueued'] += 1
+            if len(self._buffer) >= self.batch_size:
+                self._cond.notify()
+        return True
+    
+    # -------------------------------------------------------------------------
+    # Consumer side
+    # -------------------------------------------------------------------------
+    
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._stopping and len(self._buffer) < self.batch_size:
+                    self._cond.wait(timeout=self.flush_interval)
+                if self._stopping:
+                    return
+            try:
+                self.flush()
+            except Exception as e:
+                logger.warning(f"[METRICS] Writer loop error: {e}")
+    
+    def _take_batch(self) -> List[Dict]:
+        with self._cond:
+            batch = []
+            while self._buffer and len(batch) < self.batch_size:
+                batch.append(self._buffer.popleft())
+            return batch
+    
+    def flush(self) -> int:
+        """Drain the buffer in batches. Returns number of events written remotely."""
+        written = 0
+        with self._flush_lock:
+            while True:
+                batch = self._take_batch()
+                if not batch:
+                    break
+                if self._insert(batch):
+                    written += len(batch)
+                else:
+                    self._spill(batch)
+        return written
+    
+    def _insert(self, batch: List[Dict]) -> bool:
+        started = time.time()
+        try:
+            client = self.client_factory()
+            if not client:
+                raise RuntimeError("Supabase client unavailable")
+            client.table(self.table_name).insert(batch).execute()
+            with self._cond:
+                self._counters['flushed'] += len(batch)
+                self._counters['flush_batches'] += 1
+                self._last_flush_ms = (time.time() - started) * 1000
+            return True
+        except Exception as e:
+            with self._cond:
+                self._counters['flush_failures'] += 1
+                self._last_error = str(e)[:200]
+            logger.warning(f"[METRICS] Bulk insert of {len(batch)} events failed: {e}")
+            return False
+    
+    # -------------------------------------------------------------------------
+    # Local spill
+    # -------------------------------------------------------------------------
+    
+    def _spill(self, batch: List[Dict]):
+        """Append events to the spill file; drop them if the file is full."""
+        with self._spill_lock:
+            try:
+                size = os.path.getsize(self.spill_path) if os.path.exists(self.spill_path) else 0
+                if size >= self.max_spill_bytes:
+                    with self._cond:
+                        self._counters['dropped'] += len(batch)
+                    logger.warning(f"[METRICS] Spill file full ({size} bytes), dropped {len(batch)} events")
+                    return
+                os.makedirs(os.path.dirname(self.spill_path) or '.', exist_ok=True)
+                with open(self.spill_path, 'a', encoding='utf-8') as f:
+                    for record in batch:
+                        f.write(json.dumps(record, default=_json_default) + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+                with self._cond:
+                    self._counters['spilled'] += len(batch)
+            except Exception as e:
+                with self._cond:
+                    self._counters['dropped'] += len(batch)
+                logger.warning(f"[METRICS] Could not spill {len(batch)} events: {e}")
+    
+    def replay_spill(self) -> int:
+        """
+        Re-send events from the spill file.
+        
+        The file is renamed before reading so new spills during replay go to a
+        fresh file; events that still fail are spilled again. A .replay file
+        left by a crash mid-replay is finished first - claiming the spill file
+        would otherwise overwrite it.
+        """
+        if not self._replay_lock.acquire(blocking=False):
+            return 0  # Another replay is running
+        try:
+            replay_path = f"{self.spill_path}.replay"
+            replayed = 0
+            if os.path.exists(replay_path):
+                replayed += self._replay_file(replay_path)
+                if os.path.exists(replay_path):
+                    return replayed  # Still unreadable: keep the spill file where it is
+            with self._spill_lock:
+                if not os.path.exists(self.spill_path):
+                    return replayed
+                try:
+                    os.replace(self.spill_path, replay_path)
+                except Exception as e:
+                    logger.warning(f"[METRICS] Could not claim spill file: {e}")
+                    return replayed
+            return replayed + self._replay_file(replay_path)
+        finally:
+            self._replay_lock.release()
+    
+    def _replay_file(self, replay_path: str) -> int:
+        replayed = 0
+        batch: List[Dict] = []
+        try:
+            with open(replay_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        batch.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        continue  # Torn write from a crash
+                    if len(batch) >= self.batch_size:
+                        replayed += self._replay_batch(batch)
+                        batch = []
+            if batch:
+                replayed += self._replay_batch(batch)
+            os.remove(replay_path)
+        except Exception as e:
+            logger.warning(f"[METRICS] Spill replay failed: {e}")
+        
+        if replayed:
+            logger.info(f"[METRICS] Replayed {replayed} spilled events")
+        return replayed
+    
+    def _replay_batch(self, batch: List[Dict]) -> int:
+        if self._insert(batch):
+            with self._cond:
+                self._counters['replayed'] += len(batch)
+            return len(batch)
+        self._spill(batch)
+        return 0
+    
+    # -------------------------------------------------------------------------
+    # Observability
+    # -------------------------------------------------------------------------
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            stats = dict(self._counters)
+            stats['buffered'] = len(self._buffer)
+            stats['last_flush_ms'] = round(self._last_flush_ms, 1)
+            stats['last_error'] = self._last_error
+        try:
+            stats['spill_bytes'] = os.path.getsize(self.spill_path) if os.path.exists(self.spill_path) else 0
+        except OSError:
+            stats['spill_bytes'] = 0
+        stats['running'] = bool(self._thread and self._thread.is_alive())
+        return stats
+
+
+_writer: Optional[MetricsWriter] = None
+_writer_lock = threading.Lock()
+
+
 class MetricsService:
     """
     Centralized metrics tracking for XLR8 platform.
@@ -71,6 +363,65 @@ class MetricsService:
             logger.warning(f"[METRICS] Could not get Supabase client: {e}")
             return None
     
+    @staticmethod
+    def get_writer() -> MetricsWriter:
+        """Get (and lazily start) the process-wide background writer."""
+        global _writer
+        if _writer is None:
+            with _writer_lock:
+                if _writer is None:
+                    writer = MetricsWriter(MetricsService.TABLE_NAME, MetricsService._get_client)
+                    writer.start()
+                    atexit.register(writer.stop)
+                    _writer = writer
+        return _writer
+    
+    @staticmethod
+    def _emit(record: Dict[str, Any]) -> bool:
+        """Hand a record to the writer (or insert directly in sync mode)."""
+        # No client (not configured): skip the metric rather than spill it forever
+        client = MetricsService._get_client()
+        if not client:
+            return False
+        
+        if METRICS_SYNC_WRITES:
+            client.table(MetricsService.TABLE_NAME).insert(record).execute()
+            return True
+        
+        return MetricsService.get_writer().enqueue(record)
+    
+    @staticmethod
+    def start() -> bool:
+        """
+        Start the writer at startup so events spilled by the previous run are
+        replayed without waiting for the first metric. No-op in sync mode or
+        without a client.
+        """
+        if METRICS_SYNC_WRITES or not MetricsService._get_client():
+            return False
+        MetricsService.get_writer()
+        return True
+    
+    @staticmethod
+    def flush(timeout: float = 10.0) -> Dict[str, Any]:
+        """Flush buffered metrics and stop the writer (shutdown hook)."""
+        global _writer
+        with _writer_lock:
+            writer, _writer = _writer, None
+        if writer is None:
+            return {}
+        writer.stop(timeout=timeout)
+        return writer.stats()
+    
+    @staticmethod
+    def get_writer_stats() -> Dict[str, Any]:
+        """Counters for the background writer (buffered, flushed, dropped, ...)."""
+        if _writer is None:
+            return {'running': False, 'mode': 'sync' if METRICS_SYNC_WRITES else 'async'}
+        stats = _writer.stats()
+        stats['mode'] = 'async'
+        return stats
+    
     @staticmethod
     def record_upload(
         processor: str,
@@ -100,11 +451,6 @@ class MetricsService:
             rules_extracted: Number of rules extracted (standards)
         """
         try:
-            client = MetricsService._get_client()
-            if not client:
-                logger.debug(f"[METRICS] Upload metric not persisted (no client): {processor}/{filename}")
-                return False
-            
             record = {
                 'metric_type': 'upload',
                 'processor': processor,
@@ -122,7 +468,9 @@ class MetricsService:
             # Remove None values
             record = {k: v for k, v in record.items() if v is not None}
             
-            client.table(MetricsService.TABLE_NAME).insert(record).execute()
+            if not MetricsService._emit(record):
+                logger.debug(f"[METRICS] Upload metric not persisted: {processor}/{filename}")
+                return False
             logger.info(f"[METRICS] Recorded upload: {processor}/{filename} in {duration_ms}ms (success={success})")
             return True
             
@@ -159,11 +507,6 @@ class MetricsService:
             project_id: Optional project UUID
         """
         try:
-            client = MetricsService._get_client()
-            if not client:
-                logger.debug(f"[METRICS] LLM metric not persisted (no client): {provider}/{model}")
-                return False
-            
             record = {
                 'metric_type': 'llm_call',
                 'processor': processor,
@@ -181,7 +524,9 @@ class MetricsService:
             # Remove None values
             record = {k: v for k, v in record.items() if v is not None}
             
-            client.table(MetricsService.TABLE_NAME).insert(record).execute()
+            if not MetricsService._emit(record):
+                logger.debug(f"[METRICS] LLM metric not persisted: {provider}/{model}")
+                return False
             logger.debug(f"[METRICS] Recorded LLM call: {provider}/{model} in {duration_ms}ms")
             return True
             
@@ -210,10 +555,6 @@ class MetricsService:
             error_message: Error details if failed
         """
         try:
-            client = MetricsService._get_client()
-            if not client:
-                return False
-            
             record = {
                 'metric_type': 'query',
                 'processor': query_type,
@@ -226,8 +567,7 @@ class MetricsService:
             
             record = {k: v for k, v in record.items() if v is not None}
             
-            client.table(MetricsService.TABLE_NAME).insert(record).execute()
-            return True
+            return MetricsService._emit(record)
             
         except Exception as e:
             logger.warning(f"[METRICS] Failed to record query metric: {e}")
@@ -244,10 +584,6 @@ class MetricsService:
         Record an error event.
         """
         try:
-            client = MetricsService._get_client()
-            if not client:
-                return False
-            
             record = {
                 'metric_type': 'error',
                 'processor': processor,
@@ -259,7 +595,8 @@ class MetricsService:
             
             record = {k: v for k, v in record.items() if v is not None}
             
-            client.table(MetricsService.TABLE_NAME).insert(record).execute()
+            if not MetricsService._emit(record):
+                return False
             logger.info(f"[METRICS] Recorded error: {processor} - {error_message[:100]}")
             return True
             
@@ -41,6 +41,8 @@ from typing import Dict, List, Optional, Any, Callable
 from datetime import datetime
 from enum import Enum
 import logging
+import sqlite3
+import threading
 import json
 import re
 import os
@@ -320,31 +322,146 @@ class ProgressManager:
     """
     Manages playbook progress persistence.
     
-    Stores progress per project per playbook.
+    Stores progress per project per playbook as one row per action in a
+    SQLite database (WAL mode), so an update writes only that action's row
+    in its own transaction instead of rewriting every project's progress.
+    Writers in other threads or worker processes can't clobber each other,
+    and a crash mid-write loses at most that update.
+    
+    Progress from the old JSON file is imported once on first use and the
+    file renamed to *.migrated.
+    
+    Settings:
+        XLR8_PLAYBOOK_PROGRESS_DB - database path (default /data/playbook_progress.db)
     """
     
-    def __init__(self, storage_path: str = "/data/playbook_progress.json"):
-        self.storage_path = storage_path
-        self._cache: Dict[str, Dict[str, Dict[str, Any]]] = {}
-        self._load()
+    _UPSERT = """
+        INSERT INTO playbook_progress VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (playbook_id, project_id, action_id)
+        DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at
+    """
     
-    def _load(self) -> None:
-        """Load progress from disk."""
+    # RFC 7386 merge: nested dicts merge, null removes a key
+    _PATCH = """
+        INSERT INTO playbook_progress VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (playbook_id, project_id, action_id)
+        DO UPDATE SET data = json_patch(data, excluded.data), updated_at = excluded.updated_at
+    """
+    
+    def __init__(
+        self,
+        storage_path: Optional[str] = None,
+        legacy_json_path: Optional[str] = "/data/playbook_progress.json"
+    ):
+        self.storage_path = storage_path or os.getenv(
+            'XLR8_PLAYBOOK_PROGRESS_DB', "/data/playbook_progress.db"
+        )
+        self.legacy_json_path = legacy_json_path
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._ready = False
+    
+    def _conn(self) -> sqlite3.Connection:
+        """Per-thread connection (autocommit; transactions are explicit)."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            if not self._ready:
+                self._init_store()
+            conn = self._connect()
+            self._local.conn = conn
+        return conn
+    
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.storage_path, timeout=30, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+    
+    def _init_store(self) -> None:
+        """Create the schema and import the legacy JSON file (once)."""
+        with self._init_lock:
+            if self._ready:
+                return
+            directory = os.path.dirname(self.storage_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = self._connect()
+            try:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS playbook_progress (
+                        playbook_id TEXT NOT NULL,
+                        project_id TEXT NOT NULL,
+                        action_id TEXT NOT NULL,
+                        data TEXT NOT NULL,
+                        updated_at TEXT NOT NULL,
+                        PRIMARY KEY (playbook_id, project_id, action_id)
+                    ) WITHOUT ROWID
+                """)
+                conn.execute("CREATE TABLE IF NOT EXISTS playbook_progress_meta (key TEXT PRIMARY KEY, value TEXT)")
+                self._migrate_json(conn)
+            finally:
+                conn.close()
+            self._ready = True
+    
+    def _migrate_json(self, conn: sqlite3.Connection) -> None:
+        """Import {"playbook:project": {action_id: progress}} from the old JSON store."""
+        path = self.legacy_json_path
+        if not path or not os.path.exists(path):
+            return
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if conn.execute("SELECT 1 FROM playbook_progress_meta WHERE key = 'json_migrated'").fetchone():
+                conn.execute("COMMIT")
+                return
+            with open(path, 'r') as f:
+                legacy = json.load(f)
+            now = datetime.now().isoformat()
+            rows = [
+                (*key.split(':', 1), action_id, json.dumps(data, default=str), now)
+                for key, actions in legacy.items() if ':' in key
+                for action_id, data in actions.items()
+            ]
+            conn.executemany(
+                "INSERT OR IGNORE INTO playbook_progress VALUES (?, ?, ?, ?, ?)", rows
+            )
+            conn.execute(
+                "INSERT INTO playbook_progress_meta VALUES ('json_migrated', ?)", [f"{path} @ {now}"]
+            )
+            conn.execute("COMMIT")
+        except Exception as e:
+            conn.execute("ROLLBACK")
+            logger.warning(f"[PROGRESS] Could not migrate {path}: {e}")
+            return
         try:
-            if os.path.exists(self.storage_path):
-                with open(self.storage_path, 'r') as f:
-                    self._cache = json.load(f)
-                logger.info(f"[PROGRESS] Loaded progress from {self.storage_path}")
+            os.replace(path, path + '.migrated')
+        except OSError as e:
+            logger.warning(f"[PROGRESS] Migrated {path} but could not rename it: {e}")
+        logger.info(f"[PROGRESS] Migrated {len(rows)} action(s) from {path}")
+    
+    def _read(self, playbook_id: str, project_id: str, action_id: Optional[str] = None) -> Dict[str, Dict]:
+        """Raw progress dicts by action_id for one project (or one action)."""
+        sql = "SELECT action_id, data FROM playbook_progress WHERE playbook_id = ? AND project_id = ?"
+        params = [playbook_id, project_id]
+        if action_id is not None:
+            sql += " AND action_id = ?"
+            params.append(action_id)
+        try:
+            return {row[0]: json.loads(row[1]) for row in self._conn().execute(sql, params)}
         except Exception as e:
             logger.warning(f"[PROGRESS] Could not load progress: {e}")
-            self._cache = {}
+            return {}
     
-    def _save(self) -> None:
-        """Save progress to disk."""
+    def _write(self, sql: str, rows: List[tuple]) -> None:
+        """Apply statements for several rows in one transaction."""
         try:
-            os.makedirs(os.path.dirname(self.storage_path), exist_ok=True)
-            with open(self.storage_path, 'w') as f:
-                json.dump(self._cache, f, indent=2, default=str)
+            conn = self._conn()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(sql, rows)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
         except Exception as e:
             logger.error(f"[PROGRESS] Could not save progress: {e}")
     
@@ -354,8 +471,7 @@ class ProgressManager:
         project_id: str
     ) -> Dict[str, ActionProgress]:
         """Get all action progress for a project."""
-        key = f"{playbook_id}:{project_id}"
-        raw = self._cache.get(key, {})
+        raw = self._read(playbook_id, project_id)
         return {
             action_id: ActionProgress.from_dict(action_id, data)
             for action_id, data in raw.items()
@@ -368,8 +484,7 @@ class ProgressManager:
         action_id: str
     ) -> ActionProgress:
         """Get progress for a specific action."""
-        key = f"{playbook_id}:{project_id}"
-        raw = self._cache.get(key, {}).get(action_id, {})
+        raw = self._read(playbook_id, project_id, action_id).get(action_id, {})
         return ActionProgress.from_dict(action_id, raw)
     
     def update_action_progress(
@@ -379,11 +494,28 @@ class ProgressManager:
         progress: ActionProgress
     ) -> None:
         """Update progress for a specific action."""
-        key = f"{playbook_id}:{project_id}"
-        if key not in self._cache:
-            self._cache[key] = {}
-        self._cache[key][progress.action_id] = progress.to_dict()
-        self._save()
+        self._write(self._UPSERT, [(
+            playbook_id, project_id, progress.action_id,
+            json.dumps(progress.to_dict(), default=str), datetime.now().isoformat()
+        )])
+    
+    def patch_action_progress(
+        self,
+        playbook_id: str,
+        project_id: str,
+        action_id: str,
+        changes: Dict[str, Any]
+    ) -> None:
+        """
+        Atomically merge changes into one action's stored progress.
+        
+        Unlike get → modify → update_action_progress, fields not in
+        `changes` are never overwritten by a concurrent writer's stale copy.
+        """
+        self._write(self._PATCH, [(
+            playbook_id, project_id, action_id,
+            json.dumps(changes, default=str), datetime.now().isoformat()
+        )])
     
     def bulk_update(
         self, 
@@ -392,17 +524,15 @@ class ProgressManager:
         progress_dict: Dict[str, ActionProgress]
     ) -> None:
         """Bulk update progress for multiple actions."""
-        key = f"{playbook_id}:{project_id}"
-        if key not in self._cache:
-            self._cache[key] = {}
-        for action_id, progress in progress_dict.items():
-            self._cache[key][action_id] = progress.to_dict()
-        self._save()
+        now = datetime.now().isoformat()
+        self._write(self._UPSERT, [
+            (playbook_id, project_id, action_id, json.dumps(progress.to_dict(), default=str), now)
+            for action_id, progress in progress_dict.items()
+        ])
     
     def get_raw_progress(self, playbook_id: str, project_id: str) -> Dict:
         """Get raw progress dict (for export compatibility)."""
-        key = f"{playbook_id}:{project_id}"
-        return self._cache.get(key, {})
+        return self._read(playbook_id, project_id)
 
 
 # Global progress manager
@@ -2657,15 +2787,12 @@ Respond with:
         except ValueError:
             action_status = ActionStatus.NOT_STARTED
         
-        progress = PROGRESS_MANAGER.get_action_progress(
-            self.playbook.playbook_id, project_id, action_id
-        )
-        progress.status = action_status
+        changes = {"status": action_status.value}
         if notes is not None:
-            progress.notes = notes
+            changes["notes"] = notes
         
-        PROGRESS_MANAGER.update_action_progress(
-            self.playbook.playbook_id, project_id, progress
+        PROGRESS_MANAGER.patch_action_progress(
+            self.playbook.playbook_id, project_id, action_id, changes
         )
         
         return {"success": True, "status": status}
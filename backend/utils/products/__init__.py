@@ -7,6 +7,7 @@ Components:
 - registry.py: Product registry (5B)
 - vocabulary.py: Cross-product vocabulary normalization (5C)
 - comparator.py: Schema comparison for M&A (5E)
+- snapshot.py: Precompiled registry snapshot with prebuilt indices
 
 Usage:
     from backend.utils.products import (
@@ -37,6 +37,58 @@ from .vocabulary import (
 logger = logging.getLogger(__name__)
 
 
+# =============================================================================
+# DOMAIN GROUPING
+# =============================================================================
+
+def group_domains_by_entity(product: ProductSchema) -> Dict[str, Dict]:
+    """
+    Group a product's domains and hubs by universal entity.
+    
+    Used by SchemaComparator and precomputed into the registry snapshot.
+    """
+    result = {}
+    
+    for domain_name, domain in product.domains.items():
+        # Get entity for this domain using vocabulary system
+        entity = DOMAIN_TO_PRIMARY_ENTITY.get(domain_name)
+        
+        if not entity:
+            # Try to infer from domain name
+            domain_lower = domain_name.lower().replace('_', '')
+            for ent, info in UNIVERSAL_ENTITIES.items():
+                # Check if domain name contains entity or vice versa
+                if ent in domain_lower or domain_lower in ent:
+                    entity = ent
+                    break
+                # Check against synonyms
+                for syn in info.get('synonyms', []):
+                    if syn.replace(' ', '') in domain_lower:
+                        entity = ent
+                        break
+                if entity:
+                    break
+        
+        if not entity:
+            # Use cleaned domain name as entity (last resort)
+            entity = domain_name.lower().replace('_', '')
+        
+        # Aggregate hubs under entity
+        if entity not in result:
+            result[entity] = {
+                'domain': domain_name,
+                'domains': [domain_name],  # Track all domains that map here
+                'hubs': [],
+            }
+        else:
+            # Multiple domains map to same entity - aggregate
+            result[entity]['domains'].append(domain_name)
+        
+        result[entity]['hubs'].extend(domain.hubs)
+    
+    return result
+
+
 # =============================================================================
 # DATA STRUCTURES
 # =============================================================================
@@ -374,46 +426,14 @@ class SchemaComparator:
     
     def _get_domain_entities(self, product: ProductSchema) -> Dict[str, Dict]:
         """Get entity → domain/hubs mapping for a product."""
-        result = {}
-        
-        for domain_name, domain in product.domains.items():
-            # Get entity for this domain using vocabulary system
-            entity = DOMAIN_TO_PRIMARY_ENTITY.get(domain_name)
-            
-            if not entity:
-                # Try to infer from domain name
-                domain_lower = domain_name.lower().replace('_', '')
-                for ent, info in UNIVERSAL_ENTITIES.items():
-                    # Check if domain name contains entity or vice versa
-                    if ent in domain_lower or domain_lower in ent:
-                        entity = ent
-                        break
-                    # Check against synonyms
-                    for syn in info.get('synonyms', []):
-                        if syn.replace(' ', '') in domain_lower:
-                            entity = ent
-                            break
-                    if entity:
-                        break
-            
-            if not entity:
-                # Use cleaned domain name as entity (last resort)
-                entity = domain_name.lower().replace('_', '')
-            
-            # Aggregate hubs under entity
-            if entity not in result:
-                result[entity] = {
-                    'domain': domain_name,
-                    'domains': [domain_name],  # Track all domains that map here
-                    'hubs': [],
-                }
-            else:
-                # Multiple domains map to same entity - aggregate
-                result[entity]['domains'].append(domain_name)
-            
-            result[entity]['hubs'].extend(domain.hubs)
-        
-        return result
+        snapshot = self.registry.snapshot
+        if snapshot is not None and product.product_id in snapshot.product_domain_entities:
+            # Prebuilt in the registry snapshot - copy, callers keep the hub lists
+            return {
+                entity: {'domain': info['domain'], 'domains': list(info['domains']), 'hubs': list(info['hubs'])}
+                for entity, info in snapshot.product_domain_entities[product.product_id].items()
+            }
+        return group_domains_by_entity(product)
     
     def _match_hubs(self, source_hubs: List[str], 
                     target_hubs: List[str]) -> Tuple[List[Tuple], List[str], List[str]]:
@@ -23,6 +23,10 @@ Usage:
     # Get all domains for a product
     domains = registry.get_domains('ukg_pro')
 
+Schemas are served from a precompiled snapshot (see snapshot.py) that is
+rebuilt automatically when a schema file changes. XLR8_PRODUCT_SNAPSHOT=false
+parses the JSON directly.
+
 Deploy to: backend/utils/products/registry.py
 """
 
@@ -35,6 +39,8 @@ from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+PRODUCT_SNAPSHOT_ENABLED = os.getenv('XLR8_PRODUCT_SNAPSHOT', 'true').lower() not in ('0', 'false', 'no')
+
 
 # =============================================================================
 # CATEGORY CLASSIFICATION
@@ -256,6 +262,7 @@ class ProductRegistry:
         
         self.config_dir = Path(config_dir)
         self.products: Dict[str, ProductSchema] = {}
+        self.snapshot = None  # ProductSnapshot with prebuilt indices, when loaded from one
         self._loaded = False
         
         logger.info(f"[REGISTRY] Initialized with config_dir={self.config_dir}")
@@ -274,27 +281,47 @@ class ProductRegistry:
             return len(self.products)
         
         self.products = {}
+        self.snapshot = None
         
         if not self.config_dir.exists():
             logger.warning(f"[REGISTRY] Config dir not found: {self.config_dir}")
             return 0
         
+        if PRODUCT_SNAPSHOT_ENABLED:
+            try:
+                from .snapshot import load_or_compile_snapshot
+                self.snapshot = load_or_compile_snapshot(self.config_dir)
+                self.products = self.snapshot.build_products()
+            except Exception as e:
+                logger.warning(f"[REGISTRY] Snapshot unavailable, parsing schemas: {e}")
+                self.snapshot = None
+        
+        if self.snapshot is None:
+            self.products = self.parse_schema_files()
+        
+        self._loaded = True
+        logger.info(f"[REGISTRY] Loaded {len(self.products)} products"
+                    f"{f' (snapshot {self.snapshot.version})' if self.snapshot else ''}")
+        
+        return len(self.products)
+    
+    def parse_schema_files(self) -> Dict[str, ProductSchema]:
+        """Parse and normalize every schema file in the config directory."""
+        products = {}
+        
         # Find all schema files
-        schema_files = list(self.config_dir.glob('*_schema_*.json'))
+        schema_files = sorted(self.config_dir.glob('*_schema_*.json'))
         
         for schema_file in schema_files:
             try:
                 product = self._load_schema_file(schema_file)
                 if product:
-                    self.products[product.product_id] = product
+                    products[product.product_id] = product
                     logger.debug(f"[REGISTRY] Loaded: {product.product_id}")
             except Exception as e:
                 logger.warning(f"[REGISTRY] Failed to load {schema_file.name}: {e}")
         
-        self._loaded = True
-        logger.info(f"[REGISTRY] Loaded {len(self.products)} products")
-        
-        return len(self.products)
+        return products
     
     def _load_schema_file(self, path: Path) -> Optional[ProductSchema]:
         """Load and normalize a single schema file."""
@@ -497,6 +524,7 @@ class ProductRegistry:
             'by_category': by_category,
             'by_vendor': by_vendor,
             'total_hubs': sum(p.hub_count for p in self.products.values()),
+            'snapshot': self.snapshot.info() if self.snapshot else None,
         }
 
 
@@ -0,0 +1,421 @@
+"""
+XLR8 Product Registry Snapshot
+==============================
+Precompiled binary snapshot of the product registry.
+
+Every process used to parse ~40 schema JSON files from config/ and rebuild
+the vocabulary/comparator lookups in Python on first use. The compile step
+does that once and writes a versioned snapshot holding the normalized
+products plus prebuilt indices:
+
+- product → hubs, product → domain → hubs, product → hub → domain
+- product → canonical entity → preferred hub (VocabularyNormalizer.denormalize)
+- product → entity → domains/hubs (SchemaComparator domain grouping)
+- entity → product → hubs (cross-product equivalences, DomainAligner)
+
+The file is memory-mapped read-only; each section is one marshal blob, the
+products decoded at registry load and each index on first use. It records
+the SHA-256 of every source JSON and of the modules that build it, so
+editing a schema or the normalization code invalidates it automatically -
+the next load recompiles and atomically replaces the file (size/mtime is
+checked first; hashes only when those differ). Worker processes share the
+one compiled file and its page-cache pages instead of each re-parsing JSON.
+
+marshal is only stable within one Python version, so the fixed binary
+header carries the interpreter's major/minor and marshal.version and a file
+from any other runtime is rejected before anything is unmarshalled. When
+the config dir is read-only the fallback location is a private per-user
+cache directory (never the shared temp dir) - it is only used if it is
+owned by this user and not writable by anyone else.
+
+Usage:
+    # Build step (Dockerfile) - optional, the registry compiles on demand
+    python -m backend.utils.products.snapshot
+
+    from backend.utils.products.snapshot import load_or_compile_snapshot
+    snapshot = load_or_compile_snapshot(config_dir)
+    snapshot.product_entity_hub['workday_hcm']['employee']
+
+Deploy to: backend/utils/products/snapshot.py
+"""
+
+import os
+import sys
+import mmap
+import time
+import struct
+import marshal
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Any
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT = 2
+SNAPSHOT_MAGIC = b'XLR8PRS\x00'
+SNAPSHOT_FILENAME = '.product_registry.snapshot'
+
+# Explicit snapshot location (e.g. a shared volume); default is next to the schemas
+SNAPSHOT_PATH = os.getenv('XLR8_PRODUCT_SNAPSHOT_PATH', '')
+
+# Modules whose logic shapes the snapshot - a code change invalidates it like a JSON change
+_BUILDER_MODULES = ('registry.py', 'vocabulary.py', 'comparator.py', 'snapshot.py')
+
+# magic, Python major, minor, marshal.version, header length
+_HEADER = struct.Struct('<8sBBBxI')
+_RUNTIME = (sys.version_info[0], sys.version_info[1], marshal.version)
+
+
+# =============================================================================
+# SOURCES & PATHS
+# =============================================================================
+
+def schema_files(config_dir: Path) -> List[Path]:
+    """Schema files the registry loads, in a stable order."""
+    return sorted(Path(config_dir).glob('*_schema_*.json'))
+
+
+def _source_files(config_dir: Path) -> Dict[str, Path]:
+    sources = {f'config/{path.name}': path for path in schema_files(config_dir)}
+    this_dir = Path(__file__).parent
+    for name in _BUILDER_MODULES:
+        sources[f'code/{name}'] = this_dir / name
+    return sources
+
+
+def source_stats(sources: Dict[str, Path]) -> Dict[str, List[int]]:
+    """(size, mtime_ns) per source - the cheap check before hashing."""
+    stats = {}
+    for key, path in sources.items():
+        st = path.stat()
+        stats[key] = [st.st_size, st.st_mtime_ns]
+    return stats
+
+
+def source_hashes(sources: Dict[str, Path]) -> Dict[str, str]:
+    """SHA-256 of every source schema and builder module."""
+    return {key: hashlib.sha256(path.read_bytes()).hexdigest() for key, path in sources.items()}
+
+
+def snapshot_version(hashes: Dict[str, str]) -> str:
+    """Short version id over all source hashes."""
+    digest = hashlib.sha256(f'format={SNAPSHOT_FORMAT};runtime={_RUNTIME}'.encode())
+    for key in sorted(hashes):
+        digest.update(f'{key}={hashes[key]}'.encode())
+    return digest.hexdigest()[:16]
+
+
+def private_cache_dir(create: bool = False) -> Optional[Path]:
+    """Per-user cache directory, or None if it can't be made private to this user."""
+    try:
+        base = Path(os.getenv('XDG_CACHE_HOME') or Path.home() / '.cache') / 'xlr8'
+        if create:
+            base.mkdir(mode=0o700, parents=True, exist_ok=True)
+        st = base.stat()
+    except (OSError, RuntimeError, KeyError):
+        return None
+    # Someone else's (or a group/world-writable) directory could hold a planted snapshot
+    if hasattr(os, 'getuid') and (st.st_uid != os.getuid() or st.st_mode & 0o022):
+        return None
+    return base
+
+
+def snapshot_paths(config_dir: Path, create: bool = False) -> List[Path]:
+    """Candidate snapshot locations: explicit path, else config dir then the private cache dir."""
+    if SNAPSHOT_PATH:
+        return [Path(SNAPSHOT_PATH)]
+    config_dir = Path(config_dir).resolve()
+    paths = [config_dir / SNAPSHOT_FILENAME]
+    cache_dir = private_cache_dir(create)
+    if cache_dir is not None:
+        tag = hashlib.sha1(str(config_dir).encode()).hexdigest()[:8]
+        paths.append(cache_dir / f'product_registry_{tag}.snapshot')
+    return paths
+
+
+# =============================================================================
+# SNAPSHOT
+# =============================================================================
+
+# Sections after 'products' are decoded on first use
+INDEX_NAMES = (
+    'product_hubs',             # product → hub names
+    'product_domain_hubs',      # product → domain → hubs
+    'product_hub_domain',       # product → hub → domain
+    'product_entity_hub',       # product → entity → preferred hub
+    'product_domain_entities',  # product → entity → {domain, domains, hubs}
+    'entity_equivalents',       # entity → product → hubs
+)
+
+
+class ProductSnapshot:
+    """
+    A snapshot file: header plus independently decoded sections.
+    
+    The buffer is the read-only memory map of the file (or the bytes just
+    compiled). 'products' is decoded by the registry at load; each index is
+    decoded the first time it is used.
+    """
+
+    def __init__(self, header: Dict[str, Any], buffer, data_start: int, path: Optional[Path] = None):
+        self.header = header
+        self.path = path
+        self._buffer = buffer
+        self._data_start = data_start
+        self._sections: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def version(self) -> str:
+        return self.header['version']
+
+    def section(self, name: str) -> Any:
+        """Decoded section (cached)."""
+        try:
+            return self._sections[name]
+        except KeyError:
+            pass
+        with self._lock:
+            if name not in self._sections:
+                offset, length = self.header['sections'][name]
+                start = self._data_start + offset
+                with memoryview(self._buffer) as view:
+                    self._sections[name] = marshal.loads(view[start:start + length])
+            return self._sections[name]
+
+    @property
+    def products(self) -> Dict[str, Dict]:
+        return self.section('products')
+
+    @property
+    def product_hubs(self) -> Dict[str, List[str]]:
+        return self.section('product_hubs')
+
+    @property
+    def product_domain_hubs(self) -> Dict[str, Dict[str, List[str]]]:
+        return self.section('product_domain_hubs')
+
+    @property
+    def product_hub_domain(self) -> Dict[str, Dict[str, str]]:
+        return self.section('product_hub_domain')
+
+    @property
+    def product_entity_hub(self) -> Dict[str, Dict[str, str]]:
+        return self.section('product_entity_hub')
+
+    @property
+    def product_domain_entities(self) -> Dict[str, Dict[str, Dict]]:
+        return self.section('product_domain_entities')
+
+    @property
+    def entity_equivalents(self) -> Dict[str, Dict[str, List[str]]]:
+        return self.section('entity_equivalents')
+
+    def build_products(self) -> Dict[str, Any]:
+        """ProductSchema objects for the registry."""
+        from .registry import ProductSchema, ProductDomain
+
+        products = {}
+        for product_id, raw in self.products.items():
+            fields = dict(raw)
+            fields['domains'] = {name: ProductDomain(name=name, **domain)
+                                 for name, domain in raw['domains'].items()}
+            products[product_id] = ProductSchema(**fields)
+        return products
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            'version': self.version,
+            'path': str(self.path) if self.path else None,
+            'compiled_at': self.header['compiled_at'],
+            'products': self.header['product_count'],
+            'sources': len(self.header['sources']),
+            'decoded_sections': sorted(self._sections),
+        }
+
+
+def _product_to_raw(product) -> Dict[str, Any]:
+    return {
+        'product_id': product.product_id,
+        'vendor': product.vendor,
+        'product': product.product,
+        'category': product.category,
+        'version': product.version,
+        'source': product.source,
+        'extracted': product.extracted,
+        'api_types': product.api_types,
+        'product_focus': product.product_focus,
+        'domains': {name: {'description': d.description, 'hub_count': d.hub_count, 'hubs': d.hubs}
+                    for name, d in product.domains.items()},
+        'hubs': product.hubs,
+        'domain_count': product.domain_count,
+        'hub_count': product.hub_count,
+        'metadata': product.metadata,
+    }
+
+
+def _build_indices(products: Dict[str, Any]) -> Dict[str, Any]:
+    from .vocabulary import build_entity_hub_mapping, UNIVERSAL_ENTITIES
+    from .comparator import group_domains_by_entity
+
+    indices = {name: {} for name in INDEX_NAMES}
+    indices['entity_equivalents'] = {entity: {} for entity in UNIVERSAL_ENTITIES}
+    for product_id, product in products.items():
+        domain_hubs = {name: d.hubs for name, d in product.domains.items()}
+        hub_domain = {}
+        for name, hubs in domain_hubs.items():
+            for hub in hubs:
+                hub_domain.setdefault(hub, name)
+
+        indices['product_hubs'][product_id] = list(product.hubs.keys())
+        indices['product_domain_hubs'][product_id] = domain_hubs
+        indices['product_hub_domain'][product_id] = hub_domain
+        indices['product_entity_hub'][product_id] = build_entity_hub_mapping(domain_hubs)
+        indices['product_domain_entities'][product_id] = group_domains_by_entity(product)
+
+        for entity, info in UNIVERSAL_ENTITIES.items():
+            hubs = [hub for domain in info['domains'] for hub in domain_hubs.get(domain, [])]
+            if hubs:
+                indices['entity_equivalents'][entity][product_id] = list(dict.fromkeys(hubs))
+    return indices
+
+
+def _share(obj, pool: Dict):
+    """Canonicalize equal strings so marshal writes each once and back-references the rest."""
+    if isinstance(obj, str):
+        return pool.setdefault(obj, obj)
+    if isinstance(obj, dict):
+        return {_share(k, pool): _share(v, pool) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_share(v, pool) for v in obj]
+    return obj
+
+
+def compile_snapshot(config_dir: Path, path: Optional[Path] = None) -> ProductSnapshot:
+    """Parse the schema JSON, build indices and write the snapshot atomically."""
+    from .registry import ProductRegistry
+
+    start = time.perf_counter()
+    config_dir = Path(config_dir)
+    sources = _source_files(config_dir)
+    stats = source_stats(sources)
+    hashes = source_hashes(sources)
+    products = ProductRegistry(config_dir).parse_schema_files()
+
+    sections = {'products': {pid: _product_to_raw(p) for pid, p in products.items()}}
+    sections.update(_build_indices(products))
+
+    blobs, offsets, offset = [], {}, 0
+    for name, value in sections.items():
+        # Hub names repeat across products - decoded, each section holds one object per name
+        blob = marshal.dumps(_share(value, {}))
+        offsets[name] = (offset, len(blob))
+        offset += len(blob)
+        blobs.append(blob)
+
+    header = {
+        'format': SNAPSHOT_FORMAT,
+        'runtime': list(_RUNTIME),
+        'version': snapshot_version(hashes),
+        'sources': hashes,
+        'stats': stats,
+        'sections': offsets,
+        'product_count': len(products),
+        'compiled_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+    header_bytes = marshal.dumps(header)
+    data = _HEADER.pack(SNAPSHOT_MAGIC, *_RUNTIME, len(header_bytes)) + header_bytes + b''.join(blobs)
+
+    written = None
+    for candidate in ([Path(path)] if path else snapshot_paths(config_dir, create=True)):
+        tmp = candidate.with_name(f'{candidate.name}.{os.getpid()}.tmp')
+        try:
+            candidate.parent.mkdir(parents=True, exist_ok=True)
+            tmp.write_bytes(data)
+            os.replace(tmp, candidate)  # atomic: concurrent workers never see a partial file
+            written = candidate
+            break
+        except OSError as e:
+            logger.debug(f"[REGISTRY-SNAPSHOT] Cannot write {candidate}: {e}")
+            tmp.unlink(missing_ok=True)
+
+    elapsed = (time.perf_counter() - start) * 1000
+    if written:
+        logger.info(f"[REGISTRY-SNAPSHOT] Compiled {len(products)} products to {written} "
+                    f"({len(data) / 1024:.0f} KB, version {header['version']}, {elapsed:.0f}ms)")
+    else:
+        logger.warning("[REGISTRY-SNAPSHOT] No writable snapshot location - using in-process snapshot")
+    return ProductSnapshot(header, data, _HEADER.size + len(header_bytes), written)
+
+
+def read_snapshot(path: Path) -> Optional[ProductSnapshot]:
+    """Memory-map a snapshot file and decode its header (no staleness check)."""
+    try:
+        with open(path, 'rb') as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, major, minor, marshal_version, header_len = _HEADER.unpack_from(mm, 0)
+        if magic != SNAPSHOT_MAGIC or (major, minor, marshal_version) != _RUNTIME:
+            logger.debug(f"[REGISTRY-SNAPSHOT] {path} was written by another runtime - ignoring")
+            return None
+        with memoryview(mm) as view:
+            header = marshal.loads(view[_HEADER.size:_HEADER.size + header_len])
+    except (OSError, ValueError, EOFError, TypeError, struct.error) as e:
+        logger.debug(f"[REGISTRY-SNAPSHOT] Cannot read {path}: {e}")
+        return None
+    if not isinstance(header, dict) or header.get('format') != SNAPSHOT_FORMAT:
+        return None
+    return ProductSnapshot(header, mm, _HEADER.size + header_len, Path(path))
+
+
+def load_snapshot(config_dir: Path, path: Optional[Path] = None) -> Optional[ProductSnapshot]:
+    """Load the snapshot if one exists and matches the current sources, else None."""
+    sources = _source_files(config_dir)
+    stats = source_stats(sources)
+    hashes = None
+    for candidate in ([Path(path)] if path else snapshot_paths(config_dir)):
+        if not candidate.exists():
+            continue
+        snapshot = read_snapshot(candidate)
+        if snapshot is None:
+            continue
+        if snapshot.header['stats'] == stats:
+            return snapshot
+        # Sizes or mtimes differ - only a content change invalidates
+        if hashes is None:
+            hashes = source_hashes(sources)
+        if snapshot.header['sources'] == hashes:
+            return snapshot
+        logger.info(f"[REGISTRY-SNAPSHOT] {candidate} is stale (sources changed)")
+    return None
+
+
+def load_or_compile_snapshot(config_dir: Path, path: Optional[Path] = None) -> ProductSnapshot:
+    """Current snapshot, compiling it first if missing or stale."""
+    snapshot = load_snapshot(config_dir, path)
+    if snapshot is not None:
+        logger.info(f"[REGISTRY-SNAPSHOT] Loaded {snapshot.header['product_count']} products "
+                    f"from {snapshot.path} (version {snapshot.version})")
+        return snapshot
+    return compile_snapshot(config_dir, path)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Compile the product registry snapshot')
+    parser.add_argument('--config-dir', default=None, help='Schema directory (default: repo config/)')
+    parser.add_argument('--out', default=None, help='Snapshot path (default: <config-dir>/' + SNAPSHOT_FILENAME + ')')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    from .registry import ProductRegistry
+
+    config_dir = Path(args.config_dir) if args.config_dir else ProductRegistry().config_dir
+    snapshot = compile_snapshot(config_dir, Path(args.out) if args.out else None)
+    print(snapshot.info())
+
+
+if __name__ == '__main__':
+    main()
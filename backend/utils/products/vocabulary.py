@@ -272,6 +272,50 @@ DOMAIN_TO_PRIMARY_ENTITY = {
 }
 
 
+# =============================================================================
+# ENTITY → HUB SCORING
+# =============================================================================
+
+def build_entity_hub_mapping(domain_hubs: Dict[str, List[str]]) -> Dict[str, str]:
+    """
+    Pick the best hub for each universal entity from a product's domain → hubs map.
+    
+    Used by VocabularyNormalizer and precomputed into the registry snapshot.
+    """
+    entity_hub = {}
+    for entity, info in UNIVERSAL_ENTITIES.items():
+        best_hub = None
+        best_score = 0
+        
+        for domain_name in info['domains']:
+            if domain_name in domain_hubs:
+                for hub in domain_hubs[domain_name]:
+                    # Score based on name match
+                    hub_lower = hub.lower()
+                    score = 0
+                    
+                    # Direct entity match
+                    if entity in hub_lower:
+                        score = 100
+                    
+                    # Synonym match
+                    for syn in info['synonyms']:
+                        if syn.replace(' ', '_') in hub_lower:
+                            score = max(score, 50)
+                    
+                    # Domain keyword match
+                    if domain_name.lower().replace('_', '') in hub_lower:
+                        score = max(score, 30)
+                    
+                    if score > best_score:
+                        best_score = score
+                        best_hub = hub
+        
+        if best_hub:
+            entity_hub[entity] = best_hub
+    return entity_hub
+
+
 # =============================================================================
 # DATA STRUCTURES
 # =============================================================================
@@ -409,6 +453,10 @@ class VocabularyNormalizer:
         if not vocab:
             return []
         
+        snapshot = self.registry.snapshot
+        if snapshot is not None and entity in snapshot.entity_equivalents:
+            return list(snapshot.entity_equivalents[entity].get(product_id, []))
+        
         # Get domains for this entity
         entity_info = UNIVERSAL_ENTITIES.get(entity, {})
         domains = entity_info.get('domains', [])
@@ -451,6 +499,14 @@ class VocabularyNormalizer:
         
         vocab = ProductVocabulary(product_id=product_id)
         
+        # Prebuilt in the registry snapshot
+        snapshot = self.registry.snapshot
+        if snapshot is not None and product_id in snapshot.product_entity_hub:
+            vocab.domain_hubs = snapshot.product_domain_hubs[product_id]
+            vocab.entity_hub = snapshot.product_entity_hub[product_id]
+            self._product_vocab[product_id] = vocab
+            return vocab
+        
         # Build domain → hubs mapping
         for domain_name, domain in product.domains.items():
             vocab.domain_hubs[domain_name] = domain.hubs
@@ -465,37 +521,7 @@ class VocabularyNormalizer:
     def _build_entity_hub_mapping(self, vocab: ProductVocabulary, 
                                   product: ProductSchema):
         """Build entity → hub mapping for a product."""
-        # For each universal entity, find the best hub
-        for entity, info in UNIVERSAL_ENTITIES.items():
-            best_hub = None
-            best_score = 0
-            
-            for domain_name in info['domains']:
-                if domain_name in vocab.domain_hubs:
-                    for hub in vocab.domain_hubs[domain_name]:
-                        # Score based on name match
-                        hub_lower = hub.lower()
-                        score = 0
-                        
-                        # Direct entity match
-                        if entity in hub_lower:
-                            score = 100
-                        
-                        # Synonym match
-                        for syn in info['synonyms']:
-                            if syn.replace(' ', '_') in hub_lower:
-                                score = max(score, 50)
-                        
-                        # Domain keyword match
-                        if domain_name.lower().replace('_', '') in hub_lower:
-                            score = max(score, 30)
-                        
-                        if score > best_score:
-                            best_score = score
-                            best_hub = hub
-            
-            if best_hub:
-                vocab.entity_hub[entity] = best_hub
+        vocab.entity_hub.update(build_entity_hub_mapping(vocab.domain_hubs))
     
     # =========================================================================
     # COMPATIBILITY METHODS (for replacing term_index.py hardcoded dicts)
@@ -600,11 +626,15 @@ class DomainAligner:
             return []
         
         # Find which domain the hub belongs to
-        source_domain = None
-        for domain_name, domain in source.domains.items():
-            if hub in domain.hubs:
-                source_domain = domain_name
-                break
+        snapshot = self.registry.snapshot
+        if snapshot is not None and source_product in snapshot.product_hub_domain:
+            source_domain = snapshot.product_hub_domain[source_product].get(hub)
+        else:
+            source_domain = None
+            for domain_name, domain in source.domains.items():
+                if hub in domain.hubs:
+                    source_domain = domain_name
+                    break
         
         if not source_domain:
             return []
@@ -0,0 +1,331 @@
+"""
+Router Loader - Eager or Lazy Router Registration with Startup Profiling
+=========================================================================
+
+main.py used to import ~35 routers at module load, and each import drags in
+its dependency chain (chromadb, PDF libraries, pandas, the intelligence
+stack). Cold start and every autoscaled replica paid that before serving
+a single request.
+
+RouterLoader registers the same routers from a declarative list of
+RouterSpecs, in one of two modes:
+
+- eager (default): import and include every router at startup, as before.
+- fast start (XLR8_FAST_START=true): nothing is imported up front. A router
+  is loaded on the first request under one of its path prefixes, or by a
+  background warm-up thread shortly after the server starts accepting traffic.
+
+Either way, each router's import time and RSS growth are recorded for the
+startup report (GET /api/debug/startup).
+
+Route order is preserved: routes are kept sorted by spec order no matter
+when a router loads, so overlapping prefixes (e.g. /api/upload from both
+upload and smart_router) resolve exactly as with eager loading.
+
+Deploy to: backend/utils/router_loader.py
+"""
+
+import os
+import time
+import asyncio
+import logging
+import importlib
+import resource
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+FAST_START_ENABLED = os.getenv('XLR8_FAST_START', 'false').lower() in ('1', 'true', 'yes')
+
+# Seconds after startup before the warm-up thread starts importing; negative disables warm-up
+WARMUP_DELAY_SECONDS = float(os.getenv('XLR8_WARMUP_DELAY_SECONDS', '2'))
+
+
+# =============================================================================
+# MEMORY
+# =============================================================================
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def current_rss_mb() -> float:
+    """Resident set size in MB (peak RSS where /proc is unavailable)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE / (1024 * 1024)
+    except (OSError, IndexError, ValueError):
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is KB on Linux, bytes on macOS
+        return rss / (1024 * 1024) if rss > 10 ** 8 else rss / 1024
+
+
+# =============================================================================
+# ROUTER SPECS
+# =============================================================================
+
+@dataclass
+class RouterSpec:
+    """
+    One router to register.
+
+    paths: request path prefixes served by this router - the first request
+        under one of them loads it in fast-start mode.
+    fallback: factory for a replacement router if the import fails.
+    required: import failure is fatal (eager mode) instead of a warning.
+    """
+    name: str
+    module: str
+    paths: List[str]
+    prefix: str = ""
+    tags: Optional[List[str]] = None
+    attr: str = "router"
+    description: str = ""
+    required: bool = False
+    fallback: Optional[Callable[[], Any]] = None
+
+    # Load state
+    status: str = "pending"  # pending, loaded, fallback, failed
+    loaded_by: Optional[str] = None  # eager, request, warmup
+    import_ms: Optional[float] = None
+    rss_delta_mb: Optional[float] = None
+    route_count: int = 0
+    error: Optional[str] = None
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def serves(self, path: str) -> bool:
+        return any(path == p or path.startswith(p.rstrip('/') + '/') for p in self.paths)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'module': self.module,
+            'status': self.status,
+            'loaded_by': self.loaded_by,
+            'import_ms': self.import_ms,
+            'rss_delta_mb': self.rss_delta_mb,
+            'routes': self.route_count,
+            'paths': self.paths,
+            'error': self.error,
+        }
+
+
+# =============================================================================
+# LOADER
+# =============================================================================
+
+class RouterLoader:
+    """Registers RouterSpecs on a FastAPI app, eagerly or lazily."""
+
+    # Routes registered outside the loader that must stay last (SPA catch-all)
+    TAIL_ORDER = 10 ** 6
+
+    def __init__(self, app, specs: List[RouterSpec], fast_start: bool = FAST_START_ENABLED,
+                 started_at: Optional[float] = None):
+        self.app = app
+        self.specs = specs
+        self.fast_start = fast_start
+        # perf_counter() at process/module start, so ready_ms covers framework imports too
+        self.created_at = started_at if started_at is not None else time.perf_counter()
+        self.ready_ms: Optional[float] = None
+        self.warmup_finished_ms: Optional[float] = None
+        self._lock = threading.RLock()
+        self._order: Dict[int, float] = {}
+        # Routes present before any spec (docs, openapi) keep their place at the front
+        for route in app.router.routes:
+            self._order[id(route)] = -1
+
+    # -------------------------------------------------------------------------
+    # Registration
+    # -------------------------------------------------------------------------
+
+    @property
+    def pending(self) -> List[RouterSpec]:
+        return [s for s in self.specs if s.status == "pending"]
+
+    def register_all(self):
+        """Eager mode: load every spec now. Fast start: nothing until needed."""
+        if self.fast_start:
+            logger.info(f"[STARTUP] Fast start: {len(self.specs)} routers deferred until first request or warm-up")
+            return
+        for spec in self.specs:
+            self.load(spec, loaded_by="eager")
+
+    def mark_tail(self, routes: List[Any]):
+        """Keep routes registered outside the loader (e.g. the SPA catch-all) after all API routes."""
+        with self._lock:
+            for route in routes:
+                self._order[id(route)] = self.TAIL_ORDER
+            self._sort_routes()
+
+    def load(self, spec: RouterSpec, loaded_by: str) -> bool:
+        """Import and include one router (idempotent). Returns True if it serves routes."""
+        # Per-spec lock: a request and the warm-up thread can import different routers at once
+        with spec._lock:
+            if spec.status != "pending":
+                return spec.status in ("loaded", "fallback")
+
+            router, error = self._import(spec)
+            if router is None and spec.fallback:
+                router = spec.fallback()
+                spec.status = "fallback"
+            elif router is not None:
+                spec.status = "loaded"
+            else:
+                spec.status = "failed"
+            spec.error = error
+            spec.loaded_by = loaded_by
+
+            if router is None:
+                if spec.required and loaded_by == "eager":
+                    raise ImportError(f"Required router {spec.module} failed to import: {error}")
+                logger.warning(f"[STARTUP] {spec.description or spec.name} router not available: {error}")
+                return False
+
+            self._include(spec, router)
+            where = spec.prefix or (spec.paths[0] if spec.paths else "/")
+            if spec.status == "fallback":
+                logger.warning(f"[STARTUP] {spec.description or spec.name} fallback registered at {where} ({error})")
+            else:
+                logger.info(f"[STARTUP] {spec.description or spec.name} router registered at {where} "
+                            f"({spec.import_ms:.0f}ms, {loaded_by})")
+            return True
+
+    def _import(self, spec: RouterSpec) -> Tuple[Any, Optional[str]]:
+        rss_before = current_rss_mb()
+        start = time.perf_counter()
+        try:
+            module = importlib.import_module(spec.module)
+            router, error = getattr(module, spec.attr), None
+        except (ImportError, AttributeError) as e:
+            router, error = None, str(e)
+        spec.import_ms = round((time.perf_counter() - start) * 1000, 1)
+        spec.rss_delta_mb = round(current_rss_mb() - rss_before, 1)
+        return router, error
+
+    def _include(self, spec: RouterSpec, router):
+        with self._lock:
+            self._include_locked(spec, router)
+
+    def _include_locked(self, spec: RouterSpec, router):
+        routes = self.app.router.routes
+        before = {id(r) for r in routes}
+        kwargs = {'prefix': spec.prefix} if spec.prefix else {}
+        if spec.tags:
+            kwargs['tags'] = spec.tags
+        self.app.include_router(router, **kwargs)
+
+        order = self.specs.index(spec)
+        added = [r for r in routes if id(r) not in before]
+        for route in added:
+            self._order[id(route)] = order
+        spec.route_count = len(added)
+
+        if self.fast_start:
+            self._sort_routes()
+            self.app.openapi_schema = None  # regenerate docs with the new routes
+
+    def _sort_routes(self):
+        # Routes added directly on the app (debug endpoints) go after every spec, before the tail
+        routes = self.app.router.routes
+        routes[:] = sorted(routes, key=lambda r: self._order.setdefault(id(r), self.TAIL_ORDER - 1))
+
+    # -------------------------------------------------------------------------
+    # Lazy loading
+    # -------------------------------------------------------------------------
+
+    def specs_for_path(self, path: str) -> List[RouterSpec]:
+        """Pending specs needed to serve a path."""
+        pending = self.pending
+        if not pending:
+            return []
+        matched = [s for s in pending if s.serves(path)]
+        if matched or not path.startswith('/api'):
+            return matched
+        # An /api path no spec claims and no loaded route serves: load everything
+        # rather than 404 on a prefix missing from the specs
+        if not any(self._route_matches(route, path) for route in self.app.router.routes
+                   if self._order.get(id(route), 0) < self.TAIL_ORDER):
+            return pending
+        return []
+
+    @staticmethod
+    def _route_matches(route, path: str) -> bool:
+        path_regex = getattr(route, 'path_regex', None)
+        return bool(path_regex and path_regex.match(path))
+
+    async def ensure_loaded(self, specs: List[RouterSpec]):
+        """Load specs off the event loop (imports are slow and blocking)."""
+        for spec in specs:
+            if spec.status == "pending":
+                await asyncio.to_thread(self.load, spec, "request")
+
+    def start_warmup(self, delay: float = WARMUP_DELAY_SECONDS, before: Optional[Callable[[], Any]] = None):
+        """
+        Load remaining routers in a background thread once the server is up.
+
+        before: deferred startup work (stuck-job cleanup, playbook loading) run
+            on the same thread first - it runs even when warm-up is disabled.
+        """
+        if not self.fast_start:
+            return
+
+        def warm():
+            if before:
+                try:
+                    before()
+                except Exception as e:
+                    logger.warning(f"[STARTUP] Deferred startup tasks failed: {e}")
+            if delay < 0:
+                return
+            time.sleep(delay)
+            for spec in self.specs:
+                try:
+                    self.load(spec, "warmup")
+                except Exception as e:
+                    logger.warning(f"[STARTUP] Warm-up failed for {spec.name}: {e}")
+            self.warmup_finished_ms = round((time.perf_counter() - self.created_at) * 1000, 1)
+            logger.info(f"[STARTUP] Warm-up complete: {len(self.specs)} routers in {self.warmup_finished_ms:.0f}ms")
+
+        threading.Thread(target=warm, name="router-warmup", daemon=True).start()
+
+    def mark_ready(self):
+        """Server is about to accept traffic."""
+        self.ready_ms = round((time.perf_counter() - self.created_at) * 1000, 1)
+
+    # -------------------------------------------------------------------------
+    # Report
+    # -------------------------------------------------------------------------
+
+    def report(self) -> Dict[str, Any]:
+        """Startup report: mode, time to ready, per-router import time and RSS growth (slowest first)."""
+        specs = [s.to_dict() for s in self.specs]
+        loaded = [s for s in self.specs if s.import_ms is not None]
+        return {
+            'mode': 'fast_start' if self.fast_start else 'eager',
+            'ready_ms': self.ready_ms,
+            'warmup_finished_ms': self.warmup_finished_ms,
+            'rss_mb': round(current_rss_mb(), 1),
+            'routers_total': len(self.specs),
+            'routers_loaded': sum(1 for s in self.specs if s.status in ('loaded', 'fallback')),
+            'routers_pending': len(self.pending),
+            'routers_failed': [s.name for s in self.specs if s.status in ('failed', 'fallback')],
+            'import_ms_total': round(sum(s.import_ms for s in loaded), 1),
+            'routers': sorted(specs, key=lambda s: -(s['import_ms'] or 0)),
+        }
+
+
+class LazyRouterMiddleware:
+    """ASGI middleware: load the routers a request needs before routing it."""
+
+    def __init__(self, app, loader: RouterLoader):
+        self.app = app
+        self.loader = loader
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] in ('http', 'websocket') and self.loader.fast_start:
+            specs = self.loader.specs_for_path(scope['path'])
+            if specs:
+                await self.loader.ensure_loaded(specs)
+        await self.app(scope, receive, send)
@@ -0,0 +1,534 @@
+"""
+Streaming Export - Batched CSV/XLSX Output and Background Export Jobs
+=====================================================================
+
+BI exports used to materialise the whole result as a list of dicts, then
+build the CSV string or the openpyxl workbook in memory before the first
+byte went out. Memory grew with the export and a worker was blocked for
+the whole render.
+
+This module streams instead:
+
+- open_query_stream() plans the export query (transforms pushed into SQL
+  where possible, see bi_transforms) and reads it in fixed-size batches on
+  its own DuckDB cursor. Transforms left for Python are applied per batch
+  - they are all row-wise, so the output matches the list-based path.
+- CSV is written by DuckDB's COPY when no transforms are left for Python,
+  otherwise encoded batch by batch.
+- write_xlsx() uses openpyxl's write-only mode (rows go to a temp file, not
+  a cell tree), rolling over to a new sheet at Excel's row limit.
+- ExportProgress tracks rows written against the source row count; large
+  exports run as background jobs writing to XLR8_EXPORT_DIR and are
+  downloaded when complete. Source rows are counted only up to the
+  background threshold (LIMIT stops the scan there); past it the planner's
+  cardinality estimate stands in, so no export scans its source twice.
+
+Settings:
+    XLR8_EXPORT_BATCH_ROWS        - rows per fetch (default 10000)
+    XLR8_EXPORT_BACKGROUND_ROWS   - run exports above this many rows as jobs (default 200000)
+    XLR8_EXPORT_DIR               - background export output directory (default <tmp>/xlr8_exports)
+    XLR8_EXPORT_RETENTION_SECONDS - keep finished export files this long (default 3600)
+
+Deploy to: backend/utils/streaming_export.py
+"""
+
+import csv
+import io
+import json
+import os
+import time
+import uuid
+import logging
+import tempfile
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+try:
+    from backend.utils.bi_transforms import PUSHDOWN_ENABLED, apply_python_transforms, compile_transforms
+except ImportError:
+    from utils.bi_transforms import PUSHDOWN_ENABLED, apply_python_transforms, compile_transforms
+
+BATCH_ROWS = int(os.getenv('XLR8_EXPORT_BATCH_ROWS', '10000'))
+BACKGROUND_ROWS = int(os.getenv('XLR8_EXPORT_BACKGROUND_ROWS', '200000'))
+EXPORT_DIR = os.getenv('XLR8_EXPORT_DIR', os.path.join(tempfile.gettempdir(), 'xlr8_exports'))
+RETENTION_SECONDS = float(os.getenv('XLR8_EXPORT_RETENTION_SECONDS', '3600'))
+
+XLSX_MAX_ROWS = 1_048_576  # Excel's per-sheet limit, header included
+FILE_CHUNK_BYTES = 256 * 1024
+
+CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+
+# =============================================================================
+# QUERY STREAM
+# =============================================================================
+
+@dataclass
+class QueryStream:
+    """
+    An export query, read in batches of value lists on its own cursor (a
+    separate DuckDB connection to the same database), so the handler's
+    lock is only held while the cursor is created, not for the download.
+    """
+    handler: Any = field(repr=False)
+    query: str
+    params: Optional[Dict[str, Any]]
+    columns: List[str]
+    renames: Dict[str, str]
+    total_rows: int = 0  # source rows (an upper bound when filters are pushed down)
+    rows_exact: bool = True  # False: total_rows is the planner's estimate
+    pushed: List[str] = field(default_factory=list)
+    remaining: List[Any] = field(default_factory=list, repr=False)
+    lookups: Dict[str, Dict[str, str]] = field(default_factory=dict, repr=False)
+    formula_columns: List[str] = field(default_factory=list, repr=False)
+    batch_rows: int = BATCH_ROWS
+    _first: Optional[List[list]] = field(default=None, repr=False)
+    _rest: Optional[Iterator[List[list]]] = field(default=None, repr=False)
+
+    @property
+    def source_empty(self) -> bool:
+        return self.total_rows == 0
+
+    @property
+    def python(self) -> List[str]:
+        return [t.type for t in self.remaining]
+
+    @property
+    def headers(self) -> List[str]:
+        return [self.renames.get(c, c) for c in self.columns]
+
+    def _cursor(self):
+        with self.handler._db_lock:
+            cursor = self.handler.conn.cursor()
+        try:
+            cursor.execute(self.query, self.params) if self.params else cursor.execute(self.query)
+        except Exception:
+            cursor.close()
+            raise
+        return cursor
+
+    def _iter_batches(self) -> Iterator[List[list]]:
+        cursor = self._cursor()
+        try:
+            if not self.remaining:
+                while True:
+                    rows = cursor.fetchmany(self.batch_rows)
+                    if not rows:
+                        return
+                    yield list(map(list, rows))
+            # Row-wise Python transforms on each batch; '' for keys a row lacks, as the export writes
+            raw_columns = [desc[0] for desc in cursor.description]
+            row_columns = list(dict.fromkeys(raw_columns))
+            while True:
+                rows = cursor.fetchmany(self.batch_rows)
+                if not rows:
+                    return
+                data = [dict(zip(raw_columns, row)) for row in rows]
+                data = apply_python_transforms(data, row_columns, self.remaining, self.lookups,
+                                               self.formula_columns)[0]
+                if data:
+                    yield [[row.get(c, '') for c in self.columns] for row in data]
+        finally:
+            cursor.close()
+
+    def peek(self, n: int = 100) -> List[list]:
+        """First rows of the export (fetched once, then replayed by batches())."""
+        if self._first is None:
+            self._rest = self._iter_batches()
+            self._first = next(self._rest, [])
+        return self._first[:n]
+
+    def batches(self) -> Iterator[List[list]]:
+        """Row batches; the query runs once, from a peek() if there was one."""
+        if self._first is None:
+            yield from self._iter_batches()
+            return
+        first, rest = self._first, self._rest
+        self._first, self._rest = None, None
+        if first:
+            yield first
+        yield from rest
+
+    def copy_csv(self, path: str) -> int:
+        """
+        Write the export as CSV with DuckDB's COPY (no Python per row). Only
+        when no transforms are left for Python. Returns rows written.
+        """
+        select = ', '.join(f"{_quote(c)} AS {_quote(h)}" for c, h in zip(self.columns, self.headers))
+        sql = f"COPY (SELECT {select} FROM ({self.query}) AS _out) TO '{path.replace(chr(39), chr(39) * 2)}' (HEADER)"
+        with self.handler._db_lock:
+            cursor = self.handler.conn.cursor()
+        try:
+            result = cursor.execute(sql, self.params) if self.params else cursor.execute(sql)
+            return result.fetchone()[0]
+        finally:
+            cursor.close()
+
+
+def _quote(identifier: str) -> str:
+    return '"' + str(identifier).replace('"', '""') + '"'
+
+
+def _estimated_rows(cursor, source: str) -> Optional[int]:
+    """The planner's cardinality estimate for a query (no scan), None when it has none."""
+    try:
+        plan = json.loads(cursor.execute(f"EXPLAIN (FORMAT JSON) {source}").fetchall()[0][1])
+        return int(plan[0]['extra_info']['Estimated Cardinality'])
+    except Exception:
+        return None
+
+
+def _count_rows(cursor, source: str, limit: int) -> Tuple[int, bool]:
+    """(rows, exact): counted up to limit + 1, past that the planner's estimate."""
+    counted = cursor.execute(f"SELECT COUNT(*) FROM (SELECT 1 FROM ({source}) AS _src LIMIT {limit + 1}) AS _n"
+                             ).fetchone()[0]
+    if counted <= limit:
+        return counted, True
+    return max(counted, _estimated_rows(cursor, source) or 0), False
+
+
+def open_query_stream(handler, sql: str, transforms: List[Any], lookups: Dict[str, Dict[str, str]],
+                      pushdown: bool = PUSHDOWN_ENABLED, batch_rows: int = BATCH_ROWS,
+                      count_limit: int = BACKGROUND_ROWS) -> QueryStream:
+    """
+    Plan an export query: push what transforms SQL can reproduce into it
+    and count the source rows up to count_limit (for progress, the
+    background threshold and the empty-result check). Runs on its own
+    cursor, outside the handler's lock; blocking, so async callers run it
+    in a thread. Nothing is fetched until batches() or peek().
+    """
+    transforms = list(transforms or [])
+    source = f"SELECT * FROM (\n{sql.strip().rstrip(';')}\n) AS _src"
+    with handler._db_lock:
+        cursor = handler.conn.cursor()
+    try:
+        described = cursor.execute(f"DESCRIBE {source}").fetchall()
+        total_rows, rows_exact = _count_rows(cursor, source, count_limit)
+    finally:
+        cursor.close()
+    column_types = {row[0]: row[1] for row in described}
+
+    query, params, columns, renames, remaining, pushed = source, None, [r[0] for r in described], {}, transforms, []
+    if pushdown and transforms and len(column_types) == len(described):
+        try:
+            compiled = compile_transforms(source, column_types, transforms, lookups)
+            if compiled.pushed:
+                query, params, columns = compiled.sql, compiled.params, compiled.columns
+                renames, remaining, pushed = compiled.renames, compiled.remaining, compiled.pushed
+        except Exception as e:
+            logger.warning(f"[EXPORT] Transform push-down failed, transforming in Python: {e}")
+
+    if remaining:
+        # Output columns and renames don't depend on the data - take them from an empty run
+        _, columns, python_renames = apply_python_transforms(
+            [], list(dict.fromkeys(columns)), remaining, lookups, list(column_types))
+        renames = {**renames, **python_renames}
+
+    return QueryStream(
+        handler=handler, query=query, params=params, columns=columns, renames=renames,
+        total_rows=total_rows, rows_exact=rows_exact, pushed=pushed, remaining=remaining, lookups=lookups,
+        formula_columns=list(column_types), batch_rows=batch_rows,
+    )
+
+
+# =============================================================================
+# WRITERS
+# =============================================================================
+
+def _csv_chunks(stream: QueryStream, progress: Optional['ExportProgress'] = None) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    writer.writerow(stream.headers)
+    for rows in stream.batches():
+        writer.writerows(rows)
+        if progress is not None:
+            progress.advance(len(rows))
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def write_csv(stream: QueryStream, path: str, progress: Optional['ExportProgress'] = None) -> int:
+    """
+    Write the export to a CSV file. Returns rows written.
+
+    With no transforms left for Python, DuckDB writes the file itself
+    (COPY); otherwise batches are transformed and written as they arrive.
+    """
+    if not stream.remaining:
+        rows = stream.copy_csv(path)
+        if progress is not None:
+            progress.advance(rows)
+        return rows
+    written = 0
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(stream.headers)
+        for rows in stream.batches():
+            writer.writerows(rows)
+            written += len(rows)
+            if progress is not None:
+                progress.advance(len(rows))
+    return written
+
+
+def iter_csv(stream: QueryStream, progress: Optional['ExportProgress'] = None) -> Iterator[bytes]:
+    """
+    CSV bytes. Python-transformed exports stream one chunk per batch;
+    otherwise DuckDB COPYs to a temp file, which is then streamed.
+    """
+    if not stream.remaining:
+        yield from _via_temp_file('.csv', lambda path: write_csv(stream, path, progress))
+        return
+    for chunk in _csv_chunks(stream, progress):
+        yield chunk.encode('utf-8')
+
+
+def write_xlsx(stream: QueryStream, path: str, progress: Optional['ExportProgress'] = None,
+               metadata: Optional[Callable[[int], List[str]]] = None) -> int:
+    """
+    Write the export to an XLSX file in write-only mode. Returns rows written.
+
+    A new 'Data N' sheet starts every XLSX_MAX_ROWS - 1 rows. metadata(rows)
+    returns lines for a final 'Metadata' sheet.
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
+    from openpyxl.utils import get_column_letter
+
+    wb = Workbook(write_only=True)
+    header_font = Font(bold=True, color="FFFFFF")
+    header_fill = PatternFill(start_color="4A7C59", end_color="4A7C59", fill_type="solid")  # Brand green
+    thin = Side(style='thin')
+    header_border = Border(left=thin, right=thin, top=thin, bottom=thin)
+
+    headers = stream.headers
+    widths = []
+    for idx, name in enumerate(headers):
+        max_len = len(str(name))
+        for row in stream.peek(100):
+            if row[idx]:
+                max_len = max(max_len, len(str(row[idx])))
+        widths.append(min(max_len + 2, 50))
+
+    def new_sheet(number: int):
+        ws = wb.create_sheet(title="Data" if number == 1 else f"Data {number}")
+        for idx, width in enumerate(widths, 1):
+            ws.column_dimensions[get_column_letter(idx)].width = width
+        cells = []
+        for name in headers:
+            cell = WriteOnlyCell(ws, value=name)
+            cell.font, cell.fill, cell.border = header_font, header_fill, header_border
+            cell.alignment = Alignment(horizontal='center')
+            cells.append(cell)
+        ws.append(cells)
+        return ws
+
+    sheets, written, in_sheet = 1, 0, 0
+    ws = new_sheet(sheets)
+    for rows in stream.batches():
+        for row in rows:
+            if in_sheet == XLSX_MAX_ROWS - 1:
+                sheets += 1
+                ws, in_sheet = new_sheet(sheets), 0
+            ws.append(row)
+            in_sheet += 1
+        written += len(rows)
+        if progress is not None:
+            progress.advance(len(rows))
+
+    if metadata:
+        ws_meta = wb.create_sheet(title="Metadata")
+        for i, line in enumerate(metadata(written)):
+            cell = WriteOnlyCell(ws_meta, value=line)
+            if i == 0 or line.endswith(':'):
+                cell.font = Font(bold=True, size=14 if i == 0 else 11)
+            ws_meta.append([cell])
+
+    wb.save(path)
+    return written
+
+
+def iter_file(path: str, delete: bool = False, chunk_bytes: int = FILE_CHUNK_BYTES) -> Iterator[bytes]:
+    """Read a file in chunks (removing it afterwards when delete is set)."""
+    try:
+        with open(path, 'rb') as f:
+            while True:
+                chunk = f.read(chunk_bytes)
+                if not chunk:
+                    break
+                yield chunk
+    finally:
+        if delete:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def _via_temp_file(suffix: str, write: Callable[[str], Any]) -> Iterator[bytes]:
+    fd, path = tempfile.mkstemp(suffix=suffix, prefix='xlr8_export_')
+    os.close(fd)
+    try:
+        write(path)
+    except Exception:
+        os.remove(path)
+        raise
+    yield from iter_file(path, delete=True)
+
+
+def iter_xlsx(stream: QueryStream, progress: Optional['ExportProgress'] = None,
+              metadata: Optional[Callable[[int], List[str]]] = None) -> Iterator[bytes]:
+    """XLSX bytes: the workbook is written to a temp file in batches, then streamed from it."""
+    yield from _via_temp_file('.xlsx', lambda path: write_xlsx(stream, path, progress, metadata))
+
+
+# =============================================================================
+# PROGRESS AND BACKGROUND JOBS
+# =============================================================================
+
+@dataclass
+class ExportProgress:
+    """Progress of one export (streamed or background)."""
+    export_id: str
+    format: str
+    filename: str
+    total_rows: int = 0
+    rows_written: int = 0
+    status: str = 'running'  # running, completed, failed, cancelled
+    background: bool = False
+    path: Optional[str] = None
+    error: Optional[str] = None
+    started_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    on_progress: Optional[Callable[['ExportProgress'], None]] = field(default=None, repr=False)
+
+    @property
+    def content_type(self) -> str:
+        return CONTENT_TYPES.get(self.format, 'application/octet-stream')
+
+    @property
+    def percent(self) -> int:
+        if self.status == 'completed':
+            return 100
+        if not self.total_rows:
+            return 0
+        return min(99, int(self.rows_written * 100 / self.total_rows))
+
+    def advance(self, rows: int):
+        self.rows_written += rows
+        if self.on_progress is not None:
+            try:
+                self.on_progress(self)
+            except Exception as e:
+                logger.debug(f"[EXPORT] Progress callback failed: {e}")
+
+    def finish(self, error: Optional[str] = None, status: Optional[str] = None):
+        self.status = status or ('failed' if error else 'completed')
+        self.error = error
+        self.finished_at = time.time()
+        if self.on_progress is not None:
+            try:
+                self.on_progress(self)
+            except Exception as e:
+                logger.debug(f"[EXPORT] Progress callback failed: {e}")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'export_id': self.export_id,
+            'status': self.status,
+            'format': self.format,
+            'filename': self.filename,
+            'background': self.background,
+            'rows_written': self.rows_written,
+            'total_rows': self.total_rows,
+            'percent': self.percent,
+            'error': self.error,
+            'elapsed_seconds': round((self.finished_at or time.time()) - self.started_at, 2),
+        }
+
+
+_exports: Dict[str, ExportProgress] = {}
+_exports_lock = threading.Lock()
+_MAX_TRACKED = 200
+
+
+def track_export(format: str, filename: str, total_rows: int = 0, background: bool = False,
+                 on_progress: Optional[Callable[[ExportProgress], None]] = None) -> ExportProgress:
+    """Register an export so its progress can be polled."""
+    progress = ExportProgress(export_id=uuid.uuid4().hex, format=format, filename=filename,
+                              total_rows=total_rows, background=background, on_progress=on_progress)
+    with _exports_lock:
+        _exports[progress.export_id] = progress
+        if len(_exports) > _MAX_TRACKED:
+            finished = sorted((p for p in _exports.values() if p.status != 'running'), key=lambda p: p.started_at)
+            for old in finished[:len(_exports) - _MAX_TRACKED]:
+                _exports.pop(old.export_id, None)
+    return progress
+
+
+def get_export(export_id: str) -> Optional[ExportProgress]:
+    with _exports_lock:
+        return _exports.get(export_id)
+
+
+def tracked_stream(chunks: Iterator[bytes], progress: ExportProgress) -> Iterator[bytes]:
+    """
+    Wrap a streamed response body so the export is marked finished, failed,
+    or cancelled when the client goes away mid-download.
+    """
+    try:
+        yield from chunks
+    except GeneratorExit:
+        progress.finish('client disconnected', status='cancelled')
+        raise
+    except Exception as e:
+        logger.error(f"[EXPORT] Streaming export {progress.export_id} failed: {e}")
+        progress.finish(str(e))
+        raise
+    progress.finish()
+
+
+def _cleanup_export_dir():
+    cutoff = time.time() - RETENTION_SECONDS
+    try:
+        for name in os.listdir(EXPORT_DIR):
+            path = os.path.join(EXPORT_DIR, name)
+            if os.path.isfile(path) and os.path.getmtime(path) < cutoff:
+                os.remove(path)
+    except OSError:
+        pass
+
+
+def run_background_export(stream: QueryStream, progress: ExportProgress,
+                          metadata: Optional[Callable[[int], List[str]]] = None):
+    """Write an export to EXPORT_DIR (run via BackgroundTasks/a thread)."""
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    _cleanup_export_dir()
+    path = os.path.join(EXPORT_DIR, f"{progress.export_id}.{progress.format}")
+    start = time.perf_counter()
+    try:
+        if progress.format == 'csv':
+            write_csv(stream, path, progress)
+        else:
+            write_xlsx(stream, path, progress, metadata)
+        progress.path = path
+        progress.finish()
+        logger.info(f"[EXPORT] {progress.export_id}: {progress.rows_written} rows to {progress.format} "
+                    f"in {time.perf_counter() - start:.1f}s")
+    except Exception as e:
+        logger.error(f"[EXPORT] Background export {progress.export_id} failed: {e}")
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        progress.finish(str(e))
@@ -0,0 +1,182 @@
+"""
+Upload Spool - Streamed Upload Spooling and Content-Hash Dedup
+==============================================================
+
+smart_upload used to `await file.read()` the whole upload, hash it in
+memory and write it back out - a 1 GB register sat fully in RAM per
+concurrent upload - and then re-parsed files that had already been
+ingested byte-for-byte.
+
+Spooling: the multipart body is copied to the upload temp dir in fixed
+chunks, updating SHA-256 as it goes, in one threadpool hop (the copy
+loop blocks on disk, not the event loop). Memory per upload stays at one
+chunk regardless of file size.
+
+Dedup: when the hash matches a completed ingest job for the same project
+and route (structured/semantic), and that job's DuckDB tables and Chroma
+chunks are still present, the prior job and its result are returned
+instead of re-parsing. force_reprocess=true on the upload skips this.
+
+Settings:
+    XLR8_UPLOAD_CHUNK_BYTES  - spool copy chunk size (default 1 MiB)
+    XLR8_UPLOAD_DEDUP        - short-circuit identical re-uploads (default true)
+
+Deploy to: backend/utils/upload_spool.py
+
+Usage:
+    upload = await spool_upload(file, filename)
+    prior = find_prior_ingest(upload.sha256, project, 'structured')
+    if prior: return prior.to_response(filename)
+"""
+
+import os
+import time
+import shutil
+import hashlib
+import logging
+import tempfile
+from dataclasses import dataclass, field
+from typing import Any, BinaryIO, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+CHUNK_BYTES = int(os.getenv('XLR8_UPLOAD_CHUNK_BYTES', str(1024 * 1024)))
+DEDUP_ENABLED = os.getenv('XLR8_UPLOAD_DEDUP', 'true').lower() in ('1', 'true', 'yes')
+
+DEDUP_ROUTES = ('structured', 'semantic')
+
+
+# =============================================================================
+# SPOOLING
+# =============================================================================
+
+@dataclass
+class SpooledUpload:
+    """An upload copied to disk, with its size and content hash."""
+    path: str
+    temp_dir: str
+    size: int
+    sha256: str
+    seconds: float
+
+    @property
+    def bytes_per_second(self) -> float:
+        return self.size / self.seconds if self.seconds > 0 else 0.0
+
+    def cleanup(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+
+def spool_file(source: BinaryIO, path: str, chunk_bytes: int = None) -> tuple:
+    """Copy a file object to path in chunks. Returns (size, sha256 hex)."""
+    chunk_bytes = chunk_bytes or CHUNK_BYTES
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, 'wb') as out:
+        while True:
+            chunk = source.read(chunk_bytes)
+            if not chunk:
+                break
+            digest.update(chunk)
+            out.write(chunk)
+            size += len(chunk)
+    return size, digest.hexdigest()
+
+
+async def spool_upload(file, filename: str, chunk_bytes: int = None) -> SpooledUpload:
+    """Stream a FastAPI UploadFile into a fresh temp dir as `filename`."""
+    from starlette.concurrency import run_in_threadpool
+
+    temp_dir = tempfile.mkdtemp()
+    path = os.path.join(temp_dir, filename)
+    start = time.perf_counter()
+    try:
+        await file.seek(0)
+        size, sha256 = await run_in_threadpool(spool_file, file.file, path, chunk_bytes)
+    except Exception:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        raise
+    return SpooledUpload(path=path, temp_dir=temp_dir, size=size, sha256=sha256,
+                         seconds=time.perf_counter() - start)
+
+
+# =============================================================================
+# DEDUP
+# =============================================================================
+
+@dataclass
+class PriorIngest:
+    """A completed ingest of identical content whose outputs still exist."""
+    job: Dict[str, Any]
+    route: str
+    tables: List[str] = field(default_factory=list)
+    chunks: int = 0
+
+    @property
+    def filename(self) -> str:
+        return (self.job.get('input_data') or {}).get('filename') or (self.job.get('result_data') or {}).get('filename')
+
+    def to_response(self, filename: str) -> Dict[str, Any]:
+        result = self.job.get('result_data') or {}
+        return {
+            "success": True,
+            "job_id": self.job.get('id'),
+            "status": "completed",
+            "route": self.route,
+            "deduplicated": True,
+            "reused_from": self.filename,
+            "completed_at": self.job.get('completed_at'),
+            "tables": self.tables,
+            "chunks": self.chunks,
+            "total_rows": result.get('total_rows'),
+            "result": result,
+            "message": (f"{filename} is identical to {self.filename} (already processed) - "
+                        f"reusing its results. Upload with force_reprocess=true to process again."),
+        }
+
+
+def find_prior_ingest(file_hash: str, project: str, route: str) -> Optional[PriorIngest]:
+    """The latest completed job for this content/project/route, if its tables and chunks still exist."""
+    if not DEDUP_ENABLED or route not in DEDUP_ROUTES or not file_hash:
+        return None
+    try:
+        from utils.database.models import ProcessingJobModel
+        job = ProcessingJobModel.find_completed_by_hash(file_hash, project, route)
+    except Exception as e:
+        logger.warning(f"[DEDUP] Prior job lookup failed: {e}")
+        return None
+    if not job:
+        return None
+
+    prior = PriorIngest(job=job, route=route)
+    result = job.get('result_data') or {}
+    try:
+        if result.get('tables_created') or result.get('type') == 'structured':
+            prior.tables = _existing_tables(project, prior.filename)
+            if not prior.tables:
+                logger.warning(f"[DEDUP] Tables from job {job.get('id')} are gone - reprocessing")
+                return None
+        if result.get('chunks_created') or result.get('type') == 'unstructured':
+            prior.chunks = _existing_chunks(project, prior.filename)
+            if not prior.chunks:
+                logger.warning(f"[DEDUP] Chunks from job {job.get('id')} are gone - reprocessing")
+                return None
+    except Exception as e:
+        logger.warning(f"[DEDUP] Could not verify job {job.get('id')} outputs - reprocessing: {e}")
+        return None
+
+    logger.warning(f"[DEDUP] {file_hash[:12]} already ingested for {project} by job {job.get('id')} "
+                   f"({len(prior.tables)} tables, {prior.chunks} chunks)")
+    return prior
+
+
+def _existing_tables(project: str, filename: str) -> List[str]:
+    from utils.structured_data_handler import get_structured_handler
+    return [t['table_name'] for t in get_structured_handler().get_tables(project) if t.get('file_name') == filename]
+
+
+def _existing_chunks(project: str, filename: str) -> int:
+    from utils.rag_handler import RAGHandler
+    collection = RAGHandler().client.get_collection(name="documents")
+    found = collection.get(where={"$and": [{"source": filename}, {"project": project}]}, include=[])
+    return len(found['ids'])
@@ -0,0 +1,26 @@
+"""
+XLR8 Performance Benchmarks
+===========================
+End-to-end timings for the hot paths: structured ingestion (store_csv,
+store_excel), profile_columns_fast, TermIndex.resolve_terms, SQLAssembler,
+RAGHandler.add_document/search and the five engines. Inputs come from
+seeded generators (multi-million-row CSVs, wide multi-sheet workbooks, long
+PDFs) and the network services the paths call - Ollama, Claude, Supabase -
+are replaced by local stub servers with fixed latency, so two runs on the
+same machine differ only by the code under test.
+
+Each run writes a JSON report; `compare` (or `run --baseline`) flags cases
+whose median slowed past a threshold and exits non-zero for CI.
+
+Settings:
+    XLR8_BENCH_DATA_DIR      - generated input cache shared across runs (default <workdir>/data)
+    XLR8_BENCH_OLLAMA_MS     - stub Ollama latency per request (default 25)
+    XLR8_BENCH_CLAUDE_MS     - stub Claude latency per request (default 400)
+    XLR8_BENCH_SUPABASE_MS   - stub Supabase latency per request (default 5)
+
+Usage:
+    python -m benchmarks list
+    python -m benchmarks run --scale medium --out baseline.json
+    python -m benchmarks run --scale medium --baseline baseline.json --threshold 0.2
+    python -m benchmarks compare current.json baseline.json
+"""
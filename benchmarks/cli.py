@@ -0,0 +1,179 @@
+"""
+Benchmark CLI
+=============
+    python -m benchmarks list
+    python -m benchmarks run [--suite ingest,rag.search_hybrid] [--scale small|medium|large]
+                             [--out results.json] [--baseline baseline.json] [--threshold 0.2]
+                             [--ollama-ms 25] [--claude-ms 400] [--supabase-ms 5]
+    python -m benchmarks compare results.json baseline.json [--threshold 0.2]
+    python -m benchmarks generate [--scale medium] [--data-dir DIR]
+    python -m benchmarks stubs [--ollama-ms 25] [--claude-ms 400] [--supabase-ms 5]
+
+`run` and `compare` exit 1 when a baseline is given and any case regressed.
+"""
+
+import os
+import sys
+import time
+import json
+import shutil
+import logging
+import argparse
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _add_latency_args(parser):
+    parser.add_argument('--ollama-ms', type=float, default=float(os.getenv('XLR8_BENCH_OLLAMA_MS', 25)),
+                        help='stub Ollama latency per request (default 25)')
+    parser.add_argument('--claude-ms', type=float, default=float(os.getenv('XLR8_BENCH_CLAUDE_MS', 400)),
+                        help='stub Claude latency per request (default 400)')
+    parser.add_argument('--supabase-ms', type=float, default=float(os.getenv('XLR8_BENCH_SUPABASE_MS', 5)),
+                        help='stub Supabase latency per request (default 5)')
+
+
+def build_parser() -> argparse.ArgumentParser:
+    from benchmarks.suites import SCALES
+
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='XLR8 performance benchmarks')
+    parser.add_argument('-v', '--verbose', action='store_true', help='show INFO logs from the code under test')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    commands.add_parser('list', help='list suites')
+
+    run = commands.add_parser('run', help='run suites and write a JSON report')
+    run.add_argument('--suite', default='', help='comma-separated suites or suite.case names (default all)')
+    run.add_argument('--scale', choices=list(SCALES), default='small')
+    run.add_argument('--seed', type=int, default=7)
+    run.add_argument('--repeats', type=int, help='timed repeats per case (default per scale)')
+    run.add_argument('--warmup', type=int, default=1, help='untimed calls before timing (default 1)')
+    run.add_argument('--out', help='report path (default benchmark-<scale>-<timestamp>.json)')
+    run.add_argument('--baseline', help='report to compare against')
+    run.add_argument('--threshold', type=float, default=0.2, help='allowed slowdown fraction (default 0.2)')
+    run.add_argument('--min-delta-ms', type=float, default=5.0, help='ignore slowdowns smaller than this')
+    run.add_argument('--workdir', help='keep DuckDB/Chroma state here instead of a temp dir')
+    run.add_argument('--data-dir', default=os.getenv('XLR8_BENCH_DATA_DIR'),
+                     help='generated input cache (default <workdir>/data)')
+    _add_latency_args(run)
+
+    compare = commands.add_parser('compare', help='compare a report with a baseline')
+    compare.add_argument('current')
+    compare.add_argument('baseline')
+    compare.add_argument('--threshold', type=float, default=0.2)
+    compare.add_argument('--min-delta-ms', type=float, default=5.0)
+    compare.add_argument('--json', action='store_true', help='print the comparison as JSON')
+
+    generate = commands.add_parser('generate', help='generate (or reuse) the input files for a scale')
+    generate.add_argument('--scale', choices=list(SCALES), default='small')
+    generate.add_argument('--seed', type=int, default=7)
+    generate.add_argument('--data-dir', default=os.getenv('XLR8_BENCH_DATA_DIR') or 'benchmark-data')
+
+    stubs = commands.add_parser('stubs', help='serve the stub services in the foreground')
+    _add_latency_args(stubs)
+    return parser
+
+
+def cmd_list(args) -> int:
+    from benchmarks.suites import SUITES, SCALES
+
+    for name, (_, description) in SUITES.items():
+        print(f"{name:<10} {description}")
+    print("\nscales: " + ", ".join(f"{k} ({v['csv_rows']:,} CSV rows, {v['pdf_pages']} PDF pages)"
+                                    for k, v in SCALES.items()))
+    return 0
+
+
+def cmd_run(args) -> int:
+    from benchmarks.runner import Recorder, build_report, write_report, load_report, compare_reports, \
+        format_comparison
+    from benchmarks.stubs import stub_services
+    from benchmarks.suites import BenchContext, SCALES, run_suites
+
+    baseline = load_report(args.baseline) if args.baseline else None
+    selected = [s.strip() for s in args.suite.split(',') if s.strip()]
+    workdir = args.workdir or tempfile.mkdtemp(prefix='xlr8_bench_')
+    os.makedirs(workdir, exist_ok=True)
+    # Keep every local store the code under test opens inside the work directory
+    env = {
+        'XLR8_LINEAGE_DB': os.path.join(workdir, 'lineage.sqlite3'),
+        'XLR8_PLAYBOOK_PROGRESS_DB': os.path.join(workdir, 'playbook_progress.db'),
+        'XLR8_OCR_CACHE_DIR': os.path.join(workdir, 'ocr_cache'),
+    }
+    config = {
+        'scale': args.scale, 'sizes': SCALES[args.scale], 'seed': args.seed, 'suites': selected or 'all',
+        'repeats': args.repeats or SCALES[args.scale]['repeats'], 'warmup': args.warmup,
+        'stub_latency_ms': {'ollama': args.ollama_ms, 'claude': args.claude_ms, 'supabase': args.supabase_ms},
+    }
+    recorder = Recorder(repeats=config['repeats'], warmup=args.warmup, only=selected or None)
+    ctx = BenchContext(workdir, args.scale, args.seed, data_dir=args.data_dir)
+    print(f"Benchmarks: scale={args.scale} workdir={workdir}\n", flush=True)
+    start = time.perf_counter()
+    try:
+        with stub_services(args.ollama_ms, args.claude_ms, args.supabase_ms, env=env) as stubs:
+            run_suites(ctx, recorder, selected or None)
+            requests_seen = stubs.request_counts()
+    finally:
+        ctx.close()
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+    config['wall_s'] = round(time.perf_counter() - start, 2)
+
+    report = build_report(recorder.results, config, requests_seen)
+    out = args.out or f"benchmark-{args.scale}-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    write_report(report, out)
+    print(f"\nReport written to {out} ({config['wall_s']}s)")
+
+    if baseline is None:
+        return 0
+    comparison = compare_reports(report, baseline, args.threshold, args.min_delta_ms / 1000)
+    report['comparison'] = comparison
+    write_report(report, out)
+    print("\n" + format_comparison(comparison))
+    return 1 if comparison['regressions'] else 0
+
+
+def cmd_compare(args) -> int:
+    from benchmarks.runner import load_report, compare_reports, format_comparison
+
+    comparison = compare_reports(load_report(args.current), load_report(args.baseline),
+                                 args.threshold, args.min_delta_ms / 1000)
+    print(json.dumps(comparison, indent=2) if args.json else format_comparison(comparison))
+    return 1 if comparison['regressions'] else 0
+
+
+def cmd_generate(args) -> int:
+    from benchmarks.suites import BenchContext
+
+    ctx = BenchContext(args.data_dir, args.scale, args.seed, data_dir=args.data_dir)
+    for label, make in (('csv', ctx.csv_file), ('excel', ctx.excel_file), ('pdf', ctx.pdf_file)):
+        start = time.perf_counter()
+        path = make()
+        print(f"{label:<6} {path} ({os.path.getsize(path) / 1e6:.1f} MB, {time.perf_counter() - start:.1f}s)")
+    return 0
+
+
+def cmd_stubs(args) -> int:
+    from benchmarks.stubs import stub_services
+
+    with stub_services(args.ollama_ms, args.claude_ms, args.supabase_ms) as stubs:
+        print(f"LLM_ENDPOINT={stubs.ollama.url}\nANTHROPIC_BASE_URL={stubs.claude.url}\n"
+              f"SUPABASE_URL={stubs.supabase.url}\n\nCtrl-C to stop", flush=True)
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            print(json.dumps(stubs.request_counts(), indent=2))
+    return 0
+
+
+def main(argv=None) -> int:
+    if REPO_ROOT not in sys.path:
+        sys.path.insert(0, REPO_ROOT)
+    args = build_parser().parse_args(argv)
+    # The code under test logs at INFO per row batch and per chunk; keep the table readable
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                        format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    commands = {'list': cmd_list, 'run': cmd_run, 'compare': cmd_compare, 'generate': cmd_generate,
+                'stubs': cmd_stubs}
+    return commands[args.command](args)
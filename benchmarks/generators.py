@@ -0,0 +1,157 @@
+"""
+Synthetic Data Generators
+=========================
+Seeded generators for the shapes that stress ingestion: a wide multi-sheet
+Excel workbook, a multi-million-row CSV and a long text-layer PDF. The same
+seed and size always produce byte-identical content, and files are cached
+under the work directory by name so repeated runs skip generation.
+
+Rows look like an HR/payroll register (state and status codes, departments,
+pay types, salaries, hire dates) so profiling, term resolution and the
+engines see realistic cardinalities rather than random noise.
+"""
+
+import os
+import csv
+import random
+import logging
+from typing import List
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+STATES = ['TX', 'CA', 'NY', 'FL', 'OH', 'IL', 'PA', 'GA', 'NC', 'WA', 'AZ', 'CO', 'IA', 'ZZ']
+STATUSES = ['A', 'A', 'A', 'A', 'T', 'L', 'I']
+DEPARTMENTS = ['Finance', 'Payroll', 'Engineering', 'Operations', 'Sales', 'Marketing',
+               'Warehouse', 'Legal', 'Benefits', 'Facilities', 'Support', 'Research']
+PAY_TYPES = ['Hourly', 'Salaried', 'Commission']
+FIRST_NAMES = ['James', 'Maria', 'Wei', 'Aisha', 'Carlos', 'Olga', 'Sam', 'Priya', 'Noah', 'Fatima',
+               'Liam', 'Yuki', 'Ava', 'Kofi', 'Elena', 'Omar', 'Grace', 'Ivan', 'Zoe', 'Mateo']
+LAST_NAMES = ['Smith', 'Garcia', 'Chen', 'Okafor', 'Nguyen', 'Kowalski', 'Patel', 'Brown', 'Silva',
+              'Kim', 'Haddad', 'Murphy', 'Rossi', 'Tanaka', 'Johnson', 'Ali', 'Novak', 'Lopez']
+
+BASE_COLUMNS = ['employee_id', 'first_name', 'last_name', 'state', 'employment_status', 'department',
+                'job_code', 'pay_type', 'annual_salary', 'hourly_rate', 'hire_date', 'term_date']
+
+POLICY_TOPICS = ['regular pay', 'overtime', 'holiday pay', 'shift differential', 'bonus', 'commission',
+                 'medical deduction', 'dental deduction', '401k match', 'HSA contribution',
+                 'paid time off', 'jury duty', 'bereavement leave', 'on-call pay', 'state withholding']
+
+
+def employee_block(rng: np.random.Generator, start: int, n: int) -> dict:
+    """Columns for employees start..start+n-1, vectorised so millions of rows stay cheap."""
+    ids = np.arange(start, start + n)
+    hire_days = rng.integers(0, 9000, n)
+    hire = np.datetime64('2000-01-01') + hire_days.astype('timedelta64[D]')
+    status = np.array(STATUSES)[rng.integers(0, len(STATUSES), n)]
+    term = np.where(status == 'T', (hire + rng.integers(30, 2000, n).astype('timedelta64[D]')).astype(str), '')
+    pay_type = np.array(PAY_TYPES)[rng.integers(0, len(PAY_TYPES), n)]
+    salary = np.round(rng.lognormal(11.0, 0.35, n), 2)
+    # A thin tail of absurd salaries for the outlier detector to find
+    salary[rng.random(n) < 0.0005] *= 40
+    return {
+        'employee_id': np.char.add('E', ids.astype(str)),
+        'first_name': np.array(FIRST_NAMES)[rng.integers(0, len(FIRST_NAMES), n)],
+        'last_name': np.array(LAST_NAMES)[rng.integers(0, len(LAST_NAMES), n)],
+        'state': np.array(STATES)[rng.integers(0, len(STATES), n)],
+        'employment_status': status,
+        'department': np.array(DEPARTMENTS)[rng.integers(0, len(DEPARTMENTS), n)],
+        'job_code': np.char.add('JC', rng.integers(100, 400, n).astype(str)),
+        'pay_type': pay_type,
+        'annual_salary': salary,
+        'hourly_rate': np.where(pay_type == 'Hourly', np.round(salary / 2080, 2), 0.0),
+        'hire_date': hire.astype(str),
+        'term_date': term,
+    }
+
+
+def _cached(path: str) -> bool:
+    if os.path.exists(path) and os.path.getsize(path) > 0:
+        logger.info(f"[BENCH] Reusing {path}")
+        return True
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    return False
+
+
+def generate_csv(path: str, rows: int, seed: int = 7, block_rows: int = 250_000) -> str:
+    """Employee register CSV of `rows` rows, written in blocks so memory stays flat."""
+    if _cached(path):
+        return path
+    rng = np.random.default_rng(seed)
+    tmp = f"{path}.partial"
+    with open(tmp, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(BASE_COLUMNS)
+        for start in range(0, rows, block_rows):
+            block = employee_block(rng, start, min(block_rows, rows - start))
+            writer.writerows(zip(*(block[c].tolist() for c in BASE_COLUMNS)))
+    os.replace(tmp, path)
+    return path
+
+
+def generate_excel(path: str, sheets: int, rows: int, columns: int, seed: int = 7) -> str:
+    """
+    Wide workbook: every sheet has the employee columns (plus an SSN column
+    for PII encryption) padded out to `columns` with numeric and coded
+    filler columns, the way vendor exports arrive.
+    """
+    if _cached(path):
+        return path
+    from openpyxl import Workbook
+
+    rng = np.random.default_rng(seed)
+    wb = Workbook(write_only=True)
+    extra = max(0, columns - len(BASE_COLUMNS) - 1)
+    for s in range(sheets):
+        ws = wb.create_sheet(title=f"Register {s + 1}")
+        ws.append(BASE_COLUMNS + ['ssn'] + [f"field_{i:03d}" for i in range(extra)])
+        block = employee_block(rng, s * rows, rows)
+        ssn = [f"{a:03d}-{b:02d}-{c:04d}" for a, b, c in zip(
+            rng.integers(100, 900, rows), rng.integers(10, 99, rows), rng.integers(1000, 9999, rows))]
+        filler = [rng.integers(0, 10_000, rows) if i % 3 else
+                  np.char.add('C', rng.integers(0, 50, rows).astype(str)) for i in range(extra)]
+        columns_out = [block[c].tolist() for c in BASE_COLUMNS] + [ssn] + [f.tolist() for f in filler]
+        for row in zip(*columns_out):
+            ws.append(row)
+    tmp = f"{path}.partial.xlsx"
+    wb.save(tmp)
+    os.replace(tmp, path)
+    return path
+
+
+def policy_paragraphs(rng: random.Random, count: int) -> List[str]:
+    """Policy-handbook prose with the codes and section numbers users search for."""
+    paragraphs = []
+    for i in range(count):
+        topic = POLICY_TOPICS[i % len(POLICY_TOPICS)]
+        state = STATES[rng.randrange(len(STATES) - 1)]
+        paragraphs.append(
+            f"Section {i // 12 + 1}.{i % 12 + 1}. Earning code {topic[:3].upper()}{i:04d} covers {topic} "
+            f"for {rng.choice(PAY_TYPES).lower()} employees in {state}. The {rng.choice(DEPARTMENTS)} team "
+            f"reviews {topic} each pay period and posts it to GL account {6000 + i % 900}-{i:05d}. "
+            f"Employees with status {rng.choice(STATUSES)} are eligible after {rng.randint(30, 365)} days, "
+            f"subject to the limits in Section {rng.randint(1, 40)}.")
+    return paragraphs
+
+
+def generate_pdf(path: str, pages: int, seed: int = 7, paragraphs_per_page: int = 6) -> str:
+    """Long handbook PDF with a real text layer (PyMuPDF), one section block per paragraph."""
+    if _cached(path):
+        return path
+    import fitz
+
+    rng = random.Random(seed)
+    doc = fitz.open()
+    paragraphs = policy_paragraphs(rng, pages * paragraphs_per_page)
+    for p in range(pages):
+        page = doc.new_page()
+        body = "\n\n".join(paragraphs[p * paragraphs_per_page:(p + 1) * paragraphs_per_page])
+        page.insert_textbox(fitz.Rect(54, 54, 558, 738), f"Employee Handbook - page {p + 1}\n\n{body}",
+                            fontsize=9)
+    tmp = f"{path}.partial.pdf"
+    doc.save(tmp)
+    doc.close()
+    os.replace(tmp, path)
+    return path
+
@@ -0,0 +1,214 @@
+"""
+Benchmark Runner
+================
+Times cases, collects results into a JSON-serialisable report and compares
+a report against a saved baseline.
+
+A case is timed `repeats` times after `warmup` untimed calls; the report
+keeps every sample plus median, p95, min and mean, throughput when the case
+declares how many items one call processes, and the process peak RSS after
+the case (ru_maxrss is a high-water mark, so growth between cases is what
+to read). A failing case is recorded with its error instead of aborting
+the run.
+
+A case regresses when its median exceeds the baseline median by more than
+`threshold` (a fraction) and by more than `min_delta_s` - the absolute
+floor keeps millisecond jitter on tiny cases from failing a run. A case
+that errors now but passed in the baseline is also a regression.
+"""
+
+import os
+import sys
+import time
+import json
+import platform
+import resource
+import statistics
+import subprocess
+import traceback
+import logging
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPORT_VERSION = 1
+
+
+def peak_rss_mb() -> float:
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+class Recorder:
+    """Collects timed cases for one run."""
+
+    def __init__(self, repeats: int = 3, warmup: int = 0, only: Optional[List[str]] = None):
+        self.repeats = repeats
+        self.warmup = warmup
+        self.only = only
+        self.results: List[Dict[str, Any]] = []
+        self.suite = ''
+
+    def wanted(self, name: str) -> bool:
+        full = f"{self.suite}.{name}"
+        return not self.only or any(full == o or full.startswith(f"{o}.") for o in self.only)
+
+    def measure(self, name: str, fn: Callable[[int], Any], items: Optional[int] = None,
+                repeats: Optional[int] = None, warmup: Optional[int] = None, **params) -> Optional[Any]:
+        """
+        Time fn(iteration) and record it as <suite>.<name>. Returns the last
+        call's return value (None if the case failed or was filtered out).
+        """
+        full = f"{self.suite}.{name}"
+        if not self.wanted(name):
+            return None
+        repeats = repeats or self.repeats
+        warmup = self.warmup if warmup is None else warmup
+        result = {'name': full, 'suite': self.suite, 'params': params, 'items': items}
+        samples, value = [], None
+        try:
+            for i in range(warmup):
+                fn(-1 - i)
+            for i in range(repeats):
+                start = time.perf_counter()
+                value = fn(i)
+                samples.append(time.perf_counter() - start)
+        except Exception as e:
+            result['error'] = f"{type(e).__name__}: {str(e).splitlines()[0] if str(e) else ''}"[:300]
+            logger.error(f"[BENCH] {full} failed: {e}\n{traceback.format_exc()}")
+        if samples:
+            ordered = sorted(samples)
+            result.update({
+                'samples_s': [round(s, 6) for s in samples],
+                'median_s': round(statistics.median(ordered), 6),
+                'p95_s': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 6),
+                'min_s': round(ordered[0], 6),
+                'mean_s': round(statistics.mean(ordered), 6),
+            })
+            if items:
+                result['items_per_s'] = round(items / result['median_s'], 1) if result['median_s'] else None
+        result['peak_rss_mb'] = peak_rss_mb()
+        self.results.append(result)
+        status = result.get('error') or f"median {result['median_s'] * 1000:.1f} ms  p95 {result['p95_s'] * 1000:.1f} ms"
+        print(f"  {full:<34} {status}", flush=True)
+        return None if 'error' in result else value
+
+    def skip(self, name: str, reason: str):
+        if self.wanted(name):
+            self.results.append({'name': f"{self.suite}.{name}", 'suite': self.suite, 'skipped': reason})
+            print(f"  {self.suite + '.' + name:<34} skipped: {reason}", flush=True)
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def environment() -> Dict[str, Any]:
+    return {
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'git_commit': git_commit(),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def build_report(results: List[Dict], config: Dict[str, Any], stub_requests: Dict[str, Dict[str, int]]) -> Dict:
+    return {
+        'version': REPORT_VERSION,
+        'environment': environment(),
+        'config': config,
+        'stub_requests': stub_requests,
+        'peak_rss_mb': peak_rss_mb(),
+        'results': results,
+    }
+
+
+def load_report(path: str) -> Dict:
+    with open(path) as f:
+        report = json.load(f)
+    if not isinstance(report, dict) or 'results' not in report:
+        raise ValueError(f"{path} is not a benchmark report")
+    return report
+
+
+def write_report(report: Dict, path: str):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+
+
+# =============================================================================
+# COMPARISON
+# =============================================================================
+
+def compare_reports(current: Dict, baseline: Dict, threshold: float = 0.2, min_delta_s: float = 0.005) -> Dict:
+    """
+    Case-by-case comparison. Each entry has status regression | improved |
+    ok | new | missing | error | skipped; `regressions` lists the names that
+    should fail a CI run.
+    """
+    before = {r['name']: r for r in baseline.get('results', [])}
+    after = {r['name']: r for r in current.get('results', [])}
+    # Cases of suites this run did not select are left out rather than reported missing
+    suites_run = {r.get('suite') for r in after.values()}
+    cases = []
+    for name in list(after) + [n for n in before if n not in after and before[n].get('suite') in suites_run]:
+        now, then = after.get(name), before.get(name)
+        entry = {'name': name}
+        if now is None:
+            entry['status'] = 'missing'
+        elif now.get('skipped'):
+            entry['status'] = 'skipped'
+        elif now.get('error'):
+            entry['status'] = 'regression' if then and 'median_s' in then else 'error'
+            entry['error'] = now['error']
+        elif then is None or 'median_s' not in then:
+            entry['status'] = 'new'
+            entry['current_s'] = now['median_s']
+        else:
+            ratio = now['median_s'] / then['median_s'] if then['median_s'] else float('inf')
+            delta = now['median_s'] - then['median_s']
+            entry.update({'baseline_s': then['median_s'], 'current_s': now['median_s'], 'ratio': round(ratio, 3)})
+            if ratio > 1 + threshold and delta > min_delta_s:
+                entry['status'] = 'regression'
+            elif ratio < 1 / (1 + threshold) and -delta > min_delta_s:
+                entry['status'] = 'improved'
+            else:
+                entry['status'] = 'ok'
+        cases.append(entry)
+
+    notes = []
+    if current.get('config', {}).get('scale') != baseline.get('config', {}).get('scale'):
+        notes.append(f"scale differs: {current.get('config', {}).get('scale')} vs "
+                     f"baseline {baseline.get('config', {}).get('scale')}")
+    return {
+        'threshold': threshold,
+        'min_delta_s': min_delta_s,
+        'baseline_commit': baseline.get('environment', {}).get('git_commit'),
+        'current_commit': current.get('environment', {}).get('git_commit'),
+        'notes': notes,
+        'cases': cases,
+        'regressions': [c['name'] for c in cases if c['status'] == 'regression'],
+    }
+
+
+def format_comparison(comparison: Dict) -> str:
+    lines = [f"{'case':<34} {'baseline ms':>12} {'current ms':>11} {'ratio':>7}  status"]
+    for c in comparison['cases']:
+        base = f"{c['baseline_s'] * 1000:.1f}" if 'baseline_s' in c else '-'
+        cur = f"{c['current_s'] * 1000:.1f}" if 'current_s' in c else '-'
+        ratio = f"{c['ratio']:.2f}" if 'ratio' in c else '-'
+        status = c['status'].upper() if c['status'] == 'regression' else c['status']
+        lines.append(f"{c['name']:<34} {base:>12} {cur:>11} {ratio:>7}  {status}"
+                     f"{'  ' + c['error'] if c.get('error') else ''}")
+    lines.extend(f"note: {n}" for n in comparison['notes'])
+    count = len(comparison['regressions'])
+    lines.append(f"\n{count} regression{'s' if count != 1 else ''} "
+                 f"(threshold {comparison['threshold']:.0%}, floor {comparison['min_delta_s'] * 1000:.0f} ms)")
+    return "\n".join(lines)
@@ -0,0 +1,318 @@
+"""
+Stub Services
+=============
+Deterministic local stand-ins for Ollama, the Claude Messages API and
+Supabase (PostgREST), each a threaded HTTP server on 127.0.0.1 with a fixed
+per-request latency. Benchmarks point the repo at them through the same
+environment variables production uses, so the code under test runs
+unmodified and only the network round trip is simulated.
+
+- Ollama: /api/embeddings, /api/embed, /api/generate, /api/chat, /api/tags.
+  Embeddings are a hashed bag of words, L2-normalised, so similar text
+  gets similar vectors and every run gets the same ones.
+- Claude: POST /v1/messages with a canned text reply and token usage.
+- Supabase: in-memory tables under /rest/v1/<table> supporting select,
+  insert/upsert, update and delete with eq/neq/in/is filters, order,
+  limit/offset and exact counts. Auth, storage and RPC calls return empty.
+
+Usage:
+    with stub_services(ollama_ms=25, claude_ms=400, supabase_ms=5) as stubs:
+        ...  # LLM_ENDPOINT, ANTHROPIC_BASE_URL, SUPABASE_URL now point at the stubs
+        stubs.ollama.counts['/api/embeddings']
+"""
+
+import os
+import re
+import json
+import time
+import uuid
+import hashlib
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+# A JWT-shaped key; supabase-py only forwards it as a header
+STUB_SUPABASE_KEY = 'eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoic2VydmljZV9yb2xlIn0.c3R1Yg'
+STUB_ANTHROPIC_KEY = 'sk-ant-stub'
+
+
+# =============================================================================
+# SERVER BASE
+# =============================================================================
+
+class StubServer:
+    """Threaded HTTP server that sleeps `latency_ms` and then calls handle()."""
+
+    name = 'stub'
+
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency_ms = latency_ms
+        self.counts: Counter = Counter()
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'StubServer':
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def _dispatch(self):
+                parts = urlsplit(self.path)
+                length = int(self.headers.get('Content-Length') or 0)
+                raw = self.rfile.read(length) if length else b''
+                try:
+                    body = json.loads(raw) if raw else None
+                except ValueError:
+                    body = None
+                with stub._lock:
+                    stub.counts[parts.path] += 1
+                if stub.latency_ms:
+                    time.sleep(stub.latency_ms / 1000.0)
+                status, payload, headers = stub.handle(
+                    self.command, parts.path, parse_qsl(parts.query, keep_blank_values=True),
+                    body, self.headers)
+                data = b'' if payload is None else json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                if self.command != 'HEAD':
+                    self.wfile.write(data)
+
+            do_GET = do_POST = do_PATCH = do_PUT = do_DELETE = do_HEAD = _dispatch
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name=f"{self.name}-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def handle(self, method: str, path: str, query: List[Tuple[str, str]], body: Any,
+               headers) -> Tuple[int, Any, Optional[Dict[str, str]]]:
+        return 404, {'error': f'{method} {path} not stubbed'}, None
+
+
+# =============================================================================
+# OLLAMA
+# =============================================================================
+
+def stub_embedding(text: str, dims: int = 768) -> List[float]:
+    """Hashed bag of words, unit length (what RAGHandler expects back after normalising)."""
+    vector = [0.0] * dims
+    for word in re.findall(r'[a-z0-9]+', (text or '').lower()):
+        vector[int(hashlib.md5(word.encode()).hexdigest()[:8], 16) % dims] += 1.0
+    norm = sum(v * v for v in vector) ** 0.5 or 1.0
+    return [v / norm for v in vector]
+
+
+class OllamaStub(StubServer):
+    name = 'ollama'
+
+    def __init__(self, latency_ms: float = 0.0, dims: int = 768, reply: str = 'Stub answer.'):
+        super().__init__(latency_ms)
+        self.dims = dims
+        self.reply = reply
+
+    def handle(self, method, path, query, body, headers):
+        body = body or {}
+        if path == '/api/embeddings':
+            return 200, {'embedding': stub_embedding(body.get('prompt', ''), self.dims)}, None
+        if path == '/api/embed':
+            texts = body.get('input', [])
+            texts = [texts] if isinstance(texts, str) else texts
+            return 200, {'model': body.get('model'), 'embeddings': [stub_embedding(t, self.dims) for t in texts]}, None
+        if path == '/api/generate':
+            return 200, {'model': body.get('model'), 'response': self.reply, 'done': True,
+                         'eval_count': len(self.reply.split())}, None
+        if path == '/api/chat':
+            return 200, {'model': body.get('model'), 'message': {'role': 'assistant', 'content': self.reply},
+                         'done': True}, None
+        if path == '/api/tags':
+            return 200, {'models': [{'name': 'nomic-embed-text'}, {'name': 'mistral:7b'}]}, None
+        return super().handle(method, path, query, body, headers)
+
+
+# =============================================================================
+# CLAUDE
+# =============================================================================
+
+class ClaudeStub(StubServer):
+    name = 'claude'
+
+    def __init__(self, latency_ms: float = 0.0, reply: str = 'Stub answer.'):
+        super().__init__(latency_ms)
+        self.reply = reply
+
+    def handle(self, method, path, query, body, headers):
+        if path != '/v1/messages' or method != 'POST':
+            return super().handle(method, path, query, body, headers)
+        body = body or {}
+        prompt_words = len(json.dumps(body.get('messages', [])).split())
+        return 200, {
+            'id': f"msg_stub_{self.counts[path]}", 'type': 'message', 'role': 'assistant',
+            'model': body.get('model', 'claude-stub'),
+            'content': [{'type': 'text', 'text': self.reply}],
+            'stop_reason': 'end_turn', 'stop_sequence': None,
+            'usage': {'input_tokens': prompt_words, 'output_tokens': len(self.reply.split())},
+        }, None
+
+
+# =============================================================================
+# SUPABASE
+# =============================================================================
+
+def _matches(row: Dict, filters: List[Tuple[str, str]]) -> bool:
+    for column, expression in filters:
+        op, _, value = expression.partition('.')
+        negate = op == 'not'
+        if negate:
+            op, _, value = value.partition('.')
+        actual = row.get(column)
+        if op == 'eq':
+            hit = str(actual) == value or (actual is True and value == 'true') or (actual is False and value == 'false')
+        elif op == 'neq':
+            hit = str(actual) != value
+        elif op == 'in':
+            hit = str(actual) in [v.strip('"') for v in value.strip('()').split(',')]
+        elif op == 'is':
+            hit = actual is None if value == 'null' else str(actual).lower() == value
+        else:
+            continue  # gt/lt/like/... are not needed by the benchmarked paths
+        if hit == negate:
+            return False
+    return True
+
+
+class SupabaseStub(StubServer):
+    """Just enough PostgREST for supabase-py table() calls."""
+
+    name = 'supabase'
+    RESERVED = {'select', 'order', 'limit', 'offset', 'on_conflict', 'columns'}
+
+    def __init__(self, latency_ms: float = 0.0):
+        super().__init__(latency_ms)
+        self.tables: Dict[str, List[Dict]] = {}
+
+    def handle(self, method, path, query, body, headers):
+        if not path.startswith('/rest/v1/'):
+            return 200, {}, None
+        table = unquote(path[len('/rest/v1/'):])
+        if table.startswith('rpc/'):
+            return 200, [], None
+        params = dict(query)
+        filters = [(k, v) for k, v in query if k not in self.RESERVED]
+        prefer = headers.get('Prefer', '')
+
+        with self._lock:
+            rows = self.tables.setdefault(table, [])
+            if method == 'POST':
+                incoming = body if isinstance(body, list) else [body or {}]
+                keys = [k.strip() for k in params.get('on_conflict', '').split(',') if k.strip()]
+                merge = 'merge-duplicates' in prefer or 'ignore-duplicates' in prefer
+                written = []
+                for new in incoming:
+                    new = {'id': str(uuid.uuid4()), 'created_at': datetime.now(timezone.utc).isoformat(), **new}
+                    existing = next((r for r in rows if merge and keys and all(r.get(k) == new.get(k) for k in keys)),
+                                    None)
+                    if existing is None:
+                        rows.append(new)
+                        written.append(new)
+                    elif 'ignore-duplicates' not in prefer:
+                        existing.update({k: v for k, v in new.items() if k not in ('id', 'created_at')})
+                        written.append(existing)
+                return 201, written, None
+
+            hits = [r for r in rows if _matches(r, filters)]
+            if method == 'PATCH':
+                for r in hits:
+                    r.update(body or {})
+                return 200, hits, None
+            if method == 'DELETE':
+                self.tables[table] = [r for r in rows if not _matches(r, filters)]
+                return 200, hits, None
+
+        for clause in reversed([c for c in params.get('order', '').split(',') if c]):
+            column, _, direction = clause.partition('.')
+            hits.sort(key=lambda r: (r.get(column) is None, str(r.get(column))), reverse=direction.startswith('desc'))
+        offset = int(params.get('offset', 0))
+        limit = int(params['limit']) if 'limit' in params else len(hits)
+        page = hits[offset:offset + limit]
+        content_range = f"{offset}-{offset + max(len(page) - 1, 0)}/{len(hits) if 'count=' in prefer else '*'}"
+        return 200, page, {'Content-Range': content_range}
+
+
+# =============================================================================
+# WIRING
+# =============================================================================
+
+class StubServices:
+    def __init__(self, ollama: OllamaStub, claude: ClaudeStub, supabase: SupabaseStub):
+        self.ollama = ollama
+        self.claude = claude
+        self.supabase = supabase
+
+    def request_counts(self) -> Dict[str, Dict[str, int]]:
+        return {s.name: dict(s.counts) for s in (self.ollama, self.claude, self.supabase)}
+
+
+def _reset_supabase_singletons():
+    try:
+        from utils.database.supabase_client import SupabaseClient
+    except ImportError:
+        return
+    SupabaseClient.reset_client()
+
+
+@contextmanager
+def stub_services(ollama_ms: float = 0.0, claude_ms: float = 0.0, supabase_ms: float = 0.0,
+                  env: Optional[Dict[str, str]] = None):
+    """Start all three stubs and point the environment at them until exit."""
+    stubs = StubServices(OllamaStub(ollama_ms).start(), ClaudeStub(claude_ms).start(),
+                         SupabaseStub(supabase_ms).start())
+    overrides = {
+        'LLM_ENDPOINT': stubs.ollama.url,
+        'LLM_USERNAME': '',
+        'LLM_PASSWORD': '',
+        'ANTHROPIC_BASE_URL': stubs.claude.url,
+        'ANTHROPIC_API_KEY': STUB_ANTHROPIC_KEY,
+        'CLAUDE_API_KEY': STUB_ANTHROPIC_KEY,
+        'SUPABASE_URL': stubs.supabase.url,
+        'SUPABASE_KEY': STUB_SUPABASE_KEY,
+        **(env or {}),
+    }
+    saved = {key: os.environ.get(key) for key in overrides}
+    os.environ.update(overrides)
+    _reset_supabase_singletons()
+    try:
+        yield stubs
+    finally:
+        for key, value in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+        _reset_supabase_singletons()
+        for stub in (stubs.ollama, stubs.claude, stubs.supabase):
+            stub.stop()
@@ -0,0 +1,613 @@
+"""
+Benchmark Suites
+================
+The hot paths, grouped the way they run in production:
+
+- ingest:  StructuredDataHandler.store_csv / store_excel
+- profile: StructuredDataHandler.profile_columns_fast
+- terms:   TermIndex.resolve_terms
+- sql:     SQLAssembler construction, assemble() and executing the result
+- rag:     PDF text extraction, RAGHandler.add_document and search (hybrid and vector)
+- engines: Aggregate, Compare, Validate, Detect and Map engines
+- shards:  cross-project reads during another project's ingest, project delete and
+           shard attach churn - single DuckDB file vs per-project shard files
+- tracing: the term -> SQL -> DuckDB path per question with tracing off, on and sampled
+- sketches: column sketch build, profiling and outlier checks from sketches vs SQL,
+           and the sketches' accuracy against exact queries
+- snapshots: Parquet snapshot (full, incremental, unchanged) and restore of a project
+           sized by the scale's snapshot_mb (10 GB at --scale large)
+- maintenance: a request-path CHECKPOINT inline vs deferred to the maintenance
+           scheduler, and compaction of a file left half free by re-uploads
+
+Suites share one BenchContext per run (work directory, DuckDB handler,
+generated files), and each builds the state it depends on lazily and
+untimed, so any subset can run on its own: `--suite engines` ingests and
+profiles the register first without recording those steps.
+"""
+
+import os
+import random
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from benchmarks import generators
+from benchmarks.runner import Recorder
+
+logger = logging.getLogger(__name__)
+
+PROJECT = 'bench'
+
+SCALES = {
+    'small': {'csv_rows': 50_000, 'excel_sheets': 3, 'excel_rows': 2_000, 'excel_columns': 60,
+              'pdf_pages': 20, 'repeats': 5, 'ingest_repeats': 2, 'snapshot_mb': 256},
+    'medium': {'csv_rows': 1_000_000, 'excel_sheets': 4, 'excel_rows': 5_000, 'excel_columns': 120,
+               'pdf_pages': 200, 'repeats': 5, 'ingest_repeats': 2, 'snapshot_mb': 2048},
+    'large': {'csv_rows': 5_000_000, 'excel_sheets': 8, 'excel_rows': 20_000, 'excel_columns': 200,
+              'pdf_pages': 1000, 'repeats': 3, 'ingest_repeats': 1, 'snapshot_mb': 10240},
+}
+
+# Term lists as the query parser hands them over: codes, values, a domain word, unknowns
+TERM_QUERIES = [
+    ['tx'], ['finance'], ['ca', 'hourly'], ['payroll', 'ny'], ['a'], ['terminated'],
+    ['salaried', 'fl', 'engineering'], ['commission', 'sales'], ['oh', 'warehouse', 'hourly'],
+    ['legal', 'il'], ['benefits'], ['employees', 'tx'], ['headcount', 'finance'],
+    ['support', 'wa', 'salaried'], ['zz'], ['research', 'co'], ['marketing', 'ga', 'commission'],
+    ['facilities'], ['unknownterm'], ['operations', 'az', 'hourly'],
+]
+
+RAG_QUERIES = ['REG0012', 'overtime for hourly employees', 'GL account 6150-00150', 'Section 4.3',
+               'bereavement leave eligibility', 'which team reviews 401k match', 'HSA contribution in TX',
+               'jury duty', 'shift differential posting', 'state withholding limits']
+
+
+class BenchContext:
+    """Per-run state shared by the suites."""
+
+    def __init__(self, workdir: str, scale: str = 'small', seed: int = 7, data_dir: Optional[str] = None):
+        self.workdir = workdir
+        self.scale = scale
+        self.sizes = SCALES[scale]
+        self.seed = seed
+        self.data_dir = data_dir or os.path.join(workdir, 'data')
+        self._handler = None
+        self.tables: Dict[str, str] = {}
+        self.profiled = set()
+
+    # ---- generated inputs -------------------------------------------------
+
+    def csv_file(self) -> str:
+        rows = self.sizes['csv_rows']
+        return generators.generate_csv(os.path.join(self.data_dir, f"employees_{rows}r_s{self.seed}.csv"),
+                                       rows, self.seed)
+
+    def excel_file(self) -> str:
+        s = self.sizes
+        name = f"register_{s['excel_sheets']}x{s['excel_rows']}x{s['excel_columns']}_s{self.seed}.xlsx"
+        return generators.generate_excel(os.path.join(self.data_dir, name), s['excel_sheets'],
+                                         s['excel_rows'], s['excel_columns'], self.seed)
+
+    def pdf_file(self) -> str:
+        pages = self.sizes['pdf_pages']
+        return generators.generate_pdf(os.path.join(self.data_dir, f"handbook_{pages}p_s{self.seed}.pdf"),
+                                       pages, self.seed)
+
+    # ---- shared state -----------------------------------------------------
+
+    @property
+    def handler(self):
+        if self._handler is None:
+            from utils.structured_data_handler import StructuredDataHandler
+            self._handler = StructuredDataHandler(os.path.join(self.workdir, 'duckdb', 'bench.duckdb'))
+        return self._handler
+
+    @property
+    def conn(self):
+        return self.handler.conn
+
+    def employee_table(self) -> str:
+        if 'employees' not in self.tables:
+            result = self.handler.store_csv(self.csv_file(), PROJECT, 'employees.csv')
+            self.tables['employees'] = result['table_name']
+        return self.tables['employees']
+
+    def profiled_table(self) -> str:
+        table = self.employee_table()
+        if table not in self.profiled:
+            self.handler.profile_columns_fast(PROJECT, table)
+            self.profiled.add(table)
+        return table
+
+    def close(self):
+        if self._handler is not None:
+            self._handler.close()
+            self._handler = None
+
+
+# =============================================================================
+# REGISTRY
+# =============================================================================
+
+SUITES: 'OrderedDict[str, Tuple[Callable[[BenchContext, Recorder], None], str]]' = OrderedDict()
+
+
+def suite(name: str, description: str):
+    def register(fn):
+        SUITES[name] = (fn, description)
+        return fn
+    return register
+
+
+def run_suites(ctx: BenchContext, recorder: Recorder, names: Optional[List[str]] = None):
+    for name, (fn, _) in SUITES.items():
+        if names and not any(n == name or n.startswith(f"{name}.") for n in names):
+            continue
+        recorder.suite = name
+        print(f"[{name}]", flush=True)
+        try:
+            fn(ctx, recorder)
+        except Exception as e:
+            # Setup failures (missing module, generator error) lose the suite, not the run
+            logger.error(f"[BENCH] Suite {name} aborted: {e}", exc_info=True)
+            recorder.skip('*', f"suite setup failed: {type(e).__name__}: {e}")
+
+
+# =============================================================================
+# SUITES
+# =============================================================================
+
+@suite('ingest', 'store_csv / store_excel on the generated register and wide workbook')
+def ingest(ctx: BenchContext, bench: Recorder):
+    repeats = ctx.sizes['ingest_repeats']
+    csv_path = ctx.csv_file()
+    result = bench.measure('store_csv', lambda i: ctx.handler.store_csv(csv_path, PROJECT, 'employees.csv'),
+                           items=ctx.sizes['csv_rows'], repeats=repeats, warmup=0, rows=ctx.sizes['csv_rows'])
+    if result:
+        ctx.tables['employees'] = result['table_name']
+        ctx.profiled.discard(result['table_name'])
+
+    xlsx_path = ctx.excel_file()
+    s = ctx.sizes
+    bench.measure('store_excel', lambda i: ctx.handler.store_excel(xlsx_path, PROJECT, 'register.xlsx'),
+                  items=s['excel_sheets'] * s['excel_rows'], repeats=repeats, warmup=0,
+                  sheets=s['excel_sheets'], rows=s['excel_rows'], columns=s['excel_columns'])
+
+
+@suite('profile', 'profile_columns_fast on the ingested register')
+def profile(ctx: BenchContext, bench: Recorder):
+    table = ctx.employee_table()
+    if bench.measure('profile_columns_fast', lambda i: ctx.handler.profile_columns_fast(PROJECT, table),
+                     items=ctx.sizes['csv_rows']) is not None:
+        ctx.profiled.add(table)
+
+
+@suite('terms', 'TermIndex.resolve_terms over a fixed set of query term lists')
+def terms(ctx: BenchContext, bench: Recorder):
+    from backend.utils.intelligence.term_index import TermIndex
+
+    ctx.profiled_table()
+    index = TermIndex(ctx.conn, PROJECT)
+    bench.measure('resolve_terms', lambda i: [index.resolve_terms(q) for q in TERM_QUERIES],
+                  items=len(TERM_QUERIES), queries=len(TERM_QUERIES))
+
+
+@suite('sql', 'SQLAssembler construction, assemble() and executing the assembled SQL')
+def sql(ctx: BenchContext, bench: Recorder):
+    from backend.utils.intelligence.term_index import TermIndex
+    from backend.utils.intelligence.sql_assembler import SQLAssembler, QueryIntent
+
+    table = ctx.profiled_table()
+    index = TermIndex(ctx.conn, PROJECT)
+    intents = [QueryIntent.COUNT, QueryIntent.LIST, QueryIntent.COUNT, QueryIntent.SUM]
+    plans = [(intents[n % len(intents)], index.resolve_terms(q)) for n, q in enumerate(TERM_QUERIES)]
+    plans = [(intent, matches) for intent, matches in plans if matches]
+
+    bench.measure('assembler_init', lambda i: SQLAssembler(ctx.conn, PROJECT))
+    assembler = SQLAssembler(ctx.conn, PROJECT)
+    assembled = bench.measure('assemble', lambda i: [assembler.assemble(intent, matches) for intent, matches in plans],
+                              items=len(plans), queries=len(plans))
+    statements = [a.sql for a in assembled or [] if a.success and a.sql]
+    if statements:
+        bench.measure('execute', lambda i: [ctx.conn.execute(s).fetchall() for s in statements],
+                      items=len(statements), queries=len(statements), table=table)
+    else:
+        bench.skip('execute', 'no query assembled successfully')
+
+
+@suite('rag', 'PDF text extraction, RAGHandler.add_document and search against the stub Ollama')
+def rag(ctx: BenchContext, bench: Recorder):
+    from utils.rag_handler import RAGHandler
+    from utils.text_extraction import extract_text
+
+    pdf_path = ctx.pdf_file()
+    text = bench.measure('extract_pdf', lambda i: extract_text(pdf_path, max_pages=None, mode='parallel'),
+                         items=ctx.sizes['pdf_pages'], pages=ctx.sizes['pdf_pages'])
+    if not text:
+        bench.skip('add_document', 'no text extracted from the PDF')
+        return
+
+    handler = RAGHandler(persist_directory=os.path.join(ctx.workdir, 'chromadb'))
+    collection = f"bench_{ctx.seed}"
+
+    def add(i):
+        name = f"{collection}_{i}".replace('-', 'w')
+        try:
+            handler.client.delete_collection(name)
+        except Exception:
+            pass
+        return handler.add_document(name, text, {'filename': 'handbook.pdf', 'file_type': 'pdf',
+                                                 'project_id': PROJECT, 'truth_type': 'reference'})
+
+    chunks = bench.measure('add_document', add, repeats=min(3, bench.repeats), chars=len(text))
+    if not chunks:
+        bench.skip('search', 'add_document stored no chunks')
+        return
+    target = f"{collection}_{min(3, bench.repeats) - 1}"
+    for mode in ('hybrid', 'vector'):
+        bench.measure(f'search_{mode}', lambda i: [handler.search(target, q, n_results=8, mode=mode)
+                                                   for q in RAG_QUERIES],
+                      items=len(RAG_QUERIES), queries=len(RAG_QUERIES), chunks=chunks)
+
+
+@suite('engines', 'the five engines (aggregate, compare, validate, detect, map) on the register')
+def engines(ctx: BenchContext, bench: Recorder):
+    from backend.engines import AggregateEngine, CompareEngine, ValidateEngine, DetectEngine, MapEngine
+
+    table = ctx.profiled_table()
+    prior, departments = f"{table}_prior", f"{PROJECT}_departments"
+    # Last period's register: ~1% of salaries changed, every 97th employee missing
+    ctx.conn.execute(f"""
+        CREATE OR REPLACE TABLE "{prior}" AS
+        SELECT * REPLACE (CASE WHEN hash(employee_id) % 100 = 0
+                          THEN CAST(round(TRY_CAST(annual_salary AS DOUBLE) * 0.97, 2) AS VARCHAR)
+                          ELSE annual_salary END AS annual_salary)
+        FROM "{table}" WHERE hash(employee_id) % 97 <> 0
+    """)
+    # Reference table with one department missing so the orphan checks find rows
+    ctx.conn.execute(f"""
+        CREATE OR REPLACE TABLE "{departments}" AS
+        SELECT DISTINCT department AS name FROM "{table}" WHERE department <> 'Research'
+    """)
+    rng = random.Random(ctx.seed)
+    states = sorted(generators.STATES[:-1], key=lambda _: rng.random())
+
+    cases = {
+        'aggregate': (AggregateEngine, {
+            'source_table': table,
+            # store_csv keeps columns as VARCHAR, so stick to measures that work on text
+            'measures': [{'function': 'COUNT'}, {'function': 'MAX', 'column': 'hire_date'}],
+            'dimensions': ['state', 'department']}),
+        'compare': (CompareEngine, {
+            'source_a': table, 'source_b': prior, 'match_keys': ['employee_id'],
+            'compare_columns': ['annual_salary', 'department', 'employment_status']}),
+        'validate': (ValidateEngine, {
+            'source_table': table,
+            'rules': [
+                {'field': 'employee_id', 'type': 'format', 'pattern': r'^E[0-9]+$'},
+                {'field': 'annual_salary', 'type': 'range', 'min': 15000, 'max': 500000},
+                {'field': 'state', 'type': 'allowed_values', 'values': states},
+                {'field': 'department', 'type': 'referential', 'parent_table': departments,
+                 'parent_column': 'name'},
+            ]}),
+        'detect': (DetectEngine, {
+            'source_table': table,
+            'patterns': [
+                {'type': 'duplicate', 'columns': ['first_name', 'last_name', 'hire_date']},
+                {'type': 'outlier', 'column': 'annual_salary'},
+                {'type': 'orphan', 'column': 'department', 'parent_table': departments, 'parent_column': 'name'},
+            ]}),
+        'map': (MapEngine, {
+            'mode': 'transform', 'source_table': table,
+            'mappings': [{'column': 'state', 'type': 'state_names'},
+                         {'column': 'employment_status', 'type': 'status_codes'}]}),
+    }
+    for name, (engine_cls, config) in cases.items():
+        def run(i, engine_cls=engine_cls, config=config):
+            result = engine_cls(ctx.conn, PROJECT).execute(dict(config))
+            if result.status.value == 'failure':
+                raise RuntimeError(result.summary or f"{name} engine failed")
+            return result
+        bench.measure(name, run, items=ctx.sizes['csv_rows'])
+
+
+SHARD_PROJECTS = 8
+
+
+def _shard_project(n: int) -> str:
+    return f"{0xbe4c0000 + n:08x}-0000-4000-8000-{n:012x}"
+
+
+def _seed_project(handler, project: str, rows: int) -> str:
+    """One payroll table for a project, registered in _schema_metadata like an upload."""
+    table = f"{project.replace('-', '')[:8]}_payroll_data"
+    handler.conn.execute(f"""
+        CREATE OR REPLACE TABLE "{table}" AS
+        SELECT range AS id, ['Finance', 'Sales', 'Support', 'Research'][range % 4 + 1] AS department,
+               round(1000 + (hash(range) % 900000) / 100.0, 2) AS amount
+        FROM range({rows})
+    """)
+    handler.conn.execute("""
+        INSERT INTO _schema_metadata (id, project, file_name, sheet_name, table_name, columns, row_count)
+        VALUES (nextval('schema_metadata_seq'), ?, 'payroll.csv', 'data', ?, '["id", "department", "amount"]', ?)
+    """, [project, table, rows])
+    handler.safe_commit()
+    return table
+
+
+@suite('shards', 'cross-project reads during an ingest, project delete, attach churn: single file vs shards')
+def shards(ctx: BenchContext, bench: Recorder):
+    from utils.structured_data_handler import StructuredDataHandler
+
+    rows = max(1000, ctx.sizes['csv_rows'] // 10)
+    deletes = bench.repeats + bench.warmup
+    for mode in ('single', 'sharded'):
+        handler = StructuredDataHandler(os.path.join(ctx.workdir, 'shards', f"{mode}.duckdb"),
+                                        sharding=mode == 'sharded')
+        try:
+            projects = [_shard_project(n) for n in range(SHARD_PROJECTS + deletes)]
+            tables = [_seed_project(handler, p, rows) for p in projects]
+            readers = tables[1:SHARD_PROJECTS]
+            queries = [f'SELECT department, COUNT(*), SUM(amount) FROM "{t}" GROUP BY department' for t in readers]
+
+            def read(i):
+                return [handler.safe_fetchall(q, cache=False) for q in queries]
+
+            bench.measure(f'{mode}_read_idle', read, items=len(queries), projects=len(readers), rows=rows)
+
+            # Project 0 re-ingests a table 4x the size for as long as the readers run
+            stop = threading.Event()
+            ingest = f'CREATE OR REPLACE TABLE "{tables[0]}_ingest" AS ' \
+                     f'SELECT range AS id, md5(range::VARCHAR) AS payload FROM range({rows * 4})'
+
+            def ingest_loop():
+                while not stop.is_set():
+                    handler.safe_execute(ingest)
+
+            writer = threading.Thread(target=ingest_loop, daemon=True)
+            writer.start()
+            try:
+                bench.measure(f'{mode}_read_under_ingest', read, items=len(queries), projects=len(readers),
+                              rows=rows, ingest_rows=rows * 4)
+            finally:
+                stop.set()
+                writer.join()
+
+            bench.measure(f'{mode}_delete_project',
+                          lambda i: handler.delete_project(projects[SHARD_PROJECTS + bench.warmup + i]),
+                          rows=rows)
+
+            if handler.shards is not None:
+                # Two attachment slots for seven projects: every query attaches and detaches
+                handler.shards.max_attached = 2
+                bench.measure('sharded_read_attach_churn', read, items=len(queries), projects=len(readers),
+                              rows=rows, max_attached=2)
+        finally:
+            handler.close()
+
+
+@suite('tracing', 'the term -> SQL -> DuckDB path per question with tracing off, on and sampled')
+def tracing(ctx: BenchContext, bench: Recorder):
+    from utils.tracing import Tracer, set_tracer, span, trace
+    from backend.utils.intelligence.term_index import TermIndex
+    from backend.utils.intelligence.sql_assembler import SQLAssembler, QueryIntent
+
+    ctx.profiled_table()
+    index = TermIndex(ctx.conn, PROJECT)
+    assembler = SQLAssembler(ctx.conn, PROJECT)
+
+    # Many short spans per question: the worst case for relative overhead
+    def questions(i):
+        for terms in TERM_QUERIES:
+            with trace('bench.question'):
+                matches = index.resolve_terms(terms)
+                if matches:
+                    assembled = assembler.assemble(QueryIntent.COUNT, matches)
+                    if assembled.success and assembled.sql:
+                        ctx.handler.safe_fetchall(assembled.sql, cache=False)
+
+    def median(name):
+        return next((r.get('median_s') for r in reversed(bench.results) if r['name'] == f'tracing.{name}'), None)
+
+    try:
+        questions(-1)   # untimed: warm the DuckDB and term index caches before the first mode
+        for mode, tracer in (('off', Tracer(enabled=False)), ('on', Tracer()),
+                             ('sampled_10pct', Tracer(sample_rate=0.1))):
+            set_tracer(tracer)
+            bench.measure(f'questions_{mode}', questions, items=len(TERM_QUERIES), queries=len(TERM_QUERIES))
+            if mode == 'on' and tracer.stats()['traces_finished']:
+                stats = tracer.stats()
+                print(f"  {'':<34} {stats['spans'] / stats['traces_finished']:.1f} spans per question", flush=True)
+
+        set_tracer(Tracer())
+
+        def span_cost(i):
+            with trace('bench.spans'):
+                for _ in range(999):
+                    with span('bench.span', n=1):
+                        pass
+        bench.measure('span_cost_1000', span_cost, items=1000)
+    finally:
+        set_tracer(None)
+
+    off, on = median('questions_off'), median('questions_on')
+    if off and on:
+        print(f"  {'':<34} overhead with every question traced: {(on / off - 1) * 100:+.1f}%", flush=True)
+
+
+@suite('sketches', 'column sketch build, profiling and outlier checks from sketches vs the SQL path')
+def sketches(ctx: BenchContext, bench: Recorder):
+    import utils.structured_data_handler as sdh
+    from backend.engines import DetectEngine
+    from utils.column_sketches import get_sketch_store
+
+    table = ctx.employee_table()
+    store = get_sketch_store(ctx.handler)
+    rows = ctx.sizes['csv_rows']
+
+    def build(i):
+        store.forget([table])
+        return store.load_or_build(PROJECT, table)
+
+    def profile_sql(i):
+        sdh.SKETCHES_ENABLED = False
+        try:
+            return ctx.handler.profile_columns_fast(PROJECT, table)
+        finally:
+            sdh.SKETCHES_ENABLED = enabled
+
+    def profile_cold(i):
+        store.forget([table])
+        return ctx.handler.profile_columns_fast(PROJECT, table)
+
+    enabled = sdh.SKETCHES_ENABLED
+    built = bench.measure('build', build, items=rows)
+    bench.measure('profile_sql', profile_sql, items=rows)
+    bench.measure('profile_sketch_cold', profile_cold, items=rows)
+    if bench.measure('profile_sketch_warm', lambda i: ctx.handler.profile_columns_fast(PROJECT, table),
+                     items=rows) is not None:
+        ctx.profiled.add(table)
+
+    for method in ('zscore', 'iqr'):
+        config = {'source_table': table,
+                  'patterns': [{'type': 'outlier', 'column': 'annual_salary', 'method': method}]}
+        bench.measure(f'detect_{method}', lambda i, config=config: DetectEngine(ctx.conn, PROJECT).execute(dict(config)),
+                      items=rows)
+
+    # Accuracy against exact queries, with the bounds the sketches claim
+    if built:
+        worst = max((abs(s.distinct_count - ctx.conn.execute(
+                        f'SELECT COUNT(DISTINCT "{col}") FROM "{table}"').fetchone()[0]) / max(s.distinct_count, 1), col)
+                    for col, s in built.items())
+        print(f"  {'':<34} worst distinct count error {worst[0]:.2%} ({worst[1]}), "
+              f"bound {max(s.error_bounds()['distinct_relative'] for s in built.values()):.2%}", flush=True)
+        salary = built.get('annual_salary')
+        if salary is not None and salary.numeric_count:
+            exact = ctx.conn.execute(f"""
+                SELECT quantile_cont(TRY_CAST(annual_salary AS DOUBLE), [0.25, 0.5, 0.75]) FROM "{table}"
+            """).fetchone()[0]
+            errors = [abs(salary.quantile(q) - e) / e for q, e in zip((0.25, 0.5, 0.75), exact) if e]
+            print(f"  {'':<34} annual_salary quartiles within {max(errors):.2%} of exact "
+                  f"(rank bound {salary.error_bounds()['quantile_rank']:.2%})", flush=True)
+
+
+SNAPSHOT_PROJECT = '5a0b0000-0000-4000-8000-000000000001'
+SNAPSHOT_TABLES = 8
+SNAPSHOT_ROW_BYTES = 72     # uncompressed: id, employee_id, department, amount, pay_date, 32-char memo
+
+
+@suite('snapshots', 'Parquet snapshot (full, incremental, unchanged) and restore of a snapshot_mb-sized project')
+def snapshots(ctx: BenchContext, bench: Recorder):
+    import shutil
+    from utils.project_snapshots import ProjectSnapshots
+
+    handler = ctx.handler
+    raw_bytes = ctx.sizes['snapshot_mb'] * 1024 * 1024
+    rows = raw_bytes // SNAPSHOT_ROW_BYTES // SNAPSHOT_TABLES
+    key = SNAPSHOT_PROJECT[:8]
+    tables = [f"{key}_payroll_{n}" for n in range(SNAPSHOT_TABLES)]
+    for n, table in enumerate(tables):
+        handler.conn.execute(f"""
+            CREATE OR REPLACE TABLE "{table}" AS
+            SELECT range AS id, 'E' || (range % 50000) AS employee_id,
+                   ['Finance', 'Sales', 'Support', 'Research'][range % 4 + 1] AS department,
+                   round(1000 + (hash(range) % 900000) / 100.0, 2) AS amount,
+                   DATE '2024-01-01' + (range % 365)::INTEGER AS pay_date, md5(range::VARCHAR) AS memo
+            FROM range({rows})
+        """)
+        handler.conn.execute("""
+            INSERT INTO _schema_metadata (id, project, file_name, sheet_name, table_name, columns, row_count)
+            VALUES (nextval('schema_metadata_seq'), ?, 'payroll.csv', ?, ?, '[]', ?)
+        """, [SNAPSHOT_PROJECT, f"sheet{n}", table, rows])
+    handler.safe_commit()
+    handler.profile_columns_fast(SNAPSHOT_PROJECT, tables[0])
+
+    store = ProjectSnapshots(handler, root=os.path.join(ctx.workdir, 'snapshots'))
+    taken: List[str] = []
+
+    def full(i):
+        shutil.rmtree(store.project_dir(SNAPSHOT_PROJECT), ignore_errors=True)
+        taken[:] = [store.create(SNAPSHOT_PROJECT)['snapshot_id']]
+
+    def incremental(i):
+        # A re-upload of one table between snapshots
+        handler.conn.execute(f'INSERT INTO "{tables[0]}" SELECT * REPLACE (id + {rows} AS id) '
+                             f'FROM "{tables[0]}" LIMIT 1000')
+        taken.append(store.create(SNAPSHOT_PROJECT)['snapshot_id'])
+
+    mb = raw_bytes / 1e6
+    params = dict(rows=rows * SNAPSHOT_TABLES, tables=SNAPSHOT_TABLES, project_mb=ctx.sizes['snapshot_mb'],
+                  compression=store.compression)
+    results = {
+        'snapshot_full': bench.measure('snapshot_full', full, items=raw_bytes, **params),
+        'snapshot_incremental': bench.measure('snapshot_incremental', incremental, items=raw_bytes, **params),
+        'snapshot_unchanged': bench.measure(
+            'snapshot_unchanged', lambda i: taken.append(store.create(SNAPSHOT_PROJECT)['snapshot_id']),
+            items=raw_bytes, **params),
+    }
+    if taken:
+        results['restore'] = bench.measure('restore', lambda i: store.restore(SNAPSHOT_PROJECT, taken[-1]),
+                                           items=raw_bytes, **params)
+        results['restore_no_verify'] = bench.measure(
+            'restore_no_verify', lambda i: store.restore(SNAPSHOT_PROJECT, taken[-1], verify=False),
+            items=raw_bytes, **params)
+
+    for name in results:
+        median = next((r.get('median_s') for r in reversed(bench.results)
+                       if r['name'] == f'snapshots.{name}'), None)
+        if median:
+            print(f"  {'':<34} {name}: {mb / median:,.0f} MB/s of {mb:,.0f} MB", flush=True)
+    if taken:
+        totals = store.manifest(SNAPSHOT_PROJECT, taken[-1])['totals']
+        print(f"  {'':<34} snapshot on disk {totals['bytes'] / 1e6:,.0f} MB "
+              f"({totals['bytes'] / raw_bytes:.0%} of the data, {store.compression})", flush=True)
+
+
+@suite('maintenance', 'requested CHECKPOINT inline vs deferred to the scheduler, and compaction of a churned file')
+def maintenance(ctx: BenchContext, bench: Recorder):
+    from utils.duckdb_maintenance import ENABLED, get_maintenance, request_checkpoint
+    from utils.structured_data_handler import StructuredDataHandler
+
+    if not ENABLED:
+        bench.skip('maintenance', 'XLR8_MAINTENANCE is off')
+        return
+    rows = max(10_000, ctx.sizes['csv_rows'] // 5)
+    handler = StructuredDataHandler(os.path.join(ctx.workdir, 'maintenance', 'maintenance.duckdb'))
+    try:
+        scheduler = get_maintenance(handler)
+        scheduler.interval_s = scheduler.idle_s = 3600
+        scheduler.min_compact_bytes = 0
+        handler.conn.execute("CREATE OR REPLACE TABLE bench_requests (id BIGINT, employee_id VARCHAR, amount DOUBLE)")
+
+        # An insert-heavy request that asks for a checkpoint: inline until the scheduler runs
+        def request(i):
+            handler.conn.execute(f"INSERT INTO bench_requests SELECT range, 'E' || range, range * 1.5 FROM range({rows})")
+            request_checkpoint(handler.conn, 'bench.request')
+
+        bench.measure('request_checkpoint_inline', request, items=rows, rows=rows)
+        scheduler.start()
+        try:
+            bench.measure('request_checkpoint_deferred', request, items=rows, rows=rows)
+        finally:
+            scheduler.stop()            # serves the deferred hints
+
+        # Re-uploads leave half the file free
+        for n in range(4):
+            handler.conn.execute(f"""
+                CREATE OR REPLACE TABLE bench_reupload_{n} AS
+                SELECT range AS id, md5(range::VARCHAR) AS memo FROM range({rows * 5})
+            """)
+        handler.conn.execute("FORCE CHECKPOINT")
+        for n in range(2):
+            handler.conn.execute(f"DROP TABLE bench_reupload_{n}")
+        handler.conn.execute("FORCE CHECKPOINT")
+        before = scheduler.files()[0]
+        done = bench.measure('compaction', lambda i: scheduler.run_once(force=True).get('compaction'),
+                             repeats=1, warmup=0, file_mb=round(before['bytes'] / 1e6),
+                             dead_ratio=before['dead_ratio'])
+        if done and 'bytes_reclaimed' in done:
+            print(f"  {'':<34} {before['bytes'] / 1e6:,.0f} MB -> {done['bytes_after'] / 1e6:,.0f} MB, "
+                  f"copy {done['copy_ms']:,.0f} ms outside the lock, {done['swap_ms']:,.0f} ms under it",
+                  flush=True)
+    finally:
+        handler.close()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark BI Transform Push-Down
+================================
+Times an export-style query with a typical transform list (state names,
+lookup, currency format, split, filter) transformed in Python against the
+SQL push-down path, on an in-memory DuckDB table. Also times loading the
+project's lookup dictionaries cold vs from the cache.
+
+Usage:
+    python scripts/benchmark_bi_transforms.py [--rows 500000] [--runs 3]
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+import statistics
+import threading
+from types import SimpleNamespace
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class Handler:
+    """Minimal structured handler over a DuckDB connection."""
+
+    _db_lock = threading.RLock()
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def query(self, sql):
+        result = self.conn.execute(sql)
+        columns = [desc[0] for desc in result.description]
+        return [dict(zip(columns, row)) for row in result.fetchall()]
+
+
+TRANSFORMS = [
+    SimpleNamespace(type='state_names', column='state', params=None),
+    SimpleNamespace(type='map_lookup', column='earn_code', params={'lookup_table': 'bench__earnings_codes'}),
+    SimpleNamespace(type='format_currency', column='amount', params=None),
+    SimpleNamespace(type='split', column='name', params={'delimiter': ' ', 'new_columns': ['first', 'last']}),
+    SimpleNamespace(type='filter', column='state', params={'operator': '!=', 'value': 'Texas'}),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=500_000)
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    sys.path.insert(0, REPO_ROOT)
+    import duckdb
+    from backend.utils.bi_transforms import (
+        get_lookup_dictionaries, invalidate_lookup_dictionaries, run_transforms,
+    )
+
+    conn = duckdb.connect(':memory:')
+    conn.execute(f"""
+        CREATE TABLE bench__earnings AS
+        SELECT i AS id, ['CA', 'ny', 'TX ', 'PA', 'zz'][1 + i % 5] AS state,
+               'E' || (i % 400) AS earn_code, random() * 100000 AS amount,
+               'Employee ' || i AS name
+        FROM range({args.rows}) r(i)
+    """)
+    conn.execute("CREATE TABLE bench__earnings_codes AS SELECT 'E' || i AS code, 'Earning ' || i AS description "
+                 "FROM range(300) r(i)")
+    conn.execute("SELECT ?", [1])  # first parameter binding imports pandas; keep it out of the timings
+    handler = Handler(conn)
+    sql = "SELECT * FROM bench__earnings ORDER BY id"
+
+    invalidate_lookup_dictionaries()
+    start = time.perf_counter()
+    lookups = asyncio.run(get_lookup_dictionaries(handler, 'bench'))
+    cold_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    asyncio.run(get_lookup_dictionaries(handler, 'bench'))
+    cached_ms = (time.perf_counter() - start) * 1000
+    print(f"Lookups: cold {cold_ms:.1f} ms, cached {cached_ms:.1f} ms\n")
+
+    for label, pushdown in (('python', False), ('pushdown', True)):
+        times = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            result = run_transforms(handler, sql, TRANSFORMS, lookups, pushdown=pushdown)
+            times.append(time.perf_counter() - start)
+        print(f"{label:<9} {len(result.rows):>8} rows   {statistics.median(times) * 1000:8.0f} ms   "
+              f"SQL: {', '.join(result.pushed) or '-'}   Python: {', '.join(result.python) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
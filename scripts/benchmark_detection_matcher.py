@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Benchmark Detection Matcher
+===========================
+Compares DetectionService.detect() with the compiled SignatureMatcher
+against the per-signature loop, using synthetic signatures and a wide
+synthetic file (column names plus sample values).
+
+Usage:
+    python scripts/benchmark_detection_matcher.py [--signatures 500] [--columns 300] [--runs 5]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import statistics
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.detection_service import DetectionService, DetectionSignature, SignatureMatcher  # noqa: E402
+
+WORDS = ['employee', 'emp', 'id', 'hire', 'term', 'date', 'pay', 'gross', 'net', 'fica', 'tax',
+         'state', 'federal', 'gl', 'account', 'debit', 'credit', 'vendor', 'invoice', 'worker',
+         'company', 'code', 'location', 'dept', 'job', 'rate', 'hours', 'earn', 'deduct', 'benefit']
+
+
+def make_signatures(count: int, rng: random.Random):
+    signatures = []
+    for i in range(count):
+        a, b, c = rng.sample(WORDS, 3)
+        shape = i % 4
+        if shape == 0:
+            pattern = f'(?i){a}_{b}|{b}_{c}|{a}{c}'
+        elif shape == 1:
+            pattern = f'(?i)^{a}_{b}$|^{c}$'
+        elif shape == 2:
+            pattern = f'(?i){a}.*{b}'
+        else:
+            pattern = f'(?i){a}[_ ]?\\d+'
+        signatures.append(DetectionSignature(
+            id=f'bench_{i}', pattern=pattern,
+            pattern_type=rng.choice(['column_name', 'column_name', 'column_value', 'file_name']),
+            confidence=0.8, priority=rng.randint(0, 3),
+            domain_code=rng.choice(['hcm', 'finance']),
+        ))
+    for sig in signatures:
+        sig.compile()
+    signatures.sort(key=lambda s: (s.priority, s.confidence), reverse=True)
+    return signatures
+
+
+def make_file(columns: int, rng: random.Random):
+    names = ['_'.join(rng.sample(WORDS, rng.randint(1, 3))) for _ in range(columns)]
+    values = {name: [f'{rng.choice(WORDS)}{rng.randint(0, 999)}' for _ in range(10)] for name in names}
+    return names, values
+
+
+def make_service(signatures, compiled: bool) -> DetectionService:
+    service = DetectionService()
+    service._signatures = signatures
+    service._signatures_loaded_at = datetime.now()
+    service._cache_ttl_seconds = 10 ** 9
+    service._reference_loaded = True
+    service._matcher = SignatureMatcher(signatures) if compiled else None
+    return service
+
+
+def time_detect(service, columns, values, runs):
+    timings, result = [], None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = service.detect(filename='UKG_Pro_Extract.xlsx', columns=columns, values=values)
+        timings.append((time.perf_counter() - start) * 1000)
+    return result, timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--signatures', type=int, default=500)
+    parser.add_argument('--columns', type=int, default=300)
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    signatures = make_signatures(args.signatures, rng)
+    columns, values = make_file(args.columns, rng)
+
+    start = time.perf_counter()
+    SignatureMatcher(signatures)
+    compile_ms = (time.perf_counter() - start) * 1000
+
+    loop_result, loop_ms = time_detect(make_service(signatures, compiled=False), columns, values, args.runs)
+    fast_result, fast_ms = time_detect(make_service(signatures, compiled=True), columns, values, args.runs)
+
+    identical = (
+        [m.to_dict() for m in loop_result.all_matches] == [m.to_dict() for m in fast_result.all_matches]
+    )
+
+    print(f"{args.signatures} signatures, {args.columns} columns x 10 values")
+    print(f"Matcher compile:   {compile_ms:.1f} ms")
+    print(f"detect (loop):     median {statistics.median(loop_ms):.1f} ms")
+    print(f"detect (compiled): median {statistics.median(fast_ms):.1f} ms")
+    print(f"Speedup:           {statistics.median(loop_ms) / max(statistics.median(fast_ms), 0.001):.1f}x")
+    print(f"Matches:           {len(fast_result.all_matches)} (identical: {identical})")
+
+
+if __name__ == "__main__":
+    main()
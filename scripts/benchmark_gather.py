@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Benchmark Concurrent Gather
+===========================
+Compares end-to-end truth gathering latency in IntelligenceEngineV2 with
+sequential and concurrent gathering, using stubbed gatherers whose latency
+is drawn from a long-tailed distribution (occasional slow ChromaDB/LLM calls).
+
+Usage:
+    python scripts/benchmark_gather.py [--questions 100] [--seed 42]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.utils.intelligence import engine as engine_module  # noqa: E402
+from backend.utils.intelligence.gather_scheduler import get_gather_stats, reset_gather_stats  # noqa: E402
+from backend.utils.intelligence.types import StorageType  # noqa: E402
+
+# (storage, typical seconds, tail seconds, tail probability)
+GATHERER_PROFILES = {
+    'reality': (StorageType.DUCKDB, 0.060, 0.400, 0.05),
+    'configuration': (StorageType.DUCKDB, 0.020, 0.150, 0.05),
+    'intent': (StorageType.CHROMADB, 0.080, 1.500, 0.05),
+    'reference': (StorageType.CHROMADB, 0.080, 1.500, 0.05),
+    'regulatory': (StorageType.CHROMADB, 0.080, 1.500, 0.05),
+    'compliance': (StorageType.CHROMADB, 0.080, 1.500, 0.05),
+}
+
+# Budgets for the benchmark (ms); library gatherers cut off before their tail
+BENCH_BUDGETS_MS = {'reality': 1000, 'configuration': 500, 'intent': 400,
+                    'reference': 400, 'regulatory': 400, 'compliance': 400}
+
+
+class StubGatherer:
+    def __init__(self, name, rng):
+        self.name = name
+        self.storage_type, self.typical, self.tail, self.tail_p = GATHERER_PROFILES[name]
+        self.rng = rng
+
+    def gather(self, question, context):
+        seconds = self.tail if self.rng.random() < self.tail_p else self.rng.uniform(0.5, 1.5) * self.typical
+        cancel_event = context.get('_cancel_event')
+        if cancel_event:
+            cancel_event.wait(seconds)
+        else:
+            time.sleep(seconds)
+        return [f'{self.name}-truth']
+
+
+def make_engine(rng):
+    engine = engine_module.IntelligenceEngineV2.__new__(engine_module.IntelligenceEngineV2)
+    engine._pending_clarification = None
+    for name in GATHERER_PROFILES:
+        setattr(engine, f'{name}_gatherer', StubGatherer(name, rng))
+    return engine
+
+
+def sequential(engine, question):
+    engine._gather_reality(question, {})
+    engine._gather_intent(question, {})
+    engine._gather_configuration(question, {})
+    engine._gather_reference_library(question, {})
+
+
+def concurrent(engine, question):
+    _, meta = engine._gather_truths_concurrently(question, {})
+    return meta['partial']
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--questions', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    # Isolate from router/citation/gap singletons - only gather latency is measured
+    engine_module.TRUTH_ROUTER_AVAILABLE = False
+    engine_module.CITATION_TRACKER_AVAILABLE = False
+    engine_module.GAP_DETECTOR_AVAILABLE = False
+    for name, budget in BENCH_BUDGETS_MS.items():
+        os.environ[f'INTELLIGENCE_GATHER_BUDGET_{name.upper()}_MS'] = str(budget)
+
+    results = {}
+    partial = 0
+    for label, run in (('sequential', sequential), ('concurrent', concurrent)):
+        engine = make_engine(random.Random(args.seed))
+        timings = []
+        for i in range(args.questions):
+            start = time.perf_counter()
+            if run(engine, f'question {i}'):
+                partial += 1
+            timings.append((time.perf_counter() - start) * 1000)
+        results[label] = timings
+
+    print(f"{args.questions} questions, 6 stubbed gatherers (5% slow tail)")
+    for label, timings in results.items():
+        print(f"{label:<11} p50 {statistics.median(timings):7.1f} ms   "
+              f"p95 {percentile(timings, 0.95):7.1f} ms   max {max(timings):7.1f} ms")
+    print(f"Partial answers (concurrent): {partial}/{args.questions}")
+    print("\nPer-gatherer (concurrent):")
+    for name, stats in get_gather_stats().items():
+        print(f"  {name:<14} p50<={stats['p50_ms']}ms p95<={stats['p95_ms']}ms "
+              f"ok={stats['ok']} timeout={stats['timeout']}")
+    reset_gather_stats()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Benchmark Lineage Closure Index
+===============================
+Builds a synthetic lineage graph shaped like production (file -> tables and
+chunks, table -> analyses -> findings -> tasks, chunks/tables cited by
+responses) with ~1M edges in a LineageStore, then compares descendant and
+ancestor lookups through the closure table with a recursive CTE over the
+edge table and with the single-hop fallback LineageModel used before.
+Also times incremental link inserts and file deletes.
+
+Usage:
+    python scripts/benchmark_lineage_closure.py [--edges 1000000] [--projects 20] [--queries 200] [--db :memory:]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import statistics
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Edges per file: 4 tables + 120 chunks + 8 analyses + 40 findings + 40 tasks + 30 responses x 5 citations
+EDGES_PER_FILE = 4 + 120 + 8 + 40 + 40 + 150
+
+RECURSIVE_SQL = """
+    WITH RECURSIVE walk(node, depth) AS (
+        SELECT :node, 0
+        UNION ALL
+        SELECT e.target, w.depth + 1 FROM walk w
+        JOIN lineage_edges e ON e.source = w.node AND e.project_id = :project
+        WHERE w.depth < :max_depth
+    )
+    SELECT s.node_type, s.node_key, t.node_type, t.node_key, e.relationship, min(w.depth) + 1 AS depth
+    FROM walk w
+    JOIN lineage_edges e ON e.source = w.node AND e.project_id = :project
+    JOIN lineage_nodes s ON s.node_id = e.source
+    JOIN lineage_nodes t ON t.node_id = e.target
+    GROUP BY e.source, e.target, e.relationship
+    ORDER BY depth
+"""
+
+
+def file_edges(project, f):
+    """Lineage edges for one uploaded file and everything derived from it."""
+    edges = []
+
+    def edge(st, si, tt, ti, rel):
+        edges.append({'project_id': project, 'source_type': st, 'source_id': si,
+                      'target_type': tt, 'target_id': ti, 'relationship': rel})
+
+    name = f"{project}_file{f}.xlsx"
+    tables = [f"{project}_f{f}_t{t}" for t in range(4)]
+    chunks = [f"{project}_f{f}_c{c}" for c in range(120)]
+    for t in tables:
+        edge('file', name, 'table', t, 'parsed')
+    for c in chunks:
+        edge('file', name, 'chunk', c, 'embedded')
+    for a in range(8):
+        analysis = f"{project}_f{f}_a{a}"
+        edge('table', tables[a % 4], 'analysis', analysis, 'analyzed')
+        for n in range(5):
+            finding = f"{analysis}_finding{n}"
+            edge('analysis', analysis, 'finding', finding, 'generated')
+            edge('finding', finding, 'task', f"{finding}_task", 'created')
+    for r in range(30):
+        response = f"{project}_f{f}_r{r}"
+        for k in range(5):
+            cited = chunks[(r * 5 + k) % 120] if k else tables[r % 4]
+            edge('chunk' if k else 'table', cited, 'response', response, 'cited')
+    return edges
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return statistics.median(samples), samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--edges', type=int, default=1_000_000)
+    parser.add_argument('--projects', type=int, default=20)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--db', default=':memory:')
+    args = parser.parse_args()
+
+    sys.path.insert(0, REPO_ROOT)
+    from utils.database.lineage_store import LineageStore
+
+    store = LineageStore(args.db)
+    files = max(1, args.edges // EDGES_PER_FILE)
+    projects = [f"proj{p}" for p in range(args.projects)]
+
+    start = time.perf_counter()
+    batch = []
+    for f in range(files):
+        batch.extend(file_edges(projects[f % len(projects)], f))
+        if len(batch) >= 100_000:
+            store.add_edges(batch)
+            batch = []
+    store.add_edges(batch)
+    counts = store.counts()
+    print(f"Loaded {counts['edges']:,} edges / {counts['nodes']:,} nodes in {time.perf_counter() - start:.1f}s "
+          f"(closure {counts['closure']:,} rows)\n")
+
+    rng = random.Random(11)
+    sample = [(projects[f % len(projects)], f) for f in rng.sample(range(files), min(args.queries, files))]
+    cases = {
+        'descendants(file)': lambda p, f: ('file', f"{p}_file{f}.xlsx", 'source'),
+        'ancestors(task)': lambda p, f: ('task', f"{p}_f{f}_a{f % 8}_finding{f % 5}_task", 'target'),
+        'ancestors(response)': lambda p, f: ('response', f"{p}_f{f}_r{f % 30}", 'target'),
+    }
+
+    print(f"{'lookup':<20} {'method':<11} {'edges':>7} {'p50 ms':>8} {'p95 ms':>8}")
+    for label, node_for in cases.items():
+        for method in ('closure', 'recursive', 'single-hop'):
+            if method == 'recursive' and label != 'descendants(file)':
+                continue
+            times, found = [], []
+            for project, f in sample:
+                node_type, node_id, side = node_for(project, f)
+                t = time.perf_counter()
+                if method == 'closure':
+                    lookup = store.descendants if side == 'source' else store.ancestors
+                    rows = lookup(node_type, node_id, project)
+                elif method == 'recursive':
+                    node = store._node_id(node_type, node_id)
+                    rows = store.conn.execute(RECURSIVE_SQL, {'node': node, 'project': project,
+                                                              'max_depth': 10}).fetchall()
+                else:
+                    node = store._node_id(node_type, node_id)
+                    rows = store.conn.execute(f"SELECT * FROM lineage_edges WHERE {side} = ? AND project_id = ?",
+                                              [node, project]).fetchall()
+                times.append((time.perf_counter() - t) * 1000)
+                found.append(len(rows))
+            p50, p95 = percentiles(times)
+            print(f"{label:<20} {method:<11} {statistics.mean(found):>7.0f} {p50:>8.1f} {p95:>8.1f}")
+
+    link_times, delete_times = [], []
+    for project, f in sample[:50]:
+        t = time.perf_counter()
+        store.add_edges([{'project_id': project, 'source_type': 'task', 'target_type': 'response',
+                          'source_id': f"{project}_f{f}_a0_finding0_task", 'target_id': f"{project}_f{f}_r0",
+                          'relationship': 'derived'}])
+        link_times.append((time.perf_counter() - t) * 1000)
+    for project, f in sample[50:100]:
+        t = time.perf_counter()
+        store.delete_edges('file', f"{project}_file{f}.xlsx", project)
+        delete_times.append((time.perf_counter() - t) * 1000)
+    print()
+    for label, times in (('add link', link_times), ('delete file edges', delete_times)):
+        if times:
+            p50, p95 = percentiles(times)
+            print(f"{label:<20} p50 {p50:.1f} ms  p95 {p95:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark PDF Page-Parallel OCR
+===============================
+Generates a scanned PDF (every page an image of text, no text layer) and
+times the legacy serial OCR fallback (text_extraction._extract_pdf, 100 dpi)
+against the page pipeline (utils.pdf_ocr) with 1 and N workers, cold and
+with the page hash cache warm. Needs the tesseract binary (and poppler for
+the legacy path).
+
+Usage:
+    python scripts/benchmark_pdf_ocr.py [--pages 200] [--workers 4] [--pdf existing.pdf]
+"""
+
+import io
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def make_scanned_pdf(path: str, pages: int):
+    """Letter pages of rendered text, inserted as images."""
+    import pymupdf
+    from PIL import Image, ImageDraw, ImageFont
+
+    try:
+        font = ImageFont.load_default(size=26)
+    except TypeError:
+        font = ImageFont.load_default()
+    doc = pymupdf.open()
+    for n in range(pages):
+        image = Image.new('L', (1275, 1650), color=255)  # 150 dpi letter
+        draw = ImageDraw.Draw(image)
+        draw.text((90, 80), f"Benefit Booklet - Section {n + 1}", fill=0, font=font)
+        for line in range(30):
+            draw.text((90, 150 + line * 46),
+                      f"Plan {n % 7} coverage tier {line % 4}: deductible ${(n * 37 + line * 11) % 5000:,} "
+                      f"copay ${(line * 5) % 60}", fill=0, font=font)
+        buffer = io.BytesIO()
+        image.save(buffer, format='PNG')
+        page = doc.new_page(width=612, height=792)
+        page.insert_image(page.rect, stream=buffer.getvalue())
+    doc.save(path)
+    doc.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--pages', type=int, default=200)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--pdf', help="benchmark an existing PDF instead of the generated fixture")
+    args = parser.parse_args()
+
+    sys.path.insert(0, REPO_ROOT)
+    from utils import pdf_ocr, text_extraction
+
+    if not pdf_ocr.ocr_available():
+        print("tesseract is not installed - nothing to benchmark")
+        return 1
+
+    workdir = tempfile.mkdtemp(prefix='xlr8_ocr_bench_')
+    try:
+        path = args.pdf
+        if not path:
+            path = os.path.join(workdir, 'scanned.pdf')
+            start = time.perf_counter()
+            make_scanned_pdf(path, args.pages)
+            print(f"Generated {args.pages}-page scanned PDF in {time.perf_counter() - start:.1f}s\n")
+
+        start = time.perf_counter()
+        legacy = text_extraction._extract_pdf(path, max_pages=args.pages)
+        print(f"{'legacy serial 100dpi':<26} {time.perf_counter() - start:8.1f}s   {len(legacy):>9} chars")
+
+        for workers in sorted({1, args.workers}):
+            pdf_ocr.CACHE_DIR = os.path.join(workdir, f'cache_{workers}')
+            for label in ('cold', 'cached'):
+                result = pdf_ocr.extract_pdf_pages(path, workers=workers)
+                report = result.report()
+                ocr_seconds = [p.seconds for p in result.pages if p.method == 'ocr']
+                per_page = f"{sum(ocr_seconds) / len(ocr_seconds):.2f}s/page" if ocr_seconds else '-'
+                print(f"{f'pipeline w={workers} {label}':<26} {report['seconds']:8.1f}s   {len(result.text):>9} chars   "
+                      f"{report['methods']}   conf {report['mean_ocr_confidence']}   {per_page}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark Product Registry Snapshot
+===================================
+Compares cold-process load time and memory of the product registry when
+parsing the schema JSON (XLR8_PRODUCT_SNAPSHOT=false) against loading the
+precompiled snapshot. Each run is a fresh interpreter: registry load, then
+vocabulary lookups for every product and one schema comparison. Memory is
+RSS growth over the first load and the bytes a loaded registry retains.
+
+Usage:
+    python scripts/benchmark_product_registry.py [--runs 5]
+"""
+
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+RUN_SCRIPT = '''
+import json, time, tracemalloc
+
+def rss_mb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * 4096 / (1024 * 1024)
+
+import backend.utils.products.registry as registry_module
+import backend.utils.products.snapshot  # noqa: F401 - module import cost is not load time
+from backend.utils.products import get_registry, get_vocabulary_normalizer, compare_schemas
+
+rss_before = rss_mb()
+start = time.perf_counter()
+registry = get_registry()
+registry.load()
+load_ms = (time.perf_counter() - start) * 1000
+rss_delta = rss_mb() - rss_before
+
+# Allocations measured on a second, traced load (tracemalloc skews timing)
+tracemalloc.start()
+traced_registry = registry_module.ProductRegistry()
+traced_registry.load()
+traced = tracemalloc.get_traced_memory()[0]
+tracemalloc.stop()
+
+start = time.perf_counter()
+normalizer = get_vocabulary_normalizer()
+for product_id in registry.products:
+    normalizer.denormalize("employee", product_id)
+    normalizer.get_hubs_for_entity("compensation", product_id)
+compare_schemas("workday_hcm", "adp_wfn")
+lookups_ms = (time.perf_counter() - start) * 1000
+
+print(json.dumps({
+    "load_ms": load_ms,
+    "lookups_ms": lookups_ms,
+    "retained_mb": traced / (1024 * 1024),
+    "rss_delta_mb": rss_delta,
+    "products": len(registry.products),
+}))
+'''
+
+
+def run(snapshot: bool) -> dict:
+    env = {**os.environ, 'XLR8_PRODUCT_SNAPSHOT': 'true' if snapshot else 'false'}
+    out = subprocess.run([sys.executable, '-c', RUN_SCRIPT], cwd=REPO_ROOT, env=env,
+                         capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    sys.path.insert(0, REPO_ROOT)
+    from backend.utils.products.registry import ProductRegistry
+    from backend.utils.products.snapshot import compile_snapshot
+
+    snapshot = compile_snapshot(ProductRegistry().config_dir)
+    print(f"Snapshot {snapshot.version}: {snapshot.path} ({os.path.getsize(snapshot.path) / 1024:.0f} KB)\n")
+
+    for label, use_snapshot in (('json', False), ('snapshot', True)):
+        results = [run(use_snapshot) for _ in range(args.runs)]
+        median = {key: statistics.median(r[key] for r in results) for key in results[0]}
+        print(f"{label:<9} {median['products']:.0f} products   load {median['load_ms']:6.1f} ms   "
+              f"lookups {median['lookups_ms']:6.1f} ms   retained {median['retained_mb']:5.1f} MB   "
+              f"RSS +{median['rss_delta_mb']:5.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
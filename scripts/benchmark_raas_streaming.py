@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Benchmark RaaS Streaming Execution
+==================================
+Starts a local stub RaaS server that serves a synthetic ExecuteReport
+response (base64 CSV, generated on the fly, sent chunked) and streams it
+into DuckDB with execute_report_to_duckdb, reporting throughput, peak RSS
+and the parser's peak buffer.
+
+Usage:
+    python scripts/benchmark_raas_streaming.py [--size-mb 500] [--in-memory-mb 0]
+
+--in-memory-mb N also runs the old execute_report path on an N MB report
+for a memory comparison (keep it small - that path holds it all).
+"""
+
+import os
+import sys
+import time
+import base64
+import asyncio
+import argparse
+import resource
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import duckdb
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.services.ukg_pro_raas import UKGProRaaSClient, UKGCredentials  # noqa: E402
+
+HEADER = b'EmployeeNumber,FirstName,LastName,CompanyCode,PayDate,EarningCode,Hours,Amount,Notes\n'
+PREFIX = (b'<?xml version="1.0" encoding="utf-8"?>'
+          b'<s:Envelope xmlns:s="http://schemas.xmlsoap.org/soap/envelope/"><s:Body>'
+          b'<ExecuteReportResponse xmlns="http://www.ultipro.com/dataservices/bidata/2"><ReportStream>')
+SUFFIX = b'</ReportStream></ExecuteReportResponse></s:Body></s:Envelope>'
+
+
+def csv_blocks(size_bytes: int, rows_per_block: int = 5000):
+    """Synthetic pay history CSV, in blocks, until roughly size_bytes of CSV."""
+    yield HEADER
+    produced, i = len(HEADER), 0
+    while produced < size_bytes:
+        lines = []
+        for _ in range(rows_per_block):
+            lines.append(f'E{i % 250000:06d},First{i % 977},Last{i % 1499},C{i % 8},'
+                         f'20{10 + i % 15}-{1 + i % 12:02d}-15,REG,{80 + i % 9}.00,{1000 + i % 5000}.25,'
+                         f'"adj, {i % 31}"\n')
+            i += 1
+        block = ''.join(lines).encode()
+        produced += len(block)
+        yield block
+
+
+def report_chunks(size_bytes: int):
+    """SOAP envelope with the CSV base64 encoded on the fly."""
+    yield PREFIX
+    carry = b''
+    for block in csv_blocks(size_bytes):
+        data = carry + block
+        usable = len(data) // 3 * 3
+        carry = data[usable:]
+        yield base64.b64encode(data[:usable])
+    if carry:
+        yield base64.b64encode(carry)
+    yield SUFFIX
+
+
+def start_stub_server(size_bytes: int) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/xml; charset=utf-8')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            for chunk in report_chunks(size_bytes):
+                self.wfile.write(f'{len(chunk):x}\r\n'.encode() + chunk + b'\r\n')
+            self.wfile.write(b'0\r\n\r\n')
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def run_streaming(url: str, db_path: str):
+    client = UKGProRaaSClient(UKGCredentials(url, 'key', 'ws', 'user', 'pw'))
+    conn = duckdb.connect(db_path)
+    last = [time.perf_counter()]
+
+    def progress(rows, received):
+        if time.perf_counter() - last[0] >= 5:
+            last[0] = time.perf_counter()
+            print(f"  ... {rows:,} rows, {received / 1024 / 1024:.0f} MB received, peak RSS {peak_rss_mb():.0f} MB")
+
+    try:
+        start = time.perf_counter()
+        result = await client.execute_report_to_duckdb('/content/bench', conn, 'bench_report',
+                                                       progress_callback=progress)
+        elapsed = time.perf_counter() - start
+        count = conn.execute('SELECT COUNT(*) FROM bench_report').fetchone()[0] if result.success else 0
+    finally:
+        await client.close()
+        conn.close()
+    return result, elapsed, count
+
+
+async def run_in_memory(url: str):
+    client = UKGProRaaSClient(UKGCredentials(url, 'key', 'ws', 'user', 'pw'))
+    try:
+        start = time.perf_counter()
+        result = await client.execute_report('/content/bench')
+        return result, time.perf_counter() - start
+    finally:
+        await client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--size-mb', type=int, default=500)
+    parser.add_argument('--in-memory-mb', type=int, default=0)
+    args = parser.parse_args()
+
+    baseline_rss = peak_rss_mb()
+    server = start_stub_server(args.size_mb * 1024 * 1024)
+    url = f'http://127.0.0.1:{server.server_address[1]}'
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"Streaming {args.size_mb} MB synthetic report (CSV size, base64 in SOAP) into DuckDB...")
+        result, elapsed, count = asyncio.run(run_streaming(url, os.path.join(tmp, 'bench.duckdb')))
+    server.shutdown()
+
+    if not result.success:
+        print(f"FAILED: {result.error}")
+        return
+    print(f"\nRows:              {result.row_count:,} (table count {count:,})")
+    print(f"Received:          {result.bytes_received / 1024 / 1024:.0f} MB in {elapsed:.1f}s "
+          f"({result.bytes_received / 1024 / 1024 / elapsed:.0f} MB/s, {result.row_count / elapsed:,.0f} rows/s)")
+    print(f"Parser peak buffer {result.peak_buffer_bytes / 1024 / 1024:.1f} MB")
+    print(f"Peak RSS:          {peak_rss_mb():.0f} MB (process baseline {baseline_rss:.0f} MB)")
+
+    if args.in_memory_mb:
+        server = start_stub_server(args.in_memory_mb * 1024 * 1024)
+        rss_before = peak_rss_mb()
+        mem_result, mem_elapsed = asyncio.run(run_in_memory(f'http://127.0.0.1:{server.server_address[1]}'))
+        server.shutdown()
+        print(f"\nIn-memory execute_report on {args.in_memory_mb} MB: {mem_result.row_count:,} rows "
+              f"in {mem_elapsed:.1f}s, peak RSS {peak_rss_mb():.0f} MB (was {rss_before:.0f} MB)")
+
+
+if __name__ == "__main__":
+    main()
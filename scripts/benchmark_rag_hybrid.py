@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Benchmark Hybrid RAG Search
+===========================
+Builds an in-memory Chroma collection of synthetic configuration and
+policy chunks (earning codes, GL accounts, section numbers, prose) and
+compares vector-only search with hybrid BM25 + vector search on recall@k
+and latency. Embeddings come from a stub: a hashed bag of words with
+digits dropped (so "REG01" and "REG02" look alike, as they do to dense
+embedders) plus a fixed delay standing in for the Ollama round trip.
+
+Usage:
+    python scripts/benchmark_rag_hybrid.py [--chunks 5000] [--queries 300] [--k 5] [--embed-ms 40]
+"""
+
+import os
+import re
+import sys
+import time
+import uuid
+import random
+import hashlib
+import argparse
+import statistics
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TOPICS = ['regular pay', 'overtime', 'holiday pay', 'shift differential', 'bonus', 'commission',
+          'medical deduction', 'dental deduction', '401k match', 'HSA contribution', 'tuition reimbursement',
+          'paid time off', 'jury duty', 'bereavement leave', 'on-call pay']
+GROUPS = ['hourly', 'salaried', 'union', 'seasonal', 'executive', 'part-time']
+
+
+def stub_embedding(text, dims=128):
+    vector = [0.0] * dims
+    for word in re.findall(r'[a-z]+', text.lower()):
+        vector[int(hashlib.md5(word.encode()).hexdigest(), 16) % dims] += 1.0
+    norm = sum(v * v for v in vector) ** 0.5 or 1.0
+    return [v / norm for v in vector]
+
+
+def make_corpus(n, rng):
+    """(id, text, query, kind) - each chunk is the single relevant answer to its query."""
+    corpus = []
+    for i in range(n):
+        topic, group = TOPICS[i % len(TOPICS)], GROUPS[(i // len(TOPICS)) % len(GROUPS)]
+        kind = ('earning', 'gl', 'section', 'prose')[i % 4]
+        if kind == 'earning':
+            code = f"{topic[:3].upper()}{i:04d}"
+            text = f"Earning code {code} pays {topic} for {group} employees at the standard rate."
+            query = code if rng.random() < 0.5 else f"what is earning code {code} used for"
+        elif kind == 'gl':
+            account = f"{6000 + i % 900}-{i:05d}"
+            text = f"GL account {account} books employer {topic} expense for {group} staff."
+            query = f"GL {account}" if rng.random() < 0.5 else f"which expense posts to account {account}"
+        elif kind == 'section':
+            section = f"{i % 9 + 1}.{i % 7 + 1}.{i}"
+            text = f"Section {section} of the handbook covers {topic} rules for {group} employees."
+            query = f"section {section}"
+        else:
+            text = f"Policy {i}: {group} employees earn {topic} according to tenure band {i % 5} and location."
+            query = f"how do {group} employees earn {topic} by tenure band {i % 5}"
+        corpus.append((f"chunk_{i}", text, query, kind))
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--chunks', type=int, default=5000)
+    parser.add_argument('--queries', type=int, default=300)
+    parser.add_argument('--k', type=int, default=5)
+    parser.add_argument('--embed-ms', type=float, default=40.0, help="simulated embedding latency")
+    args = parser.parse_args()
+
+    sys.path.insert(0, REPO_ROOT)
+    import chromadb
+    from utils.lexical_index import LexicalIndex
+    from utils.rag_handler import RAGHandler
+
+    rng = random.Random(7)
+    corpus = make_corpus(args.chunks, rng)
+
+    rag = RAGHandler.__new__(RAGHandler)
+    rag.client = chromadb.EphemeralClient()
+    rag.lexical_index = LexicalIndex()
+    rag.ollama_base_url = 'stub'
+
+    def get_embedding(text):
+        time.sleep(args.embed_ms / 1000)
+        return stub_embedding(text)
+
+    rag.get_embedding = get_embedding
+    name = f"bench-{uuid.uuid4().hex[:8]}"
+    collection = rag.client.get_or_create_collection(name, metadata={"hnsw:space": "cosine"})
+    start = time.perf_counter()
+    for offset in range(0, len(corpus), 500):
+        batch = corpus[offset:offset + 500]
+        collection.add(ids=[c[0] for c in batch], documents=[c[1] for c in batch],
+                       embeddings=[stub_embedding(c[1]) for c in batch])
+    chroma_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    for offset in range(0, len(corpus), 500):
+        batch = corpus[offset:offset + 500]
+        rag.lexical_index.add(name, [c[0] for c in batch], [c[1] for c in batch])
+    print(f"Indexed {len(corpus)} chunks: chroma {chroma_seconds:.1f}s, lexical {time.perf_counter() - start:.1f}s\n")
+
+    queries = rng.sample(corpus, min(args.queries, len(corpus)))
+    print(f"{'mode':<8} {'kind':<9} {'recall@' + str(args.k):>9} {'p50 ms':>8} {'p95 ms':>8}")
+    for mode in ('vector', 'hybrid'):
+        by_kind = {}
+        for chunk_id, _, query, kind in queries:
+            t = time.perf_counter()
+            results = rag.search(name, query, n_results=args.k, mode=mode)
+            elapsed = (time.perf_counter() - t) * 1000
+            hit = chunk_id in [r.get('id') for r in results]
+            by_kind.setdefault(kind, []).append((hit, elapsed))
+            by_kind.setdefault('all', []).append((hit, elapsed))
+        for kind in ('earning', 'gl', 'section', 'prose', 'all'):
+            rows = by_kind.get(kind)
+            if not rows:
+                continue
+            latencies = sorted(ms for _, ms in rows)
+            recall = sum(hit for hit, _ in rows) / len(rows)
+            p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+            print(f"{mode:<8} {kind:<9} {recall:>9.2f} {statistics.median(latencies):>8.1f} {p95:>8.1f}")
+    rag.client.delete_collection(name)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
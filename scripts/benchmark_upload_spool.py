@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark Upload Spooling
+=========================
+Runs N concurrent uploads of an M-MB file through the legacy path
+(await file.read(), hash in memory, write) and through spool_upload
+(chunked copy with incremental SHA-256), each mode in its own process so
+peak RSS is comparable. Uploads are Starlette UploadFiles over on-disk
+temp files, the way the multipart parser hands them to smart_upload.
+
+Usage:
+    python scripts/benchmark_upload_spool.py [--uploads 10] [--size-mb 500] [--modes legacy,spool]
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import asyncio
+import hashlib
+import argparse
+import resource
+import tempfile
+import subprocess
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+async def legacy_save(file, filename):
+    """The pre-spool smart_upload body."""
+    content = await file.read()
+    file_hash = hashlib.sha256(content).hexdigest()
+    temp_dir = tempfile.mkdtemp()
+    with open(os.path.join(temp_dir, filename), 'wb') as f:
+        f.write(content)
+    shutil.rmtree(temp_dir, ignore_errors=True)
+    return len(content), file_hash
+
+
+async def spool_save(file, filename):
+    from backend.utils.upload_spool import spool_upload
+    upload = await spool_upload(file, filename)
+    upload.cleanup()
+    return upload.size, upload.sha256
+
+
+def run_mode(mode, source, uploads):
+    """Child process: N concurrent saves, report throughput and peak RSS."""
+    from starlette.datastructures import UploadFile
+
+    save = legacy_save if mode == 'legacy' else spool_save
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    async def one(i):
+        with open(source, 'rb') as handle:
+            return await save(UploadFile(handle, filename=f'register_{i}.xlsx'), f'register_{i}.xlsx')
+
+    async def run_all():
+        return await asyncio.gather(*(one(i) for i in range(uploads)))
+
+    start = time.perf_counter()
+    results = asyncio.run(run_all())
+    seconds = time.perf_counter() - start
+    total = sum(size for size, _ in results)
+    print(json.dumps({
+        'mode': mode, 'seconds': round(seconds, 2), 'mb_per_sec': round(total / seconds / 1e6, 1),
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024),
+        'rss_growth_mb': round((resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline) / 1024),
+        'hashes_agree': len({digest for _, digest in results}) == 1,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--uploads', type=int, default=10)
+    parser.add_argument('--size-mb', type=int, default=500)
+    parser.add_argument('--modes', default='legacy,spool')
+    parser.add_argument('--child', nargs=2, metavar=('MODE', 'SOURCE'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    sys.path.insert(0, REPO_ROOT)
+    if args.child:
+        run_mode(args.child[0], args.child[1], args.uploads)
+        return 0
+
+    workdir = tempfile.mkdtemp(prefix='xlr8_upload_bench_')
+    try:
+        source = os.path.join(workdir, 'register.bin')
+        block = os.urandom(1024 * 1024)
+        with open(source, 'wb') as f:
+            for _ in range(args.size_mb):
+                f.write(block)
+        print(f"{args.uploads} concurrent uploads x {args.size_mb} MB\n")
+        print(f"{'mode':<8} {'seconds':>8} {'MB/s':>8} {'peak RSS MB':>12} {'RSS growth MB':>14}")
+        for mode in args.modes.split(','):
+            proc = subprocess.run([sys.executable, os.path.abspath(__file__), '--uploads', str(args.uploads),
+                                   '--child', mode, source], capture_output=True, text=True)
+            lines = [l for l in proc.stdout.splitlines() if l.startswith('{')]
+            if proc.returncode != 0 or not lines:
+                print(f"{mode:<8} failed (exit {proc.returncode}) {proc.stderr.strip().splitlines()[-1:]}")
+                continue
+            r = json.loads(lines[-1])
+            print(f"{mode:<8} {r['seconds']:>8} {r['mb_per_sec']:>8} {r['peak_rss_mb']:>12} {r['rss_growth_mb']:>14}"
+                  f"{'' if r['hashes_agree'] else '   HASH MISMATCH'}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
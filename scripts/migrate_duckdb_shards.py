@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Migrate DuckDB to Per-Project Shards
+====================================
+Moves every project table (name starting with the 8-hex-char project
+prefix) out of the single structured_data.duckdb into its project's shard
+file, <shard dir>/<key>.duckdb, verifying row counts before dropping the
+original. Shared metadata tables (_schema_metadata, _column_profiles, ...)
+and tables without a project prefix stay in the main file.
+
+Run it with the app stopped, then start the app with
+XLR8_DUCKDB_SHARDING=project. Tables moved are copied then dropped one at
+a time, so an interrupted run can simply be repeated. DuckDB doesn't
+shrink a file when tables are dropped: --compact rewrites the main file
+afterwards (the original is kept as <db>.pre-compact).
+
+--reverse moves shard tables back into the main file and removes the
+shard files (rollback to single-file mode).
+
+Usage:
+    python scripts/migrate_duckdb_shards.py [--db /data/structured_data.duckdb] [--shard-dir DIR]
+                                            [--dry-run] [--compact] [--reverse]
+"""
+
+import os
+import sys
+import time
+import argparse
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+import duckdb
+
+from utils.duckdb_shards import ShardManager, shard_catalog, shard_key_for_table
+
+
+def _quote(identifier: str) -> str:
+    return '"' + str(identifier).replace('"', '""') + '"'
+
+
+def _mb(path: str) -> float:
+    return sum(os.path.getsize(p) for p in (path, f"{path}.wal") if os.path.exists(p)) / 1e6
+
+
+def _count(conn, catalog: str, table: str) -> int:
+    return conn.execute(f"SELECT COUNT(*) FROM {catalog}.main.{_quote(table)}").fetchone()[0]
+
+
+def _tables(conn, catalog: str):
+    return [r[0] for r in conn.execute(
+        "SELECT table_name FROM duckdb_tables() WHERE database_name = ? AND schema_name = 'main' "
+        "AND NOT internal ORDER BY table_name", [catalog]).fetchall()]
+
+
+def _move(conn, table: str, source: str, target: str) -> int:
+    """Copy a table between catalogs, verify the row count, drop the source."""
+    q = _quote(table)
+    # DuckDB transactions write to one database, so copy and drop commit separately;
+    # a rerun after an interruption replaces the partial copy from the source
+    conn.execute(f"DROP TABLE IF EXISTS {target}.main.{q}")
+    conn.execute(f"CREATE TABLE {target}.main.{q} AS SELECT * FROM {source}.main.{q}")
+    rows, copied = _count(conn, source, table), _count(conn, target, table)
+    if rows != copied:
+        raise RuntimeError(f"{table}: copied {copied} of {rows} rows, source kept")
+    conn.execute(f"DROP TABLE {source}.main.{q}")
+    return rows
+
+
+def plan_shards(conn, main: str):
+    plan = {}
+    for table in _tables(conn, main):
+        key = shard_key_for_table(table)
+        if key:
+            plan.setdefault(key, []).append(table)
+    return plan
+
+
+def migrate(conn, main: str, shards: ShardManager, dry_run: bool) -> int:
+    plan = plan_shards(conn, main)
+    shared = [t for t in _tables(conn, main) if not shard_key_for_table(t)]
+    print(f"{sum(len(t) for t in plan.values())} project tables in {len(plan)} shards; "
+          f"{len(shared)} shared tables stay in the main file")
+    moved = 0
+    for key, tables in sorted(plan.items()):
+        if dry_run:
+            rows = sum(_count(conn, main, t) for t in tables)
+            print(f"  {key}: {len(tables)} tables, {rows:,} rows -> {shards.path_for(key)}")
+            continue
+        catalog = shard_catalog(key)
+        start = time.perf_counter()
+        conn.execute(f"ATTACH '{shards.path_for(key)}' AS {catalog}")
+        try:
+            rows = sum(_move(conn, table, main, catalog) for table in tables)
+        finally:
+            conn.execute(f"DETACH {catalog}")
+        moved += len(tables)
+        print(f"  {key}: {len(tables)} tables, {rows:,} rows ({time.perf_counter() - start:.1f}s, "
+              f"{_mb(shards.path_for(key)):.1f} MB)")
+    if not dry_run:
+        conn.execute("CHECKPOINT")
+    return moved
+
+
+def reverse(conn, main: str, shards: ShardManager, dry_run: bool) -> int:
+    moved = 0
+    for key in shards.known_shards:
+        catalog = shard_catalog(key)
+        conn.execute(f"ATTACH '{shards.path_for(key)}' AS {catalog}")
+        try:
+            tables = _tables(conn, catalog)
+            if dry_run:
+                print(f"  {key}: {len(tables)} tables -> main")
+                continue
+            rows = sum(_move(conn, table, catalog, main) for table in tables)
+        finally:
+            conn.execute(f"DETACH {catalog}")
+        for leftover in (shards.path_for(key), f"{shards.path_for(key)}.wal"):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+        moved += len(tables)
+        print(f"  {key}: {len(tables)} tables, {rows:,} rows back in the main file")
+    if not dry_run:
+        conn.execute("CHECKPOINT")
+    return moved
+
+
+def compact(db_path: str) -> None:
+    """Rewrite the main file without the space dropped tables left behind."""
+    compacted, backup = f"{db_path}.compacting", f"{db_path}.pre-compact"
+    for stale in (compacted, f"{compacted}.wal"):
+        if os.path.exists(stale):
+            os.remove(stale)
+    before = _mb(db_path)
+    conn = duckdb.connect(db_path)
+    main = conn.execute("SELECT current_database()").fetchone()[0]
+    conn.execute(f"ATTACH '{compacted}' AS compacted")
+    conn.execute(f"COPY FROM DATABASE {main} TO compacted")
+    conn.execute("DETACH compacted")
+    conn.close()
+    os.replace(db_path, backup)
+    if os.path.exists(f"{db_path}.wal"):
+        os.replace(f"{db_path}.wal", f"{backup}.wal")
+    os.replace(compacted, db_path)
+    print(f"Compacted {db_path}: {before:.1f} MB -> {_mb(db_path):.1f} MB (original kept as {backup})")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--db', default=os.getenv('DUCKDB_PATH', '/data/structured_data.duckdb'))
+    parser.add_argument('--shard-dir', default=os.getenv('XLR8_DUCKDB_SHARD_DIR') or None)
+    parser.add_argument('--dry-run', action='store_true', help='show what would move')
+    parser.add_argument('--compact', action='store_true', help='rewrite the main file afterwards')
+    parser.add_argument('--reverse', action='store_true', help='move shard tables back into the main file')
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.db):
+        print(f"No database at {args.db}", file=sys.stderr)
+        return 1
+    shards = ShardManager(args.db, args.shard_dir)
+    print(f"Main file {args.db} ({_mb(args.db):.1f} MB), shards in {shards.shard_dir}")
+
+    conn = duckdb.connect(args.db)
+    try:
+        main_catalog = conn.execute("SELECT current_database()").fetchone()[0]
+        moved = (reverse if args.reverse else migrate)(conn, main_catalog, shards, args.dry_run)
+    finally:
+        conn.close()
+    if args.dry_run:
+        return 0
+    print(f"Moved {moved} tables")
+    if args.compact:
+        compact(args.db)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Project Snapshots from the Command Line
+=======================================
+Snapshot, list, verify, restore and delete project snapshots
+(utils/project_snapshots.py) without the app - for moving a project
+between environments: snapshot it here, copy <snapshot dir>/<project>/ to
+the other host's snapshot dir, restore it there.
+
+Run it with the app stopped (DuckDB allows one writing process per file).
+Sharding follows XLR8_DUCKDB_SHARDING like the app does. Restoring into
+another environment needs the same encryption key, since encrypted
+columns are exported as stored.
+
+Usage:
+    python scripts/project_snapshot.py create  PROJECT [--note TEXT]
+    python scripts/project_snapshot.py list    PROJECT
+    python scripts/project_snapshot.py verify  PROJECT SNAPSHOT_ID
+    python scripts/project_snapshot.py restore PROJECT SNAPSHOT_ID [--no-verify]
+    python scripts/project_snapshot.py delete  PROJECT SNAPSHOT_ID
+        [--db /data/structured_data.duckdb] [--snapshot-dir DIR]
+"""
+
+import os
+import sys
+import argparse
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+
+def _mb(n: int) -> str:
+    return f"{n / 1e6:,.1f} MB"
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('command', choices=['create', 'list', 'verify', 'restore', 'delete'])
+    parser.add_argument('project')
+    parser.add_argument('snapshot_id', nargs='?')
+    parser.add_argument('--db', default=os.getenv('DUCKDB_PATH', '/data/structured_data.duckdb'))
+    parser.add_argument('--snapshot-dir', default=None, help='default: XLR8_SNAPSHOT_DIR or snapshots/ next to --db')
+    parser.add_argument('--note', default=None, help='stored in the manifest (create)')
+    parser.add_argument('--no-verify', action='store_true', help='skip the checksums (restore)')
+    args = parser.parse_args(argv)
+
+    if args.command not in ('create', 'list') and not args.snapshot_id:
+        parser.error(f"{args.command} needs a SNAPSHOT_ID")
+    if not os.path.exists(args.db):
+        print(f"No database at {args.db}", file=sys.stderr)
+        return 1
+
+    from utils.structured_data_handler import StructuredDataHandler
+    from utils.project_snapshots import ProjectSnapshots
+
+    handler = StructuredDataHandler(args.db)
+    snapshots = ProjectSnapshots(handler, root=args.snapshot_dir)
+    try:
+        if args.command == 'create':
+            manifest = snapshots.create(args.project, note=args.note)
+            totals = manifest['totals']
+            print(f"Snapshot {manifest['snapshot_id']}: {totals['tables']} tables "
+                  f"({totals['tables_reused']} unchanged), {totals['rows']:,} rows, {_mb(totals['bytes'])} "
+                  f"({_mb(totals['bytes_written'])} written) in {manifest['elapsed_ms'] / 1000:.1f}s")
+            print(f"  {os.path.join(snapshots.project_dir(args.project), manifest['snapshot_id'])}")
+        elif args.command == 'list':
+            for s in snapshots.list(args.project):
+                totals = s.get('totals') or {}
+                print(f"  {s['snapshot_id']}  {totals.get('tables', 0):>4} tables  "
+                      f"{totals.get('rows', 0):>14,} rows  {_mb(totals.get('bytes', 0)):>12}  {s.get('note') or ''}")
+        elif args.command == 'verify':
+            manifest = snapshots.verify(args.project, args.snapshot_id)
+            print(f"Snapshot {args.snapshot_id}: "
+                  f"{len(manifest['tables']) + len(manifest['metadata'])} files match the manifest")
+        elif args.command == 'restore':
+            result = snapshots.restore(args.project, args.snapshot_id, verify=not args.no_verify)
+            print(f"Restored {len(result['tables_restored'])} tables ({len(result['tables_dropped'])} replaced), "
+                  f"{result['rows']:,} rows, {_mb(result['bytes'])} in {result['elapsed_ms'] / 1000:.1f}s")
+        else:
+            result = snapshots.delete(args.project, args.snapshot_id)
+            print(f"Deleted {args.snapshot_id}: {len(result['objects_removed'])} table files, "
+                  f"{_mb(result['bytes_freed'])} freed")
+    except (FileNotFoundError, ValueError) as e:
+        print(str(e), file=sys.stderr)
+        return 1
+    finally:
+        handler.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
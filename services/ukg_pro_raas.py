@@ -8,23 +8,42 @@ Handles:
 - Report parameter retrieval
 - Report execution
 - CSV/XML parsing
+- Streaming execution straight into DuckDB (bounded memory, for large reports)
 
 Deploy to: backend/services/ukg_pro_raas.py
 """
 
 import os
+import re
 import csv
 import io
+import asyncio
 import base64
+import binascii
+import codecs
+import inspect
 import logging
+import contextlib
 import httpx
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, List, Optional, Any, Tuple, Callable
 from datetime import datetime, timedelta
 from dataclasses import dataclass
 import xml.etree.ElementTree as ET
+from xml.parsers import expat
 
 logger = logging.getLogger(__name__)
 
+# Column sketches of streamed reports are built batch by batch and merged
+try:
+    from utils.column_sketches import ENABLED as SKETCHES_ENABLED, SketchBuilder, SketchStore
+except ImportError:
+    SKETCHES_ENABLED, SketchBuilder, SketchStore = False, None, None
+
+# Streaming execution defaults: rows per DuckDB insert, and the ceiling on
+# decoded-but-unwritten report data held in memory at once
+DEFAULT_STREAM_BATCH_ROWS = int(os.getenv('RAAS_STREAM_BATCH_ROWS', '10000'))
+DEFAULT_STREAM_MAX_BUFFER_BYTES = int(os.getenv('RAAS_STREAM_MAX_BUFFER_MB', '32')) * 1024 * 1024
+
 
 # =============================================================================
 # DATA CLASSES
@@ -73,6 +92,10 @@ class ExecutionResult:
     raw_content: str = None
     error: str = None
     execution_time_ms: int = 0
+    # Streaming execution only (data stays None - rows go straight to DuckDB)
+    table_name: str = None
+    bytes_received: int = 0
+    peak_buffer_bytes: int = 0
 
 
 # =============================================================================
@@ -147,17 +170,19 @@ class UKGProRaaSClient:
     </soap:Body>
 </soap:Envelope>"""
     
-    async def _soap_request(self, action: str, body: str) -> Tuple[bool, str]:
-        """Make a SOAP request to the RaaS endpoint."""
-        url = f"{self.base_url}{self.RAAS_WSDL}"
-        
-        headers = {
+    def _soap_headers(self, action: str) -> Dict[str, str]:
+        """HTTP headers for a SOAP action."""
+        return {
             'Content-Type': 'text/xml; charset=utf-8',
             'SOAPAction': f'"http://www.ultipro.com/dataservices/bidata/2/IBIDataService/{action}"',
             'Authorization': self._get_auth_header(),
             'US-Customer-Api-Key': self.credentials.customer_api_key,
         }
-        
+    
+    async def _soap_request(self, action: str, body: str) -> Tuple[bool, str]:
+        """Make a SOAP request to the RaaS endpoint."""
+        url = f"{self.base_url}{self.RAAS_WSDL}"
+        headers = self._soap_headers(action)
         envelope = self._build_soap_envelope(body)
         
         try:
@@ -389,6 +414,27 @@ class UKGProRaaSClient:
         """
         start_time = datetime.now()
         
+        body = self._build_execute_body(report_path, parameters, output_format)
+        success, response = await self._soap_request("ExecuteReport", body)
+        
+        execution_time = int((datetime.now() - start_time).total_seconds() * 1000)
+        
+        if not success:
+            return ExecutionResult(
+                success=False,
+                error=response,
+                execution_time_ms=execution_time
+            )
+        
+        # Parse the response based on format
+        if output_format == "csv":
+            return self._parse_csv_response(response, execution_time)
+        else:
+            return self._parse_xml_response(response, execution_time)
+    
+    def _build_execute_body(self, report_path: str, parameters: Optional[Dict[str, Any]],
+                            output_format: str) -> str:
+        """Build the ExecuteReport request body."""
         # Build parameters XML
         params_xml = ""
         if parameters:
@@ -402,7 +448,7 @@ class UKGProRaaSClient:
         # Determine delimiter for output
         delimiter = "," if output_format == "csv" else ""
         
-        body = f"""<ns:ExecuteReport>
+        return f"""<ns:ExecuteReport>
             <ns:request>
                 <ns:ReportPath>{report_path}</ns:ReportPath>
                 <ns:ReportParameters>{params_xml}
@@ -410,23 +456,144 @@ class UKGProRaaSClient:
                 <ns:Delimiter>{delimiter}</ns:Delimiter>
             </ns:request>
         </ns:ExecuteReport>"""
+    
+    async def execute_report_to_duckdb(
+        self,
+        report_path: str,
+        conn,
+        table_name: str,
+        parameters: Dict[str, Any] = None,
+        batch_rows: int = DEFAULT_STREAM_BATCH_ROWS,
+        max_buffer_bytes: int = DEFAULT_STREAM_MAX_BUFFER_BYTES,
+        progress_callback: Optional[Callable[[int, int], Any]] = None,
+        lock=None,
+        project: Optional[str] = None
+    ) -> ExecutionResult:
+        """
+        Execute a CSV report and stream its rows into a DuckDB table.
         
-        success, response = await self._soap_request("ExecuteReport", body)
+        Unlike execute_report, the SOAP response is never held in memory:
+        it is parsed as it arrives, the embedded (optionally base64) CSV is
+        decoded incrementally, and records are inserted in batches. Decoded
+        but unwritten data is kept under max_buffer_bytes.
         
-        execution_time = int((datetime.now() - start_time).total_seconds() * 1000)
+        Rows land in a staging table that replaces table_name only once the
+        whole report has been read, so a failed run leaves the old table intact.
+        DuckDB writes (and waits on lock) run in a worker thread, off the event loop.
         
-        if not success:
-            return ExecutionResult(
-                success=False,
-                error=response,
-                execution_time_ms=execution_time
-            )
+        Args:
+            report_path: Full path to the report
+            conn: DuckDB connection to write to
+            table_name: Target table (created or replaced, all TEXT columns)
+            parameters: Dict of parameter name -> value
+            batch_rows: Rows per insert
+            max_buffer_bytes: Memory ceiling for buffered report data
+            progress_callback: Called (or awaited) with (rows_written, bytes_received)
+                after each batch
+            lock: Optional lock held around each DuckDB write
+            project: Project the table belongs to (recorded with its column sketches)
+            
+        Returns:
+            ExecutionResult with row_count, columns and table_name (data is None)
+        """
+        start_time = datetime.now()
+        url = f"{self.base_url}{self.RAAS_WSDL}"
+        envelope = self._build_soap_envelope(self._build_execute_body(report_path, parameters, "csv"))
         
-        # Parse the response based on format
-        if output_format == "csv":
-            return self._parse_csv_response(response, execution_time)
-        else:
-            return self._parse_xml_response(response, execution_time)
+        parser = _StreamingReportParser(max_buffer_bytes)
+        writer = _DuckDBBatchWriter(conn, table_name, lock, project)
+        batch: List[List[str]] = []
+        batch_bytes = 0
+        bytes_received = 0
+        peak_buffer = 0
+        
+        def elapsed() -> int:
+            return int((datetime.now() - start_time).total_seconds() * 1000)
+        
+        async def flush():
+            nonlocal batch, batch_bytes
+            if batch:
+                await asyncio.to_thread(writer.write, batch)
+                batch, batch_bytes = [], 0
+                if progress_callback:
+                    outcome = progress_callback(writer.row_count, bytes_received)
+                    if inspect.isawaitable(outcome):
+                        await outcome
+        
+        async def add_records():
+            nonlocal batch_bytes, peak_buffer
+            records, chars = parser.take_records()
+            if records and writer.columns is None:
+                await asyncio.to_thread(writer.begin, records[0])
+                records = records[1:]
+            if not records:
+                return
+            # Rough in-memory size: the CSV text plus per-field object overhead
+            per_record = (chars + 64 * len(records) * len(writer.columns)) // len(records)
+            while records:
+                taken = records[:batch_rows - len(batch)]
+                records = records[len(taken):]
+                batch.extend(taken)
+                batch_bytes += per_record * len(taken)
+                peak_buffer = max(peak_buffer, batch_bytes + parser.buffered_bytes)
+                if len(batch) >= batch_rows or batch_bytes >= max_buffer_bytes // 2:
+                    await flush()
+        
+        try:
+            logger.info(f"[RAAS] POST {url} Action=ExecuteReport (streaming to {table_name})")
+            async with self.client.stream("POST", url, content=envelope,
+                                          headers=self._soap_headers("ExecuteReport")) as response:
+                if response.status_code != 200:
+                    head = b""
+                    async for chunk in response.aiter_bytes():
+                        head += chunk
+                        if len(head) >= 500:
+                            break
+                    text = head[:500].decode('utf-8', errors='replace')
+                    logger.error(f"[RAAS] Error {response.status_code}: {text}")
+                    await asyncio.to_thread(writer.abort)
+                    return ExecutionResult(success=False, error=f"HTTP {response.status_code}: {text[:200]}",
+                                           execution_time_ms=elapsed())
+                
+                async for chunk in response.aiter_bytes():
+                    bytes_received += len(chunk)
+                    parser.feed(chunk)
+                    await add_records()
+            
+            parser.close()
+            await add_records()
+            await flush()
+            
+            if parser.fault:
+                await asyncio.to_thread(writer.abort)
+                return ExecutionResult(success=False, error=f"SOAP fault: {parser.fault}",
+                                       bytes_received=bytes_received, execution_time_ms=elapsed())
+            if not parser.found_content or writer.columns is None:
+                await asyncio.to_thread(writer.abort)
+                return ExecutionResult(success=False, error="No report content found in response",
+                                       bytes_received=bytes_received, execution_time_ms=elapsed())
+            
+            await asyncio.to_thread(writer.commit)
+            
+        except Exception as e:
+            await asyncio.to_thread(writer.abort)
+            logger.error(f"[RAAS] Streaming execution failed: {e}")
+            return ExecutionResult(success=False, error=f"Streaming error: {str(e)}",
+                                   row_count=writer.row_count, bytes_received=bytes_received,
+                                   execution_time_ms=elapsed())
+        
+        logger.info(f"[RAAS] Streamed {writer.row_count} rows, {len(writer.columns)} columns "
+                    f"({bytes_received / 1024 / 1024:.1f} MB) into {table_name}")
+        
+        return ExecutionResult(
+            success=True,
+            row_count=writer.row_count,
+            columns=writer.columns,
+            table_name=table_name,
+            bytes_received=bytes_received,
+            peak_buffer_bytes=peak_buffer,
+            execution_time_ms=elapsed()
+        )
     
     def _parse_csv_response(self, xml_response: str, execution_time: int) -> ExecutionResult:
         """Parse CSV data from ExecuteReport response."""
@@ -525,6 +692,249 @@ class UKGProRaaSClient:
             )
 
 
+# =============================================================================
+# STREAMING EXECUTION
+# =============================================================================
+
+_BASE64_PROBE = re.compile(r'[A-Za-z0-9+/=]+')
+
+
+class _StreamingReportParser:
+    """
+    Incremental ExecuteReport response parser.
+    
+    Uses expat directly rather than ElementTree: ET.iterparse only hands
+    over an element's text at its end event, and the whole report is the
+    text of a single element. expat delivers character data as it arrives,
+    so the embedded CSV can be decoded and split into records chunk by chunk.
+    """
+    
+    CONTENT_TAGS = {'ReportOutput', 'ReportData', 'Content', 'ReportStream'}
+    PROBE_CHARS = 256
+    
+    def __init__(self, max_buffer_bytes: int):
+        self.max_buffer_bytes = max_buffer_bytes
+        self.found_content = False
+        self.fault: Optional[str] = None
+        
+        self._parser = expat.ParserCreate(namespace_separator='}')
+        self._parser.buffer_text = True
+        self._parser.buffer_size = 65536
+        self._parser.StartElementHandler = self._start
+        self._parser.EndElementHandler = self._end
+        self._parser.CharacterDataHandler = self._characters
+        
+        self._in_content = False
+        self._in_fault = False
+        self._fault_parts: List[str] = []
+        
+        self._mode: Optional[str] = None  # 'base64' or 'raw', decided from the first chars
+        self._probe = ''
+        self._b64_pending = ''
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._text = ''
+        self._records: List[List[str]] = []
+        self._records_chars = 0
+    
+    @property
+    def buffered_bytes(self) -> int:
+        return len(self._text) + len(self._probe) + len(self._b64_pending)
+    
+    def feed(self, data: bytes):
+        self._parser.Parse(data, False)
+    
+    def close(self):
+        self._parser.Parse(b'', True)
+        if self._in_content:
+            self._end_content()
+    
+    def take_records(self) -> Tuple[List[List[str]], int]:
+        """Parsed records so far, and the CSV characters they came from."""
+        records, chars = self._records, self._records_chars
+        self._records, self._records_chars = [], 0
+        return records, chars
+    
+    @staticmethod
+    def _local(tag: str) -> str:
+        return tag.split('}')[-1]
+    
+    def _start(self, tag, attrs):
+        local = self._local(tag)
+        if local in self.CONTENT_TAGS and not self.found_content:
+            self.found_content = True
+            self._in_content = True
+        elif local.lower() == 'faultstring':
+            self._in_fault = True
+    
+    def _end(self, tag):
+        local = self._local(tag)
+        if self._in_content and local in self.CONTENT_TAGS:
+            self._end_content()
+        elif self._in_fault and local.lower() == 'faultstring':
+            self._in_fault = False
+            self.fault = ''.join(self._fault_parts).strip() or "Unknown error"
+    
+    def _characters(self, data: str):
+        if self._in_content:
+            self._content(data)
+        elif self._in_fault:
+            self._fault_parts.append(data)
+    
+    def _content(self, data: str):
+        if self._mode is None:
+            self._probe += data
+            if len(self._probe.strip()) >= self.PROBE_CHARS:
+                self._decide_mode()
+            return
+        self._push_content(data)
+    
+    def _decide_mode(self):
+        """Base64 or raw CSV? Same question _parse_csv_response answers by trying to decode."""
+        probe, self._probe = self._probe, ''
+        compact = ''.join(probe.split())
+        self._mode = 'raw'
+        if compact and _BASE64_PROBE.fullmatch(compact):
+            try:
+                head = base64.b64decode(compact[:len(compact) // 4 * 4], validate=True)
+                text = codecs.getincrementaldecoder('utf-8')().decode(head)
+                if text and all(c.isprintable() or c in '\r\n\t' for c in text):
+                    self._mode = 'base64'
+            except (binascii.Error, UnicodeDecodeError):
+                pass
+        self._push_content(probe)
+    
+    def _push_content(self, data: str):
+        if self._mode == 'base64':
+            pending = self._b64_pending + ''.join(data.split())
+            usable = len(pending) // 4 * 4
+            self._b64_pending = pending[usable:]
+            if usable:
+                self._push_text(self._decoder.decode(binascii.a2b_base64(pending[:usable])))
+        else:
+            self._push_text(data)
+    
+    def _push_text(self, text: str):
+        self._text += text
+        if '\n' not in text:
+            self._check_ceiling()
+            return
+        # Cut at the last newline outside a quoted field ("" escapes keep quote parity)
+        cut = self._text.rfind('\n')
+        while cut >= 0 and self._text.count('"', 0, cut) % 2:
+            cut = self._text.rfind('\n', 0, cut)
+        if cut >= 0:
+            complete, self._text = self._text[:cut + 1], self._text[cut + 1:]
+            self._add_records(complete)
+        self._check_ceiling()
+    
+    def _check_ceiling(self):
+        if len(self._text) > self.max_buffer_bytes:
+            raise ValueError(f"CSV record exceeds {self.max_buffer_bytes} byte streaming buffer")
+    
+    def _end_content(self):
+        self._in_content = False
+        if self._mode is None:
+            self._decide_mode()
+        if self._mode == 'base64' and self._b64_pending:
+            pending, self._b64_pending = self._b64_pending, ''
+            self._push_text(self._decoder.decode(base64.b64decode(pending + '=' * (-len(pending) % 4))))
+        self._push_text(self._decoder.decode(b'', final=True))
+        if self._text:
+            text, self._text = self._text, ''
+            self._add_records(text)
+    
+    def _add_records(self, text: str):
+        self._records.extend(row for row in csv.reader(io.StringIO(text)) if row)
+        self._records_chars += len(text)
+
+
+class _DuckDBBatchWriter:
+    """
+    Writes report records into a staging table, swapped in on commit.
+    Each batch is also sketched as it is inserted, and the merged column
+    sketches are saved with the table, so profiling it needs no rescan.
+    """
+    
+    def __init__(self, conn, table_name: str, lock=None, project: Optional[str] = None):
+        self.conn = conn
+        self.table_name = table_name
+        self.staging_name = f"{table_name}__streaming"
+        self.lock = lock or contextlib.nullcontext()
+        self.project = project
+        self.columns: Optional[List[str]] = None
+        self.row_count = 0
+        self._started = False
+        self._sketches = None
+        self._batches = 0
+    
+    def begin(self, header: List[str]):
+        """Create the staging table from the CSV header."""
+        self.columns = header
+        safe_columns, seen = [], set()
+        for i, col in enumerate(header):
+            safe = col.strip().replace(' ', '_').replace('-', '_').replace('.', '_') or f"column_{i + 1}"
+            base, n = safe, 2
+            while safe.lower() in seen:
+                safe, n = f"{base}_{n}", n + 1
+            seen.add(safe.lower())
+            safe_columns.append(safe)
+        self._safe_columns = safe_columns
+        
+        col_defs = ', '.join(f'"{c}" TEXT' for c in safe_columns)
+        with self.lock:
+            self.conn.execute(f'CREATE OR REPLACE TABLE "{self.staging_name}" ({col_defs})')
+        self._started = True
+        if SKETCHES_ENABLED:
+            self._sketches = SketchBuilder([(c, 'VARCHAR') for c in safe_columns])
+    
+    def write(self, rows: List[List[str]]):
+        import pandas as pd
+        
+        width = len(self._safe_columns)
+        if not (min(map(len, rows)) == max(map(len, rows)) == width):
+            rows = [row[:width] if len(row) >= width else row + [None] * (width - len(row)) for row in rows]
+        df = pd.DataFrame(dict(zip(self._safe_columns, zip(*rows))), dtype=object)
+        temp_name = f"temp_raas_{id(df)}"
+        with self.lock:
+            self.conn.register(temp_name, df)
+            try:
+                self.conn.execute(f'INSERT INTO "{self.staging_name}" SELECT * FROM {temp_name}')
+                self._sketch(temp_name)
+            finally:
+                self.conn.unregister(temp_name)
+        self.row_count += len(rows)
+        self._batches += 1
+    
+    def _sketch(self, source: str):
+        if self._sketches is None:
+            return
+        try:
+            self._sketches.add(self.conn, source)
+        except Exception as e:
+            logger.warning(f"[RAAS] Column sketches skipped for {self.table_name}: {e}")
+            self._sketches = None
+    
+    def commit(self):
+        with self.lock:
+            self.conn.execute(f'DROP TABLE IF EXISTS "{self.table_name}"')
+            self.conn.execute(f'ALTER TABLE "{self.staging_name}" RENAME TO "{self.table_name}"')
+            if self._sketches is not None:
+                try:
+                    SketchStore(self.conn).save(self.project, self.table_name, self._sketches.sketches,
+                                                build_ms=self._sketches.build_ms, merges=max(self._batches - 1, 0))
+                except Exception as e:
+                    logger.warning(f"[RAAS] Could not save column sketches for {self.table_name}: {e}")
+    
+    def abort(self):
+        if not self._started:
+            return
+        try:
+            with self.lock:
+                self.conn.execute(f'DROP TABLE IF EXISTS "{self.staging_name}"')
+        except Exception as e:
+            logger.warning(f"[RAAS] Could not drop staging table {self.staging_name}: {e}")
+
+
 # =============================================================================
 # CONVENIENCE FUNCTIONS
 # =============================================================================
@@ -8,6 +8,7 @@ import pytest
 import os
 import sys
 import tempfile
+import threading
 import json
 from unittest.mock import MagicMock, patch
 from typing import Dict, Any
@@ -83,6 +84,99 @@ def mock_llm_orchestrator():
     return mock
 
 
+# =============================================================================
+# DUCKDB FIXTURES
+# =============================================================================
+
+class DuckDBHandler:
+    """Minimal handler exposing a real DuckDB connection (the surface engines, exporters and the catalog use)."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self._db_lock = threading.RLock()
+
+    def safe_fetchall(self, sql, params=None):
+        return self.conn.execute(sql, params or []).fetchall()
+
+    def query(self, sql):
+        result = self.conn.execute(sql)
+        columns = [desc[0] for desc in result.description]
+        return [dict(zip(columns, row)) for row in result.fetchall()]
+
+    def get_filter_candidates(self, project):
+        return {}
+
+
+@pytest.fixture
+def duckdb_handler():
+    """DuckDBHandler over a fresh in-memory database."""
+    import duckdb
+
+    conn = duckdb.connect(":memory:")
+    yield DuckDBHandler(conn)
+    conn.close()
+
+
+@pytest.fixture
+def structured_handler():
+    """
+    Factory for StructuredDataHandlers on a database file, skipping __init__
+    (encryption keys, recovery) but with the production connection stack:
+    make(path, sharded=False, **maintenance_policy). The scheduler is not
+    started; its policy defaults to interval 3600s, idle 0s.
+    """
+    import duckdb
+    import utils.structured_data_handler as sdh
+    from utils.duckdb_maintenance import MaintenanceScheduler
+    from utils.duckdb_shards import ShardManager
+    from utils.query_cache import get_query_cache
+
+    handlers = []
+
+    def make(path, sharded=False, **policy):
+        os.makedirs(os.path.dirname(str(path)), exist_ok=True)
+        handler = sdh.StructuredDataHandler.__new__(sdh.StructuredDataHandler)
+        handler.db_path = str(path)
+        handler.shards = ShardManager(handler.db_path) if sharded else None
+        handler.query_cache = get_query_cache()
+        handler.maintenance = MaintenanceScheduler(handler, **{'interval_s': 3600, 'idle_s': 0, **policy})
+        handler.conn = handler._wrap_connection(duckdb.connect(handler.db_path))
+        handler._init_metadata_table()
+        handlers.append(handler)
+        return handler
+
+    yield make
+    for handler in handlers:
+        try:
+            handler.conn.close()
+        except Exception:
+            pass
+
+
+@pytest.fixture
+def seed_table():
+    """
+    seed(handler, project, name, rows): create <project[:8]>_<name> with
+    employee_id/department/amount rows, register it in _schema_metadata and
+    profile it the way an upload does. Returns the table name.
+    """
+    def seed(handler, project, name, rows):
+        table = f"{project[:8]}_{name}"
+        handler.conn.execute(f"""
+            CREATE OR REPLACE TABLE "{table}" AS
+            SELECT 'E' || range AS employee_id, ['Finance', 'Sales'][range % 2 + 1] AS department,
+                   range * 1.5 AS amount FROM range({rows})
+        """)
+        handler.conn.execute("""
+            INSERT INTO _schema_metadata (id, project, file_name, sheet_name, table_name, columns, row_count)
+            VALUES (nextval('schema_metadata_seq'), ?, ?, 'data', ?, '["employee_id", "department", "amount"]', ?)
+        """, [project, f"{name}.csv", table, rows])
+        handler.profile_columns_fast(project, table)
+        return table
+
+    return seed
+
+
 # =============================================================================
 # SAMPLE DATA FIXTURES
 # =============================================================================
@@ -0,0 +1,89 @@
+"""
+Tests for the Benchmark Harness
+===============================
+Tests that baseline comparison flags slowdowns past the threshold (and
+not jitter under the absolute floor), that the recorder keeps failures in
+the report, and that the stub services answer deterministically with their
+configured latency.
+"""
+
+import os
+import time
+
+import requests
+
+
+def report(scale='small', **medians):
+    results = []
+    for name, median in medians.items():
+        name = name.replace('__', '.')
+        entry = {'name': name, 'suite': name.split('.')[0]}
+        if isinstance(median, str):
+            entry['error'] = median
+        else:
+            entry['median_s'] = median
+        results.append(entry)
+    return {'config': {'scale': scale}, 'results': results}
+
+
+class TestCompare:
+    """Tests for compare_reports."""
+
+    def test_flags_regressions_past_threshold_and_floor(self):
+        from benchmarks.runner import compare_reports
+
+        baseline = report(ingest__store_csv=2.0, terms__resolve_terms=0.002, rag__search_hybrid=0.4,
+                          rag__add_document=1.0, engines__map=1.0)
+        current = report(ingest__store_csv=2.5, terms__resolve_terms=0.004, rag__search_hybrid=0.2,
+                         rag__add_document='RuntimeError: boom', sql__assemble=0.01)
+        comparison = compare_reports(current, baseline, threshold=0.2, min_delta_s=0.005)
+        status = {c['name']: c['status'] for c in comparison['cases']}
+
+        assert status == {
+            'ingest.store_csv': 'regression',    # +25% and +500 ms
+            'terms.resolve_terms': 'ok',         # 2x, but only 2 ms
+            'rag.search_hybrid': 'improved',
+            'rag.add_document': 'regression',    # errors now, passed before
+            'sql.assemble': 'new',
+        }                                        # engines suite not run: not reported missing
+        assert comparison['regressions'] == ['ingest.store_csv', 'rag.add_document']
+        assert not compare_reports(current, current)['regressions']
+
+    def test_recorder_keeps_failures(self):
+        from benchmarks.runner import Recorder
+
+        recorder = Recorder(repeats=3, warmup=1, only=['rag'])
+        recorder.suite = 'rag'
+        calls = []
+        assert recorder.measure('search', lambda i: time.sleep(0.001) or calls.append(i) or len(calls), items=10) == 4
+        assert recorder.measure('add_document', lambda i: 1 / 0) is None
+        recorder.suite = 'ingest'
+        assert recorder.measure('store_csv', lambda i: 1) is None
+
+        search, failed = recorder.results
+        assert calls == [-1, 0, 1, 2] and len(search['samples_s']) == 3 and search['items_per_s'] > 0
+        assert failed['error'].startswith('ZeroDivisionError') and 'median_s' not in failed
+
+
+class TestStubs:
+    """Tests for the stub services."""
+
+    def test_stubs_are_deterministic_and_slow_on_purpose(self):
+        from benchmarks.stubs import stub_services
+
+        with stub_services(ollama_ms=50, supabase_ms=0) as stubs:
+            url = os.environ['LLM_ENDPOINT']
+            start = time.perf_counter()
+            first = requests.post(f"{url}/api/embeddings", json={'prompt': 'overtime for hourly staff'}).json()
+            assert time.perf_counter() - start >= 0.05
+            again = requests.post(f"{url}/api/embeddings", json={'prompt': 'overtime for hourly staff'}).json()
+            assert first == again and abs(sum(v * v for v in first['embedding']) - 1.0) < 1e-9
+
+            rest = f"{os.environ['SUPABASE_URL']}/rest/v1/documents"
+            requests.post(rest, json=[{'name': 'a.pdf', 'project_id': 'p1'}, {'name': 'b.pdf', 'project_id': 'p2'}])
+            requests.patch(rest, params={'name': 'eq.a.pdf'}, json={'status': 'done'})
+            rows = requests.get(rest, params={'select': '*', 'project_id': 'eq.p1'}).json()
+            assert [(r['name'], r['status']) for r in rows] == [('a.pdf', 'done')]
+            assert stubs.request_counts()['ollama'] == {'/api/embeddings': 2}
+
+        assert os.environ['LLM_ENDPOINT'] == 'http://localhost:11434'
@@ -0,0 +1,160 @@
+"""
+Tests for BI Transform Push-Down
+================================
+Tests that transforms compiled to SQL export exactly what the Python
+transforms produce on a fixture set, that unsupported transforms fall back
+to Python, and that lookup dictionaries are cached until the lookup tables
+change.
+"""
+
+from datetime import date
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+
+
+EMPLOYEES = [
+    # id, name, first, last, state, earn_code, pay, rate, bonus, hired, tags
+    (1, 'Ana Silva', 'Ana', 'Silva', 'ca', 'REG', 1234567.125, 0.12345, Decimal('10.50'), date(2020, 1, 5), 'a, b ,c'),
+    (2, 'Bo Li', 'Bo', None, ' NY\t', 'OT', -0.005, 1.0, Decimal('0.00'), None, 'x'),
+    (3, '', '', 'Stone', 'ﬂ', 'BONUS', None, None, None, date(2019, 7, 1), ''),
+    (4, None, None, '', 'Texas', None, 0.0, -0.5, Decimal('-3.25'), date(2021, 2, 28), None),
+    (5, 'İrem Öz', 'İrem', 'Öz', 'zz', 'XYZ', 1e20, 2.675, Decimal('99999.99'), date(2022, 12, 31), ';;a;;'),
+    (6, 'None', 'Σοφία', 'None', 'TX ', '', 42.0, 0.0, Decimal('1.00'), date(2023, 3, 3), ' , '),
+]
+
+
+@pytest.fixture
+def handler(duckdb_handler):
+    conn = duckdb_handler.conn
+    conn.execute("""
+        CREATE TABLE test__employees (
+            id INTEGER, name VARCHAR, first VARCHAR, last VARCHAR, state VARCHAR, earn_code VARCHAR,
+            pay DOUBLE, rate DOUBLE, bonus DECIMAL(10, 2), hired DATE, tags VARCHAR
+        )
+    """)
+    conn.executemany("INSERT INTO test__employees VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", EMPLOYEES)
+    conn.execute("CREATE TABLE test__earnings_codes (code VARCHAR, description VARCHAR, active BOOLEAN)")
+    conn.executemany("INSERT INTO test__earnings_codes VALUES (?, ?, ?)", [
+        ('REG', 'Regular', True), ('OT', 'Overtime', True), ('BONUS', None, True),
+        ('REG', 'Regular Pay', False),  # duplicate code: last row wins
+    ])
+    conn.execute("CREATE TABLE other__earnings_codes (code VARCHAR, description VARCHAR)")
+    conn.execute("INSERT INTO other__earnings_codes VALUES ('OT', 'Other project')")
+    return duckdb_handler
+
+
+def _t(t_type, target, **params):
+    return SimpleNamespace(type=t_type, column=target, params=params or None)
+
+
+SQL = "SELECT * FROM test__employees ORDER BY id DESC"
+
+# (transforms, number expected in SQL)
+CASES = [
+    ([_t('state_names', 'state')], 1),
+    ([_t('map_lookup', 'earn_code', lookup_table='TEST__EARNINGS_CODES')], 1),
+    ([_t('map_lookup', 'earn_code', lookup_table='missing_lookup')], 1),
+    ([_t('format_currency', 'pay'), _t('format_percent', 'rate'), _t('format_currency', 'bonus')], 3),
+    ([_t('format_currency', 'id'), _t('format_percent', 'bonus')], 2),
+    ([_t('combine', 'first', columns=['first', 'last', 'id', 'hired', 'nope'], separator=' / ')], 1),
+    ([_t('combine', 'first', columns=['last'], new_column='first')], 1),
+    ([_t('split', 'tags', delimiter=',', new_columns=['t1', 't2', 't3', 't4'])], 1),
+    ([_t('split', 'tags', delimiter=';;', new_columns=['tags', 'last'])], 1),
+    ([_t('filter', 'state', operator='=', value='ca')], 1),
+    ([_t('filter', 'last', operator='!=', value='None')], 1),
+    ([_t('filter', 'last', operator='=', value=None)], 1),
+    ([_t('filter', 'pay', column='id', operator='>', value='2')], 1),
+    ([_t('filter', 'name', operator='contains', value='IR')], 1),
+    ([_t('filter', 'name', operator='contains', value='on')], 1),
+    ([_t('filter', 'hired', operator='=', value='2020-01-05')], 1),
+    ([_t('rename', 'pay', new_name='Pay ($)'), _t('filter', 'id', operator='<', value=3),
+      _t('state_names', 'state'), _t('titlecase', 'name'), _t('format_currency', 'pay')], 3),
+    ([_t('split', 'tags', new_columns=['t1', 't2']), _t('filter', 't2', operator='=', value='')], 0),
+    ([_t('uppercase', 'name'), _t('state_names', 'state')], 0),
+    ([_t('calculated', 'pay', formula='id * 2', new_column='double_id'), _t('combine', 'x', columns=['id'])], 0),
+    ([_t('state_names', 'state'), _t('calculated', 'id', formula='id * 2', new_column='id2'),
+      _t('map_lookup', 'earn_code', lookup_table='test__earnings_codes')], 1),
+]
+
+
+def _exported(result):
+    """What the export writes: one cell per column, '' for keys a row lacks."""
+    return [[row.get(c, '') for c in result.columns] for row in result.rows]
+
+
+class TestTransformPushdown:
+    """Tests for SQL push-down equivalence with the Python transforms."""
+
+    @pytest.mark.parametrize("transforms,pushed", CASES)
+    def test_matches_python(self, handler, transforms, pushed):
+        """Push-down exports the same rows, columns and renames as Python."""
+        from backend.utils.bi_transforms import load_lookup_dictionaries, run_transforms
+
+        lookups = load_lookup_dictionaries(handler, 'test')
+        python = run_transforms(handler, SQL, transforms, lookups, pushdown=False)
+        sql = run_transforms(handler, SQL, transforms, lookups, pushdown=True)
+
+        assert len(sql.pushed) == pushed
+        assert sql.columns == python.columns
+        assert sql.renames == python.renames
+        assert _exported(sql) == _exported(python)
+        assert [[type(v) for v in row] for row in _exported(sql)] == \
+               [[type(v) for v in row] for row in _exported(python)]
+
+    def test_lookup_dictionaries_scoped_to_project(self, handler):
+        """Only the project's lookup tables load; duplicate codes keep the last row."""
+        from backend.utils.bi_transforms import load_lookup_dictionaries
+
+        lookups = load_lookup_dictionaries(handler, 'test')
+        assert list(lookups) == ['test__earnings_codes']
+        assert lookups['test__earnings_codes'] == {'REG': 'Regular Pay', 'OT': 'Overtime', 'BONUS': 'None'}
+
+    def test_empty_results(self, handler):
+        """A filter removing every row still exports headers; an empty query is reported."""
+        from backend.utils.bi_transforms import run_transforms
+
+        filtered = run_transforms(handler, SQL, [_t('filter', 'state', value='nowhere')], {})
+        assert filtered.pushed == ['filter'] and not filtered.source_empty
+        assert filtered.rows == [] and 'state' in filtered.columns
+
+        empty = run_transforms(handler, "SELECT * FROM test__employees WHERE id < 0",
+                               [_t('filter', 'state', value='nowhere')], {})
+        assert empty.source_empty
+
+    def test_numeric_filter_on_null_raises_like_python(self, handler):
+        """float(None) fails the Python filter; push-down falls back and fails the same way."""
+        from backend.utils.bi_transforms import run_transforms
+
+        with pytest.raises(TypeError):
+            run_transforms(handler, SQL, [_t('filter', 'pay', operator='>', value=1)], {})
+
+
+class TestLookupCache:
+    """Tests for the per-project lookup dictionary cache."""
+
+    @pytest.mark.asyncio
+    async def test_cached_until_lookup_table_changes(self, handler, monkeypatch):
+        from backend.utils import bi_transforms
+        from backend.utils.keyed_cache import invalidate_keyed_caches
+
+        loads = []
+        real_load = bi_transforms.load_lookup_dictionaries
+        monkeypatch.setattr(bi_transforms, 'load_lookup_dictionaries',
+                            lambda h, p: loads.append(p) or real_load(h, p))
+        bi_transforms.invalidate_lookup_dictionaries()
+
+        first = await bi_transforms.get_lookup_dictionaries(handler, 'test')
+        assert await bi_transforms.get_lookup_dictionaries(handler, 'test') is first
+        assert len(loads) == 1
+
+        handler.conn.execute("INSERT INTO test__earnings_codes VALUES ('PTO', 'Paid Time Off', TRUE)")
+        changed = await bi_transforms.get_lookup_dictionaries(handler, 'test')
+        assert changed['test__earnings_codes']['PTO'] == 'Paid Time Off'
+        assert len(loads) == 2
+
+        # Upload/job completion drops every cached entry
+        invalidate_keyed_caches()
+        await bi_transforms.get_lookup_dictionaries(handler, 'test')
+        assert len(loads) == 3
@@ -0,0 +1,184 @@
+"""
+Tests for Column Sketches
+=========================
+Tests that sketches agree with exact DuckDB queries within their stated
+bounds, that batch-built and appended sketches equal a single build, that
+stale or differently hashed sketches are never used or merged, and that
+profiling, outlier checks and the RaaS streaming writer read and write
+them.
+"""
+
+import duckdb
+import pytest
+
+
+@pytest.fixture
+def conn():
+    conn = duckdb.connect(':memory:')
+    conn.execute("""
+        CREATE TABLE acme_employees AS
+        SELECT 'E' || range AS employee_id,
+               ['Finance', 'Sales', 'Support', 'Research'][range % 4 + 1] AS department,
+               CASE WHEN range % 10 = 0 THEN NULL WHEN range % 13 = 0 THEN ''
+                    ELSE '$' || (30000 + (hash(range) % 90000))::VARCHAR END AS annual_salary,
+               (hash(range) % 100000) / 100.0 AS bonus,
+               range % 700 AS cost_center,
+               DATE '2015-01-01' + (range % 3000)::INTEGER AS hire_date,
+               CASE range % 3 WHEN 0 THEN 'Y' WHEN 1 THEN 'N' END AS active
+        FROM range(20000)
+    """)
+    yield conn
+    conn.close()
+
+
+class TestSketches:
+    """Tests for accuracy, merging, storage and staleness."""
+
+    def test_agrees_with_exact_queries(self, conn):
+        from utils.column_sketches import ColumnSketch, build_table_sketches
+
+        sketches = build_table_sketches(conn, 'acme_employees')
+        for column, sketch in sketches.items():
+            exact = conn.execute(f'SELECT COUNT(DISTINCT "{column}") FROM acme_employees').fetchone()[0]
+            bound = sketch.error_bounds()['distinct_relative']
+            assert abs(sketch.distinct_count - exact) <= max(3 * bound * exact, 0), column
+
+        department = sketches['department']
+        assert department.distinct_exact and sorted(department.values()) == ['Finance', 'Research', 'Sales', 'Support']
+        assert department.value_counts(1) == [('Finance', 5000)]
+        missing = conn.execute("SELECT COUNT(*) FROM acme_employees WHERE COALESCE(annual_salary, '') = ''").fetchone()[0]
+        assert sketches['active'].null_count == 6666 and sketches['annual_salary'].null_count == missing
+
+        bonus = sketches['bonus']
+        mean, std, q1, q3 = conn.execute("""
+            SELECT AVG(bonus), STDDEV(bonus), quantile_cont(bonus, 0.25), quantile_cont(bonus, 0.75)
+            FROM acme_employees
+        """).fetchone()
+        assert bonus.mean == pytest.approx(mean) and bonus.std == pytest.approx(std)
+        rank = bonus.error_bounds()['quantile_rank']
+        assert 0 < rank < 0.02
+        below = conn.execute("SELECT AVG((bonus <= ?)::INT) FROM acme_employees", [bonus.quantile(0.25)]).fetchone()[0]
+        assert abs(below - 0.25) <= 2 * rank and abs(bonus.quantile(0.75) - q3) / q3 < 0.05
+
+        salary = sketches['annual_salary']
+        assert salary.numeric_count == 20000 - missing and not salary.distinct_exact
+        assert salary.error_bounds()['frequency_overcount_rows'] > 0
+        assert sketches['hire_date'].min_date == '2015-01-01' and sketches['hire_date'].date_count == 20000
+
+        restored = ColumnSketch.from_bytes(salary.to_bytes())
+        assert (restored.distinct_count, restored.mean, restored.quantile(0.5), restored.value_counts(3)) == \
+               (salary.distinct_count, salary.mean, salary.quantile(0.5), salary.value_counts(3))
+
+    def test_batches_and_appends_equal_one_build(self, conn):
+        from utils.column_sketches import SketchBuilder, SketchStore, build_table_sketches, table_column_types
+
+        builder = SketchBuilder(table_column_types(conn, 'acme_employees'))
+        builder.add(conn, "(SELECT * FROM acme_employees WHERE employee_id < 'E5')")
+        builder.add(conn, "(SELECT * FROM acme_employees WHERE employee_id >= 'E5')")
+        whole = build_table_sketches(conn, 'acme_employees')
+        for column, sketch in whole.items():
+            merged = builder.sketches[column]
+            assert (merged.count, merged.null_count, merged.distinct_count, merged.numeric_count) == \
+                   (sketch.count, sketch.null_count, sketch.distinct_count, sketch.numeric_count), column
+            assert merged.mean == pytest.approx(sketch.mean) and merged.std == pytest.approx(sketch.std)
+        assert builder.sketches['department'].value_counts() == whole['department'].value_counts()
+        assert builder.sketches['cost_center'].cms.table.tolist() == whole['cost_center'].cms.table.tolist()
+
+        store = SketchStore(conn)
+        store.save('ACME', 'acme_employees', whole)
+        conn.execute("CREATE TEMP TABLE hires AS SELECT * REPLACE ('E9' || employee_id AS employee_id) "
+                     "FROM acme_employees LIMIT 500")
+        conn.execute("INSERT INTO acme_employees SELECT * FROM hires")
+        assert store.load('acme_employees') is None                 # stale after the insert
+        appended = store.append('ACME', 'acme_employees', 'hires')
+        assert appended['department'].count == 20500 and appended['department'].value_counts(1) == [('Finance', 5125)]
+        report = store.report('ACME')[0]
+        assert (report['merges'], report['fresh'], report['row_count']) == (1, True, 20500)
+        assert store.load('acme_employees')['employee_id'].distinct_count == pytest.approx(20500, rel=0.05)
+
+    def test_differently_hashed_sketches_are_rebuilt_not_merged(self, conn):
+        from utils.column_sketches import SketchStore, build_table_sketches
+
+        store = SketchStore(conn)
+        sketches = build_table_sketches(conn, 'acme_employees')
+        for sketch in sketches.values():
+            sketch.hash_tag += 1                                    # as if built by another DuckDB
+        store.save('ACME', 'acme_employees', sketches)
+        conn.execute("CREATE TEMP TABLE hires AS SELECT * FROM acme_employees LIMIT 10")
+        with pytest.raises(ValueError):
+            build_table_sketches(conn, 'hires')['department'].merge(sketches['department'])
+        conn.execute("INSERT INTO acme_employees SELECT * FROM hires")
+        store.append('ACME', 'acme_employees', 'hires')
+        assert store.report()[0]['merges'] == 0 and store.load('acme_employees')['department'].count == 20010
+
+
+class TestReaders:
+    """Tests for profiling, outlier checks and the streaming writer."""
+
+    def test_profile_from_sketches_matches_sql(self, conn):
+        import utils.structured_data_handler as sdh
+
+        conn.execute("CREATE TABLE acme_small AS SELECT * EXCLUDE (employee_id) FROM acme_employees LIMIT 400")
+        handler = sdh.StructuredDataHandler.__new__(sdh.StructuredDataHandler)
+        handler.conn = conn
+        handler._init_metadata_table()
+        enabled = sdh.SKETCHES_ENABLED
+        try:
+            sdh.SKETCHES_ENABLED = False
+            exact = handler.profile_columns_fast('ACME', 'acme_small')
+            sdh.SKETCHES_ENABLED = True
+            sketched = handler.profile_columns_fast('ACME', 'acme_small')
+        finally:
+            sdh.SKETCHES_ENABLED = enabled
+
+        assert (exact['method'], sketched['method']) == ('sql_optimized', 'sketch')
+        keys = ['total_count', 'null_count', 'distinct_count', 'inferred_type', 'is_likely_key', 'distinct_values',
+                'value_distribution', 'min_value', 'max_value', 'min_date', 'max_date', 'filter_category']
+        for column, profile in exact['profiles'].items():
+            assert {k: sketched['profiles'][column][k] for k in keys} == {k: profile[k] for k in keys}, column
+            assert sketched['profiles'][column]['mean_value'] == pytest.approx(profile['mean_value'])
+        assert exact['profiles']['active']['inferred_type'] == 'boolean'
+        assert exact['profiles']['annual_salary']['inferred_type'] == 'numeric'
+
+    def test_outliers_use_sketch_stats(self, conn):
+        from backend.engines.detect import DetectEngine
+        from utils.column_sketches import SketchStore
+
+        conn.execute("UPDATE acme_employees SET bonus = 1e7, annual_salary = '$9,000,000' WHERE employee_id = 'E7'")
+        engine = DetectEngine(conn, 'ACME')
+        sql_result = engine._detect_outliers('acme_employees', {'column': 'bonus', 'method': 'zscore'}, 5)
+        SketchStore(conn).load_or_build('ACME', 'acme_employees')
+
+        for method in ('zscore', 'iqr'):
+            result = engine._detect_outliers('acme_employees', {'column': 'bonus', 'method': method}, 5)
+            assert result['stats']['source'] == 'sketch'
+            assert [r['employee_id'] for r in result['matches']] == ['E7']
+        assert result['stats']['quantile_rank_error'] > 0
+        zscore = engine._detect_outliers('acme_employees', {'column': 'bonus', 'method': 'zscore'}, 5)
+        assert zscore['matches'][0]['zscore'] == pytest.approx(sql_result['matches'][0]['zscore'])
+
+        text = engine.execute({'source_table': 'acme_employees',
+                               'patterns': [{'type': 'outlier', 'column': 'annual_salary'}]})
+        assert text.findings[0].evidence[0]['employee_id'] == 'E7'
+        assert text.findings[0].details['stats']['source'] == 'sketch'
+
+    def test_streaming_writer_saves_merged_sketches(self, conn):
+        from backend.services.ukg_pro_raas import _DuckDBBatchWriter
+        from utils.column_sketches import SketchStore, build_table_sketches
+
+        writer = _DuckDBBatchWriter(conn, 'acme_pay', project='ACME')
+        writer.begin(['Employee Number', 'Pay Code', 'Amount'])
+        for batch in range(4):
+            writer.write([[f'E{batch * 250 + i}', f'P{i % 6}', f'{i * 7 % 300}.50' if i % 9 else '']
+                          for i in range(250)])
+        writer.commit()
+
+        stored, rebuilt = SketchStore(conn).load('acme_pay'), build_table_sketches(conn, 'acme_pay')
+        for column, sketch in rebuilt.items():
+            assert (stored[column].count, stored[column].null_count, stored[column].distinct_count,
+                    stored[column].distinct_exact) == \
+                   (sketch.count, sketch.null_count, sketch.distinct_count, sketch.distinct_exact), column
+            if sketch.distinct_exact:
+                assert stored[column].value_counts() == sketch.value_counts()
+            assert stored[column].mean == pytest.approx(sketch.mean)
+        assert SketchStore(conn).report('ACME')[0]['merges'] == 3
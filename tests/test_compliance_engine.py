@@ -0,0 +1,154 @@
+"""
+Tests for ComplianceEngine scan planner
+========================================
+Tests grouped execution, shared table scans and incremental re-scans
+against real DuckDB.
+"""
+
+import pytest
+from unittest.mock import patch
+
+
+RULES = [
+    {'rule_id': 'R1', 'title': 'Salary floor', 'severity': 'high',
+     'requirement': {'checks': [{'field': 'salary'}]}},
+    {'rule_id': 'R2', 'title': 'Salary ceiling',
+     'requirement': {'checks': [{'field': 'salary'}]}},
+    {'rule_id': 'R3', 'title': 'Dept required',
+     'requirement': {'checks': [{'field': 'department'}]}},
+]
+
+RULE_SQL = {
+    'R1': "SELECT * FROM test__employees WHERE salary < 70000",
+    'R2': "SELECT * FROM test__employees WHERE salary > 1000000",
+    'R3': "SELECT * FROM test__departments WHERE name IS NULL",
+}
+
+TABLE_FOR_FIELD = {'salary': 'test__employees', 'department': 'test__departments'}
+
+
+class TestComplianceScanPlanner:
+    """Tests for batched, parallel and incremental scanning."""
+
+    @pytest.fixture
+    def engine(self, duckdb_handler):
+        from backend.utils import compliance_engine as ce
+
+        conn = duckdb_handler.conn
+        conn.execute("""
+            CREATE TABLE _schema_metadata (
+                id INTEGER, project VARCHAR, table_name VARCHAR, display_name VARCHAR,
+                columns JSON, row_count INTEGER, is_current BOOLEAN,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        conn.execute("CREATE TABLE test__employees (employee_id VARCHAR, salary DOUBLE)")
+        conn.execute("INSERT INTO test__employees VALUES ('E1', 65000), ('E2', 80000), ('E3', 50000)")
+        conn.execute("CREATE TABLE test__departments (code VARCHAR, name VARCHAR)")
+        conn.execute("INSERT INTO test__departments VALUES ('D1', 'Sales')")
+        conn.execute("""
+            INSERT INTO _schema_metadata VALUES
+            (1, 'test', 'test__employees', 'Employees', '["employee_id","salary"]', 3, TRUE, '2025-01-01'),
+            (2, 'test', 'test__departments', 'Departments', '["code","name"]', 1, TRUE, '2025-01-01')
+        """)
+
+        ce.clear_compliance_memo()
+        engine = ce.ComplianceEngine(db_handler=duckdb_handler)
+        engine._rules_cache = [dict(r) for r in RULES]
+        engine.column_mapper.load_project_mappings = lambda project: True
+        engine.column_mapper.find_column_for_field = lambda f, p: {
+            'table_name': TABLE_FOR_FIELD[f], 'column_name': f
+        }
+
+        def fake_generate(rule, field_mappings, schema):
+            return engine._check_from_sql(rule, field_mappings, RULE_SQL[rule['rule_id']])
+
+        with patch.object(engine, '_generate_check_sql', side_effect=fake_generate) as gen:
+            engine.generate_mock = gen
+            yield engine
+
+    def test_grouped_scan_matches_expected(self, engine):
+        """Rules on the same table share a query group; results are correct."""
+        result = engine.run_compliance_scan('test')
+
+        statuses = {r['rule_id']: r['status'] for r in result['check_results']}
+        assert statuses == {'R1': 'failed', 'R2': 'passed', 'R3': 'passed'}
+        assert result['scan_plan']['query_groups'] == 2
+        assert result['findings_count'] == 1
+
+        finding = result['findings'][0]
+        assert finding['evidence']['total_violations'] == 2
+        assert len(finding['evidence']['sample_violations']) == 2
+
+    def test_rescan_reuses_unchanged_rules(self, engine):
+        """A second scan with nothing changed reuses every rule without SQL generation."""
+        engine.run_compliance_scan('test')
+        calls = engine.generate_mock.call_count
+
+        result = engine.run_compliance_scan('test')
+
+        assert result['scan_plan']['reused'] == 3
+        assert result['scan_plan']['recomputed'] == 0
+        assert all(r['source'] == 'reused' for r in result['check_results'])
+        assert engine.generate_mock.call_count == calls
+        assert result['failed'] == 1
+
+    def test_table_version_change_recomputes_only_dependent_rules(self, engine):
+        """Re-uploading one table recomputes only rules reading it."""
+        engine.run_compliance_scan('test')
+
+        conn = engine.db_handler.conn
+        conn.execute("INSERT INTO test__departments VALUES ('D2', NULL)")
+        conn.execute("UPDATE _schema_metadata SET is_current = FALSE WHERE id = 2")
+        conn.execute("""
+            INSERT INTO _schema_metadata VALUES
+            (3, 'test', 'test__departments', 'Departments', '["code","name"]', 2, TRUE, '2025-02-01')
+        """)
+
+        result = engine.run_compliance_scan('test')
+        sources = {r['rule_id']: r['source'] for r in result['check_results']}
+        statuses = {r['rule_id']: r['status'] for r in result['check_results']}
+
+        assert sources == {'R1': 'reused', 'R2': 'reused', 'R3': 'recomputed'}
+        assert statuses['R3'] == 'failed'
+
+    def test_rule_definition_change_recomputes(self, engine):
+        """Editing a rule invalidates its memoized result."""
+        engine.run_compliance_scan('test')
+        engine._rules_cache[1]['severity'] = 'critical'
+
+        result = engine.run_compliance_scan('test')
+        sources = {r['rule_id']: r['source'] for r in result['check_results']}
+
+        assert sources['R2'] == 'recomputed'
+        assert sources['R1'] == 'reused'
+
+    def test_bad_rule_sql_does_not_poison_group(self, engine):
+        """A failing rule in a combined group falls back to per-rule execution."""
+        RULE_SQL_BAD = dict(RULE_SQL, R2="SELECT * FROM test__employees WHERE no_such_col > 1")
+
+        def fake_generate(rule, field_mappings, schema):
+            return engine._check_from_sql(rule, field_mappings, RULE_SQL_BAD[rule['rule_id']])
+
+        engine.generate_mock.side_effect = fake_generate
+        result = engine.run_compliance_scan('test', force_full=True)
+        statuses = {r['rule_id']: r['status'] for r in result['check_results']}
+
+        assert statuses == {'R1': 'failed', 'R2': 'error', 'R3': 'passed'}
+
+    def test_filter_rules_share_one_scan(self, engine):
+        """Filter rules on one table read it once; samples carry only the rule's columns."""
+        from backend.utils import compliance_engine as ce
+
+        scans = [ce._filter_scan(RULE_SQL[r]) for r in ('R1', 'R2')]
+        assert scans[0][0] == scans[1][0]
+        assert ce._filter_scan("SELECT e.* FROM test__employees e JOIN test__departments d ON TRUE") is None
+
+        with_clause, queries = ce._shared_scan_sql([scan[1] for scan in scans])
+        assert with_clause.count('test__employees') == 1 and ' OR ' in with_clause
+        assert all(f"FROM {ce.HITS_CTE} AS test__employees WHERE" in q for q in queries)
+
+        result = engine.run_compliance_scan('test')
+        sample = result['findings'][0]['evidence']['sample_violations']
+        assert sorted(row['employee_id'] for row in sample) == ['E1', 'E3']
+        assert all(ce.COUNT_COLUMN not in row for row in sample)
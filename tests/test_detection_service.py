@@ -0,0 +1,131 @@
+"""
+Tests for DetectionService compiled matcher
+============================================
+Tests that SignatureMatcher returns exactly what the per-signature loop
+returns, and that it is only rebuilt when signatures reload.
+"""
+
+import random
+
+import pytest
+
+
+PATTERNS = [
+    '(?i)ultipro|ukg.*pro',                  # regex with required literal
+    '(?i)^home_company_code$',               # anchored literal
+    '(?i)^coid$|^eeid$',                     # anchored literal alternation
+    '(?i)employee_id|emp_id|emplid|pernr',   # keyword list
+    '(?i)gross_pay|net_pay',
+    'pay[_ ]?\\d+',                          # required literal 'pay'
+    '(hire|term)_date',                      # branch of literals
+    '^\\w+_id$',                             # no literal: combined regex
+    '(?P<code>dept)\\w*',                    # named group: matched individually
+    '(?m)^eeid$',                            # non-i global flag: individually
+    '(invalid',                              # invalid regex: substring only
+    '',                                      # empty: substring of anything
+]
+
+TEXTS = [
+    'UKG_Pro_Extract.xlsx', 'UltiPro Export', 'home_company_code', 'HOME_COMPANY_CODE',
+    'coid', 'eeid\n', 'xeeid', 'employee_id', 'EMPLID', 'gross_pay_ytd', 'pay 12', 'pay12',
+    'hire_date', 'TERM_DATE', 'worker_id', 'dept_code', '(invalid)', 'x', 'İd', 'Kelvin_K',
+]
+
+
+def _signatures(patterns, pattern_type='column_name'):
+    from utils.detection_service import DetectionSignature
+
+    sigs = [
+        DetectionSignature(id=f'sig_{i}', pattern=p, pattern_type=pattern_type,
+                           confidence=0.8, priority=len(patterns) - i)
+        for i, p in enumerate(patterns)
+    ]
+    for sig in sigs:
+        sig.compile()
+    return sigs
+
+
+class TestSignatureMatcher:
+    """Tests for SignatureMatcher equivalence."""
+
+    def test_matches_per_signature_loop(self):
+        """Every text matches exactly the signatures the loop would match, in order."""
+        from utils.detection_service import SignatureMatcher
+
+        sigs = _signatures(PATTERNS)
+        matcher = SignatureMatcher(sigs)
+
+        for text in TEXTS:
+            expected = [s.id for s in sigs if s.matches(text)]
+            assert [s.id for s in matcher.match('column_name', text)] == expected, text
+
+    def test_randomized_equivalence(self):
+        """Randomly generated signatures and texts agree with the loop."""
+        from utils.detection_service import SignatureMatcher
+
+        rng = random.Random(11)
+        words = ['emp', 'id', 'hire', 'date', 'pay', 'gross', 'tax', 'coid', 'k']
+
+        def word():
+            return rng.choice(words) + rng.choice(['', '_' + rng.choice(words)])
+
+        shapes = [
+            lambda: '(?i)' + '|'.join(word() for _ in range(rng.randint(1, 3))),
+            lambda: '|'.join(rng.choice(['^', '']) + word() + rng.choice(['$', '']) for _ in range(2)),
+            lambda: f'(?i){word()}.*{word()}',
+            lambda: f'({word()}|{word()})\\d?',
+            lambda: f'^\\w+{word()}$',
+        ]
+        sigs = _signatures([rng.choice(shapes)() for _ in range(300)])
+        matcher = SignatureMatcher(sigs)
+
+        for _ in range(500):
+            text = '_'.join(rng.choice(words + ['X', 'İd', 'Emp', '7']) for _ in range(rng.randint(1, 4)))
+            expected = [s.id for s in sigs if s.matches(text)]
+            assert [s.id for s in matcher.match('column_name', text)] == expected, text
+
+    def test_pattern_types_are_separate(self):
+        """Signatures only match strings of their own pattern type."""
+        from utils.detection_service import SignatureMatcher
+
+        sigs = _signatures(['ukg'], 'file_name') + _signatures(['ukg'], 'column_name')
+        matcher = SignatureMatcher(sigs)
+
+        assert matcher.match('file_name', 'ukg.xlsx') == [sigs[0]]
+        assert matcher.match('sheet_name', 'ukg') == []
+
+
+class TestDetectionServiceMatcher:
+    """Tests for DetectionService using the compiled matcher."""
+
+    @pytest.fixture
+    def service(self, monkeypatch):
+        from utils.detection_service import DetectionService
+
+        service = DetectionService()
+        monkeypatch.setattr(service, '_get_supabase', lambda: None)
+        return service
+
+    def test_detect_identical_to_loop(self, service):
+        """detect() returns the same matches with and without the matcher."""
+        columns = ['home_company_code', 'employee_id', 'hire_date', 'gross_pay', 'gl_account', 'coid']
+        compiled = service.detect(filename='UltiPro_Employees.xlsx', columns=columns)
+
+        service._matcher = None
+        looped = service.detect(filename='UltiPro_Employees.xlsx', columns=columns)
+
+        assert [m.to_dict() for m in compiled.all_matches] == [m.to_dict() for m in looped.all_matches]
+        assert compiled.primary_system['code'] == 'ukg_pro'
+
+    def test_matcher_rebuilt_only_on_signature_reload(self, service):
+        """The matcher is built on load and reused while the cache is valid."""
+        service.detect(columns=['employee_id'])
+        matcher = service._matcher
+        assert matcher is not None
+
+        service.detect(columns=['hire_date'])
+        assert service._matcher is matcher
+
+        service._signatures_loaded_at = None
+        service.detect(columns=['hire_date'])
+        assert service._matcher is not matcher
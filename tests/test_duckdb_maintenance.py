@@ -0,0 +1,248 @@
+"""
+Tests for DuckDB Maintenance
+============================
+Tests that requested checkpoints wait for an idle window (or the maximum
+delay) while bare CHECKPOINTs run at once unless deferral is opted into,
+that written tables are re-analyzed and their sketches
+rebuilt, that orphaned metadata goes only after its grace period, and that
+compaction gives space back without losing data, sequences or sketch
+freshness - and is abandoned when the file was written or is in use.
+"""
+
+import os
+import threading
+from datetime import datetime
+
+import duckdb
+import pytest
+
+
+PROJECT = 'a1b2c3d4-0000-4000-8000-000000000001'
+
+
+def bulk(handler, table, rows):
+    handler.conn.execute(f"""
+        CREATE OR REPLACE TABLE "{table}" AS
+        SELECT 'E' || range AS employee_id, ['Finance', 'Sales'][range % 2 + 1] AS department,
+               range * 1.5 AS amount FROM range({rows})
+    """)
+
+
+def wal_bytes(path):
+    return os.path.getsize(f"{path}.wal") if os.path.exists(f"{path}.wal") else 0
+
+
+def churn(handler, tables=3, rows=300000):
+    """Tables written and dropped again, leaving free blocks behind."""
+    for i in range(tables):
+        table = f"{PROJECT[:8]}_reupload_{i}"
+        bulk(handler, table, rows)
+        handler.conn.execute(f'DROP TABLE "{table}"')
+    handler.conn.execute("CHECKPOINT")
+
+
+class TestCheckpoints:
+    """Tests for deferred checkpoints."""
+
+    def test_request_checkpoints_wait_for_an_idle_window(self, tmp_path, structured_handler):
+        from utils.duckdb_maintenance import request_checkpoint
+
+        path = tmp_path / 'main.duckdb'
+        handler = structured_handler(path, idle_s=3600)
+        maintenance = handler.maintenance
+        assert not request_checkpoint(handler.conn, 'not started')      # nothing to defer to: runs now
+        maintenance.start()
+        try:
+            bulk(handler, 'acme_pay', 100000)
+            handler.conn.execute("CHECKPOINT")                  # a persistence point: runs now
+            assert wal_bytes(path) == 0
+            bulk(handler, 'acme_pay', 100000)
+            assert request_checkpoint(handler.conn, 'graph.spokes')
+            assert wal_bytes(path) > 0
+            assert maintenance.report()['pending']['checkpoint_hints'] == {'graph.spokes': 1}
+
+            assert maintenance.run_once() == {}                 # not idle, not waited long enough
+            maintenance.idle_s = 0
+            done = maintenance.run_once(tasks=('checkpoint',))
+            assert done['checkpoint']['hints'] == {'graph.spokes': 1} and wal_bytes(path) == 0
+
+            # A hint is served after the maximum delay even while the connection stays busy
+            maintenance.idle_s, maintenance.checkpoint_max_delay_s = 3600, 0
+            handler.conn.execute('INSERT INTO acme_pay SELECT * FROM acme_pay LIMIT 10')
+            request_checkpoint(handler.conn, 'graph.spokes')
+            assert maintenance.run_once()['checkpoint']['hints'] == {'graph.spokes': 1} and wal_bytes(path) == 0
+
+            handler.conn.execute('INSERT INTO acme_pay SELECT * FROM acme_pay LIMIT 10')
+            handler.conn.execute("FORCE CHECKPOINT")
+            assert wal_bytes(path) == 0
+            handler.conn.execute('INSERT INTO acme_pay SELECT * FROM acme_pay LIMIT 10')
+            request_checkpoint(handler.conn, 'late')
+        finally:
+            maintenance.stop()                                  # serves what's still pending
+        assert wal_bytes(path) == 0
+        totals = maintenance.report()['totals']
+        assert (totals['hints'], totals['hints_served'], totals['checkpoints']) == (3, 3, 3)
+        assert totals['hints_by_reason']['graph.spokes'] == 2
+        handler.conn.close()
+
+    def test_bare_checkpoints_are_hints_only_when_opted_in(self, tmp_path, structured_handler):
+        from utils.tracing import trace
+
+        path = tmp_path / 'main.duckdb'
+        handler = structured_handler(path, idle_s=3600, defer_checkpoints=True)
+        maintenance = handler.maintenance
+        maintenance.start()
+        try:
+            bulk(handler, 'acme_pay', 100000)
+            handler.conn.execute("CHECKPOINT")
+            with trace('POST /api/ukg/sync'):
+                handler.conn.execute("CHECKPOINT")
+            assert wal_bytes(path) > 0
+            assert maintenance.report()['pending']['checkpoint_hints'] == \
+                   {'untraced': 1, 'POST /api/ukg/sync': 1}
+            handler.conn.execute("FORCE CHECKPOINT")
+            assert wal_bytes(path) == 0
+        finally:
+            maintenance.stop()
+        assert maintenance.report()['policy']['defer_checkpoints']
+        assert maintenance.report()['totals']['hints_served'] == 2
+        handler.conn.close()
+
+
+class TestStatisticsAndOrphans:
+    """Tests for statistics refresh and orphaned metadata cleanup."""
+
+    def test_written_tables_are_refreshed_and_orphans_removed_after_grace(self, tmp_path, structured_handler,
+                                                                           seed_table):
+        from utils.column_sketches import get_sketch_store
+
+        handler = structured_handler(tmp_path / 'main.duckdb', orphan_grace_s=3600)
+        maintenance = handler.maintenance
+        employees = seed_table(handler, PROJECT, 'employees', 2000)
+        store = get_sketch_store(handler)
+        assert store.load(employees) is not None
+        maintenance.run_once(force=True)
+
+        handler.conn.execute(f'INSERT INTO "{employees}" SELECT * FROM "{employees}" LIMIT 10')
+        assert store.load(employees) is None
+        done = maintenance.run_once(force=True)
+        assert done['statistics']['analyzed'] == [employees]
+        assert done['statistics']['sketches_rebuilt'] == [employees]
+        assert store.load(employees)['employee_id'].count == 2010
+
+        # A table dropped behind its metadata's back
+        gone = seed_table(handler, PROJECT, 'payroll', 500)
+        handler.conn.execute(f'DROP TABLE "{gone}"')
+
+        def references(table):
+            return {meta: handler.conn.execute(f"SELECT COUNT(*) FROM {meta} WHERE table_name = ?",
+                                               [table]).fetchone()[0]
+                    for meta in ('_schema_metadata', '_column_profiles', '_column_sketches', '_term_index')}
+
+        assert all(references(gone).values())
+        assert 'orphans' not in maintenance.run_once(force=True)           # still in its grace period
+        assert maintenance.report()['pending']['orphans_in_grace'] == 4
+        maintenance.orphan_grace_s = 0
+        deleted = maintenance.run_once(force=True)['orphans']['rows_deleted']
+        assert deleted['_schema_metadata'] == 1 and deleted['_column_profiles'] == 3
+        assert not any(references(gone).values()) and all(references(employees).values())
+        assert maintenance.report()['totals']['orphan_rows_by_table'] == deleted
+        handler.conn.close()
+
+
+class TestCompaction:
+    """Tests for compaction policies, the copy and the swap."""
+
+    def test_policies(self, tmp_path, structured_handler):
+        from utils.duckdb_maintenance import in_window, parse_window
+
+        assert parse_window('01:00-05:30') == (60, 330) and parse_window('') is None
+        assert parse_window('nightly') is None
+        assert in_window((60, 330), datetime(2026, 1, 1, 2, 0)) and not in_window((60, 330), datetime(2026, 1, 1, 6))
+        assert in_window((1320, 120), datetime(2026, 1, 1, 23, 30)) and in_window((1320, 120), datetime(2026, 1, 1, 1))
+        assert not in_window((1320, 120), datetime(2026, 1, 1, 12))
+
+        handler = structured_handler(tmp_path / 'main.duckdb', min_compact_mb=0, dead_ratio=0.99,
+                                     compact_growth=10.0)
+        maintenance = handler.maintenance
+        churn(handler)
+        assert not maintenance.files()[0]['due']                       # neither policy reached
+        maintenance.dead_ratio = 0.3
+        assert maintenance.files()[0]['due']
+        maintenance.window = parse_window('00:00-00:00')               # an empty window
+        assert 'compaction' not in maintenance.run_once()
+        maintenance.min_compact_bytes = 1 << 40
+        assert 'compaction' not in maintenance.run_once(force=True)
+        handler.conn.close()
+
+    @pytest.mark.parametrize('sharded', [False, True])
+    def test_compaction_gives_space_back(self, tmp_path, sharded, structured_handler, seed_table):
+        from utils.column_sketches import get_sketch_store
+
+        path = tmp_path / 'main.duckdb'
+        handler = structured_handler(path, sharded=sharded, min_compact_mb=0)
+        maintenance = handler.maintenance
+        employees = seed_table(handler, PROJECT, 'employees', 5000)
+        churn(handler)
+        target = handler.shards.path_for(PROJECT[:8]) if sharded else str(path)
+        before_bytes = os.path.getsize(target)
+        rows = handler.conn.execute(f'SELECT * FROM "{employees}" ORDER BY ALL').fetchall()
+        metadata = handler.conn.execute("SELECT * FROM _schema_metadata ORDER BY id").fetchall()
+
+        done = maintenance.run_once(force=True)['compaction']
+        assert done['file'] == os.path.basename(target) and done['shard'] == (PROJECT[:8] if sharded else None)
+        assert os.path.getsize(target) < before_bytes / 2
+        assert done['bytes_reclaimed'] == before_bytes - os.path.getsize(target)
+        assert not os.path.exists(f"{target}.compact")
+
+        assert handler.conn.execute(f'SELECT * FROM "{employees}" ORDER BY ALL').fetchall() == rows
+        assert handler.conn.execute("SELECT * FROM _schema_metadata ORDER BY id").fetchall() == metadata
+        assert get_sketch_store(handler).load(employees) is not None      # still fresh under the new table id
+        seed_table(handler, PROJECT, 'payroll', 100)                      # the sequence carried over
+        assert handler.conn.execute("SELECT COUNT(DISTINCT id) FROM _schema_metadata").fetchone()[0] == 2
+
+        report = maintenance.report()
+        assert report['totals']['bytes_reclaimed'] == done['bytes_reclaimed']
+        assert 0 < report['tasks']['compaction']['lock_ms'] < report['tasks']['compaction']['time_ms']
+        handler.conn.close()
+
+    def test_compaction_is_abandoned_when_written_or_in_use(self, tmp_path, monkeypatch, structured_handler):
+        import utils.duckdb_maintenance as dm
+
+        path = tmp_path / 'main.duckdb'
+        handler = structured_handler(path, min_compact_mb=0)
+        maintenance = handler.maintenance
+        bulk(handler, 'acme_pay', 1000)
+        churn(handler)
+        before_bytes = os.path.getsize(path)
+
+        # A request writes while the copy runs
+        unwrap = dm._duckdb_connection
+
+        def copy_during_write(conn):
+            writer = threading.Thread(
+                target=lambda: handler.conn.execute("INSERT INTO acme_pay SELECT * FROM acme_pay LIMIT 1"))
+            writer.start()
+            writer.join()
+            return unwrap(conn)
+
+        monkeypatch.setattr(dm, '_duckdb_connection', copy_during_write)
+        assert maintenance.run_once(force=True)['compaction']['abandoned'] == 'written_during_copy'
+        monkeypatch.setattr(dm, '_duckdb_connection', unwrap)
+        assert handler.conn.execute("SELECT COUNT(*) FROM acme_pay").fetchone()[0] == 1001
+        assert not os.path.exists(f"{path}.compact")
+        assert 'compaction' not in maintenance.run_once(force=True)       # backs off before retrying
+
+        # Another connection has the file open
+        maintenance._retry_after.clear()
+        other = duckdb.connect(str(path))
+        assert maintenance.run_once(force=True)['compaction']['abandoned'] == 'in_use'
+        assert handler.conn.execute("SELECT COUNT(*) FROM acme_pay").fetchone()[0] == 1001
+        other.close()
+
+        maintenance._retry_after.clear()
+        assert maintenance.run_once(force=True)['compaction']['bytes_reclaimed'] > 0
+        assert os.path.getsize(path) < before_bytes / 2
+        assert handler.conn.execute("SELECT COUNT(*) FROM acme_pay").fetchone()[0] == 1001
+        assert maintenance.report()['totals']['compactions_abandoned'] == {'written_during_copy': 1, 'in_use': 1}
+        handler.conn.close()
@@ -0,0 +1,169 @@
+"""
+Tests for Per-Project DuckDB Shards
+===================================
+Tests that project tables are created in their shard file and found again
+through attach-on-demand, that the attach limit detaches least recently
+used shards (but not ones a read has pinned), that reads of shard tables
+don't wait for the handler's lock, that dropping a shard removes its
+file, and that the migration script moves tables into shards and back without losing rows.
+"""
+
+import os
+import threading
+
+import duckdb
+
+
+PROJECTS = ['a1b2c3d4', 'b5c6d7e8', 'c9d0e1f2']
+
+
+def sharded(tmp_path, max_attached=32):
+    from utils.duckdb_shards import ShardManager
+
+    main = str(tmp_path / 'main.duckdb')
+    shards = ShardManager(main, max_attached=max_attached)
+    return shards, shards.wrap(duckdb.connect(main))
+
+
+class TestShardManager:
+    """Tests for routing, the attach limit and shard removal."""
+
+    def test_project_tables_live_in_their_shard(self, tmp_path):
+        shards, conn = sharded(tmp_path)
+        conn.execute("CREATE TABLE _schema_metadata (project VARCHAR, table_name VARCHAR)")
+        for key in PROJECTS:
+            conn.execute(f"CREATE TABLE {key}_payroll AS SELECT range AS id FROM range(10)")
+            conn.execute("INSERT INTO _schema_metadata VALUES (?, ?)", [key, f"{key}_payroll"])
+        conn.execute(f"INSERT INTO {PROJECTS[0]}_payroll VALUES (10)")
+        conn.execute("CHECKPOINT")
+        conn.close()
+
+        assert shards.known_shards == sorted(PROJECTS)
+        assert all(os.path.exists(shards.path_for(key)) for key in PROJECTS)
+
+        shards, conn = sharded(tmp_path)                        # fresh process: nothing attached
+        assert shards.attached_shards == []
+        assert conn.execute(f"SELECT COUNT(*) FROM {PROJECTS[0]}_payroll").fetchone() == (11,)
+        assert conn.execute("SELECT table_name FROM _schema_metadata WHERE project = ?",
+                            [PROJECTS[1]]).fetchall() == [(f"{PROJECTS[1]}_payroll",)]
+        assert shards.attached_shards == sorted(PROJECTS[:2])
+        assert shards.shard_tables(PROJECTS[2]) == [f"{PROJECTS[2]}_payroll"]
+        conn.close()
+
+    def test_attach_limit_detaches_least_recently_used(self, tmp_path):
+        shards, conn = sharded(tmp_path, max_attached=2)
+        for key in PROJECTS:
+            conn.execute(f"CREATE TABLE {key}_payroll AS SELECT 1 AS id")
+        assert len(shards.attached_shards) == 2 and PROJECTS[0] not in shards.attached_shards
+
+        cursor = conn.cursor()
+        assert cursor.execute(f"SELECT id FROM {PROJECTS[0]}_payroll").fetchone() == (1,)
+        assert conn.execute(f"SELECT id FROM {PROJECTS[2]}_payroll").fetchone() == (1,)
+        assert shards.attached_shards == sorted([PROJECTS[0], PROJECTS[2]])
+        assert shards.stats['detaches'] >= 2
+        conn.close()
+
+    def test_pinned_shards_are_not_detached(self, tmp_path):
+        shards, conn = sharded(tmp_path, max_attached=1)
+        conn.execute(f"CREATE TABLE {PROJECTS[0]}_payroll AS SELECT 1 AS id")
+        with shards.pinned([PROJECTS[0]]):
+            conn.execute(f"CREATE TABLE {PROJECTS[1]}_payroll AS SELECT 2 AS id")
+            assert PROJECTS[0] in shards.attached_shards
+            assert not shards.replace_file(PROJECTS[0], str(tmp_path / 'copy.duckdb'))
+        conn.execute(f"CREATE TABLE {PROJECTS[2]}_payroll AS SELECT 3 AS id")
+        assert shards.attached_shards == [PROJECTS[2]]
+        conn.close()
+
+    def test_read_keys_only_for_reads_of_known_shards(self, tmp_path):
+        shards, conn = sharded(tmp_path)
+        conn.execute(f"CREATE TABLE {PROJECTS[0]}_payroll AS SELECT 1 AS id")
+        assert shards.read_keys(f"SELECT * FROM {PROJECTS[0]}_payroll") == {PROJECTS[0]}
+        assert shards.read_keys("SELECT * FROM _schema_metadata WHERE project = ?", [PROJECTS[0]]) == {PROJECTS[0]}
+        assert shards.read_keys(f"SELECT * FROM {PROJECTS[1]}_payroll") == set()
+        assert shards.read_keys(f"DELETE FROM {PROJECTS[0]}_payroll") == set()
+        assert shards.read_keys(f"SELECT 1; DROP TABLE {PROJECTS[0]}_payroll") == set()
+        conn.close()
+
+    def test_drop_shard_removes_the_file(self, tmp_path):
+        shards, conn = sharded(tmp_path)
+        for key in PROJECTS[:2]:
+            conn.execute(f"CREATE TABLE {key}_payroll AS SELECT 1 AS id")
+            conn.execute(f"CREATE TABLE {key}_earnings AS SELECT 'REG' AS code")
+
+        assert shards.drop_shard(PROJECTS[0]) == [f"{PROJECTS[0]}_earnings", f"{PROJECTS[0]}_payroll"]
+        assert not os.path.exists(shards.path_for(PROJECTS[0]))
+        assert conn.execute(f"SELECT code FROM {PROJECTS[1]}_earnings").fetchone() == ('REG',)
+        assert shards.drop_shard(PROJECTS[0]) == [] and shards.drop_shard(None) == []
+        conn.close()
+
+
+class TestMigration:
+    """Tests for scripts/migrate_duckdb_shards.py."""
+
+    def test_migrate_and_reverse_keep_every_row(self, tmp_path):
+        from scripts.migrate_duckdb_shards import main as migrate
+        from utils.duckdb_shards import ShardManager
+
+        db = str(tmp_path / 'structured_data.duckdb')
+        conn = duckdb.connect(db)
+        conn.execute("CREATE TABLE _schema_metadata AS SELECT 'x' AS project")
+        for key in PROJECTS:
+            conn.execute(f"CREATE TABLE {key}_payroll AS SELECT range AS id FROM range(1000)")
+        conn.close()
+
+        assert migrate(['--db', db, '--compact']) == 0
+        shards = ShardManager(db)
+        assert shards.known_shards == sorted(PROJECTS)
+        conn = duckdb.connect(db)
+        assert [r[0] for r in conn.execute("SHOW TABLES").fetchall()] == ['_schema_metadata']
+        conn.close()
+        conn = shards.wrap(duckdb.connect(db))
+        assert conn.execute(f"SELECT SUM(id) FROM {PROJECTS[1]}_payroll").fetchone() == (499500,)
+        conn.close()
+
+        assert migrate(['--db', db, '--reverse']) == 0
+        assert ShardManager(db).known_shards == []
+        conn = duckdb.connect(db)
+        assert len(conn.execute("SHOW TABLES").fetchall()) == 4
+        assert conn.execute(f"SELECT COUNT(*) FROM {PROJECTS[2]}_payroll").fetchone() == (1000,)
+        conn.close()
+
+
+class TestHandlerReads:
+    """Tests for reads of shard tables outside StructuredDataHandler._db_lock."""
+
+    def test_shard_read_does_not_wait_for_the_lock(self, tmp_path, structured_handler):
+        handler = structured_handler(tmp_path / 'main.duckdb', sharded=True)
+        handler.conn.execute(f"CREATE TABLE {PROJECTS[0]}_payroll AS SELECT range AS id FROM range(5)")
+        handler.conn.execute("CREATE TABLE shared_lookup AS SELECT 1 AS id")
+
+        locked, release = threading.Event(), threading.Event()
+
+        def ingest():
+            with handler._db_lock:
+                locked.set()
+                release.wait(10)
+
+        writer = threading.Thread(target=ingest)
+        writer.start()
+        locked.wait(10)
+        try:
+            results = {}
+
+            def read(name, sql):
+                results[name] = handler.safe_fetchall(sql, cache=False)
+
+            shard_read = threading.Thread(target=read, args=('shard', f"SELECT COUNT(*) FROM {PROJECTS[0]}_payroll"))
+            shared_read = threading.Thread(target=read, args=('shared', "SELECT COUNT(*) FROM shared_lookup"))
+            shard_read.start()
+            shared_read.start()
+            shard_read.join(5)
+            assert results.get('shard') == [(5,)]
+            assert 'shared' not in results                       # still queued on the lock
+            assert handler.query(f"SELECT id FROM {PROJECTS[0]}_payroll ORDER BY id LIMIT 1", cache=False) == [{'id': 0}]
+        finally:
+            release.set()
+            writer.join()
+        shared_read.join(5)
+        assert results['shared'] == [(1,)]
+        assert handler.shards.stats['unlocked_reads'] >= 2
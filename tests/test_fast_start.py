@@ -0,0 +1,168 @@
+"""
+Tests for Fast-Start Router Loading
+===================================
+Tests that with XLR8_FAST_START the app imports within a cold-start budget
+without pulling in the heavy router stack, that a request loads only the
+router serving its prefix, and that lazy loading keeps eager route order.
+"""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Cold import of backend.main in fast-start mode (measured ~0.3s; eager is ~5s)
+COLD_START_BUDGET_SECONDS = 2.0
+
+# External services stubbed out: no credentials, nothing to connect to
+STUB_ENV = {
+    'XLR8_FAST_START': 'true',
+    'XLR8_WARMUP_DELAY_SECONDS': '-1',
+    'SUPABASE_URL': '',
+    'SUPABASE_KEY': '',
+    'SUPABASE_SERVICE_KEY': '',
+    'ANTHROPIC_API_KEY': '',
+    'OLLAMA_URL': 'http://127.0.0.1:9',
+    'LLM_ENDPOINT': 'http://127.0.0.1:9',
+    'CHROMA_HOST': '127.0.0.1',
+    'CHROMA_PORT': '9',
+}
+
+COLD_START_SCRIPT = '''
+import json, sys, time
+start = time.perf_counter()
+import backend.main as main
+import_seconds = time.perf_counter() - start
+
+import asyncio
+import httpx
+
+async def run():
+    await main.startup_event()
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        status = (await client.get("/api/metrics/gatherers")).status_code
+        report = (await client.get("/api/debug/startup")).json()
+    return status, report
+
+heavy = ["backend.routers.upload", "backend.routers.smart_router", "chromadb", "backend.utils.intelligence.engine"]
+before = {m: m in sys.modules for m in heavy}
+status, report = asyncio.run(run())
+print(json.dumps({"import_seconds": import_seconds, "heavy_loaded": before, "status": status, "report": report}))
+'''
+
+
+def _cold_start():
+    env = {**os.environ, **STUB_ENV}
+    proc = subprocess.run([sys.executable, '-c', COLD_START_SCRIPT], cwd=REPO_ROOT, env=env,
+                          capture_output=True, text=True, timeout=300)
+    assert proc.returncode == 0, proc.stderr[-2000:]
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+class TestFastStart:
+    """Tests for lazy router registration in backend.main."""
+
+    def test_cold_start_budget(self):
+        """Fast-start import is within budget and defers heavy routers to first request."""
+        result = _cold_start()
+
+        assert result['import_seconds'] < COLD_START_BUDGET_SECONDS
+        assert not any(result['heavy_loaded'].values()), result['heavy_loaded']
+
+        assert result['status'] == 200
+        report = result['report']
+        assert report['mode'] == 'fast_start'
+        assert report['ready_ms'] is not None
+        loaded = [r for r in report['routers'] if r['status'] != 'pending']
+        assert [r['name'] for r in loaded] == ['metrics']
+        assert loaded[0]['loaded_by'] == 'request'
+        assert loaded[0]['import_ms'] > 0
+        assert 'rss_delta_mb' in loaded[0]
+
+
+class TestRouterLoader:
+    """Tests for RouterLoader ordering and path matching."""
+
+    @pytest.fixture
+    def specs(self, tmp_path, monkeypatch):
+        from backend.utils.router_loader import RouterSpec
+
+        pkg = tmp_path / 'lazy_routers'
+        pkg.mkdir()
+        (pkg / '__init__.py').write_text('')
+        (pkg / 'first.py').write_text(
+            'from fastapi import APIRouter\nrouter = APIRouter()\n'
+            '@router.get("/items/{item_id}")\ndef item(item_id: str):\n    return {"router": "first"}\n'
+        )
+        (pkg / 'second.py').write_text(
+            'from fastapi import APIRouter\nrouter = APIRouter()\n'
+            '@router.get("/items/special")\ndef special():\n    return {"router": "second"}\n'
+            '@router.get("/other")\ndef other():\n    return {"router": "second"}\n'
+        )
+        monkeypatch.syspath_prepend(str(tmp_path))
+        yield [
+            RouterSpec('first', 'lazy_routers.first', ['/api/items'], prefix='/api'),
+            RouterSpec('second', 'lazy_routers.second', ['/api/items', '/api/other'], prefix='/api'),
+            RouterSpec('missing', 'lazy_routers.missing', ['/api/missing'], prefix='/api'),
+        ]
+        for name in [m for m in sys.modules if m.startswith('lazy_routers')]:
+            del sys.modules[name]
+
+    def _app(self, specs, fast_start):
+        from fastapi import FastAPI
+        from backend.utils.router_loader import RouterLoader, LazyRouterMiddleware
+
+        app = FastAPI()
+        loader = RouterLoader(app, specs, fast_start=fast_start)
+        app.add_middleware(LazyRouterMiddleware, loader=loader)
+        loader.register_all()
+
+        @app.get('/{full_path:path}')
+        def spa(full_path: str):
+            return {'router': 'spa'}
+
+        loader.mark_tail(app.router.routes[-1:])
+        return app, loader
+
+    def test_lazy_load_keeps_eager_order(self, specs):
+        """Loading the later router first still leaves the earlier one matching first."""
+        app, loader = self._app(specs, fast_start=True)
+        loader.load(specs[1], 'warmup')
+        loader.load(specs[0], 'warmup')
+
+        paths = [r.path for r in app.router.routes if r.path.startswith('/api') or r.path.startswith('/{')]
+        assert paths == ['/api/items/{item_id}', '/api/items/special', '/api/other', '/{full_path:path}']
+        assert specs[2].status == 'pending'
+
+    @pytest.mark.asyncio
+    async def test_request_loads_only_its_router(self, specs):
+        """A request loads the routers serving its prefix; unknown /api paths load the rest."""
+        import httpx
+
+        app, loader = self._app(specs, fast_start=True)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+            assert (await client.get('/api/other')).json() == {'router': 'second'}
+            assert [s.status for s in specs] == ['pending', 'loaded', 'pending']
+
+            assert (await client.get('/api/items/special')).json() == {'router': 'first'}
+            assert specs[0].loaded_by == 'request'
+
+            assert (await client.get('/api/unknown')).json() == {'router': 'spa'}
+            assert specs[2].status == 'failed'
+
+        report = loader.report()
+        assert report['routers_failed'] == ['missing']
+        assert report['routers_pending'] == 0
+
+    def test_required_router_fails_eager_start(self, specs):
+        """A required router that cannot import stops an eager start."""
+        specs[2].required = True
+        with pytest.raises(ImportError):
+            self._app(specs, fast_start=False)
@@ -0,0 +1,183 @@
+"""
+Tests for Concurrent Gather Scheduler
+======================================
+Tests that gatherers run concurrently within their budgets, that late or
+failing gatherers are reported without blocking the rest, and that the
+engine assembles partial answers from whatever arrived in time.
+"""
+
+import time
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def reset_stats():
+    from backend.utils.intelligence.gather_scheduler import reset_gather_stats
+
+    reset_gather_stats()
+    yield
+    reset_gather_stats()
+
+
+def _sleeper(seconds, result=None):
+    def fn(cancel_event):
+        cancel_event.wait(seconds)
+        return result
+    return fn
+
+
+class TestGatherScheduler:
+    """Tests for GatherTask scheduling, budgets and histograms."""
+
+    def test_runs_concurrently(self):
+        """Independent tasks take about as long as the slowest one."""
+        from backend.utils.intelligence.gather_scheduler import GatherTask, run_gather_tasks
+
+        tasks = [GatherTask(f'g{i}', _sleeper(0.2, i), budget_ms=2000) for i in range(4)]
+        start = time.monotonic()
+        outcomes = run_gather_tasks(tasks)
+        elapsed = time.monotonic() - start
+
+        assert elapsed < 0.6
+        assert [outcomes[f'g{i}']['result'] for i in range(4)] == [0, 1, 2, 3]
+        assert all(o['status'] == 'ok' for o in outcomes.values())
+
+    def test_timeout_and_error_do_not_block_others(self):
+        """A slow task times out at its budget; an error is reported, not raised."""
+        from backend.utils.intelligence.gather_scheduler import GatherTask, run_gather_tasks
+
+        def boom(cancel_event):
+            raise RuntimeError('chroma down')
+
+        slow = GatherTask('slow', _sleeper(5, 'late'), budget_ms=100)
+        tasks = [slow, GatherTask('bad', boom, budget_ms=1000), GatherTask('fast', _sleeper(0.01, 'ok'), budget_ms=1000)]
+
+        start = time.monotonic()
+        outcomes = run_gather_tasks(tasks)
+
+        assert time.monotonic() - start < 1.0
+        assert outcomes['slow']['status'] == 'timeout'
+        assert outcomes['slow']['result'] is None
+        assert slow.cancel_event.is_set()
+        assert outcomes['bad'] == {**outcomes['bad'], 'status': 'error', 'error': 'chroma down'}
+        assert outcomes['fast']['result'] == 'ok'
+
+    def test_lane_runs_serially_and_skips_expired(self):
+        """Tasks sharing a lane run one at a time; queued ones past budget never start."""
+        from backend.utils.intelligence.gather_scheduler import GatherTask, run_gather_tasks
+
+        started = []
+
+        def record(name, seconds):
+            def fn(cancel_event):
+                started.append(name)
+                time.sleep(seconds)
+                return name
+            return fn
+
+        tasks = [
+            GatherTask('first', record('first', 0.3), budget_ms=2000, lane='duckdb'),
+            GatherTask('second', record('second', 0.0), budget_ms=100, lane='duckdb'),
+        ]
+        outcomes = run_gather_tasks(tasks)
+
+        assert outcomes['first']['status'] == 'ok'
+        assert outcomes['second']['status'] == 'timeout'
+        time.sleep(0.05)
+        assert started == ['first']
+
+    def test_histograms(self):
+        """Each outcome is observed once per gatherer."""
+        from backend.utils.intelligence.gather_scheduler import (
+            GatherTask, run_gather_tasks, get_gather_stats, get_gather_stats_prometheus
+        )
+
+        for _ in range(3):
+            run_gather_tasks([GatherTask('intent', _sleeper(0.0), budget_ms=1000)])
+        run_gather_tasks([GatherTask('intent', _sleeper(1), budget_ms=50)])
+
+        stats = get_gather_stats()['intent']
+        assert stats['count'] == 4
+        assert (stats['ok'], stats['timeout'], stats['error']) == (3, 1, 0)
+        assert stats['p50_ms'] == 50.0
+        assert 'xlr8_gather_latency_ms_count{gatherer="intent"} 4' in get_gather_stats_prometheus()
+
+    def test_budget_env_override(self, monkeypatch):
+        """Budgets can be overridden per truth type."""
+        from backend.utils.intelligence.gather_scheduler import get_gather_budget_ms
+
+        monkeypatch.setenv('INTELLIGENCE_GATHER_BUDGET_INTENT_MS', '1234')
+        assert get_gather_budget_ms('intent') == 1234
+        assert get_gather_budget_ms('reality') == 30000
+
+
+class StubGatherer:
+    """Gatherer stand-in that sleeps, then returns fixed truths."""
+
+    def __init__(self, storage_type, seconds, truths, adds=None):
+        self.storage_type = storage_type
+        self.seconds = seconds
+        self.truths = truths
+        self.adds = adds or {}
+
+    def gather(self, question, context):
+        context['_cancel_event'].wait(self.seconds)
+        context.update(self.adds)
+        return list(self.truths)
+
+
+class TestEngineConcurrentGather:
+    """Tests for IntelligenceEngineV2 partial answer assembly."""
+
+    @pytest.fixture
+    def engine(self, monkeypatch):
+        from backend.utils.intelligence import engine as engine_module
+        from backend.utils.intelligence.types import StorageType
+
+        for flag in ('TRUTH_ROUTER_AVAILABLE', 'CITATION_TRACKER_AVAILABLE', 'GAP_DETECTOR_AVAILABLE'):
+            monkeypatch.setattr(engine_module, flag, False)
+        monkeypatch.setenv('INTELLIGENCE_GATHER_BUDGET_REGULATORY_MS', '100')
+
+        engine = engine_module.IntelligenceEngineV2.__new__(engine_module.IntelligenceEngineV2)
+        engine._pending_clarification = None
+        engine.reality_gatherer = StubGatherer(StorageType.DUCKDB, 0.05, ['r1'], {'resolved_table': 'emp'})
+        engine.configuration_gatherer = StubGatherer(StorageType.DUCKDB, 0.05, ['c1'])
+        engine.intent_gatherer = StubGatherer(StorageType.CHROMADB, 0.05, ['i1'])
+        engine.reference_gatherer = StubGatherer(StorageType.CHROMADB, 0.05, ['ref1'])
+        engine.regulatory_gatherer = StubGatherer(StorageType.CHROMADB, 5, ['reg1'])
+        engine.compliance_gatherer = None
+        return engine
+
+    def test_partial_answer_from_truths_in_time(self, engine):
+        """Slow gatherers are dropped and reported; the rest are kept."""
+        analysis = {'domains': ['hcm']}
+        start = time.monotonic()
+        gathered, meta = engine._gather_truths_concurrently('how many employees?', analysis)
+
+        assert time.monotonic() - start < 1.0
+        assert gathered['reality'] == ['r1']
+        assert gathered['configuration'] == ['c1']
+        assert gathered['intent'] == ['i1']
+        assert gathered['reference'] == ['ref1']
+        assert gathered['regulatory'] == []
+        assert gathered['compliance'] == []
+        assert meta['timed_out'] == ['regulatory']
+        assert meta['partial'] is True
+        assert meta['gatherers']['regulatory']['budget_ms'] == 100
+        # Keys a gatherer added to its copy of analysis are merged back
+        assert analysis['resolved_table'] == 'emp'
+        assert '_cancel_event' not in analysis
+
+    def test_clarification_cancels_remaining(self, engine):
+        """A pending clarification from reality cancels the other gatherers."""
+        engine.reality_gatherer.adds = {'pending_clarification': 'which company?'}
+        engine.intent_gatherer.seconds = 5
+
+        start = time.monotonic()
+        gathered, meta = engine._gather_truths_concurrently('how many employees?', {})
+
+        assert time.monotonic() - start < 1.0
+        assert engine._pending_clarification == 'which company?'
+        assert meta['gatherers']['intent']['status'] == 'cancelled'
+        assert gathered['intent'] == []
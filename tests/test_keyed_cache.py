@@ -0,0 +1,133 @@
+"""
+Tests for KeyedCache
+=====================
+Tests per-key caching, stale-while-revalidate, single-flight and invalidation.
+"""
+
+import asyncio
+import threading
+
+from backend.utils.keyed_cache import KeyedCache
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class TestKeyedCache:
+    """Tests for KeyedCache."""
+
+    def test_keys_do_not_evict_each_other(self):
+        """Different projects keep their own entries."""
+        cache = KeyedCache('test', ttl=60)
+        calls = []
+
+        async def scenario():
+            for project in ['acme', 'globex', 'acme', 'globex']:
+                await cache.get((project, 'none'), lambda p=project: calls.append(p) or {'project': p})
+
+        run(scenario())
+
+        assert calls == ['acme', 'globex']
+        stats = cache.stats()
+        assert stats['hits'] == 2
+        assert stats['misses'] == 2
+
+    def test_concurrent_misses_share_one_load(self):
+        """Single-flight: concurrent misses for a key run the loader once."""
+        cache = KeyedCache('test', ttl=60)
+        calls = []
+
+        async def loader():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return {'value': 42}
+
+        async def scenario():
+            return await asyncio.gather(*[cache.get(('acme',), loader) for _ in range(5)])
+
+        results = run(scenario())
+
+        assert len(calls) == 1
+        assert all(value == {'value': 42} for value, _ in results)
+        assert cache.stats()['coalesced'] == 4
+
+    def test_stale_value_served_while_refreshing(self):
+        """After TTL the stale value is returned and refreshed in the background, on the same loop."""
+        cache = KeyedCache('test', ttl=0.05, stale_ttl=60)
+        version = {'n': 0}
+        threads = []
+
+        async def loader():
+            threads.append(threading.get_ident())
+            version['n'] += 1
+            return version['n']
+
+        async def scenario():
+            await cache.get(('acme',), loader)
+            await asyncio.sleep(0.1)
+
+            value, info = await cache.get(('acme',), loader)
+            assert value == 1
+            assert info['state'] == 'stale'
+
+            for _ in range(50):
+                await asyncio.sleep(0.02)
+                value, info = await cache.get(('acme',), loader)
+                if value == 2:
+                    break
+            return value
+
+        assert run(scenario()) == 2
+        assert threads == [threading.get_ident()] * 2
+        assert cache.stats()['stale_served'] >= 1
+        assert cache.stats()['refreshes'] == 1
+
+    def test_invalidate_by_project_keeps_other_projects(self):
+        """Project invalidation drops that project and global entries only."""
+        cache = KeyedCache('test', ttl=60)
+
+        async def scenario():
+            await cache.get(('acme', 'none'), lambda: 'a')
+            await cache.get(('globex', 'none'), lambda: 'g')
+            await cache.get((None, 30), lambda: 'global')
+
+        run(scenario())
+        removed = cache.invalidate('ACME')
+
+        assert removed == 2
+        _, info = run(cache.get(('globex', 'none'), lambda: 'g2'))
+        assert info['state'] == 'hit'
+        _, info = run(cache.get(('acme', 'none'), lambda: 'a2'))
+        assert info['state'] == 'miss'
+
+    def test_finished_job_invalidates_its_project(self, monkeypatch):
+        """A completed job drops its project's and global entries, not other projects'."""
+        from types import SimpleNamespace
+        from backend.utils import keyed_cache
+        from utils.database import models
+
+        cache = KeyedCache('test', ttl=60)
+        monkeypatch.setattr(keyed_cache, '_caches', {'test': cache})
+
+        class Table:
+            def update(self, data):
+                return self
+
+            def eq(self, column, value):
+                return self
+
+            def execute(self):
+                return SimpleNamespace(data=[{'id': 'job1', 'input_data': {'customer_id': 'acme'}}])
+
+        monkeypatch.setattr(models, 'get_supabase', lambda: SimpleNamespace(table=lambda name: Table()))
+
+        async def scenario():
+            for key in [('acme', 'none'), ('globex', 'none'), (None, 30)]:
+                await cache.get(key, lambda: 'v')
+
+        run(scenario())
+        assert models.ProcessingJobModel.complete('job1')
+
+        states = [run(cache.get(key, lambda: 'v'))[1]['state'] for key in [('acme', 'none'), ('globex', 'none'), (None, 30)]]
+        assert states == ['miss', 'hit', 'miss']
@@ -0,0 +1,98 @@
+"""
+Tests for Lineage Closure Store
+===============================
+Tests that the local lineage store answers ancestors/descendants at any
+depth exactly as a breadth-first walk of the edges would, through
+incremental inserts, batch rebuilds, deletes and cycles, and that
+LineageModel mirrors writes into it and serves traversals from it.
+"""
+
+import random
+from collections import defaultdict
+
+import pytest
+
+
+def bfs_depths(edges, start, forward=True):
+    adjacent = defaultdict(set)
+    for source, target in edges:
+        adjacent[source if forward else target].add(target if forward else source)
+    depth, queue = {start: 0}, [start]
+    for node in queue:
+        for nxt in adjacent[node]:
+            if nxt not in depth:
+                depth[nxt] = depth[node] + 1
+                queue.append(nxt)
+    return depth
+
+
+def edge(source, target, project='p1'):
+    return {'source_type': 'node', 'source_id': source, 'target_type': 'node', 'target_id': target,
+            'relationship': 'derived', 'project_id': project}
+
+
+class TestLineageStore:
+    """Tests for LineageStore closure maintenance."""
+
+    @pytest.mark.parametrize('incremental_max', [0, 1000])
+    def test_matches_bfs_through_inserts_and_deletes(self, incremental_max):
+        from utils.database.lineage_store import LineageStore
+
+        store = LineageStore(incremental_max=incremental_max)
+        rng = random.Random(5)
+        edges = set()
+        for step in range(20):
+            batch = {(rng.randrange(25), rng.randrange(25)) for _ in range(rng.randint(1, 6))}
+            edges |= batch
+            store.add_edges([edge(s, t) for s, t in batch])
+            if step % 4 == 3:
+                victim, side = rng.randrange(25), ('source', 'target')[step % 2]
+                store.delete_edges('node', victim, 'p1', side)
+                edges = {e for e in edges if e[0 if side == 'source' else 1] != victim}
+
+            for node in range(25):
+                for forward in (True, False):
+                    depth = bfs_depths(edges, node, forward)
+                    lookup = store.descendants if forward else store.ancestors
+                    rows = lookup('node', node, 'p1', max_depth=100)
+                    near = 'source_id' if forward else 'target_id'
+                    assert {(int(r['source_id']), int(r['target_id'])) for r in rows} == \
+                        {(s, t) for s, t in edges if (s if forward else t) in depth}
+                    assert all(r['depth'] == depth[int(r[near])] + 1 for r in rows)
+
+    def test_projects_and_max_depth(self):
+        from utils.database.lineage_store import LineageStore
+
+        store = LineageStore()
+        store.add_edges([edge('a', 'b'), edge('b', 'c'), edge('c', 'd'), edge('a', 'x', project='p2')])
+        assert [r['target_id'] for r in store.descendants('node', 'a', 'p1')] == ['b', 'c', 'd']
+        assert [r['target_id'] for r in store.descendants('node', 'a', 'p1', max_depth=2)] == ['b', 'c']
+        assert sorted(r['target_id'] for r in store.descendants('node', 'a')) == ['b', 'c', 'd', 'x']
+        assert store.descendants('node', 'missing') == []
+
+
+class TestLineageModelLocal:
+    """Tests for LineageModel with the local store and no Supabase."""
+
+    def test_track_and_traverse(self, monkeypatch):
+        from utils.database import lineage_store, models
+        from utils.database.models import LineageModel
+
+        monkeypatch.setattr(lineage_store, '_store', lineage_store.LineageStore())
+        monkeypatch.setattr(models, 'get_supabase', lambda: None)
+
+        LineageModel.track('file', 'w2.pdf', 'table', 'acme__w2', 'parsed', project_id='acme')
+        LineageModel.track_batch([
+            {'source_type': 'table', 'source_id': 'acme__w2', 'target_type': 'analysis',
+             'target_id': 'run1', 'relationship': 'analyzed', 'project_id': 'acme'},
+            {'source_type': 'analysis', 'source_id': 'run1', 'target_type': 'finding',
+             'target_id': 'f1', 'relationship': 'generated', 'project_id': 'acme'},
+        ])
+
+        descendants = LineageModel.get_descendants('file', 'w2.pdf', 'acme')
+        assert [(d['target_id'], d['depth']) for d in descendants] == [('acme__w2', 1), ('run1', 2), ('f1', 3)]
+        assert LineageModel.get_root_files('finding', 'f1', 'acme') == ['w2.pdf']
+
+        LineageModel.delete_for_source('file', 'w2.pdf', 'acme')
+        assert LineageModel.get_root_files('finding', 'f1', 'acme') == []
+        assert [d['target_id'] for d in LineageModel.get_descendants('table', 'acme__w2', 'acme')] == ['run1', 'f1']
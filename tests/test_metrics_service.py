@@ -0,0 +1,112 @@
+"""
+Tests for MetricsService background writer
+===========================================
+Tests buffering, bulk flush, local spill and replay.
+"""
+
+import os
+import json
+import pytest
+from unittest.mock import MagicMock
+
+
+class TestMetricsWriter:
+    """Tests for MetricsWriter."""
+
+    @pytest.fixture
+    def client(self):
+        return MagicMock()
+
+    @pytest.fixture
+    def writer(self, client, temp_dir):
+        from backend.utils.metrics_service import MetricsWriter
+        w = MetricsWriter(
+            'platform_metrics',
+            lambda: client,
+            batch_size=3,
+            flush_interval=60,
+            max_buffer=5,
+            spill_path=os.path.join(temp_dir, 'spill.jsonl'),
+        )
+        yield w
+
+    def test_enqueue_does_not_insert(self, writer, client):
+        """Recording a metric performs no remote I/O on the caller's thread."""
+        assert writer.enqueue({'metric_type': 'llm_call'})
+        client.table.assert_not_called()
+        assert writer.stats()['buffered'] == 1
+
+    def test_flush_writes_in_bulk(self, writer, client):
+        """Buffered events are inserted as batches of batch_size."""
+        for i in range(5):
+            writer.enqueue({'metric_type': 'query', 'duration_ms': i})
+
+        assert writer.flush() == 5
+
+        inserts = client.table.return_value.insert.call_args_list
+        assert [len(c.args[0]) for c in inserts] == [3, 2]
+        stats = writer.stats()
+        assert stats['flushed'] == 5
+        assert stats['buffered'] == 0
+
+    def test_back_pressure_drops_and_counts(self, writer):
+        """Events beyond max_buffer are dropped, not blocked on."""
+        results = [writer.enqueue({'metric_type': 'query'}) for _ in range(7)]
+
+        assert results.count(False) == 2
+        assert writer.stats()['dropped'] == 2
+        assert writer.stats()['buffered'] == 5
+
+    def test_failed_insert_spills_and_replays(self, writer, client):
+        """Failed inserts go to the spill file and are replayed later."""
+        client.table.return_value.insert.return_value.execute.side_effect = Exception("supabase down")
+        writer.enqueue({'metric_type': 'upload', 'filename': 'a.xlsx'})
+        writer.enqueue({'metric_type': 'upload', 'filename': 'b.xlsx'})
+
+        assert writer.flush() == 0
+        with open(writer.spill_path) as f:
+            spilled = [json.loads(line) for line in f]
+        assert [r['filename'] for r in spilled] == ['a.xlsx', 'b.xlsx']
+        assert writer.stats()['spilled'] == 2
+
+        client.table.return_value.insert.return_value.execute.side_effect = None
+        assert writer.replay_spill() == 2
+        assert not os.path.exists(writer.spill_path)
+        assert writer.stats()['replayed'] == 2
+
+    def test_stop_flushes_remaining(self, writer, client):
+        """Shutdown hook drains the buffer."""
+        writer.start()
+        writer.enqueue({'metric_type': 'error'})
+        writer.stop(timeout=2)
+
+        assert writer.stats()['flushed'] == 1
+        assert writer.stats()['running'] is False
+
+    def test_replay_finishes_a_leftover_replay_file_first(self, writer, client):
+        """A .replay file left by a crash mid-replay is not overwritten by the next claim."""
+        with open(f"{writer.spill_path}.replay", 'w') as f:
+            f.write(json.dumps({'metric_type': 'upload', 'filename': 'crashed.xlsx'}) + "\n")
+        with open(writer.spill_path, 'w') as f:
+            f.write(json.dumps({'metric_type': 'upload', 'filename': 'spilled.xlsx'}) + "\n")
+
+        assert writer.replay_spill() == 2
+        inserted = [r['filename'] for c in client.table.return_value.insert.call_args_list for r in c.args[0]]
+        assert inserted == ['crashed.xlsx', 'spilled.xlsx']
+        assert not os.path.exists(writer.spill_path) and not os.path.exists(f"{writer.spill_path}.replay")
+
+
+class TestMetricsService:
+    """Tests for MetricsService routing."""
+
+    def test_no_client_skips_instead_of_spilling(self, monkeypatch):
+        """Without a Supabase client, metrics are skipped - not buffered and spilled."""
+        import backend.utils.metrics_service as ms
+
+        enqueued = []
+        monkeypatch.setattr(ms.MetricsService, '_get_client', staticmethod(lambda: None))
+        monkeypatch.setattr(ms.MetricsService, 'get_writer',
+                            staticmethod(lambda: MagicMock(enqueue=enqueued.append)))
+        assert ms.MetricsService._emit({'metric_type': 'query'}) is False
+        assert ms.MetricsService.start() is False
+        assert enqueued == []
@@ -0,0 +1,147 @@
+"""
+Tests for the PDF Page Pipeline
+===============================
+Tests that only pages without a text layer are OCR'd, that DPI steps up
+only while confidence is poor, that OCR results are reused by page content
+hash, that ingestion OCRs the scans in mixed PDFs, that documents share
+one OCR process pool, and (when Tesseract is installed) real page-parallel
+OCR.
+"""
+
+import io
+import shutil
+
+import pytest
+
+pytest.importorskip("pymupdf")
+
+
+def _scan_image(text: str, seed: int = 0):
+    """A 'scanned' page: text drawn onto a grayscale image."""
+    from PIL import Image, ImageDraw, ImageFont
+
+    image = Image.new('L', (850, 1100), color=255)
+    draw = ImageDraw.Draw(image)
+    try:
+        font = ImageFont.load_default(size=28)
+    except TypeError:
+        font = ImageFont.load_default()
+    for line in range(12):
+        draw.text((60, 80 + line * 70), f"{text} line {line} ref {seed}", fill=0, font=font)
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def make_pdf(path, pages):
+    """pages: list of ('text', str) or ('scan', str) entries."""
+    import pymupdf
+
+    doc = pymupdf.open()
+    for i, (kind, content) in enumerate(pages):
+        page = doc.new_page(width=612, height=792)
+        if kind == 'text':
+            page.insert_text((72, 72), f"{content} - page {i + 1} has a real text layer")
+        else:
+            page.insert_image(page.rect, stream=_scan_image(content, i))
+    doc.save(str(path))
+    doc.close()
+    return str(path)
+
+
+@pytest.fixture
+def fake_ocr(monkeypatch, tmp_path):
+    """Fake Tesseract: confidence rises with render size (DPI)."""
+    from utils import pdf_ocr
+
+    calls = []
+
+    def ocr_image(image):
+        dpi = round(image.width / 612 * 72)
+        calls.append(dpi)
+        return f"scanned text at {dpi}", {100: 40.0, 200: 85.0, 300: 95.0}.get(dpi, 0.0)
+
+    monkeypatch.setattr(pdf_ocr, 'ocr_image', ocr_image)
+    monkeypatch.setattr(pdf_ocr, 'ocr_available', lambda: True)
+    monkeypatch.setattr(pdf_ocr, 'CACHE_DIR', str(tmp_path / 'cache'))
+    return calls
+
+
+class TestPagePipeline:
+    """Tests for per-page text layer / OCR decisions."""
+
+    def test_ocr_only_pages_without_text(self, tmp_path, fake_ocr):
+        from utils.pdf_ocr import extract_pdf_pages
+
+        path = make_pdf(tmp_path / 'mixed.pdf', [('text', 'Plan summary'), ('scan', 'Dental'),
+                                                 ('text', 'Eligibility'), ('scan', 'Vision')])
+        result = extract_pdf_pages(path, workers=1)
+
+        assert [p.method for p in result.pages] == ['text', 'ocr', 'text', 'ocr']
+        scanned = result.pages[1]
+        assert scanned.dpi == 200 and scanned.confidence == 85.0
+        assert scanned.attempts == [(100, 40.0), (200, 85.0)]
+        assert fake_ocr == [100, 200, 100, 200]
+        assert 'Eligibility' in result.text and 'scanned text at 200' in result.text
+
+        report = result.report()
+        assert report['methods'] == {'text': 2, 'ocr': 2}
+        assert report['mean_ocr_confidence'] == 85.0
+        assert all('seconds' in p and 'chars' in p for p in report['pages'])
+
+    def test_reupload_skips_ocr(self, tmp_path, fake_ocr):
+        """Pages are cached by content hash - a re-upload (even renamed, reordered) is not OCR'd."""
+        from utils.pdf_ocr import extract_pdf_pages
+
+        first = make_pdf(tmp_path / 'a.pdf', [('scan', 'Medical'), ('scan', 'Dental')])
+        extract_pdf_pages(first, workers=1)
+        assert len(fake_ocr) == 4
+
+        fake_ocr.clear()
+        again = extract_pdf_pages(make_pdf(tmp_path / 'copy.pdf', [('scan', 'Medical'), ('scan', 'Dental')]),
+                                  workers=1)
+        assert fake_ocr == []
+        assert [p.method for p in again.pages] == ['cache', 'cache']
+        assert again.pages[0].confidence == 85.0
+
+        changed = extract_pdf_pages(make_pdf(tmp_path / 'b.pdf', [('scan', 'Medical'), ('scan', 'Life')]),
+                                    workers=1)
+        assert [p.method for p in changed.pages] == ['cache', 'ocr']
+
+    def test_reads_past_ten_pages(self, tmp_path, monkeypatch):
+        from utils import text_extraction
+
+        path = make_pdf(tmp_path / 'long.pdf', [('text', f'Section {i}') for i in range(14)])
+        monkeypatch.setattr(text_extraction, 'EXTRACTION_MODE', 'serial')
+        assert 'Section 13' not in text_extraction.extract_text(path)
+        assert 'Section 13' in text_extraction.extract_text(path, max_pages=None, mode='parallel')
+
+    def test_upload_ocrs_scans_in_mixed_pdf(self, tmp_path, fake_ocr):
+        """Ingestion OCRs the scanned pages of a PDF whose other pages have plenty of text."""
+        from backend.routers.upload import extract_text
+
+        path = make_pdf(tmp_path / 'mixed.pdf', [('text', 'Plan summary ' * 10), ('scan', 'Dental'),
+                                                 ('text', 'Eligibility ' * 10)])
+        text = extract_text(path)
+        assert text.index('Plan summary') < text.index('scanned text at 200') < text.index('Eligibility')
+
+    def test_ocr_pool_is_shared(self):
+        """Documents share one spawn pool per worker count; a broken pool is replaced."""
+        from utils import pdf_ocr
+
+        pool = pdf_ocr._ocr_pool(2)
+        assert pdf_ocr._ocr_pool(2) is pool
+        pdf_ocr._discard_ocr_pool(pool)
+        assert pdf_ocr._ocr_pool(2) is not pool
+
+    @pytest.mark.skipif(shutil.which('tesseract') is None, reason="tesseract not installed")
+    def test_parallel_tesseract(self, tmp_path, monkeypatch):
+        from utils import pdf_ocr
+
+        monkeypatch.setattr(pdf_ocr, 'CACHE_DIR', str(tmp_path / 'cache'))
+        path = make_pdf(tmp_path / 'scan.pdf', [('scan', f'Benefit booklet {i}') for i in range(4)])
+        result = pdf_ocr.extract_pdf_pages(path, workers=2)
+
+        assert result.workers == 2
+        assert [p.method for p in result.pages] == ['ocr'] * 4
+        assert 'booklet' in result.text.lower()
@@ -0,0 +1,94 @@
+"""
+Tests for Playbook Progress Store
+=================================
+Tests that playbook progress is stored per action in SQLite, migrated once
+from the legacy JSON file, and that concurrent updaters from several
+threads and manager instances (standing in for worker processes) never
+lose each other's writes.
+"""
+
+import json
+import time
+import threading
+
+
+class TestProgressStore:
+    """Tests for ProgressManager."""
+
+    def test_read_api_and_partial_update(self, tmp_path):
+        from backend.utils.playbook_framework import ProgressManager, ActionProgress, ActionStatus
+
+        pm = ProgressManager(str(tmp_path / 'progress.db'), legacy_json_path=None)
+        assert pm.get_raw_progress('year-end', 'acme') == {}
+        assert pm.get_action_progress('year-end', 'acme', '2A').status == ActionStatus.NOT_STARTED
+
+        pm.update_action_progress('year-end', 'acme', ActionProgress(
+            '2A', ActionStatus.IN_PROGRESS, findings={'summary': 'ok'}, documents_found=['w2.pdf']))
+        pm.bulk_update('year-end', 'acme', {'2B': ActionProgress('2B', ActionStatus.BLOCKED)})
+        pm.patch_action_progress('year-end', 'acme', '2A', {'status': 'complete', 'notes': 'signed off'})
+
+        progress = pm.get_project_progress('year-end', 'acme')
+        assert set(progress) == {'2A', '2B'} and progress['2B'].status == ActionStatus.BLOCKED
+        assert progress['2A'].status == ActionStatus.COMPLETE and progress['2A'].notes == 'signed off'
+        assert progress['2A'].findings == {'summary': 'ok'} and progress['2A'].documents_found == ['w2.pdf']
+        assert pm.get_raw_progress('year-end', 'other') == {}
+
+    def test_migrates_legacy_json_once(self, tmp_path):
+        from backend.utils.playbook_framework import ProgressManager, ActionStatus
+
+        legacy = tmp_path / 'playbook_progress.json'
+        legacy.write_text(json.dumps({
+            'year-end:acme': {'1A': {'status': 'complete', 'notes': 'done'}, '1B': {'status': 'blocked'}},
+            'year-end:globex': {'1A': {'status': 'in_progress'}},
+        }))
+        db = str(tmp_path / 'progress.db')
+
+        pm = ProgressManager(db, legacy_json_path=str(legacy))
+        assert pm.get_raw_progress('year-end', 'acme') == {'1A': {'status': 'complete', 'notes': 'done'},
+                                                            '1B': {'status': 'blocked'}}
+        assert pm.get_action_progress('year-end', 'globex', '1A').status == ActionStatus.IN_PROGRESS
+        assert not legacy.exists() and (tmp_path / 'playbook_progress.json.migrated').exists()
+
+        # A stale JSON file reappearing must not overwrite newer progress
+        pm.patch_action_progress('year-end', 'acme', '1B', {'status': 'complete'})
+        legacy.write_text(json.dumps({'year-end:acme': {'1B': {'status': 'not_started'}}}))
+        assert ProgressManager(db, legacy_json_path=str(legacy)).get_action_progress(
+            'year-end', 'acme', '1B').status == ActionStatus.COMPLETE
+
+    def test_concurrent_updaters_lose_nothing(self, tmp_path):
+        from backend.utils.playbook_framework import ProgressManager, ActionProgress, ActionStatus
+
+        db = str(tmp_path / 'progress.db')
+        workers = [ProgressManager(db, legacy_json_path=None) for _ in range(2)]
+        latencies, errors = [], []
+        lock = threading.Lock()
+
+        def updater(i):
+            pm = workers[i % 2]
+            try:
+                for n in range(10):
+                    start = time.perf_counter()
+                    pm.update_action_progress('year-end', f'project{i % 5}', ActionProgress(
+                        f'action{i}', ActionStatus.IN_PROGRESS, notes=f'pass {n}'))
+                    # Every updater also merges into one shared action's findings
+                    pm.patch_action_progress('year-end', 'shared', 'review', {'findings': {f'u{i}': n}})
+                    with lock:
+                        latencies.append(time.perf_counter() - start)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=updater, args=(i,)) for i in range(50)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert not errors
+        fresh = ProgressManager(db, legacy_json_path=None)
+        actions = {a: p for project in range(5)
+                   for a, p in fresh.get_project_progress('year-end', f'project{project}').items()}
+        assert len(actions) == 50 and all(p.notes == 'pass 9' for p in actions.values())
+        assert fresh.get_action_progress('year-end', 'shared', 'review').findings == {f'u{i}': 9 for i in range(50)}
+
+        latencies.sort()
+        assert latencies[int(len(latencies) * 0.95)] < 0.25 and latencies[-1] < 2.0
@@ -0,0 +1,131 @@
+"""
+Tests for Product Registry Snapshot
+===================================
+Tests that the precompiled snapshot yields the same registry, vocabulary and
+comparison results as parsing the schema JSON, and that it is invalidated
+when a source schema's content changes.
+"""
+
+import json
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+
+REPO_CONFIG = Path(__file__).resolve().parent.parent / 'config'
+SCHEMAS = ['workday_hcm_schema_v1.json', 'adp_wfn_schema_v1.json', 'paycom_schema_v1.json',
+           'netsuite_schema_v1.json', 'salesforce_schema_v1.json']
+
+
+@pytest.fixture
+def config_dir(tmp_path):
+    config = tmp_path / 'config'
+    config.mkdir()
+    for name in SCHEMAS:
+        if (REPO_CONFIG / name).exists():
+            shutil.copy2(REPO_CONFIG / name, config / name)
+    return config
+
+
+def _registry(config_dir, monkeypatch, snapshot):
+    from backend.utils.products import registry as registry_module
+
+    monkeypatch.setattr(registry_module, 'PRODUCT_SNAPSHOT_ENABLED', snapshot)
+    registry = registry_module.ProductRegistry(str(config_dir))
+    registry.load()
+    return registry
+
+
+class TestProductSnapshot:
+    """Tests for snapshot compile/load and registry integration."""
+
+    def test_registry_matches_json(self, config_dir, monkeypatch):
+        """Products loaded from the snapshot equal the ones parsed from JSON."""
+        from_json = _registry(config_dir, monkeypatch, snapshot=False)
+        from_snapshot = _registry(config_dir, monkeypatch, snapshot=True)
+
+        assert from_json.snapshot is None
+        assert from_snapshot.snapshot is not None
+        assert (config_dir / '.product_registry.snapshot').exists()
+        assert list(from_snapshot.products) == list(from_json.products)
+        for product_id, product in from_json.products.items():
+            assert from_snapshot.products[product_id] == product
+
+    def test_indices_match_computed_lookups(self, config_dir, monkeypatch):
+        """Vocabulary and comparator answers are the same with prebuilt indices."""
+        from backend.utils.products import vocabulary, comparator
+        from backend.utils.products.vocabulary import UNIVERSAL_ENTITIES
+
+        results = {}
+        for snapshot in (False, True):
+            registry = _registry(config_dir, monkeypatch, snapshot=snapshot)
+            monkeypatch.setattr(vocabulary, 'get_registry', lambda: registry)
+            monkeypatch.setattr(comparator, 'get_registry', lambda: registry)
+            normalizer = vocabulary.VocabularyNormalizer()
+            aligner = vocabulary.DomainAligner()
+            monkeypatch.setattr(comparator, 'get_vocabulary_normalizer', lambda: normalizer)
+            monkeypatch.setattr(comparator, 'get_domain_aligner', lambda: aligner)
+
+            products = sorted(registry.products)
+            hub = next(iter(registry.products['workday_hcm'].hubs))
+            results[snapshot] = {
+                'denormalize': {(e, p): normalizer.denormalize(e, p) for e in UNIVERSAL_ENTITIES for p in products},
+                'entity_hubs': {(e, p): sorted(normalizer.get_hubs_for_entity(e, p))
+                                for e in UNIVERSAL_ENTITIES for p in products},
+                'equivalent': sorted(aligner.find_equivalent_hubs(hub, 'workday_hcm', 'adp_wfn')),
+                'comparison': comparator.SchemaComparator().compare('workday_hcm', 'adp_wfn').summary(),
+            }
+
+        assert results[True] == results[False]
+
+    def test_invalidated_when_schema_content_changes(self, config_dir):
+        """Touching a schema keeps the snapshot; changing its content recompiles it."""
+        from backend.utils.products.snapshot import compile_snapshot, load_snapshot, load_or_compile_snapshot
+
+        compiled = compile_snapshot(config_dir)
+        schema = config_dir / 'paycom_schema_v1.json'
+
+        stat = schema.stat()
+        os.utime(schema, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        assert load_snapshot(config_dir).version == compiled.version
+
+        data = json.loads(schema.read_text())
+        data['hubs']['brand_new_hub'] = {'domain': 'Core'}
+        schema.write_text(json.dumps(data))
+        assert load_snapshot(config_dir) is None
+
+        recompiled = load_or_compile_snapshot(config_dir)
+        assert recompiled.version != compiled.version
+        assert 'brand_new_hub' in recompiled.products['paycom']['hubs']
+        assert load_snapshot(config_dir).version == recompiled.version
+
+    def test_indices_decoded_on_demand(self, config_dir):
+        """Loading decodes no section until it is used."""
+        from backend.utils.products.snapshot import compile_snapshot, load_snapshot
+
+        compile_snapshot(config_dir)
+        snapshot = load_snapshot(config_dir)
+        assert snapshot.info()['decoded_sections'] == []
+
+        snapshot.build_products()
+        assert snapshot.product_entity_hub['workday_hcm']
+        assert snapshot.info()['decoded_sections'] == ['product_entity_hub', 'products']
+
+    def test_other_runtimes_and_shared_locations_are_not_loaded(self, config_dir, tmp_path, monkeypatch):
+        """A file from another Python/marshal version, or in a non-private directory, is ignored."""
+        from backend.utils.products.snapshot import compile_snapshot, load_snapshot, snapshot_paths
+
+        compile_snapshot(config_dir)
+        path = config_dir / '.product_registry.snapshot'
+        data = bytearray(path.read_bytes())
+        data[9] ^= 1                                   # Python minor version in the fixed header
+        path.write_bytes(bytes(data))
+        assert load_snapshot(config_dir) is None
+
+        monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'cache'))
+        fallback = snapshot_paths(config_dir, create=True)[1]
+        assert fallback.parent == tmp_path / 'cache' / 'xlr8'
+        assert (fallback.parent.stat().st_mode & 0o777) == 0o700
+        os.chmod(fallback.parent, 0o777)
+        assert snapshot_paths(config_dir) == [config_dir.resolve() / '.product_registry.snapshot']
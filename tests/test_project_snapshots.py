@@ -0,0 +1,201 @@
+"""
+Tests for Project Snapshots
+===========================
+Tests that restoring a snapshot undoes later uploads exactly (tables,
+metadata rows, shard files) without touching other projects, that
+unchanged tables are referenced instead of rewritten, that a damaged
+snapshot is rejected before anything changes (and that a load failing
+part-way leaves the project as it was), and that a snapshot copied
+to another database restores there without id collisions.
+"""
+
+import os
+import shutil
+
+import duckdb
+import pytest
+
+
+PROJECT = 'a1b2c3d4-0000-4000-8000-000000000001'
+OTHER = 'b5c6d7e8-0000-4000-8000-000000000002'
+
+
+@pytest.fixture
+def make_handler(structured_handler):
+    def make(path, sharded=False):
+        handler = structured_handler(path, sharded)
+        handler.conn.execute("CREATE TABLE IF NOT EXISTS _project_notes (project VARCHAR, note VARCHAR)")
+        return handler
+    return make
+
+
+@pytest.fixture
+def upload(seed_table):
+    def upload(handler, project, name, rows):
+        table = seed_table(handler, project, name, rows)
+        handler.conn.execute("INSERT INTO _project_notes (project, note) VALUES (?, ?)", [project, f"uploaded {table}"])
+        return table
+    return upload
+
+
+def state(handler, project):
+    """What a restore must bring back: table contents and metadata rows, ids aside."""
+    tables = sorted(r[0] for r in handler.conn.execute(
+        "SELECT table_name FROM _schema_metadata WHERE project = ?", [project]).fetchall())
+    return {
+        'tables': {t: handler.conn.execute(f'SELECT * FROM "{t}" ORDER BY ALL').fetchall() for t in tables},
+        'metadata': handler.conn.execute("SELECT * EXCLUDE (id, created_at) FROM _schema_metadata "
+                                         "WHERE project = ? ORDER BY table_name", [project]).fetchall(),
+        'profiles': handler.conn.execute("SELECT table_name, column_name, inferred_type, distinct_count "
+                                         "FROM _column_profiles WHERE project = ? ORDER BY ALL", [project]).fetchall(),
+        'terms': handler.conn.execute("SELECT term, term_type, table_name, column_name FROM _term_index "
+                                      "WHERE project = ? ORDER BY ALL", [project]).fetchall(),
+        'notes': handler.conn.execute("SELECT project, note FROM _project_notes WHERE project = ? ORDER BY ALL",
+                                      [project]).fetchall(),
+    }
+
+
+class TestSnapshots:
+    """Tests for snapshot, restore, incremental objects and verification."""
+
+    @pytest.mark.parametrize('sharded', [False, True])
+    def test_restore_undoes_a_bad_upload(self, tmp_path, sharded, make_handler, upload):
+        from utils.project_snapshots import ProjectSnapshots
+
+        handler = make_handler(tmp_path / 'main.duckdb', sharded)
+        upload(handler, PROJECT, 'employees', 500)
+        upload(handler, PROJECT, 'payroll', 800)
+        upload(handler, OTHER, 'employees', 300)
+        snapshots = ProjectSnapshots(handler, root=str(tmp_path / 'snapshots'))
+        before, other = state(handler, PROJECT), state(handler, OTHER)
+        manifest = snapshots.create(PROJECT)
+        assert manifest['totals']['tables'] == 2 and manifest['totals']['rows'] == 1300
+        assert {'_schema_metadata', '_column_profiles', '_term_index', '_project_notes'} <= \
+               {m['name'] for m in manifest['metadata']}
+        assert before['terms'] and before['profiles']
+        assert '_column_sketches' not in {m['name'] for m in manifest['metadata']}
+
+        # The bad upload: a changed table, a new one, new metadata rows
+        handler.conn.execute(f'DELETE FROM "{PROJECT[:8]}_payroll" WHERE amount > 100')
+        upload(handler, PROJECT, 'garbage', 50)
+        assert state(handler, PROJECT) != before
+
+        result = snapshots.restore(PROJECT, manifest['snapshot_id'])
+        assert result['tables_restored'] == [f"{PROJECT[:8]}_employees", f"{PROJECT[:8]}_payroll"]
+        assert f"{PROJECT[:8]}_garbage" in result['tables_dropped']
+        assert state(handler, PROJECT) == before and state(handler, OTHER) == other
+        assert not handler.conn.execute(
+            f"SELECT 1 FROM duckdb_tables() WHERE table_name = '{PROJECT[:8]}_garbage'").fetchall()
+        if sharded:
+            assert handler.shards.known_shards == [PROJECT[:8], OTHER[:8]]
+            assert handler.shards.shard_tables(PROJECT[:8]) == result['tables_restored']
+
+        # Ids were drawn again from the sequence: the next upload can't collide
+        ids = [r[0] for r in handler.conn.execute("SELECT id FROM _schema_metadata").fetchall()]
+        assert len(ids) == len(set(ids)) == 3
+        upload(handler, PROJECT, 'next', 10)
+        handler.conn.close()
+
+    def test_unchanged_tables_are_referenced_not_rewritten(self, tmp_path, make_handler, upload):
+        from utils.project_snapshots import ProjectSnapshots
+
+        handler = make_handler(tmp_path / 'main.duckdb')
+        employees = upload(handler, PROJECT, 'employees', 500)
+        upload(handler, PROJECT, 'payroll', 800)
+        snapshots = ProjectSnapshots(handler, root=str(tmp_path / 'snapshots'))
+        first = snapshots.create(PROJECT, note='before re-upload')
+        handler.conn.execute(f'UPDATE "{employees}" SET department = \'Legal\' WHERE employee_id = \'E7\'')
+        second = snapshots.create(PROJECT)
+        third = snapshots.create(PROJECT)
+
+        assert (first['totals']['tables_reused'], second['totals']['tables_reused'],
+                third['totals']['tables_reused']) == (0, 1, 2)
+        files = [{t['name']: t['file'] for t in m['tables']} for m in (first, second, third)]
+        assert files[0]['a1b2c3d4_payroll'] == files[1]['a1b2c3d4_payroll'] == files[2]['a1b2c3d4_payroll']
+        assert files[0][employees] != files[1][employees] == files[2][employees]
+        assert [s['snapshot_id'] for s in snapshots.list(PROJECT)] == \
+               [third['snapshot_id'], second['snapshot_id'], first['snapshot_id']]
+        assert snapshots.list(PROJECT)[-1]['note'] == 'before re-upload'
+
+        # Only the object the deleted snapshot alone used goes
+        deleted = snapshots.delete(PROJECT, first['snapshot_id'])
+        assert deleted['objects_removed'] == [files[0][employees]]
+        snapshots.delete(PROJECT, second['snapshot_id'])
+        snapshots.restore(PROJECT, third['snapshot_id'])
+        assert handler.conn.execute(f'SELECT department FROM "{employees}" WHERE employee_id = \'E7\'').fetchone() \
+               == ('Legal',)
+        handler.conn.close()
+
+    def test_damaged_snapshot_is_rejected_before_anything_changes(self, tmp_path, make_handler, upload):
+        from utils.project_snapshots import ProjectSnapshots
+
+        handler = make_handler(tmp_path / 'main.duckdb')
+        upload(handler, PROJECT, 'employees', 500)
+        snapshots = ProjectSnapshots(handler, root=str(tmp_path / 'snapshots'))
+        manifest = snapshots.create(PROJECT)
+        upload(handler, PROJECT, 'payroll', 100)
+        current = state(handler, PROJECT)
+
+        path = os.path.join(snapshots.project_dir(PROJECT), manifest['tables'][0]['file'])
+        with open(path, 'r+b') as f:
+            f.seek(100)
+            byte = f.read(1)
+            f.seek(100)
+            f.write(bytes([byte[0] ^ 0xFF]))
+        with pytest.raises(ValueError, match='checksum mismatch'):
+            snapshots.restore(PROJECT, manifest['snapshot_id'])
+        with pytest.raises(FileNotFoundError):
+            snapshots.restore(PROJECT, 'no-such-snapshot')
+        assert state(handler, PROJECT) == current
+        handler.conn.close()
+
+    @pytest.mark.parametrize('sharded', [False, True])
+    def test_failed_load_leaves_the_project_as_it_was(self, tmp_path, sharded, make_handler, upload):
+        from utils.project_snapshots import ProjectSnapshots
+
+        handler = make_handler(tmp_path / 'main.duckdb', sharded)
+        upload(handler, PROJECT, 'employees', 500)
+        upload(handler, PROJECT, 'payroll', 800)
+        snapshots = ProjectSnapshots(handler, root=str(tmp_path / 'snapshots'))
+        manifest = snapshots.create(PROJECT)
+        upload(handler, PROJECT, 'garbage', 50)
+        current = state(handler, PROJECT)
+
+        # Every table loads; the last metadata file doesn't
+        path = os.path.join(snapshots.project_dir(PROJECT), manifest['metadata'][-1]['file'])
+        with open(path, 'r+b') as f:
+            f.truncate(os.path.getsize(path) // 2)
+        with pytest.raises(duckdb.Error):
+            snapshots.restore(PROJECT, manifest['snapshot_id'], verify=False)
+        assert state(handler, PROJECT) == current
+        leftovers = [t for (t,) in handler.conn.execute("SELECT table_name FROM duckdb_tables()").fetchall()
+                     if t.endswith('__restoring') or t.startswith('__restore_meta')]
+        assert leftovers == []
+        handler.conn.close()
+
+    def test_restore_in_another_environment(self, tmp_path, make_handler, upload):
+        from utils.project_snapshots import ProjectSnapshots
+
+        source = make_handler(tmp_path / 'source' / 'main.duckdb')
+        upload(source, PROJECT, 'employees', 500)
+        upload(source, PROJECT, 'payroll', 800)
+        manifest = ProjectSnapshots(source, root=str(tmp_path / 'source' / 'snapshots')).create(PROJECT)
+        expected = state(source, PROJECT)
+        source.conn.close()
+
+        # The target already has a project whose ids the snapshot's ids would hit, and a
+        # metadata table that has gained a column since
+        target = make_handler(tmp_path / 'target' / 'main.duckdb', sharded=True)
+        target.conn.execute("ALTER TABLE _project_notes ADD COLUMN weight DOUBLE DEFAULT 1.0")
+        upload(target, OTHER, 'employees', 300)
+        upload(target, OTHER, 'payroll', 300)
+        shutil.copytree(tmp_path / 'source' / 'snapshots', tmp_path / 'target' / 'snapshots')
+
+        snapshots = ProjectSnapshots(target, root=str(tmp_path / 'target' / 'snapshots'))
+        snapshots.restore(PROJECT, manifest['snapshot_id'])
+        assert state(target, PROJECT) == expected
+        assert target.conn.execute("SELECT COUNT(*), COUNT(DISTINCT id) FROM _schema_metadata").fetchone() == (4, 4)
+        assert target.conn.execute("SELECT DISTINCT weight FROM _project_notes WHERE project = ?",
+                                   [PROJECT]).fetchall() == [(1.0,)]
+        assert target.shards.known_shards == [PROJECT[:8], OTHER[:8]]
+        target.conn.close()
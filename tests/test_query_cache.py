@@ -0,0 +1,142 @@
+"""
+Tests for the Query Result Cache
+================================
+Tests that repeated reads are served from the cache until a table they
+read is written (and only then), that non-deterministic and hinted queries
+bypass it, that the byte ceiling evicts least recently used results, and
+that large results spill to Parquet and come back unchanged.
+"""
+
+import datetime
+import decimal
+
+import pytest
+
+
+@pytest.fixture
+def tracked():
+    import duckdb
+    from utils.query_cache import QueryCache
+
+    cache = QueryCache()
+    conn = cache.track(duckdb.connect(":memory:"), 'test.duckdb')
+    conn.execute("CREATE TABLE acme__employees AS SELECT range AS id, 'E' || range AS name FROM range(100)")
+    conn.execute("CREATE TABLE acme__earnings AS SELECT 'REG' AS code")
+    yield cache, conn
+    conn.close()
+
+
+def read(query_cache, conn, sql, **kwargs):
+    return query_cache.read('test.duckdb', 'rows', sql, None, lambda: conn.execute(sql).fetchall(), **kwargs)
+
+
+class TestQueryCache:
+    """Tests for version-keyed hits and exact invalidation."""
+
+    def test_hits_until_a_read_table_is_written(self, tracked):
+        cache, conn = tracked
+        count = "SELECT COUNT(*) FROM acme__employees"
+
+        assert read(cache, conn, count) == [(100,)]
+        assert read(cache, conn, "select count(*)\n  from ACME__EMPLOYEES;  -- same query") == [(100,)]
+        assert read(cache, conn, "SELECT * FROM acme__earnings") == [('REG',)]
+        assert cache.stats()['hits'] == 1 and cache.stats()['bytes_saved'] > 0
+
+        conn.execute("INSERT INTO acme__employees VALUES (100, 'E100')")
+        assert read(cache, conn, count) == [(101,)]            # invalidated
+        assert read(cache, conn, "SELECT * FROM acme__earnings") == [('REG',)]   # untouched table still hits
+        assert cache.stats()['hits'] == 2
+
+        conn.execute('CREATE OR REPLACE TABLE "ACME__EMPLOYEES" AS SELECT 1 AS id')
+        assert read(cache, conn, count) == [(1,)]
+        cache.invalidate('test.duckdb', ['acme__earnings'])    # write through another connection
+        read(cache, conn, "SELECT * FROM acme__earnings")
+        assert cache.stats()['hits'] == 2
+
+    def test_bypasses_nondeterministic_and_hinted_queries(self, tracked):
+        cache, conn = tracked
+        for sql in ("SELECT id, random() FROM acme__employees",
+                    "SELECT current_date, name FROM acme__employees",
+                    "SELECT * FROM acme__employees USING SAMPLE 10",
+                    "SELECT /* no_cache */ * FROM acme__employees",
+                    "SELECT * FROM duckdb_tables()",
+                    "SELECT * FROM information_schema.tables"):
+            read(cache, conn, sql)
+            read(cache, conn, sql)
+        read(cache, conn, "SELECT * FROM acme__earnings", cache=False)
+
+        stats = cache.stats()
+        assert stats['hits'] == 0 and stats['entries'] == 0
+        assert stats['bypassed'] == {'nondeterministic': 4, 'sample': 2, 'hint': 2, 'table_function': 2,
+                                     'system_table': 2, 'caller': 1}
+
+    def test_lru_keeps_memory_under_ceiling(self, tracked):
+        from utils.query_cache import QueryCache
+
+        cache = QueryCache(max_bytes=40_000)
+        conn = cache.track(tracked[1].raw, 'test.duckdb')
+        queries = [f"SELECT * FROM acme__employees WHERE id >= {n}" for n in (0, 10, 20, 30)]
+        for sql in queries[:2]:
+            read(cache, conn, sql)
+        read(cache, conn, queries[0])                          # queries[1] is now least recent
+        for sql in queries[2:]:
+            read(cache, conn, sql)
+
+        stats = cache.stats()
+        assert stats['memory_bytes'] <= 40_000 and stats['evictions'] >= 1
+        read(cache, conn, queries[0])
+        read(cache, conn, queries[1])
+        assert cache.stats()['hits'] == 2                      # queries[0] survived, queries[1] didn't
+
+    def test_large_results_spill_to_parquet(self, tracked, tmp_path):
+        from utils.query_cache import QueryCache
+
+        cache = QueryCache(spill_dir=str(tmp_path), spill_min_bytes=64 * 1024)
+        conn = cache.track(tracked[1].raw, 'test.duckdb')
+        conn.execute("""
+            CREATE TABLE acme__pay AS SELECT range AS id, 'E' || range AS name,
+                   CAST(range * 1.25 AS DECIMAL(10, 2)) AS amount, DATE '2024-01-01' + CAST(range AS INTEGER) AS paid,
+                   CASE WHEN range % 7 = 0 THEN NULL ELSE range % 2 = 0 END AS flag
+            FROM range(5000)
+        """)
+        sql = "SELECT * FROM acme__pay ORDER BY id"
+        rows = read(cache, conn, sql)
+
+        assert cache.stats()['disk_entries'] == 1 and cache.stats()['memory_bytes'] == 0
+        again = read(cache, conn, sql)
+        assert again == rows and cache.stats()['hits'] == 1
+        assert again[7] == (7, 'E7', decimal.Decimal('8.75'), datetime.date(2024, 1, 8), None)
+
+        conn.execute("DELETE FROM acme__pay WHERE id > 10")
+        assert len(read(cache, conn, sql)) == 11
+        assert not list(tmp_path.glob('*.parquet')) and cache.stats()['disk_bytes'] == 0
+
+
+class TestHandlerIntegration:
+    """Tests for StructuredDataHandler reads through the cache."""
+
+    def test_handler_reads_are_cached_and_invalidated(self):
+        import duckdb
+        from utils.query_cache import QueryCache
+        from utils.structured_data_handler import StructuredDataHandler
+
+        handler = StructuredDataHandler.__new__(StructuredDataHandler)
+        handler.db_path = 'handler.duckdb'
+        handler.query_cache = QueryCache()
+        handler.conn = handler.query_cache.track(duckdb.connect(":memory:"), handler.db_path)
+        handler.conn.execute("CREATE TABLE acme__employees AS SELECT 1 AS id, 'Ann' AS name")
+
+        assert handler.query("SELECT * FROM acme__employees") == [{'id': 1, 'name': 'Ann'}]
+        cached = handler.query("SELECT * FROM acme__employees")
+        cached[0]['name'] = 'changed by caller'
+        assert handler.query("SELECT * FROM acme__employees") == [{'id': 1, 'name': 'Ann'}]
+
+        frame = handler.query_to_dataframe("SELECT * FROM acme__employees")
+        frame.loc[0, 'name'] = 'changed by caller'
+        assert handler.query_to_dataframe("SELECT * FROM acme__employees").loc[0, 'name'] == 'Ann'
+
+        assert handler.safe_fetchall("SELECT id FROM acme__employees WHERE id = ?", [1]) == [(1,)]
+        handler.safe_execute("UPDATE acme__employees SET id = 2")
+        assert handler.safe_fetchall("SELECT id FROM acme__employees WHERE id = ?", [1]) == []
+        assert handler.query_cache.stats()['hits'] == 3
+        handler.conn.close()
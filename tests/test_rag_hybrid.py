@@ -0,0 +1,151 @@
+"""
+Tests for Hybrid Lexical + Vector Search
+========================================
+Tests the code-aware BM25 index, that hybrid search finds exact codes the
+vector leg misses, that code lookups skip embedding, that filters and
+deletions apply to lexical hits, that reconciles are rate limited, and the
+latency-budget fallback.
+"""
+
+import re
+import time
+import uuid
+import hashlib
+
+import pytest
+
+pytest.importorskip("chromadb")
+
+
+def stub_embedding(text, dims=64):
+    """Hashed bag of words with digits dropped - like dense embedders, it blurs REG01 and REG02."""
+    vector = [0.0] * dims
+    for word in re.findall(r'[a-z]+', text.lower()):
+        vector[int(hashlib.md5(word.encode()).hexdigest(), 16) % dims] += 1.0
+    norm = sum(v * v for v in vector) ** 0.5 or 1.0
+    return [v / norm for v in vector]
+
+
+CHUNKS = [
+    ("Earning code REG01 is regular pay for hourly employees.", {'truth_type': 'configuration', 'customer_id': 'acme'}),
+    ("Earning code REG02 is regular pay for salaried employees.", {'truth_type': 'configuration', 'customer_id': 'acme'}),
+    ("Earning code REG03 is regular pay for union employees.", {'truth_type': 'configuration', 'customer_id': 'beta'}),
+    ("GL account 6100-200 books employer 401k match expense.", {'truth_type': 'configuration', 'customer_id': 'acme'}),
+    ("GL account 6100-300 books employer HSA contributions.", {'truth_type': 'configuration', 'customer_id': 'acme'}),
+    ("Section 4.2.1 covers overtime eligibility for nonexempt staff.", {'truth_type': 'reference'}),
+    ("Section 4.2.2 covers holiday pay for nonexempt staff.", {'truth_type': 'reference'}),
+    ("Employees accrue paid time off each pay period based on tenure.", {'truth_type': 'reference'}),
+]
+
+
+@pytest.fixture
+def rag():
+    import chromadb
+    from utils.lexical_index import LexicalIndex
+    from utils.rag_handler import RAGHandler
+
+    handler = RAGHandler.__new__(RAGHandler)
+    handler.client = chromadb.EphemeralClient()
+    handler.lexical_index = LexicalIndex()
+    handler.ollama_base_url = 'http://ollama.test'
+    handler.embed_calls = []
+
+    def get_embedding(text):
+        handler.embed_calls.append(text)
+        return stub_embedding(text)
+
+    handler.get_embedding = get_embedding
+    handler.get_embeddings_batch = lambda texts, batch_size=10: [get_embedding(t) for t in texts]
+    handler.name = f"test-{uuid.uuid4().hex[:12]}"
+    collection = handler.client.get_or_create_collection(handler.name, metadata={"hnsw:space": "cosine"})
+    ids = [f"doc_{i}" for i in range(len(CHUNKS))]
+    documents = [text for text, _ in CHUNKS]
+    collection.add(ids=ids, documents=documents, embeddings=[stub_embedding(d) for d in documents],
+                   metadatas=[meta for _, meta in CHUNKS])
+    handler._index_chunks(handler.name, ids, documents)
+    handler.embed_calls.clear()
+    yield handler
+    handler.client.delete_collection(handler.name)
+
+
+def _docs(results):
+    return [r['document'].split(' is ')[0].split(' books')[0].split(' covers')[0] for r in results]
+
+
+class TestLexicalIndex:
+    """Tests for the BM25 index itself."""
+
+    def test_tokenizer_keeps_codes(self):
+        from utils.lexical_index import is_code_lookup, tokenize
+
+        assert tokenize("GL 6100-200, section 4.2.1.") == ['gl', '6100-200', '6100', '200', 'section',
+                                                           '4.2.1', '4', '2', '1']
+        assert is_code_lookup("REG01") and is_code_lookup("GL 6100-200") and is_code_lookup("section 4.2.1")
+        assert not is_code_lookup("how do employees accrue paid time off")
+        assert not is_code_lookup("what overtime rules apply to code REG01 for union staff")
+
+    def test_add_replace_delete(self):
+        from utils.lexical_index import LexicalIndex
+
+        index = LexicalIndex()
+        index.add('docs', ['a', 'b'], ["earning code REG01", "earning code REG02"])
+        assert [i for i, _ in index.search('docs', 'REG02')] == ['b']
+        index.add('docs', ['b'], ["deduction code MED5"])
+        assert index.search('docs', 'REG02') == [] and index.count('docs') == 2
+        index.delete('docs', ['a'])
+        assert index.search('docs', 'REG01') == [] and index.count('docs') == 1
+        index.drop('docs')
+        assert index.count('docs') == 0 and index.search('docs', 'MED5') == []
+
+
+class TestHybridSearch:
+    """Tests for RAGHandler.search(mode='hybrid')."""
+
+    def test_exact_code_beats_vector_blur(self, rag):
+        from utils.rag_handler import LEXICAL_DISTANCE
+
+        vector = rag.search(rag.name, "REG02", n_results=1, mode='vector')
+        hybrid = rag.search(rag.name, "REG02", n_results=1, mode='hybrid')
+
+        assert _docs(hybrid) == ['Earning code REG02']
+        assert hybrid[0]['match'] == 'lexical' and hybrid[0]['lexical_only']
+        assert hybrid[0]['distance'] == LEXICAL_DISTANCE  # not a perfect cosine match
+        assert len(vector) == 1  # the stub embedder cannot tell REG01/02/03 apart
+
+    def test_code_lookup_skips_embedding(self, rag):
+        results = rag.search(rag.name, "GL 6100-200", n_results=3)
+        assert _docs(results)[0] == 'GL account 6100-200' and rag.embed_calls == []
+
+        rag.search(rag.name, "which account books employer 401k match", n_results=3)
+        assert len(rag.embed_calls) == 1
+
+    def test_fusion_and_filters(self, rag):
+        results = rag.search(rag.name, "overtime eligibility in section 4.2.1 for nonexempt staff", n_results=3)
+        assert _docs(results)[0] == 'Section 4.2.1' and results[0]['match'] == 'both'
+        assert all(isinstance(r['distance'], float) for r in results)
+
+        scoped = rag.search(rag.name, "REG03", n_results=3, customer_id='acme', truth_type='configuration')
+        assert 'Earning code REG03' not in _docs(scoped)
+
+    def test_external_delete_is_reconciled(self, rag):
+        rag.client.get_collection(rag.name).delete(ids=['doc_1'])
+        assert 'Earning code REG02' not in _docs(rag.search(rag.name, "REG02", n_results=3))
+        assert rag.lexical_index.count(rag.name) == len(CHUNKS) - 1
+
+    def test_reconcile_is_rate_limited(self, rag, monkeypatch):
+        calls = []
+        monkeypatch.setattr(rag.lexical_index, 'reconcile', lambda name, collection: calls.append(name))
+        for _ in range(3):
+            rag.search(rag.name, "REG02", n_results=1)
+        assert calls == [rag.name]
+
+    def test_budget_returns_lexical(self, rag, monkeypatch):
+        from utils import rag_handler
+
+        monkeypatch.setattr(rag_handler, 'HYBRID_BUDGET_MS', 50)
+        rag.get_embedding = lambda text: (time.sleep(0.5), stub_embedding(text))[1]
+        start = time.perf_counter()
+        results = rag.search(rag.name, "holiday pay rules for nonexempt staff", n_results=2)
+        assert time.perf_counter() - start < 0.4
+        assert _docs(results)[0] == 'Section 4.2.2' and results[0]['match'] == 'lexical'
+        assert results[0]['lexical_only'] and results[0]['distance'] >= rag_handler.LEXICAL_DISTANCE
@@ -0,0 +1,123 @@
+"""
+Tests for the Staged Ingest Pipeline
+====================================
+Tests that RAGHandler.add_document writes exactly the same collection
+contents through the concurrent pipeline as through the sequential path,
+that failed embeddings are skipped the same way, and that per-stage
+throughput reaches job progress.
+"""
+
+import hashlib
+
+import pytest
+
+pytest.importorskip("chromadb")
+
+
+class FakeCollection:
+    """Records collection.add calls."""
+
+    def __init__(self):
+        self.batches = []
+
+    def add(self, embeddings, documents, metadatas, ids):
+        self.batches.append({'ids': list(ids), 'documents': list(documents),
+                             'metadatas': list(metadatas), 'embeddings': list(embeddings)})
+
+
+class FakeClient:
+    def __init__(self):
+        self.collection = FakeCollection()
+
+    def get_or_create_collection(self, name, metadata=None):
+        return self.collection
+
+
+def _chunks(n):
+    return [f"Section {i}: employees in deduction code 40{i % 10} accrue PTO under plan {i % 7}. "
+            f"Earnings code REG and tax jurisdiction CA apply to location {i % 3}." for i in range(n)]
+
+
+def _handler(chunks, fail_every=0):
+    from utils.rag_handler import RAGHandler
+
+    handler = RAGHandler.__new__(RAGHandler)
+    handler.client = FakeClient()
+    handler.ollama_base_url = 'http://ollama.test'
+
+    def chunk_text(text, file_type='txt', filename=None):
+        handler._last_chunk_metadata = [
+            {'metadata': {'structure': 'linear', 'strategy': 'paragraph', 'chunk_type': 'text',
+                          'parent_section': f'Part {i // 25}', 'line_start': i * 3}} if i % 2 else
+            {'chunk_type': 'text', 'parent_section': f'Part {i // 25}'}
+            for i in range(len(chunks))
+        ]
+        return list(chunks)
+
+    def get_embedding(text):
+        digest = hashlib.sha256(text.encode()).digest()
+        if fail_every and digest[0] % fail_every == 0:
+            return None
+        return [b / 255 for b in digest[:8]]
+
+    handler.chunk_text = chunk_text
+    handler.get_embedding = get_embedding
+    return handler
+
+
+def _add(handler, monkeypatch, pipeline, progress=None, **env):
+    from utils import ingest_pipeline, rag_handler
+
+    monkeypatch.setattr(rag_handler, 'PIPELINE_ENABLED', pipeline)
+    monkeypatch.setattr(rag_handler, 'PIPELINE_MIN_CHUNKS', 1)
+    for name, value in env.items():
+        monkeypatch.setattr(ingest_pipeline, name, value)
+    metadata = {'source': 'policy_manual.pdf', 'filename': 'policy_manual.pdf', 'file_type': 'pdf',
+                'customer_id': 'acme', 'truth_type': 'reference', 'empty': None}
+    added = handler.add_document('documents', 'ignored', metadata, progress_callback=progress)
+    return added, handler.client.collection.batches
+
+
+class TestIngestPipeline:
+    """Pipeline output equals the sequential path."""
+
+    @pytest.mark.parametrize("executor", ['thread', 'process'])
+    @pytest.mark.parametrize("fail_every", [0, 5])
+    def test_matches_sequential(self, monkeypatch, fail_every, executor):
+        chunks = _chunks(430)
+        expected_added, expected = _add(_handler(chunks, fail_every), monkeypatch, pipeline=False)
+        added, batches = _add(_handler(chunks, fail_every), monkeypatch, pipeline=True,
+                              ENRICH_WORKERS=3, ENRICH_EXECUTOR=executor, EMBED_BATCH=37, QUEUE_BATCHES=2)
+
+        assert added == expected_added > 0
+        assert batches == expected
+        assert all(len(b['ids']) == 50 for b in batches[:-1])
+        if fail_every:
+            assert expected_added < len(chunks)
+        ids = [i for b in batches for i in b['ids']]
+        assert ids[0] == 'policy_manual.pdf_0' and len(set(ids)) == len(ids)
+        first = batches[0]['metadatas'][0]
+        assert first['customer_id'] == 'acme' and first['position'] == f'1/{len(chunks)}' and 'empty' not in first
+        assert any('hub_references' in m for b in batches for m in b['metadatas'])  # detector ran in the workers too
+
+    def test_reports_stage_throughput(self, monkeypatch):
+        calls = []
+        added, _ = _add(_handler(_chunks(120)), monkeypatch, pipeline=True,
+                        progress=lambda current, total, message: calls.append((current, message)),
+                        ENRICH_EXECUTOR='thread', EMBED_BATCH=40)
+
+        assert added == 120
+        stage_messages = [m for _, m in calls if m.startswith('enrich')]
+        assert stage_messages and 'embed 120/120' in stage_messages[-1] and 'write 120/120' in stage_messages[-1]
+        percents = [p for p, _ in calls]
+        assert percents == sorted(percents) and percents[-1] == 100
+
+    def test_stage_error_propagates(self, monkeypatch):
+        from utils.ingest_pipeline import ChunkContext, run_ingest_pipeline
+
+        def embed(texts):
+            raise RuntimeError("ollama down")
+
+        with pytest.raises(RuntimeError, match="ollama down"):
+            run_ingest_pipeline(_chunks(300), None, ChunkContext(base_metadata={}, total_chunks=300), 'doc',
+                                embed=embed, write=lambda *args: None, executor='thread', queue_batches=1)
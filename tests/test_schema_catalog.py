@@ -0,0 +1,119 @@
+"""
+Tests for Schema Catalog
+========================
+Tests that the catalog matches DuckDB's tables without rescanning unchanged
+ones, that it catches tables changed outside the write path, and that the
+BI schema endpoint is served from it with ETag revalidation.
+"""
+
+import pytest
+
+
+@pytest.fixture
+def handler(duckdb_handler):
+    conn = duckdb_handler.conn
+    conn.execute("""
+        CREATE TABLE _schema_metadata (
+            id INTEGER, project VARCHAR, table_name VARCHAR, display_name VARCHAR, file_name VARCHAR,
+            sheet_name VARCHAR, entity_type VARCHAR, category VARCHAR, is_current BOOLEAN
+        )
+    """)
+    conn.execute("CREATE TABLE acme__employees AS SELECT range AS id, 'E' || range AS name FROM range(250)")
+    conn.execute("CREATE TABLE acme__earnings_codes AS SELECT 'REG' AS code, 'Regular' AS description")
+    conn.execute("CREATE TABLE other__employees AS SELECT 1 AS id")
+    conn.execute("""
+        INSERT INTO _schema_metadata VALUES
+        (1, 'acme', 'acme__employees', 'Old Name', 'staff.xlsx', 'Sheet1', 'employee', 'core', TRUE),
+        (2, 'acme', 'acme__employees', 'Acme - Employees', NULL, NULL, NULL, NULL, TRUE)
+    """)
+    return duckdb_handler
+
+
+class TestSchemaCatalog:
+    """Tests for catalog maintenance and consistency checks."""
+
+    def test_read_matches_tables(self, handler):
+        """Catalog columns, counts and metadata match the live tables."""
+        from utils.schema_catalog import get_schema_catalog
+
+        tables = {t['table_name']: t for t in get_schema_catalog(handler).read()}
+
+        assert sorted(tables) == ['acme__earnings_codes', 'acme__employees', 'other__employees']
+        employees = tables['acme__employees']
+        assert employees['columns'] == ['id', 'name']
+        assert employees['row_count'] == 250
+        # Latest non-empty value per field
+        assert employees['display_name'] == 'Acme - Employees'
+        assert employees['file_name'] == 'staff.xlsx'
+        assert tables['acme__earnings_codes']['display_name'] is None
+
+    def test_sync_rescans_only_changed_tables(self, handler):
+        """Unchanged tables aren't recounted; new, grown, recreated and dropped ones are caught."""
+        from utils.schema_catalog import get_schema_catalog
+
+        catalog = get_schema_catalog(handler)
+        assert catalog.sync()['refreshed'] == 3
+        assert catalog.sync() == {'checked': 3, 'refreshed': 0, 'removed': 0}
+
+        handler.conn.execute("INSERT INTO acme__employees SELECT range, 'X' FROM range(10)")
+        handler.conn.execute("CREATE OR REPLACE TABLE acme__earnings_codes AS SELECT 'OT' AS code, 1 AS rate, 'x' AS d")
+        handler.conn.execute("DROP TABLE other__employees")
+        handler.conn.execute("CREATE TABLE acme__locations AS SELECT 'NY' AS code")
+        assert catalog.sync() == {'checked': 3, 'refreshed': 3, 'removed': 1}
+
+        tables = {t['table_name']: t for t in catalog.read(sync=False)}
+        assert tables['acme__employees']['row_count'] == 260
+        assert tables['acme__earnings_codes']['columns'] == ['code', 'rate', 'd']
+        assert 'other__employees' not in tables and 'acme__locations' in tables
+
+    def test_record_and_forget(self, handler):
+        """Write-path hooks keep the catalog current without a sync."""
+        from utils.schema_catalog import get_schema_catalog
+
+        catalog = get_schema_catalog(handler)
+        catalog.sync()
+        handler.conn.execute("CREATE TABLE acme__new AS SELECT range AS n FROM range(7)")
+        catalog.record('acme__new', row_count=7)
+        handler.conn.execute("DROP TABLE acme__employees")
+        catalog.forget(['acme__employees'])
+
+        assert catalog.sync()['refreshed'] == 0
+        names = [t['table_name'] for t in catalog.read(sync=False)]
+        assert 'acme__new' in names and 'acme__employees' not in names
+
+
+class TestBISchemaEndpoint:
+    """Tests for GET /api/bi/schema with the catalog and ETags."""
+
+    @pytest.mark.asyncio
+    async def test_etag_revalidation(self, handler, monkeypatch):
+        import httpx
+        from fastapi import FastAPI
+        from backend.routers import bi_router
+
+        monkeypatch.setattr(bi_router, 'get_structured_handler', lambda: handler)
+        monkeypatch.setattr(bi_router, '_load_schema_context', lambda project: {
+            'customer_name': 'Acme Corp', 'file_metadata': {'staff.xlsx': {'truth_type': 'reality', 'domain': 'hr'}}
+        })
+        bi_router._schema_context_cache.invalidate()
+
+        app = FastAPI()
+        app.include_router(bi_router.router, prefix='/api')
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+            first = await client.get('/api/bi/schema/acme')
+            assert first.status_code == 200
+            tables = {t['full_name']: t for t in first.json()['tables']}
+            assert sorted(tables) == ['acme__earnings_codes', 'acme__employees']
+            assert tables['acme__employees']['rows'] == 250
+            assert tables['acme__employees']['domain'] == 'hr'
+            assert tables['acme__earnings_codes']['display_name'] == 'Acme Corp - Earnings Codes'
+
+            etag = first.headers['etag']
+            unchanged = await client.get('/api/bi/schema/acme', headers={'If-None-Match': etag})
+            assert unchanged.status_code == 304
+
+            handler.conn.execute("INSERT INTO acme__employees VALUES (999, 'New')")
+            changed = await client.get('/api/bi/schema/acme', headers={'If-None-Match': etag})
+            assert changed.status_code == 200
+            assert changed.headers['etag'] != etag
@@ -0,0 +1,201 @@
+"""
+Tests for Streaming Export
+==========================
+Tests that streamed exports match the list-based transform path, that a
+5M-row CSV export runs at bounded memory, that source rows are counted
+only up to the background threshold, that a download the client drops is
+marked cancelled, that XLSX output rolls over at the sheet row limit, and
+that large BI exports run as downloadable background jobs.
+"""
+
+import csv
+import io
+import resource
+from types import SimpleNamespace
+
+import pytest
+
+
+@pytest.fixture
+def handler(duckdb_handler):
+    conn = duckdb_handler.conn
+    conn.execute("""
+        CREATE TABLE acme__employees AS
+        SELECT range AS id, ['ca', 'NY', 'tx'][1 + range % 3] AS state, 'emp ' || range AS name,
+               range * 10.5 AS pay, CASE WHEN range % 4 = 0 THEN 'REG' ELSE 'OT' END AS earn_code
+        FROM range(2500)
+    """)
+    conn.execute("CREATE TABLE acme__earnings_codes AS SELECT * FROM (VALUES ('REG', 'Regular'), ('OT', 'Overtime')) "
+                 "t(code, description)")
+    return duckdb_handler
+
+
+def _t(t_type, target, **params):
+    return SimpleNamespace(type=t_type, column=target, params=params or None)
+
+
+def _read_csv(data: bytes):
+    return list(csv.reader(io.StringIO(data.decode('utf-8'))))
+
+
+SQL = "SELECT * FROM acme__employees ORDER BY id"
+
+
+class TestQueryStream:
+    """Tests for batched export of query results."""
+
+    @pytest.mark.parametrize("transforms", [
+        [],
+        [_t('state_names', 'state'), _t('map_lookup', 'earn_code', lookup_table='acme__earnings_codes'),
+         _t('rename', 'pay', new_name='Pay ($)')],
+        [_t('titlecase', 'name'), _t('filter', 'state', operator='!=', value='tx'), _t('format_currency', 'pay')],
+    ])
+    def test_csv_matches_list_export(self, handler, transforms):
+        """Batched (and COPY) CSV holds the same cells as the list-based transform path."""
+        from backend.utils.bi_transforms import load_lookup_dictionaries, run_transforms
+        from backend.utils.streaming_export import iter_csv, open_query_stream
+
+        lookups = load_lookup_dictionaries(handler, 'acme')
+        expected = run_transforms(handler, SQL, transforms, lookups)
+        stream = open_query_stream(handler, SQL, transforms, lookups, batch_rows=300)
+        rows = _read_csv(b''.join(iter_csv(stream)))
+
+        assert rows[0] == [expected.renames.get(c, c) for c in expected.columns]
+        assert rows[1:] == [['' if v is None else str(v) for v in (r.get(c, '') for c in expected.columns)]
+                            for r in expected.rows]
+
+    def test_five_million_rows_at_bounded_memory(self, handler):
+        """A 5M-row CSV export streams without holding the result in memory."""
+        from backend.utils.streaming_export import iter_csv, open_query_stream, track_export, tracked_stream
+
+        sql = "SELECT range AS id, 'Employee ' || range AS name, range * 1.5 AS amount FROM range(5000000)"
+        stream = open_query_stream(handler, sql, [], {})
+        progress = track_export('csv', 'big.csv', stream.total_rows)
+        baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+        size = lines = 0
+        for chunk in tracked_stream(iter_csv(stream, progress), progress):
+            size += len(chunk)
+            lines += chunk.count(b'\n')
+
+        growth_mb = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline) / 1024
+        assert lines == 5_000_001 and size > 150_000_000
+        assert growth_mb < 100
+        assert progress.status == 'completed' and progress.rows_written == 5_000_000
+
+    def test_source_rows_counted_up_to_the_limit(self, handler):
+        """Past count_limit the count stops and the planner's estimate stands in."""
+        from backend.utils.streaming_export import open_query_stream
+
+        exact = open_query_stream(handler, SQL, [], {}, count_limit=5000)
+        assert (exact.total_rows, exact.rows_exact) == (2500, True)
+        estimated = open_query_stream(handler, SQL, [], {}, count_limit=100)
+        assert not estimated.rows_exact and estimated.total_rows > 100
+
+    def test_dropped_download_is_cancelled(self, handler):
+        from backend.utils.streaming_export import iter_csv, open_query_stream, track_export, tracked_stream
+
+        stream = open_query_stream(handler, SQL, [_t('titlecase', 'name')], {}, batch_rows=100)
+        progress = track_export('csv', 'out.csv', stream.total_rows)
+        body = tracked_stream(iter_csv(stream, progress), progress)
+        next(body)
+        body.close()                                    # what the server does when the client goes away
+        assert progress.status == 'cancelled' and progress.finished_at is not None
+
+    def test_xlsx_rolls_over_sheets(self, handler, monkeypatch, tmp_path):
+        """Rows past the sheet limit continue on 'Data 2' with the header repeated."""
+        from openpyxl import load_workbook
+        from backend.utils import streaming_export
+
+        monkeypatch.setattr(streaming_export, 'XLSX_MAX_ROWS', 1001)
+        stream = streaming_export.open_query_stream(handler, SQL, [_t('rename', 'id', new_name='ID')], {},
+                                                    batch_rows=700)
+        path = str(tmp_path / 'out.xlsx')
+        written = streaming_export.write_xlsx(stream, path, metadata=lambda rows: ["Export", f"Rows: {rows}"])
+
+        wb = load_workbook(path, read_only=True)
+        assert written == 2500
+        assert wb.sheetnames == ['Data', 'Data 2', 'Data 3', 'Metadata']
+        data = [list(ws.values) for ws in (wb['Data'], wb['Data 2'], wb['Data 3'])]
+        assert [len(rows) for rows in data] == [1001, 1001, 501]
+        assert data[1][0][0] == 'ID' and data[1][1][0] == 1000
+        assert list(wb['Metadata'].values)[1] == ('Rows: 2500',)
+
+
+class TestBIExportEndpoint:
+    """Tests for POST /api/bi/export streaming and background jobs."""
+
+    @pytest.fixture
+    def client(self, handler, monkeypatch, tmp_path):
+        import httpx
+        from fastapi import FastAPI
+        from backend.routers import bi_router
+        from backend.utils import streaming_export
+
+        monkeypatch.setattr(bi_router, 'get_structured_handler', lambda: handler)
+        monkeypatch.setattr(bi_router, '_export_job_progress', lambda project, filename: None)
+        monkeypatch.setattr(streaming_export, 'EXPORT_DIR', str(tmp_path))
+        app = FastAPI()
+        app.include_router(bi_router.router, prefix='/api')
+        return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://test')
+
+    @pytest.mark.asyncio
+    async def test_streamed_csv_reports_progress(self, client):
+        body = {'query': 'employees', 'project': 'acme', 'sql': SQL, 'format': 'csv',
+                'transforms': [{'type': 'state_names', 'column': 'state'}]}
+        async with client:
+            response = await client.post('/api/bi/export', json=body)
+            assert response.status_code == 200
+            rows = _read_csv(response.content)
+            assert len(rows) == 2501 and rows[1][1] == 'California'
+
+            status = (await client.get(f"/api/bi/export/{response.headers['x-export-id']}")).json()
+            assert status['status'] == 'completed' and status['rows_written'] == 2500
+
+            empty = await client.post('/api/bi/export', json={**body, 'sql': f"{SQL} LIMIT 0"})
+            assert empty.status_code == 404
+
+    @pytest.mark.asyncio
+    async def test_large_export_runs_as_background_job(self, client, monkeypatch):
+        from backend.routers import bi_router
+
+        monkeypatch.setattr(bi_router, 'BACKGROUND_ROWS', 1000)
+        body = {'query': 'employees', 'project': 'acme', 'sql': SQL, 'format': 'xlsx'}
+        async with client:
+            response = await client.post('/api/bi/export', json=body)
+            assert response.status_code == 202
+            job = response.json()
+            assert job['background'] and job['total_rows'] == 2500
+
+            status = (await client.get(job['status_url'])).json()
+            assert status['status'] == 'completed' and status['percent'] == 100
+
+            download = await client.get(job['download_url'])
+            assert download.status_code == 200
+            from openpyxl import load_workbook
+            wb = load_workbook(io.BytesIO(download.content), read_only=True)
+            assert wb.sheetnames == ['Data', 'Metadata']
+            assert len(list(wb['Data'].values)) == 2501
+
+
+class TestExportEngineStreaming:
+    """Tests for streamed playbook result exports."""
+
+    def test_streamed_output_matches(self):
+        from backend.engines.export import export_playbook_results
+
+        results = {'results': [
+            {'id': f'f{i}', 'engine': 'validate', 'success': i % 2 == 0,
+             'findings': [{'severity': 'error', 'finding_type': 'missing', 'message': f'row {i}-{j}'}
+                          for j in range(3)]}
+            for i in range(4000)
+        ]}
+        whole = export_playbook_results(results, 'raw_data', 'csv', {'project_name': 'acme'})
+        streamed = export_playbook_results(results, 'raw_data', 'csv', {'project_name': 'acme'}, stream=True)
+        chunks = list(streamed.iter_content())
+        assert len(chunks) > 1 and b''.join(chunks) == whole.content
+
+        xlsx = export_playbook_results(results, 'raw_data', 'xlsx', {'project_name': 'acme'}, stream=True)
+        from openpyxl import load_workbook
+        wb = load_workbook(io.BytesIO(b''.join(xlsx.iter_content())), read_only=True)
+        assert len(list(wb['Findings'].values)) == 12001
@@ -0,0 +1,158 @@
+"""
+Tests for Request Tracing
+=========================
+Tests that spans nest under one trace per request (including work handed
+to worker threads with in_context), that code outside a trace and
+unsampled traces record nothing, that finished traces are written as
+OTLP/JSON lines, and that the middleware returns the trace id and names
+the trace after the matched route.
+"""
+
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+
+@pytest.fixture
+def tracer():
+    from utils.tracing import Tracer, set_tracer
+
+    tracer = Tracer()
+    set_tracer(tracer)
+    yield tracer
+    set_tracer(None)
+
+
+class TestSpans:
+    """Tests for nesting, context propagation and sampling."""
+
+    def test_spans_nest_across_worker_threads(self, tracer):
+        from utils.tracing import current_trace_id, in_context, span, trace, traced
+
+        @traced('worker.task')
+        def task(n):
+            with span('worker.step', n=n):
+                return current_trace_id()
+
+        with trace('request', project='acme') as root:
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                ids = list(pool.map(in_context(task), range(3)))
+            with pytest.raises(ValueError):
+                with span('failing'):
+                    raise ValueError('bad input')
+
+        assert ids == [root.trace.trace_id] * 3
+        detail = tracer.get(root.trace.trace_id)
+        by_id = {s['span_id']: s for s in detail['span_tree']}
+        names = [s['name'] for s in detail['span_tree']]
+        assert names.count('worker.task') == 3 and names.count('worker.step') == 3
+        for step in (s for s in detail['span_tree'] if s['name'] == 'worker.step'):
+            assert by_id[step['parent_id']]['name'] == 'worker.task'
+            assert by_id[by_id[step['parent_id']]['parent_id']]['name'] == 'request'
+            assert step['depth'] == 2
+        assert detail['status'] == 'error' and detail['attributes'] == {'project': 'acme'}
+        failing = next(s for s in detail['span_tree'] if s['name'] == 'failing')
+        assert failing['error'] == 'ValueError: bad input'
+        assert tracer.traces(errors_only=True)[0]['trace_id'] == root.trace.trace_id
+
+    def test_nothing_recorded_outside_a_trace_or_unsampled(self, tracer):
+        from utils.tracing import Tracer, current_span, set_tracer, span, trace
+
+        with span('background.job') as job:
+            current_span().set('rows', 10)
+        assert not job.recording and tracer.stats()['traces_started'] == 0
+
+        unsampled = Tracer(sample_rate=0.0)
+        set_tracer(unsampled)
+        with trace('request'):
+            with span('child') as child:
+                assert not child.recording
+        assert unsampled.stats()['traces_started'] == 1 and unsampled.traces() == []
+
+    def test_span_limit_counts_the_rest(self):
+        from utils.tracing import Tracer, set_tracer, span, trace
+
+        tracer = Tracer(max_spans=5)
+        set_tracer(tracer)
+        try:
+            with trace('request'):
+                for _ in range(10):
+                    with span('step'):
+                        pass
+        finally:
+            set_tracer(None)
+        summary = tracer.traces()[0]
+        assert summary['spans'] == 5 and summary['dropped_spans'] == 6
+
+
+class TestExport:
+    """Tests for the OTLP/JSON file exporter."""
+
+    def test_traces_are_written_as_otlp_json_lines(self, tmp_path):
+        from utils.tracing import OTLPFileExporter, Tracer, set_tracer, span, trace
+
+        path = tmp_path / 'traces.jsonl'
+        tracer = Tracer(exporter=OTLPFileExporter(str(path), service_name='xlr8-test'))
+        set_tracer(tracer)
+        try:
+            for _ in range(2):
+                with trace('request', rows=3, ratio=0.5, cached=True):
+                    with span('db', statement='SELECT 1'):
+                        pass
+        finally:
+            set_tracer(None)
+
+        lines = path.read_text().splitlines()
+        assert len(lines) == 2 and tracer.stats()['exported'] == 2
+        request = json.loads(lines[0])['resourceSpans'][0]
+        assert request['resource']['attributes'][0]['value'] == {'stringValue': 'xlr8-test'}
+        root, child = request['scopeSpans'][0]['spans']
+        assert len(root['traceId']) == 32 and len(root['spanId']) == 16
+        assert child['parentSpanId'] == root['spanId'] and child['traceId'] == root['traceId']
+        assert (root['kind'], child['kind']) == (2, 1)
+        assert int(root['startTimeUnixNano']) <= int(child['startTimeUnixNano'])
+        assert int(child['endTimeUnixNano']) <= int(root['endTimeUnixNano'])
+        assert root['attributes'][:3] == [{'key': 'rows', 'value': {'intValue': '3'}},
+                                          {'key': 'ratio', 'value': {'doubleValue': 0.5}},
+                                          {'key': 'cached', 'value': {'boolValue': True}}]
+
+
+class TestMiddleware:
+    """Tests for TracingMiddleware on a FastAPI app."""
+
+    @pytest.mark.asyncio
+    async def test_trace_id_header_and_route_name(self, tracer):
+        import httpx
+        from fastapi import FastAPI, HTTPException
+        from utils.tracing import TracingMiddleware, span
+
+        app = FastAPI()
+
+        @app.get('/api/items/{item_id}')
+        def item(item_id: int):
+            with span('lookup', item_id=item_id):
+                if item_id == 0:
+                    raise HTTPException(status_code=503, detail='down')
+            return {'id': item_id}
+
+        @app.get('/health')
+        def health():
+            return {'ok': True}
+
+        app.add_middleware(TracingMiddleware)
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://test')
+
+        response = await client.get('/api/items/7')
+        assert response.status_code == 200
+        detail = tracer.get(response.headers['x-trace-id'])
+        assert detail['name'] == 'GET /api/items/{item_id}'
+        assert detail['attributes']['http.status_code'] == 200
+        assert [s['name'] for s in detail['span_tree']] == ['GET /api/items/{item_id}', 'lookup']
+
+        assert (await client.get('/api/items/0')).status_code == 503
+        assert tracer.traces()[0]['status'] == 'error'
+
+        assert 'x-trace-id' not in (await client.get('/health')).headers
+        assert tracer.stats()['traces_finished'] == 2
+        await client.aclose()
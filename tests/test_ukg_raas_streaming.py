@@ -0,0 +1,161 @@
+"""
+Tests for UKG Pro RaaS streaming execution
+===========================================
+Tests that execute_report_to_duckdb, fed through a stub transport in small
+chunks, writes the same rows the in-memory parser returns, stays under its
+buffer ceiling, leaves the target table alone on failure, and keeps
+DuckDB writes off the event loop.
+"""
+
+import base64
+import csv
+import io
+
+import pytest
+
+
+def _report_csv(rows=300):
+    out = io.StringIO()
+    writer = csv.writer(out, lineterminator='\n')
+    writer.writerow(['Employee Number', 'Name', 'Notes', 'Pay.Rate'])
+    for i in range(rows):
+        note = f'line one\nline "two" for {i}' if i % 7 == 0 else f'note, {i}'
+        writer.writerow([f'E{i:05d}', f'Émployee {i}', note, f'{i * 1.5:.2f}'])
+    return out.getvalue()
+
+
+def _envelope(content: str) -> bytes:
+    return (
+        '<?xml version="1.0" encoding="utf-8"?>'
+        '<s:Envelope xmlns:s="http://schemas.xmlsoap.org/soap/envelope/"><s:Body>'
+        '<ExecuteReportResponse xmlns="http://www.ultipro.com/dataservices/bidata/2">'
+        f'<ReportStream>{content}</ReportStream>'
+        '</ExecuteReportResponse></s:Body></s:Envelope>'
+    ).encode('utf-8')
+
+
+def _escape(text: str) -> str:
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+
+def _client(body: bytes, chunk_size=97, status=200):
+    import httpx
+    from backend.services.ukg_pro_raas import UKGProRaaSClient, UKGCredentials
+
+    async def stream():
+        for i in range(0, len(body), chunk_size):
+            yield body[i:i + chunk_size]
+
+    def handler(request):
+        return httpx.Response(status, content=stream())
+
+    client = UKGProRaaSClient(UKGCredentials('stub.local', 'key', 'ws', 'user', 'pw'))
+    client.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return client
+
+
+@pytest.fixture
+def conn():
+    import duckdb
+
+    conn = duckdb.connect(':memory:')
+    yield conn
+    conn.close()
+
+
+class TestStreamingExecution:
+    """Tests for execute_report_to_duckdb."""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize('encode', [False, True])
+    async def test_matches_in_memory_parse(self, conn, encode):
+        """Streamed rows equal what execute_report parses, raw or base64."""
+        report = _report_csv()
+        content = base64.b64encode(report.encode('utf-8')).decode() if encode else _escape(report)
+        body = _envelope(content)
+
+        expected = await _client(body).execute_report('/content/report')
+        progress = []
+        result = await _client(body).execute_report_to_duckdb(
+            '/content/report', conn, 'emp', batch_rows=50,
+            progress_callback=lambda rows, received: progress.append(rows)
+        )
+
+        assert result.success, result.error
+        assert result.row_count == expected.row_count == 300
+        assert result.columns == expected.columns
+        assert result.bytes_received == len(body)
+        assert progress == [50, 100, 150, 200, 250, 300]
+
+        rows = conn.execute('SELECT * FROM emp').fetchall()
+        assert [list(r) for r in rows] == [[row[c] for c in expected.columns] for row in expected.data]
+        columns = [r[0] for r in conn.execute('DESCRIBE emp').fetchall()]
+        assert columns == ['Employee_Number', 'Name', 'Notes', 'Pay_Rate']
+        assert conn.execute(
+            "SELECT COUNT(*) FROM information_schema.tables WHERE table_name = 'emp__streaming'"
+        ).fetchone()[0] == 0
+
+    @pytest.mark.asyncio
+    async def test_buffer_ceiling(self, conn):
+        """Buffered data stays under the ceiling; an oversized record fails the run."""
+        body = _envelope(_escape(_report_csv(2000)))
+        result = await _client(body, chunk_size=1024).execute_report_to_duckdb(
+            '/content/report', conn, 'emp', max_buffer_bytes=16 * 1024
+        )
+        assert result.success
+        assert result.row_count == 2000
+        assert result.peak_buffer_bytes <= 16 * 1024 + 1024
+
+        huge = _envelope('A,B\n"' + 'x' * 50000 + '",1\n')
+        result = await _client(huge).execute_report_to_duckdb(
+            '/content/report', conn, 'emp', max_buffer_bytes=16 * 1024
+        )
+        assert not result.success
+        assert 'buffer' in result.error
+
+    @pytest.mark.asyncio
+    async def test_failure_keeps_existing_table(self, conn):
+        """A SOAP fault or HTTP error leaves the previous table untouched."""
+        conn.execute("CREATE TABLE emp AS SELECT 'old' AS v")
+
+        fault = (
+            b'<s:Envelope xmlns:s="http://schemas.xmlsoap.org/soap/envelope/"><s:Body><s:Fault>'
+            b'<faultcode>s:Client</faultcode><faultstring>Invalid report path</faultstring>'
+            b'</s:Fault></s:Body></s:Envelope>'
+        )
+        result = await _client(fault).execute_report_to_duckdb('/content/missing', conn, 'emp')
+        assert not result.success
+        assert 'Invalid report path' in result.error
+
+        result = await _client(b'Unauthorized', status=401).execute_report_to_duckdb('/content/report', conn, 'emp')
+        assert result.error.startswith('HTTP 401')
+
+        assert conn.execute('SELECT * FROM emp').fetchall() == [('old',)]
+
+    @pytest.mark.asyncio
+    async def test_writes_do_not_block_the_event_loop(self, conn):
+        """While a batch waits on the DuckDB lock, other coroutines keep running."""
+        import asyncio
+        import threading
+
+        lock = threading.Lock()
+        ticks = []
+
+        async def heartbeat():
+            while True:
+                ticks.append(1)
+                await asyncio.sleep(0.01)
+
+        def progress(rows, received):
+            if rows == 50:
+                lock.acquire()
+                threading.Timer(0.2, lock.release).start()   # the next write waits 0.2s for it
+
+        beat = asyncio.create_task(heartbeat())
+        result = await _client(_envelope(_escape(_report_csv()))).execute_report_to_duckdb(
+            '/content/report', conn, 'emp', batch_rows=50, lock=lock, progress_callback=progress
+        )
+        beat.cancel()
+
+        assert result.success and result.row_count == 300
+        assert len(ticks) >= 10
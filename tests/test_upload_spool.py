@@ -0,0 +1,121 @@
+"""
+Tests for Upload Spooling and Dedup
+===================================
+Tests that uploads are copied to disk in chunks with the same SHA-256 as
+hashing the whole file, at bounded memory, and that identical re-uploads
+return the prior job (only while its outputs still exist) unless
+force_reprocess is set.
+"""
+
+import hashlib
+import io
+import os
+import resource
+
+import pytest
+
+
+class PatternFile(io.RawIOBase):
+    """A large readable stream generated on the fly (never held in memory)."""
+
+    def __init__(self, size):
+        self.remaining = size
+        self.block = bytes(range(256)) * 4096  # 1 MiB
+
+    def readable(self):
+        return True
+
+    def read(self, n=-1):
+        n = self.remaining if n is None or n < 0 else min(n, self.remaining)
+        self.remaining -= n
+        return (self.block * (n // len(self.block) + 1))[:n]
+
+
+class TestSpool:
+    """Tests for chunked copy + incremental hash."""
+
+    def test_hash_matches_whole_file(self, tmp_path):
+        from backend.utils.upload_spool import spool_file
+
+        data = os.urandom(3 * 1024 * 1024 + 17)
+        size, digest = spool_file(io.BytesIO(data), str(tmp_path / 'out.bin'), chunk_bytes=64 * 1024)
+        assert size == len(data) and digest == hashlib.sha256(data).hexdigest()
+        assert (tmp_path / 'out.bin').read_bytes() == data
+
+    def test_large_upload_bounded_memory(self, tmp_path):
+        from backend.utils.upload_spool import spool_file
+
+        baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        size, _ = spool_file(PatternFile(400 * 1024 * 1024), str(tmp_path / 'big.bin'))
+        growth_mb = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline) / 1024
+        assert size == 400 * 1024 * 1024 and os.path.getsize(tmp_path / 'big.bin') == size
+        assert growth_mb < 50
+
+
+class TestDedup:
+    """Tests for the prior-ingest short-circuit."""
+
+    JOB = {'id': 'job-1', 'status': 'completed', 'completed_at': '2026-01-05T10:00:00',
+           'input_data': {'filename': 'register_jan.xlsx', 'file_hash': 'abc', 'route': 'structured'},
+           'result_data': {'filename': 'register_jan.xlsx', 'type': 'structured', 'tables_created': 2,
+                           'total_rows': 1200}}
+
+    def test_requires_outputs_to_exist(self, monkeypatch):
+        from backend.utils import upload_spool
+        from utils.database.models import ProcessingJobModel
+
+        monkeypatch.setattr(ProcessingJobModel, 'find_completed_by_hash', staticmethod(lambda h, p, r: self.JOB))
+        tables = {'acme': ['acme__register_jan__earnings', 'acme__register_jan__taxes']}
+        monkeypatch.setattr(upload_spool, '_existing_tables', lambda project, filename: tables.get(project, []))
+
+        prior = upload_spool.find_prior_ingest('abc', 'acme', 'structured')
+        assert prior and prior.tables == tables['acme'] and prior.filename == 'register_jan.xlsx'
+        response = prior.to_response('register_copy.xlsx')
+        assert response['deduplicated'] and response['job_id'] == 'job-1' and response['total_rows'] == 1200
+
+        tables.clear()
+        assert upload_spool.find_prior_ingest('abc', 'acme', 'structured') is None
+        assert upload_spool.find_prior_ingest('abc', 'acme', 'register') is None
+
+    @pytest.fixture
+    def client(self, monkeypatch):
+        import httpx
+        from fastapi import FastAPI
+        from backend.routers import smart_router
+        from backend.utils.upload_spool import PriorIngest
+
+        calls = {'routed': [], 'lookups': []}
+
+        async def route_to_structured(**kwargs):
+            with open(kwargs['file_path'], 'rb') as f:
+                calls['routed'].append((kwargs['file_hash'], hashlib.sha256(f.read()).hexdigest()))
+            return {'success': True, 'job_id': 'job-2', 'status': 'queued', 'route': 'structured'}
+
+        def find_prior_ingest(file_hash, project, route):
+            calls['lookups'].append((file_hash, project, route))
+            return PriorIngest(job=self.JOB, route=route, tables=['acme__register_jan__earnings'])
+
+        monkeypatch.setattr(smart_router, '_route_to_structured', route_to_structured)
+        monkeypatch.setattr(smart_router, 'find_prior_ingest', find_prior_ingest)
+        monkeypatch.setattr(smart_router, 'METRICS_AVAILABLE', False)
+        monkeypatch.setattr(smart_router, 'MODELS_AVAILABLE', False)
+        app = FastAPI()
+        app.include_router(smart_router.router, prefix='/api')
+        return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://test'), calls
+
+    @pytest.mark.asyncio
+    async def test_reupload_short_circuits(self, client):
+        client, calls = client
+        content = b'employee_id,amount\n' + b'\n'.join(b'%d,%d' % (i, i * 3) for i in range(50000))
+        form = {'project': 'acme', 'processing_type': 'structured'}
+        async with client:
+            response = await client.post('/api/upload', data=form, files={'file': ('register_jan.csv', content)})
+            body = response.json()
+            assert response.status_code == 200 and body['deduplicated'] and body['job_id'] == 'job-1'
+            assert calls['lookups'] == [(hashlib.sha256(content).hexdigest(), 'acme', 'structured')]
+            assert calls['routed'] == []
+
+            response = await client.post('/api/upload', data={**form, 'force_reprocess': 'true'},
+                                         files={'file': ('register_jan.csv', content)})
+            assert response.json()['job_id'] == 'job-2'
+            assert calls['routed'] == [(hashlib.sha256(content).hexdigest(),) * 2]
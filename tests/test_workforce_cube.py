@@ -0,0 +1,160 @@
+"""
+Tests for WorkforceCube
+========================
+Tests that snapshot answers from the cube match the scan path, and that the
+cube is rebuilt only when the source table changes.
+"""
+
+import random
+from datetime import datetime
+
+import pytest
+
+
+def _employee_rows(count=500, seed=7):
+    rng = random.Random(seed)
+    year = datetime.now().year
+    rows = []
+    for i in range(count):
+        hire = f"{rng.randint(year - 6, year)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+        status = rng.choice(['A', 'A', 'A', 'T', 'L'])
+        if status == 'T':
+            term_year = rng.randint(int(hire[:4]), year)
+            term = f"{term_year}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+        else:
+            term = rng.choice([None, ''])
+        rows.append((f"E{i}", status, hire, term, rng.choice(['C1', 'C2']), rng.choice(['NY', 'TX', 'PA'])))
+    return rows
+
+
+class TestWorkforceCube:
+    """Tests for cube build, freshness and snapshot equivalence."""
+
+    @pytest.fixture
+    def handler(self, duckdb_handler):
+        conn = duckdb_handler.conn
+        conn.execute("""
+            CREATE TABLE _schema_metadata (
+                id INTEGER, project VARCHAR, table_name VARCHAR, entity_type VARCHAR,
+                truth_type VARCHAR, row_count INTEGER, column_count INTEGER,
+                display_name VARCHAR, is_current BOOLEAN,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE _column_profiles (
+                project VARCHAR, table_name VARCHAR, column_name VARCHAR,
+                filter_category VARCHAR, filter_priority INTEGER, distinct_count INTEGER,
+                distinct_values JSON, inferred_type VARCHAR
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE test__personal (
+                employee_number VARCHAR, employment_status VARCHAR,
+                hire_date VARCHAR, termination_date VARCHAR, company VARCHAR, location VARCHAR
+            )
+        """)
+        conn.executemany("INSERT INTO test__personal VALUES (?, ?, ?, ?, ?, ?)", _employee_rows())
+        conn.execute("""
+            INSERT INTO _schema_metadata VALUES
+            (1, 'test', 'test__personal', 'personal', 'reality', 500, 6, 'Personal', TRUE, '2025-01-01')
+        """)
+        for column, category in [('employee_number', None), ('employment_status', 'status'),
+                                 ('hire_date', None), ('termination_date', None),
+                                 ('company', 'company'), ('location', 'location')]:
+            conn.execute(
+                "INSERT INTO _column_profiles VALUES ('test', 'test__personal', ?, ?, 10, 3, ?, 'categorical')",
+                [column, category, '["A", "T", "L"]' if category == 'status' else None]
+            )
+        return duckdb_handler
+
+    def _snapshot(self, handler):
+        from backend.utils.intelligence.query_resolver import QueryResolver
+
+        resolver = QueryResolver(handler)
+        status = resolver._lookup_status_column('test', 'test__personal')
+        return resolver._generate_workforce_snapshot('test', 'test__personal', status, ['A', 'T', 'L'])
+
+    def test_cube_snapshot_matches_scan(self, handler):
+        """Cube-backed snapshot returns exactly the scan-backed numbers."""
+        from backend.utils.intelligence.workforce_cube import refresh_workforce_cube
+
+        scanned = self._snapshot(handler)
+        assert scanned['summary']['source'] == 'scan'
+
+        stats = refresh_workforce_cube(handler, 'test')
+        assert stats['built'] is True
+        assert stats['row_count'] == 500
+
+        cubed = self._snapshot(handler)
+        assert cubed['summary']['source'] == 'cube'
+        assert cubed['years'] == scanned['years']
+        assert cubed['summary']['current_active'] == scanned['summary']['current_active']
+        assert cubed['summary']['total_records'] == 500
+
+    def test_refresh_skips_unchanged_and_rebuilds_on_new_version(self, handler):
+        """Only a new _schema_metadata version triggers a rebuild."""
+        from backend.utils.intelligence.workforce_cube import refresh_workforce_cube
+
+        assert refresh_workforce_cube(handler, 'test')['built'] is True
+        assert refresh_workforce_cube(handler, 'test')['reason'] == 'up to date'
+
+        conn = handler.conn
+        conn.execute("INSERT INTO test__personal VALUES ('X1', 'A', '2001-01-01', NULL, 'C1', 'NY')")
+        conn.execute("UPDATE _schema_metadata SET is_current = FALSE WHERE id = 1")
+        conn.execute("""
+            INSERT INTO _schema_metadata VALUES
+            (2, 'test', 'test__personal', 'personal', 'reality', 501, 6, 'Personal', TRUE, '2025-02-01')
+        """)
+        stale = self._snapshot(handler)
+        assert stale['summary']['source'] == 'scan'
+        assert stale['summary']['total_records'] == 501
+
+        stats = refresh_workforce_cube(handler, 'test')
+        assert stats['built'] is True
+        assert stats['row_count'] == 501
+        assert self._snapshot(handler)['summary']['source'] == 'cube'
+
+    def test_breakdowns_and_reality_context(self, handler):
+        """Company breakdown and context counts agree with direct GROUP BY."""
+        from backend.utils.intelligence.query_resolver import QueryResolver
+        from backend.utils.intelligence.workforce_cube import WorkforceCube, refresh_workforce_cube
+
+        refresh_workforce_cube(handler, 'test')
+        cube = WorkforceCube(handler.conn, 'test')
+
+        expected = dict(handler.conn.execute("""
+            SELECT company, COUNT(*) FROM test__personal
+            WHERE employment_status = 'A' GROUP BY company
+        """).fetchall())
+        assert cube.breakdown('test__personal', 'company', 'employment_status', ['A']) == expected
+
+        context = QueryResolver(handler)._gather_reality_context(
+            'test', 'test__personal', 'employment_status', ['A']
+        )
+        assert context['source'] == 'cube'
+        assert context['answer'] == sum(expected.values())
+        assert context['total_in_table'] == 500
+
+    def test_reads_issue_no_ddl_and_builds_use_their_own_transaction(self, handler):
+        """Reading before any build creates nothing; a failed build can't roll back other writes."""
+        from backend.utils.intelligence.workforce_cube import WorkforceCube
+
+        conn = handler.conn
+        cube = WorkforceCube(conn, 'test')
+        assert self._snapshot(handler)['summary']['source'] == 'scan'
+        assert cube.status_counts('test__personal', 'employment_status') is None
+        assert cube.get_stats() == []
+        assert not conn.execute(
+            "SELECT 1 FROM duckdb_tables() WHERE table_name LIKE '_workforce_cube%'").fetchall()
+
+        # Another request's open transaction on the shared connection
+        conn.execute("BEGIN TRANSACTION")
+        conn.execute("INSERT INTO test__personal VALUES ('X1', 'A', '2001-01-01', NULL, 'C1', 'NY')")
+        with pytest.raises(Exception):
+            cube.build('no_such_table', 'employment_status')
+        assert conn.execute("SELECT COUNT(*) FROM test__personal").fetchone()[0] == 501
+        conn.execute("COMMIT")
+
+        assert cube.build('test__personal', 'employment_status')['row_count'] == 501
+        assert cube.get_stats()[0]['table'] == 'test__personal'
@@ -0,0 +1,827 @@
+"""
+Column Sketches - One-Pass, Mergeable Column Statistics
+=======================================================
+
+Profiling ran six or more exact queries per column (COUNT DISTINCT,
+DISTINCT samples, GROUP BY value counts, TRY_CAST scans for numeric and
+date detection), and the detect engine's outlier checks scanned the
+column again for its mean / standard deviation or quartiles.
+
+Each column now gets a sketch, built from one scan of the table (or of
+each batch of a streamed load) in which DuckDB counts every column's
+distinct values, and kept in _column_sketches:
+
+- Exact value counts while the column has at most XLR8_SKETCH_EXACT_LIMIT
+  distinct values, so categorical columns keep exact distinct lists and
+  distributions.
+- Past that, HyperLogLog for the distinct count and a count-min sketch
+  with a top-K candidate list for the most frequent values.
+- KLL quantiles plus exact count / mean / variance / min / max of the
+  numeric values (for text columns: the values that parse as numbers,
+  with the same TRY_CAST profiling uses).
+- Null and blank counts, date parse count and range, sample values.
+
+Every part merges (register max, counter sums, compactor concatenation),
+so the sketches of appended rows fold into a table's sketches without
+rescanning it. Values are hashed with DuckDB's hash(); a sketch records
+which hash function built it and SketchStore.append rebuilds rather than
+merge across a change.
+
+A stored sketch is only used while the table is the one it was built
+from: same DuckDB table_oid and estimated_size, as in the schema catalog.
+Tables recreated or grown by other writers are re-sketched on their next
+profile; row deletes that keep the table are not detected.
+
+Settings:
+    XLR8_COLUMN_SKETCHES       - build and read sketches (default true)
+    XLR8_SKETCH_EXACT_LIMIT    - distinct values counted exactly (default 500)
+    XLR8_SKETCH_HLL_PRECISION  - 2^p HyperLogLog registers (default 12, ~1.6% error)
+    XLR8_SKETCH_TOP_K          - frequent value candidates kept (default 100)
+    XLR8_SKETCH_KLL_K          - quantile compactor size (default 200, ~1.3% rank error)
+
+Deploy to: utils/column_sketches.py
+
+Usage:
+    from utils.column_sketches import SketchStore, build_table_sketches
+
+    store = SketchStore(conn)
+    sketches = store.load('acme_employees')              # None if missing or stale
+    if sketches is None:
+        sketches = build_table_sketches(conn, 'acme_employees')
+        store.save('ACME', 'acme_employees', sketches)
+    sketches['annual_salary'].quantile(0.75), sketches['department'].value_counts(10)
+"""
+
+import io
+import os
+import uuid
+import json
+import math
+import time
+import logging
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SKETCH_TABLE = '_column_sketches'
+SKETCH_FORMAT = 1
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except ValueError:
+        logger.warning(f"[SKETCH] Ignoring invalid {name}")
+        return default
+
+
+ENABLED = os.getenv('XLR8_COLUMN_SKETCHES', 'true').lower() not in ('0', 'false', 'no', 'off')
+EXACT_LIMIT = _env_int('XLR8_SKETCH_EXACT_LIMIT', 500)
+HLL_PRECISION = min(16, max(4, _env_int('XLR8_SKETCH_HLL_PRECISION', 12)))
+TOP_K = _env_int('XLR8_SKETCH_TOP_K', 100)
+KLL_K = max(8, _env_int('XLR8_SKETCH_KLL_K', 200))
+
+# Count-min: overcount <= e / width * rows with probability 1 - e^-depth
+CMS_WIDTH, CMS_DEPTH = 1024, 4
+
+_NUMERIC_TYPES = ('INT', 'DOUBLE', 'FLOAT', 'DECIMAL', 'NUMERIC', 'REAL')
+
+_U64 = np.uint64
+
+
+def _quote(identifier: str) -> str:
+    return '"' + str(identifier).replace('"', '""') + '"'
+
+
+def column_kind(column_type: str) -> str:
+    """number, date, timestamp or text - how a DuckDB column type is sketched."""
+    t = str(column_type).upper()
+    if any(n in t for n in _NUMERIC_TYPES) and not t.startswith('INTERVAL'):
+        return 'number'
+    if t == 'DATE':
+        return 'date'
+    if t.startswith('TIMESTAMP'):
+        return 'timestamp'
+    return 'text'
+
+
+# =============================================================================
+# SKETCHES
+# =============================================================================
+
+def _leading_zeros(x: np.ndarray) -> np.ndarray:
+    n = np.zeros(len(x), dtype=np.uint8)
+    for shift in (32, 16, 8, 4, 2, 1):
+        empty = (x >> _U64(64 - shift)) == 0
+        n += empty.astype(np.uint8) * shift
+        x = np.where(empty, x << _U64(shift), x)
+    return n + (x == 0)
+
+
+class HyperLogLog:
+    """Distinct count estimate from 2^p registers (relative error ~1.04 / sqrt(2^p))."""
+
+    def __init__(self, precision: int = HLL_PRECISION, registers: Optional[np.ndarray] = None):
+        self.precision = precision
+        self.registers = registers if registers is not None else np.zeros(1 << precision, dtype=np.uint8)
+
+    def update(self, hashes: np.ndarray) -> None:
+        if not len(hashes):
+            return
+        p = self.precision
+        index = (hashes >> _U64(64 - p)).astype(np.intp)
+        rank = np.minimum(_leading_zeros(hashes << _U64(p)) + 1, 64 - p + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other: 'HyperLogLog') -> None:
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self) -> float:
+        m = len(self.registers)
+        raw = (0.7213 / (1 + 1.079 / m)) * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int32)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            return m * math.log(m / zeros)          # small range: linear counting
+        return float(raw)
+
+    @property
+    def relative_error(self) -> float:
+        return 1.04 / math.sqrt(len(self.registers))
+
+
+class CountMinSketch:
+    """Frequency estimates that never undercount (overcount <= e / width * total)."""
+
+    def __init__(self, width: int = CMS_WIDTH, depth: int = CMS_DEPTH, table: Optional[np.ndarray] = None):
+        self.table = table if table is not None else np.zeros((depth, width), dtype=np.int64)
+
+    def _columns(self, hashes: np.ndarray) -> List[np.ndarray]:
+        depth, width = self.table.shape
+        h1 = hashes & _U64(0xFFFFFFFF)
+        h2 = (hashes >> _U64(32)) | _U64(1)
+        return [((h1 + _U64(i) * h2) % _U64(width)).astype(np.intp) for i in range(depth)]
+
+    def update(self, hashes: np.ndarray, counts: np.ndarray) -> None:
+        for row, columns in enumerate(self._columns(hashes)):
+            np.add.at(self.table[row], columns, counts)
+
+    def estimate(self, hashes: np.ndarray) -> np.ndarray:
+        columns = self._columns(hashes)
+        return np.min([self.table[row][c] for row, c in enumerate(columns)], axis=0)
+
+    def merge(self, other: 'CountMinSketch') -> None:
+        self.table += other.table
+
+    @property
+    def epsilon(self) -> float:
+        return math.e / self.table.shape[1]
+
+    @property
+    def confidence(self) -> float:
+        return 1 - math.exp(-self.table.shape[0])
+
+
+class KLLSketch:
+    """
+    Quantiles from a stack of compactors (Karnin, Lang, Liberty). Level h
+    items weigh 2^h; a full level is sorted and every other item, from a
+    random offset, moves up. A compaction shifts any rank by at most the
+    level's weight, however many items it halves, so whole chunks are
+    compacted at once.
+    """
+
+    def __init__(self, k: int = KLL_K):
+        self.k = k
+        self.n = 0
+        self.levels: List[np.ndarray] = [np.empty(0)]
+        self._rng = np.random.default_rng()
+
+    def _capacity(self, level: int) -> int:
+        return max(2, int(math.ceil(self.k * (2 / 3) ** (len(self.levels) - level - 1))))
+
+    def update(self, values: np.ndarray) -> None:
+        if not len(values):
+            return
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self.n += len(values)
+        self._compress()
+
+    def merge(self, other: 'KLLSketch') -> None:
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.n += other.n
+        self._compress()
+
+    def _compress(self) -> None:
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                keep = len(items) % 2                 # an odd item stays behind
+                offset = int(self._rng.integers(2))
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1],
+                                                         items[keep:][offset::2]])
+                self.levels[level] = items[:keep]
+            level += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Linear interpolation (as PERCENTILE_CONT) while every item is kept."""
+        items = np.concatenate(self.levels)
+        if not len(items):
+            return None
+        if len(self.levels) == 1:
+            return float(np.quantile(items, q))
+        weights = np.concatenate([np.full(len(items), 1 << level, dtype=np.int64)
+                                  for level, items in enumerate(self.levels)])
+        order = np.argsort(items, kind='stable')
+        cumulative = np.cumsum(weights[order])
+        index = int(np.searchsorted(cumulative, q * cumulative[-1], side='left'))
+        return float(items[order][min(index, len(items) - 1)])
+
+    @property
+    def rank_error(self) -> float:
+        """Normalized rank error (the DataSketches KLL bound); 0 while nothing was compacted."""
+        return 0.0 if len(self.levels) == 1 else 2.296 / self.k ** 0.9723
+
+
+class ColumnSketch:
+    """
+    Everything profiling and the outlier checks need to know about one
+    column. Values are kept as DuckDB renders them as VARCHAR - what the
+    exact profiling queries showed - so keys from every build compare equal.
+    """
+
+    def __init__(self, column_type: str = 'VARCHAR'):
+        self.column_type = column_type
+        self.kind = column_kind(column_type)
+        self.count = 0
+        self.nulls = 0
+        self.blanks = 0
+        self.samples: List[str] = []
+        self.exact: Optional[Dict[str, int]] = {}
+        self.hll: Optional[HyperLogLog] = None
+        self.cms: Optional[CountMinSketch] = None
+        self.heavy: Dict[str, None] = {}
+        # DuckDB hash() of every exact / candidate value (hashing happens in SQL
+        # only); hash_tag identifies the hash function, so sketches from a
+        # DuckDB that hashes differently are never merged
+        self.hashes: Dict[str, int] = {}
+        self.hash_tag: Optional[int] = None
+        # numeric values: count, mean, sum of squared deviations, min, max
+        self.moments = [0, 0.0, 0.0, None, None]
+        self.kll = KLLSketch()
+        self.dates = [0, None, None]
+
+    # ---- building -----------------------------------------------------------
+
+    def _add_counts(self, counts: Dict[str, int]) -> None:
+        if self.exact is not None:
+            exact = self.exact
+            for key, count in counts.items():
+                exact[key] = exact.get(key, 0) + count
+            if len(exact) > EXACT_LIMIT:
+                self._saturate()
+            return
+        self._add_hashed(list(counts), np.fromiter(counts.values(), dtype=np.int64, count=len(counts)))
+
+    def _hashes_of(self, keys: List[str]) -> np.ndarray:
+        return np.fromiter((self.hashes[key] for key in keys), dtype=_U64, count=len(keys))
+
+    def _add_hashed(self, keys: List[str], counts: np.ndarray) -> None:
+        hashes = self._hashes_of(keys)
+        self.hll.update(hashes)
+        self.cms.update(hashes, counts)
+        top = np.argsort(-counts, kind='stable')[:TOP_K]
+        self._update_heavy([keys[i] for i in top])
+
+    def _saturate(self) -> None:
+        """Too many distinct values to count exactly: switch to HLL + count-min."""
+        exact, self.exact = self.exact, None
+        self.hll, self.cms = HyperLogLog(), CountMinSketch()
+        if exact:
+            self._add_hashed(list(exact), np.fromiter(exact.values(), dtype=np.int64, count=len(exact)))
+
+    def _update_heavy(self, keys: List[str]) -> None:
+        candidates = list(dict.fromkeys(list(self.heavy) + keys))
+        if len(candidates) > TOP_K:
+            estimates = self.cms.estimate(self._hashes_of(candidates))
+            candidates = [candidates[i] for i in np.argsort(-estimates, kind='stable')[:TOP_K]]
+        self.heavy = dict.fromkeys(candidates)
+        self.hashes = {key: self.hashes[key] for key in candidates}
+
+    def merge(self, other: 'ColumnSketch') -> None:
+        """Fold in the sketch of more rows of the same column."""
+        if other.hash_tag is not None:
+            if self.hash_tag is not None and self.hash_tag != other.hash_tag:
+                raise ValueError("column sketches were hashed by different DuckDB versions")
+            self.hash_tag = other.hash_tag
+        self.hashes.update(other.hashes)
+        self.count += other.count
+        self.nulls += other.nulls
+        self.blanks += other.blanks
+        for sample in other.samples:
+            if len(self.samples) < 5 and sample not in self.samples:
+                self.samples.append(sample)
+
+        if other.exact is not None:
+            self._add_counts(other.exact)
+        else:
+            if self.exact is not None:
+                self._saturate()
+            self.hll.merge(other.hll)
+            self.cms.merge(other.cms)
+            self._update_heavy(list(other.heavy))
+
+        if other.moments[0]:
+            n, mean, m2, low, high = self.moments
+            nb, mb, m2b, lowb, highb = other.moments
+            total = n + nb
+            delta = mb - mean
+            self.moments = [total, mean + delta * nb / total, m2 + m2b + delta * delta * n * nb / total,
+                            lowb if low is None else min(low, lowb), highb if high is None else max(high, highb)]
+            self.kll.merge(other.kll)
+        if other.dates[0]:
+            self.dates = [self.dates[0] + other.dates[0],
+                          other.dates[1] if self.dates[1] is None else min(self.dates[1], other.dates[1]),
+                          other.dates[2] if self.dates[2] is None else max(self.dates[2], other.dates[2])]
+
+    # ---- reading ------------------------------------------------------------
+
+    @property
+    def null_count(self) -> int:
+        """NULLs, plus blank and 'nan' strings in text columns."""
+        return self.nulls + self.blanks
+
+    @property
+    def distinct_exact(self) -> bool:
+        return self.exact is not None
+
+    @property
+    def distinct_count(self) -> int:
+        """Distinct non-NULL values (as COUNT(DISTINCT)); estimated past the exact limit."""
+        if self.exact is not None:
+            return len(self.exact)
+        non_null = self.count - self.nulls
+        return int(min(non_null, max(len(self.heavy), round(self.hll.estimate()))))
+
+    def values(self) -> Optional[List[str]]:
+        """Every distinct value, or None once the column passed the exact limit."""
+        return None if self.exact is None else list(self.exact)
+
+    def value_counts(self, limit: Optional[int] = None) -> List[Tuple[Any, int]]:
+        """Most frequent values first (count-min estimates past the exact limit)."""
+        if self.exact is not None:
+            pairs = sorted(self.exact.items(), key=lambda item: -item[1])
+        else:
+            keys = list(self.heavy)
+            estimates = self.cms.estimate(self._hashes_of(keys)) if keys else []
+            pairs = sorted(zip(keys, (int(e) for e in estimates)), key=lambda item: -item[1])
+        return pairs[:limit] if limit else pairs
+
+    @property
+    def numeric_count(self) -> int:
+        return self.moments[0]
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.moments[1] if self.moments[0] else None
+
+    @property
+    def std(self) -> Optional[float]:
+        """Sample standard deviation, as DuckDB's STDDEV."""
+        n = self.moments[0]
+        return math.sqrt(self.moments[2] / (n - 1)) if n > 1 else None
+
+    @property
+    def min_value(self) -> Optional[float]:
+        return self.moments[3]
+
+    @property
+    def max_value(self) -> Optional[float]:
+        return self.moments[4]
+
+    def quantile(self, q: float) -> Optional[float]:
+        return self.kll.quantile(q)
+
+    @property
+    def date_count(self) -> int:
+        return self.dates[0]
+
+    @property
+    def min_date(self) -> Optional[str]:
+        return self.dates[1]
+
+    @property
+    def max_date(self) -> Optional[str]:
+        return self.dates[2]
+
+    def error_bounds(self) -> Dict[str, float]:
+        """0 where the answer is exact."""
+        return {
+            'distinct_relative': 0.0 if self.exact is not None else round(self.hll.relative_error, 4),
+            'frequency_overcount_rows': 0 if self.exact is not None else int(math.ceil(self.cms.epsilon * self.count)),
+            'frequency_confidence': 1.0 if self.exact is not None else round(self.cms.confidence, 4),
+            'quantile_rank': round(self.kll.rank_error, 4),
+        }
+
+    # ---- storage ------------------------------------------------------------
+
+    def to_bytes(self) -> bytes:
+        meta = {
+            'format': SKETCH_FORMAT, 'column_type': self.column_type, 'count': self.count,
+            'nulls': self.nulls, 'blanks': self.blanks, 'samples': self.samples,
+            'exact': None if self.exact is None else list(self.exact.items()),
+            'heavy': list(self.heavy), 'hashes': list(self.hashes.items()), 'hash_tag': self.hash_tag,
+            'moments': self.moments, 'dates': self.dates,
+            'kll_k': self.kll.k, 'kll_n': self.kll.n, 'kll_levels': [len(items) for items in self.kll.levels],
+        }
+        arrays = {'meta': np.frombuffer(json.dumps(meta).encode('utf-8'), dtype=np.uint8),
+                  'kll': np.concatenate(self.kll.levels)}
+        if self.exact is None:
+            arrays.update(hll=self.hll.registers, cms=self.cms.table)
+        buf = io.BytesIO()
+        np.savez_compressed(buf, **arrays)
+        return buf.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'ColumnSketch':
+        with np.load(io.BytesIO(data), allow_pickle=False) as arrays:
+            meta = json.loads(arrays['meta'].tobytes().decode('utf-8'))
+            sketch = cls(meta['column_type'])
+            sketch.count, sketch.nulls, sketch.blanks = meta['count'], meta['nulls'], meta['blanks']
+            sketch.samples = meta['samples']
+            sketch.exact = None if meta['exact'] is None else {k: c for k, c in meta['exact']}
+            sketch.heavy = dict.fromkeys(meta['heavy'])
+            sketch.hashes, sketch.hash_tag = dict(meta['hashes']), meta['hash_tag']
+            sketch.moments, sketch.dates = meta['moments'], meta['dates']
+            if sketch.exact is None:
+                registers = arrays['hll'].copy()
+                sketch.hll = HyperLogLog(int(math.log2(len(registers))), registers)
+                sketch.cms = CountMinSketch(table=arrays['cms'].copy())
+            kll = KLLSketch(meta['kll_k'])
+            kll.n = meta['kll_n']
+            kll.levels = np.split(arrays['kll'].astype(np.float64), np.cumsum(meta['kll_levels'])[:-1])
+            sketch.kll = kll
+        return sketch
+
+
+# =============================================================================
+# BUILDING
+# =============================================================================
+
+class SketchBuilder:
+    """
+    Sketches a table's columns from one or more row sources (the table, or
+    load batches). Each source is read once: DuckDB unpivots it to
+    (column, value) pairs and counts them, and the sketches are built from
+    those counts - value lists for the low-cardinality columns, md5 hashes
+    for the rest, weighted numbers for the quantiles - so Python never
+    touches a row.
+    """
+
+    def __init__(self, column_types: List[Tuple[str, str]]):
+        self.column_types = list(column_types)
+        self.sketches: Dict[str, ColumnSketch] = {name: ColumnSketch(t) for name, t in self.column_types}
+        self.rows = 0
+        self.build_ms = 0.0
+
+    def add(self, conn, source: str) -> int:
+        """Sketch the rows of source (a quoted table / view name or a parenthesised query)."""
+        start = time.perf_counter()
+        groups = f"__sketch_groups_{uuid.uuid4().hex[:8]}"
+        columns = [name for name, _ in self.column_types]
+        parts = {i: ColumnSketch(t) for i, (_, t) in enumerate(self.column_types)}
+        try:
+            rows, tag = conn.execute(f"SELECT COUNT(*), hash('{SKETCH_TABLE}') FROM {source}").fetchone()
+            for part in parts.values():
+                part.hash_tag = tag
+            conn.execute(self._groups_sql(groups, source, [part.kind for part in parts.values()]))
+            self._read_groups(conn, groups, rows, parts)
+        finally:
+            conn.execute(f"DROP TABLE IF EXISTS {groups}")
+        for i, part in parts.items():
+            self.sketches[columns[i]].merge(part)
+        self.rows += rows
+        self.build_ms += (time.perf_counter() - start) * 1000
+        return rows
+
+    def _groups_sql(self, groups: str, source: str, kinds: List[str]) -> str:
+        """
+        (column, value, count) for every distinct value, with the value's
+        numeric parse x (text columns: the TRY_CAST profiling uses) and date d.
+        """
+        def among(kind: str) -> str:
+            return ', '.join(str(i) for i, k in enumerate(kinds) if k == kind) or '-1'
+
+        casts = ', '.join(f"CAST({_quote(name)} AS VARCHAR) AS c{i}" for i, (name, _) in enumerate(self.column_types))
+        # Text values are only tried as dates when they aren't numbers and start
+        # with a digit - a failing date cast is the most expensive parse here
+        return f"""
+            CREATE TEMP TABLE {groups} AS
+            SELECT col, val, n, x,
+                   CASE WHEN col IN ({among('date')}) THEN TRY_CAST(val AS DATE)
+                        WHEN col IN ({among('timestamp')}) THEN TRY_CAST(TRY_CAST(val AS TIMESTAMP) AS DATE)
+                        WHEN col IN ({among('text')}) AND x IS NULL AND ascii(val) BETWEEN 48 AND 57
+                        THEN TRY_CAST(val AS DATE) END AS d
+            FROM (
+                SELECT col, val, n,
+                       CASE WHEN col IN ({among('number')}) THEN TRY_CAST(val AS DOUBLE)
+                            WHEN col IN ({among('text')})
+                            THEN TRY_CAST(REPLACE(REPLACE(val, ',', ''), '$', '') AS DOUBLE) END AS x
+                FROM (SELECT CAST(SUBSTR(col, 2) AS INTEGER) AS col, val, COUNT(*) AS n
+                      FROM (UNPIVOT (SELECT {casts} FROM {source}) ON COLUMNS(*) INTO NAME col VALUE val)
+                      GROUP BY ALL))
+        """
+
+    @staticmethod
+    def _read_groups(conn, groups: str, rows: int, parts: Dict[int, ColumnSketch]) -> None:
+        for part in parts.values():
+            part.count = part.nulls = rows              # columns with no values stay all NULL
+        summary = conn.execute(f"""
+            WITH m AS (SELECT col, SUM(x * n) / SUM(n) FILTER (WHERE x IS NOT NULL) AS mean
+                       FROM {groups} GROUP BY col)
+            SELECT g.col, COUNT(*), SUM(g.n),
+                   COALESCE(SUM(g.n) FILTER (WHERE TRIM(g.val) = '' OR g.val = 'nan'), 0),
+                   COALESCE(SUM(g.n) FILTER (WHERE g.x IS NOT NULL), 0), m.mean,
+                   SUM(g.n * (g.x - m.mean) * (g.x - m.mean)), MIN(g.x), MAX(g.x),
+                   COALESCE(SUM(g.n) FILTER (WHERE g.d IS NOT NULL), 0),
+                   CAST(MIN(g.d) AS VARCHAR), CAST(MAX(g.d) AS VARCHAR)
+            FROM {groups} g JOIN m USING (col)
+            GROUP BY g.col, m.mean
+        """).fetchall()
+
+        wide, numeric = [], []
+        for col, distinct, non_null, blanks, numbers, mean, m2, low, high, dated, first, last in summary:
+            part = parts[col]
+            part.nulls = rows - int(non_null)
+            part.blanks = int(blanks) if part.kind == 'text' else 0
+            if numbers:
+                part.moments = [int(numbers), float(mean), float(m2), float(low), float(high)]
+                numeric.append(col)
+            if dated:
+                part.dates = [int(dated), first, last]
+            if distinct > EXACT_LIMIT:
+                wide.append(col)
+
+        # Low-cardinality columns: every value; the rest: HLL + count-min over
+        # the hash of each value, and the most frequent values as candidates
+        exact = [col for col in parts if col not in wide]
+        if exact:
+            for col, val, n, hashed in conn.execute(f"""
+                SELECT col, val, n, hash(val) FROM {groups} WHERE col IN ({', '.join(map(str, exact))})
+                ORDER BY col, n DESC, val
+            """).fetchall():
+                parts[col].exact[val] = int(n)
+                parts[col].hashes[val] = hashed
+        if wide:
+            for col, top in conn.execute(f"""
+                SELECT col, max_by({{'val': val, 'hash': hash(val)}}, n, {TOP_K}) FROM {groups}
+                WHERE col IN ({', '.join(map(str, wide))}) GROUP BY col
+            """).fetchall():
+                part = parts[col]
+                part.exact, part.hll, part.cms = None, HyperLogLog(), CountMinSketch()
+                part.heavy = dict.fromkeys(item['val'] for item in top)
+                part.hashes = {item['val']: item['hash'] for item in top}
+                hashed = conn.execute(f"SELECT hash(val) AS h, n FROM {groups} WHERE col = {col}").fetchnumpy()
+                hashes = np.asarray(hashed['h'], dtype=_U64)
+                part.hll.update(hashes)
+                part.cms.update(hashes, np.asarray(hashed['n'], dtype=np.int64))
+        for part in parts.values():
+            for val in (part.exact if part.exact is not None else part.heavy):
+                if val.strip() and val != 'nan':
+                    part.samples.append(val)
+                    if len(part.samples) == 5:
+                        break
+
+        for col in numeric:
+            values = conn.execute(f"SELECT x, n FROM {groups} WHERE col = {col} AND x IS NOT NULL").fetchnumpy()
+            parts[col].kll.update(np.repeat(np.asarray(values['x'], dtype=np.float64),
+                                            np.asarray(values['n'], dtype=np.int64)))
+
+
+def table_column_types(conn, table_name: str) -> List[Tuple[str, str]]:
+    return [(row[0], row[1]) for row in conn.execute(f"DESCRIBE {_quote(table_name)}").fetchall()]
+
+
+def build_table_sketches(conn, table_name: str) -> Dict[str, ColumnSketch]:
+    """Sketch every column of a table in one scan."""
+    builder = SketchBuilder(table_column_types(conn, table_name))
+    builder.add(conn, _quote(table_name))
+    logger.info(f"[SKETCH] {table_name}: {builder.rows:,} rows, {len(builder.sketches)} columns "
+                f"in {builder.build_ms:.0f}ms")
+    return builder.sketches
+
+
+# =============================================================================
+# STORAGE
+# =============================================================================
+
+class SketchStore:
+    """_column_sketches: one row per (table, column), tagged with the table's DuckDB identity."""
+
+    def __init__(self, conn, lock=None):
+        self.conn = conn
+        self._lock = lock or threading.RLock()
+        self._ready = False
+
+    def ensure(self):
+        if self._ready:
+            return
+        with self._lock:
+            self.conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS {SKETCH_TABLE} (
+                    project VARCHAR,
+                    table_name VARCHAR,
+                    column_name VARCHAR,
+                    column_type VARCHAR,
+                    table_oid BIGINT,
+                    estimated_size BIGINT,
+                    row_count BIGINT,
+                    is_exact BOOLEAN,
+                    error_bounds JSON,
+                    sketch BLOB,
+                    sketch_bytes INTEGER,
+                    build_ms DOUBLE,
+                    merges INTEGER DEFAULT 0,
+                    built_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (table_name, column_name)
+                )
+            """)
+            self._ready = True
+
+    def _identity(self, table_name: str) -> Optional[Tuple[int, int]]:
+        row = self.conn.execute("""
+            SELECT table_oid, estimated_size FROM duckdb_tables()
+            WHERE table_name = ? AND schema_name = current_schema() AND NOT internal
+        """, [table_name]).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def save(self, project: Optional[str], table_name: str, sketches: Dict[str, ColumnSketch],
+             build_ms: float = 0.0, merges: int = 0) -> None:
+        self.ensure()
+        with self._lock:
+            identity = self._identity(table_name)
+            if identity is None or not sketches:
+                return
+            rows = []
+            for column, sketch in sketches.items():
+                blob = sketch.to_bytes()
+                rows.append([project, table_name, column, sketch.column_type, identity[0], identity[1],
+                             sketch.count, sketch.distinct_exact, json.dumps(sketch.error_bounds()),
+                             blob, len(blob), round(build_ms, 1), merges])
+            self.conn.execute(f"DELETE FROM {SKETCH_TABLE} WHERE table_name = ?", [table_name])
+            self.conn.executemany(f"""
+                INSERT INTO {SKETCH_TABLE} (project, table_name, column_name, column_type, table_oid,
+                    estimated_size, row_count, is_exact, error_bounds, sketch, sketch_bytes, build_ms, merges)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+
+    def load(self, table_name: str, columns: Optional[Iterable[str]] = None,
+             fresh: bool = True) -> Optional[Dict[str, ColumnSketch]]:
+        """The table's sketches, or None if it has none or (fresh=True) they predate the table."""
+        try:
+            self.ensure()
+            with self._lock:
+                sql = f"SELECT column_name, sketch, table_oid, estimated_size FROM {SKETCH_TABLE} WHERE table_name = ?"
+                params: List[Any] = [table_name]
+                if columns is not None:
+                    columns = list(columns)
+                    sql += f" AND column_name IN ({', '.join('?' for _ in columns)})"
+                    params.extend(columns)
+                rows = self.conn.execute(sql, params).fetchall()
+                if not rows or (fresh and self._identity(table_name) != (rows[0][2], rows[0][3])):
+                    return None
+            return {column: ColumnSketch.from_bytes(blob) for column, blob, _, _ in rows}
+        except Exception as e:
+            logger.debug(f"[SKETCH] Could not load sketches for {table_name}: {e}")
+            return None
+
+    def load_or_build(self, project: Optional[str], table_name: str) -> Dict[str, ColumnSketch]:
+        """The table's fresh sketches, building and saving them first if needed."""
+        sketches = self.load(table_name)
+        if sketches is None:
+            builder = SketchBuilder(table_column_types(self.conn, table_name))
+            builder.add(self.conn, _quote(table_name))
+            logger.info(f"[SKETCH] {table_name}: {builder.rows:,} rows, {len(builder.sketches)} columns "
+                        f"in {builder.build_ms:.0f}ms")
+            self.save(project, table_name, builder.sketches, build_ms=builder.build_ms)
+            sketches = builder.sketches
+        return sketches
+
+    def load_project(self, project: str) -> Dict[Tuple[str, str], ColumnSketch]:
+        """Fresh sketches of a project's tables, by (table, column)."""
+        try:
+            self.ensure()
+            with self._lock:
+                rows = self.conn.execute(f"""
+                    SELECT s.table_name, s.column_name, s.sketch FROM {SKETCH_TABLE} s
+                    JOIN duckdb_tables() t ON t.table_name = s.table_name AND t.table_oid = s.table_oid
+                        AND t.estimated_size = s.estimated_size AND NOT t.internal
+                    WHERE s.project = ?
+                """, [project]).fetchall()
+            return {(table, column): ColumnSketch.from_bytes(blob) for table, column, blob in rows}
+        except Exception as e:
+            logger.debug(f"[SKETCH] Could not load sketches for project {project}: {e}")
+            return {}
+
+    def append(self, project: Optional[str], table_name: str, source: str) -> Dict[str, ColumnSketch]:
+        """
+        Fold the sketches of rows just appended to a table (source: a view or
+        query over only the new rows) into its stored sketches. Rebuilds from
+        the table when the stored sketches didn't cover it before the append.
+        """
+        with self._lock:
+            self.ensure()
+            stored = self.conn.execute(
+                f"SELECT max(row_count), max(merges) FROM {SKETCH_TABLE} WHERE table_name = ?", [table_name]
+            ).fetchone()
+            sketches = self.load(table_name, fresh=False) if stored[0] is not None else None
+            builder = SketchBuilder(table_column_types(self.conn, table_name))
+            builder.add(self.conn, source)
+            total = self.conn.execute(f"SELECT COUNT(*) FROM {_quote(table_name)}").fetchone()[0]
+            covered = sketches is not None and set(sketches) == set(builder.sketches) and stored[0] + builder.rows == total
+            if covered:
+                try:
+                    for column, sketch in sketches.items():
+                        sketch.merge(builder.sketches[column])
+                    merges = (stored[1] or 0) + 1
+                except ValueError as e:
+                    logger.info(f"[SKETCH] {table_name}: {e}")
+                    covered = False
+            if not covered:
+                logger.info(f"[SKETCH] {table_name}: stored sketches don't cover the table, rebuilding")
+                builder = SketchBuilder(builder.column_types)
+                builder.add(self.conn, _quote(table_name))
+                sketches, merges = builder.sketches, 0
+            self.save(project, table_name, sketches, build_ms=builder.build_ms, merges=merges)
+            return sketches
+
+    def forget(self, table_names: Iterable[str]) -> None:
+        names = list(table_names)
+        if not names:
+            return
+        try:
+            self.ensure()
+            with self._lock:
+                self.conn.execute(f"DELETE FROM {SKETCH_TABLE} WHERE table_name IN ({', '.join('?' for _ in names)})",
+                                  names)
+        except Exception as e:
+            logger.debug(f"[SKETCH] Could not forget {names}: {e}")
+
+    def clear(self) -> None:
+        try:
+            self.ensure()
+            with self._lock:
+                self.conn.execute(f"DELETE FROM {SKETCH_TABLE}")
+        except Exception as e:
+            logger.debug(f"[SKETCH] Could not clear: {e}")
+
+    def report(self, project: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Per table: size, build cost and the loosest accuracy bound over its columns."""
+        self.ensure()
+        where, params = ('WHERE s.project = ?', [project]) if project else ('', [])
+        with self._lock:
+            rows = self.conn.execute(f"""
+                SELECT s.table_name, any_value(s.project), count(*), max(s.row_count),
+                       count(*) FILTER (WHERE s.is_exact), sum(s.sketch_bytes), max(s.build_ms), max(s.merges),
+                       max(s.built_at),
+                       bool_and(t.table_oid IS NOT DISTINCT FROM s.table_oid
+                                AND t.estimated_size IS NOT DISTINCT FROM s.estimated_size),
+                       max(CAST(json_extract(s.error_bounds, '$.distinct_relative') AS DOUBLE)),
+                       max(CAST(json_extract(s.error_bounds, '$.frequency_overcount_rows') AS BIGINT)),
+                       max(CAST(json_extract(s.error_bounds, '$.quantile_rank') AS DOUBLE))
+                FROM {SKETCH_TABLE} s
+                LEFT JOIN duckdb_tables() t ON t.table_name = s.table_name AND NOT t.internal
+                {where}
+                GROUP BY s.table_name ORDER BY s.table_name
+            """, params).fetchall()
+        return [{
+            'table_name': table, 'project': proj, 'columns': columns, 'row_count': row_count,
+            'exact_columns': exact, 'sketched_columns': columns - exact, 'sketch_bytes': size,
+            'build_ms': build_ms, 'merges': merges, 'built_at': str(built_at) if built_at else None,
+            'fresh': bool(fresh),
+            'error_bounds': {'distinct_relative': distinct, 'frequency_overcount_rows': overcount,
+                             'quantile_rank': rank},
+        } for (table, proj, columns, row_count, exact, size, build_ms, merges, built_at, fresh,
+               distinct, overcount, rank) in rows]
+
+
+def get_sketch_store(handler) -> SketchStore:
+    """The handler's sketch store (created on first use)."""
+    store = getattr(handler, 'sketch_store', None)
+    if store is None:
+        store = SketchStore(handler.conn, getattr(handler, '_db_lock', None))
+        try:
+            handler.sketch_store = store
+        except AttributeError:
+            pass
+    store.conn = handler.conn       # follows reconnects
+    return store
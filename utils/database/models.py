@@ -1438,7 +1438,8 @@ class ProcessingJobModel:
         try:
             data = {'status': 'completed', 'progress': {'percent': 100, 'step': 'Complete'},
                     'result_data': result_data or {}, 'completed_at': datetime.utcnow().isoformat(), 'updated_at': datetime.utcnow().isoformat()}
-            supabase.table('processing_jobs').update(data).eq('id', job_id).execute()
+            response = supabase.table('processing_jobs').update(data).eq('id', job_id).execute()
+            ProcessingJobModel._invalidate_response_caches(response.data[0] if response.data else None)
             return True
         except Exception as e:
             logger.error(f"completing job: {e}")
@@ -1451,12 +1452,46 @@ class ProcessingJobModel:
             return False
         try:
             data = {'status': 'failed', 'error_message': error_message, 'completed_at': datetime.utcnow().isoformat(), 'updated_at': datetime.utcnow().isoformat()}
-            supabase.table('processing_jobs').update(data).eq('id', job_id).execute()
+            response = supabase.table('processing_jobs').update(data).eq('id', job_id).execute()
+            ProcessingJobModel._invalidate_response_caches(response.data[0] if response.data else None)
             return True
         except Exception as e:
             logger.error(f"failing job: {e}")
             return False
     
+    @staticmethod
+    def find_completed_by_hash(file_hash: str, project: str, route: str) -> Optional[Dict[str, Any]]:
+        """Latest completed upload job for identical content (input_data.file_hash) in a project and route."""
+        supabase = get_supabase()
+        if not supabase:
+            return None
+        try:
+            response = supabase.table('processing_jobs').select('*') \
+                .eq('status', 'completed') \
+                .eq('input_data->>file_hash', file_hash) \
+                .eq('input_data->>customer_id', project) \
+                .eq('input_data->>route', route) \
+                .order('completed_at', desc=True).limit(1).execute()
+            return response.data[0] if response.data else None
+        except Exception as e:
+            logger.error(f"finding job by hash: {e}")
+            return None
+
+    @staticmethod
+    def _invalidate_response_caches(job: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Drop cached platform/dashboard responses once a job finishes.
+
+        Scoped to the job's project (input_data.customer_id): its entries and the
+        platform-wide ones go, other projects' stay. Unknown project clears everything.
+        """
+        project = ((job or {}).get('input_data') or {}).get('customer_id')
+        try:
+            from backend.utils.keyed_cache import invalidate_keyed_caches
+            invalidate_keyed_caches(project)
+        except Exception as e:
+            logger.debug(f"cache invalidation skipped: {e}")
+    
     @staticmethod
     def get_all(limit: int = 50) -> List[Dict[str, Any]]:
         supabase = get_supabase()
@@ -1837,6 +1872,10 @@ class LineageModel:
         - created: finding → task
         - cited: [table|chunk] → response
         - suppressed: finding → suppression_rule
+    
+    Writes are mirrored into a local closure index (lineage_store.py), which
+    answers get_ancestors/get_descendants at any depth once it has been
+    backfilled from Supabase.
     """
     
     # Node types
@@ -1860,6 +1899,77 @@ class LineageModel:
     REL_SUPPRESSED = 'suppressed'   # finding → suppression
     REL_DERIVED = 'derived'         # generic derivation
     
+    # =========================================================================
+    # LOCAL CLOSURE INDEX (utils/database/lineage_store.py)
+    # =========================================================================
+    
+    _sync_started = False
+    
+    @staticmethod
+    def _store():
+        try:
+            from .lineage_store import get_lineage_store
+            return get_lineage_store()
+        except Exception as e:
+            logger.debug(f"[LINEAGE] Local store unavailable: {e}")
+            return None
+    
+    @staticmethod
+    def _mirror(write) -> None:
+        """Apply a write to the local store; Supabase stays the system of record."""
+        store = LineageModel._store()
+        if store:
+            try:
+                write(store)
+            except Exception as e:
+                logger.warning(f"[LINEAGE] Local mirror write failed: {e}")
+    
+    @staticmethod
+    def _traversal_store():
+        """
+        The local store, once it can answer traversals completely: after a
+        backfill from Supabase, or always when there is no Supabase. The
+        first call without a backfill starts one in the background.
+        """
+        store = LineageModel._store()
+        if not store:
+            return None
+        if store.get_meta('synced_at') or not get_supabase():
+            return store
+        if not LineageModel._sync_started:
+            LineageModel._sync_started = True
+            import threading
+            threading.Thread(target=LineageModel.sync_local_store, daemon=True,
+                             name='lineage-sync').start()
+        return None
+    
+    @staticmethod
+    def sync_local_store(page_size: int = 1000) -> int:
+        """Backfill the local store from Supabase lineage_edges. Returns edges loaded."""
+        store = LineageModel._store()
+        supabase = get_supabase()
+        if not store or not supabase:
+            return 0
+        
+        loaded = 0
+        try:
+            while True:
+                response = supabase.table('lineage_edges').select('*') \
+                    .order('source_type').order('source_id').order('target_type') \
+                    .order('target_id').order('relationship') \
+                    .range(loaded, loaded + page_size - 1).execute()
+                rows = response.data or []
+                if rows:
+                    store.add_edges(rows)
+                    loaded += len(rows)
+                if len(rows) < page_size:
+                    break
+            store.set_meta('synced_at', datetime.now().isoformat())
+            logger.info(f"[LINEAGE] Local closure index synced ({loaded} edges)")
+        except Exception as e:
+            logger.warning(f"[LINEAGE] Local store sync failed after {loaded} edges: {e}")
+        return loaded
+    
     @staticmethod
     def track(
         source_type: str,
@@ -1889,6 +1999,12 @@ class LineageModel:
         Returns:
             Created edge record or None on error
         """
+        LineageModel._mirror(lambda store: store.add_edges([{
+            'source_type': source_type, 'source_id': source_id, 'target_type': target_type,
+            'target_id': target_id, 'relationship': relationship, 'project_id': project_id,
+            'job_id': job_id, 'created_by_id': created_by_id, 'metadata': metadata
+        }]))
+        
         supabase = get_supabase()
         if not supabase:
             logger.warning("[LINEAGE] No Supabase connection")
@@ -1935,6 +2051,8 @@ class LineageModel:
         Returns:
             Number of edges created
         """
+        LineageModel._mirror(lambda store: store.add_edges(edges))
+        
         supabase = get_supabase()
         if not supabase:
             return 0
@@ -1976,6 +2094,13 @@ class LineageModel:
         max_depth: int = 10
     ) -> List[Dict[str, Any]]:
         """Get all descendants of a node (what was derived from it)."""
+        local = LineageModel._traversal_store()
+        if local:
+            try:
+                return local.descendants(source_type, source_id, project_id, max_depth)
+            except Exception as e:
+                logger.warning(f"[LINEAGE] Local descendants lookup failed: {e}")
+        
         supabase = get_supabase()
         if not supabase:
             return []
@@ -2012,6 +2137,13 @@ class LineageModel:
         max_depth: int = 10
     ) -> List[Dict[str, Any]]:
         """Get all ancestors of a node (what it came from)."""
+        local = LineageModel._traversal_store()
+        if local:
+            try:
+                return local.ancestors(target_type, target_id, project_id, max_depth)
+            except Exception as e:
+                logger.warning(f"[LINEAGE] Local ancestors lookup failed: {e}")
+        
         supabase = get_supabase()
         if not supabase:
             return []
@@ -2098,6 +2230,8 @@ class LineageModel:
     @staticmethod
     def delete_for_source(source_type: str, source_id: str, project_id: str = None) -> int:
         """Delete all lineage edges originating from a source."""
+        LineageModel._mirror(lambda store: store.delete_edges(source_type, source_id, project_id, 'source'))
+        
         supabase = get_supabase()
         if not supabase:
             return 0
@@ -2115,6 +2249,8 @@ class LineageModel:
     @staticmethod
     def delete_for_target(target_type: str, target_id: str, project_id: str = None) -> int:
         """Delete all lineage edges pointing to a target."""
+        LineageModel._mirror(lambda store: store.delete_edges(target_type, target_id, project_id, 'target'))
+        
         supabase = get_supabase()
         if not supabase:
             return 0
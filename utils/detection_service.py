@@ -24,7 +24,7 @@ Deploy to: utils/detection_service.py
 
 import re
 import logging
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass, field
 from datetime import datetime
 from collections import defaultdict
@@ -169,6 +169,343 @@ class DetectionSignature:
         return False
 
 
+# =============================================================================
+# COMPILED SIGNATURE MATCHER
+# =============================================================================
+# Matching every signature against every column name and value one at a time
+# costs signatures x strings Python calls. The matcher compiles all signatures
+# of a pattern type once (on signature load) and finds every matching
+# signature for a string in a few C-level passes:
+#
+# - Keyword automaton (Aho-Corasick): the substring fallback of every
+#   signature, regexes that are plain literal alternations
+#   ('emp_id|emplid|pernr'), and a required literal of every other regex
+#   ('hire' for 'hire.*date') - one pass over the lowercased string; a
+#   regex only runs when its required literal is present
+# - Anchored literals ('^coid$|^eeid$'): dict / prefix / suffix checks
+# - Regexes with no required literal: one combined regex of optional
+#   lookaheads, one named group per signature, behind a plain alternation
+#   prefilter
+#
+# Results are identical to DetectionSignature.matches(); anything the
+# compiled forms can't represent exactly is matched per signature.
+
+_GLOBAL_FLAGS_RE = re.compile(r'^\(\?([aiLmsux]+)\)')
+_BACKREF_RE = re.compile(r'\\[1-9]|\(\?P=')
+
+try:
+    from re import _parser as _sre_parser
+    from re._constants import LITERAL as _SRE_LITERAL, SUBPATTERN as _SRE_SUBPATTERN, BRANCH as _SRE_BRANCH
+except ImportError:  # Python < 3.11
+    try:
+        import sre_parse as _sre_parser
+        from sre_constants import LITERAL as _SRE_LITERAL, SUBPATTERN as _SRE_SUBPATTERN, BRANCH as _SRE_BRANCH
+    except ImportError:
+        _sre_parser = None
+        _SRE_LITERAL = _SRE_SUBPATTERN = _SRE_BRANCH = None
+
+
+class _KeywordAutomaton:
+    """Aho-Corasick automaton: every keyword occurring in a string, in one pass."""
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Any]] = [[]]
+
+    def add(self, keyword: str, payload: Any) -> None:
+        node = 0
+        for ch in keyword:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+                self._goto[node][ch] = nxt
+            node = nxt
+        self._out[node].append(payload)
+
+    def build(self) -> None:
+        """Compute failure links (breadth-first) and merge outputs."""
+        queue = list(self._goto[0].values())
+        while queue:
+            next_queue = []
+            for node in queue:
+                for ch, child in self._goto[node].items():
+                    fail = self._fail[node]
+                    while fail and ch not in self._goto[fail]:
+                        fail = self._fail[fail]
+                    self._fail[child] = self._goto[fail].get(ch, 0)
+                    self._out[child] = self._out[child] + self._out[self._fail[child]]
+                    next_queue.append(child)
+            queue = next_queue
+
+    def search(self, text: str) -> set:
+        found = set()
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                found.update(out[node])
+        return found
+
+
+def _literal_alternatives(pattern: str) -> Optional[List[Tuple[str, bool, bool]]]:
+    """
+    Split a regex into (literal, anchored_start, anchored_end) alternatives.
+
+    Returns None unless the pattern is an ASCII alternation of plain
+    literals, optionally anchored with ^ / $ and prefixed by (?i).
+    """
+    body = pattern
+    flags = _GLOBAL_FLAGS_RE.match(body)
+    while flags:
+        if set(flags.group(1)) - {'i'}:
+            return None
+        body = body[flags.end():]
+        flags = _GLOBAL_FLAGS_RE.match(body)
+
+    if not body or not body.isascii():
+        return None
+
+    alternatives = []
+    for alt in body.split('|'):
+        start = alt.startswith('^')
+        end = alt.endswith('$') and len(alt) > int(start)
+        core = alt[int(start):len(alt) - int(end)]
+        if not core or re.escape(core) != core:
+            return None
+        alternatives.append((core.lower(), start, end))
+    return alternatives
+
+
+def _sequence_literals(items) -> Optional[List[str]]:
+    """Literals at least one of which must occur for a parsed sequence to match."""
+    best_run = ''
+    run: List[str] = []
+    best_set: Optional[List[str]] = None
+
+    for op, av in list(items) + [(None, None)]:
+        if op is _SRE_LITERAL and chr(av).isascii():
+            run.append(chr(av).lower())
+            continue
+        if len(run) > len(best_run):
+            best_run = ''.join(run)
+        run = []
+
+        inner = None
+        if op is _SRE_SUBPATTERN:
+            inner = _sequence_literals(av[-1])
+        elif op is _SRE_BRANCH:
+            alternatives = [_sequence_literals(alt) for alt in av[1]]
+            if all(alternatives):
+                inner = [lit for alt in alternatives for lit in alt]
+        if inner and (best_set is None or min(map(len, inner)) > min(map(len, best_set))):
+            best_set = inner
+
+    if best_set and min(map(len, best_set)) > len(best_run):
+        return best_set
+    return [best_run] if len(best_run) >= 2 else best_set
+
+
+def _required_literals(pattern: str) -> Optional[List[str]]:
+    """
+    Lowercase ASCII literals of which at least one occurs in any string the
+    (case-insensitive) regex matches, or None if none can be extracted.
+    """
+    if _sre_parser is None:
+        return None
+    try:
+        literals = _sequence_literals(_sre_parser.parse(pattern, re.IGNORECASE))
+    except Exception:
+        return None
+    if not literals or min(map(len, literals)) < 2:
+        return None
+    return literals
+
+
+# Keyword automaton payload kinds
+_FALLBACK = 0   # substring fallback - exact for any text
+_LITERAL = 1    # literal alternative of a regex - exact for ASCII text
+_GUARD = 2      # required literal of a regex - candidate, regex still runs
+
+
+class _TypeMatcher:
+    """Compiled matcher for the signatures of one pattern type."""
+
+    def __init__(self, signatures: List[Tuple[int, 'DetectionSignature']]):
+        self.signatures = dict(signatures)
+        self.automaton = _KeywordAutomaton()
+        self.always: List[int] = []            # empty pattern: substring of anything
+        self.exact: Dict[str, List[int]] = defaultdict(list)
+        self.prefixes: List[Tuple[str, int]] = []
+        self.suffixes: List[Tuple[str, int]] = []
+        self.ascii_only: List[Tuple[int, 'DetectionSignature']] = []
+        self.individual: List[Tuple[int, 'DetectionSignature']] = []
+        self.combined = None
+        self.prefilter = None
+        self.group_to_index: Dict[str, int] = {}
+
+        regex_members: List[Tuple[int, 'DetectionSignature', str]] = []
+
+        for idx, sig in signatures:
+            sig.compile()
+
+            # Substring fallback applies to every signature
+            if sig.pattern:
+                self.automaton.add(sig.pattern.lower(), (idx, _FALLBACK))
+            else:
+                self.always.append(idx)
+
+            if not sig._compiled_pattern:
+                continue  # invalid regex: substring fallback only
+
+            literals = _literal_alternatives(sig.pattern)
+            if literals is not None:
+                self.ascii_only.append((idx, sig))
+                for core, start, end in literals:
+                    if start and end:
+                        self.exact[core].append(idx)
+                    elif start:
+                        self.prefixes.append((core, idx))
+                    elif end:
+                        self.suffixes.append((core, idx))
+                    else:
+                        self.automaton.add(core, (idx, _LITERAL))
+                continue
+
+            guards = _required_literals(sig.pattern)
+            if guards is not None:
+                self.ascii_only.append((idx, sig))
+                for guard in guards:
+                    self.automaton.add(guard, (idx, _GUARD))
+                continue
+
+            body = self._combinable_body(sig)
+            if body is None:
+                self.individual.append((idx, sig))
+            else:
+                regex_members.append((idx, sig, body))
+
+        self.automaton.build()
+        self._compile_combined(regex_members)
+
+    @staticmethod
+    def _combinable_body(sig: 'DetectionSignature') -> Optional[str]:
+        """Pattern body usable inside the combined regex, or None."""
+        body = sig.pattern
+        flags = _GLOBAL_FLAGS_RE.match(body)
+        while flags:
+            if set(flags.group(1)) - {'i'}:
+                return None
+            body = body[flags.end():]
+            flags = _GLOBAL_FLAGS_RE.match(body)
+        if sig._compiled_pattern.groupindex or _BACKREF_RE.search(body):
+            return None
+        try:
+            re.compile(f'(?:{body})', re.IGNORECASE)
+        except re.error:
+            return None
+        return body
+
+    def _compile_combined(self, members: List[Tuple[int, 'DetectionSignature', str]]) -> None:
+        if not members:
+            return
+        lookaheads = []
+        alternation = []
+        for idx, _, body in members:
+            name = f's{idx}'
+            self.group_to_index[name] = idx
+            lookaheads.append(f'(?=[\\s\\S]*?(?P<{name}>(?:{body})))?')
+            alternation.append(f'(?:{body})')
+        try:
+            self.combined = re.compile(''.join(lookaheads), re.IGNORECASE)
+            self.prefilter = re.compile('|'.join(alternation), re.IGNORECASE)
+        except (re.error, RecursionError, OverflowError) as e:
+            logger.warning(f"[DETECTION] Combined regex failed ({e}), matching {len(members)} signatures individually")
+            self.combined = None
+            self.prefilter = None
+            self.group_to_index = {}
+            self.individual.extend((idx, sig) for idx, sig, _ in members)
+
+    def match(self, text: str) -> set:
+        """Indexes of every signature matching text."""
+        if not text:
+            return set()
+
+        matched = set(self.always)
+        lowered = text.lower()
+        ascii_text = text.isascii()
+
+        if ascii_text:
+            guarded = set()
+            for idx, kind in self.automaton.search(lowered):
+                if kind == _GUARD:
+                    guarded.add(idx)
+                else:
+                    matched.add(idx)
+
+            # $ also matches before a trailing newline, as in re
+            stripped = lowered[:-1] if lowered.endswith('\n') else lowered
+            matched.update(self.exact.get(lowered, ()))
+            if stripped is not lowered:
+                matched.update(self.exact.get(stripped, ()))
+            for core, idx in self.prefixes:
+                if lowered.startswith(core):
+                    matched.add(idx)
+            for core, idx in self.suffixes:
+                if lowered.endswith(core) or stripped.endswith(core):
+                    matched.add(idx)
+
+            for idx in guarded - matched:
+                if self.signatures[idx]._compiled_pattern.search(text):
+                    matched.add(idx)
+        else:
+            # Case-insensitive regex and str.lower() differ outside ASCII
+            for idx, kind in self.automaton.search(lowered):
+                if kind == _FALLBACK:
+                    matched.add(idx)
+            for idx, sig in self.ascii_only:
+                if idx not in matched and sig.matches(text):
+                    matched.add(idx)
+
+        if self.combined is not None and self.prefilter.search(text):
+            groups = self.combined.match(text).groupdict()
+            matched.update(self.group_to_index[name] for name, value in groups.items() if value is not None)
+
+        for idx, sig in self.individual:
+            if idx not in matched and sig.matches(text):
+                matched.add(idx)
+
+        return matched
+
+
+class SignatureMatcher:
+    """
+    All detection signatures compiled into one matcher per pattern type.
+
+    Built once per signature load; match() returns matching signatures in
+    the same (priority, confidence) order the per-signature loop used.
+    """
+
+    def __init__(self, signatures: List[DetectionSignature]):
+        self.signatures = signatures
+        by_type: Dict[str, List[Tuple[int, DetectionSignature]]] = defaultdict(list)
+        for idx, sig in enumerate(signatures):
+            by_type[sig.pattern_type].append((idx, sig))
+        self._matchers = {ptype: _TypeMatcher(sigs) for ptype, sigs in by_type.items()}
+
+    def match(self, pattern_type: str, text: str) -> List[DetectionSignature]:
+        matcher = self._matchers.get(pattern_type)
+        if matcher is None:
+            return []
+        return [self.signatures[idx] for idx in sorted(matcher.match(text))]
+
+
 # =============================================================================
 # FALLBACK SEED DATA
 # =============================================================================
@@ -240,6 +577,7 @@ class DetectionService:
         self._signatures: List[DetectionSignature] = []
         self._signatures_loaded_at: Optional[datetime] = None
         self._cache_ttl_seconds: int = 300  # 5 minutes
+        self._matcher: Optional[SignatureMatcher] = None
         
         # Reference data cache
         self._systems: Dict[str, Dict] = {}
@@ -299,6 +637,7 @@ class DetectionService:
                     self._signatures.append(sig)
                 
                 self._signatures.sort(key=lambda s: (s.priority, s.confidence), reverse=True)
+                self._matcher = SignatureMatcher(self._signatures)
                 self._signatures_loaded_at = datetime.now()
                 logger.info(f"[DETECTION] Loaded {len(self._signatures)} signatures from Supabase")
                 return True
@@ -322,6 +661,7 @@ class DetectionService:
             sig.compile()
             self._signatures.append(sig)
         
+        self._matcher = SignatureMatcher(self._signatures)
         self._signatures_loaded_at = datetime.now()
         logger.info(f"[DETECTION] Loaded {len(self._signatures)} fallback signatures")
         return True
@@ -441,24 +781,28 @@ class DetectionService:
         """Match signatures of a specific type against text."""
         matches = []
         
-        for sig in self._signatures:
-            if sig.pattern_type != pattern_type:
-                continue
-            
-            if sig.matches(text):
-                matches.append(DetectionMatch(
-                    signature_id=sig.id,
-                    pattern=sig.pattern,
-                    pattern_type=pattern_type,
-                    matched_against=text,
-                    confidence=sig.confidence,
-                    system_code=sig.system_code,
-                    system_name=sig.system_name,
-                    domain_code=sig.domain_code,
-                    domain_name=sig.domain_name,
-                    functional_area_code=sig.functional_area_code,
-                    functional_area_name=sig.functional_area_name
-                ))
+        if self._matcher is not None and self._matcher.signatures is self._signatures:
+            candidates = self._matcher.match(pattern_type, text)
+        else:
+            candidates = [
+                sig for sig in self._signatures
+                if sig.pattern_type == pattern_type and sig.matches(text)
+            ]
+        
+        for sig in candidates:
+            matches.append(DetectionMatch(
+                signature_id=sig.id,
+                pattern=sig.pattern,
+                pattern_type=pattern_type,
+                matched_against=text,
+                confidence=sig.confidence,
+                system_code=sig.system_code,
+                system_name=sig.system_name,
+                domain_code=sig.domain_code,
+                domain_name=sig.domain_name,
+                functional_area_code=sig.functional_area_code,
+                functional_area_name=sig.functional_area_name
+            ))
         
         return matches
     
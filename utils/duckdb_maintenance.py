@@ -0,0 +1,909 @@
+"""
+DuckDB Maintenance - Checkpoints, Statistics, Orphans and Compaction in Idle Windows
+====================================================================================
+
+Re-uploads, the DROP / CREATE in save_to_duckdb and the cleanup routers
+leave the DuckDB files bloated: DuckDB reuses the blocks of dropped tables
+but never gives them back to the filesystem. And CHECKPOINTs ran inside
+request paths (the UKG sync, uploads, cleanup, safe_commit), each one
+stalling whoever triggered it behind a flush of the whole WAL.
+
+MaintenanceScheduler does that work on a background thread once the
+handler's connection has been idle for a while, a step at a time, holding
+StructuredDataHandler._db_lock only for the part of a step that needs it:
+
+- Checkpoints: while the scheduler runs, request_checkpoint() - for
+  checkpoints that aren't a persistence point, like one in the middle of
+  a build that ends with its own - is a hint, labelled with the request
+  that raised it. Hints are served in the next idle window, or after the
+  maximum delay if there is none. A bare CHECKPOINT still runs at once
+  (the post-ingest "persist to disk" checkpoints rely on it) unless
+  XLR8_MAINTENANCE_DEFER_CHECKPOINTS turns it into a hint too; FORCE
+  CHECKPOINT always runs at once. A WAL past the size limit is
+  checkpointed without a hint; DuckDB's own wal_autocheckpoint is raised
+  to twice that as a backstop.
+- Statistics: tables written since the last step are ANALYZEd once their
+  writes have settled, and their stale column sketches rebuilt. Both scan
+  on a cursor without the lock; only saving the sketches takes it.
+- Orphans: rows of the metadata tables keyed by table_name
+  (_schema_metadata, _column_profiles, _term_index, ...) whose table no
+  longer exists are deleted once they have been orphaned for the grace
+  period - an upload writing metadata before its table is left alone.
+  Tables in detached shards are skipped until their shard is attached.
+- Compaction: a file (the main database or an attached project shard)
+  whose free blocks reach the dead ratio, or that has grown by the growth
+  factor since its last compaction, is copied to a fresh database with
+  COPY FROM DATABASE (tables, views, sequences, indexes and constraints)
+  without the lock. The copy replaces the file under the lock only if
+  nothing was written meanwhile; otherwise it is discarded and retried
+  later. The main file is only replaced when no other connection has it
+  open (playbook services, read handlers), and the handler reconnects as
+  store_dataframe's reconnect does. Column sketches stay fresh across the
+  new table ids. Compaction can be limited to a time-of-day window.
+
+report() (GET /api/metrics/duckdb-maintenance) has the space reclaimed,
+the time spent and lock time per task, pending checkpoint hints by reason
+and the recent runs.
+
+Settings:
+    XLR8_MAINTENANCE                         - run the scheduler (default true)
+    XLR8_MAINTENANCE_INTERVAL_S              - seconds between scheduler ticks (default 15)
+    XLR8_MAINTENANCE_IDLE_S                  - idle this long before work starts (default 30)
+    XLR8_MAINTENANCE_CHECKPOINT_MAX_DELAY_S  - longest a checkpoint hint waits (default 120)
+    XLR8_MAINTENANCE_DEFER_CHECKPOINTS       - treat every bare CHECKPOINT as a hint (default false)
+    XLR8_MAINTENANCE_WAL_MB                  - checkpoint a WAL this big without a hint (default 32)
+    XLR8_MAINTENANCE_DEAD_RATIO              - compact a file with this fraction of free blocks (default 0.3)
+    XLR8_MAINTENANCE_COMPACT_GROWTH          - ... or grown by this fraction since its last compaction (default 1.0)
+    XLR8_MAINTENANCE_MIN_COMPACT_MB          - never compact a file smaller than this (default 64)
+    XLR8_MAINTENANCE_WINDOW                  - local time window for compaction, e.g. 01:00-05:00 (default any time)
+    XLR8_MAINTENANCE_ORPHAN_GRACE_S          - orphaned metadata rows are kept this long (default 600)
+
+Deploy to: utils/duckdb_maintenance.py
+
+Usage:
+    from utils.duckdb_maintenance import get_maintenance, request_checkpoint
+
+    maintenance = get_maintenance(handler)
+    maintenance.start()                               # app startup
+    request_checkpoint(handler.conn, 'graph.spokes')  # a checkpoint that can wait for an idle window
+    maintenance.run_once(force=True)                  # whatever is due, idle or not
+    maintenance.report()
+"""
+
+import os
+import re
+import time
+import logging
+import threading
+import weakref
+from collections import Counter, deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import duckdb
+
+try:
+    from utils.query_cache import split_sql, write_targets
+    from utils.tracing import current_span
+    from utils.duckdb_shards import SHARD_CATALOG_PREFIX
+except ImportError:
+    from .query_cache import split_sql, write_targets
+    from .tracing import current_span
+    from .duckdb_shards import SHARD_CATALOG_PREFIX
+
+logger = logging.getLogger(__name__)
+
+_MB = 1024 * 1024
+
+
+def _env_flag(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        logger.warning(f"[MAINTENANCE] Ignoring invalid {name}")
+        return default
+
+
+ENABLED = os.getenv('XLR8_MAINTENANCE', 'true').strip().lower() not in ('0', 'false', 'no', 'off')
+
+# Metadata tables whose rows describe one table, by table_name
+ORPHAN_TABLES = ('_schema_metadata', '_column_profiles', '_column_mappings', '_term_index', '_entity_tables',
+                 '_table_classifications', '_column_sketches')
+
+COMPACT_CATALOG = 'xlr8_compaction'
+HISTORY_SIZE = 50
+LOCK_WAIT_S = 5.0
+_DELETE_BATCH = 500
+
+_CHECKPOINT = re.compile(r'^\s*checkpoint\s*;?\s*$', re.IGNORECASE)
+_READS = frozenset({'select', 'from', 'values', 'table', 'show', 'describe', 'summarize', 'explain', 'pragma'})
+_WINDOW = re.compile(r'^\s*(\d{1,2}):(\d{2})\s*-\s*(\d{1,2}):(\d{2})\s*$')
+# A different config than the app's connections use: connecting with it fails while any of them is open
+_PROBE_CONFIG = {'custom_user_agent': 'xlr8-maintenance-probe'}
+
+# Held while the main file is swapped; other in-process connects wait on it
+_swap_lock = threading.Lock()
+_local = threading.local()
+
+
+def _quote(identifier: str) -> str:
+    return '"' + str(identifier).replace('"', '""') + '"'
+
+
+def _maintaining() -> bool:
+    return getattr(_local, 'active', False)
+
+
+def _requester() -> str:
+    """What a checkpoint hint is labelled with: the current trace's root span."""
+    span = current_span()
+    root = getattr(getattr(span, 'trace', None), 'root', None)
+    return getattr(root, 'name', None) or getattr(span, 'name', None) or 'untraced'
+
+
+def _duckdb_connection(conn):
+    """The DuckDB connection under the handler's proxies."""
+    while not isinstance(conn, duckdb.DuckDBPyConnection):
+        conn = conn.raw
+    return conn
+
+
+def parse_window(spec: Optional[str]) -> Optional[Tuple[int, int]]:
+    """'01:00-05:00' -> (60, 300) minutes past midnight; None for any time."""
+    if not spec or not spec.strip():
+        return None
+    match = _WINDOW.match(spec)
+    if not match:
+        logger.warning(f"[MAINTENANCE] Ignoring invalid window {spec!r}, expected HH:MM-HH:MM")
+        return None
+    h1, m1, h2, m2 = (int(g) for g in match.groups())
+    return (h1 * 60 + m1) % 1440, (h2 * 60 + m2) % 1440
+
+
+def in_window(window: Optional[Tuple[int, int]], now: Optional[datetime] = None) -> bool:
+    if window is None:
+        return True
+    now = now or datetime.now()
+    minute = now.hour * 60 + now.minute
+    start, end = window
+    if start <= end:
+        return start <= minute < end
+    return minute >= start or minute < end      # across midnight
+
+
+@contextmanager
+def connection_guard():
+    """Wrap duckdb.connect() of the app's database file so it can't land mid-swap."""
+    with _swap_lock:
+        yield
+
+
+class _Busy(Exception):
+    """The handler lock couldn't be had in time; the step is retried on a later tick."""
+
+
+# =============================================================================
+# CONNECTION PROXY
+# =============================================================================
+
+class MaintainedConnection:
+    """
+    DuckDB connection proxy that tells the scheduler when the connection is
+    in use and which tables it writes, and, with defer_checkpoints, turns a
+    bare CHECKPOINT into a hint while the scheduler runs.
+    """
+
+    def __init__(self, conn, maintenance: 'MaintenanceScheduler'):
+        self._conn = conn
+        self._maintenance = maintenance
+
+    @property
+    def raw(self):
+        return self._conn
+
+    def _run(self, method: str, query, args, kwargs):
+        if _maintaining():
+            return getattr(self._conn, method)(query, *args, **kwargs)
+        if method == 'execute' and self._maintenance.defer_checkpoints and isinstance(query, str) \
+                and _CHECKPOINT.match(query) and self._maintenance.defer_checkpoint(_requester()):
+            current_span().set('db.checkpoint', 'deferred')
+            return self._conn.execute("SELECT true AS Success WHERE false")
+        self._maintenance.begin()
+        try:
+            return getattr(self._conn, method)(query, *args, **kwargs)
+        finally:
+            self._maintenance.end(query)
+
+    def execute(self, query, *args, **kwargs):
+        return self._run('execute', query, args, kwargs)
+
+    def executemany(self, query, *args, **kwargs):
+        return self._run('executemany', query, args, kwargs)
+
+    def sql(self, query, *args, **kwargs):
+        return self._run('sql', query, args, kwargs)
+
+    def cursor(self):
+        return MaintainedConnection(self._conn.cursor(), self._maintenance)
+
+    def checkpoint_hint(self, reason: str) -> bool:
+        return self._maintenance.defer_checkpoint(reason)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __enter__(self):
+        self._conn.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        return self._conn.__exit__(*exc)
+
+    def __repr__(self):
+        return f"MaintainedConnection({self._conn!r})"
+
+
+def request_checkpoint(conn, reason: str) -> bool:
+    """
+    Ask for a checkpoint: a hint to the scheduler when it runs (returns
+    True), otherwise a CHECKPOINT right away (False).
+    """
+    hint = getattr(conn, 'checkpoint_hint', None)
+    if hint is not None and hint(reason):
+        return True
+    conn.execute("CHECKPOINT")
+    return False
+
+
+# =============================================================================
+# SCHEDULER
+# =============================================================================
+
+class MaintenanceScheduler:
+    """Idle-time maintenance of one handler's DuckDB files."""
+
+    TASKS = ('checkpoint', 'statistics', 'orphans', 'compaction')
+
+    def __init__(
+        self,
+        handler,
+        interval_s: float = _env_float('XLR8_MAINTENANCE_INTERVAL_S', 15),
+        idle_s: float = _env_float('XLR8_MAINTENANCE_IDLE_S', 30),
+        checkpoint_max_delay_s: float = _env_float('XLR8_MAINTENANCE_CHECKPOINT_MAX_DELAY_S', 120),
+        wal_mb: float = _env_float('XLR8_MAINTENANCE_WAL_MB', 32),
+        dead_ratio: float = _env_float('XLR8_MAINTENANCE_DEAD_RATIO', 0.3),
+        compact_growth: float = _env_float('XLR8_MAINTENANCE_COMPACT_GROWTH', 1.0),
+        min_compact_mb: float = _env_float('XLR8_MAINTENANCE_MIN_COMPACT_MB', 64),
+        window: Optional[str] = os.getenv('XLR8_MAINTENANCE_WINDOW'),
+        orphan_grace_s: float = _env_float('XLR8_MAINTENANCE_ORPHAN_GRACE_S', 600),
+        defer_checkpoints: bool = _env_flag('XLR8_MAINTENANCE_DEFER_CHECKPOINTS', False),
+    ):
+        self.handler = handler
+        self.interval_s = max(0.1, interval_s)
+        self.idle_s = idle_s
+        self.checkpoint_max_delay_s = checkpoint_max_delay_s
+        self.wal_bytes = int(wal_mb * _MB)
+        self.dead_ratio = dead_ratio
+        self.compact_growth = compact_growth
+        self.min_compact_bytes = int(min_compact_mb * _MB)
+        self.window_spec = window or None
+        self.window = parse_window(window)
+        self.orphan_grace_s = orphan_grace_s
+        self.defer_checkpoints = defer_checkpoints
+
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self._run_lock = threading.Lock()
+
+        # Fed by MaintainedConnection
+        self._activity = threading.Lock()
+        self._in_flight = 0
+        self._last_activity = time.monotonic()
+        self._writes = 0
+        self._changed: Dict[str, float] = {}
+        self._hints: Counter = Counter()
+        self._hint_since: Optional[float] = None
+
+        self._orphans_seen: Dict[Tuple[str, str], float] = {}
+        self._baselines: Dict[str, int] = {}
+        self._retry_after: Dict[str, float] = {}
+
+        self._tasks = {task: {'runs': 0, 'time_ms': 0.0, 'lock_ms': 0.0, 'last_run': None} for task in self.TASKS}
+        self._counters = {
+            'checkpoints': 0,
+            'hints': 0,
+            'hints_served': 0,
+            'hint_wait_ms_max': 0.0,
+            'checkpoints_without_hint': 0,
+            'tables_analyzed': 0,
+            'sketches_rebuilt': 0,
+            'orphan_rows_deleted': 0,
+            'compactions': 0,
+            'bytes_reclaimed': 0,
+            'busy_skips': 0,
+        }
+        self._hints_by_reason: Counter = Counter()
+        self._orphans_by_table: Counter = Counter()
+        self._compactions_abandoned: Counter = Counter()
+        self._history: deque = deque(maxlen=HISTORY_SIZE)
+
+    # -------------------------------------------------------------------------
+    # Lifecycle
+    # -------------------------------------------------------------------------
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive() and not self._stopping
+
+    def start(self):
+        """Start the scheduler thread (idempotent)."""
+        with self._cond:
+            if self.running:
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="duckdb-maintenance", daemon=True)
+            self._thread.start()
+        self._configure()
+        logger.info(f"[MAINTENANCE] Scheduler started (interval={self.interval_s}s, idle={self.idle_s}s, "
+                    f"window={self.window_spec or 'any time'})")
+
+    def stop(self, timeout: float = 30.0):
+        """Stop the thread and serve the checkpoint hints still pending."""
+        with self._cond:
+            if self._thread is None:
+                return
+            self._stopping = True
+            self._cond.notify_all()
+        self._thread.join(timeout=timeout)
+        self._thread = None
+        if self._hints:
+            try:
+                self.run_once(tasks=('checkpoint',), force=True)
+            except Exception as e:
+                logger.warning(f"[MAINTENANCE] Final checkpoint failed: {e}")
+        logger.info(f"[MAINTENANCE] Scheduler stopped: {self._counters}")
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._stopping:
+                    self._cond.wait(timeout=self.interval_s)
+                if self._stopping:
+                    return
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.warning(f"[MAINTENANCE] Scheduler loop error: {e}")
+
+    def _configure(self):
+        """Let the scheduler, not the committing request, checkpoint a growing WAL."""
+        try:
+            with self._locked(None):
+                self.handler.conn.execute(f"SET wal_autocheckpoint = '{max(1, 2 * self.wal_bytes // _MB)}MB'")
+        except Exception as e:
+            logger.debug(f"[MAINTENANCE] Could not raise wal_autocheckpoint: {e}")
+
+    # -------------------------------------------------------------------------
+    # Producer side (MaintainedConnection)
+    # -------------------------------------------------------------------------
+
+    def begin(self):
+        with self._activity:
+            self._in_flight += 1
+
+    def end(self, query):
+        now = time.monotonic()
+        wrote, changed = not isinstance(query, str), []
+        if not wrote:
+            head = query.lstrip()[:16].split(None, 1)
+            if not head or head[0].lower() not in _READS or ';' in query:
+                statements, _ = split_sql(query)
+                for statement in statements:
+                    targets = write_targets(statement)
+                    wrote = wrote or targets is None or bool(targets)
+                    changed.extend(targets or [])
+        with self._activity:
+            self._in_flight -= 1
+            self._last_activity = now
+            if wrote:
+                self._writes += 1
+            for table in changed:
+                self._changed[table] = now
+
+    def defer_checkpoint(self, reason: str) -> bool:
+        """Record a checkpoint hint; False when the scheduler isn't there to serve it."""
+        if not self.running or _maintaining():
+            return False
+        with self._activity:
+            self._hints[reason] += 1
+            self._hints_by_reason[reason] += 1
+            self._counters['hints'] += 1
+            if self._hint_since is None:
+                self._hint_since = time.monotonic()
+        return True
+
+    def idle_for(self) -> float:
+        with self._activity:
+            if self._in_flight:
+                return 0.0
+            return time.monotonic() - self._last_activity
+
+    def idle(self) -> bool:
+        return self.idle_for() >= self.idle_s
+
+    # -------------------------------------------------------------------------
+    # Running
+    # -------------------------------------------------------------------------
+
+    def run_once(self, force: bool = False, tasks=TASKS) -> Dict[str, Any]:
+        """
+        One tick: the checkpoint when due, then - while the connection stays
+        idle, or with force - statistics, orphans and at most one compaction.
+        force skips the idle check and the compaction window, not the policies.
+        """
+        if not self._run_lock.acquire(blocking=False):
+            return {'skipped': 'already running'}
+        _local.active = True
+        done: Dict[str, Any] = {}
+        try:
+            for task in tasks:
+                if task != 'checkpoint' and not (force or self.idle()):
+                    break
+                step = getattr(self, f"_step_{task}")
+                t0 = time.perf_counter()
+                try:
+                    result = step(force)
+                except _Busy:
+                    self._counters['busy_skips'] += 1
+                    continue
+                except Exception as e:
+                    logger.warning(f"[MAINTENANCE] {task} failed: {e}")
+                    result = {'error': str(e)}
+                if result:
+                    stats = self._tasks[task]
+                    stats['runs'] += 1
+                    stats['time_ms'] += (time.perf_counter() - t0) * 1000
+                    stats['last_run'] = datetime.utcnow().isoformat()
+                    done[task] = result
+                    self._history.append({'task': task, 'at': stats['last_run'],
+                                          'elapsed_ms': round((time.perf_counter() - t0) * 1000, 1), **result})
+        finally:
+            _local.active = False
+            self._run_lock.release()
+        return done
+
+    @contextmanager
+    def _locked(self, task: Optional[str]):
+        """Hold the handler's lock, counting the time against the task."""
+        lock = self.handler._db_lock
+        if not lock.acquire(timeout=LOCK_WAIT_S):
+            raise _Busy()
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            lock.release()
+            if task:
+                self._tasks[task]['lock_ms'] += (time.perf_counter() - t0) * 1000
+
+    def _cursor(self):
+        """A cursor on the handler's connection, for reads that shouldn't hold the lock."""
+        with self._locked(None):
+            return self.handler.conn.cursor()
+
+    # -------------------------------------------------------------------------
+    # Checkpoints
+    # -------------------------------------------------------------------------
+
+    def _wal_bytes(self) -> int:
+        paths = [self.handler.db_path]
+        shards = getattr(self.handler, 'shards', None)
+        if shards is not None:
+            paths.extend(shards.path_for(key) for key in shards.known_shards)
+        return sum(os.path.getsize(f"{p}.wal") for p in paths if os.path.exists(f"{p}.wal"))
+
+    def _step_checkpoint(self, force: bool) -> Optional[Dict[str, Any]]:
+        with self._activity:
+            waited = time.monotonic() - self._hint_since if self._hint_since is not None else None
+        wal = self._wal_bytes()
+        if waited is not None:
+            due = force or self.idle() or waited >= self.checkpoint_max_delay_s
+        else:
+            due = wal >= self.wal_bytes or (force and wal > 0)
+        if not due:
+            return None
+        with self._activity:
+            hints, self._hints = self._hints, Counter()
+            self._hint_since = None
+        try:
+            with self._locked('checkpoint'):
+                self.handler.conn.execute("CHECKPOINT")
+        except Exception:
+            with self._activity:
+                self._hints.update(hints)
+                if self._hint_since is None and hints:
+                    self._hint_since = time.monotonic() - (waited or 0)
+            raise
+        self._counters['checkpoints'] += 1
+        if hints:
+            self._counters['hints_served'] += sum(hints.values())
+            self._counters['hint_wait_ms_max'] = max(self._counters['hint_wait_ms_max'], (waited or 0) * 1000)
+        else:
+            self._counters['checkpoints_without_hint'] += 1
+        return {'hints': dict(hints), 'waited_ms': round((waited or 0) * 1000, 1), 'wal_bytes': wal}
+
+    # -------------------------------------------------------------------------
+    # Statistics
+    # -------------------------------------------------------------------------
+
+    def _step_statistics(self, force: bool) -> Optional[Dict[str, Any]]:
+        now = time.monotonic()
+        with self._activity:
+            settled = sorted(t for t, at in self._changed.items() if force or now - at >= self.idle_s)
+        if not settled:
+            return None
+        analyzed, rebuilt = [], []
+        cursor = self._cursor()
+        try:
+            for table in settled:
+                if not (force or self.idle()):
+                    break
+                with self._activity:
+                    if self._changed.get(table, now) > now:
+                        continue                        # written again meanwhile: next tick
+                    self._changed.pop(table, None)
+                try:
+                    cursor.execute(f"ANALYZE {_quote(table)}")
+                except Exception as e:
+                    logger.debug(f"[MAINTENANCE] Not analyzing {table}: {e}")
+                    continue
+                analyzed.append(table)
+                if self._refresh_sketches(cursor, table):
+                    rebuilt.append(table)
+        finally:
+            cursor.close()
+        self._counters['tables_analyzed'] += len(analyzed)
+        self._counters['sketches_rebuilt'] += len(rebuilt)
+        return {'analyzed': analyzed, 'sketches_rebuilt': rebuilt} if analyzed else None
+
+    def _refresh_sketches(self, cursor, table: str) -> bool:
+        """Rebuild a table's sketches if it has some and they are stale; the scan holds no lock."""
+        try:
+            from utils.column_sketches import ENABLED as SKETCHES_ENABLED, SketchBuilder, SKETCH_TABLE, \
+                get_sketch_store, table_column_types
+        except ImportError:
+            from .column_sketches import ENABLED as SKETCHES_ENABLED, SketchBuilder, SKETCH_TABLE, \
+                get_sketch_store, table_column_types
+        if not SKETCHES_ENABLED:
+            return False
+        try:
+            project, table, columns = cursor.execute(
+                f"SELECT any_value(project), any_value(table_name), count(*) FROM {SKETCH_TABLE} "
+                f"WHERE lower(table_name) = ?", [table]).fetchone()
+        except Exception:
+            return False
+        if not columns:
+            return False
+        store = get_sketch_store(self.handler)
+        if store.load(table) is not None:
+            return False
+        started = time.monotonic()
+        builder = SketchBuilder(table_column_types(cursor, table))
+        builder.add(cursor, _quote(table))
+        with self._locked('statistics'):
+            with self._activity:
+                if self._changed.get(table.lower(), 0) >= started:
+                    return False                        # written while building: stale again
+            store.save(project, table, builder.sketches, build_ms=builder.build_ms)
+        return True
+
+    # -------------------------------------------------------------------------
+    # Orphaned metadata
+    # -------------------------------------------------------------------------
+
+    def _step_orphans(self, force: bool) -> Optional[Dict[str, Any]]:
+        shards = getattr(self.handler, 'shards', None)
+        cursor = self._cursor()
+        try:
+            keyed = [r[0] for r in cursor.execute(f"""
+                SELECT table_name FROM duckdb_columns()
+                WHERE database_name = current_database() AND schema_name = 'main' AND column_name = 'table_name'
+                  AND table_name IN ({', '.join('?' for _ in ORPHAN_TABLES)})
+            """, list(ORPHAN_TABLES)).fetchall()]
+            if not keyed:
+                return None
+            existing = self._existing_tables(cursor)
+            missing = set()
+            for meta in keyed:
+                for (name,) in cursor.execute(f"SELECT DISTINCT table_name FROM {meta}").fetchall():
+                    if name and name.lower() not in existing and (shards is None or shards.covers(name)):
+                        missing.add((meta, name))
+        finally:
+            cursor.close()
+
+        now = time.time()
+        self._orphans_seen = {key: self._orphans_seen.get(key, now) for key in missing}
+        due: Dict[str, List[str]] = {}
+        for (meta, name), first_seen in self._orphans_seen.items():
+            if now - first_seen >= self.orphan_grace_s:
+                due.setdefault(meta, []).append(name)
+        if not due:
+            return None
+
+        deleted: Dict[str, int] = {}
+        for meta, names in sorted(due.items()):
+            for i in range(0, len(names), _DELETE_BATCH):
+                batch = names[i:i + _DELETE_BATCH]
+                with self._locked('orphans'):
+                    # Re-checked under the lock: an upload may have just created the table
+                    existing = self._existing_tables(self.handler.conn)
+                    batch = [n for n in batch if n.lower() not in existing]
+                    if not batch:
+                        continue
+                    placeholders = ', '.join('?' for _ in batch)
+                    count = self.handler.conn.execute(
+                        f"SELECT COUNT(*) FROM {meta} WHERE table_name IN ({placeholders})", batch).fetchone()[0]
+                    self.handler.conn.execute(f"DELETE FROM {meta} WHERE table_name IN ({placeholders})", batch)
+                deleted[meta] = deleted.get(meta, 0) + count
+                for name in batch:
+                    self._orphans_seen.pop((meta, name), None)
+        for meta, count in deleted.items():
+            self._orphans_by_table[meta] += count
+            self._counters['orphan_rows_deleted'] += count
+        if deleted:
+            logger.info(f"[MAINTENANCE] Deleted orphaned metadata rows: {deleted}")
+        return {'rows_deleted': deleted} if deleted else None
+
+    @staticmethod
+    def _existing_tables(conn) -> set:
+        rows = conn.execute("""
+            SELECT lower(table_name) FROM duckdb_tables() WHERE NOT internal
+            UNION SELECT lower(view_name) FROM duckdb_views() WHERE NOT internal
+        """).fetchall()
+        return {r[0] for r in rows}
+
+    # -------------------------------------------------------------------------
+    # Compaction
+    # -------------------------------------------------------------------------
+
+    def files(self) -> List[Dict[str, Any]]:
+        """The main file and the attached shards, with their block usage and the compaction policy's view."""
+        main_path = self.handler.db_path
+        shards = getattr(self.handler, 'shards', None)
+        cursor = self._cursor()
+        try:
+            main_catalog = cursor.execute("SELECT current_database()").fetchone()[0]
+            rows = cursor.execute(
+                "SELECT database_name, block_size, total_blocks, free_blocks FROM pragma_database_size()"
+            ).fetchall()
+        finally:
+            cursor.close()
+        files = []
+        for catalog, block_size, total_blocks, free_blocks in rows:
+            if catalog == main_catalog:
+                path, key = main_path, None
+            elif shards is not None and catalog.startswith(SHARD_CATALOG_PREFIX):
+                key = catalog[len(SHARD_CATALOG_PREFIX):]
+                path = shards.path_for(key)
+            else:
+                continue
+            if not os.path.exists(path):
+                continue
+            size = os.path.getsize(path)
+            baseline = self._baselines.setdefault(path, size)
+            dead = free_blocks / total_blocks if total_blocks else 0.0
+            growth = (size - baseline) / baseline if baseline else 0.0
+            files.append({
+                'path': path, 'catalog': catalog, 'shard': key, 'bytes': size,
+                'free_bytes': free_blocks * block_size, 'dead_ratio': round(dead, 3),
+                'growth': round(growth, 3), 'baseline_bytes': baseline,
+                'due': size >= self.min_compact_bytes and (dead >= self.dead_ratio or growth >= self.compact_growth),
+            })
+        return files
+
+    def _step_compaction(self, force: bool) -> Optional[Dict[str, Any]]:
+        if not (force or in_window(self.window)):
+            return None
+        now = time.monotonic()
+        candidates = [f for f in self.files() if f['due'] and self._retry_after.get(f['path'], 0) <= now]
+        if not candidates:
+            return None
+        target = max(candidates, key=lambda f: f['free_bytes'])
+        result = self._compact(target)
+        if result.get('abandoned'):
+            self._compactions_abandoned[result['abandoned']] += 1
+            self._retry_after[target['path']] = time.monotonic() + 10 * max(self.interval_s, self.idle_s)
+        return result
+
+    def _guard(self, catalog: str) -> tuple:
+        """Changes if anything is written to the catalog (or through the handler) meanwhile."""
+        row = self.handler.conn.execute(
+            "SELECT used_blocks, wal_size FROM pragma_database_size() WHERE database_name = ?", [catalog]
+        ).fetchone()
+        return self._writes, row
+
+    def _compact(self, target: Dict[str, Any]) -> Dict[str, Any]:
+        path, catalog, key = target['path'], target['catalog'], target['shard']
+        result: Dict[str, Any] = {'file': os.path.basename(path), 'shard': key, 'bytes_before': target['bytes'],
+                                  'dead_ratio': target['dead_ratio'], 'growth': target['growth']}
+        fresh = f"{path}.compact"
+        self._remove(fresh)
+
+        with self._locked('compaction'):
+            self.handler.conn.execute("CHECKPOINT" if key is None else f"CHECKPOINT {catalog}")
+            guard = self._guard(catalog)
+            before = os.path.getsize(path)
+
+        t0 = time.perf_counter()
+        cursor = self._cursor()
+        raw = _duckdb_connection(cursor)
+        try:
+            quoted = fresh.replace("'", "''")
+            raw.execute(f"ATTACH '{quoted}' AS {COMPACT_CATALOG}")
+            try:
+                raw.execute(f"COPY FROM DATABASE {_quote(catalog)} TO {COMPACT_CATALOG}")
+            finally:
+                raw.execute(f"DETACH {COMPACT_CATALOG}")
+        except Exception as e:
+            logger.warning(f"[MAINTENANCE] Copy of {path} failed: {e}")
+            self._remove(fresh)
+            return {**result, 'abandoned': 'copy_failed', 'error': str(e)}
+        finally:
+            cursor.close()
+        result['copy_ms'] = round((time.perf_counter() - t0) * 1000, 1)
+
+        t0 = time.perf_counter()
+        with self._locked('compaction'):
+            if self._guard(catalog) != guard:
+                self._remove(fresh)
+                return {**result, 'abandoned': 'written_during_copy'}
+            sketched = self._fresh_sketches(catalog)
+            if key is None:
+                swapped = self._swap_main(fresh)
+            else:
+                swapped = self.handler.shards.replace_file(key, fresh)
+                self.handler.shards.attach([key])
+            if not swapped:
+                self._remove(fresh)
+                return {**result, 'abandoned': 'in_use'}
+            self._restore_sketches(sketched)
+        result['swap_ms'] = round((time.perf_counter() - t0) * 1000, 1)
+
+        after = os.path.getsize(path)
+        self._baselines[path] = after
+        reclaimed = max(0, before - after)
+        self._counters['compactions'] += 1
+        self._counters['bytes_reclaimed'] += reclaimed
+        logger.info(f"[MAINTENANCE] Compacted {path}: {before / _MB:,.1f} MB -> {after / _MB:,.1f} MB "
+                    f"(copy {result['copy_ms']:.0f}ms, lock {result['swap_ms']:.0f}ms)")
+        return {**result, 'bytes_after': after, 'bytes_reclaimed': reclaimed}
+
+    def _swap_main(self, fresh: str) -> bool:
+        """Replace the main file (lock held). False if another connection still has it open."""
+        handler, path = self.handler, self.handler.db_path
+        with _swap_lock:
+            handler.conn.close()
+            try:
+                duckdb.connect(path, config=_PROBE_CONFIG).close()
+                swapped = True
+            except duckdb.Error:
+                swapped = False
+            if swapped:
+                os.replace(fresh, path)
+                self._remove(f"{path}.wal")
+            handler.conn = handler._wrap_connection(handler._connect_with_recovery(path))
+        self._configure()
+        return swapped
+
+    def _fresh_sketches(self, catalog: str) -> List[str]:
+        """Tables of the catalog whose stored sketches match them (lock held)."""
+        try:
+            rows = self.handler.conn.execute("""
+                SELECT s.table_name FROM _column_sketches s
+                JOIN duckdb_tables() t ON t.table_name = s.table_name AND NOT t.internal AND t.database_name = ?
+                GROUP BY s.table_name
+                HAVING bool_and(t.table_oid = s.table_oid AND t.estimated_size = s.estimated_size)
+            """, [catalog]).fetchall()
+        except Exception:
+            return []
+        return [r[0] for r in rows]
+
+    def _restore_sketches(self, tables: List[str]) -> None:
+        """Point fresh sketches at the copied tables' new ids (lock held)."""
+        if not tables:
+            return
+        self.handler.conn.execute(f"""
+            UPDATE _column_sketches s SET table_oid = t.table_oid, estimated_size = t.estimated_size
+            FROM duckdb_tables() t
+            WHERE t.table_name = s.table_name AND NOT t.internal
+              AND s.table_name IN ({', '.join('?' for _ in tables)})
+        """, tables)
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        for leftover in (path, f"{path}.wal"):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+
+    # -------------------------------------------------------------------------
+    # Report
+    # -------------------------------------------------------------------------
+
+    def report(self) -> Dict[str, Any]:
+        with self._activity:
+            pending = dict(self._hints)
+            waiting = time.monotonic() - self._hint_since if self._hint_since is not None else None
+            changed = len(self._changed)
+        try:
+            files = self.files()
+        except Exception as e:
+            files = [{'error': str(e)}]
+        return {
+            'enabled': ENABLED,
+            'running': self.running,
+            'idle_for_s': round(self.idle_for(), 1),
+            'policy': {
+                'interval_s': self.interval_s, 'idle_s': self.idle_s,
+                'checkpoint_max_delay_s': self.checkpoint_max_delay_s, 'wal_mb': self.wal_bytes / _MB,
+                'dead_ratio': self.dead_ratio, 'compact_growth': self.compact_growth,
+                'min_compact_mb': self.min_compact_bytes / _MB, 'window': self.window_spec,
+                'orphan_grace_s': self.orphan_grace_s, 'defer_checkpoints': self.defer_checkpoints,
+            },
+            'pending': {
+                'checkpoint_hints': pending,
+                'checkpoint_waiting_s': round(waiting, 1) if waiting is not None else None,
+                'wal_bytes': self._wal_bytes(),
+                'tables_to_analyze': changed,
+                'orphans_in_grace': len(self._orphans_seen),
+            },
+            'files': files,
+            'tasks': {task: {**stats, 'time_ms': round(stats['time_ms'], 1), 'lock_ms': round(stats['lock_ms'], 1)}
+                      for task, stats in self._tasks.items()},
+            'totals': {
+                **self._counters,
+                'hint_wait_ms_max': round(self._counters['hint_wait_ms_max'], 1),
+                'hints_by_reason': dict(self._hints_by_reason),
+                'orphan_rows_by_table': dict(self._orphans_by_table),
+                'compactions_abandoned': dict(self._compactions_abandoned),
+            },
+            'history': list(reversed(self._history)),
+        }
+
+
+# =============================================================================
+# ACCESS
+# =============================================================================
+
+_schedulers: 'weakref.WeakSet[MaintenanceScheduler]' = weakref.WeakSet()
+_schedulers_lock = threading.Lock()
+
+
+def get_maintenance(handler) -> MaintenanceScheduler:
+    """The handler's maintenance scheduler (created on first use, not started)."""
+    maintenance = getattr(handler, 'maintenance', None)
+    if maintenance is None:
+        maintenance = MaintenanceScheduler(handler)
+        try:
+            handler.maintenance = maintenance
+        except AttributeError:
+            pass
+        with _schedulers_lock:
+            _schedulers.add(maintenance)
+    return maintenance
+
+
+def stop_all() -> None:
+    """Stop every running scheduler (app shutdown)."""
+    with _schedulers_lock:
+        schedulers = list(_schedulers)
+    for maintenance in schedulers:
+        maintenance.stop()
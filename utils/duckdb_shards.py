@@ -0,0 +1,447 @@
+"""
+DuckDB Shards - One Database File per Project
+=============================================
+
+Every project's tables used to live in the one structured_data.duckdb
+file: the file grew without bound (DuckDB doesn't give space back when
+tables are dropped), one project's ingest checkpointed everyone's data,
+and deleting a project meant dropping its tables one by one.
+
+With sharding on, each project's tables live in their own file,
+<shard dir>/<key>.duckdb, where key is the 8-hex-char prefix every
+project table already carries (_generate_table_name: first 8 chars of the
+project UUID). Shards are ATTACHed on demand as catalog shard_<key> and
+kept on DuckDB's search_path, so existing unqualified SQL keeps working.
+At most XLR8_DUCKDB_MAX_ATTACHED shards stay attached; the least recently
+used one is detached when another is needed.
+
+ShardedConnection wraps the handler's connection:
+- Statements (and string parameters) that mention a shard key - a table
+  name like "a1b2c3d4_employees_sheet1" or the project UUID - attach that
+  shard before they run.
+- CREATE TABLE of a project table is qualified with its shard catalog;
+  INSERT / UPDATE / DELETE / DROP resolve through the search_path.
+- A bare CHECKPOINT (safe_commit) also checkpoints the shards written
+  since the last one; reads of data still in a shard's WAL run ~2x slower.
+
+Reads that name a project shard (read_keys) don't need the handler's
+_db_lock: StructuredDataHandler runs them on a per-thread cursor of the
+same database, so they see committed data and don't queue behind another
+project's ingest. pinned() keeps their shards from being detached (LRU
+eviction, compaction swaps) while they run.
+
+Shared metadata (_schema_metadata, _column_profiles, term index,
+_schema_catalog, ...) and tables without a project prefix stay in the
+main file, so metadata reads and joins across projects are unchanged.
+Tables still in the main file (not yet migrated) keep working - the main
+catalog is first on the search_path. Deleting a project removes its
+metadata rows and then the shard file.
+
+Migrate an existing single-file deployment with
+scripts/migrate_duckdb_shards.py.
+
+Settings:
+    XLR8_DUCKDB_SHARDING       - 'project' to store each project in its own file (default off)
+    XLR8_DUCKDB_SHARD_DIR      - shard files (default structured_data_shards/ next to the main file)
+    XLR8_DUCKDB_MAX_ATTACHED   - shards kept attached at once (default 32)
+
+Deploy to: utils/duckdb_shards.py
+
+Usage:
+    from utils.duckdb_shards import get_shard_manager
+
+    shards = get_shard_manager(db_path)        # None unless sharding is on
+    conn = shards.wrap(duckdb.connect(db_path))
+    conn.execute('CREATE TABLE "a1b2c3d4_employees" AS ...')   # lands in <shard dir>/a1b2c3d4.duckdb
+    shards.drop_shard(shard_key_for_project(project_id))
+"""
+
+import os
+import re
+import logging
+import threading
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+SHARD_CATALOG_PREFIX = 'shard_'
+
+_KEY = re.compile(r'[0-9a-f]{8}')
+_TABLE_KEY = re.compile(r'([0-9a-f]{8})_', re.IGNORECASE)
+# A shard key anywhere in SQL text: table names, quoted UUIDs, LIKE 'a1b2c3d4%'
+_KEY_TOKEN = re.compile(r'(?<![0-9a-z])([0-9a-f]{8})(?![0-9a-z])', re.IGNORECASE)
+_READ_STATEMENT = re.compile(r'^\s*(?:select|with|from|values|table|show|describe|summarize|explain|pragma)\b',
+                             re.IGNORECASE)
+_CHECKPOINT = re.compile(r'^\s*(?:force\s+)?checkpoint\s*;?\s*$', re.IGNORECASE)
+_CREATE_TABLE = re.compile(
+    r'^\s*create\s+(?:or\s+replace\s+)?table\s+(?:if\s+not\s+exists\s+)?'
+    r'(?P<target>"(?:[^"]|"")+"|[\w$]+)(?!\s*\.)',
+    re.IGNORECASE,
+)
+
+
+def sharding_enabled() -> bool:
+    return os.getenv('XLR8_DUCKDB_SHARDING', '').strip().lower() in ('project', 'true', '1', 'on')
+
+
+def shard_key_for_table(table_name: str) -> Optional[str]:
+    """Shard key of a project table ('a1b2c3d4_employees' -> 'a1b2c3d4'), None for shared tables."""
+    match = _TABLE_KEY.match(str(table_name))
+    return match.group(1).lower() if match else None
+
+
+def shard_key_for_project(project: str) -> Optional[str]:
+    """Shard key of a project id, the same prefix _generate_table_name uses."""
+    key = str(project or '').replace('-', '')[:8].lower()
+    return key if _KEY.fullmatch(key) else None
+
+
+def shard_catalog(key: str) -> str:
+    return f"{SHARD_CATALOG_PREFIX}{key}"
+
+
+class ShardManager:
+    """
+    Attachments and routing for the project shards of one main database.
+
+    The attachments belong to the DuckDB instance; the search_path is per
+    connection, so every ShardedConnection re-applies it when it changed.
+    """
+
+    def __init__(self, main_path: str, shard_dir: Optional[str] = None, max_attached: int = 32):
+        self.main_path = main_path
+        self.shard_dir = shard_dir or f"{os.path.splitext(os.path.abspath(main_path))[0]}_shards"
+        self.max_attached = max(1, max_attached)
+        os.makedirs(self.shard_dir, exist_ok=True)
+
+        self._known: Set[str] = {
+            name[:-len('.duckdb')] for name in os.listdir(self.shard_dir)
+            if name.endswith('.duckdb') and _KEY.fullmatch(name[:-len('.duckdb')])
+        }
+        self._attached: 'OrderedDict[str, None]' = OrderedDict()
+        self._dirty: Set[str] = set()
+        self._pins: Counter = Counter()
+        self._conn = None
+        self._main_catalog = None
+        self.search_path = ''
+        self._lock = threading.RLock()
+        self.stats = {'attaches': 0, 'detaches': 0, 'routed_creates': 0, 'dropped': 0, 'unlocked_reads': 0}
+
+    # -------------------------------------------------------------------------
+    # Connections
+    # -------------------------------------------------------------------------
+
+    def wrap(self, conn, new_instance: bool = True) -> 'ShardedConnection':
+        """
+        Wrap a connection. new_instance=False for extra connections to the
+        already open database (same process, same file) - they share its
+        attachments.
+        """
+        with self._lock:
+            if new_instance or self._conn is None:
+                self._conn = conn
+                self._main_catalog = conn.execute("SELECT current_database()").fetchone()[0]
+                self._attached.clear()
+                self.search_path = self._main_catalog
+        return ShardedConnection(conn, self)
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.shard_dir, f"{key}.duckdb")
+
+    @property
+    def known_shards(self) -> List[str]:
+        with self._lock:
+            return sorted(self._known)
+
+    @property
+    def attached_shards(self) -> List[str]:
+        with self._lock:
+            return list(self._attached)
+
+    # -------------------------------------------------------------------------
+    # Routing
+    # -------------------------------------------------------------------------
+
+    @staticmethod
+    def _mentioned_keys(sql: str, params: Any = None) -> Set[str]:
+        keys = {k.lower() for k in _KEY_TOKEN.findall(sql)}
+        if params:
+            values = params.values() if isinstance(params, dict) else params
+            for value in values:
+                if isinstance(value, str):
+                    keys.update(k.lower() for k in _KEY_TOKEN.findall(value))
+        return keys
+
+    def read_keys(self, sql: str, params: Any = None) -> Set[str]:
+        """Shards a read-only statement touches; empty for writes and reads of shared tables only."""
+        if not isinstance(sql, str) or not _READ_STATEMENT.match(sql) or ';' in sql.strip().rstrip(';'):
+            return set()
+        keys = self._mentioned_keys(sql, params)
+        with self._lock:
+            return keys & self._known
+
+    @contextmanager
+    def pinned(self, keys: Iterable[str]):
+        """Keep shards attached (no LRU detach, no file swap) for the duration."""
+        keys = list(keys)
+        with self._lock:
+            self._pins.update(keys)
+            self.stats['unlocked_reads'] += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._pins.subtract(keys)
+                self._pins += Counter()   # drop zero counts
+
+    def route(self, conn, sql: str, params: Any = None) -> str:
+        """Attach the shards a statement needs; returns the SQL to run."""
+        keys = self._mentioned_keys(sql, params)
+        create = _CREATE_TABLE.match(sql)
+        create_key = None
+        if create:
+            target = create.group('target')
+            create_key = shard_key_for_table(target.strip('"'))
+        with self._lock:
+            needed = {k for k in keys if k in self._known}
+            if create_key:
+                needed.add(create_key)
+            if needed:
+                self._ensure_attached(conn, needed)
+                if not _READ_STATEMENT.match(sql):
+                    self._dirty.update(needed)
+            if create_key:
+                self.stats['routed_creates'] += 1
+        if create_key:
+            sql = f"{sql[:create.start('target')]}{shard_catalog(create_key)}.main." \
+                  f"{sql[create.start('target'):]}"
+        return sql
+
+    def checkpoint(self, conn) -> None:
+        """Checkpoint the attached shards written since their last checkpoint."""
+        with self._lock:
+            for key in sorted(self._dirty & set(self._attached)):
+                try:
+                    conn.execute(f"CHECKPOINT {shard_catalog(key)}")
+                except Exception as e:
+                    logger.debug(f"[SHARDS] Checkpoint of {key} deferred: {e}")
+                    continue
+                self._dirty.discard(key)
+
+    def covers(self, table_name: str) -> bool:
+        """True when a table's absence from the attached catalogs means it's gone."""
+        key = shard_key_for_table(table_name)
+        with self._lock:
+            return key is None or key in self._attached or key not in self._known
+
+    def attach(self, keys: Iterable[str]) -> None:
+        """Attach existing shards (e.g. before listing their tables)."""
+        with self._lock:
+            wanted = {k for k in keys if k in self._known}
+            if wanted and self._conn is not None:
+                self._ensure_attached(self._conn, wanted)
+                self._conn.execute(f"SET search_path = '{self.search_path}'")
+
+    def _ensure_attached(self, conn, keys: Set[str]) -> None:
+        """Attach missing shards, detaching least recently used ones past the limit (lock held)."""
+        for key in sorted(keys):
+            if key in self._attached:
+                self._attached.move_to_end(key)
+                continue
+            conn.execute(f"ATTACH IF NOT EXISTS '{self.path_for(key)}' AS {shard_catalog(key)}")
+            self._attached[key] = None
+            self._known.add(key)
+            self.stats['attaches'] += 1
+        while len(self._attached) > self.max_attached:
+            victim = next((k for k in self._attached if k not in keys and not self._pins[k]), None)
+            if victim is None:
+                break
+            self._detach(conn, victim)
+        self._update_search_path()
+
+    def _update_search_path(self) -> None:
+        # Sorted, not LRU order: the path only changes (and connections only
+        # re-run SET search_path) when a shard is attached or detached
+        self.search_path = ','.join([self._main_catalog] + [shard_catalog(k) for k in sorted(self._attached)])
+
+    def _detach(self, conn, key: str) -> None:
+        # The search_path must stop naming the catalog before it goes away
+        self._attached.pop(key, None)
+        self._dirty.discard(key)   # DETACH checkpoints
+        self._update_search_path()
+        conn.execute(f"SET search_path = '{self.search_path}'")
+        try:
+            conn.execute(f"DETACH DATABASE IF EXISTS {shard_catalog(key)}")
+            self.stats['detaches'] += 1
+        except Exception as e:
+            logger.warning(f"[SHARDS] Could not detach {key}: {e}")
+
+    # -------------------------------------------------------------------------
+    # Project lifecycle
+    # -------------------------------------------------------------------------
+
+    def shard_tables(self, key: str) -> List[str]:
+        """Tables stored in a shard."""
+        with self._lock:
+            if key not in self._known or self._conn is None:
+                return []
+            self._ensure_attached(self._conn, {key})
+            self._conn.execute(f"SET search_path = '{self.search_path}'")
+            rows = self._conn.execute(
+                "SELECT table_name FROM duckdb_tables() WHERE database_name = ? ORDER BY table_name",
+                [shard_catalog(key)],
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    def drop_shard(self, key: Optional[str]) -> List[str]:
+        """Delete a project's shard file. Returns the tables it held."""
+        if not key:
+            return []
+        with self._lock:
+            if key not in self._known:
+                return []
+            tables = self.shard_tables(key)
+            if self._conn is not None:
+                self._detach(self._conn, key)
+            path = self.path_for(key)
+            for leftover in (path, f"{path}.wal"):
+                if os.path.exists(leftover):
+                    os.remove(leftover)
+            self._known.discard(key)
+            self.stats['dropped'] += 1
+        logger.info(f"[SHARDS] Removed shard {key} ({len(tables)} tables)")
+        return tables
+
+    def replace_file(self, key: str, path: str) -> bool:
+        """
+        Swap in a rewritten copy of a shard (compaction). The shard is
+        detached first and re-attached on next use; returns False, leaving
+        everything as it was, while a read has it pinned or if DuckDB
+        wouldn't let go of it.
+        """
+        with self._lock:
+            if key not in self._known or self._pins[key]:
+                return False
+            if key in self._attached and self._conn is not None:
+                self._detach(self._conn, key)
+                still_attached = self._conn.execute(
+                    "SELECT 1 FROM duckdb_databases() WHERE database_name = ?", [shard_catalog(key)]
+                ).fetchone()
+                if still_attached:
+                    self._ensure_attached(self._conn, {key})
+                    self._conn.execute(f"SET search_path = '{self.search_path}'")
+                    return False
+            target = self.path_for(key)
+            os.replace(path, target)
+            if os.path.exists(f"{target}.wal"):
+                os.remove(f"{target}.wal")
+        logger.info(f"[SHARDS] Replaced shard file {key}")
+        return True
+
+    def drop_all(self) -> List[str]:
+        """Delete every shard file (database reset). Returns the tables they held."""
+        tables = []
+        for key in self.known_shards:
+            tables.extend(self.drop_shard(key))
+        return tables
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            sizes = {k: os.path.getsize(self.path_for(k)) for k in self._known if os.path.exists(self.path_for(k))}
+            return {
+                'shard_dir': self.shard_dir,
+                'shards': len(self._known),
+                'attached': len(self._attached),
+                'max_attached': self.max_attached,
+                'bytes': sum(sizes.values()),
+                **self.stats,
+            }
+
+
+class ShardedConnection:
+    """
+    DuckDB connection proxy that attaches shards and routes CREATE TABLE.
+
+    execute() returns the underlying connection like DuckDB does, so
+    chained .fetchall() / .fetchdf() / .description work unchanged.
+    """
+
+    def __init__(self, conn, shards: ShardManager):
+        self._conn = conn
+        self._shards = shards
+        self._search_path = None
+
+    @property
+    def raw(self):
+        return self._conn
+
+    def _prepare(self, query, params=None):
+        if isinstance(query, str):
+            query = self._shards.route(self._conn, query, params)
+        path = self._shards.search_path
+        if path != self._search_path:
+            self._conn.execute(f"SET search_path = '{path}'")
+            self._search_path = path
+        return query
+
+    def execute(self, query, parameters=None, *args, **kwargs):
+        query = self._prepare(query, parameters)
+        if parameters is None:
+            result = self._conn.execute(query, *args, **kwargs)
+        else:
+            result = self._conn.execute(query, parameters, *args, **kwargs)
+        if isinstance(query, str) and _CHECKPOINT.match(query):
+            self._shards.checkpoint(self._conn)
+        return result
+
+    def executemany(self, query, parameters=None, *args, **kwargs):
+        query = self._prepare(query)
+        if parameters is None:
+            return self._conn.executemany(query, *args, **kwargs)
+        return self._conn.executemany(query, parameters, *args, **kwargs)
+
+    def sql(self, query, *args, **kwargs):
+        return self._conn.sql(self._prepare(query), *args, **kwargs)
+
+    def cursor(self):
+        return ShardedConnection(self._conn.cursor(), self._shards)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __enter__(self):
+        self._conn.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        return self._conn.__exit__(*exc)
+
+    def __repr__(self):
+        return f"ShardedConnection({self._conn!r})"
+
+
+# =============================================================================
+# REGISTRY
+# =============================================================================
+
+_managers: Dict[str, ShardManager] = {}
+_managers_lock = threading.Lock()
+
+
+def get_shard_manager(main_path: str, enabled: Optional[bool] = None) -> Optional[ShardManager]:
+    """The shard manager for a main database, or None when sharding is off."""
+    if not (sharding_enabled() if enabled is None else enabled):
+        return None
+    key = os.path.abspath(main_path)
+    with _managers_lock:
+        manager = _managers.get(key)
+        if manager is None:
+            try:
+                max_attached = int(os.getenv('XLR8_DUCKDB_MAX_ATTACHED', 32))
+            except ValueError:
+                max_attached = 32
+            manager = ShardManager(main_path, os.getenv('XLR8_DUCKDB_SHARD_DIR') or None, max_attached)
+            _managers[key] = manager
+        return manager
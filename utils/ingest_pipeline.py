@@ -0,0 +1,431 @@
+"""
+Ingest Pipeline - Staged Chunk Enrichment, Embedding and Chroma Writes
+======================================================================
+
+RAGHandler.add_document used to embed every chunk, then classify and
+entity-tag every chunk one after another, then write. For 1,000-page
+policy manuals the per-chunk enrichment alone kept the worker busy for
+minutes, and nothing overlapped.
+
+This pipeline runs the stages concurrently, connected by bounded queues
+(memory stays flat - at most XLR8_RAG_PIPELINE_QUEUE batches wait between
+stages):
+
+    chunks -> enrich (worker pool) -> embed (batched) -> write (Chroma batches)
+
+- enrich: chunk-level classification and hub-reference detection, in
+  batches on a thread pool (XLR8_RAG_ENRICH_WORKERS). Results are consumed
+  in submission order. XLR8_RAG_ENRICH_EXECUTOR=process uses a spawn
+  process pool instead, created once per process and shared by every
+  document; its workers build their own classifier/detector singletons.
+- embed: XLR8_RAG_EMBED_BATCH chunks at a time through the handler's
+  parallel embedding call.
+- write: collection.add in XLR8_RAG_WRITE_BATCH-sized batches of the
+  chunks that embedded, in chunk order.
+
+build_chunk_metadata() is shared with the sequential path, ids are the
+same and writes happen in the same order with the same batch boundaries,
+so the collection ends up identical (tests compare both paths).
+
+Settings:
+    XLR8_RAG_PIPELINE             - use the pipeline for large documents (default true)
+    XLR8_RAG_PIPELINE_MIN_CHUNKS  - smaller documents stay sequential (default 200)
+    XLR8_RAG_ENRICH_WORKERS       - enrichment workers (default: CPU count, max 4)
+    XLR8_RAG_ENRICH_EXECUTOR      - 'thread' or 'process' (default thread)
+    XLR8_RAG_EMBED_BATCH          - chunks per embedding batch (default 100)
+    XLR8_RAG_WRITE_BATCH          - chunks per collection.add (default 50)
+    XLR8_RAG_PIPELINE_QUEUE       - batches buffered between stages (default 4)
+
+Deploy to: utils/ingest_pipeline.py
+"""
+
+import os
+import time
+import atexit
+import queue
+import logging
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+PIPELINE_ENABLED = os.getenv('XLR8_RAG_PIPELINE', 'true').lower() in ('1', 'true', 'yes')
+PIPELINE_MIN_CHUNKS = int(os.getenv('XLR8_RAG_PIPELINE_MIN_CHUNKS', '200'))
+ENRICH_WORKERS = int(os.getenv('XLR8_RAG_ENRICH_WORKERS', '0')) or min(4, os.cpu_count() or 1)
+ENRICH_EXECUTOR = os.getenv('XLR8_RAG_ENRICH_EXECUTOR', 'thread')
+EMBED_BATCH = int(os.getenv('XLR8_RAG_EMBED_BATCH', '100'))
+WRITE_BATCH = int(os.getenv('XLR8_RAG_WRITE_BATCH', '50'))
+QUEUE_BATCHES = int(os.getenv('XLR8_RAG_PIPELINE_QUEUE', '4'))
+
+ENRICH_TASK_CHUNKS = 32  # chunks per pool task (amortises process IPC)
+
+
+# =============================================================================
+# CHUNK METADATA (shared with the sequential path)
+# =============================================================================
+
+@dataclass
+class ChunkContext:
+    """Document-level tags every chunk inherits."""
+    base_metadata: Dict[str, Any]
+    customer_id: Optional[str] = None
+    truth_type: Optional[str] = None
+    domain: Optional[str] = None
+    source_authority: Optional[str] = None
+    system: Optional[str] = None
+    doc_classification: Any = None
+    total_chunks: int = 0
+
+
+def build_chunk_metadata(i: int, chunk: str, ctx: ChunkContext, enhanced: Optional[Dict[str, Any]],
+                         classifier=None, detector=None) -> Dict[str, Any]:
+    """Metadata for chunk i: document tags, chunk domain, chunker metadata, hub references."""
+    chunk_metadata = {**ctx.base_metadata, "chunk_index": i}
+
+    # Preserve customer_id, truth_type, domain, source_authority, and system in chunk metadata
+    if ctx.customer_id:
+        chunk_metadata['customer_id'] = ctx.customer_id
+    if ctx.truth_type:
+        chunk_metadata['truth_type'] = ctx.truth_type
+    if ctx.domain:
+        chunk_metadata['domain'] = ctx.domain
+    if ctx.source_authority:
+        chunk_metadata['source_authority'] = ctx.source_authority
+    if ctx.system:
+        chunk_metadata['system'] = ctx.system
+
+    # Apply chunk-level classification refinement if classifier available
+    if classifier and ctx.doc_classification:
+        try:
+            chunk_class_meta = classifier.classify_chunk(chunk, ctx.doc_classification)
+            # Only add chunk_domain if it differs from document domain
+            if chunk_class_meta.get('chunk_domain'):
+                chunk_metadata['chunk_domain'] = chunk_class_meta['chunk_domain']
+                chunk_metadata['chunk_domain_confidence'] = chunk_class_meta.get('chunk_domain_confidence', 0.0)
+        except Exception as e:
+            logger.debug(f"Chunk-level classification failed for chunk {i}: {e}")
+
+    if enhanced is not None:
+        if 'metadata' in enhanced:
+            meta = enhanced['metadata']
+            enhanced_metadata = {
+                'structure': meta.get('structure', 'unknown'),
+                'strategy': meta.get('strategy', 'unknown'),
+                'chunk_type': meta.get('chunk_type', 'unknown'),
+                'parent_section': meta.get('parent_section', 'unknown'),
+                'has_header': meta.get('has_header', False),
+                'row_start': meta.get('row_start'),
+                'row_end': meta.get('row_end'),
+                'line_start': meta.get('line_start'),
+                'line_end': meta.get('line_end'),
+                'hierarchy_level': meta.get('hierarchy_level'),
+                'tokens_estimate': len(chunk) // 4,
+                'position': f"{i+1}/{ctx.total_chunks}"
+            }
+        else:
+            enhanced_metadata = {
+                'chunk_type': enhanced.get('chunk_type', 'unknown'),
+                'parent_section': enhanced.get('parent_section', 'unknown'),
+                'has_header': enhanced.get('has_header', False),
+                'tokens_estimate': len(chunk) // 4,
+                'position': f"{i+1}/{ctx.total_chunks}"
+            }
+        chunk_metadata.update({k: v for k, v in enhanced_metadata.items() if v is not None})
+
+    # Detect and tag hub references in chunk
+    if detector:
+        try:
+            detection = detector.detect_entities(chunk)
+            if detection.get('hub_references'):
+                # Store as comma-separated string (ChromaDB doesn't support lists in metadata)
+                chunk_metadata['hub_references'] = ','.join(detection['hub_references'])
+                chunk_metadata['primary_hub'] = detection.get('primary_hub', '')
+                if detection.get('hub_details', {}).get(detection.get('primary_hub', ''), {}):
+                    chunk_metadata['hub_confidence'] = detection['hub_details'][detection['primary_hub']]['confidence']
+        except Exception as e:
+            logger.debug(f"Entity detection failed for chunk {i}: {e}")
+
+    return {k: v for k, v in chunk_metadata.items() if v is not None}
+
+
+# =============================================================================
+# ENRICHMENT WORKERS
+# =============================================================================
+
+_worker_tools: Dict[str, Any] = {}
+
+
+def _init_process_worker(use_classifier: bool, use_detector: bool):
+    """Process pool initializer: each worker builds its own classifier/detector singletons."""
+    if use_classifier:
+        try:
+            from backend.utils.intelligence.chunk_classifier import get_classifier
+        except ImportError:
+            from utils.intelligence.chunk_classifier import get_classifier
+        _worker_tools['classifier'] = get_classifier()
+    if use_detector:
+        try:
+            from backend.utils.entity_detector import get_detector
+        except ImportError:
+            from utils.entity_detector import get_detector
+        _worker_tools['detector'] = get_detector()
+
+
+def _enrich_batch(items: List[Tuple[int, str, Optional[Dict]]], ctx: ChunkContext,
+                  classifier=None, detector=None) -> Tuple[float, List[Dict[str, Any]]]:
+    start = time.perf_counter()
+    metadatas = [build_chunk_metadata(i, chunk, ctx, enhanced, classifier, detector) for i, chunk, enhanced in items]
+    return time.perf_counter() - start, metadatas
+
+
+def _enrich_in_process(items: List[Tuple[int, str, Optional[Dict]]], ctx: ChunkContext):
+    return _enrich_batch(items, ctx, _worker_tools.get('classifier'), _worker_tools.get('detector'))
+
+
+_process_pools: Dict[Tuple[int, bool, bool], ProcessPoolExecutor] = {}
+_process_pools_lock = threading.Lock()
+
+
+def _process_pool(workers: int, use_classifier: bool, use_detector: bool) -> ProcessPoolExecutor:
+    """Spawn pool shared by every document, so workers import the app and build their tools once."""
+    key = (workers, use_classifier, use_detector)
+    with _process_pools_lock:
+        pool = _process_pools.get(key)
+        if pool is None:
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                       initializer=_init_process_worker,
+                                       initargs=(use_classifier, use_detector))
+            _process_pools[key] = pool
+        return pool
+
+
+def _discard_process_pool(pool: ProcessPoolExecutor):
+    with _process_pools_lock:
+        for key, shared in list(_process_pools.items()):
+            if shared is pool:
+                del _process_pools[key]
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+@atexit.register
+def _shutdown_process_pools():
+    with _process_pools_lock:
+        pools = list(_process_pools.values())
+        _process_pools.clear()
+    for pool in pools:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+# =============================================================================
+# PIPELINE
+# =============================================================================
+
+@dataclass
+class StageStats:
+    """Items through a stage and the time it spent working (rate excludes queue waits)."""
+    name: str
+    items: int = 0
+    busy: float = 0.0
+
+    @property
+    def rate(self) -> float:
+        return self.items / self.busy if self.busy > 0 else 0.0
+
+
+@dataclass
+class PipelineResult:
+    chunks_added: int
+    embedded: int
+    embed_failed: int
+    hub_references: Set[str] = field(default_factory=set)
+    stats: Dict[str, StageStats] = field(default_factory=dict)
+    seconds: float = 0.0
+
+
+_DONE = object()
+
+
+class _Failed:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def _put(q: queue.Queue, item, stop: threading.Event):
+    """Blocking put that gives up when the pipeline is stopping."""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def run_ingest_pipeline(
+    chunks: List[str],
+    enhanced: Optional[List[Dict[str, Any]]],
+    ctx: ChunkContext,
+    id_prefix: str,
+    embed: Callable[[List[str]], List[Optional[List[float]]]],
+    write: Callable[[List[str], List[str], List[List[float]], List[Dict[str, Any]]], None],
+    classifier=None,
+    detector=None,
+    progress_callback: Optional[Callable] = None,
+    workers: int = None,
+    executor: str = None,
+    embed_batch: int = None,
+    write_batch: int = None,
+    queue_batches: int = None,
+) -> PipelineResult:
+    """
+    Enrich, embed and write chunks with the stages overlapping.
+
+    embed(texts) returns one embedding (or None on failure) per text;
+    write(ids, documents, embeddings, metadatas) adds one batch.
+    """
+    workers = workers or ENRICH_WORKERS
+    executor = executor or ENRICH_EXECUTOR
+    embed_batch = embed_batch or EMBED_BATCH
+    write_batch = write_batch or WRITE_BATCH
+    queue_batches = queue_batches or QUEUE_BATCHES
+    total = len(chunks)
+    start = time.perf_counter()
+
+    stats = {name: StageStats(name) for name in ('enrich', 'embed', 'write')}
+    enriched_q: queue.Queue = queue.Queue(maxsize=queue_batches)
+    embedded_q: queue.Queue = queue.Queue(maxsize=queue_batches)
+    stop = threading.Event()
+
+    def enhanced_for(i: int) -> Optional[Dict[str, Any]]:
+        return enhanced[i] if enhanced and i < len(enhanced) else None
+
+    def enrich_stage():
+        shared = executor == 'process' and workers > 1
+        if shared:
+            pool = _process_pool(workers, classifier is not None, detector is not None)
+
+            def submit(items):
+                return pool.submit(_enrich_in_process, items, ctx)
+        else:
+            pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='rag-enrich')
+
+            def submit(items):
+                return pool.submit(_enrich_batch, items, ctx, classifier, detector)
+        window = deque()  # in-flight tasks, consumed in order
+        try:
+            for task_start in range(0, total, ENRICH_TASK_CHUNKS):
+                if stop.is_set():
+                    return
+                items = [(i, chunks[i], enhanced_for(i))
+                         for i in range(task_start, min(task_start + ENRICH_TASK_CHUNKS, total))]
+                window.append((items, submit(items)))
+                while len(window) > workers * 2:
+                    if not _emit_enriched(window.popleft()):
+                        return
+            while window:
+                if not _emit_enriched(window.popleft()):
+                    return
+            _put(enriched_q, _DONE, stop)
+        except BaseException as e:
+            if isinstance(e, BrokenProcessPool):
+                _discard_process_pool(pool)  # A worker died: the next document gets a fresh pool
+            _put(enriched_q, _Failed(e), stop)
+        finally:
+            if shared:
+                for _, future in window:
+                    future.cancel()
+            else:
+                pool.shutdown(wait=False, cancel_futures=True)
+
+    def _emit_enriched(task) -> bool:
+        items, future = task
+        seconds, metadatas = future.result()
+        stats['enrich'].items += len(items)
+        stats['enrich'].busy += seconds / workers  # the pool works on `workers` batches at once
+        return _put(enriched_q, [(i, chunk, meta) for (i, chunk, _), meta in zip(items, metadatas)], stop)
+
+    def embed_stage():
+        try:
+            pending: List[Tuple[int, str, Dict]] = []
+            finished = False
+            while not finished:
+                item = enriched_q.get()
+                if isinstance(item, _Failed):
+                    _put(embedded_q, item, stop)
+                    return
+                if item is _DONE:
+                    finished = True
+                else:
+                    pending.extend(item)
+                while pending and (len(pending) >= embed_batch or finished):
+                    batch, pending = pending[:embed_batch], pending[embed_batch:]
+                    batch_start = time.perf_counter()
+                    embeddings = embed([chunk for _, chunk, _ in batch])
+                    stats['embed'].busy += time.perf_counter() - batch_start
+                    stats['embed'].items += len(batch)
+                    if not _put(embedded_q, [(i, chunk, meta, emb)
+                                             for (i, chunk, meta), emb in zip(batch, embeddings)], stop):
+                        return
+            _put(embedded_q, _DONE, stop)
+        except BaseException as e:
+            _put(embedded_q, _Failed(e), stop)
+
+    threads = [threading.Thread(target=enrich_stage, name='rag-pipeline-enrich', daemon=True),
+               threading.Thread(target=embed_stage, name='rag-pipeline-embed', daemon=True)]
+    for t in threads:
+        t.start()
+
+    # Write stage (this thread): valid chunks in order, fixed batch boundaries
+    result = PipelineResult(chunks_added=0, embedded=0, embed_failed=0, stats=stats)
+    buffer: List[Tuple[int, str, Dict, List[float]]] = []
+
+    def flush(batch):
+        batch_start = time.perf_counter()
+        write([f"{id_prefix}_{i}" for i, _, _, _ in batch], [chunk for _, chunk, _, _ in batch],
+              [emb for _, _, _, emb in batch], [meta for _, _, meta, _ in batch])
+        stats['write'].busy += time.perf_counter() - batch_start
+        stats['write'].items += len(batch)
+        result.chunks_added += len(batch)
+        for _, _, meta, _ in batch:
+            if meta.get('hub_references'):
+                result.hub_references.update(meta['hub_references'].split(','))
+        if progress_callback:
+            done = stats['embed'].items
+            progress_callback(10 + int(done / total * 85) if total else 95, 100, _progress_message(stats, total))
+
+    try:
+        while True:
+            item = embedded_q.get()
+            if isinstance(item, _Failed):
+                raise item.error
+            if item is _DONE:
+                break
+            for i, chunk, meta, emb in item:
+                if emb is None:
+                    logger.warning(f"Failed to get embedding for chunk {i}, skipping")
+                    result.embed_failed += 1
+                    continue
+                result.embedded += 1
+                buffer.append((i, chunk, meta, emb))
+            while len(buffer) >= write_batch:
+                batch, buffer = buffer[:write_batch], buffer[write_batch:]
+                flush(batch)
+        if buffer:
+            flush(buffer)
+    finally:
+        stop.set()
+        for t in threads:
+            t.join(timeout=5)
+
+    result.seconds = time.perf_counter() - start
+    logger.info(f"[PIPELINE] {total} chunks in {result.seconds:.1f}s - {_progress_message(stats, total)}")
+    return result
+
+
+def _progress_message(stats: Dict[str, StageStats], total: int) -> str:
+    return ' · '.join(f"{s.name} {s.items}/{total} ({s.rate:.0f}/s)" for s in stats.values())
@@ -0,0 +1,244 @@
+"""
+Lexical Index - BM25 Inverted Index Alongside ChromaDB Collections
+==================================================================
+
+Vector similarity alone misses exact-token lookups: earning codes like
+"REG01", GL accounts like "6100-200", policy section numbers like
+"4.2.1". Embedders blur these into their neighbours, and asking Chroma
+for more results only adds latency.
+
+This module keeps a SQLite FTS5 table per collection, written when
+RAGHandler adds or deletes chunks, and ranks with FTS5's bm25(). The
+code-aware tokenizer keeps compound codes whole ("6100-200", "4.2.1")
+and also indexes their parts, so "GL 6100" still matches.
+
+Chunks deleted outside RAGHandler (cleanup routers) are handled two
+ways. Lexical hits are always resolved through collection.get(ids=...),
+so stale ids never surface. reconcile() prunes or backfills the index
+when its count drifts from the collection's; searches call it through
+reconcile_if_due(), at most once per collection per interval.
+
+Settings:
+    XLR8_LEXICAL_INDEX_PATH  - index file (default: lexical_index.sqlite3 next to ChromaDB)
+    XLR8_LEXICAL_RECONCILE_S - seconds between reconciles of one collection (default: 300)
+
+Deploy to: utils/lexical_index.py
+"""
+
+import os
+import re
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILENAME = 'lexical_index.sqlite3'
+COMMON_TERM_RATIO = 0.25  # terms in more chunks than this are left out of the MATCH
+RECONCILE_INTERVAL_S = float(os.getenv('XLR8_LEXICAL_RECONCILE_S', '300'))
+
+_TOKEN = re.compile(r'[a-z0-9]+(?:[.\-_/][a-z0-9]+)*')
+_PARTS = re.compile(r'[.\-_/]')
+
+STOPWORDS = frozenset("""
+a an and are as at be by do does for from how i in is it of on or that the this to was what when where which
+who why will with can our we you your me my show tell find about
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased tokens; compound codes ("6100-200") are kept whole and also split into parts."""
+    tokens = []
+    for token in _TOKEN.findall((text or '').lower()):
+        tokens.append(token)
+        if _PARTS.search(token):
+            tokens.extend(part for part in _PARTS.split(token) if part)
+    return tokens
+
+
+def _is_code(token: str) -> bool:
+    has_digit = any(ch.isdigit() for ch in token)
+    if not has_digit:
+        return False
+    return (any(ch.isalpha() for ch in token)          # REG01, 401k
+            or bool(_PARTS.search(token))              # 6100-200, 4.2.1
+            or len(token) >= 3)                        # 6100
+
+
+def code_terms(query: str) -> List[str]:
+    """The code-like tokens in a query (earning codes, account numbers, section numbers)."""
+    return [t for t in _TOKEN.findall((query or '').lower()) if _is_code(t)]
+
+
+def is_code_lookup(query: str, max_words: int = 3) -> bool:
+    """Short queries made of codes ("REG01", "GL 6100-200", "section 4.2.1") - no embedding needed."""
+    words = [t for t in _TOKEN.findall((query or '').lower()) if t not in STOPWORDS]
+    return bool(words) and len(words) <= max_words and bool(code_terms(query))
+
+
+def _match_expression(terms: List[str]) -> str:
+    return ' OR '.join('"' + t.replace('"', '""') + '"' for t in terms)
+
+
+class LexicalIndex:
+    """BM25 index of chunk text keyed by Chroma collection and chunk id."""
+
+    def __init__(self, path: str = ':memory:'):
+        self.path = path
+        self._lock = threading.RLock()
+        self._tables: Dict[str, str] = {}
+        self._reconciled_at: Dict[str, float] = {}
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        if path != ':memory:':
+            self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS lexical_collections (name TEXT PRIMARY KEY, tbl TEXT NOT NULL)")
+        self.conn.commit()
+
+    def _table(self, collection: str, create: bool = True) -> Optional[str]:
+        tbl = self._tables.get(collection)
+        if tbl:
+            return tbl
+        row = self.conn.execute("SELECT tbl FROM lexical_collections WHERE name = ?", [collection]).fetchone()
+        if row:
+            tbl = row[0]
+        elif create:
+            tbl = 'lex_' + hashlib.md5(collection.encode()).hexdigest()[:16]
+            self.conn.execute(f"CREATE TABLE IF NOT EXISTS {tbl}_ids (rowid INTEGER PRIMARY KEY, chunk_id TEXT UNIQUE NOT NULL)")
+            self.conn.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {tbl} USING fts5(body, tokenize=\"unicode61 tokenchars '.-_/'\")")
+            self.conn.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {tbl}_vocab USING fts5vocab({tbl}, 'row')")
+            self.conn.execute("INSERT INTO lexical_collections (name, tbl) VALUES (?, ?)", [collection, tbl])
+        else:
+            return None
+        self._tables[collection] = tbl
+        return tbl
+
+    def add(self, collection: str, ids: List[str], documents: List[str]):
+        """Index chunks (re-adding an id replaces its text)."""
+        if not ids:
+            return
+        with self._lock:
+            tbl = self._table(collection)
+            self._delete(tbl, ids)
+            for chunk_id, document in zip(ids, documents):
+                rowid = self.conn.execute(f"INSERT INTO {tbl}_ids (chunk_id) VALUES (?)", [chunk_id]).lastrowid
+                self.conn.execute(f"INSERT INTO {tbl} (rowid, body) VALUES (?, ?)",
+                                  [rowid, ' '.join(tokenize(document))])
+            self.conn.commit()
+
+    def delete(self, collection: str, ids: Iterable[str]):
+        ids = list(ids)
+        with self._lock:
+            tbl = self._table(collection, create=False)
+            if tbl and ids:
+                self._delete(tbl, ids)
+                self.conn.commit()
+
+    def _delete(self, tbl: str, ids: List[str]):
+        for start in range(0, len(ids), 500):
+            batch = ids[start:start + 500]
+            marks = ','.join('?' * len(batch))
+            rowids = [r[0] for r in self.conn.execute(
+                f"SELECT rowid FROM {tbl}_ids WHERE chunk_id IN ({marks})", batch).fetchall()]
+            if rowids:
+                rmarks = ','.join('?' * len(rowids))
+                self.conn.execute(f"DELETE FROM {tbl} WHERE rowid IN ({rmarks})", rowids)
+                self.conn.execute(f"DELETE FROM {tbl}_ids WHERE rowid IN ({rmarks})", rowids)
+
+    def drop(self, collection: str):
+        with self._lock:
+            tbl = self._table(collection, create=False)
+            if tbl:
+                self.conn.execute(f"DROP TABLE IF EXISTS {tbl}_vocab")
+                self.conn.execute(f"DROP TABLE IF EXISTS {tbl}")
+                self.conn.execute(f"DROP TABLE IF EXISTS {tbl}_ids")
+                self.conn.execute("DELETE FROM lexical_collections WHERE name = ?", [collection])
+                self.conn.commit()
+                self._tables.pop(collection, None)
+            self._reconciled_at.pop(collection, None)
+
+    def count(self, collection: str) -> int:
+        with self._lock:
+            tbl = self._table(collection, create=False)
+            return self.conn.execute(f"SELECT COUNT(*) FROM {tbl}_ids").fetchone()[0] if tbl else 0
+
+    def search(self, collection: str, query: str, limit: int = 20) -> List[Tuple[str, float]]:
+        """(chunk_id, bm25 score) best first; higher scores are better."""
+        terms = [t for t in dict.fromkeys(tokenize(query)) if t not in STOPWORDS]
+        if not terms:
+            return []
+        with self._lock:
+            tbl = self._table(collection, create=False)
+            if not tbl:
+                return []
+            expression = _match_expression(self._selective_terms(tbl, terms))
+            rows = self.conn.execute(
+                f"SELECT i.chunk_id, -bm25({tbl}) AS score FROM {tbl} JOIN {tbl}_ids i ON i.rowid = {tbl}.rowid "
+                f"WHERE {tbl} MATCH ? ORDER BY score DESC, i.rowid LIMIT ?", [expression, limit]).fetchall()
+        return [(chunk_id, float(score)) for chunk_id, score in rows]
+
+    def _selective_terms(self, tbl: str, terms: List[str]) -> List[str]:
+        """
+        Drop terms found in more than COMMON_TERM_RATIO of chunks.
+
+        Their BM25 weight is near zero, but matching them makes FTS5 score most of
+        the collection. The rarest term is always kept.
+        """
+        total = self.conn.execute(f"SELECT COUNT(*) FROM {tbl}_ids").fetchone()[0]
+        marks = ','.join('?' * len(terms))
+        doc_counts = dict(self.conn.execute(f"SELECT term, doc FROM {tbl}_vocab WHERE term IN ({marks})", terms).fetchall())
+        selective = [t for t in terms if doc_counts.get(t, 0) <= total * COMMON_TERM_RATIO]
+        return selective or [min(terms, key=lambda t: doc_counts.get(t, 0))]
+
+    def reconcile(self, collection_name: str, collection, page_size: int = 1000) -> Dict[str, int]:
+        """Prune ids no longer in the Chroma collection and backfill ones missing here."""
+        chroma_count = collection.count()
+        if chroma_count == self.count(collection_name):
+            return {'pruned': 0, 'added': 0}
+
+        chroma_ids = set()
+        for offset in range(0, chroma_count, page_size):
+            chroma_ids.update(collection.get(include=[], limit=page_size, offset=offset)['ids'])
+        with self._lock:
+            tbl = self._table(collection_name)
+            indexed = {r[0] for r in self.conn.execute(f"SELECT chunk_id FROM {tbl}_ids").fetchall()}
+        stale = list(indexed - chroma_ids)
+        missing = list(chroma_ids - indexed)
+        self.delete(collection_name, stale)
+        for start in range(0, len(missing), page_size):
+            batch = collection.get(ids=missing[start:start + page_size], include=['documents'])
+            self.add(collection_name, batch['ids'], batch['documents'])
+        if stale or missing:
+            logger.info(f"[LEXICAL] Reconciled '{collection_name}': pruned {len(stale)}, indexed {len(missing)}")
+        return {'pruned': len(stale), 'added': len(missing)}
+
+    def reconcile_if_due(self, collection_name: str, collection,
+                         interval: float = RECONCILE_INTERVAL_S) -> Optional[Dict[str, int]]:
+        """reconcile() unless this collection was reconciled in the last interval seconds."""
+        now = time.monotonic()
+        with self._lock:
+            last = self._reconciled_at.get(collection_name)
+            if last is not None and now - last < interval:
+                return None
+            self._reconciled_at[collection_name] = now   # claimed: concurrent searches skip it
+        return self.reconcile(collection_name, collection)
+
+
+# =============================================================================
+# SINGLETON (one index file per ChromaDB directory)
+# =============================================================================
+
+_indexes: Dict[str, LexicalIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_lexical_index(chroma_path: Optional[str] = None) -> LexicalIndex:
+    path = os.getenv('XLR8_LEXICAL_INDEX_PATH') or (
+        os.path.join(chroma_path, INDEX_FILENAME) if chroma_path else ':memory:')
+    with _indexes_lock:
+        if path not in _indexes:
+            _indexes[path] = LexicalIndex(path)
+            logger.info(f"[LEXICAL] Index at {path}")
+        return _indexes[path]
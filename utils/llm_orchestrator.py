@@ -34,6 +34,8 @@ except ImportError:
         METRICS_AVAILABLE = False
         logger.debug("[LLM] MetricsService not available - LLM metrics will not be recorded")
 
+from utils.tracing import current_span, traced
+
 
 # =============================================================================
 # QUERY CLASSIFICATION
@@ -250,6 +252,7 @@ class LLMOrchestrator:
         logger.info(f"  Ollama: {self.ollama_url or 'NOT SET!'}")
         logger.info(f"  Claude: {'configured' if self.claude_api_key else 'NOT SET!'}")
     
+    @traced('llm.ollama')
     def _call_ollama(self, model: str, prompt: str, system_prompt: str = None, project_id: str = None, processor: str = "chat") -> Tuple[Optional[str], bool]:
         """Call local Ollama instance with metrics tracking"""
         if not self.ollama_url:
@@ -274,6 +277,7 @@ class LLMOrchestrator:
             }
             
             logger.info(f"Calling Ollama: {model} ({len(full_prompt)} chars)")
+            current_span().set_attributes(model=model, processor=processor, prompt_chars=len(full_prompt))
             
             # Use auth if configured (Hetzner), skip if not (RunPod)
             if self.ollama_username and self.ollama_password:
@@ -287,6 +291,7 @@ class LLMOrchestrator:
             
             duration_ms = int((time.time() - start_time) * 1000)
             
+            current_span().set('http.status_code', response.status_code)
             if response.status_code != 200:
                 logger.error(f"Ollama error {response.status_code}: {response.text[:200]}")
                 # Record failed LLM call
@@ -349,6 +354,7 @@ class LLMOrchestrator:
                 )
             return str(e), False
     
+    @traced('llm.claude')
     def _call_claude(self, prompt: str, system_prompt: str, project_id: str = None, operation: str = "chat") -> Tuple[str, bool]:
         """Call Claude API with retry for rate limits and metrics tracking"""
         if not self.claude_api_key:
@@ -380,6 +386,8 @@ class LLMOrchestrator:
                 usage = response.usage
                 tokens_in = usage.input_tokens if usage else 0
                 tokens_out = usage.output_tokens if usage else 0
+                current_span().set_attributes(model=self.claude_model, operation=operation, attempts=attempt + 1,
+                                              tokens_in=tokens_in, tokens_out=tokens_out)
                 
                 # Log cost (existing)
                 try:
@@ -605,6 +613,7 @@ Analyze the data. Answer the question with real numbers and real values from the
         
         return status
     
+    @traced('llm.generate_sql')
     def generate_sql(self, prompt: str, schema_columns: set = None) -> Dict[str, Any]:
         """
         Generate SQL query from natural language using LOCAL LLM.
@@ -976,6 +985,7 @@ SELECT"""
         
         return list(set(invalid))  # dedupe
     
+    @traced('llm.synthesize_answer')
     def synthesize_answer(
         self, 
         question: str, 
@@ -1184,6 +1194,7 @@ Analyze the data and provide a clear, direct answer. Focus on the key insight fi
         
         return result.strip()
 
+    @traced('llm.generate_json')
     def generate_json(
         self, 
         prompt: str, 
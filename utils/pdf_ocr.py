@@ -0,0 +1,381 @@
+"""
+PDF Page Pipeline - Page-Parallel OCR with Adaptive DPI
+========================================================
+
+text_extraction._extract_pdf reads at most 10 pages and, when the whole
+document has under 100 characters of text, OCRs those pages serially at a
+fixed 100 dpi. Scanned benefit booklets lose most of their pages and
+mixed documents (text pages plus a few scans) never get OCR at all.
+
+This pipeline works per page:
+
+- Pages with a usable text layer (XLR8_OCR_MIN_TEXT_CHARS non-space
+  characters) keep it - no rendering.
+- Other pages are OCR'd in a spawn process pool (XLR8_OCR_WORKERS) shared
+  by every document, so workers start once per server. Each starts
+  at the lowest DPI in XLR8_OCR_DPI_STEPS and is re-rendered at the next
+  step only while Tesseract's mean word confidence is under
+  XLR8_OCR_MIN_CONFIDENCE; the most confident attempt wins.
+- OCR results are cached on disk by a hash of the page's content stream
+  and image data, so re-uploading the same PDF (or one sharing pages)
+  skips OCR for those pages.
+
+Each page reports its method (text / ocr / cache / empty), DPI, confidence
+and time; extract_pdf_pages() returns them with the joined text.
+
+Settings:
+    XLR8_OCR_WORKERS          - OCR processes (default: CPU count, max 4)
+    XLR8_OCR_DPI_STEPS        - DPIs to try, low first (default 100,200,300)
+    XLR8_OCR_MIN_CONFIDENCE   - mean word confidence to accept a page (default 70)
+    XLR8_OCR_MIN_TEXT_CHARS   - text-layer characters that make a page usable (default 20)
+    XLR8_OCR_LANG             - Tesseract language (default eng)
+    XLR8_OCR_CACHE_DIR        - page OCR cache directory (default <tmp>/xlr8_ocr_cache)
+
+Deploy to: utils/pdf_ocr.py
+
+Usage:
+    from utils.pdf_ocr import extract_pdf_pages
+
+    result = extract_pdf_pages("booklet.pdf")
+    result.text, result.report()
+"""
+
+import os
+import io
+import json
+import time
+import atexit
+import hashlib
+import logging
+import tempfile
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+try:
+    import pymupdf as fitz
+    PYMUPDF_AVAILABLE = True
+except ImportError:
+    try:
+        import fitz
+        PYMUPDF_AVAILABLE = True
+    except ImportError:
+        fitz = None
+        PYMUPDF_AVAILABLE = False
+
+try:
+    import pytesseract
+    from PIL import Image
+    OCR_LIBS_AVAILABLE = True
+except ImportError:
+    pytesseract = None
+    Image = None
+    OCR_LIBS_AVAILABLE = False
+
+OCR_WORKERS = int(os.getenv('XLR8_OCR_WORKERS', '0')) or min(4, os.cpu_count() or 1)
+DPI_STEPS = [int(d) for d in os.getenv('XLR8_OCR_DPI_STEPS', '100,200,300').split(',') if d.strip()]
+MIN_CONFIDENCE = float(os.getenv('XLR8_OCR_MIN_CONFIDENCE', '70'))
+MIN_TEXT_CHARS = int(os.getenv('XLR8_OCR_MIN_TEXT_CHARS', '20'))
+OCR_LANG = os.getenv('XLR8_OCR_LANG', 'eng')
+CACHE_DIR = os.getenv('XLR8_OCR_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'xlr8_ocr_cache'))
+
+
+def is_available() -> bool:
+    """PyMuPDF for page access; OCR additionally needs the tesseract binary."""
+    return PYMUPDF_AVAILABLE
+
+
+def ocr_available() -> bool:
+    if not OCR_LIBS_AVAILABLE:
+        return False
+    try:
+        pytesseract.get_tesseract_version()
+        return True
+    except Exception:
+        return False
+
+
+# =============================================================================
+# RESULTS
+# =============================================================================
+
+@dataclass
+class PageResult:
+    """How one page's text was obtained."""
+    page: int  # 1-based
+    method: str  # text, ocr, cache, empty
+    text: str = ''
+    dpi: Optional[int] = None
+    confidence: Optional[float] = None
+    seconds: float = 0.0
+    attempts: List[Tuple[int, float]] = field(default_factory=list)  # (dpi, confidence) per render
+    error: Optional[str] = None
+
+    def summary(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data['chars'] = len(data.pop('text'))
+        return data
+
+
+@dataclass
+class PdfExtraction:
+    """Text of a PDF with the per-page report."""
+    text: str
+    pages: List[PageResult]
+    page_count: int
+    workers: int
+    seconds: float
+
+    def report(self) -> Dict[str, Any]:
+        methods: Dict[str, int] = {}
+        for page in self.pages:
+            methods[page.method] = methods.get(page.method, 0) + 1
+        confidences = [p.confidence for p in self.pages if p.method == 'ocr' and p.confidence is not None]
+        return {
+            'page_count': self.page_count,
+            'pages_read': len(self.pages),
+            'methods': methods,
+            'workers': self.workers,
+            'seconds': round(self.seconds, 3),
+            'mean_ocr_confidence': round(sum(confidences) / len(confidences), 1) if confidences else None,
+            'pages': [p.summary() for p in self.pages],
+        }
+
+
+# =============================================================================
+# PAGE HASH CACHE
+# =============================================================================
+
+def page_content_hash(doc, page) -> str:
+    """
+    Hash of what a page renders from: its content stream(s) and the raw
+    (still encoded) image streams it draws. No rendering or decoding.
+    """
+    digest = hashlib.sha256()
+    digest.update(page.read_contents() or b'')
+    digest.update(repr(tuple(page.rect)).encode())
+    for image in page.get_images(full=True):
+        xref = image[0]
+        try:
+            digest.update(doc.xref_stream_raw(xref) or b'')
+        except Exception:
+            digest.update(str(image).encode())
+    return digest.hexdigest()
+
+
+def _cache_path(page_hash: str) -> str:
+    return os.path.join(CACHE_DIR, page_hash[:2], f"{page_hash}-{OCR_LANG}.json")
+
+
+def cache_get(page_hash: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(_cache_path(page_hash), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def cache_put(page_hash: str, entry: Dict[str, Any]):
+    path = _cache_path(page_hash)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(entry, f)
+        os.replace(tmp, path)  # atomic: concurrent workers never see half a file
+    except OSError as e:
+        logger.debug(f"[OCR] Cache write failed: {e}")
+
+
+# =============================================================================
+# OCR (runs in worker processes)
+# =============================================================================
+
+def ocr_image(image) -> Tuple[str, float]:
+    """
+    OCR one rendered page. Returns (text, mean word confidence 0-100).
+    Text is rebuilt line by line from image_to_data, so one Tesseract run
+    gives both.
+    """
+    data = pytesseract.image_to_data(image, lang=OCR_LANG, output_type=pytesseract.Output.DICT)
+    lines: Dict[Tuple[int, int, int], List[str]] = {}
+    confidences = []
+    for i, word in enumerate(data['text']):
+        conf = float(data['conf'][i])
+        if conf < 0 or not word.strip():
+            continue
+        confidences.append(conf)
+        lines.setdefault((data['block_num'][i], data['par_num'][i], data['line_num'][i]), []).append(word)
+    text = '\n'.join(' '.join(words) for _, words in sorted(lines.items()))
+    return text, (sum(confidences) / len(confidences) if confidences else 0.0)
+
+
+def _render(page, dpi: int):
+    pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY)
+    return Image.open(io.BytesIO(pix.tobytes('png')))
+
+
+def ocr_page(page, dpi_steps: List[int] = None, min_confidence: float = None) -> Tuple[str, int, float, list]:
+    """
+    OCR a page at increasing DPI until confidence is acceptable.
+    Returns (text, dpi, confidence, attempts) of the most confident render.
+    """
+    dpi_steps = dpi_steps or DPI_STEPS
+    min_confidence = MIN_CONFIDENCE if min_confidence is None else min_confidence
+    best = ('', dpi_steps[0], -1.0)
+    attempts = []
+    for dpi in dpi_steps:
+        text, confidence = ocr_image(_render(page, dpi))
+        attempts.append((dpi, round(confidence, 1)))
+        if confidence > best[2]:
+            best = (text, dpi, confidence)
+        if confidence >= min_confidence:
+            break
+    return best[0], best[1], round(max(best[2], 0.0), 1), attempts
+
+
+_worker_docs: Dict[Tuple[str, int, int], Any] = {}
+
+
+def _ocr_task(file_path: str, page_index: int, page_hash: str) -> PageResult:
+    """
+    Worker entry point: OCR one page of file_path.
+
+    The worker keeps the last document it opened (keyed by path, size and
+    mtime, since upload paths get reused) and closes it when another arrives.
+    """
+    stat = os.stat(file_path)
+    key = (file_path, stat.st_size, stat.st_mtime_ns)
+    doc = _worker_docs.get(key)
+    if doc is None:
+        for stale in _worker_docs.values():
+            stale.close()
+        _worker_docs.clear()
+        doc = _worker_docs[key] = fitz.open(file_path)
+    return _ocr_doc_page(doc, page_index, page_hash)
+
+
+def _ocr_doc_page(doc, page_index: int, page_hash: str) -> PageResult:
+    """OCR one page of an open document and cache the result."""
+    start = time.perf_counter()
+    try:
+        text, dpi, confidence, attempts = ocr_page(doc[page_index])
+    except Exception as e:
+        return PageResult(page=page_index + 1, method='empty', seconds=time.perf_counter() - start, error=str(e))
+    cache_put(page_hash, {'text': text, 'dpi': dpi, 'confidence': confidence, 'attempts': attempts})
+    return PageResult(page=page_index + 1, method='ocr' if text.strip() else 'empty', text=text, dpi=dpi,
+                      confidence=confidence, seconds=time.perf_counter() - start, attempts=attempts)
+
+
+_ocr_pools: Dict[int, ProcessPoolExecutor] = {}
+_ocr_pools_lock = threading.Lock()
+
+
+def _ocr_pool(workers: int) -> ProcessPoolExecutor:
+    """Spawn pool shared by every document (spawn: the server holds threads and DuckDB handles)."""
+    with _ocr_pools_lock:
+        pool = _ocr_pools.get(workers)
+        if pool is None:
+            pool = _ocr_pools[workers] = ProcessPoolExecutor(max_workers=workers,
+                                                             mp_context=multiprocessing.get_context('spawn'))
+        return pool
+
+
+def _discard_ocr_pool(pool: ProcessPoolExecutor):
+    with _ocr_pools_lock:
+        for workers, shared in list(_ocr_pools.items()):
+            if shared is pool:
+                del _ocr_pools[workers]
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+@atexit.register
+def _shutdown_ocr_pools():
+    with _ocr_pools_lock:
+        pools = list(_ocr_pools.values())
+        _ocr_pools.clear()
+    for pool in pools:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+# =============================================================================
+# PIPELINE
+# =============================================================================
+
+def extract_pdf_pages(file_path: str, max_pages: Optional[int] = None, workers: Optional[int] = None,
+                      ocr: bool = True) -> PdfExtraction:
+    """
+    Extract every page's text (up to max_pages), OCRing only pages without
+    a usable text layer, in parallel when there are several.
+    """
+    if not PYMUPDF_AVAILABLE:
+        raise RuntimeError("PyMuPDF not installed - page pipeline unavailable")
+
+    start = time.perf_counter()
+    workers = workers or OCR_WORKERS
+    results: Dict[int, PageResult] = {}
+    to_ocr: List[Tuple[int, str]] = []
+
+    with fitz.open(file_path) as doc:
+        page_count = doc.page_count
+        last = page_count if max_pages is None else min(page_count, max_pages)
+        for index in range(last):
+            page_start = time.perf_counter()
+            page = doc[index]
+            text = page.get_text() or ''
+            if len(''.join(text.split())) >= MIN_TEXT_CHARS or not ocr:
+                results[index] = PageResult(page=index + 1, method='text' if text.strip() else 'empty', text=text,
+                                            seconds=time.perf_counter() - page_start)
+                continue
+            page_hash = page_content_hash(doc, page)
+            cached = cache_get(page_hash)
+            if cached is not None:
+                results[index] = PageResult(page=index + 1, method='cache', text=cached['text'], dpi=cached['dpi'],
+                                            confidence=cached['confidence'], seconds=time.perf_counter() - page_start,
+                                            attempts=[tuple(a) for a in cached.get('attempts', [])])
+                continue
+            to_ocr.append((index, page_hash))
+
+    if to_ocr and not ocr_available():
+        logger.warning(f"[OCR] {len(to_ocr)} pages need OCR but Tesseract is not available")
+        for index, _ in to_ocr:
+            results[index] = PageResult(page=index + 1, method='empty', error='tesseract not available')
+        to_ocr = []
+
+    workers = max(1, min(workers, len(to_ocr)))
+    if to_ocr:
+        if workers == 1:
+            with fitz.open(file_path) as doc:
+                for index, page_hash in to_ocr:
+                    results[index] = _ocr_doc_page(doc, index, page_hash)
+        else:
+            pool = _ocr_pool(workers)
+            futures = {pool.submit(_ocr_task, file_path, index, page_hash): index for index, page_hash in to_ocr}
+            for future, index in futures.items():
+                try:
+                    results[index] = future.result()
+                except Exception as e:
+                    if isinstance(e, BrokenProcessPool):
+                        _discard_ocr_pool(pool)  # A worker died: the next document gets a fresh pool
+                    results[index] = PageResult(page=index + 1, method='empty', error=str(e))
+
+    pages = [results[i] for i in sorted(results)]
+    extraction = PdfExtraction(
+        text='\n'.join(p.text for p in pages if p.text.strip()),
+        pages=pages, page_count=page_count, workers=workers if to_ocr else 0,
+        seconds=time.perf_counter() - start,
+    )
+    report = extraction.report()
+    logger.info(f"[OCR] {os.path.basename(file_path)}: {report['pages_read']}/{page_count} pages "
+                f"{report['methods']} in {report['seconds']}s (workers={extraction.workers}, "
+                f"mean OCR confidence={report['mean_ocr_confidence']})")
+    for page in pages:
+        if page.method == 'ocr':
+            logger.debug(f"[OCR] page {page.page}: dpi={page.dpi} confidence={page.confidence} "
+                         f"attempts={page.attempts} {page.seconds:.2f}s")
+    return extraction
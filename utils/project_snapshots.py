@@ -0,0 +1,533 @@
+"""
+Project Snapshots - Parquet Export and Restore
+==============================================
+Moving a project to another environment, or rolling it back after a bad
+upload, meant re-uploading its source files and re-running ingest,
+profiling and the intelligence pipeline. A snapshot instead exports the
+project's DuckDB tables, and its rows in the shared metadata tables
+(_schema_metadata, _column_profiles, _term_index, _column_mappings, the
+intelligence tables, ...), to compressed Parquet. Restoring bulk-loads
+them back; nothing is re-profiled or re-indexed.
+
+Layout, under <snapshot dir>/<project>/:
+    objects/<table>-<fingerprint>.parquet   data tables, shared by every snapshot that has them
+    <snapshot id>/meta/<table>.parquet       the project's metadata rows
+    <snapshot id>/manifest.json              tables, columns, row counts and SHA-256 of every file
+
+- Incremental: a data table's fingerprint is its columns, row count and an
+  order-independent sum of DuckDB row hashes - one scan, roughly a tenth
+  of the cost of writing the table. A table whose fingerprint already has
+  an object is referenced, not rewritten. The fingerprint includes a tag
+  of DuckDB's hash function, so after a DuckDB upgrade objects are written
+  fresh rather than matched against hashes that mean something else.
+- Consistent: the export reads every table in one transaction on its own
+  cursor, so an upload running meanwhile neither tears the snapshot nor
+  waits for it.
+- Metadata tables are discovered, not listed: every main-catalog table
+  whose name starts with '_' and that has a project (or project_name)
+  column. Derived caches (_schema_catalog, _column_sketches) are skipped;
+  they rebuild on first use.
+- Restore checks every file against the manifest, then loads everything
+  beside the current project: tables into <table>__restoring staging
+  tables (in the project's shard when sharding is on), metadata rows into
+  temp tables. Only when every load has succeeded are the project's
+  current tables dropped, the staging tables renamed into place and its
+  metadata rows replaced, in one transaction per database file (DuckDB
+  writes one attached file per transaction: with sharding that is the
+  shard, then the main file). A failed load leaves the project as it was.
+  Integer ids drawn from a sequence are drawn again, so restored rows
+  can't collide with other projects' ids or with ids the sequence hands
+  out later. Columns added to a metadata table since the snapshot take
+  their defaults. An interrupted restore can simply be repeated.
+- Values are exported as stored: encrypted PII columns stay encrypted, so
+  restoring in another environment needs the same encryption key.
+- Deleting a snapshot removes the objects no remaining snapshot uses.
+
+Settings:
+    XLR8_SNAPSHOT_DIR          - snapshot root (default snapshots/ next to the main DuckDB file)
+    XLR8_SNAPSHOT_COMPRESSION  - Parquet codec: zstd (default), snappy, gzip or uncompressed
+    XLR8_SNAPSHOT_ROW_GROUP    - Parquet row group size in rows (default 122880)
+
+Deploy to: utils/project_snapshots.py
+
+Usage:
+    from utils.project_snapshots import get_project_snapshots
+
+    snapshots = get_project_snapshots(handler)
+    manifest = snapshots.create(project)              # writes only tables changed since the last one
+    snapshots.list(project)
+    snapshots.restore(project, manifest['snapshot_id'])
+    snapshots.delete(project, manifest['snapshot_id'])
+"""
+
+import os
+import re
+import json
+import time
+import uuid
+import shutil
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    from utils.duckdb_shards import shard_key_for_project
+except ImportError:
+    from .duckdb_shards import shard_key_for_project
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+MANIFEST = 'manifest.json'
+OBJECTS = 'objects'
+STAGING_SUFFIX = '__restoring'
+
+# Rebuilt from the tables on first use; restoring them would only restore stale entries
+DERIVED_TABLES = frozenset({'_schema_catalog', '_column_sketches'})
+PROJECT_COLUMNS = ('project', 'project_name')
+
+_CODECS = {'zstd', 'snappy', 'gzip', 'uncompressed'}
+_UNSAFE = re.compile(r'[^\w.-]+')
+
+
+def _quote(identifier: str) -> str:
+    return '"' + str(identifier).replace('"', '""') + '"'
+
+
+def _literal(value: str) -> str:
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _safe_name(value: str) -> str:
+    return _UNSAFE.sub('_', str(value)).strip('._') or '_'
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(4 * 1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def snapshot_dir_for(db_path: Optional[str]) -> str:
+    configured = os.getenv('XLR8_SNAPSHOT_DIR')
+    if configured:
+        return configured
+    base = os.path.dirname(os.path.abspath(db_path)) if db_path and db_path != ':memory:' else os.getcwd()
+    return os.path.join(base, 'snapshots')
+
+
+class ProjectSnapshots:
+    """
+    Snapshots of one handler's projects.
+
+    Holds no state beyond settings: everything it knows about a snapshot is
+    in its manifest, so snapshot directories can be copied between hosts.
+    """
+
+    def __init__(self, handler, root: Optional[str] = None, compression: Optional[str] = None,
+                 row_group_size: Optional[int] = None):
+        self.handler = handler
+        self.root = root or snapshot_dir_for(getattr(handler, 'db_path', None))
+        codec = (compression or os.getenv('XLR8_SNAPSHOT_COMPRESSION', 'zstd')).strip().lower()
+        self.compression = codec if codec in _CODECS else 'zstd'
+        try:
+            self.row_group_size = int(row_group_size or os.getenv('XLR8_SNAPSHOT_ROW_GROUP', 122880))
+        except ValueError:
+            self.row_group_size = 122880
+        self._lock = getattr(handler, '_db_lock', None) or threading.RLock()
+
+    @property
+    def conn(self):
+        return self.handler.conn
+
+    def project_dir(self, project: str) -> str:
+        return os.path.join(self.root, _safe_name(project))
+
+    # -------------------------------------------------------------------------
+    # What belongs to a project
+    # -------------------------------------------------------------------------
+
+    def project_tables(self, project: str) -> List[str]:
+        """The project's data tables that exist: registered in _schema_metadata or in its shard."""
+        with self._lock:
+            names = {r[0] for r in self.conn.execute(
+                "SELECT table_name FROM _schema_metadata WHERE project = ?", [project]).fetchall()}
+            shards = getattr(self.handler, 'shards', None)
+            key = shard_key_for_project(project)
+            if shards is not None and key:
+                names.update(shards.shard_tables(key))
+            existing = {r[0] for r in self.conn.execute(
+                "SELECT table_name FROM duckdb_tables() WHERE schema_name = 'main' AND NOT internal "
+                "AND NOT temporary").fetchall()}
+        return sorted(n for n in names if n in existing and not n.startswith('_'))
+
+    def metadata_tables(self) -> Dict[str, str]:
+        """{metadata table: its project column} for the main catalog."""
+        with self._lock:
+            rows = self.conn.execute("""
+                SELECT table_name, list(column_name) FROM duckdb_columns()
+                WHERE database_name = current_database() AND schema_name = 'main'
+                  AND starts_with(table_name, '_') AND column_name IN ('project', 'project_name')
+                GROUP BY table_name ORDER BY table_name
+            """).fetchall()
+        return {table: next(c for c in PROJECT_COLUMNS if c in columns)
+                for table, columns in rows if table not in DERIVED_TABLES}
+
+    # -------------------------------------------------------------------------
+    # Snapshot
+    # -------------------------------------------------------------------------
+
+    def create(self, project: str, note: Optional[str] = None) -> Dict[str, Any]:
+        """Export a project. Returns the manifest."""
+        start = time.time()
+        project_dir = self.project_dir(project)
+        # Millisecond ids sort in creation order
+        snapshot_id = f"{time.strftime('%Y%m%dT%H%M%S', time.gmtime(start))}{int(start * 1000) % 1000:03d}Z-" \
+                      f"{uuid.uuid4().hex[:6]}"
+        snapshot_dir = os.path.join(project_dir, snapshot_id)
+        os.makedirs(os.path.join(snapshot_dir, 'meta'), exist_ok=True)
+        os.makedirs(os.path.join(project_dir, OBJECTS), exist_ok=True)
+        known = self._known_objects(project_dir)
+
+        tables = self.project_tables(project)
+        metadata = self.metadata_tables()
+        manifest = {
+            'format': FORMAT_VERSION,
+            'snapshot_id': snapshot_id,
+            'project': project,
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(start)),
+            'note': note,
+            'compression': self.compression,
+            'tables': [],
+            'metadata': [],
+        }
+        cursor = self.conn.cursor()
+        try:
+            # One read transaction: every table as of the same moment
+            cursor.execute("BEGIN TRANSACTION")
+            manifest['duckdb_version'], manifest['hash_tag'] = cursor.execute(
+                "SELECT version(), hash('_project_snapshots')").fetchone()
+            for table in tables:
+                manifest['tables'].append(self._export_table(cursor, project_dir, table,
+                                                             manifest['hash_tag'], known))
+            for table, column in metadata.items():
+                manifest['metadata'].append(self._export_metadata(cursor, project_dir, snapshot_dir,
+                                                                  table, column, project))
+            cursor.execute("COMMIT")
+        except Exception:
+            try:
+                cursor.execute("ROLLBACK")
+            except Exception:
+                pass
+            shutil.rmtree(snapshot_dir, ignore_errors=True)
+            raise
+        finally:
+            cursor.close()
+
+        entries = manifest['tables'] + manifest['metadata']
+        manifest['totals'] = {
+            'tables': len(manifest['tables']),
+            'metadata_tables': len(manifest['metadata']),
+            'rows': sum(t['rows'] for t in manifest['tables']),
+            'bytes': sum(e['bytes'] for e in entries),
+            'bytes_written': sum(e['bytes'] for e in entries if not e.get('reused')),
+            'tables_reused': sum(1 for t in manifest['tables'] if t['reused']),
+        }
+        manifest['elapsed_ms'] = round((time.time() - start) * 1000, 1)
+        self._write_json(os.path.join(snapshot_dir, MANIFEST), manifest)   # last: marks it complete
+        totals = manifest['totals']
+        logger.info(f"[SNAPSHOT] {project} {snapshot_id}: {totals['tables']} tables "
+                    f"({totals['tables_reused']} unchanged), {totals['bytes_written'] / 1e6:.1f} MB written "
+                    f"in {manifest['elapsed_ms']:.0f}ms")
+        return manifest
+
+    def _export_table(self, cursor, project_dir: str, table: str, hash_tag: int,
+                      known: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        q = _quote(table)
+        columns = [[r[0], r[1]] for r in cursor.execute(f"DESCRIBE {q}").fetchall()]
+        rows, row_hash = cursor.execute(
+            f"SELECT COUNT(*), COALESCE(SUM(hash(__row)::HUGEINT), 0)::VARCHAR FROM {q} AS __row").fetchone()
+        fingerprint = hashlib.sha256(json.dumps([columns, rows, row_hash, hash_tag]).encode()).hexdigest()[:16]
+        relative = f"{OBJECTS}/{_safe_name(table)}-{fingerprint}.parquet"
+        path = os.path.join(project_dir, relative)
+
+        entry = {'name': table, 'file': relative, 'rows': rows, 'columns': columns, 'fingerprint': fingerprint}
+        previous = known.get(relative)
+        if previous and os.path.exists(path) and os.path.getsize(path) == previous['bytes']:
+            entry.update(sha256=previous['sha256'], bytes=previous['bytes'], reused=True)
+            return entry
+        self._copy(cursor, f"SELECT * FROM {q}", path)
+        entry.update(sha256=_sha256(path), bytes=os.path.getsize(path), reused=False)
+        return entry
+
+    def _export_metadata(self, cursor, project_dir: str, snapshot_dir: str, table: str, column: str,
+                         project: str) -> Dict[str, Any]:
+        path = os.path.join(snapshot_dir, 'meta', f"{_safe_name(table)}.parquet")
+        where = f"{_quote(column)} = {_literal(project)}"
+        self._copy(cursor, f"SELECT * FROM {_quote(table)} WHERE {where}", path)
+        rows = cursor.execute(f"SELECT COUNT(*) FROM {_quote(table)} WHERE {where}").fetchone()[0]
+        return {'name': table, 'file': os.path.relpath(path, project_dir).replace(os.sep, '/'),
+                'project_column': column, 'rows': rows, 'sha256': _sha256(path),
+                'bytes': os.path.getsize(path), 'reused': False}
+
+    def _copy(self, cursor, query: str, path: str) -> None:
+        # Written under a temporary name so a file at its final name is always whole
+        tmp = os.path.join(os.path.dirname(path), f".tmp-{uuid.uuid4().hex[:8]}.parquet")
+        try:
+            cursor.execute(f"COPY ({query}) TO {_literal(tmp)} "
+                           f"(FORMAT PARQUET, COMPRESSION {self.compression}, ROW_GROUP_SIZE {self.row_group_size})")
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    # -------------------------------------------------------------------------
+    # Restore
+    # -------------------------------------------------------------------------
+
+    def verify(self, project: str, snapshot_id: str) -> Dict[str, Any]:
+        """Check every file of a snapshot against its manifest. Raises ValueError on a mismatch."""
+        manifest = self.manifest(project, snapshot_id)
+        project_dir = self.project_dir(project)
+        problems = []
+        for entry in manifest['tables'] + manifest['metadata']:
+            path = os.path.join(project_dir, entry['file'])
+            if not os.path.exists(path):
+                problems.append(f"{entry['file']}: missing")
+            elif os.path.getsize(path) != entry['bytes'] or _sha256(path) != entry['sha256']:
+                problems.append(f"{entry['file']}: checksum mismatch")
+        if problems:
+            raise ValueError(f"snapshot {snapshot_id} failed verification: {'; '.join(problems)}")
+        return manifest
+
+    def restore(self, project: str, snapshot_id: str, verify: bool = True) -> Dict[str, Any]:
+        """Replace a project's tables and metadata with a snapshot's."""
+        start = time.time()
+        manifest = self.verify(project, snapshot_id) if verify else self.manifest(project, snapshot_id)
+        if manifest.get('format', 0) > FORMAT_VERSION:
+            raise ValueError(f"snapshot {snapshot_id} has format {manifest['format']}, "
+                             f"this version reads up to {FORMAT_VERSION}")
+        project_dir = self.project_dir(project)
+        result = {'project': project, 'snapshot_id': snapshot_id, 'tables_dropped': [],
+                  'tables_restored': [], 'metadata_rows': {}, 'rows': 0, 'bytes': 0}
+        staging = {entry['name']: f"{entry['name']}{STAGING_SUFFIX}" for entry in manifest['tables']}
+        sources: Dict[str, str] = {}
+
+        with self._lock:
+            # Leftovers of an interrupted restore are current tables too, unless reloaded now
+            current = [t for t in self.project_tables(project) if t not in staging.values()]
+            try:
+                # Load everything beside the current project; a bad file stops here
+                for entry in manifest['tables']:
+                    path = os.path.join(project_dir, entry['file'])
+                    self.conn.execute(f"CREATE OR REPLACE TABLE {_quote(staging[entry['name']])} AS "
+                                      f"SELECT * FROM read_parquet({_literal(path)})")
+                    result['rows'] += entry['rows']
+                    result['bytes'] += entry['bytes']
+                for n, entry in enumerate(manifest['metadata']):
+                    sources[entry['name']] = f"__restore_meta_{n}"
+                    path = os.path.join(project_dir, entry['file'])
+                    self.conn.execute(f"CREATE OR REPLACE TEMP TABLE {sources[entry['name']]} AS "
+                                      f"SELECT * FROM read_parquet({_literal(path)})")
+                    result['bytes'] += entry['bytes']
+
+                self._swap(project, current, staging, manifest['metadata'], sources)
+            except Exception:
+                for name in staging.values():
+                    self.conn.execute(f"DROP TABLE IF EXISTS {_quote(name)}")
+                raise
+            finally:
+                for name in sources.values():
+                    self.conn.execute(f"DROP TABLE IF EXISTS temp.main.{name}")
+            self.conn.execute("CHECKPOINT")
+
+        result['tables_dropped'] = sorted(current)
+        result['tables_restored'] = list(staging)
+        result['metadata_rows'] = {e['name']: e['rows'] for e in manifest['metadata']}
+        self._forget(result['tables_dropped'] + result['tables_restored'])
+        result['elapsed_ms'] = round((time.time() - start) * 1000, 1)
+        logger.info(f"[SNAPSHOT] Restored {project} from {snapshot_id}: {len(result['tables_restored'])} tables, "
+                    f"{result['rows']} rows in {result['elapsed_ms']:.0f}ms")
+        return result
+
+    def _swap(self, project: str, current: List[str], staging: Dict[str, str],
+              metadata: List[Dict[str, Any]], sources: Dict[str, str]) -> None:
+        """
+        Drop the current tables, rename the staged ones into place and
+        replace the metadata rows: one transaction per database file, shards
+        first, the main file (with the metadata) last.
+        """
+        names = current + list(staging.values())
+        main = self.conn.execute("SELECT current_database()").fetchone()[0]
+        located = dict(self.conn.execute(
+            "SELECT table_name, database_name FROM duckdb_tables() WHERE schema_name = 'main' "
+            "AND NOT temporary AND list_contains(?, table_name)", [names]).fetchall())
+        statements: Dict[str, List[str]] = {}
+        for table in current:
+            if table in located:
+                statements.setdefault(located[table], []).append(
+                    f"DROP TABLE {_quote(located[table])}.main.{_quote(table)}")
+        for table, staged in staging.items():
+            statements.setdefault(located[staged], []).append(
+                f"ALTER TABLE {_quote(located[staged])}.main.{_quote(staged)} RENAME TO {_quote(table)}")
+
+        for catalog in sorted(c for c in statements if c != main) + [main]:
+            self.conn.execute("BEGIN TRANSACTION")
+            try:
+                for sql in statements.get(catalog, []):
+                    self.conn.execute(sql)
+                if catalog == main:
+                    self._replace_metadata(project, metadata, sources)
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def _replace_metadata(self, project: str, metadata: List[Dict[str, Any]], sources: Dict[str, str]) -> None:
+        current = self.metadata_tables()
+        snapshot_meta = {e['name']: e for e in metadata}
+        for table in sorted(set(current) | set(snapshot_meta)):
+            entry = snapshot_meta.get(table)
+            column = current.get(table) or entry['project_column']
+            if table in current:
+                self.conn.execute(f"DELETE FROM {_quote(table)} WHERE {_quote(column)} = ?", [project])
+            if entry is not None:
+                self._load_metadata(table, sources[table], exists=table in current)
+
+    def _load_metadata(self, table: str, source: str, exists: bool) -> None:
+        if not exists:
+            self.conn.execute(f"CREATE TABLE {_quote(table)} AS SELECT * FROM {source}")
+            return
+        target = self.conn.execute("""
+            SELECT column_name, column_default FROM duckdb_columns()
+            WHERE database_name = current_database() AND schema_name = 'main' AND table_name = ?
+        """, [table]).fetchall()
+        available = {r[0] for r in self.conn.execute(f"DESCRIBE SELECT * FROM {source}").fetchall()}
+        key, sequence = self._sequence_key(table, dict(target))
+        columns, values = [], []
+        for name, _ in target:
+            if name == key:
+                if sequence:                            # DEFAULT nextval columns are simply left out
+                    columns.append(name)
+                    values.append(f"nextval({_literal(sequence)})")
+            elif name in available:
+                columns.append(name)
+                values.append(_quote(name))
+        self.conn.execute(f"INSERT INTO {_quote(table)} ({', '.join(_quote(c) for c in columns)}) "
+                          f"SELECT {', '.join(values)} FROM {source}")
+
+    def _sequence_key(self, table: str, defaults: Dict[str, Optional[str]]) -> Tuple[Optional[str], Optional[str]]:
+        """
+        (id column, sequence to draw from) for a table whose integer primary
+        key comes from a sequence: the column's nextval default (sequence
+        None: leave it out) or the <table>_seq sequence its writers use.
+        """
+        keys = self.conn.execute("""
+            SELECT constraint_column_names FROM duckdb_constraints()
+            WHERE database_name = current_database() AND schema_name = 'main'
+              AND table_name = ? AND constraint_type = 'PRIMARY KEY'
+        """, [table]).fetchall()
+        if len(keys) != 1 or len(keys[0][0]) != 1:
+            return None, None
+        key = keys[0][0][0]
+        if 'nextval' in str(defaults.get(key) or ''):
+            return key, None
+        sequence = f"{table.lstrip('_')}_seq"
+        found = self.conn.execute(
+            "SELECT 1 FROM duckdb_sequences() WHERE database_name = current_database() AND sequence_name = ?",
+            [sequence]).fetchone()
+        return (key, sequence) if found else (None, None)
+
+    def _forget(self, tables: List[str]) -> None:
+        """Drop what the handler's caches know about replaced tables."""
+        try:
+            from utils.schema_catalog import get_schema_catalog
+            from utils.column_sketches import get_sketch_store
+        except ImportError:
+            from .schema_catalog import get_schema_catalog
+            from .column_sketches import get_sketch_store
+        for forget in (lambda: get_schema_catalog(self.handler).forget(tables),
+                       lambda: get_sketch_store(self.handler).forget(tables)):
+            try:
+                forget()
+            except Exception as e:
+                logger.debug(f"[SNAPSHOT] Cache cleanup: {e}")
+        query_cache = getattr(self.handler, 'query_cache', None)
+        if query_cache is not None:
+            query_cache.invalidate(self.handler.db_path)
+
+    # -------------------------------------------------------------------------
+    # Listing and deletion
+    # -------------------------------------------------------------------------
+
+    def manifest(self, project: str, snapshot_id: str) -> Dict[str, Any]:
+        path = os.path.join(self.project_dir(project), _safe_name(snapshot_id), MANIFEST)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"no snapshot {snapshot_id} for project {project}")
+        with open(path) as f:
+            return json.load(f)
+
+    def list(self, project: str) -> List[Dict[str, Any]]:
+        """Complete snapshots of a project, newest first."""
+        summaries = []
+        for manifest in self._manifests(self.project_dir(project)):
+            summaries.append({k: manifest.get(k) for k in
+                              ('snapshot_id', 'created_at', 'note', 'duckdb_version', 'totals', 'elapsed_ms')})
+        return sorted(summaries, key=lambda s: s['snapshot_id'], reverse=True)
+
+    def delete(self, project: str, snapshot_id: str) -> Dict[str, Any]:
+        """Delete a snapshot and the objects no other snapshot of the project uses."""
+        self.manifest(project, snapshot_id)
+        project_dir = self.project_dir(project)
+        shutil.rmtree(os.path.join(project_dir, _safe_name(snapshot_id)))
+        used = set(self._known_objects(project_dir))
+        removed, freed = [], 0
+        objects = os.path.join(project_dir, OBJECTS)
+        for name in sorted(os.listdir(objects)) if os.path.isdir(objects) else []:
+            relative = f"{OBJECTS}/{name}"
+            if relative in used or name.startswith('.tmp-'):
+                continue
+            freed += os.path.getsize(os.path.join(objects, name))
+            os.remove(os.path.join(objects, name))
+            removed.append(relative)
+        logger.info(f"[SNAPSHOT] Deleted {project} {snapshot_id}, {len(removed)} objects ({freed / 1e6:.1f} MB)")
+        return {'snapshot_id': snapshot_id, 'objects_removed': removed, 'bytes_freed': freed}
+
+    def _manifests(self, project_dir: str):
+        if not os.path.isdir(project_dir):
+            return
+        for name in sorted(os.listdir(project_dir)):
+            path = os.path.join(project_dir, name, MANIFEST)
+            if name != OBJECTS and os.path.exists(path):
+                try:
+                    with open(path) as f:
+                        yield json.load(f)
+                except (OSError, ValueError) as e:
+                    logger.warning(f"[SNAPSHOT] Unreadable manifest {path}: {e}")
+
+    def _known_objects(self, project_dir: str) -> Dict[str, Dict[str, Any]]:
+        """Objects referenced by the project's complete snapshots, by relative path."""
+        return {entry['file']: entry for manifest in self._manifests(project_dir)
+                for entry in manifest.get('tables', [])}
+
+    @staticmethod
+    def _write_json(path: str, value: Dict[str, Any]) -> None:
+        tmp = f"{path}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(value, f, indent=2, default=str)
+        os.replace(tmp, path)
+
+
+def get_project_snapshots(handler) -> ProjectSnapshots:
+    """Snapshots for the handler's database (created on first use)."""
+    snapshots = getattr(handler, 'project_snapshots', None)
+    if snapshots is None:
+        snapshots = ProjectSnapshots(handler)
+        try:
+            handler.project_snapshots = snapshots
+        except AttributeError:
+            pass
+    return snapshots
@@ -0,0 +1,768 @@
+"""
+Query Cache - Version-Keyed Result Cache for DuckDB Reads
+=========================================================
+
+Chat, BI, the engines and dashboards issue the same read queries over and
+over against tables that haven't changed since upload, and every one of
+them queued on StructuredDataHandler._db_lock to rescan DuckDB.
+
+Results are cached under (normalized SQL, parameters) together with the
+version of every table the query reads. Versions are bumped when a table
+is written, so a hit is only served while all of its tables are unchanged -
+invalidation is exact, there is no TTL:
+
+- Reads are parsed with DuckDB's own parser (json_serialize_sql, parse
+  only - no catalog binding) to find the tables they reference.
+- The handler's connection is wrapped in TrackedConnection, which bumps
+  the target table of every INSERT / UPDATE / DELETE / CREATE / DROP /
+  ALTER / COPY FROM / TRUNCATE (and register()) it executes. Every
+  store_*, delete and transform goes through that connection. Writes it
+  can't attribute to a table bump the whole database.
+- Writers that use their own duckdb.connect() must call invalidate().
+
+Not cached (counted per reason in stats):
+- non-deterministic queries: random(), uuid(), now(), current_date,
+  nextval(), TABLESAMPLE ...
+- table functions (read_csv, duckdb_tables(), ...), system schemas,
+  internal _metadata tables, views, multi-statement SQL
+- queries carrying a /* no_cache */ hint, or called with cache=False
+
+Memory is bounded by a byte ceiling with size-aware LRU eviction. With a
+spill directory set, large row results are written to Parquet and read
+back on hit instead of holding them in memory.
+
+Settings:
+    XLR8_QUERY_CACHE                - enable the cache (default true)
+    XLR8_QUERY_CACHE_MAX_MB         - in-memory ceiling (default 256)
+    XLR8_QUERY_CACHE_MAX_ENTRY_MB   - largest single result kept (default 32)
+    XLR8_QUERY_CACHE_SPILL_DIR      - spill large results to Parquet here (default off)
+    XLR8_QUERY_CACHE_SPILL_MIN_MB   - results at least this big are spilled (default 8)
+    XLR8_QUERY_CACHE_SPILL_MAX_MB   - disk ceiling for spilled results (default 2048)
+
+Deploy to: utils/query_cache.py
+
+Usage:
+    from utils.query_cache import get_query_cache
+
+    cache = get_query_cache()
+    conn = cache.track(duckdb.connect(db_path), db_path)
+
+    rows = cache.read(db_path, 'rows', sql, params, lambda: conn.execute(sql, params).fetchall())
+    cache.invalidate(db_path, ['employees'])   # after writing through another connection
+    cache.stats()
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import uuid
+import shutil
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+import duckdb
+import pandas as pd
+
+try:
+    from utils.tracing import current_span
+except ImportError:
+    from .tracing import current_span
+
+logger = logging.getLogger(__name__)
+
+_MB = 1024 * 1024
+
+# Functions whose result changes between identical calls
+_NONDETERMINISTIC = frozenset({
+    'random', 'uuid', 'gen_random_uuid', 'uuidv4', 'uuidv7', 'setseed', 'nextval', 'currval',
+    'now', 'today', 'current_date', 'current_time', 'current_timestamp', 'get_current_time',
+    'get_current_timestamp', 'transaction_timestamp', 'statement_timestamp', 'localtime',
+    'localtimestamp', 'current_localtime', 'current_localtimestamp',
+})
+_SYSTEM_SCHEMAS = frozenset({'information_schema', 'pg_catalog', 'system', 'temp'})
+
+_READ_KEYWORDS = frozenset({
+    'select', 'with', 'from', 'values', 'table', 'show', 'describe', 'desc', 'explain',
+    'summarize', 'pivot', 'unpivot',
+})
+# Statements that never change what a SELECT returns
+_NEUTRAL_KEYWORDS = frozenset({
+    'begin', 'start', 'commit', 'end', 'rollback', 'abort', 'checkpoint', 'force', 'set', 'reset',
+    'pragma', 'install', 'load', 'use', 'prepare', 'deallocate', 'vacuum', 'analyze', 'export',
+    'call', 'attach', 'detach',
+})
+_NEUTRAL_STATEMENT = re.compile(
+    r'^(?:create\s+(?:unique\s+)?index|create\s+(?:or\s+replace\s+)?(?:sequence|schema|secret)'
+    r'|drop\s+(?:index|sequence|schema|secret)|copy\s+\(|copy\s+\S+\s+to\b)'
+)
+_IDENT = r'(?:"(?:[^"]|"")+"|[\w$]+)(?:\s*\.\s*(?:"(?:[^"]|"")+"|[\w$]+))*'
+_WRITE_TARGET = re.compile(
+    r'^(?:insert\s+(?:or\s+\w+\s+)?into'
+    r'|update'
+    r'|delete\s+from'
+    r'|truncate(?:\s+table)?'
+    r'|drop\s+(?P<drop>table|view)(?:\s+if\s+exists)?'
+    r'|create\s+(?:or\s+replace\s+)?(?:(?:temp|temporary)\s+)?(?P<create>table|view)(?:\s+if\s+not\s+exists)?'
+    r'|alter\s+(?:table|view)(?:\s+if\s+exists)?'
+    r'|copy'
+    r'|merge\s+into)'
+    r'\s+(?P<target>' + _IDENT + r')'
+)
+_RENAME_TO = re.compile(r'\srename\s+to\s+(?P<target>' + _IDENT + r')')
+_CTE_WRITE = re.compile(r'\)\s*(?:insert|update|delete|merge)\b')
+_HINT = re.compile(r'\bno_cache\b', re.IGNORECASE)
+
+
+def _env_flag(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def _env_mb(name: str, default: float) -> int:
+    try:
+        return int(float(os.getenv(name, default)) * _MB)
+    except ValueError:
+        return int(default * _MB)
+
+
+# =============================================================================
+# SQL NORMALIZATION
+# =============================================================================
+
+def split_sql(sql: str) -> Tuple[List[str], bool]:
+    """
+    Normalize SQL text: drop comments, collapse whitespace and lowercase
+    everything outside string literals and quoted identifiers.
+
+    Returns (statements, hinted) - hinted is True when a comment contains
+    the no_cache hint.
+    """
+    out: List[str] = []
+    statements: List[str] = []
+    hinted = False
+    i, n = 0, len(sql)
+
+    def space():
+        if out and out[-1] != ' ':
+            out.append(' ')
+
+    while i < n:
+        ch = sql[i]
+        if ch in ("'", '"'):
+            end = i + 1
+            while end < n:
+                if sql[end] == ch:
+                    if end + 1 < n and sql[end + 1] == ch:
+                        end += 2
+                        continue
+                    break
+                end += 1
+            out.append(sql[i:end + 1])
+            i = end + 1
+        elif ch == '-' and sql.startswith('--', i):
+            end = sql.find('\n', i)
+            end = n if end < 0 else end
+            hinted = hinted or bool(_HINT.search(sql, i, end))
+            i = end
+            space()
+        elif ch == '/' and sql.startswith('/*', i):
+            end = sql.find('*/', i + 2)
+            end = n if end < 0 else end + 2
+            hinted = hinted or bool(_HINT.search(sql, i, end))
+            i = end
+            space()
+        elif ch == ';':
+            statements.append(''.join(out).strip())
+            out = []
+            i += 1
+        elif ch.isspace():
+            i += 1
+            space()
+        else:
+            end = i + 1
+            while end < n and sql[end] not in '\'";-/' and not sql[end].isspace():
+                end += 1
+            out.append(sql[i:end].lower())
+            i = end
+    statements.append(''.join(out).strip())
+    return [s for s in statements if s], hinted
+
+
+def _unquote(identifier: str) -> str:
+    last = re.findall(r'"(?:[^"]|"")+"|[\w$]+', identifier)[-1]
+    if last.startswith('"'):
+        last = last[1:-1].replace('""', '"')
+    return last.lower()
+
+
+def write_targets(statement: str) -> Optional[List[str]]:
+    """
+    Tables a normalized statement changes: [] for reads and neutral
+    statements, None when it writes something that can't be attributed.
+    """
+    keyword = statement.split(' ', 1)[0]
+    if keyword in _READ_KEYWORDS:
+        return None if keyword == 'with' and _CTE_WRITE.search(statement) else []
+    if keyword in _NEUTRAL_KEYWORDS or _NEUTRAL_STATEMENT.match(statement):
+        return []
+    match = _WRITE_TARGET.match(statement)
+    if not match:
+        return None
+    targets = [_unquote(match.group('target'))]
+    rename = _RENAME_TO.search(statement)
+    if rename:
+        targets.append(_unquote(rename.group('target')))
+    return targets
+
+
+# =============================================================================
+# CACHE
+# =============================================================================
+
+class _Entry:
+    __slots__ = ('key', 'kind', 'value', 'path', 'columns', 'size', 'versions', 'tables', 'exec_ms')
+
+    def __init__(self, key, kind, value, size, versions, tables, exec_ms):
+        self.key = key
+        self.kind = kind
+        self.value = value
+        self.path: Optional[str] = None
+        self.columns = None
+        self.size = size
+        self.versions = versions
+        self.tables = tables
+        self.exec_ms = exec_ms
+
+
+class _Plan:
+    __slots__ = ('key', 'scope', 'tables', 'versions', 'reason')
+
+    def __init__(self, key=None, scope=None, tables=(), versions=None, reason=None):
+        self.key = key
+        self.scope = scope
+        self.tables = tables
+        self.versions = versions
+        self.reason = reason
+
+
+class QueryCache:
+    """
+    Thread-safe result cache keyed by normalized SQL and table versions.
+
+    Scopes are database paths; table names are compared case-insensitively
+    within a scope. Kinds: 'rows' (list of tuples), 'records'
+    ((columns, rows) for dict results) and 'frame' (DataFrame, never spilled).
+    """
+
+    def __init__(self, max_bytes: int = 256 * _MB, max_entry_bytes: int = 32 * _MB,
+                 spill_dir: Optional[str] = None, spill_min_bytes: int = 8 * _MB,
+                 spill_max_bytes: int = 2048 * _MB, enabled: bool = True):
+        self.enabled = enabled
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.spill_dir = spill_dir
+        self.spill_min_bytes = spill_min_bytes
+        self.spill_max_bytes = spill_max_bytes
+
+        self._entries: 'OrderedDict[tuple, _Entry]' = OrderedDict()
+        self._by_table: Dict[Tuple[str, str], set] = {}
+        self._versions: Dict[Tuple[str, str], int] = {}
+        self._scope_epochs: Dict[str, int] = {}
+        self._views: set = set()
+        self._clock = 0
+        self._memory_bytes = 0
+        self._disk_bytes = 0
+        self._lock = threading.RLock()
+
+        # Private connection for parsing and Parquet spill - never the handler's
+        self._aux = None
+        self._aux_lock = threading.Lock()
+        self._parsed: Dict[str, Tuple[FrozenSet[str], Optional[str]]] = {}
+
+        self._stats = {
+            'requests': 0, 'hits': 0, 'misses': 0, 'stored': 0, 'bytes_saved': 0,
+            'time_saved_ms': 0.0, 'evictions': 0, 'invalidations': 0, 'spills': 0,
+            'spill_failures': 0, 'rejected_too_large': 0, 'bypassed': {},
+        }
+
+    # -------------------------------------------------------------------------
+    # Reads
+    # -------------------------------------------------------------------------
+
+    def read(self, scope: str, kind: str, sql: str, params: Any, run: Callable[[], Any],
+             cache: bool = True) -> Any:
+        """
+        Serve a read from the cache, or call run() and cache its result.
+
+        Hits return copies (list(rows), df.copy()), so callers may mutate them.
+        """
+        plan = self.plan(scope, kind, sql, params, cache)
+        if plan.key is None:
+            current_span().set('cache', f"bypass:{plan.reason}")
+            return run()
+        hit, value = self.get(plan)
+        current_span().set('cache', 'hit' if hit else 'miss')
+        if hit:
+            return value
+        start = time.perf_counter()
+        value = run()
+        self.put(plan, kind, value, (time.perf_counter() - start) * 1000)
+        return value
+
+    def plan(self, scope: str, kind: str, sql: str, params: Any = None, cache: bool = True) -> _Plan:
+        """Work out the cache key and table versions for a read, or why it's bypassed."""
+        with self._lock:
+            self._stats['requests'] += 1
+        if not self.enabled:
+            return self._bypass('disabled')
+        if not cache:
+            return self._bypass('caller')
+        statements, hinted = split_sql(sql)
+        if hinted:
+            return self._bypass('hint')
+        if len(statements) != 1:
+            return self._bypass('multi_statement')
+        normalized = statements[0]
+        tables, reason = self._read_tables(normalized)
+        if reason:
+            return self._bypass(reason)
+        with self._lock:
+            if any((scope, t) in self._views for t in tables):
+                return self._bypass('view')
+            versions = self._version_vector(scope, tables)
+        key = (scope, kind, normalized, repr(params))
+        return _Plan(key=key, scope=scope, tables=tables, versions=versions)
+
+    def get(self, plan: _Plan) -> Tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get(plan.key)
+            if entry is not None and entry.versions != self._version_vector(plan.scope, entry.tables):
+                self._drop(entry)
+                entry = None
+            if entry is None:
+                self._stats['misses'] += 1
+                return False, None
+            self._entries.move_to_end(plan.key)
+            path, value, columns = entry.path, entry.value, entry.columns
+
+        if path is not None:
+            try:
+                value = self._load_spilled(path, columns)
+            except Exception as e:
+                logger.warning(f"[QUERY_CACHE] Spilled result unreadable, dropping: {e}")
+                with self._lock:
+                    if self._entries.get(plan.key) is entry:
+                        self._drop(entry)
+                    self._stats['misses'] += 1
+                return False, None
+        elif entry.kind == 'frame':
+            value = value.copy()
+        elif entry.kind == 'records':
+            value = (value[0], list(value[1]))
+        else:
+            value = list(value)
+        with self._lock:
+            self._stats['hits'] += 1
+            self._stats['bytes_saved'] += entry.size
+            self._stats['time_saved_ms'] += entry.exec_ms
+        return True, value
+
+    def put(self, plan: _Plan, kind: str, value: Any, exec_ms: float = 0.0) -> bool:
+        if plan.key is None:
+            return False
+        size = self._estimate_size(kind, value)
+        with self._lock:
+            if self._version_vector(plan.scope, plan.tables) != plan.versions:
+                return False   # written while the query ran
+        stored = value.copy() if kind == 'frame' else value
+        entry = _Entry(plan.key, kind, stored, size, plan.versions, plan.tables, exec_ms)
+
+        spill = bool(self.spill_dir) and kind != 'frame' and size >= self.spill_min_bytes and self._spill(entry)
+        if not spill and size > self.max_entry_bytes:
+            with self._lock:
+                self._stats['rejected_too_large'] += 1
+            return False
+
+        with self._lock:
+            if self._version_vector(plan.scope, plan.tables) != plan.versions:
+                self._remove_file(entry)
+                return False
+            old = self._entries.get(plan.key)
+            if old is not None:
+                self._drop(old)
+            self._entries[plan.key] = entry
+            for table in plan.tables:
+                self._by_table.setdefault((plan.scope, table), set()).add(plan.key)
+            if spill:
+                self._disk_bytes += entry.size
+            else:
+                self._memory_bytes += entry.size
+            self._stats['stored'] += 1
+            self._evict()
+        return True
+
+    # -------------------------------------------------------------------------
+    # Writes
+    # -------------------------------------------------------------------------
+
+    def invalidate(self, scope: str, tables: Optional[Iterable[str]] = None) -> int:
+        """
+        Bump table versions in a scope (all tables when tables is None) and
+        drop the entries that read them. Returns the number of entries dropped.
+        """
+        with self._lock:
+            if tables is None:
+                self._clock += 1
+                self._scope_epochs[scope] = self._clock
+                doomed = [e for k, e in self._entries.items() if k[0] == scope]
+            else:
+                doomed = []
+                for table in tables:
+                    name = str(table).lower()
+                    self._clock += 1
+                    self._versions[(scope, name)] = self._clock
+                    for key in self._by_table.pop((scope, name), ()):
+                        entry = self._entries.get(key)
+                        if entry is not None:
+                            doomed.append(entry)
+            for entry in doomed:
+                if self._entries.get(entry.key) is entry:
+                    self._drop(entry)
+            self._stats['invalidations'] += len(doomed)
+            return len(doomed)
+
+    bump = invalidate
+
+    def note_sql(self, scope: str, sql: str) -> None:
+        """Bump the tables a statement (possibly several) executed on scope writes."""
+        head = sql.lstrip()[:16].split(None, 1)
+        if head and head[0].lower() in _READ_KEYWORDS and head[0].lower() != 'with' and ';' not in sql:
+            return   # fast path for plain reads
+        statements, _ = split_sql(sql)
+        changed: List[str] = []
+        for statement in statements:
+            targets = write_targets(statement)
+            if targets is None:
+                logger.debug(f"[QUERY_CACHE] Unattributed write, invalidating {scope}: {statement[:80]}")
+                self.invalidate(scope)
+                return
+            match = _WRITE_TARGET.match(statement)
+            if match and match.group('create') == 'view':
+                with self._lock:
+                    self._views.add((scope, targets[0]))
+            changed.extend(targets)
+        if changed:
+            self.invalidate(scope, changed)
+
+    def track(self, conn, scope: str):
+        """Wrap a DuckDB connection so its writes bump table versions."""
+        if not self.enabled or conn is None or isinstance(conn, TrackedConnection):
+            return conn
+        return TrackedConnection(conn, self, scope)
+
+    def clear(self) -> None:
+        with self._lock:
+            for entry in list(self._entries.values()):
+                self._drop(entry)
+
+    # -------------------------------------------------------------------------
+    # Stats
+    # -------------------------------------------------------------------------
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['bypassed'] = dict(self._stats['bypassed'])
+            lookups = stats['hits'] + stats['misses']
+            stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+            stats['time_saved_ms'] = round(stats['time_saved_ms'], 1)
+            stats['entries'] = len(self._entries)
+            stats['memory_bytes'] = self._memory_bytes
+            stats['disk_entries'] = sum(1 for e in self._entries.values() if e.path)
+            stats['disk_bytes'] = self._disk_bytes
+            stats['max_bytes'] = self.max_bytes
+            stats['enabled'] = self.enabled
+            return stats
+
+    # -------------------------------------------------------------------------
+    # Internals
+    # -------------------------------------------------------------------------
+
+    def _bypass(self, reason: str) -> _Plan:
+        with self._lock:
+            bypassed = self._stats['bypassed']
+            bypassed[reason] = bypassed.get(reason, 0) + 1
+        return _Plan(reason=reason)
+
+    def _version_vector(self, scope: str, tables: FrozenSet[str]) -> tuple:
+        return (self._scope_epochs.get(scope, 0),) + tuple(
+            self._versions.get((scope, t), 0) for t in sorted(tables))
+
+    def _aux_conn(self):
+        if self._aux is None:
+            self._aux = duckdb.connect()
+        return self._aux
+
+    def _read_tables(self, normalized: str) -> Tuple[FrozenSet[str], Optional[str]]:
+        """Tables a single SELECT references, or a bypass reason."""
+        cached = self._parsed.get(normalized)
+        if cached is not None:
+            return cached
+        if normalized.split(' ', 1)[0] not in ('select', 'with', 'from', 'values', 'table', 'pivot', 'unpivot'):
+            result = (frozenset(), 'not_select')
+        else:
+            try:
+                with self._aux_lock:
+                    ast = json.loads(self._aux_conn().execute(
+                        "SELECT json_serialize_sql(?)", [normalized]).fetchone()[0])
+            except Exception as e:
+                logger.debug(f"[QUERY_CACHE] Parse failed: {e}")
+                ast = {'error': True}
+            if ast.get('error'):
+                result = (frozenset(), 'unparsed')
+            else:
+                tables: set = set()
+                reason = self._walk(ast['statements'], tables)
+                if reason is None and not tables:
+                    reason = 'no_tables'
+                result = (frozenset(tables), reason)
+        if len(self._parsed) > 4096:
+            self._parsed.clear()
+        self._parsed[normalized] = result
+        return result
+
+    def _walk(self, node: Any, tables: set) -> Optional[str]:
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, list):
+                stack.extend(node)
+                continue
+            if not isinstance(node, dict):
+                continue
+            node_type = node.get('type')
+            if node_type == 'BASE_TABLE':
+                schema = (node.get('schema_name') or '').lower()
+                name = (node.get('table_name') or '').lower()
+                if schema in _SYSTEM_SCHEMAS or (node.get('catalog_name') or '').lower() in _SYSTEM_SCHEMAS:
+                    return 'system_table'
+                if name.startswith('_') or name.startswith('duckdb_') or name.startswith('sqlite_'):
+                    return 'internal_table'
+                tables.add(name)
+            elif node_type == 'TABLE_FUNCTION':
+                return 'table_function'
+            elif node_type == 'FUNCTION' and (node.get('function_name') or '').lower() in _NONDETERMINISTIC:
+                return 'nondeterministic'
+            elif node_type == 'COLUMN_REF' and len(node.get('column_names') or ()) == 1 \
+                    and node['column_names'][0].lower() in _NONDETERMINISTIC:
+                return 'nondeterministic'
+            if node.get('sample'):
+                return 'sample'
+            stack.extend(v for v in node.values() if isinstance(v, (dict, list)))
+        return None
+
+    @staticmethod
+    def _estimate_size(kind: str, value: Any) -> int:
+        if kind == 'frame':
+            return int(value.memory_usage(index=True, deep=True).sum())
+        rows = value[1] if kind == 'records' else value
+        size = sys.getsizeof(rows)
+        if not rows:
+            return size
+        step = max(1, len(rows) // 64)
+        sample = rows[::step]
+        per_row = sum(sys.getsizeof(r) + sum(sys.getsizeof(v) for v in r) for r in sample) / len(sample)
+        return size + int(per_row * len(rows))
+
+    def _spill(self, entry: _Entry) -> bool:
+        """Write a rows/records result to Parquet; False leaves it in memory."""
+        columns, rows = entry.value if entry.kind == 'records' else (None, entry.value)
+        if not rows:
+            return False
+        path = os.path.join(self.spill_dir, f"{uuid.uuid4().hex}.parquet")
+        width = len(rows[0])
+        names = [f"c{i}" for i in range(width)]
+        try:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            df = pd.DataFrame(rows, columns=names, dtype=object)
+            with self._aux_lock:
+                conn = self._aux_conn()
+                conn.execute(f"SET pandas_analyze_sample={len(rows)}")
+                conn.register('_spill_df', df)
+                try:
+                    conn.execute(f"COPY _spill_df TO '{path}' (FORMAT parquet)")
+                    # Parquet coerces mixed-type columns; only keep exact round trips
+                    first = conn.execute(f"SELECT * FROM read_parquet('{path}') LIMIT 1").fetchone()
+                finally:
+                    conn.unregister('_spill_df')
+            if first != tuple(rows[0]):
+                raise ValueError('Parquet round trip changed values')
+        except Exception as e:
+            logger.warning(f"[QUERY_CACHE] Spill failed, keeping result in memory: {e}")
+            if os.path.exists(path):
+                os.remove(path)
+            with self._lock:
+                self._stats['spill_failures'] += 1
+            return False
+        entry.path = path
+        entry.columns = columns
+        entry.value = None
+        entry.size = os.path.getsize(path)
+        with self._lock:
+            self._stats['spills'] += 1
+        return True
+
+    def _load_spilled(self, path: str, columns):
+        with self._aux_lock:
+            rows = self._aux_conn().execute(f"SELECT * FROM read_parquet('{path}')").fetchall()
+        return (columns, rows) if columns is not None else rows
+
+    def _remove_file(self, entry: _Entry) -> None:
+        if entry.path:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+    def _drop(self, entry: _Entry) -> None:
+        """Remove an entry (caller holds the lock)."""
+        self._entries.pop(entry.key, None)
+        for table in entry.tables:
+            keys = self._by_table.get((entry.key[0], table))
+            if keys is not None:
+                keys.discard(entry.key)
+                if not keys:
+                    del self._by_table[(entry.key[0], table)]
+        if entry.path:
+            self._disk_bytes -= entry.size
+            self._remove_file(entry)
+        else:
+            self._memory_bytes -= entry.size
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until both budgets hold (caller holds the lock)."""
+        for over, on_disk in ((lambda: self._memory_bytes > self.max_bytes, False),
+                              (lambda: self._disk_bytes > self.spill_max_bytes, True)):
+            if not over():
+                continue
+            for entry in list(self._entries.values()):
+                if bool(entry.path) == on_disk:
+                    self._drop(entry)
+                    self._stats['evictions'] += 1
+                    if not over():
+                        break
+
+
+# =============================================================================
+# CONNECTION WRAPPER
+# =============================================================================
+
+class TrackedConnection:
+    """
+    DuckDB connection proxy that bumps table versions for the writes it runs.
+
+    execute() still returns the underlying connection, so chained
+    .fetchall() / .fetchdf() / .description work unchanged; everything
+    else is forwarded.
+    """
+
+    def __init__(self, conn, cache: QueryCache, scope: str):
+        self._conn = conn
+        self._cache = cache
+        self._scope = scope
+
+    @property
+    def raw(self):
+        return self._conn
+
+    def execute(self, query, *args, **kwargs):
+        try:
+            return self._conn.execute(query, *args, **kwargs)
+        finally:
+            self._note(query)
+
+    def executemany(self, query, *args, **kwargs):
+        try:
+            return self._conn.executemany(query, *args, **kwargs)
+        finally:
+            self._note(query)
+
+    def sql(self, query, *args, **kwargs):
+        try:
+            return self._conn.sql(query, *args, **kwargs)
+        finally:
+            self._note(query)
+
+    def register(self, view_name, python_object):
+        try:
+            return self._conn.register(view_name, python_object)
+        finally:
+            self._cache.invalidate(self._scope, [view_name])
+
+    def unregister(self, view_name):
+        try:
+            return self._conn.unregister(view_name)
+        finally:
+            self._cache.invalidate(self._scope, [view_name])
+
+    def cursor(self):
+        return TrackedConnection(self._conn.cursor(), self._cache, self._scope)
+
+    def _note(self, query) -> None:
+        if isinstance(query, str):
+            self._cache.note_sql(self._scope, query)
+        else:
+            self._cache.invalidate(self._scope)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __enter__(self):
+        self._conn.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        return self._conn.__exit__(*exc)
+
+    def __repr__(self):
+        return f"TrackedConnection({self._conn!r})"
+
+
+# =============================================================================
+# SINGLETON
+# =============================================================================
+
+_cache: Optional[QueryCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_query_cache() -> QueryCache:
+    """Process-wide cache configured from XLR8_QUERY_CACHE_* settings."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                spill_dir = os.getenv('XLR8_QUERY_CACHE_SPILL_DIR') or None
+                if spill_dir:
+                    # Own subdirectory, cleared of files a previous process left behind
+                    spill_dir = os.path.join(spill_dir, 'query_cache')
+                    shutil.rmtree(spill_dir, ignore_errors=True)
+                _cache = QueryCache(
+                    max_bytes=_env_mb('XLR8_QUERY_CACHE_MAX_MB', 256),
+                    max_entry_bytes=_env_mb('XLR8_QUERY_CACHE_MAX_ENTRY_MB', 32),
+                    spill_dir=spill_dir,
+                    spill_min_bytes=_env_mb('XLR8_QUERY_CACHE_SPILL_MIN_MB', 8),
+                    spill_max_bytes=_env_mb('XLR8_QUERY_CACHE_SPILL_MAX_MB', 2048),
+                    enabled=_env_flag('XLR8_QUERY_CACHE', True),
+                )
+    return _cache
+
+
+def get_query_cache_stats() -> Dict[str, Any]:
+    return get_query_cache().stats()
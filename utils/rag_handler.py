@@ -4,6 +4,11 @@ RAG Handler for XLR8 - FIVE TRUTHS ARCHITECTURE
 
 Handles all RAG operations including document processing, embedding, and retrieval.
 
+Version: 2.4 - Hybrid Lexical + Vector Search
+- BM25 index (SQLite FTS5) kept alongside each collection at add/delete time
+- search(mode='hybrid') fuses lexical and vector candidates (reciprocal rank fusion)
+- Code lookups ("REG01", "GL 6100-200") answered lexically without embedding
+
 Version: 2.3 - ChromaDB Singleton Fix (Jan 7, 2026)
 - Fixed: "different settings" error by using module-level singleton for ChromaDB client
 - Multiple RAGHandler instances now share the same persistent client
@@ -55,6 +60,8 @@ from chromadb.config import Settings
 import requests
 from requests.auth import HTTPBasicAuth
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
 
 # Module-level singleton for ChromaDB client
 # This prevents "different settings" errors when multiple RAGHandler instances exist
@@ -142,6 +149,47 @@ except ImportError:
     except ImportError:
         logger.warning("Chunk Classifier not available - documents will not be domain-tagged")
 
+# Staged enrichment/embedding/write pipeline for large documents
+from utils.ingest_pipeline import ChunkContext, build_chunk_metadata, run_ingest_pipeline, \
+    PIPELINE_ENABLED, PIPELINE_MIN_CHUNKS
+
+# BM25 index kept alongside each collection for hybrid search
+from utils.lexical_index import get_lexical_index, is_code_lookup
+from utils.tracing import current_span, in_context, span, traced
+
+SEARCH_MODE = os.getenv('XLR8_RAG_SEARCH_MODE', 'hybrid')          # 'hybrid' or 'vector'
+HYBRID_BUDGET_MS = int(os.getenv('XLR8_RAG_HYBRID_BUDGET_MS', '1500'))  # wait for vector leg, then lexical only
+HYBRID_CANDIDATES = int(os.getenv('XLR8_RAG_HYBRID_CANDIDATES', '20'))  # per-leg candidates before fusion
+LEXICAL_DISTANCE = float(os.getenv('XLR8_RAG_LEXICAL_DISTANCE', '0.5'))  # best lexical-only hit, no embedding
+RRF_K = 60
+
+_search_pool: Optional[ThreadPoolExecutor] = None
+_search_pool_lock = threading.Lock()
+
+
+def _search_executor() -> ThreadPoolExecutor:
+    """Shared pool for the vector leg of hybrid searches."""
+    global _search_pool
+    with _search_pool_lock:
+        if _search_pool is None:
+            _search_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix='rag-search')
+        return _search_pool
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = RRF_K) -> List[tuple]:
+    """Fuse ranked id lists: score(id) = sum of 1 / (k + rank). Returns (id, score) best first."""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+def _cosine_distance(a: List[float], b) -> float:
+    a, b = np.asarray(a, dtype=float), np.asarray(b, dtype=float)
+    norm = np.linalg.norm(a) * np.linalg.norm(b)
+    return float(1.0 - np.dot(a, b) / norm) if norm else 1.0
+
 
 class RAGHandler:
     """
@@ -160,8 +208,14 @@ class RAGHandler:
     TRUTH TYPE FILTERING (v2.0):
     - Preserves truth_type in chunk metadata
     - Filters search by truth_type (intent, reference, etc.)
+    
+    HYBRID SEARCH (v2.4):
+    - BM25 index maintained alongside each collection (utils/lexical_index.py)
+    - Lexical and vector candidates fused by reciprocal rank
     """
     
+    lexical_index = None
+    
     def __init__(
         self, 
         persist_directory: Optional[str] = None,
@@ -186,6 +240,11 @@ class RAGHandler:
             self.ollama_username = username or os.getenv("LLM_USERNAME", "")
             self.ollama_password = password or os.getenv("LLM_PASSWORD", "")
             
+            try:
+                self.lexical_index = get_lexical_index(_chromadb_path)
+            except Exception as e:
+                logger.warning(f"[LEXICAL] Index unavailable, search is vector-only: {e}")
+            
             self.embedding_model = "nomic-embed-text"
             self.chunk_size = 800
             self.chunk_overlap = 100
@@ -219,6 +278,7 @@ class RAGHandler:
         normalized = embedding_array / norm
         return normalized.tolist()
 
+    @traced('ollama.embed')
     def get_embedding(self, text: str) -> Optional[List[float]]:
         """Get normalized embedding from Ollama for the given text."""
         try:
@@ -556,132 +616,50 @@ class RAGHandler:
             if progress_callback:
                 progress_callback(10, 100, f"Chunked into {len(chunks)} pieces, getting embeddings...")
             
-            logger.info(f"[BATCH] Getting embeddings for {len(chunks)} chunks...")
-            embeddings = self.get_embeddings_batch(chunks, batch_size=10)
-            
-            # Count successful embeddings
-            successful_embeddings = sum(1 for e in embeddings if e is not None)
-            failed_embeddings = len(embeddings) - successful_embeddings
-            logger.warning(f"[EMBEDDINGS] Results: {successful_embeddings} successful, {failed_embeddings} failed out of {len(chunks)}")
-            
-            if successful_embeddings == 0:
-                logger.error(f"[EMBEDDINGS] ALL EMBEDDINGS FAILED - check Ollama connection at {self.ollama_base_url}")
-                return 0
-            
-            if progress_callback:
-                progress_callback(60, 100, f"Embeddings complete, adding to database...")
-            
-            chunks_added = 0
+            ctx = ChunkContext(
+                base_metadata={k: v for k, v in metadata.items() if v is not None},
+                customer_id=customer_id,
+                truth_type=truth_type,
+                domain=domain,
+                source_authority=source_authority,
+                system=system,
+                doc_classification=doc_classification,
+                total_chunks=len(chunks),
+            )
+            classifier = chunk_classifier if CHUNK_CLASSIFIER_AVAILABLE else None
+            detector = entity_detector if ENTITY_DETECTION_AVAILABLE else None
+            id_prefix = metadata.get('source', 'unknown')
             batch_size = 50
             
-            valid_chunks = []
-            valid_embeddings = []
-            valid_metadatas = []
-            valid_ids = []
-            
-            for i, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
-                if embedding is None:
-                    logger.warning(f"Failed to get embedding for chunk {i}, skipping")
-                    continue
-                
-                doc_id = f"{metadata.get('source', 'unknown')}_{i}"
-                base_metadata = {k: v for k, v in metadata.items() if v is not None}
-                
-                chunk_metadata = {**base_metadata, "chunk_index": i}
-                
-                # Preserve customer_id, truth_type, domain, source_authority, and system in chunk metadata
-                if customer_id:
-                    chunk_metadata['customer_id'] = customer_id
-                if truth_type:
-                    chunk_metadata['truth_type'] = truth_type
-                if domain:
-                    chunk_metadata['domain'] = domain
-                if source_authority:
-                    chunk_metadata['source_authority'] = source_authority
-                if system:
-                    chunk_metadata['system'] = system
-                
-                # Apply chunk-level classification refinement if classifier available
-                if CHUNK_CLASSIFIER_AVAILABLE and chunk_classifier and doc_classification:
-                    try:
-                        chunk_class_meta = chunk_classifier.classify_chunk(chunk, doc_classification)
-                        # Only add chunk_domain if it differs from document domain
-                        if chunk_class_meta.get('chunk_domain'):
-                            chunk_metadata['chunk_domain'] = chunk_class_meta['chunk_domain']
-                            chunk_metadata['chunk_domain_confidence'] = chunk_class_meta.get('chunk_domain_confidence', 0.0)
-                    except Exception as e:
-                        logger.debug(f"Chunk-level classification failed for chunk {i}: {e}")
-                
-                if chunk_metadata_enhanced and i < len(chunk_metadata_enhanced):
-                    chunk_dict = chunk_metadata_enhanced[i]
-                    
-                    if 'metadata' in chunk_dict:
-                        enhanced = chunk_dict['metadata']
-                        enhanced_metadata = {
-                            'structure': enhanced.get('structure', 'unknown'),
-                            'strategy': enhanced.get('strategy', 'unknown'),
-                            'chunk_type': enhanced.get('chunk_type', 'unknown'),
-                            'parent_section': enhanced.get('parent_section', 'unknown'),
-                            'has_header': enhanced.get('has_header', False),
-                            'row_start': enhanced.get('row_start'),
-                            'row_end': enhanced.get('row_end'),
-                            'line_start': enhanced.get('line_start'),
-                            'line_end': enhanced.get('line_end'),
-                            'hierarchy_level': enhanced.get('hierarchy_level'),
-                            'tokens_estimate': len(chunk) // 4,
-                            'position': f"{i+1}/{len(chunks)}"
-                        }
-                        enhanced_metadata = {k: v for k, v in enhanced_metadata.items() if v is not None}
-                        chunk_metadata.update(enhanced_metadata)
-                    else:
-                        fallback_metadata = {
-                            'chunk_type': chunk_dict.get('chunk_type', 'unknown'),
-                            'parent_section': chunk_dict.get('parent_section', 'unknown'),
-                            'has_header': chunk_dict.get('has_header', False),
-                            'tokens_estimate': len(chunk) // 4,
-                            'position': f"{i+1}/{len(chunks)}"
-                        }
-                        fallback_metadata = {k: v for k, v in fallback_metadata.items() if v is not None}
-                        chunk_metadata.update(fallback_metadata)
-                
-                # NEW: Detect and tag hub references in chunk
-                if ENTITY_DETECTION_AVAILABLE and entity_detector:
-                    try:
-                        detection = entity_detector.detect_entities(chunk)
-                        if detection.get('hub_references'):
-                            # Store as comma-separated string (ChromaDB doesn't support lists in metadata)
-                            chunk_metadata['hub_references'] = ','.join(detection['hub_references'])
-                            chunk_metadata['primary_hub'] = detection.get('primary_hub', '')
-                            if detection.get('hub_details', {}).get(detection.get('primary_hub', ''), {}):
-                                chunk_metadata['hub_confidence'] = detection['hub_details'][detection['primary_hub']]['confidence']
-                    except Exception as e:
-                        logger.debug(f"Entity detection failed for chunk {i}: {e}")
-                
-                chunk_metadata = {k: v for k, v in chunk_metadata.items() if v is not None}
-                
-                valid_chunks.append(chunk)
-                valid_embeddings.append(embedding)
-                valid_metadatas.append(chunk_metadata)
-                valid_ids.append(doc_id)
+            def write(ids, documents, embeddings, metadatas):
+                collection.add(embeddings=embeddings, documents=documents, metadatas=metadatas, ids=ids)
+                self._index_chunks(collection_name, ids, documents)
             
-            total_valid = len(valid_chunks)
-            for batch_start in range(0, total_valid, batch_size):
-                batch_end = min(batch_start + batch_size, total_valid)
-                
-                collection.add(
-                    embeddings=valid_embeddings[batch_start:batch_end],
-                    documents=valid_chunks[batch_start:batch_end],
-                    metadatas=valid_metadatas[batch_start:batch_end],
-                    ids=valid_ids[batch_start:batch_end]
+            if PIPELINE_ENABLED and len(chunks) >= PIPELINE_MIN_CHUNKS:
+                # Large documents: enrichment, embedding and writes overlap (same output)
+                logger.info(f"[PIPELINE] Enriching, embedding and writing {len(chunks)} chunks concurrently...")
+                result = run_ingest_pipeline(
+                    chunks, chunk_metadata_enhanced, ctx, id_prefix,
+                    embed=lambda texts: self.get_embeddings_batch(texts, batch_size=10),
+                    write=write,
+                    classifier=classifier,
+                    detector=detector,
+                    progress_callback=progress_callback,
+                    write_batch=batch_size,
                 )
-                
-                chunks_added += (batch_end - batch_start)
-                
-                if progress_callback:
-                    pct = 70 + int((batch_end / total_valid) * 25)
-                    progress_callback(pct, 100, f"Adding to database... ({batch_end}/{total_valid} chunks)")
-                
-                logger.info(f"Added batch {batch_start}-{batch_end} ({batch_end - batch_start} chunks)")
+                logger.warning(f"[EMBEDDINGS] Results: {result.embedded} successful, {result.embed_failed} failed out of {len(chunks)}")
+                if result.embedded == 0:
+                    logger.error(f"[EMBEDDINGS] ALL EMBEDDINGS FAILED - check Ollama connection at {self.ollama_base_url}")
+                    return 0
+                chunks_added = result.chunks_added
+                all_hub_refs = result.hub_references
+            else:
+                chunks_added, all_hub_refs = self._add_chunks_sequential(
+                    write, chunks, chunk_metadata_enhanced, ctx, id_prefix,
+                    classifier, detector, progress_callback, batch_size
+                )
+                if chunks_added is None:
+                    return 0
             
             if progress_callback:
                 progress_callback(100, 100, f"Complete! Added {chunks_added} chunks")
@@ -700,13 +678,6 @@ class RAGHandler:
                     from backend.utils.entity_registry import get_entity_registry
                     registry = get_entity_registry()
                     
-                    # Collect all unique hub_references from chunks
-                    all_hub_refs = set()
-                    for meta in valid_metadatas:
-                        if meta.get('hub_references'):
-                            refs = meta['hub_references'].split(',')
-                            all_hub_refs.update(refs)
-                    
                     if all_hub_refs:
                         # Generate document_id from filename
                         import hashlib
@@ -730,6 +701,85 @@ class RAGHandler:
             logger.error(f"Error adding document to collection: {str(e)}")
             return 0
 
+    def _add_chunks_sequential(self, write, chunks, chunk_metadata_enhanced, ctx, id_prefix,
+                               classifier, detector, progress_callback, batch_size):
+        """Embed all chunks, enrich them one by one, then write in batches. Returns (added, hub refs)."""
+        logger.info(f"[BATCH] Getting embeddings for {len(chunks)} chunks...")
+        embeddings = self.get_embeddings_batch(chunks, batch_size=10)
+        
+        # Count successful embeddings
+        successful_embeddings = sum(1 for e in embeddings if e is not None)
+        failed_embeddings = len(embeddings) - successful_embeddings
+        logger.warning(f"[EMBEDDINGS] Results: {successful_embeddings} successful, {failed_embeddings} failed out of {len(chunks)}")
+        
+        if successful_embeddings == 0:
+            logger.error(f"[EMBEDDINGS] ALL EMBEDDINGS FAILED - check Ollama connection at {self.ollama_base_url}")
+            return None, set()
+        
+        if progress_callback:
+            progress_callback(60, 100, f"Embeddings complete, adding to database...")
+        
+        valid_chunks = []
+        valid_embeddings = []
+        valid_metadatas = []
+        valid_ids = []
+        
+        for i, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
+            if embedding is None:
+                logger.warning(f"Failed to get embedding for chunk {i}, skipping")
+                continue
+            
+            enhanced = chunk_metadata_enhanced[i] if chunk_metadata_enhanced and i < len(chunk_metadata_enhanced) else None
+            valid_chunks.append(chunk)
+            valid_embeddings.append(embedding)
+            valid_metadatas.append(build_chunk_metadata(i, chunk, ctx, enhanced, classifier, detector))
+            valid_ids.append(f"{id_prefix}_{i}")
+        
+        chunks_added = 0
+        total_valid = len(valid_chunks)
+        for batch_start in range(0, total_valid, batch_size):
+            batch_end = min(batch_start + batch_size, total_valid)
+            
+            write(
+                valid_ids[batch_start:batch_end],
+                valid_chunks[batch_start:batch_end],
+                valid_embeddings[batch_start:batch_end],
+                valid_metadatas[batch_start:batch_end]
+            )
+            
+            chunks_added += (batch_end - batch_start)
+            
+            if progress_callback:
+                pct = 70 + int((batch_end / total_valid) * 25)
+                progress_callback(pct, 100, f"Adding to database... ({batch_end}/{total_valid} chunks)")
+            
+            logger.info(f"Added batch {batch_start}-{batch_end} ({batch_end - batch_start} chunks)")
+        
+        # Collect all unique hub_references from chunks
+        all_hub_refs = set()
+        for meta in valid_metadatas:
+            if meta.get('hub_references'):
+                all_hub_refs.update(meta['hub_references'].split(','))
+        return chunks_added, all_hub_refs
+
+    def _index_chunks(self, collection_name: str, ids: List[str], documents: List[str]):
+        """Mirror written chunks into the lexical index (search reconciles if this fails)."""
+        if self.lexical_index is None:
+            return
+        try:
+            self.lexical_index.add(collection_name, ids, documents)
+        except Exception as e:
+            logger.warning(f"[LEXICAL] Failed to index {len(ids)} chunks: {e}")
+
+    def _unindex_chunks(self, collection_name: str, ids: List[str]):
+        if self.lexical_index is None:
+            return
+        try:
+            self.lexical_index.delete(collection_name, ids)
+        except Exception as e:
+            logger.warning(f"[LEXICAL] Failed to remove {len(ids)} chunks: {e}")
+
+    @traced('rag.search')
     def search(
         self, 
         collection_name: str, 
@@ -739,7 +789,8 @@ class RAGHandler:
         functional_areas: Optional[List[str]] = None,
         truth_type: Optional[str] = None,  # NEW: Filter by truth_type
         system: Optional[str] = None,  # NEW: Filter by system (UKG, Workday, etc.)
-        where: Optional[Dict] = None  # NEW: Custom where clause
+        where: Optional[Dict] = None,  # NEW: Custom where clause
+        mode: Optional[str] = None  # 'hybrid' (BM25 + vector) or 'vector'
     ) -> List[Dict[str, Any]]:
         """
         Search for relevant documents in a collection.
@@ -755,132 +806,32 @@ class RAGHandler:
             truth_type: Optional truth_type to filter by (intent, reference, etc.)
             system: Optional system to filter by (ukg, workday, etc.) - for vendor docs
             where: Optional custom where clause (overrides other filters)
+            mode: 'hybrid' fuses BM25 and vector candidates (code lookups like
+                  "REG01" skip embedding); 'vector' is similarity only.
+                  Defaults to XLR8_RAG_SEARCH_MODE.
             
         Returns:
             List of search results with documents, metadata, and distances
         """
+        current_span().set_attributes(collection=collection_name, mode=mode or SEARCH_MODE, n_results=n_results)
         try:
             collection = self.client.get_collection(name=collection_name)
+            where_clause = self._build_where(customer_id, functional_areas, truth_type, system, where)
             
-            query_embedding = self.get_embedding(query)
-            if query_embedding is None:
-                logger.error("Failed to get query embedding")
-                return []
-            
-            # Build where clause
-            where_clause = None
-            
-            # NEW: If custom where clause provided, use it directly
-            if where is not None:
-                where_clause = where
-                logger.info(f"[FILTER] Using custom where clause")
-            
-            # NEW: truth_type filter (takes precedence over legacy filters when no custom where)
-            elif truth_type:
-                conditions = [{"truth_type": truth_type}]
-                
-                if customer_id and customer_id != "Global/Universal":
-                    # Match full or short customer_id
-                    conditions.append({
-                        "$or": [
-                            {"customer_id": customer_id},
-                            {"customer_id": customer_id[:8]}
-                        ]
-                    })
-                
-                if functional_areas:
-                    conditions.append({"functional_area": {"$in": functional_areas}})
-                
-                # NEW: System filter for vendor docs
-                if system and truth_type == 'reference':
-                    # Include docs for this system OR universal/untagged docs
-                    conditions.append({
-                        "$or": [
-                            {"system": system.lower()},
-                            {"system": "universal"},
-                            {"system": None}  # Untagged legacy docs
-                        ]
-                    })
-                
-                if len(conditions) == 1:
-                    where_clause = conditions[0]
-                else:
-                    where_clause = {"$and": conditions}
-                
-                logger.info(f"[FILTER] Filtering by truth_type={truth_type}, project={customer_id}, system={system}")
-            
-            # Legacy filter logic (kept for backward compatibility)
-            elif customer_id and functional_areas:
-                if customer_id == "Global/Universal":
-                    where_clause = {
-                        "$and": [
-                            {"customer_id": "Global/Universal"},
-                            {"functional_area": {"$in": functional_areas}}
-                        ]
-                    }
-                else:
-                    where_clause = {
-                        "$and": [
-                            {"$or": [
-                                {"customer_id": customer_id},
-                                {"customer_id": customer_id[:8]},
-                                {"customer_id": "Global/Universal"}
-                            ]},
-                            {"functional_area": {"$in": functional_areas}}
-                        ]
-                    }
-                logger.info(f"[CUSTOMER] Filtering by customer_id: {customer_id} (and short) + Global/Universal")
-                logger.info(f"[FUNCTIONAL AREA] Filtering by areas: {', '.join(functional_areas)}")
-            elif customer_id:
-                if customer_id == "Global/Universal":
-                    where_clause = {"customer_id": "Global/Universal"}
-                    logger.info(f"[CUSTOMER] Filtering search by Global/Universal only")
-                else:
-                    # Match full UUID, short UUID (8 chars), or Global
-                    where_clause = {
-                        "$or": [
-                            {"customer_id": customer_id},
-                            {"customer_id": customer_id[:8]},
-                            {"customer_id": "Global/Universal"}
-                        ]
-                    }
-                    logger.info(f"[CUSTOMER] Filtering search by customer_id: {customer_id} (and short: {customer_id[:8]}) + Global/Universal")
-            elif functional_areas:
-                where_clause = {"functional_area": {"$in": functional_areas}}
-                logger.info(f"[FUNCTIONAL AREA] Filtering by areas: {', '.join(functional_areas)}")
+            if (mode or SEARCH_MODE) == 'hybrid' and self.lexical_index is not None:
+                formatted_results = self._hybrid_search(collection, collection_name, query, n_results, where_clause)
             else:
-                logger.info("[FILTER] No filters - searching all documents")
-            
-            results = collection.query(
-                query_embeddings=[query_embedding],
-                n_results=n_results,
-                where=where_clause,
-                include=["documents", "metadatas", "distances"]
-            )
-            
-            formatted_results = []
+                query_embedding = self.get_embedding(query)
+                if query_embedding is None:
+                    logger.error("Failed to get query embedding")
+                    return []
+                formatted_results = self._vector_search(collection, query_embedding, n_results, where_clause)
             
-            if not results or not results.get('documents'):
+            if not formatted_results:
                 logger.info(f"No results found in collection '{collection_name}'")
                 return []
             
-            documents = results['documents']
-            if not documents or (isinstance(documents, list) and len(documents) > 0 and not documents[0]):
-                logger.info(f"Empty documents in search results for collection '{collection_name}'")
-                return []
-            
-            docs = results['documents'][0] if results['documents'] else []
-            metadatas = results['metadatas'][0] if results.get('metadatas') else []
-            distances = results['distances'][0] if results.get('distances') else []
-            
-            for i, doc in enumerate(docs):
-                result = {
-                    'document': doc,
-                    'metadata': metadatas[i] if i < len(metadatas) else {},
-                    'distance': distances[i] if i < len(distances) else None
-                }
-                formatted_results.append(result)
-            
+            current_span().set('results', len(formatted_results))
             logger.info(f"Search returned {len(formatted_results)} results from '{collection_name}'")
             if truth_type:
                 logger.info(f"[TRUTH_TYPE] Results filtered by: {truth_type}")
@@ -898,6 +849,228 @@ class RAGHandler:
             logger.error(f"Error searching collection '{collection_name}': {str(e)}")
             return []
 
+    def _build_where(
+        self,
+        customer_id: Optional[str],
+        functional_areas: Optional[List[str]],
+        truth_type: Optional[str],
+        system: Optional[str],
+        where: Optional[Dict]
+    ) -> Optional[Dict]:
+        """Chroma where clause for the search filters."""
+        # Build where clause
+        where_clause = None
+
+        # NEW: If custom where clause provided, use it directly
+        if where is not None:
+            where_clause = where
+            logger.info(f"[FILTER] Using custom where clause")
+
+        # NEW: truth_type filter (takes precedence over legacy filters when no custom where)
+        elif truth_type:
+            conditions = [{"truth_type": truth_type}]
+
+            if customer_id and customer_id != "Global/Universal":
+                # Match full or short customer_id
+                conditions.append({
+                    "$or": [
+                        {"customer_id": customer_id},
+                        {"customer_id": customer_id[:8]}
+                    ]
+                })
+
+            if functional_areas:
+                conditions.append({"functional_area": {"$in": functional_areas}})
+
+            # NEW: System filter for vendor docs
+            if system and truth_type == 'reference':
+                # Include docs for this system OR universal/untagged docs
+                conditions.append({
+                    "$or": [
+                        {"system": system.lower()},
+                        {"system": "universal"},
+                        {"system": None}  # Untagged legacy docs
+                    ]
+                })
+
+            if len(conditions) == 1:
+                where_clause = conditions[0]
+            else:
+                where_clause = {"$and": conditions}
+
+            logger.info(f"[FILTER] Filtering by truth_type={truth_type}, project={customer_id}, system={system}")
+
+        # Legacy filter logic (kept for backward compatibility)
+        elif customer_id and functional_areas:
+            if customer_id == "Global/Universal":
+                where_clause = {
+                    "$and": [
+                        {"customer_id": "Global/Universal"},
+                        {"functional_area": {"$in": functional_areas}}
+                    ]
+                }
+            else:
+                where_clause = {
+                    "$and": [
+                        {"$or": [
+                            {"customer_id": customer_id},
+                            {"customer_id": customer_id[:8]},
+                            {"customer_id": "Global/Universal"}
+                        ]},
+                        {"functional_area": {"$in": functional_areas}}
+                    ]
+                }
+            logger.info(f"[CUSTOMER] Filtering by customer_id: {customer_id} (and short) + Global/Universal")
+            logger.info(f"[FUNCTIONAL AREA] Filtering by areas: {', '.join(functional_areas)}")
+        elif customer_id:
+            if customer_id == "Global/Universal":
+                where_clause = {"customer_id": "Global/Universal"}
+                logger.info(f"[CUSTOMER] Filtering search by Global/Universal only")
+            else:
+                # Match full UUID, short UUID (8 chars), or Global
+                where_clause = {
+                    "$or": [
+                        {"customer_id": customer_id},
+                        {"customer_id": customer_id[:8]},
+                        {"customer_id": "Global/Universal"}
+                    ]
+                }
+                logger.info(f"[CUSTOMER] Filtering search by customer_id: {customer_id} (and short: {customer_id[:8]}) + Global/Universal")
+        elif functional_areas:
+            where_clause = {"functional_area": {"$in": functional_areas}}
+            logger.info(f"[FUNCTIONAL AREA] Filtering by areas: {', '.join(functional_areas)}")
+        else:
+            logger.info("[FILTER] No filters - searching all documents")
+
+        return where_clause
+
+    @traced('chromadb.query')
+    def _vector_search(self, collection, query_embedding: List[float], n_results: int,
+                       where_clause: Optional[Dict]) -> List[Dict[str, Any]]:
+        """Nearest chunks by embedding."""
+        results = collection.query(
+            query_embeddings=[query_embedding],
+            n_results=n_results,
+            where=where_clause,
+            include=["documents", "metadatas", "distances"]
+        )
+        
+        if not results or not results.get('documents') or not results['documents'][0]:
+            return []
+        
+        ids = results['ids'][0]
+        docs = results['documents'][0]
+        metadatas = results['metadatas'][0] if results.get('metadatas') else []
+        distances = results['distances'][0] if results.get('distances') else []
+        
+        return [
+            {
+                'id': ids[i],
+                'document': doc,
+                'metadata': metadatas[i] if i < len(metadatas) else {},
+                'distance': distances[i] if i < len(distances) else None
+            }
+            for i, doc in enumerate(docs)
+        ]
+
+    @traced('chromadb.get')
+    def _lexical_search(self, collection, hits: List[tuple], limit: int, where_clause: Optional[Dict],
+                        query_embedding: Optional[List[float]] = None) -> List[Dict[str, Any]]:
+        """
+        Resolve BM25 hits through Chroma, so filters apply and deleted chunks drop out.
+        
+        distance is the cosine distance when the query embedding is known. Without
+        one (code lookups, vector leg over budget) BM25 says nothing about cosine
+        similarity, so distances are spread from LEXICAL_DISTANCE for the best
+        match up to 1.0, and 'lexical_only' is set.
+        """
+        if not hits:
+            return []
+        include = ["documents", "metadatas"] + (["embeddings"] if query_embedding is not None else [])
+        found = collection.get(ids=[chunk_id for chunk_id, _ in hits], where=where_clause, include=include)
+        by_id = {chunk_id: i for i, chunk_id in enumerate(found['ids'])}
+        
+        results = []
+        best = hits[0][1] or 1.0
+        for chunk_id, score in hits:
+            i = by_id.get(chunk_id)
+            if i is None:
+                continue
+            if query_embedding is not None:
+                distance = _cosine_distance(query_embedding, found['embeddings'][i])
+            else:
+                distance = round(LEXICAL_DISTANCE + (1.0 - LEXICAL_DISTANCE) * (1.0 - score / best), 4)
+            result = {
+                'id': chunk_id,
+                'document': found['documents'][i],
+                'metadata': found['metadatas'][i] or {},
+                'distance': distance,
+                'bm25': round(score, 4)
+            }
+            if query_embedding is None:
+                result['lexical_only'] = True
+            results.append(result)
+            if len(results) >= limit:
+                break
+        return results
+
+    def _hybrid_search(self, collection, collection_name: str, query: str, n_results: int,
+                       where_clause: Optional[Dict]) -> List[Dict[str, Any]]:
+        """
+        Reciprocal rank fusion of BM25 and vector candidates.
+        
+        Code lookups are answered from the lexical index without embedding
+        the query. Otherwise the embedding + vector query runs alongside the
+        lexical search; if it overruns XLR8_RAG_HYBRID_BUDGET_MS the lexical
+        results are returned on their own.
+        """
+        candidates = max(n_results * 2, HYBRID_CANDIDATES)
+        code_lookup = is_code_lookup(query)
+        
+        def vector_candidates():
+            query_embedding = self.get_embedding(query)
+            if query_embedding is None:
+                return None, []
+            return query_embedding, self._vector_search(collection, query_embedding, candidates, where_clause)
+        
+        pending = None if code_lookup else _search_executor().submit(in_context(vector_candidates))
+        with span('lexical.search', code_lookup=code_lookup) as s:
+            try:
+                self.lexical_index.reconcile_if_due(collection_name, collection)
+            except Exception as e:
+                logger.warning(f"[HYBRID] Lexical index reconcile failed: {e}")
+            # Over-fetch when filtering: hits outside the where clause are dropped in _lexical_search
+            hits = self.lexical_index.search(collection_name, query, limit=candidates * (3 if where_clause else 1))
+            s.set('hits', len(hits))
+        
+        if code_lookup:
+            lexical = self._lexical_search(collection, hits, candidates, where_clause)
+            if lexical:
+                logger.info(f"[HYBRID] Code lookup answered lexically ({len(lexical)} matches)")
+                return [{**r, 'match': 'lexical'} for r in lexical[:n_results]]
+            pending = _search_executor().submit(in_context(vector_candidates))
+        
+        try:
+            query_embedding, vector = pending.result(timeout=HYBRID_BUDGET_MS / 1000 if hits else None)
+        except FutureTimeout:
+            logger.warning(f"[HYBRID] Vector search exceeded {HYBRID_BUDGET_MS}ms - returning lexical results")
+            query_embedding, vector = None, []
+        
+        lexical = self._lexical_search(collection, hits, candidates, where_clause, query_embedding)
+        by_id = {r['id']: r for r in lexical}
+        by_id.update({r['id']: r for r in vector})
+        vector_ids = {r['id'] for r in vector}
+        lexical_ids = {r['id'] for r in lexical}
+        
+        fused = reciprocal_rank_fusion([[r['id'] for r in vector], [r['id'] for r in lexical]])[:n_results]
+        logger.info(f"[HYBRID] {len(vector)} vector + {len(lexical)} lexical candidates -> {len(fused)} results")
+        return [
+            {**by_id[chunk_id], 'score': round(score, 6),
+             'match': 'both' if chunk_id in vector_ids and chunk_id in lexical_ids
+                      else 'vector' if chunk_id in vector_ids else 'lexical'}
+            for chunk_id, score in fused
+        ]
+
     # ==========================================================================
     # TRUTH-TYPE SPECIFIC SEARCH HELPERS (FIVE TRUTHS ARCHITECTURE)
     # ==========================================================================
@@ -1090,6 +1263,7 @@ class RAGHandler:
                         new_ids = [id for id in results['ids'] if id not in seen_ids]
                         if new_ids:
                             collection.delete(ids=new_ids)
+                            self._unindex_chunks(collection.name, new_ids)
                             seen_ids.update(new_ids)
                             deleted += len(new_ids)
                 except Exception as e:
@@ -1109,6 +1283,8 @@ class RAGHandler:
         """Delete a collection."""
         try:
             self.client.delete_collection(name=collection_name)
+            if self.lexical_index is not None:
+                self.lexical_index.drop(collection_name)
             logger.info(f"Deleted collection '{collection_name}'")
             return True
         except Exception as e:
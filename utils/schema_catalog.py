@@ -0,0 +1,275 @@
+"""
+Schema Catalog - Maintained Column Lists and Row Counts
+=======================================================
+
+Schema reads (BI builder, schema endpoints) used to run PRAGMA table_info
+and SELECT COUNT(*) against every table of a project on every request.
+With hundreds of tables that is seconds of scanning for data that only
+changes on upload.
+
+_schema_catalog keeps one row per user table: columns, row count and the
+DuckDB identity of the table (table_oid, estimated_size). It is written
+when tables are created (safe_create_table_from_df, which every store_*
+path uses) and dropped with them (store cleanup, delete_project,
+reset_database).
+
+Tables created or changed elsewhere are caught by sync(), a cheap
+consistency check against duckdb_tables()/duckdb_columns() - catalog
+metadata only, no data scans. Only tables that are new, recreated
+(new oid), grown (estimated_size) or have different columns are
+recounted. Row deletes that don't recreate the table are not detected
+(DuckDB's estimated_size doesn't shrink); the write paths replace tables
+rather than delete rows.
+
+With per-project shard files (utils/duckdb_shards.py) the live tables
+include the attached shard catalogs, and tables of shards that aren't
+attached right now are kept rather than treated as dropped.
+
+Display metadata (display_name, file_name, entity_type, category) is
+joined from _schema_metadata in the same read, so later metadata updates
+(e.g. truth_type set by smart_router) show without a catalog write.
+
+Deploy to: utils/schema_catalog.py
+
+Usage:
+    from utils.schema_catalog import get_schema_catalog
+
+    for table in get_schema_catalog(handler).read():
+        table['table_name'], table['columns'], table['row_count'], table['display_name']
+"""
+
+import json
+import logging
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+CATALOG_TABLE = '_schema_catalog'
+
+# Live user tables in the current schema and attached project shards (metadata tables start with '_')
+_LIVE_TABLES_SQL = r"""
+    SELECT t.table_name, t.table_oid, t.estimated_size,
+           list(c.column_name ORDER BY c.column_index) AS columns
+    FROM duckdb_tables() t
+    JOIN duckdb_columns() c ON c.table_oid = t.table_oid AND c.database_name = t.database_name
+    WHERE (t.database_name = current_database() OR t.database_name LIKE 'shard\_%' ESCAPE '\')
+      AND t.schema_name = current_schema()
+      AND NOT t.internal AND t.table_name NOT LIKE '\_%' ESCAPE '\'
+      {where}
+    GROUP BY t.table_name, t.table_oid, t.estimated_size
+"""
+
+
+def _quote(identifier: str) -> str:
+    return '"' + str(identifier).replace('"', '""') + '"'
+
+
+class SchemaCatalog:
+    """Catalog of user tables in a structured handler's DuckDB database."""
+
+    def __init__(self, handler):
+        self.handler = handler
+        self._lock = getattr(handler, '_db_lock', None) or threading.RLock()
+        self._ready = False
+        self.stats = {'syncs': 0, 'recorded': 0, 'refreshed': 0, 'removed': 0}
+
+    @property
+    def conn(self):
+        return self.handler.conn
+
+    def ensure(self):
+        """Create the catalog table if needed."""
+        if self._ready:
+            return
+        with self._lock:
+            self.conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS {CATALOG_TABLE} (
+                    table_name VARCHAR PRIMARY KEY,
+                    table_oid BIGINT,
+                    estimated_size BIGINT,
+                    columns JSON,
+                    column_count INTEGER,
+                    row_count BIGINT,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            self._ready = True
+
+    # -------------------------------------------------------------------------
+    # Write path
+    # -------------------------------------------------------------------------
+
+    def record(self, table_name: str, row_count: Optional[int] = None):
+        """
+        Catalog a table just written. row_count from the writer saves a
+        COUNT(*); without it the table is counted once.
+        """
+        try:
+            self.ensure()
+            with self._lock:
+                live = self._live_tables([table_name])
+                if table_name not in live:
+                    return
+                self._upsert(live[table_name], row_count)
+                self.stats['recorded'] += 1
+        except Exception as e:
+            logger.debug(f"[CATALOG] Could not record {table_name}: {e}")
+
+    def forget(self, table_names: Iterable[str]):
+        """Remove dropped tables from the catalog."""
+        names = list(table_names)
+        if not names:
+            return
+        try:
+            self.ensure()
+            with self._lock:
+                self.conn.execute(f"DELETE FROM {CATALOG_TABLE} WHERE table_name IN ({', '.join('?' for _ in names)})",
+                                  names)
+                self.stats['removed'] += len(names)
+        except Exception as e:
+            logger.debug(f"[CATALOG] Could not forget {names}: {e}")
+
+    def clear(self):
+        """Empty the catalog (database reset)."""
+        try:
+            self.ensure()
+            with self._lock:
+                self.conn.execute(f"DELETE FROM {CATALOG_TABLE}")
+        except Exception as e:
+            logger.debug(f"[CATALOG] Could not clear: {e}")
+
+    def _live_tables(self, names: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+        where, params = '', []
+        if names is not None:
+            where = f"AND t.table_name IN ({', '.join('?' for _ in names)})"
+            params = list(names)
+        rows = self.conn.execute(_LIVE_TABLES_SQL.format(where=where), params).fetchall()
+        return {
+            name: {'table_name': name, 'table_oid': oid, 'estimated_size': size, 'columns': list(columns)}
+            for name, oid, size, columns in rows
+        }
+
+    def _upsert(self, live: Dict[str, Any], row_count: Optional[int] = None):
+        self._upsert_many([live], [row_count])
+
+    def _upsert_many(self, tables: List[Dict[str, Any]], row_counts: List[Optional[int]]):
+        """Replace catalog rows in one statement (per-row upserts are slow on first sync)."""
+        counts = [
+            count if count is not None
+            else self.conn.execute(f"SELECT COUNT(*) FROM {_quote(t['table_name'])}").fetchone()[0]
+            for t, count in zip(tables, row_counts)
+        ]
+        names = [t['table_name'] for t in tables]
+        self.conn.execute(f"DELETE FROM {CATALOG_TABLE} WHERE table_name IN ({', '.join('?' for _ in names)})", names)
+        self.conn.execute(f"""
+            INSERT INTO {CATALOG_TABLE}
+            (table_name, table_oid, estimated_size, columns, column_count, row_count)
+            SELECT unnest(?::VARCHAR[]), unnest(?::BIGINT[]), unnest(?::BIGINT[]), unnest(?::VARCHAR[])::JSON,
+                   unnest(?::INTEGER[]), unnest(?::BIGINT[])
+        """, [names, [t['table_oid'] for t in tables], [t['estimated_size'] for t in tables],
+              [json.dumps(t['columns']) for t in tables], [len(t['columns']) for t in tables], counts])
+
+    # -------------------------------------------------------------------------
+    # Consistency check
+    # -------------------------------------------------------------------------
+
+    def sync(self) -> Dict[str, int]:
+        """
+        Reconcile the catalog with DuckDB's own catalog. Only tables that
+        are new or changed are counted; dropped tables are removed.
+        """
+        self.ensure()
+        refreshed, removed = 0, []
+        with self._lock:
+            live = self._live_tables()
+            cataloged = {
+                name: (oid, size, columns)
+                for name, oid, size, columns in self.conn.execute(
+                    f"SELECT table_name, table_oid, estimated_size, columns FROM {CATALOG_TABLE}"
+                ).fetchall()
+            }
+            changed = []
+            for name, table in live.items():
+                entry = cataloged.get(name)
+                if entry is not None and entry[0] == table['table_oid'] and entry[1] == table['estimated_size'] \
+                        and json.loads(entry[2]) == table['columns']:
+                    continue
+                changed.append(table)
+            if changed:
+                self._upsert_many(changed, [None] * len(changed))
+                refreshed = len(changed)
+            shards = getattr(self.handler, 'shards', None)
+            removed = [name for name in cataloged
+                       if name not in live and (shards is None or shards.covers(name))]
+            if removed:
+                self.conn.execute(f"DELETE FROM {CATALOG_TABLE} WHERE table_name IN ({', '.join('?' for _ in removed)})",
+                                  removed)
+            self.stats['syncs'] += 1
+            self.stats['refreshed'] += refreshed
+            self.stats['removed'] += len(removed)
+        if refreshed or removed:
+            logger.info(f"[CATALOG] Sync: {refreshed} tables refreshed, {len(removed)} removed")
+        return {'checked': len(live), 'refreshed': refreshed, 'removed': len(removed)}
+
+    # -------------------------------------------------------------------------
+    # Read path
+    # -------------------------------------------------------------------------
+
+    def read(self, sync: bool = True) -> List[Dict[str, Any]]:
+        """
+        All cataloged tables (name order) with columns, row counts and the
+        current _schema_metadata display fields.
+        """
+        if sync:
+            self.sync()
+        else:
+            self.ensure()
+        with self._lock:
+            try:
+                rows = self.conn.execute(f"""
+                    SELECT c.table_name, c.columns, c.row_count,
+                           m.display_name, m.file_name, m.sheet_name, m.entity_type, m.category
+                    FROM {CATALOG_TABLE} c
+                    LEFT JOIN ({self._metadata_sql()}) m ON m.table_name = c.table_name
+                    ORDER BY c.table_name
+                """).fetchall()
+            except Exception as e:
+                # No _schema_metadata yet (fresh database)
+                logger.debug(f"[CATALOG] Metadata join skipped: {e}")
+                rows = [r + (None,) * 5 for r in self.conn.execute(
+                    f"SELECT table_name, columns, row_count FROM {CATALOG_TABLE} ORDER BY table_name").fetchall()]
+        return [
+            {
+                'table_name': name,
+                'columns': json.loads(columns) if columns else [],
+                'row_count': row_count or 0,
+                'display_name': display_name,
+                'file_name': file_name,
+                'sheet_name': sheet_name,
+                'entity_type': entity_type,
+                'category': category,
+            }
+            for name, columns, row_count, display_name, file_name, sheet_name, entity_type, category in rows
+        ]
+
+    @staticmethod
+    def _metadata_sql() -> str:
+        # Latest non-empty value per field across the table's current metadata rows
+        fields = ['display_name', 'file_name', 'sheet_name', 'entity_type', 'category']
+        selects = ', '.join(
+            f"arg_max({f}, id) FILTER (WHERE {f} IS NOT NULL AND {f} <> '') AS {f}" for f in fields
+        )
+        return f"SELECT table_name, {selects} FROM _schema_metadata WHERE is_current = TRUE GROUP BY table_name"
+
+
+def get_schema_catalog(handler) -> SchemaCatalog:
+    """The handler's catalog (created on first use for handlers without one)."""
+    catalog = getattr(handler, 'catalog', None)
+    if catalog is None:
+        catalog = SchemaCatalog(handler)
+        try:
+            handler.catalog = catalog
+        except AttributeError:
+            pass
+    return catalog
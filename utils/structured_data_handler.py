@@ -96,6 +96,7 @@ import threading
 import pandas as pd
 import duckdb
 import time
+from contextlib import contextmanager
 from typing import Dict, List, Any, Optional, Tuple, Callable
 from datetime import datetime
 import hashlib
@@ -134,6 +135,39 @@ except ImportError:
         TERM_INDEX_AVAILABLE = False
         logger.debug("term_index module not available - term indexing disabled")
 
+# Maintained table catalog (columns/row counts without per-table scans)
+try:
+    from utils.schema_catalog import get_schema_catalog
+except ImportError:
+    from .schema_catalog import get_schema_catalog
+
+try:
+    from utils.query_cache import get_query_cache
+except ImportError:
+    from .query_cache import get_query_cache
+
+try:
+    from utils.duckdb_shards import get_shard_manager, shard_key_for_project
+except ImportError:
+    from .duckdb_shards import get_shard_manager, shard_key_for_project
+
+try:
+    from utils.column_sketches import ENABLED as SKETCHES_ENABLED, get_sketch_store
+except ImportError:
+    from .column_sketches import ENABLED as SKETCHES_ENABLED, get_sketch_store
+
+try:
+    from utils.tracing import TracedConnection, span
+except ImportError:
+    from .tracing import TracedConnection, span
+
+try:
+    from utils.duckdb_maintenance import ENABLED as MAINTENANCE_ENABLED, MaintainedConnection, \
+        connection_guard, get_maintenance
+except ImportError:
+    from .duckdb_maintenance import ENABLED as MAINTENANCE_ENABLED, MaintainedConnection, \
+        connection_guard, get_maintenance
+
 # Track module loads for debugging multi-worker issues
 import uuid
 _MODULE_LOAD_ID = str(uuid.uuid4())[:8]
@@ -376,20 +410,25 @@ class StructuredDataHandler:
     DuckDB-based storage for structured data with encryption, versioning, and profiling.
     
     Thread-safe: Uses a lock to prevent concurrent DuckDB operations which can cause
-    segmentation faults.
+    segmentation faults. With sharded storage, reads of project shard tables run
+    on a per-thread cursor instead (see _reading).
     """
     
     # Class-level lock for DuckDB operations
     _db_lock = threading.RLock()
     
-    def __init__(self, db_path: str = DUCKDB_PATH):
+    def __init__(self, db_path: str = DUCKDB_PATH, sharding: Optional[bool] = None):
         self.db_path = db_path
         
         # Ensure directory exists
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
         
+        # Per-project shard files (XLR8_DUCKDB_SHARDING=project, or sharding=True)
+        self.shards = get_shard_manager(db_path, enabled=sharding)
+        self.query_cache = get_query_cache()
+        
         # Connect to DuckDB with WAL corruption recovery
-        self.conn = self._connect_with_recovery(db_path)
+        self.conn = self._wrap_connection(self._connect_with_recovery(db_path))
         
         # Initialize encryption
         self.encryptor = FieldEncryptor()
@@ -399,6 +438,50 @@ class StructuredDataHandler:
         
         logger.info(f"StructuredDataHandler initialized with DuckDB at {db_path}")
     
+    def _wrap_connection(self, conn):
+        """
+        Route the connection through the project shards (when enabled), the
+        maintenance scheduler (which sees its activity and serves checkpoint hints), a
+        span per statement for request traces, and the query result cache,
+        whose versions its writes bump.
+        """
+        if self.shards is not None:
+            conn = self.shards.wrap(conn)
+        if MAINTENANCE_ENABLED:
+            conn = MaintainedConnection(conn, get_maintenance(self))
+        self._read_cursors = {}
+        self._read_cursors_lock = threading.Lock()
+        return self.query_cache.track(TracedConnection(conn), self.db_path)
+    
+    @contextmanager
+    def _reading(self, sql: str, params=None):
+        """
+        The connection a read runs on.
+        
+        Reads that name a project shard (sharded storage) get this thread's
+        own cursor of the database and skip _db_lock, so they don't queue
+        behind another project's ingest; they see committed data only.
+        Everything else holds _db_lock on the shared connection.
+        """
+        shards = getattr(self, 'shards', None)
+        keys = shards.read_keys(sql, params) if shards is not None else None
+        if not keys:
+            with self._db_lock:
+                yield self.conn
+            return
+        with shards.pinned(keys):
+            yield self._read_cursor()
+    
+    def _read_cursor(self):
+        """This thread's cursor on the current connection (same wrappers: shards, tracing, cache)."""
+        thread = threading.get_ident()
+        with self._read_cursors_lock:
+            conn, cursor = self._read_cursors.get(thread, (None, None))
+            if conn is not self.conn:
+                cursor = self.conn.cursor()
+                self._read_cursors[thread] = (self.conn, cursor)
+        return cursor
+    
     def get_term_index(self, project: str) -> Optional['TermIndex']:
         """
         Get a TermIndex instance for the given project.
@@ -4471,6 +4554,9 @@ Use confidence 0.95+ ONLY for exact column name matches like "company_code"→co
                         except Exception as drop_e:
                             logger.warning(f"[STORE_EXCEL] Could not drop {table_name}: {drop_e}")
                     
+                    get_schema_catalog(self).forget(t for (t,) in existing_tables)
+                    get_sketch_store(self).forget(t for (t,) in existing_tables)
+                    
                     # Clean up metadata
                     self.safe_execute("""
                         DELETE FROM _schema_metadata WHERE project = ? AND file_name = ?
@@ -5065,6 +5151,8 @@ Use confidence 0.95+ ONLY for exact column name matches like "company_code"→co
                         logger.warning(f"[STORE_DF] CLEANUP: Dropped existing table: {old_table}")
                     except Exception:
                         pass
+                get_schema_catalog(self).forget(t for (t,) in existing)
+                get_sketch_store(self).forget(t for (t,) in existing)
                 
                 self.safe_execute("""
                     DELETE FROM _schema_metadata WHERE project = ? AND file_name = ?
@@ -5150,7 +5238,7 @@ Use confidence 0.95+ ONLY for exact column name matches like "company_code"→co
                 post_close_size = os.path.getsize(self.db_path) if os.path.exists(self.db_path) else 0
                 logger.warning(f"[STORE_DF] POST-CLOSE: file_size={post_close_size} bytes")
                     
-                self.conn = duckdb.connect(self.db_path)
+                self.conn = self._wrap_connection(duckdb.connect(self.db_path))
                 logger.warning(f"[STORE_DF] Opened new connection, conn_id={id(self.conn)}")
                 
                 # Check row count after reconnect
@@ -5247,13 +5335,29 @@ Use confidence 0.95+ ONLY for exact column name matches like "company_code"→co
                 if use_sampling:
                     logger.info(f"[PROFILING-FAST] Large table - will sample {PROFILE_SAMPLE_SIZE:,} rows for type inference")
                 
-                # Profile each column using SQL
+                # Column sketches: one scan for every column (or none, if stored)
+                sketches = None
+                if SKETCHES_ENABLED:
+                    try:
+                        sketches = get_sketch_store(self).load_or_build(project, table_name)
+                        result['method'] = 'sketch'
+                    except Exception as sketch_e:
+                        logger.warning(f"[PROFILING-FAST] Column sketches unavailable for {table_name}, "
+                                       f"using SQL: {sketch_e}")
+                
+                # Profile each column from its sketch, or using SQL
                 for col_idx, col in enumerate(columns):
                     try:
-                        profile = self._profile_column_sql(
-                            table_name, col, project, row_count, use_sampling,
-                            project_id=project_id
-                        )
+                        if sketches and col in sketches:
+                            profile = self._profile_column_sketch(
+                                table_name, col, project, sketches[col],
+                                project_id=project_id
+                            )
+                        else:
+                            profile = self._profile_column_sql(
+                                table_name, col, project, row_count, use_sampling,
+                                project_id=project_id
+                            )
                         
                         # Store in database
                         self._store_column_profile(profile)
@@ -5447,16 +5551,8 @@ Use confidence 0.95+ ONLY for exact column name matches like "company_code"→co
                 profile['value_distribution'] = {str(d[0]): d[1] for d in dist_result}
                 
                 # Check for boolean-like values
-                values_set = set(profile['distinct_values'])
-                values_upper = set(v.upper() for v in values_set if v)
-                bool_patterns = [
-                    {'Y', 'N'}, {'YES', 'NO'}, {'TRUE', 'FALSE'}, {'1', '0'},
-                    {'T', 'F'}, {'ACTIVE', 'INACTIVE'}
-                ]
-                for pattern in bool_patterns:
-                    if values_upper == pattern or values_upper <= pattern:
-                        profile['inferred_type'] = 'boolean'
-                        break
+                if self._is_boolean_values(profile['distinct_values']):
+                    profile['inferred_type'] = 'boolean'
             
             # Try numeric detection via SQL (for string columns that might be numeric)
             if profile['inferred_type'] not in ['categorical', 'boolean', 'numeric']:
@@ -5509,6 +5605,91 @@ Use confidence 0.95+ ONLY for exact column name matches like "company_code"→co
         
         return profile
     
+    @staticmethod
+    def _is_boolean_values(distinct_values: List[str]) -> bool:
+        """Whether a categorical column's values are all from one boolean-like pair."""
+        values_upper = set(v.upper() for v in distinct_values if v)
+        bool_patterns = [
+            {'Y', 'N'}, {'YES', 'NO'}, {'TRUE', 'FALSE'}, {'1', '0'},
+            {'T', 'F'}, {'ACTIVE', 'INACTIVE'}
+        ]
+        return any(values_upper == pattern or values_upper <= pattern for pattern in bool_patterns)
+    
+    def _profile_column_sketch(
+        self,
+        table_name: str,
+        col: str,
+        project: str,
+        sketch,
+        project_id: str = None
+    ) -> Dict[str, Any]:
+        """
+        Profile a single column from its column sketch (utils/column_sketches.py).
+        
+        Same decisions as _profile_column_sql, without touching the table:
+        counts, distinct values and distributions are exact for columns with
+        up to XLR8_SKETCH_EXACT_LIMIT distinct values (so every categorical
+        column), numeric / date stats are exact, and the distinct count of
+        wider columns is a HyperLogLog estimate.
+        """
+        col_type = str(sketch.column_type).upper()
+        is_numeric = any(t in col_type for t in ['INT', 'DOUBLE', 'FLOAT', 'DECIMAL', 'NUMERIC', 'BIGINT', 'SMALLINT', 'REAL'])
+        null_count = sketch.nulls if is_numeric else sketch.null_count
+        non_null_count = sketch.count - null_count
+        distinct_count = sketch.distinct_count
+        
+        profile = {
+            'project': project,
+            'project_id': project_id,
+            'table_name': table_name,
+            'column_name': col,
+            'original_dtype': col_type,
+            'total_count': sketch.count,
+            'null_count': null_count,
+            'distinct_count': distinct_count,
+            'inferred_type': 'text',
+            'is_likely_key': non_null_count > 0 and distinct_count / non_null_count > 0.95 and distinct_count > 10,
+            'is_categorical': False,
+            'distinct_values': None,
+            'value_distribution': None,
+            'min_value': None,
+            'max_value': None,
+            'mean_value': None,
+            'min_date': None,
+            'max_date': None,
+            'sample_values': list(sketch.samples),
+            'filter_category': None,
+            'filter_priority': 0
+        }
+        
+        numeric = sketch.numeric_count and (is_numeric or sketch.numeric_count > non_null_count * 0.8)
+        if is_numeric:
+            profile['inferred_type'] = 'numeric'
+        elif distinct_count <= 100 and sketch.distinct_exact:
+            profile['is_categorical'] = True
+            profile['inferred_type'] = 'categorical'
+            profile['distinct_values'] = sorted(v for v in sketch.values() if v.strip() and v != 'nan')
+            profile['value_distribution'] = dict(sketch.value_counts(100))
+            if self._is_boolean_values(profile['distinct_values']):
+                profile['inferred_type'] = 'boolean'
+            numeric = False
+        elif numeric:
+            profile['inferred_type'] = 'numeric'
+        elif sketch.date_count and sketch.date_count > non_null_count * 0.8:
+            profile['inferred_type'] = 'date'
+            profile['min_date'] = sketch.min_date
+            profile['max_date'] = sketch.max_date
+        
+        if numeric:
+            profile['min_value'] = sketch.min_value
+            profile['max_value'] = sketch.max_value
+            profile['mean_value'] = sketch.mean
+        
+        if profile['distinct_values']:
+            profile = self._detect_filter_category(col, profile, profile['distinct_values'], project)
+        
+        return profile
+    
     # Keep the original profile_columns for backward compatibility
     def profile_columns(self, project: str, table_name: str) -> Dict[str, Any]:
         """
@@ -6114,26 +6295,40 @@ Use confidence 0.95+ ONLY for exact column name matches like "company_code"→co
     # QUERY METHODS
     # =========================================================================
     
-    def query(self, sql: str) -> List[Dict]:
+    def _cached_read(self, kind: str, sql: str, params, cache: bool, run: Callable):
+        """Serve a read from the query result cache (see utils/query_cache.py)."""
+        query_cache = getattr(self, 'query_cache', None)
+        if query_cache is None:
+            return run()
+        with span('duckdb.read', kind=kind):
+            return query_cache.read(self.db_path, kind, sql, params, run, cache=cache)
+    
+    def query(self, sql: str, cache: bool = True) -> List[Dict]:
         """Execute SQL query and return results as list of dicts"""
-        with self._db_lock:
-            try:
-                result = self.conn.execute(sql)
-                columns = [desc[0] for desc in result.description]
-                rows = result.fetchall()
-                return [dict(zip(columns, row)) for row in rows]
-            except Exception as e:
-                logger.error(f"Query error: {e}")
-                raise
+        def run():
+            with self._reading(sql) as conn:
+                try:
+                    result = conn.execute(sql)
+                    columns = [desc[0] for desc in result.description]
+                    return columns, result.fetchall()
+                except Exception as e:
+                    logger.error(f"Query error: {e}")
+                    raise
+        
+        columns, rows = self._cached_read('records', sql, None, cache, run)
+        return [dict(zip(columns, row)) for row in rows]
     
-    def query_to_dataframe(self, sql: str) -> pd.DataFrame:
+    def query_to_dataframe(self, sql: str, cache: bool = True) -> pd.DataFrame:
         """Execute SQL query and return as DataFrame"""
-        with self._db_lock:
-            try:
-                return self.conn.execute(sql).fetchdf()
-            except Exception as e:
-                logger.error(f"Query error: {e}")
-                raise
+        def run():
+            with self._reading(sql) as conn:
+                try:
+                    return conn.execute(sql).fetchdf()
+                except Exception as e:
+                    logger.error(f"Query error: {e}")
+                    raise
+        
+        return self._cached_read('frame', sql, None, cache, run)
     
     def safe_execute(self, sql: str, params: list = None):
         """
@@ -6160,40 +6355,42 @@ Use confidence 0.95+ ONLY for exact column name matches like "company_code"→co
                 logger.error(f"[SAFE_EXECUTE] Error: {e}")
                 raise
     
-    def safe_fetchall(self, sql: str, params: list = None) -> list:
+    def safe_fetchall(self, sql: str, params: list = None, cache: bool = True) -> list:
         """
         Thread-safe SQL query that returns all rows.
         Commits any pending transaction first to ensure we see latest data.
         
         v2.1: Removed verbose diagnostics that were killing performance.
+        v2.2: Served from the query result cache while the tables it reads are
+              unchanged; pass cache=False to force a scan.
         """
-        with self._db_lock:
-            try:
-                # Commit any pending changes to ensure we see them
+        def run():
+            with self._reading(sql, params) as conn:
                 try:
-                    self.conn.commit()
-                except Exception:
-                    pass  # OK if nothing to commit
-                
-                if params:
-                    result = self.conn.execute(sql, params).fetchall()
-                else:
-                    result = self.conn.execute(sql).fetchall()
-                
-                return result
-            except Exception as e:
-                logger.error(f"[SAFE_FETCHALL] Error: {e}")
-                raise
+                    # Commit any pending changes to ensure we see them
+                    try:
+                        conn.commit()
+                    except Exception:
+                        pass  # OK if nothing to commit
+                    
+                    if params:
+                        return conn.execute(sql, params).fetchall()
+                    return conn.execute(sql).fetchall()
+                except Exception as e:
+                    logger.error(f"[SAFE_FETCHALL] Error: {e}")
+                    raise
+        
+        return self._cached_read('rows', sql, params or None, cache, run)
     
     def safe_fetchone(self, sql: str, params: list = None):
         """
         Thread-safe SQL query that returns one row.
         """
-        with self._db_lock:
+        with self._reading(sql, params) as conn:
             try:
                 if params:
-                    return self.conn.execute(sql, params).fetchone()
-                return self.conn.execute(sql).fetchone()
+                    return conn.execute(sql, params).fetchone()
+                return conn.execute(sql).fetchone()
             except Exception as e:
                 logger.error(f"[SAFE_FETCHONE] Error: {e}")
                 raise
@@ -6232,6 +6429,7 @@ Use confidence 0.95+ ONLY for exact column name matches like "company_code"→co
                 self.conn.register(temp_name, df)
                 self.conn.execute(f'CREATE TABLE "{table_name}" AS SELECT * FROM {temp_name}')
                 self.conn.unregister(temp_name)
+                get_schema_catalog(self).record(table_name, row_count=len(df))
                 
                 logger.debug(f"[SAFE_CREATE] Created table {table_name} with {len(df)} rows")
                 return True
@@ -6376,23 +6574,49 @@ Use confidence 0.95+ ONLY for exact column name matches like "company_code"→co
                 logger.error(f"Error listing projects: {e}")
                 return []
     
+    def drop_project_shard(self, project: str) -> List[str]:
+        """
+        Remove a project's shard file (sharded storage only).
+        
+        Returns the tables it held; [] when sharding is off or the project
+        has no shard. Metadata rows are left to the caller.
+        """
+        shards = getattr(self, 'shards', None)
+        if shards is None:
+            return []
+        with self._db_lock:
+            tables = shards.drop_shard(shard_key_for_project(project))
+        if tables:
+            get_schema_catalog(self).forget(tables)
+            get_sketch_store(self).forget(tables)
+            self.query_cache.invalidate(self.db_path, tables)
+        return tables
+    
     def delete_project(self, project: str) -> Dict[str, Any]:
         """Delete all data for a project"""
         result = {'tables_deleted': [], 'success': False}
         
         try:
+            # Sharded storage: the project's tables go with its file
+            result['tables_deleted'].extend(self.drop_project_shard(project))
+            
             # Get all tables for this project
             tables = self.conn.execute("""
                 SELECT table_name FROM _schema_metadata WHERE project = ?
             """, [project]).fetchall()
             
             for (table_name,) in tables:
+                if table_name in result['tables_deleted']:
+                    continue
                 try:
                     self.conn.execute(f"DROP TABLE IF EXISTS {table_name}")
                     result['tables_deleted'].append(table_name)
                 except Exception as e:
                     logger.warning(f"Could not drop {table_name}: {e}")
             
+            get_schema_catalog(self).forget(result['tables_deleted'])
+            get_sketch_store(self).forget(result['tables_deleted'])
+            
             # Delete metadata
             self.conn.execute("DELETE FROM _schema_metadata WHERE project = ?", [project])
             self.conn.execute("DELETE FROM _load_versions WHERE project = ?", [project])
@@ -6607,6 +6831,12 @@ Use confidence 0.95+ ONLY for exact column name matches like "company_code"→co
         }
         
         try:
+            # Sharded storage: remove every project file first
+            if getattr(self, 'shards', None) is not None:
+                with self._db_lock:
+                    result['tables_dropped'].extend(self.shards.drop_all())
+                self.query_cache.invalidate(self.db_path)
+            
             # Get all user tables (not metadata)
             tables = self.conn.execute("""
                 SELECT table_name FROM information_schema.tables 
@@ -6621,6 +6851,9 @@ Use confidence 0.95+ ONLY for exact column name matches like "company_code"→co
                 except Exception as e:
                     logger.warning(f"Could not drop {table_name}: {e}")
             
+            get_schema_catalog(self).clear()
+            get_sketch_store(self).clear()
+            
             # Drop metadata tables
             self.conn.execute("DROP TABLE IF EXISTS _schema_metadata")
             self.conn.execute("DROP TABLE IF EXISTS _load_versions")
@@ -6772,6 +7005,16 @@ Use confidence 0.95+ ONLY for exact column name matches like "company_code"→co
     
     def close(self):
         """Close database connection"""
+        maintenance = getattr(self, 'maintenance', None)
+        if maintenance is not None:
+            maintenance.stop()
+        with getattr(self, '_read_cursors_lock', threading.Lock()):
+            for _, cursor in getattr(self, '_read_cursors', {}).values():
+                try:
+                    cursor.close()
+                except Exception:
+                    pass
+            self._read_cursors = {}
         if self.conn:
             self.conn.close()
 
@@ -6847,7 +7090,13 @@ class ReadOnlyDuckDBHandler:
     def __init__(self, db_path: str):
         self.db_path = db_path
         # Don't use read_only=True - it conflicts with write connections
-        self.conn = duckdb.connect(db_path)
+        with connection_guard():
+            self.conn = duckdb.connect(db_path)
+        # Same database instance as the write handler: share its shard attachments
+        shards = get_shard_manager(db_path)
+        if shards is not None:
+            self.conn = shards.wrap(self.conn, new_instance=False)
+        self.conn = TracedConnection(self.conn)
     
     def close(self):
         if self.conn:
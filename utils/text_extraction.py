@@ -5,11 +5,18 @@ Text Extraction Utility
 Simple utility to extract text from various file types.
 Used by smart_router for content-based routing decisions.
 
+PDF modes (XLR8_TEXT_EXTRACTION_MODE, or mode= per call):
+- serial: pdfplumber/PyPDF2 on the first max_pages pages, whole-document
+  OCR fallback at 100 dpi (routing samples)
+- parallel: utils.pdf_ocr page pipeline - text layer where usable,
+  page-parallel OCR with adaptive DPI and a page hash cache elsewhere
+
 Deploy to: utils/text_extraction.py
 """
 
 import logging
 import os
+from typing import Optional
 
 logger = logging.getLogger(__name__)
 
@@ -32,6 +39,16 @@ except ImportError:
     if PDF_LIBRARY is None:
         logger.warning("[TEXT_EXTRACTION] No PDF library available")
 
+# Page-parallel OCR pipeline (PyMuPDF)
+try:
+    from utils.pdf_ocr import extract_pdf_pages, is_available as _pdf_pages_available
+    PDF_PAGES_AVAILABLE = _pdf_pages_available()
+except ImportError:
+    extract_pdf_pages = None
+    PDF_PAGES_AVAILABLE = False
+
+EXTRACTION_MODE = os.getenv('XLR8_TEXT_EXTRACTION_MODE', 'serial').lower()
+
 # Try python-docx for Word documents
 try:
     import docx
@@ -41,13 +58,14 @@ except ImportError:
     DOCX_AVAILABLE = False
 
 
-def extract_text(file_path: str, max_pages: int = 10) -> str:
+def extract_text(file_path: str, max_pages: Optional[int] = 10, mode: Optional[str] = None) -> str:
     """
     Extract text from a file.
     
     Args:
         file_path: Path to the file
-        max_pages: Maximum pages to extract from PDFs (default 10)
+        max_pages: Maximum pages to extract from PDFs (default 10, None for all)
+        mode: PDF extraction mode, 'serial' or 'parallel' (default XLR8_TEXT_EXTRACTION_MODE)
         
     Returns:
         Extracted text content, or empty string on failure
@@ -60,7 +78,9 @@ def extract_text(file_path: str, max_pages: int = 10) -> str:
     
     try:
         if extension == 'pdf':
-            return _extract_pdf(file_path, max_pages)
+            if (mode or EXTRACTION_MODE) == 'parallel' and PDF_PAGES_AVAILABLE:
+                return extract_pdf_pages(file_path, max_pages=max_pages).text
+            return _extract_pdf(file_path, 10 if max_pages is None else max_pages)
         elif extension in ('docx', 'doc'):
             return _extract_docx(file_path)
         elif extension == 'txt':
@@ -188,6 +208,8 @@ def is_available() -> dict:
         "pdf": PDF_LIBRARY is not None or ocr_available,
         "pdf_library": PDF_LIBRARY,
         "pdf_ocr": ocr_available,
+        "pdf_pages": PDF_PAGES_AVAILABLE,
+        "mode": EXTRACTION_MODE,
         "docx": DOCX_AVAILABLE,
         "txt": True
     }
@@ -0,0 +1,682 @@
+"""
+Tracing - Per-Request Spans Across the Intelligence Pipeline
+============================================================
+
+A 40 second chat answer could have gone to term resolution, SQL assembly,
+DuckDB, ChromaDB, Ollama / Claude or the Supabase lookups, and the timing
+log lines of concurrent requests interleave and don't add up.
+
+Spans are timings with attributes, nested under one trace per request and
+carried by a contextvar, so nothing is passed through call signatures:
+
+- TracingMiddleware opens a trace for every /api request and returns its
+  id in the X-Trace-Id header. IntelligenceEngine.ask / QueryEngine.ask
+  open one themselves when called outside a request (scripts, benchmarks).
+- span() / @traced add a child of whatever span is current. Outside a
+  trace they are no-ops, so background jobs pay one contextvar lookup.
+- Worker pools don't inherit context: submit in_context(fn) instead of fn
+  (the gather scheduler and hybrid search do).
+- Sampling is decided once per trace. An unsampled trace carries a no-op
+  span, so its children are skipped as cheaply as untraced code.
+- Finished traces go to an in-memory ring buffer (GET /api/admin/traces)
+  and, optionally, to an OTLP/JSON lines file that the OpenTelemetry
+  Collector's otlpjsonfile receiver (or any OTLP JSON reader) can load.
+
+Settings:
+    XLR8_TRACING              - enable tracing (default true)
+    XLR8_TRACE_SAMPLE_RATE    - fraction of traces recorded (default 1.0)
+    XLR8_TRACE_BUFFER         - finished traces kept in memory (default 200)
+    XLR8_TRACE_MAX_SPANS      - spans kept per trace, the rest are counted (default 1000)
+    XLR8_TRACE_EXPORT_PATH    - append traces as OTLP/JSON lines to this file (default off)
+    XLR8_TRACE_EXPORT_MAX_MB  - rotate the export file to <path>.1 past this size (default 100)
+    OTEL_SERVICE_NAME         - service.name on exported traces (default xlr8)
+
+Deploy to: utils/tracing.py
+
+Usage:
+    from utils.tracing import trace, span, traced, current_span, in_context
+
+    with trace('chat.unified', project=project):       # root, or child if a trace is open
+        with span('supabase.select', table='customers'):
+            ...
+        current_span().set('rows', len(rows))
+
+    @traced('term_index.resolve_terms')
+    def resolve_terms(self, terms): ...
+
+    executor.submit(in_context(fn), *args)
+"""
+
+import os
+import json
+import time
+import random
+import logging
+import threading
+import functools
+import contextvars
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_MB = 1024 * 1024
+_MAX_ATTRIBUTE_CHARS = 500
+
+# OTLP span kinds and status codes
+_KIND_INTERNAL, _KIND_SERVER = 1, 2
+_STATUS_UNSET, _STATUS_ERROR = 0, 2
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        logger.warning(f"[TRACING] Ignoring invalid {name}")
+        return default
+
+
+# =============================================================================
+# SPANS
+# =============================================================================
+
+def _attribute(value: Any) -> Any:
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    return str(value)[:_MAX_ATTRIBUTE_CHARS]
+
+
+class Span:
+    """One timed operation in a trace."""
+
+    __slots__ = ('trace', 'span_id', 'parent_id', 'name', 'attributes', 'start_ns', 'end_ns',
+                 '_t0', 'status', 'error', 'thread')
+
+    recording = True
+
+    def __init__(self, trace: 'Trace', span_id: str, parent_id: Optional[str], name: str,
+                 attributes: Optional[Dict[str, Any]]):
+        self.trace = trace
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes: Dict[str, Any] = {k: _attribute(v) for k, v in attributes.items()} if attributes else {}
+        self._t0 = time.perf_counter_ns()
+        self.start_ns = trace.epoch_ns + self._t0   # wall clock, but monotonic within the trace
+        self.end_ns: Optional[int] = None
+        self.status = 'ok'
+        self.error: Optional[str] = None
+        self.thread = threading.current_thread().name
+
+    def set(self, key: str, value: Any) -> 'Span':
+        self.attributes[key] = _attribute(value)
+        return self
+
+    def set_attributes(self, **attributes) -> 'Span':
+        for key, value in attributes.items():
+            self.attributes[key] = _attribute(value)
+        return self
+
+    def record_error(self, error: BaseException) -> 'Span':
+        self.status = 'error'
+        self.error = f"{type(error).__name__}: {error}"[:_MAX_ATTRIBUTE_CHARS]
+        return self
+
+    def finish(self) -> None:
+        if self.end_ns is None:
+            self.end_ns = self.start_ns + (time.perf_counter_ns() - self._t0)
+
+    @property
+    def duration_ms(self) -> Optional[float]:
+        if self.end_ns is None:
+            return None
+        return (self.end_ns - self.start_ns) / 1e6
+
+
+class _NoopSpan:
+    """Stands in for a span outside a trace, or in an unsampled one."""
+
+    __slots__ = ()
+
+    recording = False
+    trace = None
+    span_id = None
+    name = None
+
+    def set(self, key: str, value: Any) -> '_NoopSpan':
+        return self
+
+    def set_attributes(self, **attributes) -> '_NoopSpan':
+        return self
+
+    def record_error(self, error: BaseException) -> '_NoopSpan':
+        return self
+
+    def finish(self) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+_current: contextvars.ContextVar = contextvars.ContextVar('xlr8_current_span', default=None)
+
+
+class Trace:
+    """The spans of one request."""
+
+    __slots__ = ('trace_id', 'epoch_ns', 'root', 'spans', 'dropped_spans', 'late_spans', 'finished', 'max_spans')
+
+    def __init__(self, trace_id: str, max_spans: int):
+        self.trace_id = trace_id
+        self.epoch_ns = time.time_ns() - time.perf_counter_ns()
+        self.root: Optional[Span] = None
+        self.spans: List[Span] = []
+        self.dropped_spans = 0
+        self.late_spans = 0
+        self.finished = False
+        self.max_spans = max_spans
+
+    def add(self, span: Span) -> bool:
+        if len(self.spans) >= self.max_spans:
+            self.dropped_spans += 1
+            return False
+        self.spans.append(span)
+        if self.finished:
+            # A worker outliving the request (e.g. a gatherer past its budget)
+            self.late_spans += 1
+            span.set('late', True)
+        return True
+
+    @property
+    def status(self) -> str:
+        return 'error' if any(s.status == 'error' for s in self.spans) else 'ok'
+
+    def summary(self) -> Dict[str, Any]:
+        """One line per trace for listings: where the time went by span name (self time)."""
+        root = self.root
+        by_name: Dict[str, float] = {}
+        for span, self_ms in _self_times(self.spans).items():
+            by_name[span.name] = by_name.get(span.name, 0.0) + self_ms
+        top = sorted(by_name.items(), key=lambda item: -item[1])[:5]
+        return {
+            'trace_id': self.trace_id,
+            'name': root.name,
+            'started_at': datetime.fromtimestamp(root.start_ns / 1e9, timezone.utc).isoformat(),
+            'duration_ms': _round(root.duration_ms),
+            'status': self.status,
+            'spans': len(self.spans),
+            'dropped_spans': self.dropped_spans,
+            'attributes': dict(root.attributes),
+            'self_time_ms': {name: round(ms, 2) for name, ms in top},
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The whole trace, spans in start order with depth and offset from the root."""
+        root = self.root
+        self_times = _self_times(self.spans)
+        depth: Dict[str, int] = {}
+        spans = []
+        for span in sorted(self.spans, key=lambda s: s.start_ns):
+            depth[span.span_id] = depth.get(span.parent_id, -1) + 1 if span.parent_id else 0
+            spans.append({
+                'span_id': span.span_id,
+                'parent_id': span.parent_id,
+                'name': span.name,
+                'depth': depth[span.span_id],
+                'offset_ms': round((span.start_ns - root.start_ns) / 1e6, 2),
+                'duration_ms': _round(span.duration_ms),
+                'self_ms': _round(self_times.get(span)),
+                'status': span.status,
+                'error': span.error,
+                'thread': span.thread,
+                'attributes': dict(span.attributes),
+            })
+        return {**self.summary(), 'late_spans': self.late_spans, 'span_tree': spans}
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(value, 2)
+
+
+def _self_times(spans: List[Span]) -> Dict[Span, float]:
+    """Duration minus time covered by children (children running in parallel can cover it all)."""
+    child_ms: Dict[str, float] = {}
+    for span in spans:
+        if span.parent_id and span.end_ns is not None:
+            child_ms[span.parent_id] = child_ms.get(span.parent_id, 0.0) + span.duration_ms
+    return {span: max(0.0, span.duration_ms - child_ms.get(span.span_id, 0.0))
+            for span in spans if span.end_ns is not None}
+
+
+# =============================================================================
+# OTLP FILE EXPORTER
+# =============================================================================
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': '' if value is None else str(value)}
+
+
+class OTLPFileExporter:
+    """
+    Appends each finished trace as one OTLP/JSON ExportTraceServiceRequest
+    line (the format of the Collector's file exporter and otlpjsonfile
+    receiver). Rotates to <path>.1 once the file passes max_bytes.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 100 * _MB, service_name: str = 'xlr8'):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.service_name = service_name
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+    def encode(self, trace: Trace) -> str:
+        spans = []
+        for span in trace.spans:
+            if span.end_ns is None:
+                continue
+            entry = {
+                'traceId': trace.trace_id,
+                'spanId': span.span_id,
+                'parentSpanId': span.parent_id or '',
+                'name': span.name,
+                'kind': _KIND_SERVER if span is trace.root else _KIND_INTERNAL,
+                'startTimeUnixNano': str(span.start_ns),
+                'endTimeUnixNano': str(span.end_ns),
+                'attributes': [{'key': k, 'value': _otlp_value(v)} for k, v in span.attributes.items()]
+                              + [{'key': 'thread.name', 'value': {'stringValue': span.thread}}],
+                'status': ({'code': _STATUS_ERROR, 'message': span.error or ''} if span.status == 'error'
+                           else {'code': _STATUS_UNSET}),
+            }
+            spans.append(entry)
+        return json.dumps({'resourceSpans': [{
+            'resource': {'attributes': [{'key': 'service.name', 'value': {'stringValue': self.service_name}}]},
+            'scopeSpans': [{'scope': {'name': 'xlr8.tracing'}, 'spans': spans}],
+        }]}, separators=(',', ':'))
+
+    def export(self, trace: Trace) -> None:
+        line = self.encode(trace) + '\n'
+        with self._lock:
+            try:
+                if os.path.getsize(self.path) + len(line) > self.max_bytes:
+                    os.replace(self.path, f"{self.path}.1")
+            except FileNotFoundError:
+                pass
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line)
+
+
+# =============================================================================
+# TRACER
+# =============================================================================
+
+class Tracer:
+    """Starts traces, samples them and keeps the finished ones."""
+
+    def __init__(self, enabled: bool = True, sample_rate: float = 1.0, buffer_size: int = 200,
+                 max_spans: int = 1000, exporter: Optional[OTLPFileExporter] = None):
+        self.enabled = enabled
+        self.sample_rate = min(1.0, max(0.0, sample_rate))
+        self.max_spans = max_spans
+        self.exporter = exporter
+        self._buffer: deque = deque(maxlen=buffer_size)
+        self._lock = threading.Lock()
+        self._rng = random.Random()
+        self._stats = {
+            'traces_started': 0,
+            'traces_sampled': 0,
+            'traces_finished': 0,
+            'spans': 0,
+            'dropped_spans': 0,
+            'late_spans': 0,
+            'exported': 0,
+            'export_errors': 0,
+        }
+
+    # ---- recording ----------------------------------------------------------
+
+    def start_trace(self, name: str, attributes: Optional[Dict[str, Any]] = None):
+        """Root span of a new trace, or NOOP_SPAN when disabled / not sampled."""
+        with self._lock:
+            self._stats['traces_started'] += 1
+        if not self.enabled or (self.sample_rate < 1.0 and self._rng.random() >= self.sample_rate):
+            return NOOP_SPAN
+        with self._lock:
+            self._stats['traces_sampled'] += 1
+        trace = Trace(f"{self._rng.getrandbits(128):032x}", self.max_spans)
+        root = Span(trace, self._span_id(), None, name, attributes)
+        trace.root = root
+        trace.add(root)
+        return root
+
+    def start_span(self, parent: Span, name: str, attributes: Optional[Dict[str, Any]] = None) -> Span:
+        span = Span(parent.trace, self._span_id(), parent.span_id, name, attributes)
+        parent.trace.add(span)
+        return span
+
+    def _span_id(self) -> str:
+        return f"{self._rng.getrandbits(64):016x}"
+
+    def finish_trace(self, trace: Trace) -> None:
+        trace.finished = True
+        with self._lock:
+            self._buffer.append(trace)
+            self._stats['traces_finished'] += 1
+            self._stats['spans'] += len(trace.spans)
+            self._stats['dropped_spans'] += trace.dropped_spans
+        if self.exporter is not None:
+            try:
+                self.exporter.export(trace)
+                with self._lock:
+                    self._stats['exported'] += 1
+            except Exception as e:
+                logger.warning(f"[TRACING] Export to {self.exporter.path} failed: {e}")
+                with self._lock:
+                    self._stats['export_errors'] += 1
+
+    # ---- queries ------------------------------------------------------------
+
+    def _finished(self) -> List[Trace]:
+        with self._lock:
+            return list(self._buffer)
+
+    def traces(self, limit: int = 50, name: Optional[str] = None, min_duration_ms: Optional[float] = None,
+               errors_only: bool = False) -> List[Dict[str, Any]]:
+        """Most recent finished traces first, optionally filtered."""
+        found = []
+        for trace in reversed(self._finished()):
+            if name and name not in trace.root.name:
+                continue
+            if min_duration_ms is not None and (trace.root.duration_ms or 0) < min_duration_ms:
+                continue
+            if errors_only and trace.status != 'error':
+                continue
+            found.append(trace.summary())
+            if len(found) >= limit:
+                break
+        return found
+
+    def get(self, trace_id: str) -> Optional[Dict[str, Any]]:
+        for trace in self._finished():
+            if trace.trace_id == trace_id:
+                return trace.to_dict()
+        return None
+
+    def span_summary(self, name: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """Per span name over the buffered traces: count, total / self time, p50 / p95 / max."""
+        durations: Dict[str, List[float]] = {}
+        self_total: Dict[str, float] = {}
+        for trace in self._finished():
+            if name and name not in trace.root.name:
+                continue
+            for span, self_ms in _self_times(trace.spans).items():
+                durations.setdefault(span.name, []).append(span.duration_ms)
+                self_total[span.name] = self_total.get(span.name, 0.0) + self_ms
+        summary = {}
+        for span_name, values in durations.items():
+            values.sort()
+            summary[span_name] = {
+                'count': len(values),
+                'total_ms': round(sum(values), 2),
+                'self_ms': round(self_total[span_name], 2),
+                'p50_ms': round(values[(len(values) - 1) // 2], 2),
+                'p95_ms': round(values[min(len(values) - 1, int(len(values) * 0.95))], 2),
+                'max_ms': round(values[-1], 2),
+            }
+        return dict(sorted(summary.items(), key=lambda item: -item[1]['self_ms']))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['buffered'] = len(self._buffer)
+        stats['late_spans'] = sum(t.late_spans for t in self._finished())
+        stats.update({
+            'enabled': self.enabled,
+            'sample_rate': self.sample_rate,
+            'buffer_size': self._buffer.maxlen,
+            'max_spans': self.max_spans,
+            'export_path': self.exporter.path if self.exporter else None,
+        })
+        return stats
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buffer.clear()
+
+
+# =============================================================================
+# SINGLETON
+# =============================================================================
+
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    global _tracer
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                export_path = os.getenv('XLR8_TRACE_EXPORT_PATH')
+                exporter = None
+                if export_path:
+                    try:
+                        exporter = OTLPFileExporter(
+                            export_path,
+                            max_bytes=int(_env_float('XLR8_TRACE_EXPORT_MAX_MB', 100) * _MB),
+                            service_name=os.getenv('OTEL_SERVICE_NAME', 'xlr8'))
+                    except OSError as e:
+                        logger.warning(f"[TRACING] Export disabled, cannot write {export_path}: {e}")
+                _tracer = Tracer(
+                    enabled=os.getenv('XLR8_TRACING', 'true').lower() not in ('0', 'false', 'no', 'off'),
+                    sample_rate=_env_float('XLR8_TRACE_SAMPLE_RATE', 1.0),
+                    buffer_size=int(_env_float('XLR8_TRACE_BUFFER', 200)),
+                    max_spans=int(_env_float('XLR8_TRACE_MAX_SPANS', 1000)),
+                    exporter=exporter,
+                )
+                logger.info(f"[TRACING] enabled={_tracer.enabled} sample_rate={_tracer.sample_rate} "
+                            f"export={export_path or 'off'}")
+    return _tracer
+
+
+def set_tracer(tracer: Optional[Tracer]) -> None:
+    """Replace the process tracer (tests, benchmarks); None re-reads the settings."""
+    global _tracer
+    with _tracer_lock:
+        _tracer = tracer
+
+
+# =============================================================================
+# API
+# =============================================================================
+
+class _Scope:
+    """Context manager behind span() / trace() / @traced."""
+
+    __slots__ = ('name', 'attributes', 'root', 'span', 'token')
+
+    def __init__(self, name: str, attributes: Optional[Dict[str, Any]], root: bool):
+        self.name = name
+        self.attributes = attributes
+        self.root = root
+        self.span = NOOP_SPAN
+        self.token = None
+
+    def __enter__(self):
+        parent = _current.get()
+        if parent is None:
+            if not self.root:
+                return NOOP_SPAN
+            self.span = get_tracer().start_trace(self.name, self.attributes)
+        elif parent is NOOP_SPAN:
+            return NOOP_SPAN
+        else:
+            self.span = get_tracer().start_span(parent, self.name, self.attributes)
+        self.token = _current.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.token is None:
+            return False
+        _current.reset(self.token)
+        span = self.span
+        if span is NOOP_SPAN:
+            return False
+        if exc is not None:
+            span.record_error(exc)
+        span.finish()
+        if span.trace.root is span:
+            get_tracer().finish_trace(span.trace)
+        return False
+
+
+def span(name: str, **attributes) -> _Scope:
+    """Child span of the current one; a no-op outside a trace."""
+    return _Scope(name, attributes, False)
+
+
+def trace(name: str, **attributes) -> _Scope:
+    """Start a trace (sampled) - or, inside one already, just a child span."""
+    return _Scope(name, attributes, True)
+
+
+def traced(name: Optional[str] = None, root: bool = False):
+    """Decorator: run the function in a span (root=True starts a trace when none is open)."""
+    def decorate(fn: Callable) -> Callable:
+        span_name = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            current = _current.get()
+            if current is NOOP_SPAN or (current is None and not root):
+                return fn(*args, **kwargs)
+            with _Scope(span_name, None, root):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def current_span():
+    """The innermost open span, or NOOP_SPAN (safe to call .set() on either)."""
+    return _current.get() or NOOP_SPAN
+
+
+def current_trace_id() -> Optional[str]:
+    current = _current.get()
+    return current.trace.trace_id if current is not None and current is not NOOP_SPAN else None
+
+
+def in_context(fn: Callable) -> Callable:
+    """
+    Bind fn to the caller's trace context for running on a worker thread.
+
+    Each wrapper is for one call (a contextvars.Context can't be entered
+    twice at once): wrap per submit.
+    """
+    if _current.get() is None:
+        return fn
+    context = contextvars.copy_context()
+
+    @functools.wraps(fn)
+    def run(*args, **kwargs):
+        return context.run(fn, *args, **kwargs)
+    return run
+
+
+# =============================================================================
+# DUCKDB
+# =============================================================================
+
+class TracedConnection:
+    """DuckDB connection proxy that records a span per statement it runs."""
+
+    def __init__(self, conn, name: str = 'duckdb'):
+        self._conn = conn
+        self._name = name
+
+    @property
+    def raw(self):
+        return self._conn
+
+    def _run(self, method: str, query, args, kwargs):
+        if _current.get() in (None, NOOP_SPAN):
+            return getattr(self._conn, method)(query, *args, **kwargs)
+        with _Scope(f"{self._name}.{method}", None, False) as s:
+            s.set('db.statement', query if isinstance(query, str) else type(query).__name__)
+            return getattr(self._conn, method)(query, *args, **kwargs)
+
+    def execute(self, query, *args, **kwargs):
+        return self._run('execute', query, args, kwargs)
+
+    def executemany(self, query, *args, **kwargs):
+        return self._run('executemany', query, args, kwargs)
+
+    def sql(self, query, *args, **kwargs):
+        return self._run('sql', query, args, kwargs)
+
+    def cursor(self):
+        return TracedConnection(self._conn.cursor(), self._name)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __enter__(self):
+        self._conn.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        return self._conn.__exit__(*exc)
+
+    def __repr__(self):
+        return f"TracedConnection({self._conn!r})"
+
+
+# =============================================================================
+# ASGI MIDDLEWARE
+# =============================================================================
+
+class TracingMiddleware:
+    """
+    ASGI middleware: one trace per HTTP request under the given prefixes.
+
+    The root span is renamed to the matched route template once routing is
+    done (GET /api/chat/unified/session/{session_id}), so summaries group
+    by endpoint rather than by URL.
+    """
+
+    def __init__(self, app, prefixes=('/api',), exclude=('/api/admin/traces',)):
+        self.app = app
+        self.prefixes = tuple(prefixes)
+        self.exclude = tuple(exclude)
+
+    async def __call__(self, scope, receive, send):
+        path = scope.get('path', '')
+        if scope['type'] != 'http' or not path.startswith(self.prefixes) or path.startswith(self.exclude):
+            await self.app(scope, receive, send)
+            return
+
+        method = scope.get('method', 'GET')
+        with trace(f"{method} {path}", **{'http.method': method, 'http.target': path}) as root:
+            async def send_traced(message):
+                if message['type'] == 'http.response.start' and root.recording:
+                    root.set('http.status_code', message['status'])
+                    if message['status'] >= 500:
+                        root.status = 'error'
+                    message = {**message, 'headers': [*message.get('headers', []),
+                                                      (b'x-trace-id', root.trace.trace_id.encode())]}
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_traced)
+            finally:
+                route = getattr(scope.get('route'), 'path', None)
+                if route and root.recording:
+                    root.name = f"{method} {route}"